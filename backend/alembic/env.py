@@ -53,6 +53,9 @@ import app.idempotency_models
 import app.cargo_models
 import app.segmentacao_models
 import app.rotas_entrega_models
+import app.google_maps_cache_models
+import app.pessoa_duplicidade_models
+import app.importacao_produtos_models
 import app.opportunities_models
 import app.opportunity_events_models
 import app.dre_plano_contas_models
@@ -65,12 +68,13 @@ import app.template_models
 import app.veterinario_models
 import app.ecommerce_payment_models
 import app.billing_models
+import app.dre_canais.models
 
 # Stone (pagamentos)
 import app.stone_models  # noqa: F401
 
 # IA models
-from app.ia import aba7_extrato_models, aba7_models  # noqa: F401
+from app.ia import aba5_models, aba7_extrato_models, aba7_models  # noqa: F401
 
 # Configurar metadata para autogenerate
 target_metadata = Base.metadata
@@ -0,0 +1,95 @@
+"""add product code and trigram search indexes
+
+Revision ID: zwu20261017a1
+Revises: zws20260821a1
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from alembic import op
+
+
+revision = "zwu20261017a1"
+down_revision = "zws20260821a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Atalho de codigo bipado no PDV: igualdade por tenant. Produto.codigo ja
+    # tem ux_produtos_tenant_codigo_lower e codigo_barras tem
+    # ix_produtos_tenant_codigo_barras.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_tenant_gtin_ean "
+        "ON produtos (tenant_id, gtin_ean) WHERE gtin_ean IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_tenant_gtin_ean_tributario "
+        "ON produtos (tenant_id, gtin_ean_tributario) "
+        "WHERE gtin_ean_tributario IS NOT NULL"
+    )
+
+    # Busca rapida do PDV (ILIKE '%termo%' em nome/codigo/EANs alternativos).
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_nome_trgm "
+        "ON produtos USING gin (nome gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_codigo_trgm "
+        "ON produtos USING gin (codigo gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_codigos_barras_alternativos_trgm "
+        "ON produtos USING gin (codigos_barras_alternativos gin_trgm_ops) "
+        "WHERE codigos_barras_alternativos IS NOT NULL"
+    )
+    # Prefixo de codigo de barras/GTIN digitado ("7891%") no PDV.
+    for coluna in ("codigo_barras", "gtin_ean", "gtin_ean_tributario"):
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_produtos_{coluna}_trgm "
+            f"ON produtos USING gin ({coluna} gin_trgm_ops) "
+            f"WHERE {coluna} IS NOT NULL"
+        )
+
+    # Codigos so com digitos, calculados pelo banco na escrita: a busca por
+    # digitos compara estas colunas (indexadas) em vez de aplicar
+    # regexp_replace linha a linha. codigos_digitos junta os codigos principais
+    # separados por espaco, para "LIKE '% 7891%'" casar o prefixo de qualquer um.
+    op.execute(
+        "ALTER TABLE produtos ADD COLUMN IF NOT EXISTS codigos_digitos text "
+        "GENERATED ALWAYS AS ("
+        "' ' || regexp_replace(coalesce(codigo, ''), '[^0-9]', '', 'g') "
+        "|| ' ' || regexp_replace(coalesce(codigo_barras, ''), '[^0-9]', '', 'g') "
+        "|| ' ' || regexp_replace(coalesce(gtin_ean, ''), '[^0-9]', '', 'g') "
+        "|| ' ' || regexp_replace(coalesce(gtin_ean_tributario, ''), '[^0-9]', '', 'g')"
+        ") STORED"
+    )
+    op.execute(
+        "ALTER TABLE produtos ADD COLUMN IF NOT EXISTS "
+        "codigos_alternativos_digitos text GENERATED ALWAYS AS ("
+        "regexp_replace(coalesce(codigos_barras_alternativos, ''), '[^0-9]', '', 'g')"
+        ") STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_codigos_digitos_trgm "
+        "ON produtos USING gin (codigos_digitos gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_produtos_codigos_alternativos_digitos_trgm "
+        "ON produtos USING gin (codigos_alternativos_digitos gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_produtos_codigos_alternativos_digitos_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_produtos_codigos_digitos_trgm")
+    op.execute("ALTER TABLE produtos DROP COLUMN IF EXISTS codigos_alternativos_digitos")
+    op.execute("ALTER TABLE produtos DROP COLUMN IF EXISTS codigos_digitos")
+    for coluna in ("gtin_ean_tributario", "gtin_ean", "codigo_barras"):
+        op.execute(f"DROP INDEX IF EXISTS ix_produtos_{coluna}_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_produtos_codigos_barras_alternativos_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_produtos_codigo_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_produtos_nome_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_produtos_tenant_gtin_ean_tributario")
+    op.execute("DROP INDEX IF EXISTS ix_produtos_tenant_gtin_ean")
@@ -0,0 +1,126 @@
+"""add daily DRE by channel fact tables
+
+Revision ID: zwv20261017a1
+Revises: zwu20261017a1
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.tenant_rls_migration import apply_tenant_rls
+
+
+revision = "zwv20261017a1"
+down_revision = "zwu20261017a1"
+branch_labels = None
+depends_on = None
+
+FATOS_TABLE = "dre_canal_fatos_diarios"
+DIAS_TABLE = "dre_canal_dias_calculados"
+
+
+def _base_columns() -> list:
+    return [
+        sa.Column("id", sa.Integer(), sa.Identity(always=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(FATOS_TABLE):
+        op.create_table(
+            FATOS_TABLE,
+            *_base_columns(),
+            sa.Column("data", sa.Date(), nullable=False),
+            sa.Column("canal", sa.String(length=30), nullable=False),
+            sa.Column("linha", sa.String(length=40), nullable=False),
+            sa.Column("valor", sa.Numeric(18, 6), nullable=False),
+            sa.Column("itens", sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "tenant_id",
+                "data",
+                "canal",
+                "linha",
+                name="uq_dre_canal_fatos_diarios_tenant_data_canal_linha",
+            ),
+        )
+        op.create_index(
+            "ix_dre_canal_fatos_diarios_tenant_id",
+            FATOS_TABLE,
+            ["tenant_id"],
+            unique=False,
+        )
+
+    if not inspector.has_table(DIAS_TABLE):
+        op.create_table(
+            DIAS_TABLE,
+            *_base_columns(),
+            sa.Column("data", sa.Date(), nullable=False),
+            sa.Column(
+                "volatil",
+                sa.Boolean(),
+                server_default=sa.text("false"),
+                nullable=False,
+            ),
+            # Nulo: dia reservado por um calculo em andamento
+            sa.Column("calculado_em", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "tenant_id",
+                "data",
+                name="uq_dre_canal_dias_calculados_tenant_data",
+            ),
+        )
+        op.create_index(
+            "ix_dre_canal_dias_calculados_tenant_id",
+            DIAS_TABLE,
+            ["tenant_id"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_dre_canal_dias_calculados_tenant_volatil",
+            DIAS_TABLE,
+            ["tenant_id", "volatil"],
+            unique=False,
+        )
+
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=(FATOS_TABLE, DIAS_TABLE),
+        enable=True,
+    )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tabelas = tuple(
+        table for table in (DIAS_TABLE, FATOS_TABLE) if inspector.has_table(table)
+    )
+    if not tabelas:
+        return
+
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=tabelas,
+        enable=False,
+    )
+    for table in tabelas:
+        op.drop_table(table)
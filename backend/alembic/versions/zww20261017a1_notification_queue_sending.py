@@ -0,0 +1,46 @@
+"""add sending status and claimed_at to notification_queue
+
+Revision ID: zww20261017a1
+Revises: zwv20261017a1
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "zww20261017a1"
+down_revision = "zwv20261017a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # ADD VALUE nao pode ser usado na mesma transacao em que foi criado
+        with op.get_context().autocommit_block():
+            op.execute(
+                "ALTER TYPE notification_status_enum ADD VALUE IF NOT EXISTS 'sending'"
+            )
+
+    op.add_column(
+        "notification_queue",
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Reservas abandonadas (status=sending) sao retomadas por claimed_at
+    op.create_index(
+        "ix_nq_sending_claimed_at",
+        "notification_queue",
+        ["claimed_at"],
+        postgresql_where=sa.text("status = 'sending'"),
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE notification_queue SET status = 'pending' WHERE status = 'sending'"
+    )
+    op.drop_index("ix_nq_sending_claimed_at", table_name="notification_queue")
+    op.drop_column("notification_queue", "claimed_at")
+    # Nota: valores de enum não podem ser removidos facilmente no PostgreSQL
@@ -0,0 +1,55 @@
+"""create whatsapp inbound message queue
+
+Revision ID: zwx20261017a1
+Revises: zww20261017a1
+Create Date: 2026-10-17 18:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "zwx20261017a1"
+down_revision = "zww20261017a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "whatsapp_inbound_queue",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("phone", sa.String(length=40), nullable=False),
+        sa.Column("whatsapp_msg_id", sa.String(length=255), nullable=False),
+        sa.Column("conteudo", sa.Text(), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(length=24), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("tenant_id", "whatsapp_msg_id", name="uq_whatsapp_inbound_tenant_msg"),
+    )
+    op.create_index(op.f("ix_whatsapp_inbound_queue_tenant_id"), "whatsapp_inbound_queue", ["tenant_id"], unique=False)
+    op.create_index("ix_whatsapp_inbound_status_next", "whatsapp_inbound_queue", ["status", "next_attempt_at"], unique=False)
+    op.create_index("ix_whatsapp_inbound_conversation", "whatsapp_inbound_queue", ["tenant_id", "phone", "status"], unique=False)
+    # Deduplicação no salvamento da mensagem ao reprocessar um claim abandonado
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_whatsapp_ia_messages_tenant_wamid "
+        "ON whatsapp_ia_messages (tenant_id, whatsapp_message_id) "
+        "WHERE whatsapp_message_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_whatsapp_ia_messages_tenant_wamid")
+    op.drop_index("ix_whatsapp_inbound_conversation", table_name="whatsapp_inbound_queue")
+    op.drop_index("ix_whatsapp_inbound_status_next", table_name="whatsapp_inbound_queue")
+    op.drop_index(op.f("ix_whatsapp_inbound_queue_tenant_id"), table_name="whatsapp_inbound_queue")
+    op.drop_table("whatsapp_inbound_queue")
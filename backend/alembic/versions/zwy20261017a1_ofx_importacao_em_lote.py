@@ -0,0 +1,36 @@
+"""ofx bulk import progress and fitid lookup index
+
+Revision ID: zwy20261017a1
+Revises: zwx20261017a1
+Create Date: 2026-10-17 19:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "zwy20261017a1"
+down_revision = "zwx20261017a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "extratos_bancarios",
+        sa.Column("movimentacoes_processadas", sa.Integer(), server_default="0", nullable=True),
+    )
+    op.add_column("extratos_bancarios", sa.Column("erro_mensagem", sa.Text(), nullable=True))
+    # Pre-carga de FITIDs ja importados por conta no upload OFX
+    op.create_index(
+        "ix_movimentacoes_bancarias_conta_fitid",
+        "movimentacoes_bancarias",
+        ["tenant_id", "conta_bancaria_id", "fitid"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_movimentacoes_bancarias_conta_fitid", table_name="movimentacoes_bancarias")
+    op.drop_column("extratos_bancarios", "erro_mensagem")
+    op.drop_column("extratos_bancarios", "movimentacoes_processadas")
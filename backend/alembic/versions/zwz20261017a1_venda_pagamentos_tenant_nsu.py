@@ -0,0 +1,28 @@
+"""venda_pagamentos tenant + nsu index for bulk receipt binding
+
+Revision ID: zwz20261017a1
+Revises: zwy20261017a1
+Create Date: 2026-10-17 21:00:00.000000
+"""
+
+from alembic import op
+
+
+revision = "zwz20261017a1"
+down_revision = "zwy20261017a1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Amarracao da Aba 3: todos os NSUs do dia resolvidos em uma consulta
+    op.create_index(
+        "ix_venda_pagamentos_tenant_nsu",
+        "venda_pagamentos",
+        ["tenant_id", "nsu_cartao"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_venda_pagamentos_tenant_nsu", table_name="venda_pagamentos")
@@ -0,0 +1,65 @@
+"""create google maps cache
+
+Revision ID: zxa20261017a1
+Revises: zwz20261017a1
+Create Date: 2026-10-17 22:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.tenant_rls_migration import apply_tenant_rls
+
+
+revision: str = "zxa20261017a1"
+down_revision: Union[str, Sequence[str], None] = "zwz20261017a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+GOOGLE_MAPS_CACHE_RLS_TABLES = ("google_maps_cache",)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "google_maps_cache",
+        sa.Column("id", sa.Integer(), sa.Identity(always=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("tipo", sa.String(length=20), nullable=False),
+        sa.Column("chave", sa.String(length=64), nullable=False),
+        sa.Column("enderecos", sa.Text(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("expira_em", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "tenant_id",
+            "tipo",
+            "chave",
+            name="uq_google_maps_cache_tenant_tipo_chave",
+        ),
+    )
+    op.create_index("ix_google_maps_cache_tenant_id", "google_maps_cache", ["tenant_id"], unique=False)
+    op.create_index("ix_google_maps_cache_expira_em", "google_maps_cache", ["expira_em"], unique=False)
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=GOOGLE_MAPS_CACHE_RLS_TABLES,
+        enable=True,
+    )
+
+
+def downgrade() -> None:
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=GOOGLE_MAPS_CACHE_RLS_TABLES,
+        enable=False,
+    )
+    op.drop_index("ix_google_maps_cache_expira_em", table_name="google_maps_cache")
+    op.drop_index("ix_google_maps_cache_tenant_id", table_name="google_maps_cache")
+    op.drop_table("google_maps_cache")
@@ -0,0 +1,64 @@
+"""create modelo fluxo caixa
+
+Revision ID: zxb20261017a1
+Revises: zxa20261017a1
+Create Date: 2026-10-17 23:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.tenant_rls_migration import apply_tenant_rls
+
+
+revision: str = "zxb20261017a1"
+down_revision: Union[str, Sequence[str], None] = "zxa20261017a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MODELO_FLUXO_CAIXA_RLS_TABLES = ("modelo_fluxo_caixa",)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "modelo_fluxo_caixa",
+        sa.Column("id", sa.Integer(), sa.Identity(always=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("parametros", sa.JSON(), nullable=False),
+        sa.Column("ultimo_dia", sa.Date(), nullable=False),
+        sa.Column("versao_modelo", sa.String(length=40), nullable=False),
+        sa.Column("ajustado_em", sa.DateTime(), nullable=False),
+        sa.Column("atualizado_ate", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["usuario_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "tenant_id",
+            "usuario_id",
+            name="uq_modelo_fluxo_caixa_tenant_usuario",
+        ),
+    )
+    op.create_index("ix_modelo_fluxo_caixa_tenant_id", "modelo_fluxo_caixa", ["tenant_id"], unique=False)
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=MODELO_FLUXO_CAIXA_RLS_TABLES,
+        enable=True,
+    )
+
+
+def downgrade() -> None:
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=MODELO_FLUXO_CAIXA_RLS_TABLES,
+        enable=False,
+    )
+    op.drop_index("ix_modelo_fluxo_caixa_tenant_id", table_name="modelo_fluxo_caixa")
+    op.drop_table("modelo_fluxo_caixa")
@@ -0,0 +1,91 @@
+"""create pessoa chaves duplicidade
+
+Revision ID: zxc20261017a1
+Revises: zxb20261017a1
+Create Date: 2026-10-17 23:30:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.tenant_rls_migration import apply_tenant_rls
+
+
+revision: str = "zxc20261017a1"
+down_revision: Union[str, Sequence[str], None] = "zxb20261017a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PESSOA_CHAVES_DUPLICIDADE_RLS_TABLES = (
+    "pessoa_chaves_duplicidade",
+    "pessoa_indices_duplicidade",
+)
+
+
+def upgrade() -> None:
+    # Preenchimento: scripts/reconstruir_chaves_duplicidade_pessoas.py, ou a
+    # reconstrucao em segundo plano disparada pela primeira varredura de cada
+    # tenant (RLS depende do tenant). Ate pessoa_indices_duplicidade ter a linha
+    # do tenant o indice e tratado como parcial.
+    op.create_table(
+        "pessoa_chaves_duplicidade",
+        sa.Column("id", sa.Integer(), sa.Identity(always=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("cliente_id", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(length=20), nullable=False),
+        sa.Column("valor", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(["cliente_id"], ["clientes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "cliente_id",
+            "tipo",
+            "valor",
+            name="uq_pessoa_chaves_duplicidade_cliente_tipo_valor",
+        ),
+    )
+    op.create_index("ix_pessoa_chaves_duplicidade_tenant_id", "pessoa_chaves_duplicidade", ["tenant_id"], unique=False)
+    op.create_index("ix_pessoa_chaves_duplicidade_cliente_id", "pessoa_chaves_duplicidade", ["cliente_id"], unique=False)
+    op.create_index(
+        "ix_pessoa_chaves_duplicidade_tenant_tipo_valor",
+        "pessoa_chaves_duplicidade",
+        ["tenant_id", "tipo", "valor"],
+        unique=False,
+    )
+    op.create_table(
+        "pessoa_indices_duplicidade",
+        sa.Column("id", sa.Integer(), sa.Identity(always=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("reconstruido_em", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("tenant_id", name="uq_pessoa_indices_duplicidade_tenant"),
+    )
+    op.create_index("ix_pessoa_indices_duplicidade_tenant_id", "pessoa_indices_duplicidade", ["tenant_id"], unique=False)
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=PESSOA_CHAVES_DUPLICIDADE_RLS_TABLES,
+        enable=True,
+    )
+
+
+def downgrade() -> None:
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=PESSOA_CHAVES_DUPLICIDADE_RLS_TABLES,
+        enable=False,
+    )
+    op.drop_index("ix_pessoa_indices_duplicidade_tenant_id", table_name="pessoa_indices_duplicidade")
+    op.drop_table("pessoa_indices_duplicidade")
+    op.drop_index("ix_pessoa_chaves_duplicidade_tenant_tipo_valor", table_name="pessoa_chaves_duplicidade")
+    op.drop_index("ix_pessoa_chaves_duplicidade_cliente_id", table_name="pessoa_chaves_duplicidade")
+    op.drop_index("ix_pessoa_chaves_duplicidade_tenant_id", table_name="pessoa_chaves_duplicidade")
+    op.drop_table("pessoa_chaves_duplicidade")
@@ -0,0 +1,64 @@
+"""create importacoes produtos
+
+Revision ID: zxd20261017a1
+Revises: zxc20261017a1
+Create Date: 2026-10-17 23:45:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.tenant_rls_migration import apply_tenant_rls
+
+
+revision: str = "zxd20261017a1"
+down_revision: Union[str, Sequence[str], None] = "zxc20261017a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+IMPORTACOES_PRODUTOS_RLS_TABLES = ("importacoes_produtos",)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "importacoes_produtos",
+        sa.Column("id", sa.Integer(), sa.Identity(always=True), nullable=False),
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("arquivo_nome", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("total_linhas", sa.Integer(), nullable=True),
+        sa.Column("linhas_processadas", sa.Integer(), nullable=False),
+        sa.Column("criados", sa.Integer(), nullable=False),
+        sa.Column("atualizados", sa.Integer(), nullable=False),
+        sa.Column("total_erros", sa.Integer(), nullable=False),
+        sa.Column("erros", sa.JSON(), nullable=True),
+        sa.Column("erro_mensagem", sa.Text(), nullable=True),
+        sa.Column("concluido_em", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_importacoes_produtos_tenant_id", "importacoes_produtos", ["tenant_id"], unique=False)
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=IMPORTACOES_PRODUTOS_RLS_TABLES,
+        enable=True,
+    )
+
+
+def downgrade() -> None:
+    apply_tenant_rls(
+        op_module=op,
+        sa_module=sa,
+        table_names=IMPORTACOES_PRODUTOS_RLS_TABLES,
+        enable=False,
+    )
+    op.drop_index("ix_importacoes_produtos_tenant_id", table_name="importacoes_produtos")
+    op.drop_table("importacoes_produtos")
@@ -97,7 +97,7 @@ class ContextBuilder:
     # TENANT CONFIG
     # ========================================================================
 
-    @cache.cached(ttl=300, key_prefix="tenant_config")
+    @cache.cached(ttl=300, key_prefix="tenant_config", tags=("whatsapp_config",))
     async def _get_tenant_config(self, tenant_id: str) -> Dict[str, Any]:
         """
         Busca configuração do tenant (com cache).
@@ -159,7 +159,11 @@ class ContextBuilder:
     # CLIENTE INFO
     # ========================================================================
 
-    @cache.cached(ttl=60, key_prefix="cliente_info")
+    @cache.cached(
+        ttl=60,
+        key_prefix="cliente_info",
+        tags=lambda tenant_id, cliente_id: ("vendas", f"cliente:{cliente_id}"),
+    )
     async def _get_cliente_info(
         self, tenant_id: str, cliente_id: str
     ) -> Optional[Dict[str, Any]]:
@@ -266,7 +270,7 @@ class ContextBuilder:
             self.db.rollback()
             return []
 
-    @cache.cached(ttl=600, key_prefix="produtos_populares")
+    @cache.cached(ttl=600, key_prefix="produtos_populares", tags=("vendas", "produtos"))
     async def _get_produtos_populares(
         self, tenant_id: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
@@ -26,7 +26,9 @@ from app.api.endpoints.rotas_entrega_estado_routes import (
     router as estado_router,
 )
 from app.api.endpoints.rotas_entrega_otimizacao_routes import (
+    DistribuirEntregadoresRequest,
     OtimizarSelecionadasRequest,
+    distribuir_vendas_entre_entregadores,
     otimizar_vendas_pendentes,
     otimizar_vendas_selecionadas,
     router as otimizacao_router,
@@ -56,6 +58,7 @@ router.include_router(estado_router)
 
 __all__ = [
     "DeliveryActor",
+    "DistribuirEntregadoresRequest",
     "OtimizarSelecionadasRequest",
     "RegistrarRecebimentoPayload",
     "_activate_delivery_actor_tenant",
@@ -66,6 +69,7 @@ __all__ = [
     "atualizar_localizacao_rota",
     "atualizar_rota",
     "criar_rota",
+    "distribuir_vendas_entre_entregadores",
     "ensure_rotas_entrega_schema",
     "excluir_rota",
     "fechar_rota",
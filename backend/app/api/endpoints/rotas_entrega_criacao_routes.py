@@ -39,7 +39,7 @@ def criar_rota(
 
     ETAPA 7.1: Copia valores de repasse da venda (snapshot).
     ETAPA 9.2: Calcula distância prevista automaticamente usando Google Maps.
-    ETAPA 9.3: Suporta múltiplas vendas com ordem otimizada pelo Google Directions API.
+    ETAPA 9.3: Suporta múltiplas vendas com ordem otimizada pelo roteirizador local (roteirizacao_local).
 
     Modos de uso:
     1. Rota simples (1 venda): Informar venda_id
@@ -169,14 +169,23 @@ def criar_rota(
             tenant_id=tenant_id,
         )
 
-        # Calcular rota otimizada com Google Directions API
+        # Calcular rota otimizada (roteirizador local sobre o cache de distâncias)
         if config_entrega and ponto_inicial:
             try:
                 origem = ponto_inicial
                 destinos = [v.endereco_entrega for v in vendas]
 
-                # Chamar Google para otimizar
-                ordem, legs = calcular_rota_otimizada(origem, destinos)
+                ordem, legs = calcular_rota_otimizada(
+                    origem, destinos, retorna_origem=bool(rota.retorna_origem)
+                )
+                # Trecho em linha reta (sem chave ou API fora) serve para ordenar,
+                # mas não vira distância/tempo previsto da rota
+                medida = not any(leg.get("estimado") for leg in legs)
+                if not medida:
+                    logger.info(
+                        "[ROTA] Distâncias estimadas em linha reta; rota %s sem previsão",
+                        rota.numero,
+                    )
 
                 # Criar paradas na ordem otimizada
                 distancia_total = Decimal(0)
@@ -196,13 +205,18 @@ def criar_rota(
                         venda_id=venda.id,
                         ordem=idx + 1,
                         endereco=venda.endereco_entrega,
-                        distancia_acumulada=distancia_total.quantize(Decimal("0.01")),
-                        tempo_acumulado=tempo_total,
+                        distancia_acumulada=(
+                            distancia_total.quantize(Decimal("0.01"))
+                            if medida
+                            else None
+                        ),
+                        tempo_acumulado=tempo_total if medida else None,
                     )
                     db.add(parada)
 
                 # Atualizar distância prevista da rota
-                rota.distancia_prevista = distancia_total.quantize(Decimal("0.01"))
+                if medida:
+                    rota.distancia_prevista = distancia_total.quantize(Decimal("0.01"))
 
             except Exception as e:
                 # Se falhar otimização, criar paradas na ordem fornecida
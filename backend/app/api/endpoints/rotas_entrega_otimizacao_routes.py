@@ -1,12 +1,13 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_user_and_tenant
 from app.db import get_session
-from app.models import ConfiguracaoEntrega
+from app.models import Cliente, ConfiguracaoEntrega
 from app.utils.logger import logger
 from app.vendas_models import Venda
 
@@ -19,10 +20,9 @@ def otimizar_vendas_pendentes(
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
-    Otimiza ordem de entrega das vendas pendentes usando Google Maps.
-    Salva a ordem no banco para evitar chamadas futuras à API.
-
-    Esta é a ÚNICA vez que chama o Google Maps - depois só lê do banco!
+    Otimiza ordem de entrega das vendas pendentes com o roteirizador local
+    (distâncias do cache do Google Maps, linha reta para pares novos).
+    Salva a ordem no banco; depois só lê do banco!
     """
     from app.services.google_maps_service import calcular_rota_otimizada
 
@@ -93,15 +93,14 @@ def otimizar_vendas_pendentes(
         # Extrair endereços
         destinos = [v.endereco_entrega for v in vendas]
 
-        logger.info(f"🗺️ Chamando Google Maps para otimizar {len(destinos)} entregas...")
+        logger.info(f"🗺️ Roteirizando {len(destinos)} entregas...")
         logger.info(f"📍 Origem: {origem}")
         for i, dest in enumerate(destinos, 1):
             logger.info(f"   {i}. {dest}")
 
-        # Chamar Google Maps UMA VEZ
         ordem_indices, legs = calcular_rota_otimizada(origem, destinos)
 
-        logger.info(f"🎯 Google Maps retornou ordem: {ordem_indices}")
+        logger.info(f"🎯 Ordem otimizada: {ordem_indices}")
 
         # Salvar ordem otimizada no banco
         for posicao, indice_original in enumerate(ordem_indices, start=1):
@@ -184,6 +183,10 @@ def otimizar_vendas_selecionadas(
             Venda.tenant_id == tenant_id,
             Venda.id.in_(payload.venda_ids),
             Venda.tem_entrega.is_(True),
+            or_(
+                Venda.status_entrega.in_(["pendente", "pronto"]),
+                Venda.status_entrega.is_(None),
+            ),
             Venda.endereco_entrega.isnot(None),
         )
         .order_by(Venda.created_at.asc())
@@ -224,3 +227,154 @@ def otimizar_vendas_selecionadas(
         logger.error(f"❌ Erro ao otimizar rotas selecionadas: {e}")
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao otimizar rotas: {str(e)}")
+
+
+class DistribuirEntregadoresRequest(BaseModel):
+    venda_ids: List[int]
+    entregador_ids: List[int]
+    capacidade_por_entregador: Optional[int] = None
+    jornada_minutos: Optional[int] = None
+
+
+@router.post("/vendas-pendentes/distribuir-entregadores")
+def distribuir_vendas_entre_entregadores(
+    payload: DistribuirEntregadoresRequest,
+    db: Session = Depends(get_session),
+    user_and_tenant=Depends(get_current_user_and_tenant),
+):
+    """
+    Divide as vendas selecionadas entre vários entregadores e define a ordem
+    de cada um com o roteirizador local (sem chamar a Directions API).
+
+    Respeita a capacidade (entregas por entregador) e a jornada informadas;
+    vendas que não couberem ficam sem entregador (e sem ordem) e voltam em
+    ``nao_atendidas``. Só entram vendas ainda não despachadas (pendente, pronto
+    ou sem status), como na criação de rotas.
+    """
+    from app.services.roteirizacao_local import (
+        EntregadorRoteirizacao,
+        ParadaRoteirizacao,
+        matriz_por_enderecos,
+        planejar_rotas,
+    )
+
+    user, tenant_id = user_and_tenant
+
+    if not payload.venda_ids:
+        raise HTTPException(status_code=400, detail="Nenhuma venda selecionada")
+
+    entregador_ids = list(dict.fromkeys(payload.entregador_ids))
+    entregadores_validos = {
+        entregador_id
+        for (entregador_id,) in db.query(Cliente.id).filter(
+            Cliente.tenant_id == tenant_id,
+            Cliente.id.in_(entregador_ids),
+            Cliente.is_entregador.is_(True),
+            Cliente.entregador_ativo.is_(True),
+        )
+    }
+    if not entregador_ids or len(entregadores_validos) != len(entregador_ids):
+        raise HTTPException(status_code=400, detail="Entregador inválido")
+
+    config = (
+        db.query(ConfiguracaoEntrega)
+        .filter(ConfiguracaoEntrega.tenant_id == tenant_id)
+        .first()
+    )
+
+    if not config or not config.logradouro:
+        raise HTTPException(
+            status_code=400,
+            detail="Configure o endereço da loja em Configurações > Entregas primeiro",
+        )
+
+    origem = ", ".join(
+        filter(
+            None,
+            [
+                config.logradouro,
+                config.numero,
+                config.bairro,
+                config.cidade,
+                config.estado,
+                config.cep,
+            ],
+        )
+    )
+
+    vendas = (
+        db.query(Venda)
+        .filter(
+            Venda.tenant_id == tenant_id,
+            Venda.id.in_(payload.venda_ids),
+            Venda.tem_entrega.is_(True),
+            or_(
+                Venda.status_entrega.in_(["pendente", "pronto"]),
+                Venda.status_entrega.is_(None),
+            ),
+            Venda.endereco_entrega.isnot(None),
+        )
+        .order_by(Venda.created_at.asc())
+        .all()
+    )
+
+    if not vendas:
+        raise HTTPException(
+            status_code=404, detail="Nenhuma venda encontrada com os IDs fornecidos"
+        )
+
+    jornada_s = (
+        payload.jornada_minutos * 60 if payload.jornada_minutos is not None else None
+    )
+
+    try:
+        matriz = matriz_por_enderecos(origem, [v.endereco_entrega for v in vendas])
+        plano = planejar_rotas(
+            matriz,
+            [ParadaRoteirizacao() for _ in vendas],
+            [
+                EntregadorRoteirizacao(
+                    chave=entregador_id,
+                    capacidade=payload.capacidade_por_entregador,
+                    jornada_s=jornada_s,
+                )
+                for entregador_id in entregador_ids
+            ],
+        )
+
+        resumo = []
+        for rota in plano.rotas:
+            for posicao, indice in enumerate(rota.paradas, start=1):
+                vendas[indice].entregador_id = rota.entregador.chave
+                vendas[indice].ordem_entrega_otimizada = posicao
+            resumo.append(
+                {
+                    "entregador_id": rota.entregador.chave,
+                    "ordem": [vendas[i].numero_venda for i in rota.paradas],
+                    "distancia_km": round(rota.distancia_m / 1000, 2),
+                    "duracao_minutos": round(rota.duracao_s / 60),
+                }
+            )
+        # Sem isso a venda manteria o entregador/ordem de uma distribuição anterior
+        for indice in plano.nao_atendidas:
+            vendas[indice].entregador_id = None
+            vendas[indice].ordem_entrega_otimizada = None
+
+        db.commit()
+
+        total = len(vendas) - len(plano.nao_atendidas)
+        return {
+            "message": f"Entregas distribuídas! {total} vendas entre {len(entregador_ids)} entregadores.",
+            "total_otimizado": total,
+            "entregadores": resumo,
+            "nao_atendidas": [vendas[i].numero_venda for i in plano.nao_atendidas],
+            # Algum trecho em linha reta: distâncias/durações são aproximadas
+            "distancias_estimadas": matriz.pares_linha_reta > 0,
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao distribuir entregas: {e}")
+        db.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Erro ao distribuir entregas: {str(e)}"
+        )
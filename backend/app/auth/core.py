@@ -10,7 +10,7 @@ import os
 from typing import Optional
 from app.security.jwt_compat import JWTError, jwt
 import bcrypt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session as DBSession
 from app import db, models
@@ -140,6 +140,7 @@ def create_refresh_token(
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: DBSession = Depends(db.get_session),
+    request: Request = None,
 ) -> models.User:
     """
     Dependency para obter usuário atual via JWT token.
@@ -152,7 +153,13 @@ def get_current_user(
     Raises:
         HTTPException 401: Se token inválido ou usuário inativo
     """
-    from app.session_manager import validate_session
+    from app.auth.principal_cache import (
+        attach_cached_user,
+        principal_cache,
+        set_current_principal_jti,
+    )
+    from app.security.request_claims import get_request_claims
+    from app.session_manager import get_valid_session
     from app.tenancy.rls import sync_rls_auth_user
 
     token = credentials.credentials
@@ -163,7 +170,8 @@ def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+        # Reaproveita o decode feito pelo pipeline HTTP para o mesmo token.
+        payload = get_request_claims(request, token)
         user_id = payload.get("sub")
         jti = payload.get("jti")  # JWT ID para validação de sessão
 
@@ -178,13 +186,24 @@ def get_current_user(
         except Exception:
             raise credentials_exception
 
+        set_current_principal_jti(jti)
+        cached = principal_cache.get(jti)
+        if cached is not None and cached.user_id == user_id:
+            # Sessao e usuario validados ha poucos segundos: sem consultas.
+            sync_rls_auth_user(session, user_id)
+            return attach_cached_user(session, cached)
+
+        generation = principal_cache.generation
+        user_session = None
         # Validar sessão se JTI estiver presente
-        if jti and not validate_session(session, jti):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Session revoked or expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        if jti:
+            user_session = get_valid_session(session, jti)
+            if user_session is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Session revoked or expired",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
 
     except JWTError:
         raise credentials_exception
@@ -196,6 +215,9 @@ def get_current_user(
     if user is None or not user.is_active:
         raise credentials_exception
 
+    if user_session is not None and user_session.user_id == user.id:
+        principal_cache.store_session(jti, user, user_session, generation)
+
     return user
 
 
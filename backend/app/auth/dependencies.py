@@ -5,16 +5,16 @@ Dependências de Autenticação
 Funções de dependência para FastAPI validar permissões de usuários.
 """
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.security.jwt_compat import JWTError, jwt
+from app.security.jwt_compat import JWTError
+from app.security.request_claims import get_request_claims
 from .core import get_current_user  # Importa do módulo local core.py
 from app.db import get_session
 from app.models import Tenant, User, UserTenant
-from app.config import JWT_SECRET_KEY
-from app.auth.core import ALGORITHM
+from app.auth.principal_cache import principal_cache, set_current_principal_jti
 from app.session_manager import get_session_by_jti
 
 security = HTTPBearer()
@@ -28,6 +28,7 @@ async def get_current_user_and_tenant(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_session),
+    request: Request = None,
 ) -> tuple[User, UUID]:
     """
     DEPENDENCY OFICIAL PARA ROTAS MULTI-TENANT.
@@ -54,8 +55,8 @@ async def get_current_user_and_tenant(
     token = credentials.credentials
 
     try:
-        # Decodificar token novamente para extrair tenant_id
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+        # Claims ja decodificados pelo pipeline HTTP (decode local como fallback)
+        payload = get_request_claims(request, token)
         tenant_id_str = payload.get("tenant_id")
         token_jti = payload.get("jti")
         user_email = payload.get("sub")  # email do usuário
@@ -101,8 +102,14 @@ async def get_current_user_and_tenant(
         from app.tenancy.context import set_current_tenant
 
         set_current_tenant(tenant_id)
+        set_current_principal_jti(token_jti)
         logger.debug(f"[MULTI-TENANT] Contexto configurado: tenant_id={tenant_id}")
 
+        # Vinculo, tenant e sessao ja validados para este JTI dentro do TTL.
+        if principal_cache.get_tenant_principal(token_jti, user.id, tenant_id):
+            return user, tenant_id
+
+        generation = principal_cache.generation
         user_tenant = (
             db.query(UserTenant)
             .filter(
@@ -163,6 +170,9 @@ async def get_current_user_and_tenant(
         if db_session.tenant_id is None:
             db_session.tenant_id = tenant_id
             db.flush()
+            generation = principal_cache.generation
+
+        principal_cache.mark_tenant_validated(token_jti, user.id, tenant_id, generation)
 
         logger.debug(
             f"[get_current_user_and_tenant] Retornando user.id={user.id} + tenant_id={tenant_id}"
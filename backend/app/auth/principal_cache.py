@@ -0,0 +1,377 @@
+"""
+Cache do principal autenticado
+==============================
+
+Cada request multi-tenant resolve o mesmo conjunto de dados de autenticacao:
+sessao (JTI), usuario, vinculo ``UserTenant``, status do ``Tenant`` e o
+conjunto expandido de permissoes. Este modulo guarda esse resultado por JTI
+em memoria, com TTL curto, para que requests consecutivas do mesmo token
+(ex.: terminais de PDV) nao repitam 5-6 consultas de autenticacao.
+
+Regras de seguranca:
+- Somente resolucoes bem-sucedidas entram no cache; falhas sempre voltam ao banco.
+- A entrada nunca sobrevive ao ``expires_at`` da sessao persistida.
+- Escritas ORM em ``UserSession``, ``User``, ``UserTenant``, ``Tenant``, ``Role``
+  e ``RolePermission`` invalidam as entradas afetadas no flush e novamente no
+  commit (logout, troca de role, suspensao de tenant, desativacao de vinculo).
+- O cache e por processo: outros workers so enxergam a invalidacao quando o TTL
+  expira, por isso o TTL padrao e curto (``AUTH_PRINCIPAL_CACHE_TTL_SECONDS``,
+  0 desliga o cache).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models import Role, RolePermission, Tenant, User, UserSession, UserTenant
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "15"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", "5000"))
+
+_PENDING_INVALIDATIONS_KEY = "principal_cache_pending_invalidations"
+
+_current_principal_jti: ContextVar[Optional[str]] = ContextVar(
+    "current_principal_jti", default=None
+)
+
+
+def _as_aware_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@dataclass
+class CachedPrincipal:
+    """Snapshot imutavel do que foi validado para um JTI."""
+
+    jti: str
+    user_id: int
+    user_state: dict[str, Any]
+    session_tenant_id: Optional[str]
+    session_expires_at: Optional[datetime]
+    expires_at_monotonic: float
+    tenant_id: Optional[str] = None
+    permissions: Optional[frozenset[str]] = None
+
+    def is_expired(self, now_monotonic: float) -> bool:
+        if now_monotonic >= self.expires_at_monotonic:
+            return True
+        if self.session_expires_at is None:
+            return False
+        return self.session_expires_at <= datetime.now(timezone.utc)
+
+
+@dataclass
+class PrincipalCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+
+class PrincipalCache:
+    """Cache de principal por JTI com indices reversos para invalidacao."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+    ):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: dict[str, CachedPrincipal] = {}
+        self._by_user: dict[int, set[str]] = {}
+        self._by_tenant: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+        self._generation = 0
+        self.stats = PrincipalCacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        """Contador de invalidacoes; capture antes de consultar o banco.
+
+        Escritas com uma geracao antiga sao descartadas, evitando que uma
+        resolucao concorrente grave dados lidos antes de uma invalidacao.
+        """
+        return self._generation
+
+    # ------------------------------------------------------------------ leitura
+
+    def get(self, jti: Optional[str]) -> Optional[CachedPrincipal]:
+        if not jti or not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if entry.is_expired(time.monotonic()):
+                self._discard(jti)
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            return entry
+
+    def get_tenant_principal(
+        self, jti: Optional[str], user_id: int, tenant_id
+    ) -> Optional[CachedPrincipal]:
+        """Retorna a entrada apenas se o tenant ja foi validado para o JTI."""
+        entry = self.get(jti)
+        if entry is None or entry.user_id != user_id:
+            return None
+        if entry.tenant_id is None or entry.tenant_id != str(tenant_id):
+            return None
+        return entry
+
+    def get_permissions(self, user_id: int, tenant_id) -> Optional[frozenset[str]]:
+        """Permissoes ja expandidas do principal da request corrente."""
+        entry = self.get_tenant_principal(
+            _current_principal_jti.get(), user_id, tenant_id
+        )
+        if entry is None:
+            return None
+        return entry.permissions
+
+    # ------------------------------------------------------------------ escrita
+
+    def store_session(
+        self, jti: str, user: User, user_session: UserSession, generation: int
+    ) -> None:
+        """Registra sessao + usuario validados por ``get_current_user``."""
+        if not jti or not self.enabled or generation != self._generation:
+            return
+        entry = CachedPrincipal(
+            jti=jti,
+            user_id=user.id,
+            user_state=snapshot_user(user),
+            session_tenant_id=(
+                str(user_session.tenant_id) if user_session.tenant_id else None
+            ),
+            session_expires_at=_as_aware_utc(user_session.expires_at),
+            expires_at_monotonic=time.monotonic() + self._ttl,
+        )
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._discard(jti)
+            if len(self._entries) >= self._max_entries:
+                self._evict_oldest()
+            self._entries[jti] = entry
+            self._by_user.setdefault(entry.user_id, set()).add(jti)
+
+    def mark_tenant_validated(
+        self, jti: str, user_id: int, tenant_id, generation: int
+    ) -> None:
+        """Registra que vinculo, tenant e sessao foram validados para o tenant."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            entry = self._entries.get(jti)
+            if entry is None or entry.user_id != user_id:
+                return
+            tenant_key = str(tenant_id)
+            entry.tenant_id = tenant_key
+            entry.session_tenant_id = tenant_key
+            self._by_tenant.setdefault(tenant_key, set()).add(jti)
+
+    def store_permissions(
+        self, user_id: int, tenant_id, permissions: set[str], generation: int
+    ) -> None:
+        jti = _current_principal_jti.get()
+        with self._lock:
+            if generation != self._generation:
+                return
+            entry = self._entries.get(jti) if jti else None
+            if entry is None or entry.user_id != user_id:
+                return
+            if entry.tenant_id != str(tenant_id):
+                return
+            entry.permissions = frozenset(permissions)
+
+    # ------------------------------------------------------------- invalidacao
+
+    def invalidate_jti(self, jti: Optional[str]) -> None:
+        if not jti:
+            return
+        with self._lock:
+            self._generation += 1
+            if self._discard(jti):
+                self.stats.invalidations += 1
+
+    def invalidate_user(self, user_id: Optional[int]) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            self._generation += 1
+            for jti in list(self._by_user.get(user_id, ())):
+                if self._discard(jti):
+                    self.stats.invalidations += 1
+
+    def invalidate_tenant(self, tenant_id) -> None:
+        if tenant_id is None:
+            return
+        with self._lock:
+            self._generation += 1
+            for jti in list(self._by_tenant.get(str(tenant_id), ())):
+                if self._discard(jti):
+                    self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.stats.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_user.clear()
+            self._by_tenant.clear()
+
+    def _discard(self, jti: str) -> bool:
+        entry = self._entries.pop(jti, None)
+        if entry is None:
+            return False
+        user_jtis = self._by_user.get(entry.user_id)
+        if user_jtis is not None:
+            user_jtis.discard(jti)
+            if not user_jtis:
+                self._by_user.pop(entry.user_id, None)
+        if entry.tenant_id is not None:
+            tenant_jtis = self._by_tenant.get(entry.tenant_id)
+            if tenant_jtis is not None:
+                tenant_jtis.discard(jti)
+                if not tenant_jtis:
+                    self._by_tenant.pop(entry.tenant_id, None)
+        return True
+
+    def _evict_oldest(self) -> None:
+        now = time.monotonic()
+        expired = [jti for jti, e in self._entries.items() if e.is_expired(now)]
+        for jti in expired:
+            self._discard(jti)
+        if len(self._entries) >= self._max_entries:
+            # dict preserva ordem de insercao: a primeira chave e a mais antiga.
+            self._discard(next(iter(self._entries)))
+
+
+principal_cache = PrincipalCache()
+
+
+def set_current_principal_jti(jti: Optional[str]) -> None:
+    _current_principal_jti.set(jti)
+
+
+def get_current_principal_jti() -> Optional[str]:
+    return _current_principal_jti.get()
+
+
+# ---------------------------------------------------------------------- usuario
+
+
+def snapshot_user(user: User) -> dict[str, Any]:
+    """Copia as colunas carregadas do usuario para reanexar sem consulta."""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+def attach_cached_user(db: Session, entry: CachedPrincipal) -> User:
+    """Reanexa o usuario do cache na sessao da request sem emitir SELECT."""
+    user = inspect(User).class_manager.new_instance()
+    for key, value in entry.user_state.items():
+        setattr(user, key, value)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+# --------------------------------------------------------- hooks de invalidacao
+
+_WATCHED_MODELS = (UserSession, User, UserTenant, Tenant, Role, RolePermission)
+
+
+def _invalidation_keys_for(obj) -> list[tuple[str, Any]]:
+    if isinstance(obj, UserSession):
+        return [("jti", obj.token_jti), ("user", obj.user_id)]
+    if isinstance(obj, User):
+        return [("user", obj.id)]
+    if isinstance(obj, UserTenant):
+        return [("user", obj.user_id), ("tenant", obj.tenant_id)]
+    if isinstance(obj, Tenant):
+        return [("tenant", obj.id)]
+    if isinstance(obj, (Role, RolePermission)):
+        return [("tenant", obj.tenant_id)]
+    return []
+
+
+def _apply_invalidation(kind: str, value) -> None:
+    if kind == "jti":
+        principal_cache.invalidate_jti(value)
+    elif kind == "user":
+        principal_cache.invalidate_user(value)
+    elif kind == "tenant":
+        principal_cache.invalidate_tenant(value)
+    elif kind == "all":
+        principal_cache.clear()
+
+
+def _invalidate_principals_after_flush(session: Session, _flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_INVALIDATIONS_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, _WATCHED_MODELS):
+            continue
+        for kind, value in _invalidation_keys_for(obj):
+            if value is None:
+                continue
+            pending.add((kind, value))
+            _apply_invalidation(kind, value)
+
+
+def _invalidate_principals_on_bulk_write(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, _WATCHED_MODELS):
+        return
+    # Bulk UPDATE/DELETE nao informa as linhas afetadas: invalida tudo.
+    orm_execute_state.session.info.setdefault(_PENDING_INVALIDATIONS_KEY, set()).add(
+        ("all", None)
+    )
+    principal_cache.clear()
+
+
+def _invalidate_principals_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
+    for kind, value in pending or ():
+        _apply_invalidation(kind, value)
+
+
+def _discard_pending_invalidations(session: Session, *_args) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
+
+
+def register_principal_cache_listeners() -> None:
+    listeners = (
+        ("after_flush", _invalidate_principals_after_flush),
+        ("do_orm_execute", _invalidate_principals_on_bulk_write),
+        ("after_commit", _invalidate_principals_after_commit),
+        ("after_rollback", _discard_pending_invalidations),
+    )
+    for event_name, listener in listeners:
+        if not event.contains(Session, event_name, listener):
+            event.listen(Session, event_name, listener)
+
+
+register_principal_cache_listeners()
@@ -7,6 +7,7 @@ from fastapi import HTTPException
 from sqlalchemy import func, or_
 from sqlalchemy.orm import Session, joinedload
 
+from app.banho_tosa_agenda_indice import IndiceIntervalos
 from app.banho_tosa_api.utils import (
     STATUS_AGENDAMENTO_FINAIS,
     obter_ou_criar_configuracao,
@@ -222,14 +223,4 @@ def _duracao_minutos(inicio: datetime, fim: datetime) -> int:
 
 
 def _calcular_pico(janelas: list[tuple[datetime, datetime]]) -> int:
-    eventos = []
-    for inicio, fim in janelas:
-        eventos.append((normalizar_data_operacional(inicio), 1))
-        eventos.append((normalizar_data_operacional(fim), -1))
-
-    atual = 0
-    pico = 0
-    for _, delta in sorted(eventos, key=lambda item: (item[0], item[1])):
-        atual += delta
-        pico = max(pico, atual)
-    return pico
+    return IndiceIntervalos(janelas).pico_simultaneo()
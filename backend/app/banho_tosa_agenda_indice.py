@@ -0,0 +1,95 @@
+"""Indice de intervalos da agenda de Banho & Tosa.
+
+Montado uma vez por requisicao: para cada dia e recurso, as listas ordenadas
+de inicios e fins dos agendamentos. Quantos agendamentos cruzam um slot
+``[inicio, fim)`` sai de duas buscas binarias,
+
+    (inicios < fim) - (fins <= inicio)
+
+ja que todo agendamento encerrado antes do slot tambem comecou antes do fim
+dele. E o mesmo criterio de sobreposicao da varredura linear
+(``ag_inicio < fim and ag_fim > inicio``).
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+from app.banho_tosa_datetime import normalizar_data_operacional
+
+
+class IndiceIntervalos:
+    """Intervalos ``[inicio, fim)`` com contagem de sobreposicao em O(log n)."""
+
+    def __init__(self, intervalos: Iterable[tuple[datetime, Optional[datetime]]] = ()):
+        inicios = []
+        fins = []
+        # Fim antes do inicio (cadastro inconsistente) quebra a conta por
+        # busca binaria; esses poucos casos sao conferidos um a um
+        self._invertidos = []
+        for inicio, fim in intervalos:
+            inicio = normalizar_data_operacional(inicio)
+            if inicio is None:
+                continue
+            fim = normalizar_data_operacional(fim) or inicio
+            if fim < inicio:
+                self._invertidos.append((inicio, fim))
+                continue
+            inicios.append(inicio)
+            fins.append(fim)
+        inicios.sort()
+        fins.sort()
+        self.inicios = inicios
+        self.fins = fins
+
+    def __len__(self) -> int:
+        return len(self.inicios) + len(self._invertidos)
+
+    def sobrepostos(self, inicio: datetime, fim: datetime) -> int:
+        inicio = normalizar_data_operacional(inicio)
+        fim = normalizar_data_operacional(fim)
+        total = bisect_left(self.inicios, fim) - bisect_right(self.fins, inicio)
+        for ag_inicio, ag_fim in self._invertidos:
+            if ag_inicio < fim and ag_fim > inicio:
+                total += 1
+        return max(total, 0)
+
+    def pico_simultaneo(self) -> int:
+        """Maior numero de intervalos abertos ao mesmo tempo (fins antes de inicios no empate)."""
+        atual = 0
+        pico = 0
+        j = 0
+        fins = sorted([*self.fins, *(fim for _, fim in self._invertidos)])
+        inicios = sorted([*self.inicios, *(inicio for inicio, _ in self._invertidos)])
+        for inicio in inicios:
+            while j < len(fins) and fins[j] <= inicio:
+                atual -= 1
+                j += 1
+            atual += 1
+            pico = max(pico, atual)
+        return pico
+
+
+class IndiceAgenda:
+    """Indices por ``(dia, recurso_id)`` dos agendamentos carregados numa consulta."""
+
+    def __init__(self, agendamentos: Iterable):
+        grupos = defaultdict(list)
+        for agendamento in agendamentos:
+            inicio = normalizar_data_operacional(agendamento.data_hora_inicio)
+            if inicio is None:
+                continue
+            grupos[(inicio.date(), agendamento.recurso_id)].append(
+                (inicio, agendamento.data_hora_fim_prevista)
+            )
+        self._indices = {
+            chave: IndiceIntervalos(intervalos) for chave, intervalos in grupos.items()
+        }
+
+    def do_recurso(self, dia: date, recurso_id) -> IndiceIntervalos:
+        return self._indices.get((dia, recurso_id)) or IndiceIntervalos()
+
+    def ocupacao(self, recurso_id, inicio: datetime, fim: datetime) -> int:
+        indice = self._indices.get((inicio.date(), recurso_id))
+        return indice.sobrepostos(inicio, fim) if indice else 0
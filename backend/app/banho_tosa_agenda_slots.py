@@ -1,17 +1,20 @@
 """Sugestao de horarios livres para a agenda de Banho & Tosa."""
 
 from datetime import date, datetime, timedelta
-from typing import Optional
+from typing import Optional, Sequence
 
 from sqlalchemy.orm import Session
 
+from app.banho_tosa_agenda_indice import IndiceAgenda, IndiceIntervalos
 from app.banho_tosa_api.utils import (
     STATUS_AGENDAMENTO_FINAIS,
     obter_ou_criar_configuracao,
 )
-from app.banho_tosa_datetime import normalizar_data_operacional
 from app.banho_tosa_models import BanhoTosaAgendamento, BanhoTosaRecurso
 
+# Busca do app de agendamento: ate um mes a frente
+DIAS_MAXIMOS_BUSCA = 31
+
 
 def sugerir_slots_agenda(
     db: Session,
@@ -20,27 +23,20 @@ def sugerir_slots_agenda(
     data_ref: date,
     duracao_minutos: int = 60,
     recurso_id: Optional[int] = None,
+    tipos_recurso: Optional[Sequence[str]] = None,
     limit: int = 12,
 ) -> list[dict]:
     config = obter_ou_criar_configuracao(db, tenant_id)
-    recursos = _listar_recursos(db, tenant_id, recurso_id)
+    recursos = _listar_recursos(db, tenant_id, recurso_id, tipos_recurso)
     if not recursos:
         return []
 
-    inicio_janela = datetime.combine(data_ref, _parse_hora(config.horario_inicio, 8, 0))
-    fim_janela = datetime.combine(data_ref, _parse_hora(config.horario_fim, 18, 0))
-    intervalo = max(int(config.intervalo_slot_minutos or 30), 5)
-    duracao = max(int(duracao_minutos or 60), intervalo)
-    agendamentos = _listar_agendamentos_dia(db, tenant_id, data_ref)
-
+    indice = IndiceAgenda(
+        _listar_agendamentos_periodo(db, tenant_id, data_ref, data_ref)
+    )
     sugestoes = []
-    cursor = inicio_janela
-    while cursor + timedelta(minutes=duracao) <= fim_janela:
-        slot_fim = cursor + timedelta(minutes=duracao)
-        sugestoes.extend(
-            _avaliar_recursos_no_slot(recursos, agendamentos, cursor, slot_fim)
-        )
-        cursor += timedelta(minutes=intervalo)
+    for inicio, fim in _horarios_do_dia(config, data_ref, duracao_minutos):
+        sugestoes.extend(_avaliar_recursos_no_slot(recursos, indice, inicio, fim))
 
     sugestoes.sort(
         key=lambda item: (
@@ -52,8 +48,85 @@ def sugerir_slots_agenda(
     return sugestoes[:limit]
 
 
+def sugerir_slots_periodo(
+    db: Session,
+    tenant_id,
+    *,
+    data_inicio: date,
+    dias: int = 7,
+    duracao_minutos: int = 60,
+    recurso_id: Optional[int] = None,
+    tipos_recurso: Optional[Sequence[str]] = None,
+    limit: int = 12,
+) -> list[dict]:
+    """Primeiros horarios com vaga a partir de ``data_inicio``, em ordem cronologica.
+
+    Uma consulta carrega os agendamentos do periodo todo; dias fora de
+    ``dias_funcionamento`` sao pulados e a busca para no ``limit``-esimo slot.
+    """
+    config = obter_ou_criar_configuracao(db, tenant_id)
+    recursos = _listar_recursos(db, tenant_id, recurso_id, tipos_recurso)
+    if not recursos:
+        return []
+
+    dias = max(1, min(int(dias or 7), DIAS_MAXIMOS_BUSCA))
+    data_fim = data_inicio + timedelta(days=dias - 1)
+    indice = IndiceAgenda(
+        _listar_agendamentos_periodo(db, tenant_id, data_inicio, data_fim)
+    )
+
+    sugestoes = []
+    for offset in range(dias):
+        dia = data_inicio + timedelta(days=offset)
+        if not dia_funciona(config, dia):
+            continue
+        for inicio, fim in _horarios_do_dia(config, dia, duracao_minutos):
+            no_slot = _avaliar_recursos_no_slot(recursos, indice, inicio, fim)
+            no_slot.sort(
+                key=lambda item: (item["ocupacao_no_slot"], item["recurso_nome"])
+            )
+            sugestoes.extend(no_slot)
+            if len(sugestoes) >= limit:
+                return sugestoes[:limit]
+    return sugestoes
+
+
+def dia_funciona(config, dia: date) -> bool:
+    dias = getattr(config, "dias_funcionamento", None) or []
+    if not dias:
+        return True
+    nomes = {
+        0: {"segunda", "seg"},
+        1: {"terca", "terça", "ter"},
+        2: {"quarta", "qua"},
+        3: {"quinta", "qui"},
+        4: {"sexta", "sex"},
+        5: {"sabado", "sábado", "sab"},
+        6: {"domingo", "dom"},
+    }
+    configurados = {str(item).strip().lower() for item in dias}
+    return bool(nomes.get(dia.weekday(), set()) & configurados)
+
+
+def _horarios_do_dia(config, dia: date, duracao_minutos: int) -> list[tuple]:
+    inicio_janela = datetime.combine(dia, _parse_hora(config.horario_inicio, 8, 0))
+    fim_janela = datetime.combine(dia, _parse_hora(config.horario_fim, 18, 0))
+    intervalo = max(int(config.intervalo_slot_minutos or 30), 5)
+    duracao = timedelta(minutes=max(int(duracao_minutos or 60), intervalo))
+
+    horarios = []
+    cursor = inicio_janela
+    while cursor + duracao <= fim_janela:
+        horarios.append((cursor, cursor + duracao))
+        cursor += timedelta(minutes=intervalo)
+    return horarios
+
+
 def _listar_recursos(
-    db: Session, tenant_id, recurso_id: Optional[int]
+    db: Session,
+    tenant_id,
+    recurso_id: Optional[int],
+    tipos_recurso: Optional[Sequence[str]] = None,
 ) -> list[BanhoTosaRecurso]:
     query = db.query(BanhoTosaRecurso).filter(
         BanhoTosaRecurso.tenant_id == tenant_id,
@@ -61,34 +134,36 @@ def _listar_recursos(
     )
     if recurso_id:
         query = query.filter(BanhoTosaRecurso.id == recurso_id)
+    if tipos_recurso:
+        query = query.filter(BanhoTosaRecurso.tipo.in_(list(tipos_recurso)))
     return query.order_by(
         BanhoTosaRecurso.tipo.asc(), BanhoTosaRecurso.nome.asc()
     ).all()
 
 
-def _listar_agendamentos_dia(
-    db: Session, tenant_id, data_ref: date
+def _listar_agendamentos_periodo(
+    db: Session, tenant_id, data_inicio: date, data_fim: date
 ) -> list[BanhoTosaAgendamento]:
-    inicio_dia = datetime.combine(data_ref, _parse_hora("00:00", 0, 0))
-    fim_dia = datetime.combine(data_ref, _parse_hora("23:59", 23, 59))
+    inicio_periodo = datetime.combine(data_inicio, _parse_hora("00:00", 0, 0))
+    fim_periodo = datetime.combine(data_fim, _parse_hora("23:59", 23, 59))
     return (
         db.query(BanhoTosaAgendamento)
         .filter(
             BanhoTosaAgendamento.tenant_id == tenant_id,
             BanhoTosaAgendamento.status.notin_(list(STATUS_AGENDAMENTO_FINAIS)),
-            BanhoTosaAgendamento.data_hora_inicio >= inicio_dia,
-            BanhoTosaAgendamento.data_hora_inicio <= fim_dia,
+            BanhoTosaAgendamento.data_hora_inicio >= inicio_periodo,
+            BanhoTosaAgendamento.data_hora_inicio <= fim_periodo,
         )
         .all()
     )
 
 
 def _avaliar_recursos_no_slot(
-    recursos, agendamentos, inicio: datetime, fim: datetime
+    recursos, indice: IndiceAgenda, inicio: datetime, fim: datetime
 ) -> list[dict]:
     sugestoes = []
     for recurso in recursos:
-        ocupacao = _ocupacao_recurso_no_slot(agendamentos, recurso.id, inicio, fim)
+        ocupacao = indice.ocupacao(recurso.id, inicio, fim)
         capacidade = max(int(recurso.capacidade_simultanea or 1), 1)
         if ocupacao >= capacidade:
             continue
@@ -113,19 +188,11 @@ def _avaliar_recursos_no_slot(
 def _ocupacao_recurso_no_slot(
     agendamentos, recurso_id: int, inicio: datetime, fim: datetime
 ) -> int:
-    total = 0
-    inicio_slot = normalizar_data_operacional(inicio)
-    fim_slot = normalizar_data_operacional(fim)
-    for agendamento in agendamentos:
-        if agendamento.recurso_id != recurso_id:
-            continue
-        ag_inicio = normalizar_data_operacional(agendamento.data_hora_inicio)
-        ag_fim = (
-            normalizar_data_operacional(agendamento.data_hora_fim_prevista) or ag_inicio
-        )
-        if ag_inicio < fim_slot and ag_fim > inicio_slot:
-            total += 1
-    return total
+    return IndiceIntervalos(
+        (agendamento.data_hora_inicio, agendamento.data_hora_fim_prevista)
+        for agendamento in agendamentos
+        if agendamento.recurso_id == recurso_id
+    ).sobrepostos(inicio, fim)
 
 
 def _parse_hora(valor: str, hora_padrao: int, minuto_padrao: int):
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_user_and_tenant
 from app.banho_tosa_agenda_capacity import montar_capacidade_dia
-from app.banho_tosa_agenda_slots import sugerir_slots_agenda
+from app.banho_tosa_agenda_slots import sugerir_slots_agenda, sugerir_slots_periodo
 from app.banho_tosa_schemas import (
     BanhoTosaCapacidadeDiaResponse,
     BanhoTosaSlotSugestaoResponse,
@@ -34,6 +34,7 @@ def obter_sugestoes_slots(
     data_referencia: date = Query(...),
     duracao_minutos: int = Query(60, ge=5, le=720),
     recurso_id: int | None = Query(None, gt=0),
+    tipo_recurso: list[str] | None = Query(None),
     limit: int = Query(12, ge=1, le=50),
     db: Session = Depends(get_session),
     current=Depends(get_current_user_and_tenant),
@@ -45,5 +46,33 @@ def obter_sugestoes_slots(
         data_ref=data_referencia,
         duracao_minutos=duracao_minutos,
         recurso_id=recurso_id,
+        tipos_recurso=tipo_recurso,
+        limit=limit,
+    )
+
+
+@router.get(
+    "/agendamentos/sugestoes-slots-periodo",
+    response_model=list[BanhoTosaSlotSugestaoResponse],
+)
+def obter_sugestoes_slots_periodo(
+    data_inicio: date = Query(...),
+    dias: int = Query(7, ge=1, le=31),
+    duracao_minutos: int = Query(60, ge=5, le=720),
+    recurso_id: int | None = Query(None, gt=0),
+    tipo_recurso: list[str] | None = Query(None),
+    limit: int = Query(12, ge=1, le=50),
+    db: Session = Depends(get_session),
+    current=Depends(get_current_user_and_tenant),
+):
+    _, tenant_id = _get_tenant(current)
+    return sugerir_slots_periodo(
+        db,
+        tenant_id,
+        data_inicio=data_inicio,
+        dias=dias,
+        duracao_minutos=duracao_minutos,
+        recurso_id=recurso_id,
+        tipos_recurso=tipo_recurso,
         limit=limit,
     )
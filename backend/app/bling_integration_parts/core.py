@@ -13,6 +13,12 @@ from typing import Dict, Iterator, Optional
 import requests
 from dotenv import dotenv_values
 
+from app.bling_integration_parts.http_client import (
+    _sessao_http_bling,
+    adquirir_token_bling,
+    penalizar_rate_limit_bling,
+    registrar_metricas_bling,
+)
 from app.utils.logger import logger
 
 
@@ -21,10 +27,7 @@ BLING_OAUTH_TOKEN_URL = f"{BLING_API_BASE_URL}/oauth/token"
 BLING_NFE_SERIE_PADRAO = 1
 BLING_NFCE_SERIE_PADRAO = 3
 TOKEN_CONTROL_FILE = Path("bling_token_control.json")
-_BLING_RATE_LOCK = threading.Lock()
 _BLING_TOKEN_THREAD_LOCK = threading.RLock()
-_BLING_LAST_REQUEST_AT = 0.0
-_BLING_MIN_INTERVAL_SECONDS = 0.42
 ENV_PATHS = [
     Path("/opt/petshop/.env"),
     Path(__file__).resolve().parents[2] / ".env",
@@ -104,16 +107,9 @@ def _load_bling_runtime_config(*, lock_held: bool = False) -> Dict[str, str]:
     }
 
 
-def _aguardar_slot_bling() -> None:
-    global _BLING_LAST_REQUEST_AT
-
-    with _BLING_RATE_LOCK:
-        now = time.monotonic()
-        wait_for = _BLING_MIN_INTERVAL_SECONDS - (now - _BLING_LAST_REQUEST_AT)
-        if wait_for > 0:
-            time.sleep(wait_for)
-            now = time.monotonic()
-        _BLING_LAST_REQUEST_AT = now
+def _aguardar_slot_bling(account: Optional[str] = None) -> float:
+    """Espera a vez no token bucket da conta (compartilhado entre workers)."""
+    return adquirir_token_bling(account)
 
 
 def _tempo_espera_rate_limit_bling(response, tentativa: int) -> float:
@@ -310,31 +306,43 @@ class BlingAPIBase:
         token_renovado = False
         self._recarregar_tokens_compartilhados()
 
+        account = getattr(self, "client_id", None)
+        session = _sessao_http_bling()
+
         for tentativa in range(5):
             access_token_usado = self.access_token
             headers = self._get_headers()
 
             try:
-                _aguardar_slot_bling()
-
-                if method == "GET":
-                    response = requests.get(  # NOSONAR - endpoint validado por _montar_url_bling
-                        url, headers=headers, params=data, timeout=30
-                    )
-                elif method == "POST":
-                    response = requests.post(  # NOSONAR - endpoint validado por _montar_url_bling
-                        url, headers=headers, json=data, timeout=30
-                    )
-                elif method == "PUT":
-                    response = requests.put(  # NOSONAR - endpoint validado por _montar_url_bling
-                        url, headers=headers, json=data, timeout=30
-                    )
-                elif method == "DELETE":
-                    response = requests.delete(  # NOSONAR - endpoint validado por _montar_url_bling
-                        url, headers=headers, timeout=30
+                espera_fila = _aguardar_slot_bling(account)
+                inicio = time.monotonic()
+                response = None
+                try:
+                    if method == "GET":
+                        response = session.get(  # NOSONAR - endpoint validado por _montar_url_bling
+                            url, headers=headers, params=data, timeout=30
+                        )
+                    elif method == "POST":
+                        response = session.post(  # NOSONAR - endpoint validado por _montar_url_bling
+                            url, headers=headers, json=data, timeout=30
+                        )
+                    elif method == "PUT":
+                        response = session.put(  # NOSONAR - endpoint validado por _montar_url_bling
+                            url, headers=headers, json=data, timeout=30
+                        )
+                    elif method == "DELETE":
+                        response = session.delete(  # NOSONAR - endpoint validado por _montar_url_bling
+                            url, headers=headers, timeout=30
+                        )
+                    else:
+                        raise ValueError(f"Método HTTP inválido: {method}")
+                finally:
+                    registrar_metricas_bling(
+                        wait=espera_fila,
+                        latency=time.monotonic() - inicio,
+                        error=response is None
+                        or getattr(response, "status_code", 200) >= 400,
                     )
-                else:
-                    raise ValueError(f"Método HTTP inválido: {method}")
 
                 response.raise_for_status()
                 return response.json()
@@ -347,7 +355,9 @@ class BlingAPIBase:
                     logger.warning(
                         f"Bling rate limit em {endpoint}. Aguardando {espera:.1f}s antes de repetir ({tentativa + 1}/5).",
                     )
-                    time.sleep(espera)
+                    # O cooldown vale para todos os workers da conta; a proxima
+                    # volta do loop espera por ele em _aguardar_slot_bling
+                    penalizar_rate_limit_bling(espera, account)
                     continue
 
                 if not token_renovado and self._deve_renovar_token_apos_erro(e):
@@ -0,0 +1,226 @@
+"""Cliente HTTP compartilhado da API Bling: pool de conexoes e token bucket.
+
+- Sessao ``requests`` por thread com ``HTTPAdapter`` (keep-alive): chamadas
+  seguidas reaproveitam a conexao TLS em vez de um handshake por request.
+- Token bucket por conta Bling (client_id) com estado num arquivo JSON sob
+  ``flock``, compartilhado entre os workers uvicorn como o controle de rate
+  limit da fila de estoque. O lock e segurado so para atualizar o balde;
+  a espera acontece fora dele.
+- Backoff adaptativo: um 429 (na chamada ou via
+  ``BlingSyncService.register_rate_limit_cooldown``) abre um cooldown e
+  reduz a taxa pela metade; a taxa volta aos poucos ao valor configurado.
+- Metricas em processo de espera na fila e latencia das requisicoes
+  (``bling_http_metrics_snapshot``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows/dev
+    fcntl = None
+
+
+BLING_RATE_PER_SECOND = float(os.getenv("BLING_RATE_PER_SECOND", "2.5"))
+BLING_RATE_BURST = float(os.getenv("BLING_RATE_BURST", "3"))
+BLING_RATE_MIN_PER_SECOND = 0.5
+# Quanto a taxa reduzida por 429 recupera por segundo sem novos 429
+BLING_RATE_RECOVERY_PER_SECOND = 0.05
+BLING_HTTP_POOL_SIZE = int(os.getenv("BLING_HTTP_POOL_SIZE", "8"))
+BLING_HTTP_BUCKETS_FILE = Path(
+    os.getenv("BLING_HTTP_BUCKETS_FILE")
+    or (Path(tempfile.gettempdir()) / "petshop_bling_http_buckets.json")
+)
+
+_FALLBACK_LOCK = threading.Lock()
+_thread_local = threading.local()
+
+
+def _sessao_http_bling() -> requests.Session:
+    """Sessao HTTP da thread atual (pool de conexoes com keep-alive)."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=BLING_HTTP_POOL_SIZE,
+            max_retries=0,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _thread_local.session = session
+    return session
+
+
+# ============================================================================
+# TOKEN BUCKET COMPARTILHADO
+# ============================================================================
+
+
+class _BucketFile:
+    """Estado dos baldes em arquivo JSON com lock exclusivo entre processos."""
+
+    def __enter__(self):
+        BLING_HTTP_BUCKETS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(BLING_HTTP_BUCKETS_FILE, "a+", encoding="utf-8")
+        if fcntl:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            _FALLBACK_LOCK.acquire()
+        self._handle.seek(0)
+        try:
+            state = json.loads(self._handle.read() or "{}")
+        except ValueError:
+            state = {}
+        self.state: Dict[str, Dict[str, float]] = (
+            state if isinstance(state, dict) else {}
+        )
+        return self
+
+    def save(self) -> None:
+        self._handle.seek(0)
+        self._handle.truncate()
+        self._handle.write(json.dumps(self.state))
+        self._handle.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                _FALLBACK_LOCK.release()
+        finally:
+            self._handle.close()
+
+
+def _bucket_key(account: Optional[str]) -> str:
+    return f"bling:{account or 'default'}"
+
+
+def _refill(bucket: Dict[str, float], now: float) -> Dict[str, float]:
+    elapsed = max(now - float(bucket.get("updated_at") or now), 0.0)
+    rate = min(
+        BLING_RATE_PER_SECOND,
+        float(bucket.get("rate") or BLING_RATE_PER_SECOND)
+        + elapsed * BLING_RATE_RECOVERY_PER_SECOND,
+    )
+    # Durante o cooldown de um 429 o balde nao reabastece
+    refill_from = max(
+        float(bucket.get("updated_at") or now),
+        float(bucket.get("cooldown_until") or 0.0),
+    )
+    tokens = float(bucket.get("tokens", BLING_RATE_BURST))
+    bucket["tokens"] = min(
+        BLING_RATE_BURST, tokens + max(now - refill_from, 0.0) * rate
+    )
+    bucket["rate"] = rate
+    bucket["updated_at"] = now
+    return bucket
+
+
+def adquirir_token_bling(account: Optional[str] = None) -> float:
+    """Espera um token do balde da conta; retorna o tempo esperado (s)."""
+    key = _bucket_key(account)
+    started = time.monotonic()
+    while True:
+        with _BucketFile() as shared:
+            now = time.time()
+            bucket = _refill(shared.state.get(key) or {}, now)
+            cooldown_until = float(bucket.get("cooldown_until") or 0.0)
+            if cooldown_until > now:
+                wait_for = cooldown_until - now
+            elif bucket["tokens"] >= 1.0:
+                bucket["tokens"] -= 1.0
+                shared.state[key] = bucket
+                shared.save()
+                return time.monotonic() - started
+            else:
+                wait_for = (1.0 - bucket["tokens"]) / bucket["rate"]
+            shared.state[key] = bucket
+            shared.save()
+        time.sleep(min(max(wait_for, 0.01), 5.0))
+
+
+def penalizar_rate_limit_bling(seconds: float, account: Optional[str] = None) -> None:
+    """Aplica cooldown e reduz a taxa do balde apos um 429 do Bling."""
+    key = _bucket_key(account)
+    with _BucketFile() as shared:
+        now = time.time()
+        bucket = _refill(shared.state.get(key) or {}, now)
+        bucket["cooldown_until"] = max(
+            float(bucket.get("cooldown_until") or 0.0), now + max(seconds, 0.0)
+        )
+        bucket["rate"] = max(BLING_RATE_MIN_PER_SECOND, bucket["rate"] / 2)
+        bucket["tokens"] = 0.0
+        shared.state[key] = bucket
+        shared.save()
+    _METRICS.rate_limited()
+
+
+# ============================================================================
+# METRICAS
+# ============================================================================
+
+
+class _BlingHttpMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def observe(self, *, wait: float, latency: float, error: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def rate_limited(self) -> None:
+        with self._lock:
+            self.rate_limited_count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.requests or 1
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited_count,
+                "queue_wait_avg_ms": round(self.wait_total / total * 1000, 1),
+                "queue_wait_max_ms": round(self.wait_max * 1000, 1),
+                "latency_avg_ms": round(self.latency_total / total * 1000, 1),
+                "latency_max_ms": round(self.latency_max * 1000, 1),
+            }
+
+
+_METRICS = _BlingHttpMetrics()
+
+
+def registrar_metricas_bling(*, wait: float, latency: float, error: bool) -> None:
+    _METRICS.observe(wait=wait, latency=latency, error=error)
+
+
+def bling_http_metrics_snapshot() -> Dict[str, Any]:
+    """Espera na fila do token bucket e latencia das chamadas deste processo."""
+    return _METRICS.snapshot()
@@ -3,7 +3,6 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Dict, Optional
 
-import requests
 from sqlalchemy.orm import Session
 
 from app.bling_integration_fiscal import (
@@ -18,6 +17,7 @@ from app.bling_integration_parts.core import (
     BLING_NFE_SERIE_PADRAO,
     _montar_url_bling,
 )
+from app.bling_integration_parts.http_client import _sessao_http_bling
 from app.utils.logger import logger
 
 
@@ -333,10 +333,9 @@ class BlingNotasMixin:
         headers = self._get_headers()
 
         try:
-            response = (
-                requests.get(  # NOSONAR - endpoint validado por _montar_url_bling
-                    url, headers=headers, timeout=30
-                )
+            session = _sessao_http_bling()
+            response = session.get(  # NOSONAR - endpoint validado por _montar_url_bling
+                url, headers=headers, timeout=30
             )
             response.raise_for_status()
             return response.content
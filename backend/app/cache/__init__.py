@@ -1,9 +1,9 @@
 """
 Cache Module
 
-Cache abstrato que suporta:
-- In-memory (MVP)
-- Redis (produção)
+Cache em dois níveis:
+- L1: LRU em memória por processo
+- L2: Redis compartilhado (produção, se REDIS_URL estiver configurado)
 
-Mudança transparente via configuração.
+Chaves por tenant, invalidação por tag e single-flight em cache_manager.py.
 """
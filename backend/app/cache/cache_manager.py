@@ -1,28 +1,58 @@
 """
-Cache Manager - Abstração de Cache
+Cache Manager - Camada de cache do sistema
 
-Suporta:
-- In-Memory (MVP) - funciona sem Redis
-- Redis (Produção) - migração transparente
+Dois niveis:
+- L1: LRU em memoria por processo (O(1) para ler, gravar e despejar)
+- L2: Redis compartilhado entre workers (se REDIS_URL estiver configurado)
+
+Recursos:
+- Namespaces por tenant: a chave inclui o tenant (argumento ou contexto)
+- Tags (surrogate keys): ``invalidate_tags("vendas")`` derruba tudo que foi
+  gravado com a tag, alimentado pelos eventos de dominio
+  (``app.domain.events.handlers.CacheEventHandler``)
+- Single-flight: com varias requisicoes no mesmo miss, so uma recalcula
+- Metricas de hit/miss por namespace em ``get_stats()``
 
 Uso:
     from app.cache.cache_manager import cache
 
-    @cache.cached(ttl=300)
-    async def get_produtos_populares(tenant_id):
+    @cache.cached(ttl=600, key_prefix="produtos_populares", tags=("vendas",))
+    async def get_produtos_populares(tenant_id, limit=5):
         return await db.query(...)
+
+    payload = cache.get_or_set(
+        "nfe_listagem", (data_inicial, data_final), carregar,
+        ttl=45, tags=("nfe",), tenant_id=tenant_id,
+    )
+
+Com Redis, a invalidacao chega aos outros workers pelo L2; o L1 deles guarda a
+entrada por no maximo ``CACHE_L1_TTL_SECONDS`` (padrao 30s).
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Callable
-from datetime import datetime, timedelta
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
 from functools import wraps
-import json
+import asyncio
+import inspect
 import os
+import pickle
+import threading
+import time
 import logging
 
+from app.tenancy.context import get_current_tenant
+
 logger = logging.getLogger(__name__)
 
+PREFIXO_CHAVE = "cache"
+TENANT_GLOBAL = "global"
+TODOS_TENANTS = "*"
+TTL_TAG_SEGUNDOS = 86400
+
+_AUSENTE = object()
+
 
 # ============================================================================
 # ABSTRACT CACHE
@@ -30,133 +60,134 @@ logger = logging.getLogger(__name__)
 
 
 class CacheBackend(ABC):
-    """Interface abstrata de cache"""
+    """Interface de um nivel de cache (chaves ja com namespace)."""
 
     @abstractmethod
-    async def get(self, key: str) -> Optional[Any]:
-        """Buscar valor no cache"""
-        pass
+    def get(self, key: str) -> Any:
+        """Buscar valor; ``_AUSENTE`` se nao houver"""
 
     @abstractmethod
-    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Armazenar valor no cache"""
-        pass
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> bool:
+        """Armazenar valor com expiracao e tags"""
 
     @abstractmethod
-    async def delete(self, key: str) -> bool:
-        """Deletar valor do cache"""
-        pass
+    def delete(self, key: str) -> bool:
+        """Deletar valor"""
 
     @abstractmethod
-    async def clear(self) -> bool:
-        """Limpar todo o cache"""
-        pass
+    def invalidate_tag(self, tag: str) -> int:
+        """Deletar tudo que foi gravado com a tag; retorna quantas chaves"""
 
     @abstractmethod
-    async def exists(self, key: str) -> bool:
-        """Verificar se chave existe"""
-        pass
+    def clear(self) -> bool:
+        """Limpar todo o cache"""
 
 
 # ============================================================================
-# IN-MEMORY CACHE (MVP)
+# L1 - LRU EM MEMORIA
 # ============================================================================
 
 
-class InMemoryCache(CacheBackend):
-    """
-    Cache em memória (processo atual).
+@dataclass
+class _Entrada:
+    valor: Any
+    expira_em: float
+    tags: tuple = ()
 
-    Vantagens:
-    - Zero configuração
-    - Zero infra adicional
-    - Perfeito para MVP
 
-    Limitações:
-    - Não compartilhado entre workers
-    - Perdido ao reiniciar
-    - Cresce com uso de memória
+class InMemoryCache(CacheBackend):
     """
+    LRU em memoria (processo atual), thread-safe.
 
-    def __init__(self):
-        self._cache: dict = {}
-        self._timestamps: dict = {}
-        self._max_size = 1000  # Limite de segurança
-        logger.info("✅ InMemoryCache inicializado (MVP mode)")
-
-    async def get(self, key: str) -> Optional[Any]:
-        """Buscar no cache"""
-        if key in self._cache:
-            # Verificar TTL
-            expires_at = self._timestamps.get(key)
-            if expires_at and datetime.now() < expires_at:
-                return self._cache[key]
-            else:
-                # Expirou
-                await self.delete(key)
-        return None
+    OrderedDict na ordem de uso: leitura move a chave para o fim e o despejo
+    remove do inicio, sem varrer o cache. Um indice tag -> chaves permite
+    invalidar por tag sem percorrer todas as entradas.
+    """
 
-    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Armazenar no cache"""
-        try:
-            # Proteção contra crescimento infinito
-            if len(self._cache) >= self._max_size and key not in self._cache:
-                # Remover item mais antigo
-                oldest_key = min(self._timestamps, key=self._timestamps.get)
-                await self.delete(oldest_key)
-
-            self._cache[key] = value
-            self._timestamps[key] = datetime.now() + timedelta(seconds=ttl)
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao armazenar no cache: {e}")
-            return False
+    def __init__(self, max_entries: int = 1000):
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._por_tag: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._max_entries = max(int(max_entries), 1)
+        self._despejos = 0
+        logger.info(f"✅ InMemoryCache (LRU) inicializado: {self._max_entries} chaves")
+
+    def _remover(self, key: str) -> None:
+        entrada = self._entradas.pop(key, None)
+        if entrada is None:
+            return
+        for tag in entrada.tags:
+            chaves = self._por_tag.get(tag)
+            if chaves is not None:
+                chaves.discard(key)
+                if not chaves:
+                    del self._por_tag[tag]
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(key)
+            if entrada is None:
+                return _AUSENTE
+            if entrada.expira_em <= time.monotonic():
+                self._remover(key)
+                return _AUSENTE
+            self._entradas.move_to_end(key)
+            return entrada.valor
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> bool:
+        tags = tuple(tags)
+        with self._lock:
+            self._remover(key)
+            self._entradas[key] = _Entrada(value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._por_tag.setdefault(tag, set()).add(key)
+            while len(self._entradas) > self._max_entries:
+                self._remover(next(iter(self._entradas)))
+                self._despejos += 1
+        return True
 
-    async def delete(self, key: str) -> bool:
-        """Deletar do cache"""
-        if key in self._cache:
-            del self._cache[key]
-        if key in self._timestamps:
-            del self._timestamps[key]
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            self._remover(key)
         return True
 
-    async def clear(self) -> bool:
-        """Limpar cache"""
-        self._cache.clear()
-        self._timestamps.clear()
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            chaves = list(self._por_tag.get(tag, ()))
+            for key in chaves:
+                self._remover(key)
+        return len(chaves)
+
+    def clear(self) -> bool:
+        with self._lock:
+            self._entradas.clear()
+            self._por_tag.clear()
         logger.info("Cache limpo")
         return True
 
-    async def exists(self, key: str) -> bool:
-        """Verificar existência"""
-        value = await self.get(key)
-        return value is not None
-
     def stats(self) -> dict:
-        """Estatísticas do cache"""
-        now = datetime.now()
-        expired = sum(1 for exp in self._timestamps.values() if exp < now)
-        return {
-            "total_keys": len(self._cache),
-            "expired_keys": expired,
-            "active_keys": len(self._cache) - expired,
-            "max_size": self._max_size,
-        }
+        """Estatísticas do L1"""
+        with self._lock:
+            return {
+                "total_keys": len(self._entradas),
+                "max_size": self._max_entries,
+                "evictions": self._despejos,
+                "tags": len(self._por_tag),
+            }
 
 
 # ============================================================================
-# REDIS CACHE (PRODUÇÃO)
+# L2 - REDIS
 # ============================================================================
 
 
 class RedisCache(CacheBackend):
     """
-    Cache Redis (produção).
+    Cache Redis (compartilhado entre workers).
 
-    Vantagens:
-    - Compartilhado entre workers
-    - Persiste entre restarts (opcional)
-    - Alta performance
+    Valores vao serializados com pickle (datas, Decimal e UUID voltam com o
+    tipo original); o Redis e interno, nunca exposto a dados de terceiros.
+    Cada tag e um SET com as chaves gravadas com ela.
 
     Requer:
     - REDIS_URL no .env
@@ -165,9 +196,12 @@ class RedisCache(CacheBackend):
 
     def __init__(self, redis_url: str):
         try:
-            import redis.asyncio as aioredis
+            import redis
 
-            self.redis = aioredis.from_url(redis_url, decode_responses=True)
+            self.redis = redis.Redis.from_url(
+                redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            self.redis.ping()
             logger.info(f"✅ RedisCache conectado: {redis_url}")
         except ImportError:
             raise ImportError("redis-py não instalado. Execute: pip install redis")
@@ -175,52 +209,61 @@ class RedisCache(CacheBackend):
             logger.error(f"Erro ao conectar Redis: {e}")
             raise
 
-    async def get(self, key: str) -> Optional[Any]:
-        """Buscar no Redis"""
+    @staticmethod
+    def _chave_tag(tag: str) -> str:
+        return f"{PREFIXO_CHAVE}:tag:{tag}"
+
+    def get(self, key: str) -> Any:
         try:
-            value = await self.redis.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            bruto = self.redis.get(key)
+            return _AUSENTE if bruto is None else pickle.loads(bruto)
         except Exception as e:
             logger.error(f"Erro ao buscar do Redis: {e}")
-            return None
+            return _AUSENTE
 
-    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Armazenar no Redis"""
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> bool:
         try:
-            serialized = json.dumps(value, default=str)
-            await self.redis.setex(key, ttl, serialized)
+            pipe = self.redis.pipeline()
+            pipe.setex(key, ttl, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+            for tag in tags:
+                chave_tag = self._chave_tag(tag)
+                pipe.sadd(chave_tag, key)
+                # O SET da tag precisa durar mais que as entradas que aponta
+                pipe.expire(chave_tag, max(ttl, TTL_TAG_SEGUNDOS))
+            pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Erro ao armazenar no Redis: {e}")
             return False
 
-    async def delete(self, key: str) -> bool:
-        """Deletar do Redis"""
+    def delete(self, key: str) -> bool:
         try:
-            await self.redis.delete(key)
+            self.redis.delete(key)
             return True
         except Exception as e:
             logger.error(f"Erro ao deletar do Redis: {e}")
             return False
 
-    async def clear(self) -> bool:
-        """Limpar Redis (cuidado!)"""
+    def invalidate_tag(self, tag: str) -> int:
         try:
-            await self.redis.flushdb()
-            logger.warning("Redis flushdb executado")
-            return True
+            chave_tag = self._chave_tag(tag)
+            chaves = list(self.redis.smembers(chave_tag))
+            self.redis.delete(*chaves, chave_tag)
+            return len(chaves)
         except Exception as e:
-            logger.error(f"Erro ao limpar Redis: {e}")
-            return False
+            logger.error(f"Erro ao invalidar tag no Redis: {e}")
+            return 0
 
-    async def exists(self, key: str) -> bool:
-        """Verificar existência"""
+    def clear(self) -> bool:
+        """Remove so as chaves do cache (nao executa flushdb)"""
         try:
-            return await self.redis.exists(key) > 0
+            chaves = list(self.redis.scan_iter(match=f"{PREFIXO_CHAVE}:*"))
+            for inicio in range(0, len(chaves), 500):
+                self.redis.delete(*chaves[inicio : inicio + 500])
+            logger.warning("Cache Redis limpo")
+            return True
         except Exception as e:
-            logger.error(f"Erro ao verificar existência: {e}")
+            logger.error(f"Erro ao limpar Redis: {e}")
             return False
 
 
@@ -229,93 +272,379 @@ class RedisCache(CacheBackend):
 # ============================================================================
 
 
+@dataclass
+class _Voo:
+    """Calculo em andamento de uma chave (single-flight entre threads)."""
+
+    pronto: threading.Event = field(default_factory=threading.Event)
+    valor: Any = None
+    erro: Optional[BaseException] = None
+
+
 class CacheManager:
     """
-    Gerenciador de cache com seleção automática de backend.
+    Gerenciador de cache em dois niveis (L1 memoria + L2 Redis opcional).
 
-    Usa Redis se REDIS_URL estiver configurado, senão in-memory.
+    Usa Redis como L2 se REDIS_URL estiver configurado; sem ele, so o L1.
     """
 
-    def __init__(self):
-        redis_url = os.getenv("REDIS_URL")
-
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        l1_ttl_max: Optional[int] = None,
+    ):
+        redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+        self.l1 = InMemoryCache(
+            max_entries or int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000"))
+        )
+        self.l2: Optional[RedisCache] = None
+        self.backend_type = "in-memory"
         if redis_url:
             try:
-                self.backend = RedisCache(redis_url)
-                self.backend_type = "redis"
+                self.l2 = RedisCache(redis_url)
+                self.backend_type = "in-memory+redis"
             except Exception as e:
                 logger.warning(f"Redis não disponível: {e}. Usando in-memory cache.")
-                self.backend = InMemoryCache()
-                self.backend_type = "in-memory"
-        else:
-            self.backend = InMemoryCache()
-            self.backend_type = "in-memory"
+        # Com L2, o L1 guarda pouco tempo para enxergar invalidacoes de outros workers
+        self.l1_ttl_max: Optional[int] = None
+        if self.l2 is not None:
+            self.l1_ttl_max = l1_ttl_max or int(os.getenv("CACHE_L1_TTL_SECONDS", "30"))
+        self._metricas: dict[str, Counter] = {}
+        self._invalidacoes: Counter = Counter()
+        self._metricas_lock = threading.Lock()
+        self._voos: dict[str, _Voo] = {}
+        self._voos_async: dict[tuple[int, str], asyncio.Future] = {}
+        self._voos_lock = threading.Lock()
 
         logger.info(f"🗄️ Cache Manager inicializado: {self.backend_type}")
 
-    async def get(self, key: str) -> Optional[Any]:
-        """Buscar valor"""
-        return await self.backend.get(key)
-
-    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Armazenar valor"""
-        return await self.backend.set(key, value, ttl)
+    # ------------------------------------------------------------------
+    # Chaves, tags e metricas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _tenant(tenant_id: Any) -> Optional[str]:
+        tenant_id = tenant_id if tenant_id is not None else get_current_tenant()
+        return None if tenant_id is None else str(tenant_id)
+
+    def make_key(self, namespace: str, key: Any, tenant_id: Any = None) -> str:
+        """Chave completa: ``cache:<tenant>:<namespace>:<key>``."""
+        if isinstance(key, (tuple, list)):
+            key = ":".join("" if parte is None else str(parte) for parte in key)
+        tenant = self._tenant(tenant_id) or TENANT_GLOBAL
+        return f"{PREFIXO_CHAVE}:{tenant}:{namespace}:{key}"
+
+    def _tags(self, tags: Iterable[str], tenant_id: Any) -> tuple:
+        """Cada tag vale no tenant e na invalidacao sem tenant (``*``)."""
+        tenant = self._tenant(tenant_id) or TENANT_GLOBAL
+        resultado = []
+        for tag in tags:
+            resultado.extend((f"{tenant}:{tag}", f"{TODOS_TENANTS}:{tag}"))
+        return tuple(resultado)
+
+    def _contar(self, namespace: str, evento: str) -> None:
+        with self._metricas_lock:
+            self._metricas.setdefault(namespace, Counter())[evento] += 1
+
+    def _ttl_l1(self, ttl: float) -> float:
+        return min(ttl, self.l1_ttl_max) if self.l1_ttl_max else ttl
+
+    # ------------------------------------------------------------------
+    # Operacoes sincronas
+    # ------------------------------------------------------------------
+
+    def _ler(self, namespace: str, chave: str) -> Any:
+        valor = self.l1.get(chave)
+        if valor is not _AUSENTE:
+            self._contar(namespace, "hits_l1")
+            return valor
+        if self.l2 is not None:
+            envelope = self.l2.get(chave)
+            if envelope is not _AUSENTE:
+                valor, tags, expira_em = envelope
+                restante = expira_em - time.time()
+                if restante > 0:
+                    self.l1.set(chave, valor, self._ttl_l1(restante), tags)
+                    self._contar(namespace, "hits_l2")
+                    return valor
+        self._contar(namespace, "misses")
+        return _AUSENTE
+
+    def _gravar(
+        self, namespace: str, chave: str, valor: Any, ttl: int, tags: tuple
+    ) -> bool:
+        self._contar(namespace, "sets")
+        self.l1.set(chave, valor, self._ttl_l1(ttl), tags)
+        if self.l2 is not None:
+            return self.l2.set(chave, (valor, tags, time.time() + ttl), ttl, tags)
+        return True
 
-    async def delete(self, key: str) -> bool:
+    def get(
+        self, namespace: str, key: Any, tenant_id: Any = None, default: Any = None
+    ) -> Any:
+        """Buscar valor (L1, depois L2)"""
+        valor = self._ler(namespace, self.make_key(namespace, key, tenant_id))
+        return default if valor is _AUSENTE else valor
+
+    def set(
+        self,
+        namespace: str,
+        key: Any,
+        value: Any,
+        ttl: int = 300,
+        tags: Iterable[str] = (),
+        tenant_id: Any = None,
+    ) -> bool:
+        """Armazenar valor nos dois niveis"""
+        return self._gravar(
+            namespace,
+            self.make_key(namespace, key, tenant_id),
+            value,
+            ttl,
+            self._tags(tags, tenant_id),
+        )
+
+    def delete(self, namespace: str, key: Any, tenant_id: Any = None) -> bool:
         """Deletar valor"""
-        return await self.backend.delete(key)
+        chave = self.make_key(namespace, key, tenant_id)
+        self.l1.delete(chave)
+        if self.l2 is not None:
+            return self.l2.delete(chave)
+        return True
+
+    def invalidate_tags(self, *tags: str, tenant_id: Any = None) -> int:
+        """
+        Invalida as entradas gravadas com as tags.
 
-    async def clear(self) -> bool:
+        Sem tenant (argumento ou contexto), invalida a tag em todos os tenants.
+        """
+        tenant = self._tenant(tenant_id)
+        removidas = 0
+        for tag in tags:
+            chave_tag = f"{tenant or TODOS_TENANTS}:{tag}"
+            removidas += self.l1.invalidate_tag(chave_tag)
+            if self.l2 is not None:
+                removidas += self.l2.invalidate_tag(chave_tag)
+            with self._metricas_lock:
+                self._invalidacoes[tag] += 1
+        return removidas
+
+    def clear(self) -> bool:
         """Limpar cache"""
-        return await self.backend.clear()
+        self.l1.clear()
+        if self.l2 is not None:
+            return self.l2.clear()
+        return True
+
+    def get_or_set(
+        self,
+        namespace: str,
+        key: Any,
+        factory: Callable[[], Any],
+        ttl: int = 300,
+        tags: Iterable[str] = (),
+        tenant_id: Any = None,
+    ) -> Any:
+        """
+        Retorna do cache ou calcula com ``factory`` (single-flight).
 
-    async def exists(self, key: str) -> bool:
-        """Verificar existência"""
-        return await self.backend.exists(key)
+        Threads que chegam durante o calculo esperam o resultado em vez de
+        recalcular. ``None`` nao e guardado.
+        """
+        chave = self.make_key(namespace, key, tenant_id)
+        valor = self._ler(namespace, chave)
+        if valor is not _AUSENTE:
+            return valor
+
+        with self._voos_lock:
+            voo = self._voos.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._voos[chave] = _Voo()
+        if not lider:
+            self._contar(namespace, "singleflight_waits")
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.valor
 
-    def cached(self, ttl: int = 300, key_prefix: str = ""):
+        try:
+            voo.valor = factory()
+            if voo.valor is not None:
+                self._gravar(
+                    namespace, chave, voo.valor, ttl, self._tags(tags, tenant_id)
+                )
+            return voo.valor
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._voos_lock:
+                self._voos.pop(chave, None)
+            voo.pronto.set()
+
+    # ------------------------------------------------------------------
+    # Operacoes assincronas (L2 fora do event loop)
+    # ------------------------------------------------------------------
+
+    async def _aler(self, namespace: str, chave: str) -> Any:
+        if self.l2 is None:
+            return self._ler(namespace, chave)
+        valor = self.l1.get(chave)
+        if valor is not _AUSENTE:
+            self._contar(namespace, "hits_l1")
+            return valor
+        return await asyncio.to_thread(self._ler, namespace, chave)
+
+    async def _agravar(
+        self, namespace: str, chave: str, valor: Any, ttl: int, tags: tuple
+    ) -> bool:
+        if self.l2 is None:
+            return self._gravar(namespace, chave, valor, ttl, tags)
+        return await asyncio.to_thread(self._gravar, namespace, chave, valor, ttl, tags)
+
+    async def aget_or_set(
+        self,
+        namespace: str,
+        key: Any,
+        factory: Callable[[], Any],
+        ttl: int = 300,
+        tags: Iterable[str] = (),
+        tenant_id: Any = None,
+    ) -> Any:
+        """Versao assincrona de ``get_or_set``; ``factory`` devolve um awaitable."""
+        chave = self.make_key(namespace, key, tenant_id)
+        valor = await self._aler(namespace, chave)
+        if valor is not _AUSENTE:
+            return valor
+
+        loop = asyncio.get_running_loop()
+        voo_key = (id(loop), chave)
+        voo = self._voos_async.get(voo_key)
+        if voo is not None:
+            self._contar(namespace, "singleflight_waits")
+            return await asyncio.shield(voo)
+
+        voo = self._voos_async[voo_key] = loop.create_future()
+        try:
+            valor = await factory()
+            if valor is not None:
+                await self._agravar(
+                    namespace, chave, valor, ttl, self._tags(tags, tenant_id)
+                )
+            voo.set_result(valor)
+            return valor
+        except asyncio.CancelledError:
+            voo.cancel()
+            raise
+        except BaseException as e:
+            voo.set_exception(e)
+            voo.exception()  # evita "exception was never retrieved" sem espera
+            raise
+        finally:
+            self._voos_async.pop(voo_key, None)
+
+    def cached(
+        self,
+        ttl: int = 300,
+        key_prefix: str = "",
+        tags: Iterable[str] | Callable[..., Iterable[str]] = (),
+        tenant_arg: str = "tenant_id",
+    ):
         """
-        Decorator para cachear resultados de função.
+        Decorator para cachear resultados de função (sincrona ou async).
+
+        A chave usa os argumentos da chamada, sem ``self``/``cls``; o
+        argumento ``tenant_arg`` (se existir) define o namespace do tenant.
+        ``tags`` pode ser uma funcao que recebe esses mesmos argumentos
+        (ex.: ``lambda tenant_id, cliente_id: (f"cliente:{cliente_id}",)``).
 
         Uso:
-            @cache.cached(ttl=300, key_prefix="produtos")
+            @cache.cached(ttl=300, key_prefix="produtos", tags=("produtos",))
             async def get_produtos(tenant_id):
                 return await db.query(...)
         """
+        tags_da_chamada = tags if callable(tags) else (lambda **_: tags)
 
         def decorator(func: Callable):
-            @wraps(func)
-            async def wrapper(*args, **kwargs):
-                # Gerar chave do cache
-                cache_key = f"{key_prefix}:{func.__name__}:{str(args)}:{str(kwargs)}"
+            namespace = key_prefix or func.__qualname__
+            assinatura = inspect.signature(func)
+            parametros = list(assinatura.parameters)
+            ignorar = (
+                {parametros[0]} if parametros[:1] in (["self"], ["cls"]) else set()
+            )
+
+            def _chave(args, kwargs):
+                argumentos = assinatura.bind(*args, **kwargs)
+                argumentos.apply_defaults()
+                valores = {
+                    nome: valor
+                    for nome, valor in argumentos.arguments.items()
+                    if nome not in ignorar
+                }
+                chamada_tags = tuple(tags_da_chamada(**valores))
+                tenant_id = valores.pop(tenant_arg, None)
+                chave = ":".join(
+                    f"{nome}={valores[nome]!r}" for nome in sorted(valores)
+                )
+                return f"{func.__name__}:{chave}", tenant_id, chamada_tags
+
+            if inspect.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def wrapper(*args, **kwargs):
+                    chave, tenant_id, chamada_tags = _chave(args, kwargs)
+                    return await self.aget_or_set(
+                        namespace,
+                        chave,
+                        lambda: func(*args, **kwargs),
+                        ttl=ttl,
+                        tags=chamada_tags,
+                        tenant_id=tenant_id,
+                    )
 
-                # Tentar buscar do cache
-                cached_value = await self.get(cache_key)
-                if cached_value is not None:
-                    logger.debug(f"Cache HIT: {cache_key}")
-                    return cached_value
-
-                # Cache miss - executar função
-                logger.debug(f"Cache MISS: {cache_key}")
-                result = await func(*args, **kwargs)
-
-                # Armazenar no cache
-                await self.set(cache_key, result, ttl)
+            else:
 
-                return result
+                @wraps(func)
+                def wrapper(*args, **kwargs):
+                    chave, tenant_id, chamada_tags = _chave(args, kwargs)
+                    return self.get_or_set(
+                        namespace,
+                        chave,
+                        lambda: func(*args, **kwargs),
+                        ttl=ttl,
+                        tags=chamada_tags,
+                        tenant_id=tenant_id,
+                    )
 
             return wrapper
 
         return decorator
 
     def get_stats(self) -> dict:
-        """Estatísticas do cache"""
-        stats = {"backend": self.backend_type}
-
-        if hasattr(self.backend, "stats"):
-            stats.update(self.backend.stats())
-
-        return stats
+        """Estatísticas do cache (L1 e hit/miss por namespace)"""
+        with self._metricas_lock:
+            por_namespace = {ns: dict(c) for ns, c in self._metricas.items()}
+            invalidacoes = dict(self._invalidacoes)
+        totais = Counter()
+        for contagem in por_namespace.values():
+            totais.update(contagem)
+        leituras = totais["hits_l1"] + totais["hits_l2"] + totais["misses"]
+        return {
+            "backend": self.backend_type,
+            **self.l1.stats(),
+            "l1_ttl_max": self.l1_ttl_max,
+            "hits_l1": totais["hits_l1"],
+            "hits_l2": totais["hits_l2"],
+            "misses": totais["misses"],
+            "hit_ratio": round((totais["hits_l1"] + totais["hits_l2"]) / leituras, 4)
+            if leituras
+            else None,
+            "singleflight_waits": totais["singleflight_waits"],
+            "invalidations": invalidacoes,
+            "namespaces": por_namespace,
+        }
 
 
 # ============================================================================
@@ -4,8 +4,12 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
-from app.campaigns.notification_service import enqueue_push
-from app.services.push_devices import load_customer_push_targets
+from app.campaigns.models import NotificationChannelEnum
+from app.campaigns.notification_service import enqueue_batch, enqueue_push
+from app.services.push_devices import (
+    customers_with_push_targets,
+    load_customer_push_targets,
+)
 
 
 def enqueue_campaign_push(
@@ -46,6 +50,49 @@ def enqueue_campaign_push(
     )
 
 
+def enqueue_campaign_push_batch(
+    db: Session,
+    *,
+    tenant_id,
+    clientes: list,
+    pushes: list[dict[str, Any]],
+    kind: str,
+    campaign=None,
+) -> set[str]:
+    """
+    Versão em lote de `enqueue_campaign_push`.
+
+    `clientes` são os Cliente já carregados pelo handler; `pushes` têm
+    customer_id, title, body, idempotency_key, payload e, opcionalmente,
+    privacy_customer_id. Retorna as idempotency_keys enfileiradas.
+    """
+    with_targets = customers_with_push_targets(
+        db, tenant_id=tenant_id, clientes=clientes
+    )
+    notifications = [
+        {
+            "customer_id": push["customer_id"],
+            "subject": push["title"],
+            "body": push["body"],
+            "idempotency_key": push["idempotency_key"],
+            "privacy_customer_id": push.get("privacy_customer_id"),
+            "source": "campaign",
+            "kind": kind,
+            "payload": _campaign_payload(
+                campaign=campaign, kind=kind, payload=push.get("payload")
+            ),
+        }
+        for push in pushes
+        if push["customer_id"] in with_targets
+    ]
+    return enqueue_batch(
+        db,
+        tenant_id=tenant_id,
+        channel=NotificationChannelEnum.push,
+        notifications=notifications,
+    )
+
+
 def _campaign_payload(
     *, campaign=None, kind: str, payload: dict[str, Any] | None = None
 ) -> dict[str, Any]:
@@ -7,7 +7,10 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
-from app.services.business_audit_service import log_business_event
+from app.services.business_audit_service import (
+    log_business_event,
+    log_business_events_bulk,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -177,3 +180,32 @@ def log_campaign_event(
             exc,
         )
         return None
+
+
+def log_campaign_events_bulk(
+    *,
+    db: Session,
+    tenant_id: Any,
+    event: str,
+    entity_type: str,
+    entries: list[dict[str, Any]],
+    user_id: int | None = None,
+) -> int:
+    try:
+        return log_business_events_bulk(
+            db=db,
+            tenant_id=tenant_id,
+            user_id=user_id,
+            event=event,
+            entity_type=entity_type,
+            entries=entries,
+        )
+    except Exception as exc:
+        logger.warning(
+            "campaign_audit_bulk_failed event=%s entity_type=%s count=%s error=%s",
+            event,
+            entity_type,
+            len(entries),
+            exc,
+        )
+        return 0
@@ -13,15 +13,18 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from typing import Any
 
 from fastapi import HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.campaigns.audit import (
     build_coupon_audit_metadata,
     build_coupon_redemption_audit_metadata,
     log_campaign_event,
+    log_campaign_events_bulk,
 )
 from app.campaigns.models import (
     Campaign,
@@ -43,6 +46,9 @@ from app.campaigns.coupon_rules import (
 
 logger = logging.getLogger(__name__)
 
+# Linhas por INSERT multi-valores / IN (...) de codigos na criacao em lote
+_BULK_CHUNK = 1000
+
 
 def _validate_coupon_for_redemption(
     db: Session,
@@ -188,6 +194,137 @@ def create_coupon(
     )
 
 
+def _unique_codes_bulk(db: Session, *, tenant_id, prefix: str, total: int) -> list[str]:
+    """Gera ``total`` codigos distintos e ainda nao usados no tenant."""
+    codes: list[str] = []
+    seen: set[str] = set()
+    for _attempt in range(5):
+        candidates = []
+        while len(codes) + len(candidates) < total:
+            code = _generate_code(prefix)
+            if code not in seen:
+                seen.add(code)
+                candidates.append(code)
+        taken: set[str] = set()
+        for start in range(0, len(candidates), _BULK_CHUNK):
+            chunk = candidates[start : start + _BULK_CHUNK]
+            taken.update(
+                code
+                for (code,) in db.query(Coupon.code).filter(
+                    Coupon.tenant_id == tenant_id, Coupon.code.in_(chunk)
+                )
+            )
+        codes.extend(code for code in candidates if code not in taken)
+        if len(codes) == total:
+            return codes
+
+    raise RuntimeError(
+        "Nao foi possivel gerar codigos de cupom unicos para tenant "
+        f"{tenant_id} apos 5 tentativas com prefix='{prefix}'"
+    )
+
+
+def create_coupons_bulk(
+    db: Session,
+    *,
+    tenant_id,
+    campaign: Campaign | None = None,
+    coupons: list[dict[str, Any]],
+    coupon_type: str = "fixed",
+    discount_value=None,
+    discount_percent=None,
+    channel: str = "all",
+    valid_days: int | None = None,
+    min_purchase_value=None,
+    prefix: str = "CAMP",
+) -> list[dict[str, Any]]:
+    """
+    Versao em lote de ``create_coupon`` para handlers de campanha.
+
+    ``coupons`` tem ``customer_id`` e ``meta`` de cada cupom. Os codigos sao
+    verificados contra o banco com ``IN (...)`` e gravados com INSERT
+    multi-linha; a auditoria ``campaign.coupon.created`` tambem vai em lote.
+    Retorna ``{"id", "code", "customer_id"}`` na mesma ordem da entrada.
+    Nao commita.
+    """
+    if not coupons:
+        return []
+
+    valid_until: datetime | None = None
+    if valid_days:
+        valid_until = datetime.now(timezone.utc) + timedelta(days=valid_days)
+
+    codes = _unique_codes_bulk(
+        db, tenant_id=tenant_id, prefix=prefix, total=len(coupons)
+    )
+    campaign_id = campaign.id if campaign is not None else None
+    base = {
+        "tenant_id": tenant_id,
+        "campaign_id": campaign_id,
+        "coupon_type": CouponTypeEnum(coupon_type),
+        "discount_value": discount_value,
+        "discount_percent": discount_percent,
+        "channel": CouponChannelEnum(channel),
+        "status": CouponStatusEnum.active,
+        "valid_until": valid_until,
+        "min_purchase_value": min_purchase_value,
+    }
+    rows = [
+        {
+            **base,
+            "code": code,
+            "customer_id": item["customer_id"],
+            "meta": item.get("meta"),
+        }
+        for code, item in zip(codes, coupons)
+    ]
+
+    created: list[dict[str, Any]] = []
+    for start in range(0, len(rows), _BULK_CHUNK):
+        chunk = rows[start : start + _BULK_CHUNK]
+        # Codigos sao unicos: o id volta casado pelo code, sem exigir que o
+        # RETURNING preserve a ordem (o que forcaria um INSERT por linha)
+        ids_by_code = {
+            code: coupon_id
+            for coupon_id, code in db.execute(
+                insert(Coupon).returning(Coupon.id, Coupon.code), chunk
+            )
+        }
+        created.extend(
+            {
+                "id": ids_by_code[row["code"]],
+                "code": row["code"],
+                "customer_id": row["customer_id"],
+            }
+            for row in chunk
+        )
+
+    source = "campaign" if campaign is not None else "system"
+    log_campaign_events_bulk(
+        db=db,
+        tenant_id=tenant_id,
+        event="campaign.coupon.created",
+        entity_type="campaign_coupons",
+        entries=[
+            {
+                "entity_id": coupon["id"],
+                "metadata": build_coupon_audit_metadata(
+                    SimpleNamespace(**row, id=coupon["id"]), source=source
+                ),
+                "details": f"Cupom {coupon['code']} criado pelo motor de campanhas",
+            }
+            for coupon, row in zip(created, rows)
+        ],
+    )
+    logger.debug(
+        "[coupon_service] %d cupons criados em lote: tenant=%s prefix=%s",
+        len(created),
+        tenant_id,
+        prefix,
+    )
+    return created
+
+
 def preview_coupon_redemption(
     db: Session,
     *,
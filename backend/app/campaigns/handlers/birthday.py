@@ -9,9 +9,11 @@ Lógica:
   1. Busca clientes cujo aniversário é hoje (campo nascimento = hoje)
   2. Para birthday_pet: busca pets cujo aniversário é hoje
   3. Para cada cliente elegível, verifica em campaign_executions se
-     já recebeu recompensa neste período (reference_period = "YYYY-MM-DD")
+     já recebeu recompensa neste período (reference_period = "YYYY-MM-DD"),
+     com anti-join na própria consulta
   4. Se não recebeu: gera cupom (ou só notifica se tipo_presente=brinde) +
-     registra execution + enfileira notificação
+     registra execution + enfileira notificação, em lote para todos os
+     elegíveis (INSERT multi-linha)
 
 Parâmetros esperados em campaign.params:
   {
@@ -29,18 +31,19 @@ import logging
 from collections import defaultdict
 from datetime import date
 
-from sqlalchemy import extract
+from sqlalchemy import String, and_, cast, extract, insert, literal
 from sqlalchemy.orm import Session
 
-from app.campaigns.coupon_service import create_coupon
+from app.campaigns.coupon_service import create_coupon, create_coupons_bulk
 from app.campaigns.models import (
     Campaign,
     CampaignEventQueue,
     CampaignExecution,
     CampaignTypeEnum,
+    NotificationChannelEnum,
 )
-from app.campaigns.app_push import enqueue_campaign_push
-from app.campaigns.notification_service import enqueue_email
+from app.campaigns.app_push import enqueue_campaign_push, enqueue_campaign_push_batch
+from app.campaigns.notification_service import enqueue_batch, enqueue_email
 
 logger = logging.getLogger(__name__)
 
@@ -90,10 +93,28 @@ class BirthdayHandler:
         today = date.today()
         params = campaign.params or {}
 
-        # Busca clientes do tenant com aniversário hoje
+        reference_period = today.isoformat()
+
+        # Busca clientes do tenant com aniversário hoje; o LEFT JOIN em
+        # campaign_executions do dia marca quem já foi recompensado
         clientes = (
-            db.query(Cliente)
+            db.query(
+                Cliente.id,
+                Cliente.nome,
+                Cliente.email,
+                Cliente.auth_user_id,
+                CampaignExecution.id.label("execution_id"),
+            )
             .join(User, User.id == Cliente.user_id)
+            .outerjoin(
+                CampaignExecution,
+                and_(
+                    CampaignExecution.tenant_id == campaign.tenant_id,
+                    CampaignExecution.campaign_id == campaign.id,
+                    CampaignExecution.customer_id == Cliente.id,
+                    CampaignExecution.reference_period == reference_period,
+                ),
+            )
             .filter(
                 User.tenant_id == campaign.tenant_id,
                 extract("month", Cliente.data_nascimento) == today.month,
@@ -104,30 +125,25 @@ class BirthdayHandler:
         )
 
         evaluated = len(clientes)
-        rewarded = 0
-        errors = 0
-
-        for cliente in clientes:
-            try:
-                rewarded += self._reward_customer(
-                    db=db,
-                    campaign=campaign,
-                    customer_id=cliente.id,
-                    customer_name=cliente.nome,
-                    customer_email=cliente.email,
-                    customer_push_token=None,  # Clientes não têm push_token diretamente
-                    reference_period=today.isoformat(),
-                    params=params,
-                    source_event_id=event.id,
-                    prefix="ANIV",
-                )
-            except Exception as exc:
-                errors += 1
-                logger.warning(
-                    "[BirthdayHandler] Erro ao recompensar cliente_id=%d: %s",
-                    cliente.id,
-                    exc,
-                )
+        alvos = [
+            dict(
+                customer_id=cliente.id,
+                customer_name=cliente.nome,
+                customer_email=cliente.email,
+                reference_period=reference_period,
+            )
+            for cliente in clientes
+            if cliente.execution_id is None
+        ]
+        rewarded, errors = self._reward_pending(
+            db=db,
+            campaign=campaign,
+            alvos=alvos,
+            destinatarios=clientes,
+            params=params,
+            source_event_id=event.id,
+            prefix="ANIV",
+        )
 
         logger.info(
             "[BirthdayHandler] birthday_customer tenant=%s avaliados=%d recompensados=%d erros=%d",
@@ -154,10 +170,26 @@ class BirthdayHandler:
         today = date.today()
         params = campaign.params or {}
 
-        # Busca pets do tenant com aniversário hoje
+        # Busca pets do tenant com aniversário hoje. O period é único por
+        # pet ("YYYY-MM-DD-p<id>"), então o anti-join monta o mesmo texto
+        pet_period = literal(f"{today.isoformat()}-p") + cast(Pet.id, String)
         pets = (
-            db.query(Pet)
+            db.query(
+                Pet.id,
+                Pet.nome,
+                Pet.cliente_id,
+                CampaignExecution.id.label("execution_id"),
+            )
             .join(User, User.id == Pet.user_id)
+            .outerjoin(
+                CampaignExecution,
+                and_(
+                    CampaignExecution.tenant_id == campaign.tenant_id,
+                    CampaignExecution.campaign_id == campaign.id,
+                    CampaignExecution.customer_id == Pet.id,
+                    CampaignExecution.reference_period == pet_period,
+                ),
+            )
             .filter(
                 User.tenant_id == campaign.tenant_id,
                 extract("month", Pet.data_nascimento) == today.month,
@@ -169,44 +201,52 @@ class BirthdayHandler:
         )
 
         evaluated = len(pets)
-        rewarded = 0
         errors = 0
 
+        # Recompensa vai para o dono do pet: donos em uma consulta só
+        donos = {}
+        dono_ids = {pet.cliente_id for pet in pets if pet.cliente_id is not None}
+        if dono_ids:
+            donos = {
+                dono.id: dono
+                for dono in db.query(
+                    Cliente.id, Cliente.nome, Cliente.email, Cliente.auth_user_id
+                ).filter(Cliente.id.in_(dono_ids))
+            }
+
+        alvos = []
         for pet in pets:
-            try:
-                # Recompensa vai para o dono do pet
-                dono = db.query(Cliente).filter(Cliente.id == pet.cliente_id).first()
-                if dono is None:
-                    errors += 1
-                    continue
-
-                # period único por pet: evita que 2 pets do mesmo dono
-                # recebam apenas 1 recompensa (cada pet gera seu próprio cupom)
-                reference_period = f"{today.isoformat()}-p{pet.id}"
-
-                rewarded += self._reward_customer(
-                    db=db,
-                    campaign=campaign,
+            dono = donos.get(pet.cliente_id)
+            if dono is None:
+                errors += 1
+                continue
+            if pet.execution_id is not None:
+                continue
+            # period único por pet: evita que 2 pets do mesmo dono
+            # recebam apenas 1 recompensa (cada pet gera seu próprio cupom)
+            alvos.append(
+                dict(
                     customer_id=pet.id,  # Chave de idempotência é o PET
                     customer_name=dono.nome,
                     customer_email=dono.email,
-                    customer_push_token=None,
-                    reference_period=reference_period,
-                    params=params,
-                    source_event_id=event.id,
-                    prefix="PETANIV",
+                    reference_period=f"{today.isoformat()}-p{pet.id}",
                     notification_extra=f" (aniversário do {pet.nome})",
                     nome_pet=pet.nome,
                     notification_customer_id=dono.id,
                     privacy_customer_id=dono.id,
                 )
-            except Exception as exc:
-                errors += 1
-                logger.warning(
-                    "[BirthdayHandler] Erro ao recompensar pet_id=%d: %s",
-                    pet.id,
-                    exc,
-                )
+            )
+
+        rewarded, bulk_errors = self._reward_pending(
+            db=db,
+            campaign=campaign,
+            alvos=alvos,
+            destinatarios=list(donos.values()),
+            params=params,
+            source_event_id=event.id,
+            prefix="PETANIV",
+        )
+        errors += bulk_errors
 
         logger.info(
             "[BirthdayHandler] birthday_pet tenant=%s avaliados=%d recompensados=%d erros=%d",
@@ -217,6 +257,237 @@ class BirthdayHandler:
         )
         return {"evaluated": evaluated, "rewarded": rewarded, "errors": errors}
 
+    # ------------------------------------------------------------------
+    # Recompensa em lote (alvos já filtrados pelo anti-join)
+    # ------------------------------------------------------------------
+
+    def _reward_pending(
+        self,
+        db: Session,
+        campaign: Campaign,
+        alvos: list[dict],
+        destinatarios: list,
+        params: dict,
+        source_event_id: int,
+        prefix: str,
+    ) -> tuple[int, int]:
+        """
+        Recompensa os alvos em lote dentro de um savepoint. Se o lote falhar,
+        refaz um a um com `_reward_customer`, que isola erros por cliente.
+
+        Cada alvo traz os kwargs de `_reward_customer` que variam por cliente.
+        Retorna (recompensados, erros).
+        """
+        if not alvos:
+            return 0, 0
+
+        try:
+            with db.begin_nested():
+                return self._reward_customers_bulk(
+                    db=db,
+                    campaign=campaign,
+                    alvos=alvos,
+                    destinatarios=destinatarios,
+                    params=params,
+                    source_event_id=source_event_id,
+                    prefix=prefix,
+                )
+        except Exception as exc:
+            logger.warning(
+                "[BirthdayHandler] Lote falhou, seguindo por cliente: %s", exc
+            )
+
+        rewarded = 0
+        errors = 0
+        for alvo in alvos:
+            try:
+                rewarded += self._reward_customer(
+                    db=db,
+                    campaign=campaign,
+                    customer_push_token=None,  # Clientes não têm push_token diretamente
+                    params=params,
+                    source_event_id=source_event_id,
+                    prefix=prefix,
+                    **alvo,
+                )
+            except Exception as exc:
+                errors += 1
+                logger.warning(
+                    "[BirthdayHandler] Erro ao recompensar customer_id=%d: %s",
+                    alvo["customer_id"],
+                    exc,
+                )
+        return rewarded, errors
+
+    def _reward_customers_bulk(
+        self,
+        db: Session,
+        campaign: Campaign,
+        alvos: list[dict],
+        destinatarios: list,
+        params: dict,
+        source_event_id: int,
+        prefix: str,
+    ) -> tuple[int, int]:
+        """
+        Versão em lote de `_reward_customer`: cupons, executions e
+        notificações com INSERT multi-linha. Não verifica idempotência —
+        os alvos já vêm do anti-join.
+        """
+        tipo_presente = params.get("tipo_presente", "cupom")
+        coupon_type = params.get("coupon_type", "fixed")
+        coupon_value = params.get("coupon_value", 10.0)
+        coupon_valid_days = params.get("coupon_valid_days", 7) or None
+        coupon_channel = params.get("coupon_channel", "all")
+        notification_msg = params.get(
+            "notification_message",
+            "Feliz aniversário{extra}! Use o cupom {code} em sua próxima compra.",
+        )
+        for alvo in alvos:
+            alvo.setdefault("notification_customer_id", alvo["customer_id"])
+
+        coupons: list[dict | None] = [None] * len(alvos)
+        desconto_fmt = ""
+        reward_type_str = "brinde"
+        if tipo_presente != "brinde":
+            coupons = create_coupons_bulk(
+                db,
+                tenant_id=campaign.tenant_id,
+                campaign=campaign,
+                coupons=[
+                    {
+                        "customer_id": alvo["notification_customer_id"],
+                        "meta": {"reference_period": alvo["reference_period"]},
+                    }
+                    for alvo in alvos
+                ],
+                coupon_type=coupon_type,
+                discount_value=float(coupon_value) if coupon_type == "fixed" else None,
+                discount_percent=(
+                    float(coupon_value) if coupon_type == "percent" else None
+                ),
+                channel=coupon_channel,
+                valid_days=coupon_valid_days,
+                prefix=prefix,
+            )
+            reward_type_str = f"coupon:{coupon_type}"
+            if coupon_type == "percent":
+                desconto_fmt = f"{coupon_value}%"
+            else:
+                val_str = f"{float(coupon_value):.2f}".replace(".", ",")
+                desconto_fmt = f"R$ {val_str}"
+
+        db.execute(
+            insert(CampaignExecution),
+            [
+                {
+                    "tenant_id": campaign.tenant_id,
+                    "campaign_id": campaign.id,
+                    "customer_id": alvo["customer_id"],
+                    "reference_period": alvo["reference_period"],
+                    "reward_type": reward_type_str,
+                    "reward_value": (
+                        float(coupon_value) if tipo_presente != "brinde" else 0
+                    ),
+                    "reward_meta": (
+                        {"coupon_id": coupon["id"], "coupon_code": coupon["code"]}
+                        if coupon
+                        else {}
+                    ),
+                    "source_event_id": source_event_id,
+                }
+                for alvo, coupon in zip(alvos, coupons)
+            ],
+        )
+
+        kind = (
+            "birthday_pet"
+            if campaign.campaign_type == CampaignTypeEnum.birthday_pet
+            else "birthday_customer"
+        )
+        title = (
+            "Aniversario do seu pet" if kind == "birthday_pet" else "Feliz aniversario"
+        )
+        errors = 0
+        pushes = []
+        emails = []
+        for alvo, coupon in zip(alvos, coupons):
+            coupon_code = coupon["code"] if coupon else ""
+            notification_extra = alvo.get("notification_extra", "")
+            try:
+                body = notification_msg.format_map(
+                    defaultdict(
+                        str,
+                        {
+                            "code": coupon_code,
+                            "nome": alvo["customer_name"],
+                            "extra": notification_extra,
+                            "desconto": desconto_fmt,
+                            "nome_pet": alvo.get("nome_pet", ""),
+                        },
+                    )
+                )
+            except Exception as exc:
+                errors += 1
+                logger.warning(
+                    "[BirthdayHandler] Erro ao recompensar customer_id=%d: %s",
+                    alvo["customer_id"],
+                    exc,
+                )
+                continue
+
+            notif_key = (
+                f"bday:{campaign.id}:{alvo['customer_id']}:{alvo['reference_period']}"
+            )
+            pushes.append(
+                {
+                    "customer_id": alvo["notification_customer_id"],
+                    "title": title,
+                    "body": body,
+                    "idempotency_key": f"{notif_key}:push",
+                    "privacy_customer_id": alvo.get("privacy_customer_id"),
+                    "payload": {
+                        "target": "coupons" if coupon_code else "benefits",
+                        "customer_id": alvo["notification_customer_id"],
+                        "campaign_customer_id": alvo["customer_id"],
+                        "coupon_code": coupon_code or None,
+                        "coupon_id": coupon["id"] if coupon else None,
+                        "reward_type": reward_type_str,
+                        "pet_name": alvo.get("nome_pet") or None,
+                    },
+                }
+            )
+            if alvo["customer_email"]:
+                emails.append(
+                    {
+                        "customer_id": alvo["notification_customer_id"],
+                        "subject": (
+                            f"Feliz aniversário{notification_extra}, "
+                            f"{alvo['customer_name']}! 🎂"
+                        ),
+                        "body": body,
+                        "email_address": alvo["customer_email"],
+                        "idempotency_key": f"{notif_key}:email",
+                        "privacy_customer_id": alvo.get("privacy_customer_id"),
+                    }
+                )
+
+        enqueue_campaign_push_batch(
+            db,
+            tenant_id=campaign.tenant_id,
+            clientes=destinatarios,
+            pushes=pushes,
+            kind=kind,
+            campaign=campaign,
+        )
+        enqueue_batch(
+            db,
+            tenant_id=campaign.tenant_id,
+            channel=NotificationChannelEnum.email,
+            notifications=emails,
+        )
+        return len(alvos) - errors, errors
+
     # ------------------------------------------------------------------
     # Método compartilhado: conceder recompensa (idempotente)
     # ------------------------------------------------------------------
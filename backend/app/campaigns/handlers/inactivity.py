@@ -8,8 +8,9 @@ Campanha: inactivity
 Lógica:
   1. Busca clientes que não compraram há N dias (configurável em params)
   2. Verifica campaign_executions com reference_period = semana ISO (ex: "2026-W10")
-     para não reenviar na mesma semana
-  3. Se elegível: gera cupom + registra execution + enfileira notificação
+     para não reenviar na mesma semana (anti-join na própria consulta)
+  3. Se elegível: gera cupom + registra execution + enfileira notificação,
+     em lote (INSERT multi-linha) para todos os elegíveis de uma vez
 
 Parâmetros esperados em campaign.params:
   {
@@ -28,18 +29,19 @@ Nota: O usuário pode criar múltiplas campanhas de inatividade
 import logging
 from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import func
+from sqlalchemy import and_, func, insert
 from sqlalchemy.orm import Session
 
-from app.campaigns.coupon_service import create_coupon
+from app.campaigns.coupon_service import create_coupon, create_coupons_bulk
 from app.campaigns.models import (
     Campaign,
     CampaignEventQueue,
     CampaignExecution,
     CampaignTypeEnum,
+    NotificationChannelEnum,
 )
-from app.campaigns.app_push import enqueue_campaign_push
-from app.campaigns.notification_service import enqueue_email
+from app.campaigns.app_push import enqueue_campaign_push, enqueue_campaign_push_batch
+from app.campaigns.notification_service import enqueue_batch, enqueue_email
 
 logger = logging.getLogger(__name__)
 
@@ -93,11 +95,28 @@ class InactivityHandler:
             .subquery()
         )
 
-        # Clientes que a última compra foi ANTES do cutoff (inativos)
+        # Clientes que a última compra foi ANTES do cutoff (inativos).
+        # LEFT JOIN em campaign_executions da semana = anti-join: quem já
+        # recebeu vem com execution_id preenchido e não gera consulta extra.
         clientes = (
-            db.query(Cliente)
+            db.query(
+                Cliente.id,
+                Cliente.nome,
+                Cliente.email,
+                Cliente.auth_user_id,
+                CampaignExecution.id.label("execution_id"),
+            )
             .join(User, User.id == Cliente.user_id)
             .join(last_purchase_sq, last_purchase_sq.c.cliente_id == Cliente.id)
+            .outerjoin(
+                CampaignExecution,
+                and_(
+                    CampaignExecution.tenant_id == campaign.tenant_id,
+                    CampaignExecution.campaign_id == campaign.id,
+                    CampaignExecution.customer_id == Cliente.id,
+                    CampaignExecution.reference_period == reference_period,
+                ),
+            )
             .filter(
                 User.tenant_id == campaign.tenant_id,
                 last_purchase_sq.c.last_purchase < cutoff,
@@ -108,8 +127,28 @@ class InactivityHandler:
         evaluated = len(clientes)
         rewarded = 0
         errors = 0
+        pendentes = [cliente for cliente in clientes if cliente.execution_id is None]
+
+        if pendentes:
+            try:
+                with db.begin_nested():
+                    rewarded, errors = self._reward_customers_bulk(
+                        db=db,
+                        campaign=campaign,
+                        clientes=pendentes,
+                        reference_period=reference_period,
+                        params=params,
+                        source_event_id=event.id,
+                        inactivity_days=inactivity_days,
+                    )
+                pendentes = []
+            except Exception as exc:
+                logger.warning(
+                    "[InactivityHandler] Lote falhou, seguindo por cliente: %s", exc
+                )
 
-        for cliente in clientes:
+        # Fallback: um cliente por vez, isolando erros individuais
+        for cliente in pendentes:
             try:
                 rewarded += self._reward_customer(
                     db=db,
@@ -139,6 +178,129 @@ class InactivityHandler:
         )
         return {"evaluated": evaluated, "rewarded": rewarded, "errors": errors}
 
+    def _reward_customers_bulk(
+        self,
+        db,
+        campaign,
+        clientes,
+        reference_period,
+        params,
+        source_event_id,
+        inactivity_days,
+    ) -> tuple[int, int]:
+        """
+        Versão em lote de `_reward_customer` para clientes já filtrados pelo
+        anti-join: cupons, executions e notificações com INSERT multi-linha.
+        Retorna (recompensados, erros).
+        """
+        coupon_type = params.get("coupon_type", "percent")
+        coupon_value = params.get("coupon_value", 10.0)
+        coupon_valid_days = params.get("coupon_valid_days", 7) or None
+        coupon_channel = params.get("coupon_channel", "all")
+        notification_msg = params.get(
+            "notification_message",
+            "Sentimos sua falta, {nome}! Temos um cupom especial: {code}",
+        )
+        reward_type = f"coupon:{coupon_type}"
+
+        coupons = create_coupons_bulk(
+            db,
+            tenant_id=campaign.tenant_id,
+            campaign=campaign,
+            coupons=[
+                {
+                    "customer_id": cliente.id,
+                    "meta": {
+                        "reference_period": reference_period,
+                        "inactivity_days": inactivity_days,
+                    },
+                }
+                for cliente in clientes
+            ],
+            coupon_type=coupon_type,
+            discount_value=float(coupon_value) if coupon_type == "fixed" else None,
+            discount_percent=float(coupon_value) if coupon_type == "percent" else None,
+            channel=coupon_channel,
+            valid_days=coupon_valid_days,
+            prefix="VOLTA",
+        )
+
+        db.execute(
+            insert(CampaignExecution),
+            [
+                {
+                    "tenant_id": campaign.tenant_id,
+                    "campaign_id": campaign.id,
+                    "customer_id": cliente.id,
+                    "reference_period": reference_period,
+                    "reward_type": reward_type,
+                    "reward_value": coupon_value,
+                    "reward_meta": {
+                        "coupon_id": coupon["id"],
+                        "coupon_code": coupon["code"],
+                    },
+                    "source_event_id": source_event_id,
+                }
+                for cliente, coupon in zip(clientes, coupons)
+            ],
+        )
+
+        errors = 0
+        pushes = []
+        emails = []
+        for cliente, coupon in zip(clientes, coupons):
+            try:
+                body = notification_msg.format(code=coupon["code"], nome=cliente.nome)
+            except Exception as exc:
+                errors += 1
+                logger.warning(
+                    "[InactivityHandler] Erro cliente_id=%d: %s", cliente.id, exc
+                )
+                continue
+            notif_key = f"inactivity:{campaign.id}:{cliente.id}:{reference_period}"
+            pushes.append(
+                {
+                    "customer_id": cliente.id,
+                    "title": "Sentimos sua falta",
+                    "body": body,
+                    "idempotency_key": f"{notif_key}:push",
+                    "payload": {
+                        "target": "coupons",
+                        "customer_id": cliente.id,
+                        "coupon_code": coupon["code"],
+                        "coupon_id": coupon["id"],
+                        "inactivity_days": inactivity_days,
+                        "reward_type": reward_type,
+                    },
+                }
+            )
+            if cliente.email:
+                emails.append(
+                    {
+                        "customer_id": cliente.id,
+                        "subject": f"Sentimos sua falta, {cliente.nome}! Aqui está um presente 🎁",
+                        "body": body,
+                        "email_address": cliente.email,
+                        "idempotency_key": f"{notif_key}:email",
+                    }
+                )
+
+        enqueue_campaign_push_batch(
+            db,
+            tenant_id=campaign.tenant_id,
+            clientes=clientes,
+            pushes=pushes,
+            kind="inactivity",
+            campaign=campaign,
+        )
+        enqueue_batch(
+            db,
+            tenant_id=campaign.tenant_id,
+            channel=NotificationChannelEnum.email,
+            notifications=emails,
+        )
+        return len(clientes) - errors, errors
+
     def _reward_customer(
         self,
         db,
@@ -7,13 +7,15 @@ Campanha: ranking_monthly
 
 Lógica:
   1. Calcula o período de referência = mês anterior (ex: "2026-02")
-  2. Para cada cliente do tenant, agrega:
+  2. Para cada cliente do tenant, agrega (uma consulta GROUP BY):
      - total_spent: soma das vendas finalizadas nos últimos 12 meses
      - total_purchases: contagem de vendas nos últimos 12 meses
      - active_months: meses distintos com ao menos 1 compra (últimos 12 meses)
   3. Determina rank_level com base nos limites em campaign.params
-  4. Usa INSERT INTO customer_rank_history ... ON CONFLICT DO NOTHING (idempotência)
-  5. Para clientes que subiram de nível: enfileira notificação de upgrade
+  4. Busca o nível anterior de todos os clientes em uma consulta (row_number)
+  5. INSERT multi-linha em customer_rank_history ... ON CONFLICT DO NOTHING
+     (idempotência), em blocos de _UPSERT_CHUNK
+  6. Para clientes que subiram de nível: enfileira push + e-mail em lote
 
 Parâmetros esperados em campaign.params:
   {
@@ -30,6 +32,7 @@ from decimal import Decimal
 
 from sqlalchemy import distinct, func
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app.campaigns.models import (
@@ -37,15 +40,19 @@ from app.campaigns.models import (
     CampaignEventQueue,
     CampaignTypeEnum,
     CustomerRankHistory,
+    NotificationChannelEnum,
     RankLevelEnum,
 )
-from app.campaigns.app_push import enqueue_campaign_push
-from app.campaigns.notification_service import enqueue_email
+from app.campaigns.app_push import enqueue_campaign_push_batch
+from app.campaigns.notification_service import enqueue_batch
 
 logger = logging.getLogger(__name__)
 
 _SUPPORTED_EVENTS = frozenset({"monthly_ranking_recalc"})
 
+# Linhas por INSERT multi-valores / IN (...) de clientes
+_UPSERT_CHUNK = 1000
+
 # Hierarquia de níveis (ordem crescente)
 _RANK_ORDER = [
     RankLevelEnum.bronze,
@@ -82,7 +89,7 @@ class RankingHandler:
         ):
             return {"evaluated": 0, "rewarded": 0, "errors": 0}
 
-        from app.models import Cliente, User
+        from app.models import User
         from app.vendas_models import Venda
 
         params = campaign.params or {}
@@ -119,102 +126,65 @@ class RankingHandler:
         )
 
         evaluated = len(agg)
-        rewarded = 0
         errors = 0
 
+        # 1. Novos níveis (em memória)
+        ranked = []
         for row in agg:
             try:
                 total_spent = Decimal(str(row.total_spent or 0))
                 total_purchases = row.total_purchases or 0
                 active_months = row.active_months or 0
-
                 new_rank = self._calculate_rank(
                     params=params,
                     total_spent=total_spent,
                     total_purchases=total_purchases,
                     active_months=active_months,
                 )
-
-                # Nível anterior (última entrada histórica)
-                prev_row = (
-                    db.query(CustomerRankHistory)
-                    .filter(
-                        CustomerRankHistory.tenant_id == campaign.tenant_id,
-                        CustomerRankHistory.customer_id == row.cliente_id,
-                        CustomerRankHistory.period < period,
-                    )
-                    .order_by(CustomerRankHistory.period.desc())
-                    .first()
-                )
-                prev_rank = prev_row.rank_level if prev_row else RankLevelEnum.bronze
-
-                # Insert idempotente (ON CONFLICT DO NOTHING)
-                stmt = (
-                    pg_insert(CustomerRankHistory)
-                    .values(
-                        tenant_id=campaign.tenant_id,
-                        customer_id=row.cliente_id,
-                        period=period,
-                        rank_level=new_rank,
-                        total_spent=total_spent,
-                        total_purchases=total_purchases,
-                        active_months=active_months,
-                    )
-                    .on_conflict_do_nothing(constraint="uq_customer_rank_period")
-                )
-                db.execute(stmt)
-
-                # Notifica upgrade de nível
-                if _RANK_ORDER.index(new_rank) > _RANK_ORDER.index(prev_rank):
-                    cliente = (
-                        db.query(Cliente).filter(Cliente.id == row.cliente_id).first()
-                    )
-                    if cliente:
-                        enqueue_campaign_push(
-                            db,
-                            tenant_id=campaign.tenant_id,
-                            customer_id=row.cliente_id,
-                            title="Voce subiu de nivel",
-                            body=(
-                                f"Ola, {cliente.nome}! Voce subiu para o nivel "
-                                f"{new_rank.value.upper()}."
-                            ),
-                            idempotency_key=(
-                                f"rank_upgrade:{campaign.id}:{row.cliente_id}:{period}:push"
-                            ),
-                            kind="ranking_upgrade",
-                            campaign=campaign,
-                            payload={
-                                "target": "benefits",
-                                "customer_id": row.cliente_id,
-                                "rank": new_rank.value,
-                                "previous_rank": prev_rank.value,
-                                "period": period,
-                            },
-                        )
-                    if cliente and cliente.email:
-                        enqueue_email(
-                            db,
-                            tenant_id=campaign.tenant_id,
-                            customer_id=row.cliente_id,
-                            subject=f"Parabéns! Você subiu para o nível {new_rank.value.upper()} 🏆",
-                            body=(
-                                f"Olá, {cliente.nome}! Suas compras nos últimos meses "
-                                f"te levaram para o nível {new_rank.value.upper()}. "
-                                f"Aproveite os benefícios exclusivos!"
-                            ),
-                            email_address=cliente.email,
-                            idempotency_key=(
-                                f"rank_upgrade:{campaign.id}:{row.cliente_id}:{period}:email"
-                            ),
-                        )
-                    rewarded += 1
-
             except Exception as exc:
                 errors += 1
                 logger.warning(
                     "[RankingHandler] Erro cliente_id=%s: %s", row.cliente_id, exc
                 )
+                continue
+            ranked.append(
+                {
+                    "tenant_id": campaign.tenant_id,
+                    "customer_id": row.cliente_id,
+                    "period": period,
+                    "rank_level": new_rank,
+                    "total_spent": total_spent,
+                    "total_purchases": total_purchases,
+                    "active_months": active_months,
+                }
+            )
+
+        # 2. Nível anterior de todos os clientes em uma consulta
+        prev_ranks = self._previous_ranks(db, campaign.tenant_id, period)
+
+        # 3. Histórico em lote (ON CONFLICT DO NOTHING = idempotente)
+        insert = (
+            pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        )
+        for start in range(0, len(ranked), _UPSERT_CHUNK):
+            stmt = insert(CustomerRankHistory).values(
+                ranked[start : start + _UPSERT_CHUNK]
+            )
+            db.execute(
+                stmt.on_conflict_do_nothing(
+                    index_elements=["tenant_id", "customer_id", "period"]
+                )
+            )
+
+        # 4. Notificações de upgrade em lote
+        upgrades = []
+        for item in ranked:
+            prev_rank = prev_ranks.get(item["customer_id"], RankLevelEnum.bronze)
+            if _RANK_ORDER.index(item["rank_level"]) > _RANK_ORDER.index(prev_rank):
+                upgrades.append((item, prev_rank))
+        if upgrades:
+            self._notify_upgrades(db, campaign, period, upgrades)
+        rewarded = len(upgrades)
 
         logger.info(
             "[RankingHandler] tenant=%s period=%s avaliados=%d upgrades=%d erros=%d",
@@ -226,6 +196,104 @@ class RankingHandler:
         )
         return {"evaluated": evaluated, "rewarded": rewarded, "errors": errors}
 
+    @staticmethod
+    def _previous_ranks(db: Session, tenant_id, period: str) -> dict:
+        """Última entrada histórica (< period) de cada cliente do tenant."""
+        latest = (
+            db.query(
+                CustomerRankHistory.customer_id.label("customer_id"),
+                CustomerRankHistory.rank_level.label("rank_level"),
+                func.row_number()
+                .over(
+                    partition_by=CustomerRankHistory.customer_id,
+                    order_by=CustomerRankHistory.period.desc(),
+                )
+                .label("position"),
+            )
+            .filter(
+                CustomerRankHistory.tenant_id == tenant_id,
+                CustomerRankHistory.period < period,
+            )
+            .subquery()
+        )
+        rows = db.query(latest.c.customer_id, latest.c.rank_level).filter(
+            latest.c.position == 1
+        )
+        return {customer_id: rank_level for customer_id, rank_level in rows}
+
+    @staticmethod
+    def _notify_upgrades(
+        db: Session, campaign: Campaign, period: str, upgrades: list
+    ) -> None:
+        """Enfileira push + e-mail de upgrade para todos os clientes do lote."""
+        from app.models import Cliente
+
+        clientes = {}
+        customer_ids = [item["customer_id"] for item, _prev in upgrades]
+        for start in range(0, len(customer_ids), _UPSERT_CHUNK):
+            for cliente in (
+                db.query(Cliente)
+                .filter(Cliente.id.in_(customer_ids[start : start + _UPSERT_CHUNK]))
+                .all()
+            ):
+                clientes[cliente.id] = cliente
+
+        pushes = []
+        emails = []
+        for item, prev_rank in upgrades:
+            cliente = clientes.get(item["customer_id"])
+            if cliente is None:
+                continue
+            new_rank = item["rank_level"]
+            key = f"rank_upgrade:{campaign.id}:{cliente.id}:{period}"
+            pushes.append(
+                {
+                    "customer_id": cliente.id,
+                    "title": "Voce subiu de nivel",
+                    "body": (
+                        f"Ola, {cliente.nome}! Voce subiu para o nivel "
+                        f"{new_rank.value.upper()}."
+                    ),
+                    "idempotency_key": f"{key}:push",
+                    "payload": {
+                        "target": "benefits",
+                        "customer_id": cliente.id,
+                        "rank": new_rank.value,
+                        "previous_rank": prev_rank.value,
+                        "period": period,
+                    },
+                }
+            )
+            if cliente.email:
+                emails.append(
+                    {
+                        "customer_id": cliente.id,
+                        "subject": f"Parabéns! Você subiu para o nível {new_rank.value.upper()} 🏆",
+                        "body": (
+                            f"Olá, {cliente.nome}! Suas compras nos últimos meses "
+                            f"te levaram para o nível {new_rank.value.upper()}. "
+                            f"Aproveite os benefícios exclusivos!"
+                        ),
+                        "email_address": cliente.email,
+                        "idempotency_key": f"{key}:email",
+                    }
+                )
+
+        enqueue_campaign_push_batch(
+            db,
+            tenant_id=campaign.tenant_id,
+            clientes=list(clientes.values()),
+            pushes=pushes,
+            kind="ranking_upgrade",
+            campaign=campaign,
+        )
+        enqueue_batch(
+            db,
+            tenant_id=campaign.tenant_id,
+            channel=NotificationChannelEnum.email,
+            notifications=emails,
+        )
+
     @staticmethod
     def _calculate_rank(
         params: dict,
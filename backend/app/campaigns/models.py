@@ -117,6 +117,7 @@ class NotificationChannelEnum(str, enum.Enum):
 
 class NotificationStatusEnum(str, enum.Enum):
     pending = "pending"
+    sending = "sending"
     sent = "sent"
     failed = "failed"
     skipped = "skipped"
@@ -602,7 +603,9 @@ class NotificationQueue(Base):
 
     - idempotency_key: garante que a mesma notificação não seja enfileirada
       mais de uma vez. Formato sugerido: "{campaign_execution_id}:{channel}"
-    - status: pending → sent | failed | skipped
+    - status: pending → sending → sent | failed | skipped
+      (sending = reservado pelo dispatcher; claimed_at permite retomar
+      reservas abandonadas)
     - retry_count: até max_retries tentativas
     """
 
@@ -631,6 +634,7 @@ class NotificationQueue(Base):
     retry_count = Column(Integer, nullable=False, default=0)
     max_retries = Column(Integer, nullable=False, default=3)
     scheduled_at = Column(DateTime(timezone=True), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
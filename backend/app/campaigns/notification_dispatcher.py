@@ -0,0 +1,539 @@
+"""
+Notification Dispatcher — Envio concorrente da fila de notificações
+====================================================================
+
+`NotificationSender.process_batch` trava as linhas com SKIP LOCKED e envia
+uma a uma com a transação aberta: um handshake SMTP lento segura o lote
+inteiro e os locks. Aqui o trabalho é dividido em três fases:
+
+  1. Reserva: transação curta marca até `batch_size` linhas como `sending`
+     (claimed_at = agora) e commita — nenhum lock durante o envio. Reservas
+     mais antigas que `CLAIM_LEASE` (processo morto no meio do envio) voltam
+     a ser elegíveis.
+  2. Envio: pool de `max_workers` threads. Os e-mails são divididos entre
+     os workers e cada um reaproveita UMA conexão SMTP; os pushes vão para a
+     Expo em requisições de até `EXPO_BATCH_SIZE` mensagens, com um
+     requests.Session (keep-alive) por thread.
+  3. Resultado: status/retry_count gravados com UPDATE em lote por id;
+     dispositivos e notificações do app no mesmo commit.
+
+Retorna as chaves de `process_batch` mais métricas por canal:
+    {"processed", "sent", "failed", "skipped",
+     "channels": {"email": {"sent", "failed", "seconds", "per_second"}, ...}}
+
+Uso pelo scheduler (a cada 5 minutos):
+    from app.campaigns.notification_dispatcher import NotificationDispatcher
+    dispatcher = NotificationDispatcher(db_factory=SessionLocal)
+    dispatcher.dispatch()
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+import requests
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.campaigns.notification_sender import (
+    EXPO_PUSH_URL,
+    _build_email_message,
+    _campaign_type_for_key,
+    _create_app_notification_for_queue,
+    _expo_message,
+    _open_smtp_connection,
+    _push_data_for_notification,
+    _send_push_batch,
+    _smtp_config_ok,
+)
+from app.services.push_devices import (
+    PushTarget,
+    load_customer_push_targets,
+    mark_push_target_result,
+)
+from app.tenancy.context import tenant_context
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_WORKERS = 8
+# Limite de mensagens por requisição da Expo Push API
+EXPO_BATCH_SIZE = 100
+# Reserva `sending` mais antiga que isto é considerada abandonada
+CLAIM_LEASE = timedelta(minutes=15)
+
+# Erros SMTP do próprio destinatário/mensagem: a conexão continua utilizável
+_SMTP_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+@dataclass
+class _EmailJob:
+    notification_id: int
+    to_address: str
+    subject: str
+    body: str
+    campaign_type: str | None
+
+
+@dataclass
+class _PushJob:
+    notification_id: int
+    target: PushTarget
+    message: dict[str, Any]
+
+
+@dataclass
+class _PushOutcome:
+    app_notification: Any = None
+    sent: int = 0
+    ticket_id: str | None = None
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _ChannelMetrics:
+    sent: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "seconds": round(self.seconds, 3),
+            "per_second": round(self.sent / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+def _split(items: list, parts: int) -> list[list]:
+    """Divide `items` em até `parts` grupos de tamanho parecido."""
+    parts = max(1, min(parts, len(items)))
+    return [items[index::parts] for index in range(parts) if items[index::parts]]
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class NotificationDispatcher:
+    """Despacha a fila com reserva curta, pool de workers e gravação em lote."""
+
+    def __init__(
+        self,
+        db_factory,
+        *,
+        max_workers: int = MAX_WORKERS,
+        smtp_factory: Callable[[], smtplib.SMTP] | None = None,
+        push_url: str = EXPO_PUSH_URL,
+        http_factory: Callable[[], Any] = requests.Session,
+    ):
+        """
+        `smtp_factory` abre uma conexão SMTP já autenticada (default: TLS +
+        login com ia_config.SMTP_*; sem SMTP configurado o e-mail é pulado
+        como em `NotificationSender`). `push_url`/`http_factory` permitem
+        apontar o push para outro servidor (testes).
+        """
+        self.db_factory = db_factory
+        self.max_workers = max(1, max_workers)
+        self.smtp_factory = smtp_factory
+        self.push_url = push_url
+        self.http_factory = http_factory
+        self._local = threading.local()
+        self._http_sessions: list = []
+        self._http_lock = threading.Lock()
+
+    def dispatch(self, batch_size: int = BATCH_SIZE) -> dict:
+        """
+        Reserva, envia e grava o resultado de até `batch_size` notificações.
+        """
+        db: Session = self.db_factory()
+        # Os objetos reservados continuam em uso depois dos commits
+        db.expire_on_commit = False
+        stats: dict[str, Any] = {
+            "processed": 0,
+            "sent": 0,
+            "failed": 0,
+            "skipped": 0,
+            "channels": {},
+        }
+
+        try:
+            claimed = self._claim(db, batch_size)
+            if not claimed:
+                return stats
+            stats["processed"] = len(claimed)
+
+            outcome: dict[int, str | None] = {}
+            email_jobs, skipped = self._prepare_emails(claimed, outcome)
+            push_jobs, push_outcomes = self._prepare_pushes(db, claimed, outcome)
+            # Notificações do app criadas no preparo: commit antes da rede
+            db.commit()
+
+            metrics = self._send(email_jobs, push_jobs, outcome, push_outcomes)
+            self._record_push_results(push_jobs, push_outcomes, outcome)
+            self._write_back(db, claimed, outcome, skipped, stats)
+            db.commit()
+
+            stats["channels"] = {
+                channel: channel_metrics.as_dict()
+                for channel, channel_metrics in metrics.items()
+            }
+            logger.info("[NotifDispatcher] %s", stats)
+        except Exception as exc:
+            db.rollback()
+            logger.exception("[NotifDispatcher] Erro ao processar lote: %s", exc)
+        finally:
+            db.close()
+            self._close_http_sessions()
+
+        return stats
+
+    # ------------------------------------------------------------------
+    # 1. Reserva
+    # ------------------------------------------------------------------
+
+    def _claim(self, db: Session, batch_size: int) -> list:
+        from app.campaigns.models import NotificationQueue, NotificationStatusEnum
+
+        now = datetime.now(timezone.utc)
+        claimed = (
+            db.query(NotificationQueue)
+            .filter(
+                or_(
+                    and_(
+                        NotificationQueue.status == NotificationStatusEnum.pending,
+                        or_(
+                            NotificationQueue.scheduled_at.is_(None),
+                            NotificationQueue.scheduled_at <= datetime.now(),
+                        ),
+                    ),
+                    and_(
+                        NotificationQueue.status == NotificationStatusEnum.sending,
+                        NotificationQueue.claimed_at < now - CLAIM_LEASE,
+                    ),
+                )
+            )
+            .with_for_update(skip_locked=True)
+            .order_by(NotificationQueue.created_at.asc())
+            .limit(batch_size)
+            .all()
+        )
+        for notif in claimed:
+            notif.status = NotificationStatusEnum.sending
+            notif.claimed_at = now
+        # Locks liberados aqui: o envio não segura a transação
+        db.commit()
+        return claimed
+
+    # ------------------------------------------------------------------
+    # 2. Preparo (thread principal, usa o banco)
+    # ------------------------------------------------------------------
+
+    def _prepare_emails(
+        self, claimed: list, outcome: dict[int, str | None]
+    ) -> tuple[list[_EmailJob], set[int]]:
+        smtp_ready = self.smtp_factory is not None or _smtp_config_ok()
+        jobs: list[_EmailJob] = []
+        skipped: set[int] = set()
+        for notif in claimed:
+            channel = notif.channel.value
+            if channel not in ("email", "push"):
+                # Canal não suportado no sender atual
+                skipped.add(notif.id)
+            if channel != "email":
+                continue
+            if not notif.email_address:
+                outcome[notif.id] = "Notificação sem email_address"
+            elif not smtp_ready:
+                # Mesmo comportamento do NotificationSender: sem config, marca
+                # como sent para não poluir retries
+                outcome[notif.id] = None
+            else:
+                jobs.append(
+                    _EmailJob(
+                        notification_id=notif.id,
+                        to_address=notif.email_address,
+                        subject=notif.subject or "Mensagem especial para você",
+                        body=notif.body,
+                        campaign_type=_campaign_type_for_key(notif.idempotency_key),
+                    )
+                )
+        return jobs, skipped
+
+    def _prepare_pushes(
+        self, db: Session, claimed: list, outcome: dict[int, str | None]
+    ) -> tuple[list[_PushJob], dict[int, _PushOutcome]]:
+        from app.services.app_notifications import (
+            registrar_resultado_push_notificacao_app,
+        )
+
+        jobs: list[_PushJob] = []
+        outcomes: dict[int, _PushOutcome] = {}
+        for notif in claimed:
+            if notif.channel.value != "push":
+                continue
+            try:
+                subject = notif.subject or "CorePet"
+                push_data = _push_data_for_notification(notif)
+                # A fila é cross-tenant: cliente/dispositivos são consultados
+                # no tenant da notificação, como a engine faz por evento
+                with tenant_context(notif.tenant_id):
+                    app_notification = _create_app_notification_for_queue(
+                        db, notif, subject=subject, push_data=push_data
+                    )
+                    targets = load_customer_push_targets(
+                        db,
+                        tenant_id=notif.tenant_id,
+                        customer_id=notif.customer_id,
+                        legacy_push_token=notif.push_token,
+                    )
+            except Exception as exc:
+                outcome[notif.id] = str(exc)
+                continue
+
+            if not targets:
+                registrar_resultado_push_notificacao_app(
+                    app_notification, sent=False, error="Notificacao sem push_token"
+                )
+                outcome[notif.id] = "Notificação sem push_token"
+                continue
+
+            outcomes[notif.id] = _PushOutcome(app_notification=app_notification)
+            jobs.extend(
+                _PushJob(
+                    notification_id=notif.id,
+                    target=target,
+                    message=_expo_message(target.token, subject, notif.body, push_data),
+                )
+                for target in targets
+            )
+        return jobs, outcomes
+
+    # ------------------------------------------------------------------
+    # 3. Envio (pool de workers, sem banco)
+    # ------------------------------------------------------------------
+
+    def _send(
+        self,
+        email_jobs: list[_EmailJob],
+        push_jobs: list[_PushJob],
+        outcome: dict[int, str | None],
+        push_outcomes: dict[int, _PushOutcome],
+    ) -> dict[str, _ChannelMetrics]:
+        metrics: dict[str, _ChannelMetrics] = {}
+        if not email_jobs and not push_jobs:
+            return metrics
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="notif-dispatch"
+        ) as pool:
+            email_futures = [
+                pool.submit(self._send_email_group, group)
+                for group in _split(email_jobs, self.max_workers)
+            ]
+            push_futures = [
+                pool.submit(self._send_push_chunk, chunk)
+                for chunk in _chunks(push_jobs, EXPO_BATCH_SIZE)
+            ]
+
+            if email_futures:
+                email_metrics = metrics.setdefault("email", _ChannelMetrics())
+                for future in email_futures:
+                    results, finished = future.result()
+                    email_metrics.seconds = max(
+                        email_metrics.seconds, finished - started
+                    )
+                    for notification_id, error in results:
+                        outcome[notification_id] = error
+                        if error:
+                            email_metrics.failed += 1
+                        else:
+                            email_metrics.sent += 1
+
+            if push_futures:
+                push_metrics = metrics.setdefault("push", _ChannelMetrics())
+                for future in push_futures:
+                    results, finished = future.result()
+                    push_metrics.seconds = max(push_metrics.seconds, finished - started)
+                    for job, (ticket_id, error) in results:
+                        mark_push_target_result(
+                            job.target,
+                            sent=error is None,
+                            ticket_id=ticket_id,
+                            error=error,
+                        )
+                        push_outcome = push_outcomes[job.notification_id]
+                        if error:
+                            push_metrics.failed += 1
+                            push_outcome.errors.append(error)
+                        else:
+                            push_metrics.sent += 1
+                            push_outcome.sent += 1
+                            push_outcome.ticket_id = ticket_id or push_outcome.ticket_id
+        return metrics
+
+    def _open_smtp(self) -> smtplib.SMTP:
+        if self.smtp_factory is not None:
+            return self.smtp_factory()
+        return _open_smtp_connection()
+
+    def _send_email_group(
+        self, jobs: list[_EmailJob]
+    ) -> tuple[list[tuple[int, str | None]], float]:
+        """Worker: envia um grupo de e-mails reaproveitando a conexão SMTP."""
+        from app.ia_config import SMTP_EMAIL
+
+        results: list[tuple[int, str | None]] = []
+        server = None
+        try:
+            for job in jobs:
+                try:
+                    msg = _build_email_message(
+                        job.to_address, job.subject, job.body, job.campaign_type
+                    ).as_string()
+                    if server is None:
+                        server = self._open_smtp()
+                    try:
+                        server.sendmail(SMTP_EMAIL, job.to_address, msg)
+                    except smtplib.SMTPServerDisconnected:
+                        # Servidor fechou a conexão ociosa: reabre uma vez
+                        server = self._open_smtp()
+                        server.sendmail(SMTP_EMAIL, job.to_address, msg)
+                    results.append((job.notification_id, None))
+                except Exception as exc:
+                    if not isinstance(exc, _SMTP_MESSAGE_ERRORS) and server is not None:
+                        # Conexão em estado desconhecido: a próxima reabre
+                        _close_smtp(server)
+                        server = None
+                    results.append((job.notification_id, str(exc) or repr(exc)))
+        finally:
+            if server is not None:
+                _close_smtp(server)
+        return results, time.perf_counter()
+
+    def _send_push_chunk(
+        self, jobs: list[_PushJob]
+    ) -> tuple[list[tuple[_PushJob, tuple[str | None, str | None]]], float]:
+        """Worker: uma requisição à Expo para até EXPO_BATCH_SIZE mensagens."""
+        try:
+            results = _send_push_batch(
+                self._http_session(), [job.message for job in jobs], self.push_url
+            )
+        except Exception as exc:
+            results = [(None, str(exc))] * len(jobs)
+        return list(zip(jobs, results)), time.perf_counter()
+
+    def _http_session(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self.http_factory()
+            self._local.http = http
+            with self._http_lock:
+                self._http_sessions.append(http)
+        return http
+
+    def _close_http_sessions(self) -> None:
+        with self._http_lock:
+            sessions, self._http_sessions = self._http_sessions, []
+        for http in sessions:
+            try:
+                http.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # 4. Resultado (thread principal, UPDATE em lote)
+    # ------------------------------------------------------------------
+
+    def _record_push_results(
+        self,
+        push_jobs: list[_PushJob],
+        push_outcomes: dict[int, _PushOutcome],
+        outcome: dict[int, str | None],
+    ) -> None:
+        from app.services.app_notifications import (
+            registrar_resultado_push_notificacao_app,
+        )
+
+        for notification_id, push_outcome in push_outcomes.items():
+            error = "; ".join(push_outcome.errors) if push_outcome.errors else None
+            registrar_resultado_push_notificacao_app(
+                push_outcome.app_notification,
+                sent=push_outcome.sent > 0,
+                ticket_id=push_outcome.ticket_id,
+                error=error,
+            )
+            outcome[notification_id] = (
+                None if push_outcome.sent else error or "Falha ao enviar push"
+            )
+
+    def _write_back(
+        self,
+        db: Session,
+        claimed: list,
+        outcome: dict[int, str | None],
+        skipped: set[int],
+        stats: dict,
+    ) -> None:
+        from app.campaigns.models import NotificationQueue, NotificationStatusEnum
+
+        rows = []
+        for notif in claimed:
+            retry_count = notif.retry_count
+            if notif.id in skipped:
+                status = NotificationStatusEnum.skipped
+                stats["skipped"] += 1
+            elif outcome.get(notif.id, "Notificação não enviada") is None:
+                status = NotificationStatusEnum.sent
+                stats["sent"] += 1
+            else:
+                error = outcome.get(notif.id) or "Notificação não enviada"
+                retry_count += 1
+                stats["failed"] += 1
+                if retry_count >= notif.max_retries:
+                    status = NotificationStatusEnum.failed
+                    logger.error(
+                        "[NotifDispatcher] Falha definitiva id=%d: %s", notif.id, error
+                    )
+                else:
+                    status = NotificationStatusEnum.pending
+                    logger.warning(
+                        "[NotifDispatcher] Tentativa %d/%d falhou id=%d: %s",
+                        retry_count,
+                        notif.max_retries,
+                        notif.id,
+                        error,
+                    )
+            rows.append(
+                {
+                    "id": notif.id,
+                    "status": status,
+                    "retry_count": retry_count,
+                    "claimed_at": None,
+                }
+            )
+
+        # UPDATE por chave primária em lote (executemany)
+        db.execute(update(NotificationQueue), rows)
+
+
+def _close_smtp(server) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
@@ -112,15 +112,11 @@ def _render_email_html(
 </html>"""
 
 
-def _send_email(
+def _build_email_message(
     to_address: str, subject: str, body_text: str, campaign_type: str | None = None
-) -> None:
-    """
-    Envia um e-mail via SMTP TLS com template HTML bonito por tipo de campanha.
-
-    Levanta exceção em caso de falha (tratada no chamador).
-    """
-    from app.ia_config import SMTP_SERVER, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD
+) -> MIMEMultipart:
+    """Monta o e-mail (texto simples + HTML bonito por tipo de campanha)."""
+    from app.ia_config import SMTP_EMAIL
 
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
@@ -133,23 +129,44 @@ def _send_email(
     part_html = MIMEText(html_body, "html", "utf-8")
     msg.attach(part_text)
     msg.attach(part_html)
+    return msg
+
+
+def _open_smtp_connection() -> smtplib.SMTP:
+    """Abre conexão SMTP com TLS e login (ia_config.SMTP_*)."""
+    from app.ia_config import SMTP_SERVER, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD
 
     context = ssl.create_default_context()
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=15) as server:
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=15)
+    try:
         server.ehlo()
         server.starttls(context=context)
         server.login(SMTP_EMAIL, SMTP_PASSWORD)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _send_email(
+    to_address: str, subject: str, body_text: str, campaign_type: str | None = None
+) -> None:
+    """
+    Envia um e-mail via SMTP TLS com template HTML bonito por tipo de campanha.
+
+    Levanta exceção em caso de falha (tratada no chamador).
+    """
+    from app.ia_config import SMTP_EMAIL
+
+    msg = _build_email_message(to_address, subject, body_text, campaign_type)
+    with _open_smtp_connection() as server:
         server.sendmail(SMTP_EMAIL, to_address, msg.as_string())
 
 
-def _send_push(
+def _expo_message(
     push_token: str, title: str, body_text: str, data: dict | None = None
-) -> str | None:
-    """Envia push usando Expo Push API."""
-    if not push_token:
-        raise ValueError("Notificação sem push_token")
-
-    payload = {
+) -> dict[str, Any]:
+    return {
         "to": push_token,
         "title": title,
         "body": body_text,
@@ -159,9 +176,28 @@ def _send_push(
         "data": data or {},
     }
 
+
+def _expo_ticket_error(ticket: Any) -> str | None:
+    """Mensagem de erro de um ticket da Expo (None quando ok ou sem status)."""
+    if not isinstance(ticket, dict):
+        return None
+    status = ticket.get("status")
+    if status and status != "ok":
+        detail = ticket.get("details")
+        return f"Falha no push Expo: status={status} details={detail}"
+    return None
+
+
+def _send_push(
+    push_token: str, title: str, body_text: str, data: dict | None = None
+) -> str | None:
+    """Envia push usando Expo Push API."""
+    if not push_token:
+        raise ValueError("Notificação sem push_token")
+
     response = requests.post(
         EXPO_PUSH_URL,
-        json=payload,
+        json=_expo_message(push_token, title, body_text, data),
         headers={"Content-Type": "application/json"},
         timeout=10,
     )
@@ -172,13 +208,67 @@ def _send_push(
     if not isinstance(data_obj, dict):
         return None
 
-    status = data_obj.get("status")
-    if status and status != "ok":
-        detail = data_obj.get("details")
-        raise RuntimeError(f"Falha no push Expo: status={status} details={detail}")
+    error = _expo_ticket_error(data_obj)
+    if error:
+        raise RuntimeError(error)
     return data_obj.get("id")
 
 
+def _send_push_batch(
+    http, messages: list[dict[str, Any]], url: str = EXPO_PUSH_URL
+) -> list[tuple[str | None, str | None]]:
+    """
+    Envia várias mensagens numa única requisição à Expo (lista no corpo).
+
+    `http` é um requests.Session (conexão reaproveitada). Retorna
+    (ticket_id, erro) por mensagem, na ordem de `messages`; falha HTTP
+    levanta exceção para o lote inteiro.
+    """
+    response = http.post(
+        url,
+        json=messages,
+        headers={"Content-Type": "application/json"},
+        timeout=10,
+    )
+    response.raise_for_status()
+    body_json = response.json()
+    tickets = body_json.get("data") if isinstance(body_json, dict) else None
+    if not isinstance(tickets, list):
+        tickets = []
+
+    results: list[tuple[str | None, str | None]] = []
+    for index in range(len(messages)):
+        ticket = tickets[index] if index < len(tickets) else None
+        error = _expo_ticket_error(ticket)
+        ticket_id = ticket.get("id") if isinstance(ticket, dict) else None
+        results.append((None, error) if error else (ticket_id, None))
+    return results
+
+
+# Prefixo da chave de idempotência → tipo de campanha (template do e-mail)
+_KEY_TYPE_MAP = {
+    "bday": "birthday_customer",
+    "birthday": "birthday_customer",
+    "pet_bday": "birthday_pet",
+    "loyalty": "loyalty_stamp",
+    "cashback": "cashback",
+    "inactivity": "inactivity",
+    "welcome": "welcome_app",
+    "quick": "quick_repurchase",
+    "sorteio": "drawing",
+    "destaque": "ranking_monthly",
+}
+
+
+def _campaign_type_for_key(idempotency_key: str | None) -> str | None:
+    """Infere o tipo de campanha pelo prefixo da chave de idempotência."""
+    ikey = idempotency_key or ""
+    for prefix, ctype in _KEY_TYPE_MAP.items():
+        if ikey.startswith(prefix):
+            return ctype
+    return None
+
+
 def _push_data_for_notification(notif) -> dict[str, Any]:
     payload = getattr(notif, "payload", None)
     data = dict(payload) if isinstance(payload, dict) else {}
@@ -328,25 +418,7 @@ class NotificationSender:
             return
 
         subject = notif.subject or "Mensagem especial para você"
-        # Infere o tipo de campanha pelo prefixo da chave de idempotência para selecionar o template
-        ikey = notif.idempotency_key or ""
-        _KEY_TYPE_MAP = {
-            "bday": "birthday_customer",
-            "birthday": "birthday_customer",
-            "pet_bday": "birthday_pet",
-            "loyalty": "loyalty_stamp",
-            "cashback": "cashback",
-            "inactivity": "inactivity",
-            "welcome": "welcome_app",
-            "quick": "quick_repurchase",
-            "sorteio": "drawing",
-            "destaque": "ranking_monthly",
-        }
-        campaign_type = None
-        for prefix, ctype in _KEY_TYPE_MAP.items():
-            if ikey.startswith(prefix):
-                campaign_type = ctype
-                break
+        campaign_type = _campaign_type_for_key(notif.idempotency_key)
         _send_email(notif.email_address, subject, notif.body, campaign_type)
 
     def _dispatch_push(self, db: Session, notif) -> None:
@@ -22,7 +22,9 @@ Uso:
 
 import logging
 from typing import Any
+from uuid import UUID
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.campaigns.models import (
@@ -59,7 +61,7 @@ def _customer_allows_contact(
         latest = (
             db.query(DataPrivacyConsent)
             .filter(
-                DataPrivacyConsent.tenant_id == str(tenant_id),
+                DataPrivacyConsent.tenant_id == UUID(str(tenant_id)),
                 DataPrivacyConsent.subject_type == "customer",
                 DataPrivacyConsent.subject_id == str(customer_id),
                 DataPrivacyConsent.consent_type.in_(consent_types),
@@ -242,3 +244,144 @@ def enqueue_email(
         customer_id,
     )
     return True
+
+
+# ---------------------------------------------------------------------------
+# Enfileiramento em lote (handlers que notificam milhares de clientes)
+# ---------------------------------------------------------------------------
+
+_BATCH_CHUNK = 1000
+_BATCH_FIELDS = (
+    "customer_id",
+    "idempotency_key",
+    "subject",
+    "body",
+    "push_token",
+    "email_address",
+    "source",
+    "kind",
+    "payload",
+)
+
+
+def _chunks(values: list, size: int = _BATCH_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def customers_blocking_contact(
+    db: Session,
+    *,
+    tenant_id,
+    customer_ids,
+    consent_type: str,
+) -> set[int]:
+    """Versão em lote de `_customer_allows_contact`: ids que fizeram opt-out."""
+    ids = sorted({int(customer_id) for customer_id in customer_ids if customer_id})
+    consent_types = _CONSENT_ALIASES.get(consent_type, (consent_type,))
+    blocked: set[int] = set()
+    with whatsapp_tenant_context(tenant_id):
+        for chunk in _chunks(ids):
+            rows = (
+                db.query(
+                    DataPrivacyConsent.subject_id,
+                    DataPrivacyConsent.consent_given,
+                    DataPrivacyConsent.revoked_at,
+                )
+                .filter(
+                    DataPrivacyConsent.tenant_id == UUID(str(tenant_id)),
+                    DataPrivacyConsent.subject_type == "customer",
+                    DataPrivacyConsent.subject_id.in_([str(i) for i in chunk]),
+                    DataPrivacyConsent.consent_type.in_(consent_types),
+                )
+                .order_by(
+                    DataPrivacyConsent.subject_id,
+                    DataPrivacyConsent.created_at.desc(),
+                    DataPrivacyConsent.id.desc(),
+                )
+                .all()
+            )
+            seen: set[str] = set()
+            for subject_id, consent_given, revoked_at in rows:
+                if subject_id in seen:
+                    continue
+                seen.add(subject_id)
+                if not consent_given or revoked_at is not None:
+                    blocked.add(int(subject_id))
+    return blocked
+
+
+def _existing_idempotency_keys(db: Session, keys: list[str]) -> set[str]:
+    existing: set[str] = set()
+    for chunk in _chunks(keys):
+        existing.update(
+            key
+            for (key,) in db.query(NotificationQueue.idempotency_key)
+            .filter(NotificationQueue.idempotency_key.in_(chunk))
+            .all()
+        )
+    return existing
+
+
+def enqueue_batch(
+    db: Session,
+    *,
+    tenant_id,
+    channel: NotificationChannelEnum,
+    notifications: list[dict[str, Any]],
+) -> set[str]:
+    """
+    Enfileira várias notificações de um canal com consultas em lote.
+
+    Cada item tem os mesmos campos de `enqueue_push`/`enqueue_email`
+    (customer_id, body, idempotency_key, subject, ...). Aplica as mesmas
+    regras: opt-out LGPD e idempotency_key já existente viram skip silencioso.
+
+    Retorna as idempotency_keys efetivamente enfileiradas. Não commita.
+    """
+    if not notifications:
+        return set()
+
+    consent_type = (
+        "marketing_email"
+        if channel == NotificationChannelEnum.email
+        else "marketing_push"
+    )
+    blocked = customers_blocking_contact(
+        db,
+        tenant_id=tenant_id,
+        customer_ids=[
+            item.get("privacy_customer_id") or item["customer_id"]
+            for item in notifications
+        ],
+        consent_type=consent_type,
+    )
+    existing = _existing_idempotency_keys(
+        db, [item["idempotency_key"] for item in notifications]
+    )
+
+    enqueued: set[str] = set()
+    rows = []
+    for item in notifications:
+        key = item["idempotency_key"]
+        consent_customer_id = item.get("privacy_customer_id") or item["customer_id"]
+        if consent_customer_id in blocked or key in existing or key in enqueued:
+            continue
+        row = dict.fromkeys(_BATCH_FIELDS)
+        row.update((k, v) for k, v in item.items() if k in _BATCH_FIELDS)
+        row.update(tenant_id=tenant_id, channel=channel)
+        rows.append(row)
+        enqueued.add(key)
+
+    # INSERT multi-linha (executemany) em vez de um flush por objeto
+    for chunk in _chunks(rows):
+        db.execute(insert(NotificationQueue), chunk)
+
+    logger.info(
+        "[notification_service] Lote %s: %d enfileiradas, %d bloqueadas LGPD, %d já existentes",
+        channel.value,
+        len(enqueued),
+        len(blocked),
+        len(existing),
+    )
+    return enqueued
@@ -186,10 +186,10 @@ class CampaignScheduler:
     def _tick_notifications(self) -> None:
         """Despacha notificações pendentes (e-mail, push)."""
         try:
-            from app.campaigns.notification_sender import NotificationSender
+            from app.campaigns.notification_dispatcher import NotificationDispatcher
 
-            sender = NotificationSender(db_factory=SessionLocal)
-            stats = sender.process_batch()
+            dispatcher = NotificationDispatcher(db_factory=SessionLocal)
+            stats = dispatcher.dispatch()
             if stats["processed"] > 0:
                 logger.info("[CampaignScheduler] Notificações: %s", stats)
         except Exception as exc:
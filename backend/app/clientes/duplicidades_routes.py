@@ -12,6 +12,7 @@ from app.db import get_session
 from app.models import Cliente, PessoaMergeLog, Role, UserTenant
 from app.clientes.common import _somente_digitos_coluna
 from app.security.permissions_decorator import require_permission
+from app.services.pessoa_duplicate_index import garantir_chaves_duplicidade_pessoas
 from app.services.pessoa_duplicate_service import (
     executar_fusoes_automaticas_pessoas_duplicadas,
     executar_fusoes_assistidas_pessoas_por_nome,
@@ -60,6 +61,18 @@ def _exigir_dono_tenant(
         )
 
 
+def _exigir_indice_duplicidade(db: Session, tenant_id) -> None:
+    """Fusoes em lote so rodam sobre o indice completo do tenant."""
+    if not garantir_chaves_duplicidade_pessoas(db, tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                "O indice de duplicidades ainda esta sendo montado. "
+                "Tente novamente em alguns instantes."
+            ),
+        )
+
+
 def _igual_normalizado(campo, valor: str):
     campo_nome = getattr(campo, "key", "")
     if campo_nome in {"cpf", "cnpj", "telefone", "celular"}:
@@ -290,16 +303,28 @@ def executar_fusao_pessoas_route(
 def listar_sugestoes_duplicidade_pessoas_route(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    incluir_semelhantes: bool = Query(False),
     db: Session = Depends(get_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """Lista possiveis duplicidades de pessoas que exigem revisao manual."""
     current_user, tenant_id = _validar_tenant_e_obter_usuario(user_and_tenant)
+    if not garantir_chaves_duplicidade_pessoas(db, tenant_id):
+        return {
+            "sugestoes": [],
+            "total": 0,
+            "automaticas": [],
+            "total_automaticas": 0,
+            "skip": skip,
+            "limit": limit,
+            "indexando": True,
+        }
     return listar_sugestoes_duplicidade_pessoas(
         db,
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
+        incluir_semelhantes=incluir_semelhantes,
     )
 
 
@@ -353,6 +378,7 @@ def executar_fusoes_assistidas_pessoas_por_nome_route(
         tenant_id=tenant_id,
         is_admin=bool(getattr(current_user, "is_admin", False)),
     )
+    _exigir_indice_duplicidade(db, tenant_id)
     try:
         return executar_fusoes_assistidas_pessoas_por_nome(
             db,
@@ -379,6 +405,7 @@ def executar_fusoes_automaticas_pessoas_route(
 ):
     """Funde em lote apenas duplicidades com identidade forte valida em comum."""
     current_user, tenant_id = _validar_tenant_e_obter_usuario(user_and_tenant)
+    _exigir_indice_duplicidade(db, tenant_id)
     try:
         return executar_fusoes_automaticas_pessoas_duplicadas(
             db,
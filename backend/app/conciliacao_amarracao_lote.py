@@ -0,0 +1,213 @@
+"""
+Amarração em lote da Aba 3 (Recebimento ↔ Venda ↔ Contas a Receber).
+
+Dias movimentados têm centenas de recebimentos de cartão; buscar
+VendaPagamento, Venda e parcelas recebimento a recebimento deixava a tela de
+conciliação lenta. Aqui:
+
+- todos os NSUs do dia viram vendas em uma consulta (VendaPagamento ⟕ Venda,
+  índice ``ix_venda_pagamentos_tenant_nsu``);
+- as parcelas em aberto das vendas encontradas são lidas em uma consulta;
+- a prévia de liquidação é montada em memória, na ordem dos recebimentos;
+- as baixas em ContaReceber são gravadas com um UPDATE por bloco.
+
+Idempotência continua a mesma: só parcelas com ``status != 'recebido'`` e sem
+``conciliacao_recebimento_id`` entram na prévia e no UPDATE.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, update
+from sqlalchemy.orm import Session
+
+from .financeiro_models import ContaReceber
+
+LOTE_NSUS = 1000
+LOTE_BAIXAS = 1000
+
+
+@dataclass
+class PlanoAmarracao:
+    """Prévia da amarração: recebimentos amarrados, órfãos e parcelas a baixar."""
+
+    amarrados: List[Tuple[Any, int]] = field(default_factory=list)
+    orfaos: List[Dict[str, Any]] = field(default_factory=list)
+    baixas: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def valor_total_liquidado(self):
+        return sum(baixa["valor_original"] for baixa in self.baixas)
+
+
+def resolver_vendas_por_nsu(
+    db: Session, tenant_id: str, nsus: Sequence[str]
+) -> Dict[str, Optional[int]]:
+    """
+    NSU → venda conferida (Aba 1) do primeiro VendaPagamento com esse NSU.
+
+    NSU ausente do dicionário: não há VendaPagamento. Valor ``None``: o
+    pagamento existe, mas a venda não está conferida.
+    """
+    from .vendas_models import Venda, VendaPagamento
+
+    distintos = sorted(set(nsus))
+    vendas: Dict[str, Optional[int]] = {}
+    for inicio in range(0, len(distintos), LOTE_NSUS):
+        bloco = distintos[inicio : inicio + LOTE_NSUS]
+        linhas = (
+            db.query(VendaPagamento.nsu_cartao, Venda.id)
+            .outerjoin(
+                Venda,
+                and_(
+                    Venda.id == VendaPagamento.venda_id,
+                    Venda.tenant_id == tenant_id,
+                    Venda.conciliado_vendas.is_(True),  # Obrigatório Aba 1!
+                ),
+            )
+            .filter(
+                VendaPagamento.tenant_id == tenant_id,
+                VendaPagamento.nsu_cartao.in_(bloco),
+            )
+            .order_by(VendaPagamento.id.asc())
+        )
+        for nsu, venda_id in linhas:
+            vendas.setdefault(nsu, venda_id)
+    return vendas
+
+
+def carregar_parcelas_abertas(
+    db: Session, tenant_id: str, venda_ids: Sequence[int]
+) -> Dict[int, List[Any]]:
+    """Parcelas ainda não recebidas nem amarradas, agrupadas por venda."""
+    distintas = sorted(set(venda_ids))
+    parcelas: Dict[int, List[Any]] = {}
+    for inicio in range(0, len(distintas), LOTE_NSUS):
+        bloco = distintas[inicio : inicio + LOTE_NSUS]
+        linhas = (
+            db.query(
+                ContaReceber.id,
+                ContaReceber.venda_id,
+                ContaReceber.numero_parcela,
+                ContaReceber.valor_original,
+            )
+            .filter(
+                ContaReceber.tenant_id == tenant_id,
+                ContaReceber.venda_id.in_(bloco),
+                ContaReceber.status != "recebido",  # ✅ IDEMPOTENTE
+                ContaReceber.conciliacao_recebimento_id.is_(None),
+            )
+            .order_by(ContaReceber.id.asc())
+        )
+        for parcela in linhas:
+            parcelas.setdefault(parcela.venda_id, []).append(parcela)
+    return parcelas
+
+
+def _orfao(recebimento, motivo: Optional[str] = None) -> Dict[str, Any]:
+    orfao = {
+        "nsu": recebimento.nsu,
+        "valor": float(recebimento.valor),
+        "data": recebimento.data_recebimento.isoformat(),
+    }
+    if motivo:
+        orfao["motivo"] = motivo
+    return orfao
+
+
+def planejar_amarracao(
+    recebimentos: Sequence[Any],
+    vendas_por_nsu: Dict[str, Optional[int]],
+    parcelas_por_venda: Dict[int, List[Any]],
+) -> PlanoAmarracao:
+    """
+    Monta a prévia em memória, recebimento a recebimento.
+
+    Antecipação baixa todas as parcelas em aberto da venda; os demais tipos
+    baixam só a parcela do número informado. Parcela já reservada por um
+    recebimento anterior do mesmo lote não é baixada de novo.
+    """
+    plano = PlanoAmarracao()
+    reservadas = set()
+
+    for recebimento in recebimentos:
+        if recebimento.nsu not in vendas_por_nsu:
+            plano.orfaos.append(_orfao(recebimento, "sem_venda_pagamento"))
+            continue
+
+        venda_id = vendas_por_nsu[recebimento.nsu]
+        if venda_id is None:
+            # ❌ ERRO: Recebimento sem venda (falhou na Aba 1!)
+            plano.orfaos.append(_orfao(recebimento))
+            continue
+
+        abertas = [
+            parcela
+            for parcela in parcelas_por_venda.get(venda_id, [])
+            if parcela.id not in reservadas
+        ]
+        if recebimento.tipo_recebimento == "antecipacao":
+            tipo_baixa = "antecipacao"
+        else:
+            tipo_baixa = "parcela_individual"
+            abertas = [
+                parcela
+                for parcela in abertas
+                if parcela.numero_parcela == recebimento.parcela_numero
+            ][:1]
+
+        for parcela in abertas:
+            reservadas.add(parcela.id)
+            plano.baixas.append(
+                {
+                    "id": parcela.id,
+                    "valor_original": parcela.valor_original,
+                    "tipo_recebimento": tipo_baixa,
+                    "conciliacao_recebimento_id": recebimento.id,
+                }
+            )
+
+        plano.amarrados.append((recebimento, venda_id))
+
+    return plano
+
+
+def aplicar_baixas_contas_receber(
+    db: Session,
+    tenant_id: str,
+    data_recebimento: date,
+    baixas: List[Dict[str, Any]],
+) -> int:
+    """Baixa as parcelas da prévia com um UPDATE por bloco de ids."""
+    tabela = ContaReceber.__table__
+    atualizadas = 0
+    for inicio in range(0, len(baixas), LOTE_BAIXAS):
+        bloco = baixas[inicio : inicio + LOTE_BAIXAS]
+        ids = [baixa["id"] for baixa in bloco]
+        stmt = (
+            update(tabela)
+            .where(
+                tabela.c.tenant_id == tenant_id,
+                tabela.c.id.in_(ids),
+                tabela.c.status != "recebido",  # ✅ IDEMPOTENTE
+                tabela.c.conciliacao_recebimento_id.is_(None),
+            )
+            .values(
+                status="recebido",
+                data_recebimento=data_recebimento,
+                tipo_recebimento=case(
+                    {baixa["id"]: baixa["tipo_recebimento"] for baixa in bloco},
+                    value=tabela.c.id,
+                ),
+                conciliacao_recebimento_id=case(
+                    {
+                        baixa["id"]: baixa["conciliacao_recebimento_id"]
+                        for baixa in bloco
+                    },
+                    value=tabela.c.id,
+                ),
+            )
+        )
+        atualizadas += db.execute(stmt).rowcount or 0
+    return atualizadas
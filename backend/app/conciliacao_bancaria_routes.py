@@ -9,6 +9,7 @@ from sqlalchemy import and_, desc, text
 from sqlalchemy.exc import NoReferencedTableError
 from typing import List, Optional
 from datetime import datetime, date
+import threading
 
 from app.db import get_session as get_db
 from app.auth.dependencies import get_current_user_and_tenant
@@ -19,6 +20,12 @@ from .financeiro_models import (
     RegraConciliacao,
     TemplateAdquirente,
 )
+from .financeiro.conciliacao_ofx_importacao import (
+    LIMITE_IMPORTACAO_SINCRONA,
+    extrato_interrompido,
+    importar_transacoes_ofx,
+    processar_extrato_ofx_background,
+)
 from .parsers.ofx_parser import OFXParser, validar_extrato
 from pydantic import BaseModel
 
@@ -191,6 +198,7 @@ async def upload_ofx(
         )
 
     # Cria registro de extrato
+    total_transacoes = len(extrato_ofx.transacoes)
     extrato = ExtratoBancario(
         tenant_id=tenant_id,
         conta_bancaria_id=conta_bancaria_id,
@@ -198,127 +206,111 @@ async def upload_ofx(
         data_upload=datetime.utcnow(),
         periodo_inicio=extrato_ofx.data_inicio,
         periodo_fim=extrato_ofx.data_fim,
-        total_movimentacoes=len(extrato_ofx.transacoes),
-        pendentes=len(extrato_ofx.transacoes),
+        total_movimentacoes=total_transacoes,
+        pendentes=total_transacoes,
         conciliadas=0,
+        movimentacoes_processadas=0,
         status="processando",
     )
     db.add(extrato)
     db.flush()  # Garante que o ID seja gerado
 
-    # Carrega regras ativas
-    regras = (
-        db.query(RegraConciliacao)
-        .filter(
-            and_(
-                RegraConciliacao.tenant_id == tenant_id,
-                RegraConciliacao.ativo.is_(True),
-            )
-        )
-        .all()
+    periodo_inicio = (
+        extrato_ofx.data_inicio.isoformat() if extrato_ofx.data_inicio else None
     )
+    periodo_fim = extrato_ofx.data_fim.isoformat() if extrato_ofx.data_fim else None
 
-    # Processa cada transação
-    movimentacoes_criadas = 0
-    for transacao in extrato_ofx.transacoes:
-        # Verifica se já existe (pelo FITID)
-        existe = (
-            db.query(MovimentacaoBancaria)
-            .filter(
-                and_(
-                    MovimentacaoBancaria.tenant_id == tenant_id,
-                    MovimentacaoBancaria.conta_bancaria_id == conta_bancaria_id,
-                    MovimentacaoBancaria.fitid == transacao.fitid,
-                )
-            )
-            .first()
-        )
-
-        if existe:
-            continue  # Pula duplicatas
-
-        # Cria movimentação
-        movimentacao = MovimentacaoBancaria(
-            tenant_id=tenant_id,
-            extrato_id=extrato.id,  # Usa o ID gerado pelo banco
-            conta_bancaria_id=conta_bancaria_id,
-            fitid=transacao.fitid,
-            data_movimento=transacao.data_movimento,
-            valor=transacao.valor,
-            tipo=transacao.tipo,
-            memo=transacao.memo,
-            status_conciliacao="pendente",
-            confianca_sugestao=0,
+    # Extrato grande (ex.: um ano inteiro) segue em background; o progresso
+    # fica em GET /conciliacao/extratos/{id}/status
+    if total_transacoes > LIMITE_IMPORTACAO_SINCRONA:
+        db.commit()
+        threading.Thread(
+            target=processar_extrato_ofx_background,
+            kwargs={
+                "extrato_id": extrato.id,
+                "tenant_id": tenant_id,
+                "conta_bancaria_id": conta_bancaria_id,
+                "transacoes": extrato_ofx.transacoes,
+            },
+            daemon=True,
+        ).start()
+        return UploadOFXResponse(
+            extrato_id=str(extrato.id),
+            total_transacoes=total_transacoes,
+            periodo_inicio=periodo_inicio,
+            periodo_fim=periodo_fim,
+            pendentes=total_transacoes,
+            status="processando",
         )
 
-        # Aplica regras automáticas
-        melhor_regra = None
-        melhor_confianca = 0
-
-        for regra in regras:
-            # Verifica padrão MEMO
-            if regra.padrao_memo and transacao.memo:
-                padrao = regra.padrao_memo.replace("%", ".*")
-                import re
-
-                if re.search(padrao, transacao.memo, re.IGNORECASE):
-                    confianca = regra.confianca or 0
-                    if confianca > melhor_confianca:
-                        melhor_confianca = confianca
-                        melhor_regra = regra
-
-            # Verifica range de valor
-            if regra.valor_min and regra.valor_max:
-                if regra.valor_min <= abs(transacao.valor) <= regra.valor_max:
-                    confianca = (regra.confianca or 0) * 0.7  # Peso menor
-                    if confianca > melhor_confianca:
-                        melhor_confianca = confianca
-                        melhor_regra = regra
-
-        # Aplica sugestão
-        if melhor_regra:
-            movimentacao.confianca_sugestao = int(melhor_confianca)
-            movimentacao.regra_aplicada_id = melhor_regra.id
-            movimentacao.tipo_vinculo = melhor_regra.tipo_vinculo
-            movimentacao.fornecedor_id = melhor_regra.fornecedor_id
-            movimentacao.categoria_dre_id = melhor_regra.categoria_dre_id
-            movimentacao.recorrente = melhor_regra.recorrente
-            movimentacao.periodicidade = melhor_regra.periodicidade
-
-            # Auto-aplicar se confiança > 80%
-            if melhor_confianca >= 80:
-                movimentacao.status_conciliacao = "conciliado"
-                extrato.conciliadas += 1
-                extrato.pendentes -= 1
-
-                # Atualiza estatísticas da regra
-                melhor_regra.vezes_aplicada += 1
-                melhor_regra.vezes_confirmada += 1  # Auto-confirmada
-                melhor_regra.confianca = int(
-                    (melhor_regra.vezes_confirmada / melhor_regra.vezes_aplicada) * 100
-                )
-            else:
-                movimentacao.status_conciliacao = "sugerido"
-                melhor_regra.vezes_aplicada += 1
-
-        db.add(movimentacao)
-        movimentacoes_criadas += 1
+    movimentacoes_criadas = importar_transacoes_ofx(
+        db,
+        tenant_id=tenant_id,
+        extrato=extrato,
+        conta_bancaria_id=conta_bancaria_id,
+        transacoes=extrato_ofx.transacoes,
+    )
 
+    extrato.movimentacoes_processadas = total_transacoes
     extrato.status = "concluido"
     db.commit()
 
     return UploadOFXResponse(
         extrato_id=str(extrato.id),  # Converte ID gerado para string na resposta
         total_transacoes=movimentacoes_criadas,
-        periodo_inicio=extrato_ofx.data_inicio.isoformat()
-        if extrato_ofx.data_inicio
-        else None,
-        periodo_fim=extrato_ofx.data_fim.isoformat() if extrato_ofx.data_fim else None,
+        periodo_inicio=periodo_inicio,
+        periodo_fim=periodo_fim,
         pendentes=extrato.pendentes,
         status=extrato.status,
     )
 
 
+@router.get("/extratos/{extrato_id}/status")
+def status_extrato(
+    extrato_id: int,
+    db: Session = Depends(get_db),
+    user_and_tenant=Depends(get_current_user_and_tenant),
+):
+    """Progresso da importacao de um extrato OFX."""
+    current_user, tenant_id = user_and_tenant
+
+    extrato = (
+        db.query(ExtratoBancario)
+        .filter(
+            and_(
+                ExtratoBancario.id == extrato_id,
+                ExtratoBancario.tenant_id == tenant_id,
+            )
+        )
+        .first()
+    )
+    if not extrato:
+        raise HTTPException(status_code=404, detail="Extrato não encontrado")
+
+    total = int(extrato.total_movimentacoes or 0)
+    processadas = int(extrato.movimentacoes_processadas or 0)
+    status = extrato.status
+    erro = extrato.erro_mensagem
+    if extrato_interrompido(extrato):
+        # So leitura: os lotes ja commitados ficam; reenviar o arquivo importa
+        # o restante (FITIDs existentes sao ignorados)
+        status = "erro"
+        erro = (
+            f"Importação interrompida após {processadas} de {total} transações. "
+            "Envie o arquivo novamente para importar o restante."
+        )
+    return {
+        "extrato_id": str(extrato.id),
+        "status": status,
+        "total_transacoes": total,
+        "processadas": processadas,
+        "progresso": round(processadas / total * 100, 1) if total else 100.0,
+        "conciliadas": int(extrato.conciliadas or 0),
+        "pendentes": int(extrato.pendentes or 0),
+        "erro": erro,
+    }
+
+
 @router.get("/movimentacoes", response_model=List[MovimentacaoResponse])
 async def listar_movimentacoes(
     conta_bancaria_id: Optional[int] = None,
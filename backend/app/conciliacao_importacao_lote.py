@@ -0,0 +1,225 @@
+"""
+Importação do arquivo da operadora em lote (Stone, Cielo, Rede).
+
+Arquivos mensais passam de 20 mil linhas; consultar NSU e ContaReceber linha a
+linha custava duas consultas por linha. Aqui o arquivo vira um lote colunar e:
+
+- os NSUs já existentes são resolvidos em uma consulta (``nsu = ANY(:nsus)``
+  no PostgreSQL, blocos de ``IN`` nos demais bancos);
+- as contas a conciliar são buscadas em uma consulta;
+- os campos ``*_real`` e ``status_conciliacao`` são gravados com um único
+  ``UPDATE ... FROM (VALUES ...)`` por bloco.
+
+A regra de ouro continua: só campos ``*_real``/``diferenca_*`` e
+``status_conciliacao`` mudam; ``status`` da conta nunca é alterado aqui.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    Numeric,
+    String,
+    any_,
+    bindparam,
+    cast,
+    column,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from .financeiro_models import ContaReceber
+
+LOTE_CONSULTA_NSUS = 1000
+LOTE_UPDATE = 1000
+STATUS_CONFIRMADA_OPERADORA = "confirmada_operadora"
+
+
+@dataclass
+class LoteOperadora:
+    """Linhas do arquivo em colunas (posição i = linha i + 1 do arquivo)."""
+
+    nsus: List[Optional[str]] = field(default_factory=list)
+    datas_pagamento: List[Any] = field(default_factory=list)
+    valores_liquidos: List[Any] = field(default_factory=list)
+    taxas_mdr: List[Any] = field(default_factory=list)
+    taxas_antecipacao: List[Any] = field(default_factory=list)
+
+    @classmethod
+    def de_linhas(cls, linhas: Sequence[Dict[str, Any]]) -> "LoteOperadora":
+        lote = cls()
+        for linha in linhas:
+            lote.nsus.append(linha.get("nsu"))
+            lote.datas_pagamento.append(linha.get("data_pagamento"))
+            lote.valores_liquidos.append(linha.get("valor_liquido"))
+            lote.taxas_mdr.append(linha.get("taxa_mdr"))
+            lote.taxas_antecipacao.append(
+                linha.get("taxa_antecipacao", Decimal("0.00"))
+            )
+        return lote
+
+    def __len__(self) -> int:
+        return len(self.nsus)
+
+
+def _filtros_nsu(db: Session, nsus: Iterable[str]) -> Iterator[Any]:
+    distintos = sorted({nsu for nsu in nsus if nsu is not None})
+    if not distintos:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        yield ContaReceber.nsu == any_(
+            bindparam("nsus", distintos, type_=ARRAY(String))
+        )
+        return
+    for inicio in range(0, len(distintos), LOTE_CONSULTA_NSUS):
+        yield ContaReceber.nsu.in_(distintos[inicio : inicio + LOTE_CONSULTA_NSUS])
+
+
+def buscar_nsus_existentes(
+    db: Session, nsus: Sequence[Optional[str]], adquirente: str, tenant_id: str
+) -> Set[Optional[str]]:
+    """
+    NSUs do lote que já existem em ContaReceber para o adquirente.
+
+    Equivale a ``validar_duplicata_nsu`` para cada linha (inclusive NSU vazio,
+    que casa com contas sem NSU).
+    """
+    base = db.query(ContaReceber.nsu).filter(
+        ContaReceber.tenant_id == tenant_id,
+        ContaReceber.adquirente == adquirente,
+    )
+    existentes: Set[Optional[str]] = set()
+    for filtro in _filtros_nsu(db, nsus):
+        existentes.update(nsu for (nsu,) in base.filter(filtro).distinct())
+    if None in nsus and base.filter(ContaReceber.nsu.is_(None)).first():
+        existentes.add(None)
+    return existentes
+
+
+def buscar_contas_por_nsu(
+    db: Session, nsus: Sequence[Optional[str]], adquirente: str, tenant_id: str
+) -> Dict[str, Any]:
+    """Primeira conta (menor id) por NSU, com os campos usados na conciliação."""
+    base = db.query(
+        ContaReceber.id,
+        ContaReceber.nsu,
+        ContaReceber.taxa_mdr_estimada,
+        ContaReceber.valor_liquido_estimado,
+        ContaReceber.diferenca_taxa,
+        ContaReceber.diferenca_valor,
+    ).filter(
+        ContaReceber.tenant_id == tenant_id,
+        ContaReceber.adquirente == adquirente,
+    )
+    contas: Dict[str, Any] = {}
+    for filtro in _filtros_nsu(db, nsus):
+        for conta in base.filter(filtro).order_by(ContaReceber.id.asc()):
+            contas.setdefault(conta.nsu, conta)
+    return contas
+
+
+def montar_confirmacao_operadora(
+    conta: Any,
+    *,
+    taxa_mdr: Any,
+    taxa_antecipacao: Any,
+    valor_liquido: Any,
+    data_pagamento: date,
+) -> Dict[str, Any]:
+    """Valores a gravar na conta; diferenças só quando há estimativa."""
+    diferenca_taxa = conta.diferenca_taxa
+    if conta.taxa_mdr_estimada:
+        diferenca_taxa = taxa_mdr - conta.taxa_mdr_estimada
+
+    diferenca_valor = conta.diferenca_valor
+    if conta.valor_liquido_estimado:
+        diferenca_valor = valor_liquido - conta.valor_liquido_estimado
+
+    return {
+        "id": conta.id,
+        "taxa_mdr_real": taxa_mdr,
+        "taxa_antecipacao_real": taxa_antecipacao,
+        "valor_liquido_real": valor_liquido,
+        "data_vencimento_real": data_pagamento,
+        "diferenca_taxa": diferenca_taxa,
+        "diferenca_valor": diferenca_valor,
+    }
+
+
+_COLUNAS_CONFIRMACAO = (
+    ("taxa_mdr_real", Numeric(5, 2)),
+    ("taxa_antecipacao_real", Numeric(5, 2)),
+    ("valor_liquido_real", Numeric(15, 2)),
+    ("data_vencimento_real", Date()),
+    ("diferenca_taxa", Numeric(5, 2)),
+    ("diferenca_valor", Numeric(15, 2)),
+)
+
+
+def aplicar_confirmacoes_operadora(
+    db: Session, tenant_id: str, confirmacoes: List[Dict[str, Any]]
+) -> int:
+    """Grava as confirmações com um UPDATE por bloco; retorna contas afetadas."""
+    if not confirmacoes:
+        return 0
+
+    tabela = ContaReceber.__table__
+    atualizadas = 0
+
+    if db.get_bind().dialect.name != "postgresql":
+        # SQLite não aceita alias de colunas em VALUES: executemany por id
+        stmt = (
+            update(tabela)
+            .where(
+                tabela.c.id == bindparam("b_id"),
+                tabela.c.tenant_id == tenant_id,
+            )
+            .values(
+                status_conciliacao=STATUS_CONFIRMADA_OPERADORA,
+                **{
+                    nome: bindparam(f"b_{nome}") for nome, _tipo in _COLUNAS_CONFIRMACAO
+                },
+            )
+        )
+        parametros = [
+            {f"b_{chave}": valor for chave, valor in confirmacao.items()}
+            for confirmacao in confirmacoes
+        ]
+        db.execute(stmt, parametros)
+        return len(parametros)
+
+    for inicio in range(0, len(confirmacoes), LOTE_UPDATE):
+        bloco = confirmacoes[inicio : inicio + LOTE_UPDATE]
+        dados = values(
+            column("id", Integer),
+            *(column(nome, tipo) for nome, tipo in _COLUNAS_CONFIRMACAO),
+            name="dados",
+        ).data(
+            [
+                (item["id"], *(item[nome] for nome, _tipo in _COLUNAS_CONFIRMACAO))
+                for item in bloco
+            ]
+        )
+        stmt = (
+            update(tabela)
+            .where(
+                tabela.c.id == dados.c.id,
+                tabela.c.tenant_id == tenant_id,
+            )
+            .values(
+                status_conciliacao=STATUS_CONFIRMADA_OPERADORA,
+                # NULL em VALUES chega como texto: cast mantém o tipo da coluna
+                **{
+                    nome: cast(dados.c[nome], tipo)
+                    for nome, tipo in _COLUNAS_CONFIRMACAO
+                },
+            )
+        )
+        atualizadas += db.execute(stmt).rowcount or 0
+    return atualizadas
@@ -44,10 +44,16 @@ from .conciliacao_helpers import (
     calcular_percentual_divergencia,
     aplicar_template_csv,
     gerar_alertas_validacao,
-    validar_duplicata_nsu,
     validar_data_futura,
     validar_valor_razoavel,
 )
+from .conciliacao_importacao_lote import (
+    LoteOperadora,
+    aplicar_confirmacoes_operadora,
+    buscar_contas_por_nsu,
+    buscar_nsus_existentes,
+    montar_confirmacao_operadora,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -195,35 +201,43 @@ def importar_arquivo_operadora(
         db.flush()
 
         # 6. Processar linhas e atualizar ContaReceber
+        # Em lote: uma consulta de NSUs já existentes, uma de contas e um
+        # UPDATE para o arquivo todo; os erros continuam reportados por linha.
         parcelas_confirmadas = 0
         parcelas_orfas = 0
-        erros_validacao = []
+        erros_por_linha: Dict[int, str] = {}
         periodo_inicio = None
         periodo_fim = None
         total_valor = Decimal("0.00")
 
-        for idx, linha in enumerate(linhas_validas, start=1):
+        lote = LoteOperadora.de_linhas(linhas_validas)
+        nsus_existentes = buscar_nsus_existentes(
+            db, lote.nsus, template_obj.nome, tenant_id
+        )
+
+        aceitas = []
+        for posicao, nsu in enumerate(lote.nsus):
+            idx = posicao + 1
             try:
                 # PRINCÍPIO 4: Validar cada linha
-                nsu = linha.get("nsu")
-                data_pagamento = linha.get("data_pagamento")
-                valor_liquido = linha.get("valor_liquido")
+                data_pagamento = lote.datas_pagamento[posicao]
+                valor_liquido = lote.valores_liquidos[posicao]
 
                 # Validações
-                if validar_duplicata_nsu(db, nsu, template_obj.nome, tenant_id):
-                    erros_validacao.append(
+                if nsu in nsus_existentes:
+                    erros_por_linha[idx] = (
                         f"Linha {idx}: NSU {nsu} já existe no sistema"
                     )
                     continue
 
                 if not validar_data_futura(data_pagamento, dias_tolerancia=90):
-                    erros_validacao.append(
+                    erros_por_linha[idx] = (
                         f"Linha {idx}: Data {data_pagamento} muito no futuro"
                     )
                     continue
 
                 if not validar_valor_razoavel(valor_liquido):
-                    erros_validacao.append(
+                    erros_por_linha[idx] = (
                         f"Linha {idx}: Valor {valor_liquido} fora da faixa razoável"
                     )
                     continue
@@ -235,54 +249,50 @@ def importar_arquivo_operadora(
                     periodo_fim = data_pagamento
 
                 total_valor += valor_liquido
+                aceitas.append(posicao)
 
-                # Buscar ContaReceber por NSU
-                conta = (
-                    db.query(ContaReceber)
-                    .filter(
-                        ContaReceber.tenant_id == tenant_id,
-                        ContaReceber.nsu == nsu,
-                        ContaReceber.adquirente == template_obj.nome,
-                    )
-                    .first()
-                )
+            except Exception as e:
+                erros_por_linha[idx] = f"Linha {idx}: Erro ao processar - {str(e)}"
+
+        # Buscar ContaReceber por NSU (uma consulta para todas as linhas aceitas)
+        contas = buscar_contas_por_nsu(
+            db,
+            [lote.nsus[posicao] for posicao in aceitas],
+            template_obj.nome,
+            tenant_id,
+        )
 
-                if conta:
-                    # ⚠️ ATENÇÃO CRÍTICA: NUNCA alterar status aqui!
-                    # APENAS atualizar campos *_real e status_conciliacao
+        confirmacoes = []
+        for posicao in aceitas:
+            idx = posicao + 1
+            nsu = lote.nsus[posicao]
+            conta = contas.get(nsu)
+            if conta is None:
+                # Parcela órfã - existe no arquivo mas não no sistema
+                parcelas_orfas += 1
+                erros_por_linha[idx] = (
+                    f"Linha {idx}: NSU {nsu} não encontrado no sistema (parcela órfã)"
+                )
+                continue
 
-                    conta.taxa_mdr_real = linha.get("taxa_mdr")
-                    conta.taxa_antecipacao_real = linha.get(
-                        "taxa_antecipacao", Decimal("0.00")
-                    )
-                    conta.valor_liquido_real = valor_liquido
-                    conta.data_vencimento_real = data_pagamento
-
-                    # Calcular diferenças
-                    if conta.taxa_mdr_estimada:
-                        conta.diferenca_taxa = (
-                            conta.taxa_mdr_real - conta.taxa_mdr_estimada
-                        )
-
-                    if conta.valor_liquido_estimado:
-                        conta.diferenca_valor = (
-                            conta.valor_liquido_real - conta.valor_liquido_estimado
-                        )
-
-                    # Atualizar status_conciliacao (NÃO status!)
-                    conta.status_conciliacao = "confirmada_operadora"
-
-                    parcelas_confirmadas += 1
-
-                else:
-                    # Parcela órfã - existe no arquivo mas não no sistema
-                    parcelas_orfas += 1
-                    erros_validacao.append(
-                        f"Linha {idx}: NSU {nsu} não encontrado no sistema (parcela órfã)"
+            try:
+                # ⚠️ ATENÇÃO CRÍTICA: NUNCA alterar status aqui!
+                # APENAS atualizar campos *_real e status_conciliacao
+                confirmacoes.append(
+                    montar_confirmacao_operadora(
+                        conta,
+                        taxa_mdr=lote.taxas_mdr[posicao],
+                        taxa_antecipacao=lote.taxas_antecipacao[posicao],
+                        valor_liquido=lote.valores_liquidos[posicao],
+                        data_pagamento=lote.datas_pagamento[posicao],
                     )
-
+                )
+                parcelas_confirmadas += 1
             except Exception as e:
-                erros_validacao.append(f"Linha {idx}: Erro ao processar - {str(e)}")
+                erros_por_linha[idx] = f"Linha {idx}: Erro ao processar - {str(e)}"
+
+        aplicar_confirmacoes_operadora(db, tenant_id, confirmacoes)
+        erros_validacao = [erros_por_linha[idx] for idx in sorted(erros_por_linha)]
 
         # 7. Atualizar metadados
         arquivo_evidencia.periodo_inicio = periodo_inicio
@@ -28,7 +28,12 @@ from datetime import datetime, date
 from typing import Dict, List, Optional
 import logging
 
-from .financeiro_models import ContaReceber
+from .conciliacao_amarracao_lote import (
+    aplicar_baixas_contas_receber,
+    carregar_parcelas_abertas,
+    planejar_amarracao,
+    resolver_vendas_por_nsu,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -263,7 +268,6 @@ def amarrar_recebimentos_vendas(
         }
     """
     from .conciliacao_models import ConciliacaoRecebimento, ConciliacaoMetrica
-    from .vendas_models import Venda
 
     try:
         logger.info(f"[Aba 3] Iniciando amarração para data {data_recebimento}")
@@ -291,104 +295,32 @@ def amarrar_recebimentos_vendas(
                 "mensagem": "Nenhum recebimento para amarrar (já processado ou não validado)",
             }
 
-        amarrados = 0
-        orfaos = []
-        parcelas_a_baixar = []  # Para preview transparente
-
-        for recebimento in recebimentos:
-            # 2. Buscar venda pelo NSU através de VendaPagamento
-            from .vendas_models import VendaPagamento
-
-            venda_pagamento = (
-                db.query(VendaPagamento)
-                .filter(VendaPagamento.nsu_cartao == recebimento.nsu)
-                .first()
-            )
-
-            if not venda_pagamento:
-                orfaos.append(
-                    {
-                        "nsu": recebimento.nsu,
-                        "valor": float(recebimento.valor),
-                        "data": recebimento.data_recebimento.isoformat(),
-                        "motivo": "sem_venda_pagamento",
-                    }
-                )
-                continue
-
-            venda = (
-                db.query(Venda)
-                .filter(
-                    Venda.tenant_id == tenant_id,
-                    Venda.id == venda_pagamento.venda_id,
-                    Venda.conciliado_vendas.is_(True),  # Obrigatório Aba 1!
-                )
-                .first()
-            )
-
-            if not venda:
-                # ❌ ERRO: Recebimento sem venda (falhou na Aba 1!)
-                orfaos.append(
-                    {
-                        "nsu": recebimento.nsu,
-                        "valor": float(recebimento.valor),
-                        "data": recebimento.data_recebimento.isoformat(),
-                    }
-                )
-                continue
-
-            # 3. Buscar Contas a Receber da venda
-            if recebimento.tipo_recebimento == "antecipacao":
-                # Baixar todas as parcelas de uma vez
-                parcelas = (
-                    db.query(ContaReceber)
-                    .filter(
-                        ContaReceber.tenant_id == tenant_id,
-                        ContaReceber.venda_id == venda.id,
-                        ContaReceber.status != "recebido",  # ✅ IDEMPOTENTE
-                        ContaReceber.conciliacao_recebimento_id.is_(
-                            None
-                        ),  # ✅ Ainda não amarrado
-                    )
-                    .all()
-                )
-
-                for parcela in parcelas:
-                    parcela.status = "recebido"
-                    parcela.data_recebimento = data_recebimento
-                    parcela.tipo_recebimento = "antecipacao"
-                    parcela.conciliacao_recebimento_id = recebimento.id
-                    parcelas_a_baixar.append(parcela)
-
-            else:
-                # Baixar apenas a parcela específica
-                parcela = (
-                    db.query(ContaReceber)
-                    .filter(
-                        ContaReceber.tenant_id == tenant_id,
-                        ContaReceber.venda_id == venda.id,
-                        ContaReceber.numero_parcela == recebimento.parcela_numero,
-                        ContaReceber.status != "recebido",  # ✅ IDEMPOTENTE
-                        ContaReceber.conciliacao_recebimento_id.is_(
-                            None
-                        ),  # ✅ Ainda não amarrado
-                    )
-                    .first()
-                )
+        # 2. Resolver NSU → venda e carregar parcelas em aberto (em lote)
+        vendas_por_nsu = resolver_vendas_por_nsu(
+            db, tenant_id, [recebimento.nsu for recebimento in recebimentos]
+        )
+        parcelas_por_venda = carregar_parcelas_abertas(
+            db,
+            tenant_id,
+            [venda_id for venda_id in vendas_por_nsu.values() if venda_id],
+        )
 
-                if parcela:
-                    parcela.status = "recebido"
-                    parcela.data_recebimento = data_recebimento
-                    parcela.tipo_recebimento = "parcela_individual"
-                    parcela.conciliacao_recebimento_id = recebimento.id
-                    parcelas_a_baixar.append(parcela)
+        # 3. Prévia transparente das parcelas a baixar (em memória)
+        plano = planejar_amarracao(recebimentos, vendas_por_nsu, parcelas_por_venda)
+        orfaos = plano.orfaos
+        parcelas_a_baixar = plano.baixas
+        aplicar_baixas_contas_receber(
+            db, tenant_id, data_recebimento, parcelas_a_baixar
+        )
 
-            # 4. Marcar recebimento como amarrado
+        # 4. Marcar recebimentos como amarrados
+        amarrado_em = datetime.utcnow()
+        for recebimento, venda_id in plano.amarrados:
             recebimento.amarrado = True
-            recebimento.amarrado_em = datetime.utcnow()
-            recebimento.venda_id = venda.id
+            recebimento.amarrado_em = amarrado_em
+            recebimento.venda_id = venda_id
 
-            amarrados += 1
+        amarrados = len(plano.amarrados)
 
         # 📊 MÉTRICA DE SAÚDE DO SISTEMA
         total_recebimentos = len(recebimentos)
@@ -397,7 +329,7 @@ def amarrar_recebimentos_vendas(
         )
         alerta_saude = "CRÍTICO" if taxa_sucesso < 90 else "OK"
 
-        valor_total_liquidado = sum(p.valor_original for p in parcelas_a_baixar)
+        valor_total_liquidado = plano.valor_total_liquidado
 
         # 5. Salvar métrica
         metrica = ConciliacaoMetrica(
@@ -6,13 +6,14 @@ Endpoints para dados consolidados do sistema
 # ruff: noqa: F401
 
 from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func, and_, or_
 from datetime import date, datetime, timedelta
 from typing import Optional
 import logging
 
-from .db import get_session
+from .db import get_async_session
 from .auth.dependencies import get_current_user_and_tenant
 from .models import Cliente
 from .vendas_models import Venda, VendaItem
@@ -113,12 +114,16 @@ def _classificar_data_vencimento_dashboard(
 @router.get("/dashboard/resumo")
 async def obter_resumo_dashboard(
     periodo_dias: int = Query(30, ge=1, le=366),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
     Retorna resumo consolidado para o dashboard financeiro
     """
+    return await db.run_sync(_obter_resumo_dashboard, periodo_dias, user_and_tenant)
+
+
+def _obter_resumo_dashboard(db: Session, periodo_dias: int, user_and_tenant):
     current_user, tenant_id = user_and_tenant
     try:
         agora = now_brasilia()
@@ -333,12 +338,18 @@ async def obter_resumo_dashboard(
 @router.get("/dashboard/entradas-saidas")
 async def obter_entradas_saidas_por_dia(
     periodo_dias: int = Query(30, ge=0, le=366),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
     Retorna entradas e saídas agrupadas por dia para gráfico
     """
+    return await db.run_sync(
+        _obter_entradas_saidas_por_dia, periodo_dias, user_and_tenant
+    )
+
+
+def _obter_entradas_saidas_por_dia(db: Session, periodo_dias: int, user_and_tenant):
     current_user, tenant_id = user_and_tenant
     try:
         inicio_periodo, fim_periodo = _intervalo_dias_calendario(periodo_dias)
@@ -413,12 +424,16 @@ async def obter_entradas_saidas_por_dia(
 @router.get("/dashboard/vendas-por-dia")
 async def obter_vendas_por_dia(
     periodo_dias: int = Query(30, ge=0, le=366),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
     Retorna vendas agrupadas por dia para gráfico
     """
+    return await db.run_sync(_obter_vendas_por_dia, periodo_dias, user_and_tenant)
+
+
+def _obter_vendas_por_dia(db: Session, periodo_dias: int, user_and_tenant):
     current_user, tenant_id = user_and_tenant
     try:
         inicio_periodo, fim_periodo = _intervalo_dias_calendario(periodo_dias)
@@ -478,12 +493,16 @@ async def obter_vendas_por_dia(
 @router.get("/dashboard/contas-vencidas")
 async def obter_contas_vencidas(
     limite: int = 10,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
     Retorna contas a receber e pagar vencidas (não pagas)
     """
+    return await db.run_sync(_obter_contas_vencidas, limite, user_and_tenant)
+
+
+def _obter_contas_vencidas(db: Session, limite: int, user_and_tenant):
     current_user, tenant_id = user_and_tenant
 
     try:
@@ -622,13 +641,17 @@ async def obter_contas_vencidas(
 
 @router.get("/dashboard/gerencial")
 async def obter_metricas_gerencial(
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
     Retorna métricas consolidadas para o Dashboard Gerencial.
     Calcula diretamente do banco, sem depender de client-side logic.
     """
+    return await db.run_sync(_obter_metricas_gerencial, user_and_tenant)
+
+
+def _obter_metricas_gerencial(db: Session, user_and_tenant):
     current_user, tenant_id = user_and_tenant
     try:
         # 1. VIPs inativos — segmento VIP com mais de 20 dias sem compra
@@ -769,12 +792,16 @@ async def obter_metricas_gerencial(
 async def obter_top_produtos(
     periodo_dias: int = 30,
     limite: int = 10,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
     Retorna os produtos mais vendidos no período
     """
+    return await db.run_sync(_obter_top_produtos, periodo_dias, limite, user_and_tenant)
+
+
+def _obter_top_produtos(db: Session, periodo_dias: int, limite: int, user_and_tenant):
     current_user, tenant_id = user_and_tenant
     try:
         from .vendas_models import VendaItem
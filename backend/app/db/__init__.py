@@ -5,6 +5,7 @@ them so existing imports keep using one Base, one engine and one SessionLocal.
 """
 
 from app.db.core import Base, DATABASE_URL, SessionLocal, engine, get_session
+from app.db.async_core import AsyncSessionLocal, get_async_engine, get_async_session
 
 # Hooks oficiais de multitenancy SQLAlchemy.
 # app.db e carregado por praticamente toda a API; registrar aqui evita o modulo
@@ -12,12 +13,17 @@ from app.db.core import Base, DATABASE_URL, SessionLocal, engine, get_session
 import app.tenancy.filters  # noqa: E402,F401
 import app.database.orm_guards  # noqa: E402,F401
 import app.services.bling_cost_sync_events  # noqa: E402,F401
+import app.dre_canais.invalidacao  # noqa: E402,F401
+import app.services.pessoa_duplicate_index  # noqa: E402,F401
 
 __all__ = [
+    "AsyncSessionLocal",
     "Base",
     "DATABASE_URL",
     "SessionLocal",
     "engine",
+    "get_async_engine",
+    "get_async_session",
     "get_session",
     "sql_audit",
 ]
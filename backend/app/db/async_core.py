@@ -0,0 +1,82 @@
+"""Engine e sessao SQLAlchemy assincronas.
+
+Caminho suportado para handlers ``async def``: a sessao assincrona usa o
+driver asyncio (asyncpg no PostgreSQL, aiosqlite em testes) e nao bloqueia o
+event loop enquanto espera o banco.
+
+Codigo ORM sincrono existente (services, ``db.query``) pode ser reaproveitado
+sem bloquear o loop via ``await db.run_sync(func, *args)``: ``func`` recebe a
+``Session`` sincrona por tras da ``AsyncSession`` e o I/O do driver continua
+assincrono. Os hooks de multitenancy e RLS sao registrados na classe
+``Session`` e valem tambem aqui.
+"""
+
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.db.core import DATABASE_URL, _engine_kwargs
+
+__all__ = [
+    "AsyncSessionLocal",
+    "get_async_engine",
+    "get_async_session",
+    "to_async_database_url",
+]
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_database_url(database_url: str) -> str:
+    """Converte a URL sincrona (psycopg2/sqlite) para o driver asyncio."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    drivername = _ASYNC_DRIVERS.get(backend)
+    if drivername is None or url.drivername == drivername:
+        return url.render_as_string(hide_password=False)
+
+    url = url.set(drivername=drivername)
+    if drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        # asyncpg usa ``ssl`` no lugar do ``sslmode`` da libpq.
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = to_async_database_url(DATABASE_URL)
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Engine assincrona criada sob demanda (o driver so e exigido no uso)."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, **_engine_kwargs(DATABASE_URL)
+        )
+    return _async_engine
+
+
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession,
+)
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
@@ -0,0 +1,88 @@
+"""Deteccao de rotas ``async def`` que usam a sessao SQLAlchemy sincrona.
+
+Um handler ``async def`` roda direto no event loop; se ele recebe a sessao
+sincrona (``get_session``/``get_db``) cada query bloqueia todas as outras
+requests do worker. Rotas novas devem usar ``get_async_session`` ou ser
+declaradas com ``def`` (o FastAPI executa no threadpool).
+
+Usado no startup (warning com a contagem) e pelo guard de CI em
+``scripts/check_async_sync_session_routes.py``.
+"""
+
+from __future__ import annotations
+
+import inspect
+import logging
+from dataclasses import dataclass
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+SYNC_SESSION_DEPENDENCY_NAMES = frozenset({"get_session", "get_db"})
+
+
+@dataclass(frozen=True)
+class AsyncSyncSessionRoute:
+    path: str
+    methods: tuple[str, ...]
+    endpoint: str
+
+    def __str__(self) -> str:
+        return f"{','.join(self.methods)} {self.path} -> {self.endpoint}"
+
+
+def _is_sync_session_dependency(call) -> bool:
+    return getattr(
+        call, "__name__", None
+    ) in SYNC_SESSION_DEPENDENCY_NAMES and inspect.isgeneratorfunction(call)
+
+
+def _iter_api_routes(routes, prefix: str = ""):
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield prefix + route.path, route
+            continue
+        # FastAPI recente mantem routers incluidos como ramos resolvidos sob
+        # demanda; o APIRouter original continua acessivel.
+        original_router = getattr(route, "original_router", None)
+        if original_router is not None:
+            include_prefix = getattr(route.include_context, "prefix", "")
+            yield from _iter_api_routes(original_router.routes, prefix + include_prefix)
+
+
+def find_async_routes_with_sync_session(app: FastAPI) -> list[AsyncSyncSessionRoute]:
+    """Lista as rotas ``async def`` que recebem diretamente a sessao sincrona."""
+    found = []
+    for path, route in _iter_api_routes(app.routes):
+        if not inspect.iscoroutinefunction(route.endpoint):
+            continue
+        if not any(
+            _is_sync_session_dependency(dependency.call)
+            for dependency in route.dependant.dependencies
+        ):
+            continue
+        endpoint = route.endpoint
+        found.append(
+            AsyncSyncSessionRoute(
+                path=path,
+                methods=tuple(sorted(route.methods or ())),
+                endpoint=f"{endpoint.__module__}:{endpoint.__qualname__}",
+            )
+        )
+    return sorted(found, key=lambda item: (item.endpoint, item.path))
+
+
+def warn_async_routes_with_sync_session(app: FastAPI) -> None:
+    """Loga no startup quantas rotas async ainda bloqueiam o event loop."""
+    routes = find_async_routes_with_sync_session(app)
+    if not routes:
+        return
+    logger.warning(
+        "[ASYNC-DB] %s rotas async def usam a sessao sincrona e bloqueiam o "
+        "event loop (scripts/check_async_sync_session_routes.py lista todas)",
+        len(routes),
+    )
+    for route in routes:
+        logger.debug("[ASYNC-DB] %s", route)
@@ -18,9 +18,10 @@ Fase: 1.4.3-D (Enforcement)
 
 import logging
 import os
-import traceback
+import sys
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional
 from sqlalchemy import event
 from sqlalchemy.engine import Engine, Connection
 
@@ -30,6 +31,7 @@ from app.db.sql_audit_classifier import (
     is_raw_sql_text as _is_raw_sql_text,
     should_audit_statement as _should_audit_statement,
 )
+from app.db.sql_audit_context import is_tenant_safe_execution
 from app.db.sql_audit_config import (
     PROD_LIKE_ENVIRONMENTS,
     VALID_ENFORCEMENT_LEVELS,
@@ -137,62 +139,59 @@ else:
     logger.info("🔓 SQL Audit enforcement desativado (apenas logging)")
 
 
+_ORIGIN_IGNORED_PATHS = (
+    "sqlalchemy",
+    "sql_audit.py",
+    "contextlib.py",
+    "threading.py",
+)
+_STATEMENT_CACHE_SIZE = 2048
+
+
 def _get_call_origin() -> tuple[str, str, int]:
     """
     Identifica o arquivo, função e linha que originou a execução SQL.
 
+    Sobe pelos frames com ``sys._getframe`` e para no primeiro frame de
+    código do usuário, sem formatar a stack inteira.
+
     Returns:
         tuple[file, function, line]: Origem da chamada
     """
-    stack = traceback.extract_stack()
-
-    # Filtrar frames do próprio SQLAlchemy e deste módulo
-    for frame in reversed(stack):
-        filename = frame.filename
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
 
         # Ignorar frames internos
-        if any(
-            ignore in filename
-            for ignore in [
-                "sqlalchemy",
-                "sql_audit.py",
-                "contextlib.py",
-                "threading.py",
-            ]
-        ):
-            continue
-
-        # Pegar primeiro frame de código do usuário
-        # Extrair apenas o nome do arquivo (sem path completo)
-        file_short = (
-            filename.split("\\")[-1] if "\\" in filename else filename.split("/")[-1]
-        )
-        return (file_short, frame.name, frame.lineno)
+        if not any(ignore in filename for ignore in _ORIGIN_IGNORED_PATHS):
+            # Extrair apenas o nome do arquivo (sem path completo)
+            file_short = filename.replace("\\", "/").rsplit("/", 1)[-1]
+            return (file_short, code.co_name, frame.f_lineno)
+        frame = frame.f_back
 
     return ("unknown", "unknown", 0)
 
 
-def _is_from_tenant_safe_helper(stack_trace: str) -> bool:
+@lru_cache(maxsize=_STATEMENT_CACHE_SIZE)
+def _classify_statement(statement: str) -> Optional[tuple[str, tuple[str, ...]]]:
     """
-    Verifica se a execução SQL veio do helper tenant_safe_sql.
-
-    Args:
-        stack_trace: String com traceback completo
+    Classificação cacheada por texto de statement.
 
     Returns:
-        bool: True se veio do helper, False caso contrário
+        None se o statement não é RAW SQL auditável; senão (risco, tabelas).
     """
-    # Verificar se tenant_safe_sql está na call stack
-    indicators = [
-        "tenant_safe_sql.py",
-        "execute_tenant_safe",
-        "execute_tenant_safe_scalar",
-        "execute_tenant_safe_one",
-        "execute_tenant_safe_first",
-        "execute_tenant_safe_all",
-    ]
+    # Verificar se deve auditar
+    if not _should_audit_statement(statement):
+        return None
 
-    return any(indicator in stack_trace for indicator in indicators)
+    # Verificar se é RAW SQL
+    if not _is_raw_sql_text(statement):
+        return None
+
+    has_tenant_filter = "{tenant_filter}" in statement
+    risk_level, tables_detected = classify_raw_sql_risk(statement, has_tenant_filter)
+    return risk_level, tuple(tables_detected)
 
 
 @event.listens_for(Engine, "before_cursor_execute", retval=False)
@@ -219,28 +218,20 @@ def audit_raw_sql(
         context: Contexto de execução
         executemany: Se é executemany
     """
-    # Verificar se deve auditar
-    if not _should_audit_statement(statement):
-        return
-
-    # Verificar se é RAW SQL
-    if not _is_raw_sql_text(statement):
+    # Verificar se veio do helper tenant-safe (flag de contexto, sem stack)
+    if is_tenant_safe_execution():
+        # Query segura, não precisa auditar
         return
 
-    # Obter call stack completo
-    stack_trace = "".join(traceback.format_stack())
-
-    # Verificar se veio do helper tenant-safe
-    if _is_from_tenant_safe_helper(stack_trace):
-        # Query segura, não precisa auditar
+    # Verificar se deve auditar / se é RAW SQL e classificar risco (cacheado)
+    classification = _classify_statement(statement)
+    if classification is None:
         return
 
     # ALERTA: RAW SQL fora do helper!
     file_origin, func_origin, line_origin = _get_call_origin()
-
-    # Classificar risco
-    has_tenant_filter = "{tenant_filter}" in statement
-    risk_level, tables_detected = classify_raw_sql_risk(statement, has_tenant_filter)
+    risk_level, tables = classification
+    tables_detected = list(tables)
 
     # Incrementar métricas
     _increment_stats(risk_level, tables_detected, file_origin)
@@ -408,6 +399,7 @@ def reset_audit_stats() -> None:
     Reseta todas as métricas (útil para testes).
     """
     _reset_audit_stats()
+    _classify_statement.cache_clear()
 
 
 def is_enforcement_enabled() -> bool:
@@ -0,0 +1,29 @@
+"""Execution context flag for SQL raw-query auditing.
+
+The tenant-safe helper marks its own executions here so the audit hook can
+skip them with a contextvar lookup instead of formatting the call stack.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+
+_tenant_safe_execution: ContextVar[bool] = ContextVar(
+    "sql_audit_tenant_safe_execution", default=False
+)
+
+
+@contextmanager
+def tenant_safe_execution() -> Iterator[None]:
+    """Mark SQL executed inside the block as coming from the tenant-safe helper."""
+    token = _tenant_safe_execution.set(True)
+    try:
+        yield
+    finally:
+        _tenant_safe_execution.reset(token)
+
+
+def is_tenant_safe_execution() -> bool:
+    """Return true while the tenant-safe helper is executing SQL."""
+    return _tenant_safe_execution.get()
@@ -6,7 +6,7 @@ Implementa o padrão Event Store para event sourcing.
 
 RESPONSABILIDADES:
 - Persistir eventos de domínio de forma imutável
-- Gerar sequence_number automaticamente
+- Gerar sequence_number automaticamente (contador domain_event_sequences)
 - Garantir ordenação monotônica
 - Permitir queries de replay eficientes
 
@@ -18,15 +18,63 @@ FASE 5.2 - Event Store Enhanced:
 
 import logging
 import json
-from typing import List, Optional, Dict, Any
+import weakref
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.engine import Engine
 
 from .base import DomainEvent
 from app.tenancy.context import get_current_tenant_id
 
 logger = logging.getLogger(__name__)
 
+EVENT_COLUMNS = (
+    "id",
+    "sequence_number",
+    "event_type",
+    "aggregate_id",
+    "aggregate_type",
+    "user_id",
+    "correlation_id",
+    "causation_id",
+    "payload",
+    "metadata",
+    "created_at",
+)
+
+# Linha do contador em domain_event_sequences (ordem global do store).
+SEQUENCE_NAME = "domain_events"
+
+# 11 parâmetros por evento: fica longe do limite de variáveis do SQLite.
+INSERT_BATCH_SIZE = 500
+
+# Banco (engine/conexão) em que o contador já foi criado e semeado.
+_contadores_prontos: "weakref.WeakKeyDictionary[Any, bool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _criar_contador(executor) -> None:
+    executor.execute(
+        text("""
+            CREATE TABLE IF NOT EXISTS domain_event_sequences (
+                name VARCHAR(50) PRIMARY KEY NOT NULL,
+                last_value BIGINT NOT NULL
+            )
+        """)
+    )
+    # WHERE true: exigido pelo SQLite em INSERT ... SELECT ... ON CONFLICT.
+    executor.execute(
+        text("""
+            INSERT INTO domain_event_sequences (name, last_value)
+            SELECT :name, COALESCE(MAX(sequence_number), 0)
+            FROM domain_events WHERE true
+            ON CONFLICT (name) DO NOTHING
+        """),
+        {"name": SEQUENCE_NAME},
+    )
+
 
 class EventStore:
     """
@@ -63,7 +111,8 @@ class EventStore:
         """
         Adiciona evento ao event store.
 
-        IMPORTANTE: sequence_number é gerado automaticamente pelo banco.
+        IMPORTANTE: sequence_number é alocado pelo contador
+        ``domain_event_sequences`` (ver ``_alocar_sequencia``).
 
         Args:
             event: Evento de domínio a persistir
@@ -77,10 +126,41 @@ class EventStore:
         Raises:
             Exception: Se falhar ao persistir
         """
+        [persisted] = self._persistir(
+            [(event, aggregate_id or event.event_id)], user_id, aggregate_type
+        )
+        return persisted
+
+    def append_batch(
+        self, events: List[DomainEvent], user_id: int, aggregate_type: str
+    ) -> List[DomainEvent]:
+        """
+        Adiciona múltiplos eventos de forma atômica.
+
+        Aloca todos os sequence_numbers de uma vez (um lock no contador) e
+        grava os eventos com INSERT multi-linha.
+
+        Args:
+            events: Lista de eventos
+            user_id: ID do tenant
+            aggregate_type: Tipo do agregado
+
+        Returns:
+            Lista de eventos com sequence_number preenchido
+        """
+        if not events:
+            return []
+        return self._persistir(
+            [(event, event.event_id) for event in events], user_id, aggregate_type
+        )
+
+    def _persistir(
+        self,
+        eventos: List[Tuple[DomainEvent, str]],
+        user_id: int,
+        aggregate_type: str,
+    ) -> List[DomainEvent]:
         try:
-            # Preparar dados
-            aggregate_id = aggregate_id or event.event_id
-            payload = json.dumps(event.to_dict(), default=str)
             metadata_dict = {
                 "source": "application",
                 "version": "1.0",
@@ -90,81 +170,104 @@ class EventStore:
                 metadata_dict["tenant_id"] = str(tenant_id)
             metadata = json.dumps(metadata_dict)
 
-            # Gerar próximo sequence_number
-            result = self.db.execute(
-                text("""
-                SELECT COALESCE(MAX(sequence_number), 0) + 1 FROM domain_events
-            """)
-            )
-            next_sequence = result.fetchone()[0]
-
-            # Inserir evento com sequence_number calculado
-            query = text("""
-                INSERT INTO domain_events (
-                    id, sequence_number, event_type, aggregate_id, aggregate_type,
-                    user_id, correlation_id, causation_id,
-                    payload, metadata, created_at
-                ) VALUES (
-                    :id, :sequence_number, :event_type, :aggregate_id, :aggregate_type,
-                    :user_id, :correlation_id, :causation_id,
-                    :payload, :metadata, :created_at
-                )
-            """)
+            first_sequence = self._alocar_sequencia(len(eventos))
 
-            self.db.execute(
-                query,
+            rows = [
                 {
                     "id": event.event_id,
-                    "sequence_number": next_sequence,
+                    "sequence_number": first_sequence + offset,
                     "event_type": event.event_type,
                     "aggregate_id": aggregate_id,
                     "aggregate_type": aggregate_type,
                     "user_id": user_id,
                     "correlation_id": event.correlation_id,
                     "causation_id": event.causation_id,
-                    "payload": payload,
+                    "payload": json.dumps(event.to_dict(), default=str),
                     "metadata": metadata,
                     "created_at": event.timestamp.isoformat(),
-                },
-            )
+                }
+                for offset, (event, aggregate_id) in enumerate(eventos)
+            ]
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                self._inserir(rows[start : start + INSERT_BATCH_SIZE])
 
             logger.debug(
-                f"📝 Evento persistido: {event.event_type} "
-                f"(seq={next_sequence}, id={event.event_id})"
+                f"📝 {len(rows)} evento(s) persistido(s) "
+                f"(seq={first_sequence}..{first_sequence + len(rows) - 1})"
             )
 
-            # Retornar evento com sequence_number preenchido
+            # Retornar eventos com sequence_number preenchido
             # Remove event_type do dict pois é uma @property, não um field
-            event_dict = event.to_dict()
-            event_dict.pop("event_type", None)  # Remover event_type (é @property)
-            event_dict["sequence_number"] = next_sequence
-            return event.__class__(**event_dict)
+            persisted = []
+            for row, (event, _aggregate_id) in zip(rows, eventos):
+                event_dict = event.to_dict()
+                event_dict.pop("event_type", None)  # Remover event_type (é @property)
+                event_dict["sequence_number"] = row["sequence_number"]
+                persisted.append(event.__class__(**event_dict))
+            return persisted
 
         except Exception as e:
             logger.error(f"❌ Erro ao persistir evento: {str(e)}", exc_info=True)
             raise
 
-    def append_batch(
-        self, events: List[DomainEvent], user_id: int, aggregate_type: str
-    ) -> List[DomainEvent]:
-        """
-        Adiciona múltiplos eventos de forma atômica.
+    def _inserir(self, rows: List[Dict[str, Any]]) -> None:
+        """INSERT único com uma tupla VALUES por evento."""
+        values = []
+        params: Dict[str, Any] = {}
+        for index, row in enumerate(rows):
+            values.append(
+                "(" + ", ".join(f":{column}_{index}" for column in EVENT_COLUMNS) + ")"
+            )
+            params.update(
+                {f"{column}_{index}": row[column] for column in EVENT_COLUMNS}
+            )
 
-        Args:
-            events: Lista de eventos
-            user_id: ID do tenant
-            aggregate_type: Tipo do agregado
+        self.db.execute(
+            text(
+                f"INSERT INTO domain_events ({', '.join(EVENT_COLUMNS)}) "
+                f"VALUES {', '.join(values)}"
+            ),
+            params,
+        )
 
-        Returns:
-            Lista de eventos com sequence_number preenchido
+    def _alocar_sequencia(self, quantidade: int) -> int:
         """
-        persisted_events = []
+        Reserva ``quantidade`` sequence_numbers e retorna o primeiro.
 
-        for event in events:
-            persisted_event = self.append(event, user_id, aggregate_type)
-            persisted_events.append(persisted_event)
+        O UPDATE trava a linha do contador até o fim da transação: appends
+        concorrentes esperam em vez de ler o mesmo MAX(), e um rollback
+        devolve os números (sem gaps, ao contrário de uma SEQUENCE).
+        """
+        self._garantir_contador()
+        result = self.db.execute(
+            text("""
+                UPDATE domain_event_sequences
+                SET last_value = last_value + :quantidade
+                WHERE name = :name
+                RETURNING last_value
+            """),
+            {"quantidade": quantidade, "name": SEQUENCE_NAME},
+        )
+        last_value = result.fetchone()[0]
+        return last_value - quantidade + 1
+
+    def _garantir_contador(self) -> None:
+        """
+        Cria e semeia o contador a partir do MAX() atual (uma vez por banco).
 
-        return persisted_events
+        Com engine, roda em transação própria: um rollback do primeiro append
+        não desfaz a tabela que o cache já considera pronta.
+        """
+        bind = self.db.get_bind() if hasattr(self.db, "get_bind") else self.db
+        if _contadores_prontos.get(bind):
+            return
+
+        if isinstance(bind, Engine):
+            with bind.begin() as conn:
+                _criar_contador(conn)
+        else:
+            _criar_contador(self.db)
+        _contadores_prontos[bind] = True
 
     def get_events(
         self,
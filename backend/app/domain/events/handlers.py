@@ -14,6 +14,7 @@ TIPOS DE HANDLERS:
 - LogEventHandler: Logs estruturados
 - AuditoriaEventHandler: Persiste eventos no banco
 - IAEventHandler: Placeholder para IA futura
+- CacheEventHandler: Invalida o cache (tags) afetado pela venda
 """
 
 import logging
@@ -234,6 +235,54 @@ class IAEventHandler:
         # - Alertar sobre cancelamentos anômalos
 
 
+# ============================================================================
+# CACHE EVENT HANDLER
+# ============================================================================
+
+
+class CacheEventHandler:
+    """
+    Invalida por tag as entradas de cache que a venda tornou obsoletas.
+
+    Os eventos sao publicados dentro da requisicao, entao a invalidacao vale
+    para o tenant do contexto (sem tenant, a tag cai em todos).
+
+    Tags:
+    - vendas / produtos: rankings, listagem de NF-e, estoque
+    - cliente:<id>: dados do cliente usados no atendimento
+    - pdv_sessao:venda_<id>: oportunidades preparadas para a venda no PDV
+    """
+
+    @staticmethod
+    def tags_venda(event: DomainEvent) -> list:
+        tags = ["vendas", "produtos", f"pdv_sessao:venda_{event.venda_id}"]
+        cliente_id = getattr(event, "cliente_id", None)
+        if cliente_id:
+            tags.append(f"cliente:{cliente_id}")
+        return tags
+
+    @staticmethod
+    def _invalidar(event: DomainEvent) -> None:
+        from app.cache.cache_manager import cache
+
+        tags = CacheEventHandler.tags_venda(event)
+        removidas = cache.invalidate_tags(*tags)
+        logger.debug(
+            f"🗄️ [CACHE] {event.__class__.__name__}: {removidas} entradas invalidadas "
+            f"({', '.join(tags)})"
+        )
+
+    @staticmethod
+    def on_venda_finalizada(event: VendaFinalizada) -> None:
+        """Venda finalizada muda estoque, ranking e historico do cliente"""
+        CacheEventHandler._invalidar(event)
+
+    @staticmethod
+    def on_venda_cancelada(event: VendaCancelada) -> None:
+        """Cancelamento estorna estoque e sai dos rankings"""
+        CacheEventHandler._invalidar(event)
+
+
 # ============================================================================
 # NOTIFICAÇÃO EVENT HANDLER (PLACEHOLDER PARA FUTURO)
 # ============================================================================
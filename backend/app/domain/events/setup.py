@@ -11,7 +11,12 @@ Este módulo deve ser importado na inicialização da aplicação
 import logging
 from .dispatcher import event_dispatcher
 from .venda_events import VendaCriada, VendaFinalizada, VendaCancelada
-from .handlers import LogEventHandler, AuditoriaEventHandler, IAEventHandler
+from .handlers import (
+    LogEventHandler,
+    AuditoriaEventHandler,
+    IAEventHandler,
+    CacheEventHandler,
+)
 from .kit_handler import KitEstoqueEventHandler
 
 logger = logging.getLogger(__name__)
@@ -88,6 +93,15 @@ def setup_event_handlers(db_session_factory=None) -> None:
 
     logger.info("   ✅ KitEstoqueEventHandler registrado")
 
+    # ========================================================================
+    # CACHE HANDLERS (invalidação por tag no cache compartilhado)
+    # ========================================================================
+
+    event_dispatcher.subscribe(VendaFinalizada, CacheEventHandler.on_venda_finalizada)
+    event_dispatcher.subscribe(VendaCancelada, CacheEventHandler.on_venda_cancelada)
+
+    logger.info("   ✅ CacheEventHandler registrado")
+
     # ========================================================================
     # NOTIFICAÇÃO HANDLERS (placeholder - desabilitado por padrão)
     # ========================================================================
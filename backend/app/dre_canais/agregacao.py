@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
@@ -483,77 +483,38 @@ def _aplicar_estimativas_cmv(
         dados["origem_percentual_cmv_estimado"] = origem_percentual
 
 
-def obter_vendas_por_canal(
-    db: Session,
-    mes: int,
-    ano: int,
-    tenant_id: str,
-    mes_inicial: Optional[int] = None,
-    data_final: Optional[date] = None,
-) -> Dict:
-    """Retorna vendas agrupadas por canal usando a fotografia de rentabilidade da venda."""
-    inicio, fim = _periodo_meses(mes_inicial or mes, mes, ano, data_final)
-    filtros_venda = [
-        Venda.tenant_id == tenant_id,
-        Venda.data_venda >= inicio,
-        Venda.data_venda < fim,
-        _filtro_status_venda_dre(),
-    ]
-
-    dados_por_canal: Dict[str, Dict] = {}
-
-    vendas = (
+def _carregar_vendas_dre(
+    db: Session, tenant_id: str, inicio: datetime, fim: datetime
+) -> List[Venda]:
+    return (
         db.query(Venda)
         .options(
             selectinload(Venda.itens).selectinload(VendaItem.produto),
             selectinload(Venda.pagamentos),
         )
-        .filter(and_(*filtros_venda))
+        .filter(
+            and_(
+                Venda.tenant_id == tenant_id,
+                Venda.data_venda >= inicio,
+                Venda.data_venda < fim,
+                _filtro_status_venda_dre(),
+            )
+        )
         .all()
     )
 
-    venda_ids = [venda.id for venda in vendas if getattr(venda, "id", None)]
-    formas_pagamento = _formas_pagamento_map(db, tenant_id)
-    impostos_percentual = _impostos_percentual(db, tenant_id)
-    comissoes_por_venda = _bulk_comissoes_por_venda(db, tenant_id, venda_ids)
-    cupons_por_venda = _bulk_cupons_por_venda(db, tenant_id, vendas)
-    cashback_por_venda = _bulk_cashback_por_venda(db, tenant_id, venda_ids)
-    taxa_operacional_por_venda = _bulk_taxa_operacional_por_venda(db, tenant_id, vendas)
-    estoque_custos_por_venda = _bulk_estoque_custos_por_venda(db, tenant_id, venda_ids)
-
-    bases_estimativa: Dict[str, Dict[str, Decimal]] = {}
-    pendencias_estimativa: Dict[str, List[Dict[str, Any]]] = {}
 
+def _acumular_vendas_por_canal(
+    vendas: List[Venda],
+    snapshots: Dict[int, Dict[str, Any]],
+    dados_por_canal: Dict[str, Dict],
+    bases_estimativa: Dict[str, Dict[str, Decimal]],
+    pendencias_estimativa: Dict[str, List[Dict[str, Any]]],
+) -> None:
     for venda in vendas:
         canal = _normalizar_canal(getattr(venda, "canal", None))
         dados = dados_por_canal.setdefault(canal, _novo_canal())
-        cupom_desconto = cupons_por_venda.get(venda.id, 0.0)
-        custo_campanha = cupom_desconto + cashback_por_venda.get(venda.id, 0.0)
-        snapshot = _snapshot_pronto(venda)
-        if (
-            snapshot
-            and custo_campanha > 0
-            and _decimal(snapshot.get("custo_campanha", 0)) <= 0
-        ):
-            snapshot = None
-        if snapshot is None:
-            snapshot = build_venda_rentabilidade_snapshot(
-                venda,
-                db,
-                tenant_id,
-                impostos_percentual=impostos_percentual,
-                formas_pagamento_map=formas_pagamento,
-                custo_campanha=custo_campanha,
-                cupom_desconto=cupom_desconto,
-                comissao_total=comissoes_por_venda.get(venda.id, 0.0),
-                taxa_operacional_entrega=taxa_operacional_por_venda.get(venda.id, 0.0),
-                estoque_custos_por_produto=estoque_custos_por_venda.get(venda.id, {}),
-            )
-        snapshot = _complementar_snapshot_com_custos_reais(
-            venda,
-            snapshot,
-            estoque_custos_por_venda.get(venda.id, {}),
-        )
+        snapshot = snapshots[int(venda.id)]
         _registrar_base_estimativa_cmv(
             venda,
             canal,
@@ -580,10 +541,41 @@ def obter_vendas_por_canal(
         )
         dados["comissoes"] += _decimal(snapshot.get("comissao", 0))
         dados["campanhas"] += _decimal(snapshot.get("custo_campanha", 0))
-        dados["vendas"].append(venda)
 
-    _aplicar_estimativas_cmv(dados_por_canal, bases_estimativa, pendencias_estimativa)
-    return dados_por_canal
+
+def _calcular_vendas_por_canal(
+    db: Session, tenant_id: str, inicio: datetime, fim: datetime
+) -> tuple[Dict[str, Dict], Dict, Dict]:
+    """Calcula ao vivo, sem aplicar a estimativa de CMV (depende do periodo todo)."""
+    vendas = _carregar_vendas_dre(db, tenant_id, inicio, fim)
+    snapshots = _preparar_snapshots_vendas(db, tenant_id, vendas)
+
+    dados_por_canal: Dict[str, Dict] = {}
+    bases_estimativa: Dict[str, Dict[str, Decimal]] = {}
+    pendencias_estimativa: Dict[str, List[Dict[str, Any]]] = {}
+    _acumular_vendas_por_canal(
+        vendas, snapshots, dados_por_canal, bases_estimativa, pendencias_estimativa
+    )
+    return dados_por_canal, bases_estimativa, pendencias_estimativa
+
+
+def obter_vendas_por_canal(
+    db: Session,
+    mes: int,
+    ano: int,
+    tenant_id: str,
+    mes_inicial: Optional[int] = None,
+    data_final: Optional[date] = None,
+) -> Dict:
+    """Retorna vendas agrupadas por canal usando a fotografia de rentabilidade da venda.
+
+    Dias encerrados saem dos fatos diarios materializados; o dia corrente e
+    sempre calculado ao vivo (ver ``app.dre_canais.fatos``).
+    """
+    from app.dre_canais.fatos import obter_vendas_por_canal_fatos
+
+    inicio, fim = _periodo_meses(mes_inicial or mes, mes, ano, data_final)
+    return obter_vendas_por_canal_fatos(db, tenant_id, inicio, fim)
 
 
 def agregar_contas_pagar_por_canal(
@@ -0,0 +1,431 @@
+"""
+Fatos diarios da DRE por canal
+==============================
+
+A DRE anual recalculava a fotografia de rentabilidade de todas as vendas do
+ano a cada request. Agora cada dia encerrado e calculado uma vez e gravado em
+``dre_canal_fatos_diarios`` (tenant x dia x canal x linha); a leitura soma os
+fatos e so calcula ao vivo o dia corrente e os dias invalidados.
+
+- ``dre_canal_dias_calculados`` marca os dias em dia; fatos de dias sem marca
+  sao ignorados. ``app.dre_canais.invalidacao`` apaga as marcas.
+- A leitura nao grava: dias sem marca entram calculados em memoria e a
+  gravacao fica com ``materializar_fatos_background``, em thread com sessao e
+  transacao proprias (nada e commitado na sessao do request). A thread
+  reserva os dias antes de ler as vendas e so confirma a marca se a reserva
+  sobreviveu: escrita que invalidou o dia no meio do calculo a apaga.
+- A estimativa de CMV depende da base do periodo consultado: os fatos guardam
+  a base confirmada e os itens pendentes, e a estimativa roda na leitura.
+- Sem as tabelas (migration pendente) tudo e calculado ao vivo, como antes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.dre_canais.agregacao import (
+    _acumular_vendas_por_canal,
+    _aplicar_estimativas_cmv,
+    _calcular_vendas_por_canal,
+    _carregar_vendas_dre,
+    _preparar_snapshots_vendas,
+)
+from app.dre_canais.base import _decimal, _novo_canal, _snapshot_pronto
+from app.dre_canais.invalidacao import fatos_disponiveis
+from app.dre_canais.models import DRECanalDiaCalculado, DRECanalFatoDiario
+from app.tenancy.context import tenant_context
+from app.utils.timezone import now_brasilia
+
+logger = logging.getLogger(__name__)
+
+LINHAS_VENDA = (
+    "receita_produtos",
+    "receita_servicos",
+    "receita_frete",
+    "descontos",
+    "impostos",
+    "cmv",
+    "taxas_cartao",
+    "repasse_entrega",
+    "taxa_operacional_entrega",
+    "comissoes",
+    "campanhas",
+)
+LINHAS_BASE_CMV = {
+    "base_receita_confirmada": "receita_confirmada",
+    "base_custo_confirmado": "custo_confirmado",
+}
+LINHA_CMV_PENDENTE = "cmv_pendente"
+
+# Janela maxima carregada de uma vez ao recalcular dias.
+MAX_DIAS_POR_BLOCO = 31
+
+ResultadoDRE = Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, List]]
+
+# (tenant, dia) com gravacao em andamento neste processo: leituras seguidas do
+# mesmo periodo nao disparam threads repetidas
+_em_materializacao: set = set()
+_em_materializacao_lock = threading.Lock()
+
+
+def _novo_resultado() -> ResultadoDRE:
+    return {}, {}, {}
+
+
+def _somar_resultado(destino: ResultadoDRE, origem: ResultadoDRE) -> None:
+    dados, bases, pendencias = destino
+    dados_origem, bases_origem, pendencias_origem = origem
+    for canal, valores in dados_origem.items():
+        dados_canal = dados.setdefault(canal, _novo_canal())
+        for linha in LINHAS_VENDA:
+            dados_canal[linha] += valores[linha]
+    for canal, base in bases_origem.items():
+        base_canal = bases.setdefault(
+            canal,
+            {"receita_confirmada": Decimal("0"), "custo_confirmado": Decimal("0")},
+        )
+        for chave in LINHAS_BASE_CMV.values():
+            base_canal[chave] += base.get(chave, Decimal("0"))
+    for canal, itens in pendencias_origem.items():
+        pendencias.setdefault(canal, []).extend(itens)
+
+
+def _dias(inicio: date, fim: date) -> Iterator[date]:
+    dia = inicio
+    while dia < fim:
+        yield dia
+        dia += timedelta(days=1)
+
+
+def _blocos(dias: Iterable[date]) -> Iterator[List[date]]:
+    bloco: List[date] = []
+    for dia in sorted(set(dias)):
+        if bloco and (dia - bloco[0]).days >= MAX_DIAS_POR_BLOCO:
+            yield bloco
+            bloco = []
+        bloco.append(dia)
+    if bloco:
+        yield bloco
+
+
+def _tenant_uuid(tenant_id) -> UUID:
+    return tenant_id if isinstance(tenant_id, UUID) else UUID(str(tenant_id))
+
+
+def _calcular_bloco(
+    db: Session, tenant_id, dias: List[date]
+) -> Dict[date, Tuple[ResultadoDRE, bool]]:
+    vendas = _carregar_vendas_dre(
+        db,
+        tenant_id,
+        datetime.combine(dias[0], time.min),
+        datetime.combine(dias[-1] + timedelta(days=1), time.min),
+    )
+    pedidos = set(dias)
+    vendas_por_dia: Dict[date, List] = {}
+    for venda in vendas:
+        dia = venda.data_venda.date()
+        if dia in pedidos:
+            vendas_por_dia.setdefault(dia, []).append(venda)
+    snapshots = _preparar_snapshots_vendas(
+        db,
+        tenant_id,
+        [venda for vendas_dia in vendas_por_dia.values() for venda in vendas_dia],
+    )
+
+    calculados = {}
+    for dia in dias:
+        vendas_dia = vendas_por_dia.get(dia, [])
+        resultado = _novo_resultado()
+        _acumular_vendas_por_canal(vendas_dia, snapshots, *resultado)
+        # Fotografia recalculada/complementada ou CMV pendente dependem de
+        # cadastros que mudam sem tocar na venda.
+        volatil = any(resultado[2].values()) or any(
+            _snapshot_pronto(venda) != snapshots[int(venda.id)] for venda in vendas_dia
+        )
+        calculados[dia] = (resultado, volatil)
+    return calculados
+
+
+def _linhas_fatos(tenant_id: UUID, dia: date, resultado: ResultadoDRE) -> List[Dict]:
+    dados, bases, pendencias = resultado
+    linhas = []
+
+    def _linha(canal: str, linha: str, valor: Decimal, itens=None) -> None:
+        linhas.append(
+            {
+                "tenant_id": tenant_id,
+                "data": dia,
+                "canal": canal,
+                "linha": linha,
+                "valor": valor,
+                "itens": itens,
+            }
+        )
+
+    for canal, valores in dados.items():
+        for linha in LINHAS_VENDA:
+            if valores[linha]:
+                _linha(canal, linha, valores[linha])
+    for canal, base in bases.items():
+        for linha, chave in LINHAS_BASE_CMV.items():
+            if base.get(chave):
+                _linha(canal, linha, base[chave])
+    for canal, itens in pendencias.items():
+        if itens:
+            total = sum((_decimal(item["valor_venda"]) for item in itens), Decimal(0))
+            _linha(canal, LINHA_CMV_PENDENTE, total, itens)
+    return linhas
+
+
+def reservar_dias(db: Session, tenant_id, dias: Iterable[date]) -> Dict[date, int]:
+    """Reserva os dias para calculo (marca sem ``calculado_em``; sem commit).
+
+    A reserva entra como ``volatil`` para que tambem caia com a troca de
+    cadastros. Devolve o id de cada marca: so ela pode ser confirmada.
+    """
+    tenant_uuid = _tenant_uuid(tenant_id)
+    dias = sorted(set(dias))
+    db.execute(
+        delete(DRECanalDiaCalculado).where(
+            DRECanalDiaCalculado.tenant_id == tenant_uuid,
+            DRECanalDiaCalculado.data.in_(dias),
+        )
+    )
+    db.execute(
+        insert(DRECanalDiaCalculado),
+        [{"tenant_id": tenant_uuid, "data": dia, "volatil": True} for dia in dias],
+    )
+    rows = db.execute(
+        select(DRECanalDiaCalculado.data, DRECanalDiaCalculado.id).where(
+            DRECanalDiaCalculado.tenant_id == tenant_uuid,
+            DRECanalDiaCalculado.data.in_(dias),
+        )
+    )
+    return {dia: marca_id for dia, marca_id in rows}
+
+
+def recalcular_fatos_dre_canais(
+    db: Session,
+    tenant_id,
+    dias: Iterable[date],
+    reservas: Optional[Dict[date, int]] = None,
+) -> Dict[date, ResultadoDRE]:
+    """Recalcula e regrava os fatos dos dias informados (sem commit).
+
+    Com ``reservas`` (de ``reservar_dias``) so confirma as marcas que ainda
+    existem; os fatos de um dia invalidado no meio do calculo ficam sem marca
+    e sao ignorados na leitura.
+    """
+    tenant_uuid = _tenant_uuid(tenant_id)
+    calculado_em = now_brasilia()
+    resultados: Dict[date, ResultadoDRE] = {}
+    marcas = DRECanalDiaCalculado.__table__
+
+    for bloco in _blocos(dias):
+        calculados = _calcular_bloco(db, tenant_id, bloco)
+        db.execute(
+            delete(DRECanalFatoDiario).where(
+                DRECanalFatoDiario.tenant_id == tenant_uuid,
+                DRECanalFatoDiario.data.in_(bloco),
+            )
+        )
+        if reservas is None:
+            db.execute(
+                delete(DRECanalDiaCalculado).where(
+                    DRECanalDiaCalculado.tenant_id == tenant_uuid,
+                    DRECanalDiaCalculado.data.in_(bloco),
+                )
+            )
+        fatos = [
+            linha
+            for dia, (resultado, _volatil) in calculados.items()
+            for linha in _linhas_fatos(tenant_uuid, dia, resultado)
+        ]
+        if fatos:
+            db.execute(insert(DRECanalFatoDiario), fatos)
+        if reservas is None:
+            db.execute(
+                insert(DRECanalDiaCalculado),
+                [
+                    {
+                        "tenant_id": tenant_uuid,
+                        "data": dia,
+                        "volatil": volatil,
+                        "calculado_em": calculado_em,
+                    }
+                    for dia, (_resultado, volatil) in calculados.items()
+                ],
+            )
+        else:
+            db.execute(
+                update(marcas)
+                .where(
+                    marcas.c.id == bindparam("marca_id"),
+                    marcas.c.calculado_em.is_(None),
+                )
+                .values(volatil=bindparam("marca_volatil"), calculado_em=calculado_em),
+                [
+                    {"marca_id": reservas[dia], "marca_volatil": volatil}
+                    for dia, (_resultado, volatil) in calculados.items()
+                    if dia in reservas
+                ],
+            )
+        resultados.update(
+            {dia: resultado for dia, (resultado, _volatil) in calculados.items()}
+        )
+    return resultados
+
+
+def _ler_fatos(db: Session, tenant_id, inicio: date, fim: date) -> ResultadoDRE:
+    """Soma os fatos dos dias com marca de calculado em ``[inicio, fim)``."""
+    tenant_uuid = _tenant_uuid(tenant_id)
+    filtros = (
+        DRECanalFatoDiario.tenant_id == tenant_uuid,
+        DRECanalFatoDiario.data >= inicio,
+        DRECanalFatoDiario.data < fim,
+    )
+    join_calculado = and_(
+        DRECanalDiaCalculado.tenant_id == DRECanalFatoDiario.tenant_id,
+        DRECanalDiaCalculado.data == DRECanalFatoDiario.data,
+        DRECanalDiaCalculado.calculado_em.isnot(None),
+    )
+    dados, bases, pendencias = resultado = _novo_resultado()
+
+    totais = (
+        db.query(
+            DRECanalFatoDiario.canal,
+            DRECanalFatoDiario.linha,
+            func.sum(DRECanalFatoDiario.valor),
+        )
+        .join(DRECanalDiaCalculado, join_calculado)
+        .filter(*filtros, DRECanalFatoDiario.linha != LINHA_CMV_PENDENTE)
+        .group_by(DRECanalFatoDiario.canal, DRECanalFatoDiario.linha)
+        .all()
+    )
+    for canal, linha, total in totais:
+        if linha in LINHAS_BASE_CMV:
+            base = bases.setdefault(
+                canal,
+                {
+                    "receita_confirmada": Decimal("0"),
+                    "custo_confirmado": Decimal("0"),
+                },
+            )
+            base[LINHAS_BASE_CMV[linha]] += _decimal(total)
+        elif linha in LINHAS_VENDA:
+            dados.setdefault(canal, _novo_canal())[linha] += _decimal(total)
+
+    pendentes = (
+        db.query(DRECanalFatoDiario.canal, DRECanalFatoDiario.itens)
+        .join(DRECanalDiaCalculado, join_calculado)
+        .filter(*filtros, DRECanalFatoDiario.linha == LINHA_CMV_PENDENTE)
+        .order_by(DRECanalFatoDiario.data)
+        .all()
+    )
+    for canal, itens in pendentes:
+        pendencias.setdefault(canal, []).extend(itens or [])
+    return resultado
+
+
+def _dias_calculados(db: Session, tenant_id, inicio: date, fim: date) -> set:
+    rows = (
+        db.query(DRECanalDiaCalculado.data)
+        .filter(
+            DRECanalDiaCalculado.tenant_id == _tenant_uuid(tenant_id),
+            DRECanalDiaCalculado.data >= inicio,
+            DRECanalDiaCalculado.data < fim,
+            DRECanalDiaCalculado.calculado_em.isnot(None),
+        )
+        .all()
+    )
+    return {row[0] for row in rows}
+
+
+def _ler_dias_encerrados(
+    db: Session, tenant_id, inicio: date, fim: date
+) -> ResultadoDRE:
+    calculados = _dias_calculados(db, tenant_id, inicio, fim)
+    faltantes = [dia for dia in _dias(inicio, fim) if dia not in calculados]
+    resultado = _ler_fatos(db, tenant_id, inicio, fim)
+    if not faltantes:
+        return resultado
+
+    for bloco in _blocos(faltantes):
+        for resultado_dia, _volatil in _calcular_bloco(db, tenant_id, bloco).values():
+            _somar_resultado(resultado, resultado_dia)
+    _agendar_materializacao(tenant_id, faltantes)
+    return resultado
+
+
+def _agendar_materializacao(tenant_id, dias: List[date]) -> None:
+    chaves = {(str(tenant_id), dia) for dia in dias}
+    with _em_materializacao_lock:
+        novas = chaves - _em_materializacao
+        _em_materializacao.update(novas)
+    if not novas:
+        return
+    threading.Thread(
+        target=materializar_fatos_background,
+        kwargs={"tenant_id": tenant_id, "dias": sorted(dia for _t, dia in novas)},
+        daemon=True,
+    ).start()
+
+
+def materializar_fatos_background(*, tenant_id, dias: List[date]) -> None:
+    """Grava os fatos dos dias fora do request, em sessao e transacao proprias."""
+    from app.db import SessionLocal
+
+    tenant_uuid = _tenant_uuid(tenant_id)
+    db = SessionLocal()
+    try:
+        with tenant_context(tenant_uuid):
+            # A reserva fica visivel antes da leitura das vendas: escrita que
+            # commitar depois disso a apaga (no flush ou apos o commit)
+            reservas = reservar_dias(db, tenant_uuid, dias)
+            db.commit()
+            recalcular_fatos_dre_canais(db, tenant_uuid, dias, reservas)
+            db.commit()
+    except Exception:
+        # Ex.: outro processo gravou os mesmos dias; a proxima leitura tenta de novo
+        db.rollback()
+        logger.warning(
+            "[DRE-CANAIS] Falha ao gravar fatos diarios do tenant %s",
+            tenant_id,
+            exc_info=True,
+        )
+    finally:
+        db.close()
+        with _em_materializacao_lock:
+            _em_materializacao.difference_update((str(tenant_id), dia) for dia in dias)
+
+
+def obter_vendas_por_canal_fatos(
+    db: Session, tenant_id, inicio: datetime, fim: datetime
+) -> Dict[str, Dict]:
+    """DRE de vendas por canal em ``[inicio, fim)`` (limites a meia-noite)."""
+    hoje = datetime.combine(now_brasilia().date(), time.min)
+    fim_encerrado = min(fim, hoje)
+    if inicio >= fim_encerrado or not fatos_disponiveis(db.get_bind()):
+        resultado = _calcular_vendas_por_canal(db, tenant_id, inicio, fim)
+    else:
+        resultado = _ler_dias_encerrados(
+            db, tenant_id, inicio.date(), fim_encerrado.date()
+        )
+        if fim > fim_encerrado:
+            _somar_resultado(
+                resultado,
+                _calcular_vendas_por_canal(db, tenant_id, fim_encerrado, fim),
+            )
+
+    dados, bases, pendencias = resultado
+    _aplicar_estimativas_cmv(dados, bases, pendencias)
+    return dados
@@ -0,0 +1,291 @@
+"""
+Invalidacao dos fatos diarios da DRE por canal
+==============================================
+
+Listener ``after_flush`` da Session: na mesma transacao da escrita apaga a
+marca de ``dre_canal_dias_calculados`` dos dias afetados, e o proximo
+relatorio recalcula apenas esses dias (``app.dre_canais.fatos``). O dia
+corrente nunca e materializado, entao so dias anteriores sao invalidados.
+
+- ``Venda``: dia atual e dia anterior de ``data_venda`` (finalizacao,
+  cancelamento, reabertura, troca de canal ou de valores, exclusao).
+- Itens, pagamentos, comissoes, cupons, cashback e baixas de estoque: dia
+  da venda referenciada.
+- Custo do produto, formas de pagamento, configuracao fiscal e taxa do
+  entregador: todos os dias ``volatil`` do tenant, os unicos que dependem
+  desses cadastros.
+
+Depois do commit as mesmas marcas sao apagadas de novo, em transacao
+propria: uma gravacao de fatos que leu as vendas antes desse commit perde a
+reserva do dia (ver ``fatos.materializar_fatos_background``) e nao o marca.
+
+Registrado em ``app.db`` (carregado por API, workers e scripts); os modelos
+sao importados sob demanda para nao criar ciclo com ``app.db``.
+
+Escritas fora do ORM (SQL cru, bulk update) nao passam por aqui; nesses
+casos use ``scripts/rebuild_dre_canais_fatos.py``.
+"""
+
+from __future__ import annotations
+
+import logging
+import weakref
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Mapper, Session
+
+from app.tenancy.context import tenant_context
+from app.tenancy.rls import sync_rls_tenant
+from app.utils.timezone import now_brasilia
+
+logger = logging.getLogger(__name__)
+
+# Marcas apagadas no flush, repetidas depois do commit
+_POS_COMMIT_KEY = "dre_canais_invalidacoes_pos_commit"
+
+_tabelas_por_engine: "weakref.WeakKeyDictionary[Any, bool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def fatos_disponiveis(bind) -> bool:
+    """Indica se as tabelas de fatos existem (verificado uma vez por engine)."""
+    from app.dre_canais.models import DRECanalDiaCalculado, DRECanalFatoDiario
+
+    engine = getattr(bind, "engine", bind)
+    disponivel = _tabelas_por_engine.get(engine)
+    if disponivel is None:
+        try:
+            inspector = inspect(bind)
+            disponivel = inspector.has_table(
+                DRECanalFatoDiario.__tablename__
+            ) and inspector.has_table(DRECanalDiaCalculado.__tablename__)
+        except SQLAlchemyError:
+            return False
+        _tabelas_por_engine[engine] = disponivel
+    return disponivel
+
+
+@lru_cache(maxsize=1)
+def _referencias_venda() -> Dict[type, Callable[[Any], Optional[int]]]:
+    # Import lazy: app.campaigns importa servicos que dependem das vendas.
+    from app.campaigns.models import CashbackTransaction, CouponRedemption
+    from app.comissoes_models import ComissaoItem
+    from app.produtos_models import EstoqueMovimentacao
+    from app.vendas_models import VendaItem, VendaPagamento
+
+    return {
+        VendaItem: lambda obj: obj.venda_id,
+        VendaPagamento: lambda obj: obj.venda_id,
+        ComissaoItem: lambda obj: obj.venda_id,
+        EstoqueMovimentacao: lambda obj: (
+            obj.referencia_id if obj.referencia_tipo == "venda" else None
+        ),
+        CouponRedemption: lambda obj: obj.venda_id,
+        CashbackTransaction: lambda obj: (
+            obj.source_id if (obj.amount or 0) < 0 else None
+        ),
+    }
+
+
+def _mudou(obj, atributo: str) -> bool:
+    return inspect(obj).attrs[atributo].history.has_changes()
+
+
+def _altera_cadastro_da_dre(obj, novo: bool) -> bool:
+    from app.empresa_config_fiscal_models import EmpresaConfigFiscal
+    from app.financeiro_models import FormaPagamento
+    from app.models import Cliente
+    from app.produtos_models import Produto
+
+    if isinstance(obj, (FormaPagamento, EmpresaConfigFiscal)):
+        return True
+    if novo:
+        return False
+    if isinstance(obj, Produto):
+        return _mudou(obj, "preco_custo")
+    if isinstance(obj, Cliente):
+        return _mudou(obj, "taxa_fixa_entrega")
+    return False
+
+
+def _dia(valor) -> Optional[date]:
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor if isinstance(valor, date) else None
+
+
+def _dias_da_venda(venda) -> Set[date]:
+    history = inspect(venda).attrs.data_venda.history
+    valores = (*history.added, *history.unchanged, *history.deleted)
+    return {dia for dia in map(_dia, valores) if dia is not None}
+
+
+class _Invalidacoes:
+    def __init__(self) -> None:
+        self.dias: Dict[Any, Set[date]] = {}
+        self.venda_ids: Set[int] = set()
+        self.tenants_volateis: Set[Any] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.dias or self.venda_ids or self.tenants_volateis)
+
+    def adicionar_venda(self, venda) -> None:
+        dias = _dias_da_venda(venda)
+        if venda.tenant_id is None or not dias:
+            if venda.id is not None:
+                self.venda_ids.add(int(venda.id))
+            return
+        self.dias.setdefault(venda.tenant_id, set()).update(dias)
+
+
+def _coletar(session: Session) -> _Invalidacoes:
+    from app.vendas_models import Venda
+
+    invalidacoes = _Invalidacoes()
+    referencias = _referencias_venda()
+    vendas_mapper = inspect(Venda)
+
+    for colecao, novo in (
+        (session.new, True),
+        (session.dirty, False),
+        (session.deleted, False),
+    ):
+        for obj in colecao:
+            if isinstance(obj, Venda):
+                invalidacoes.adicionar_venda(obj)
+                continue
+
+            venda_id_de = referencias.get(type(obj))
+            if venda_id_de is not None:
+                venda_id = venda_id_de(obj)
+                if not venda_id:
+                    continue
+                venda = session.identity_map.get(
+                    vendas_mapper.identity_key_from_primary_key((int(venda_id),))
+                )
+                if venda is not None and "data_venda" in inspect(venda).dict:
+                    invalidacoes.adicionar_venda(venda)
+                else:
+                    invalidacoes.venda_ids.add(int(venda_id))
+                continue
+
+            if _altera_cadastro_da_dre(obj, novo) and obj.tenant_id is not None:
+                invalidacoes.tenants_volateis.add(obj.tenant_id)
+    return invalidacoes
+
+
+def _apagar_marcas(executar, tenant_id, dias: List[date], tenant_volatil: bool) -> None:
+    from app.dre_canais.models import DRECanalDiaCalculado
+
+    dias_calculados = DRECanalDiaCalculado.__table__
+    if dias:
+        executar(
+            delete(dias_calculados).where(
+                dias_calculados.c.tenant_id == tenant_id,
+                dias_calculados.c.data.in_(dias),
+            )
+        )
+    if tenant_volatil:
+        executar(
+            delete(dias_calculados).where(
+                dias_calculados.c.tenant_id == tenant_id,
+                dias_calculados.c.volatil.is_(True),
+            )
+        )
+
+
+def _invalidar_fatos_after_flush(session: Session, _flush_context) -> None:
+    from app.vendas_models import Venda
+
+    invalidacoes = _coletar(session)
+    if not invalidacoes:
+        return
+
+    connection = session.connection()
+    if not fatos_disponiveis(connection):
+        return
+
+    vendas = Venda.__table__
+    if invalidacoes.venda_ids:
+        rows = connection.execute(
+            select(vendas.c.tenant_id, vendas.c.data_venda).where(
+                vendas.c.id.in_(sorted(invalidacoes.venda_ids))
+            )
+        )
+        for tenant_id, data_venda in rows:
+            dia = _dia(data_venda)
+            if tenant_id is not None and dia is not None:
+                invalidacoes.dias.setdefault(tenant_id, set()).add(dia)
+
+    hoje = now_brasilia().date()
+    pendentes = session.info.setdefault(_POS_COMMIT_KEY, {})
+    for tenant_id in set(invalidacoes.dias) | invalidacoes.tenants_volateis:
+        passados = sorted(
+            dia for dia in invalidacoes.dias.get(tenant_id, ()) if dia < hoje
+        )
+        volatil = tenant_id in invalidacoes.tenants_volateis
+        if not passados and not volatil:
+            continue
+        _apagar_marcas(connection.execute, tenant_id, passados, volatil)
+        dias_pendentes, volatil_pendente = pendentes.get(tenant_id, (set(), False))
+        pendentes[tenant_id] = (
+            dias_pendentes | set(passados),
+            volatil_pendente or volatil,
+        )
+
+
+def _reinvalidar_apos_commit(session: Session) -> None:
+    pendentes = session.info.pop(_POS_COMMIT_KEY, None)
+    if not pendentes:
+        return
+    for tenant_id, (dias, volatil) in pendentes.items():
+        try:
+            with tenant_context(tenant_id), Session(bind=session.get_bind()) as db:
+                sync_rls_tenant(db, tenant_id)
+                _apagar_marcas(db.execute, tenant_id, sorted(dias), volatil)
+                db.commit()
+        except Exception:
+            # A marca ja saiu na transacao da escrita; so a corrida fica aberta
+            logger.warning(
+                "[DRE-CANAIS] Falha ao reinvalidar fatos do tenant %s",
+                tenant_id,
+                exc_info=True,
+            )
+
+
+def _descartar_pos_commit(session: Session) -> None:
+    session.info.pop(_POS_COMMIT_KEY, None)
+
+
+def _data_venda_alterada(_venda, _valor, _anterior, _initiator) -> None:
+    """Sem efeito: existe para ligar ``active_history`` em ``data_venda``."""
+
+
+def _registrar_historico_data_venda() -> None:
+    from app.vendas_models import Venda
+
+    # Com o atributo expirado (ex.: depois de um commit) a troca de data nao
+    # guardaria o dia de origem; active_history carrega o valor anterior.
+    if not event.contains(Venda.data_venda, "set", _data_venda_alterada):
+        event.listen(Venda.data_venda, "set", _data_venda_alterada, active_history=True)
+
+
+def register_dre_fatos_listeners() -> None:
+    for nome, listener in (
+        ("after_flush", _invalidar_fatos_after_flush),
+        ("after_commit", _reinvalidar_apos_commit),
+        ("after_rollback", _descartar_pos_commit),
+    ):
+        if not event.contains(Session, nome, listener):
+            event.listen(Session, nome, listener)
+    # Os mapeamentos ainda nao existem quando app.db carrega este modulo
+    if not event.contains(Mapper, "after_configured", _registrar_historico_data_venda):
+        event.listen(Mapper, "after_configured", _registrar_historico_data_venda)
+
+
+register_dre_fatos_listeners()
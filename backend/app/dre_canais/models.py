@@ -0,0 +1,70 @@
+"""Tabelas materializadas da DRE por canal."""
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Index,
+    Numeric,
+    String,
+    UniqueConstraint,
+)
+
+from app.base_models import BaseTenantModel
+
+
+class DRECanalFatoDiario(BaseTenantModel):
+    """Valor de uma linha da DRE por tenant x dia x canal.
+
+    ``itens`` so e preenchido na linha ``cmv_pendente`` (itens vendidos sem
+    custo confirmado, estimados na leitura com o percentual do periodo).
+    """
+
+    __tablename__ = "dre_canal_fatos_diarios"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "data",
+            "canal",
+            "linha",
+            name="uq_dre_canal_fatos_diarios_tenant_data_canal_linha",
+        ),
+        {"extend_existing": True},
+    )
+
+    data = Column(Date, nullable=False)
+    canal = Column(String(30), nullable=False)
+    linha = Column(String(40), nullable=False)
+    valor = Column(Numeric(18, 6), nullable=False, default=0)
+    itens = Column(JSON, nullable=True)
+
+
+class DRECanalDiaCalculado(BaseTenantModel):
+    """Marca os dias cujos fatos estao em dia com as vendas.
+
+    Invalidar um dia e apagar a marca: o proximo relatorio recalcula apenas
+    ele. ``volatil`` indica que o resultado depende de cadastros (custo do
+    produto, formas de pagamento, aliquota, taxa do entregador). Sem
+    ``calculado_em`` a marca e so a reserva de um calculo em andamento.
+    """
+
+    __tablename__ = "dre_canal_dias_calculados"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "data",
+            name="uq_dre_canal_dias_calculados_tenant_data",
+        ),
+        Index(
+            "ix_dre_canal_dias_calculados_tenant_volatil",
+            "tenant_id",
+            "volatil",
+        ),
+        {"extend_existing": True},
+    )
+
+    data = Column(Date, nullable=False)
+    volatil = Column(Boolean, nullable=False, default=False)
+    calculado_em = Column(DateTime, nullable=True)
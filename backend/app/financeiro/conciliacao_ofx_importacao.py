@@ -0,0 +1,362 @@
+"""Importacao em lote de extratos OFX na conciliacao bancaria.
+
+- FITIDs ja importados na conta sao buscados em poucas consultas (lotes de
+  ``IN``) em vez de uma consulta por transacao.
+- As regras ativas do tenant sao compiladas uma vez em ``MatcherRegrasConciliacao``.
+- As movimentacoes entram com INSERT de varias linhas por lote.
+- Extratos grandes rodam em thread de background; o progresso fica no proprio
+  ``ExtratoBancario`` (``movimentacoes_processadas`` / ``status``).
+
+Em background cada lote e commitado. Se a importacao falhar (ou o processo
+morrer) no meio, os lotes anteriores continuam gravados e vinculados ao extrato
+com ``status="erro"``; reenviar o mesmo arquivo importa so o restante, porque
+FITIDs ja existentes na conta sao ignorados (transacoes sem FITID, raras, podem
+duplicar).
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.financeiro.models_conciliacao import (
+    ExtratoBancario,
+    MovimentacaoBancaria,
+    RegraConciliacao,
+)
+from app.parsers.ofx_parser import TransacaoOFX
+from app.tenancy.context import tenant_context
+
+logger = logging.getLogger(__name__)
+
+LOTE_INSERCAO = 500
+LOTE_FITIDS = 500
+# Acima disso o upload responde na hora e a importacao segue em background
+LIMITE_IMPORTACAO_SINCRONA = 300
+CONFIANCA_AUTO_CONCILIAR = 80
+PESO_FAIXA_VALOR = 0.7
+# Sem progresso gravado por esse tempo, a thread morreu (restart, deploy, OOM)
+SEM_PROGRESSO_MAX = timedelta(minutes=10)
+
+
+class MatcherRegrasConciliacao:
+    """
+    Regras de conciliacao pre-compiladas para aplicar em muitas transacoes.
+
+    Mantem a semantica da avaliacao regra a regra: para cada regra (na ordem
+    recebida) o padrao do memo vale ``confianca`` e a faixa de valor vale
+    ``confianca * 0.7``; vence a primeira com a maior confianca. A confianca
+    e lida na hora da avaliacao porque a auto-conciliacao a atualiza.
+    """
+
+    def __init__(self, regras: Sequence[RegraConciliacao]):
+        self.regras = list(regras)
+        self._padroes: dict[int, re.Pattern] = {}
+        for indice, regra in enumerate(self.regras):
+            if not regra.padrao_memo:
+                continue
+            padrao = regra.padrao_memo.replace("%", ".*")
+            try:
+                self._padroes[indice] = re.compile(padrao, re.IGNORECASE)
+            except re.error:
+                logger.warning(
+                    "[CONCILIACAO OFX] Padrao invalido ignorado na regra %s: %r",
+                    regra.id,
+                    regra.padrao_memo,
+                )
+                continue
+        self._qualquer_padrao = self._filtro_combinado(self._padroes.values())
+
+        # Indice de intervalos: faixas ordenadas pelo minimo; a busca corta as
+        # faixas que comecam acima do valor e confere so o maximo das demais
+        faixas = sorted(
+            (float(regra.valor_min), float(regra.valor_max), indice)
+            for indice, regra in enumerate(self.regras)
+            if getattr(regra, "valor_min", None) and getattr(regra, "valor_max", None)
+        )
+        self._faixas = faixas
+        self._faixas_minimos = [faixa[0] for faixa in faixas]
+
+    @staticmethod
+    def _filtro_combinado(padroes: Iterable[re.Pattern]) -> Optional[re.Pattern]:
+        """
+        Filtro rapido: memo que nao casa com nenhuma regra pula a avaliacao
+
+        Juntar os padroes com ``|`` so preserva a semantica sem grupos (a
+        numeracao das backreferences mudaria) e sem flags inline como ``(?i)``
+        (fora do inicio da expressao sao erro). Nesses casos, ou se a expressao
+        combinada nao compilar, fica sem filtro e cada padrao e testado.
+        """
+        padroes = list(padroes)
+        if not padroes or any(padrao.groups for padrao in padroes):
+            return None
+        try:
+            return re.compile(
+                "|".join(f"(?:{padrao.pattern})" for padrao in padroes),
+                re.IGNORECASE,
+            )
+        except re.error:
+            return None
+
+    def _candidatos_memo(self, memo: Optional[str]) -> Iterable[int]:
+        if not memo or not self._padroes:
+            return ()
+        if self._qualquer_padrao is not None and not self._qualquer_padrao.search(memo):
+            return ()
+        return (
+            indice for indice, padrao in self._padroes.items() if padrao.search(memo)
+        )
+
+    def _candidatos_valor(self, valor: Optional[float]) -> Iterable[int]:
+        if valor is None or not self._faixas:
+            return ()
+        valor_abs = abs(float(valor))
+        fim = bisect.bisect_right(self._faixas_minimos, valor_abs)
+        return (
+            indice
+            for _minimo, maximo, indice in self._faixas[:fim]
+            if valor_abs <= maximo
+        )
+
+    def melhor_regra(
+        self, memo: Optional[str], valor: Optional[float]
+    ) -> Tuple[Optional[RegraConciliacao], float]:
+        por_memo = set(self._candidatos_memo(memo))
+        por_valor = set(self._candidatos_valor(valor))
+        melhor_regra = None
+        melhor_confianca = 0
+        for indice in sorted(por_memo | por_valor):
+            regra = self.regras[indice]
+            if indice in por_memo:
+                confianca = regra.confianca or 0
+                if confianca > melhor_confianca:
+                    melhor_confianca = confianca
+                    melhor_regra = regra
+            if indice in por_valor:
+                confianca = (regra.confianca or 0) * PESO_FAIXA_VALOR
+                if confianca > melhor_confianca:
+                    melhor_confianca = confianca
+                    melhor_regra = regra
+        return melhor_regra, melhor_confianca
+
+
+def carregar_regras_ativas(db: Session, tenant_id) -> List[RegraConciliacao]:
+    return (
+        db.query(RegraConciliacao)
+        .filter(
+            RegraConciliacao.tenant_id == tenant_id,
+            RegraConciliacao.ativo.is_(True),
+        )
+        .all()
+    )
+
+
+def buscar_fitids_existentes(
+    db: Session, *, tenant_id, conta_bancaria_id: int, fitids: Iterable[str]
+) -> set[str]:
+    """FITIDs da lista que ja existem na conta (consultas em lotes de IN)."""
+    pendentes = sorted({fitid for fitid in fitids if fitid})
+    existentes: set[str] = set()
+    for inicio in range(0, len(pendentes), LOTE_FITIDS):
+        lote = pendentes[inicio : inicio + LOTE_FITIDS]
+        existentes.update(
+            fitid
+            for (fitid,) in db.query(MovimentacaoBancaria.fitid).filter(
+                MovimentacaoBancaria.tenant_id == tenant_id,
+                MovimentacaoBancaria.conta_bancaria_id == conta_bancaria_id,
+                MovimentacaoBancaria.fitid.in_(lote),
+            )
+        )
+    return existentes
+
+
+def _linha_movimentacao(
+    transacao: TransacaoOFX,
+    *,
+    tenant_id,
+    extrato: ExtratoBancario,
+    conta_bancaria_id: int,
+    matcher: MatcherRegrasConciliacao,
+    agora: datetime,
+) -> dict[str, Any]:
+    linha: dict[str, Any] = {
+        "tenant_id": tenant_id,
+        "extrato_id": extrato.id,
+        "conta_bancaria_id": conta_bancaria_id,
+        "fitid": transacao.fitid,
+        "data_movimento": transacao.data_movimento,
+        "valor": transacao.valor,
+        "tipo": transacao.tipo,
+        "memo": transacao.memo,
+        "status_conciliacao": "pendente",
+        "confianca_sugestao": 0,
+        "criado_em": agora,
+        "atualizado_em": agora,
+    }
+
+    melhor_regra, melhor_confianca = matcher.melhor_regra(
+        transacao.memo, transacao.valor
+    )
+    if not melhor_regra:
+        return linha
+
+    linha.update(
+        {
+            "confianca_sugestao": int(melhor_confianca),
+            "regra_aplicada_id": melhor_regra.id,
+            "tipo_vinculo": getattr(melhor_regra, "tipo_vinculo", None),
+            "fornecedor_id": melhor_regra.fornecedor_id,
+            "categoria_dre_id": melhor_regra.categoria_dre_id,
+            "recorrente": bool(getattr(melhor_regra, "recorrente", False)),
+            "periodicidade": getattr(melhor_regra, "periodicidade", None),
+        }
+    )
+
+    melhor_regra.vezes_aplicada = int(melhor_regra.vezes_aplicada or 0) + 1
+    if melhor_confianca >= CONFIANCA_AUTO_CONCILIAR:
+        linha["status_conciliacao"] = "conciliado"
+        extrato.conciliadas = int(extrato.conciliadas or 0) + 1
+        extrato.pendentes = int(extrato.pendentes or 0) - 1
+        melhor_regra.vezes_confirmada = int(melhor_regra.vezes_confirmada or 0) + 1
+        melhor_regra.confianca = int(
+            (melhor_regra.vezes_confirmada / melhor_regra.vezes_aplicada) * 100
+        )
+    else:
+        linha["status_conciliacao"] = "sugerido"
+    return linha
+
+
+def importar_transacoes_ofx(
+    db: Session,
+    *,
+    tenant_id,
+    extrato: ExtratoBancario,
+    conta_bancaria_id: int,
+    transacoes: Sequence[TransacaoOFX],
+    lote: int = LOTE_INSERCAO,
+    ao_concluir_lote: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Grava as transacoes novas do extrato e aplica as regras automaticas.
+
+    FITIDs ja existentes na conta (ou repetidos no proprio arquivo) sao
+    ignorados. ``ao_concluir_lote(processadas)`` e chamado depois de cada
+    INSERT de lote. Retorna quantas movimentacoes foram criadas.
+    """
+    matcher = MatcherRegrasConciliacao(carregar_regras_ativas(db, tenant_id))
+    vistos = buscar_fitids_existentes(
+        db,
+        tenant_id=tenant_id,
+        conta_bancaria_id=conta_bancaria_id,
+        fitids=(transacao.fitid for transacao in transacoes),
+    )
+
+    agora = datetime.utcnow()
+    criadas = 0
+    linhas: list[dict[str, Any]] = []
+    lote = max(1, int(lote))
+
+    for processadas, transacao in enumerate(transacoes, start=1):
+        duplicada = bool(transacao.fitid) and transacao.fitid in vistos
+        if not duplicada:
+            if transacao.fitid:
+                vistos.add(transacao.fitid)
+            linhas.append(
+                _linha_movimentacao(
+                    transacao,
+                    tenant_id=tenant_id,
+                    extrato=extrato,
+                    conta_bancaria_id=conta_bancaria_id,
+                    matcher=matcher,
+                    agora=agora,
+                )
+            )
+
+        if len(linhas) >= lote or processadas == len(transacoes):
+            if linhas:
+                db.execute(insert(MovimentacaoBancaria), linhas)
+                criadas += len(linhas)
+                linhas = []
+            if ao_concluir_lote:
+                ao_concluir_lote(processadas)
+
+    return criadas
+
+
+def extrato_interrompido(
+    extrato: ExtratoBancario, agora: Optional[datetime] = None
+) -> bool:
+    """``processando`` sem lote commitado ha mais de ``SEM_PROGRESSO_MAX``."""
+    if extrato.status != "processando" or extrato.updated_at is None:
+        return False
+    ultimo_progresso = extrato.updated_at
+    if ultimo_progresso.tzinfo is None:
+        ultimo_progresso = ultimo_progresso.replace(tzinfo=timezone.utc)
+    agora = agora or datetime.now(timezone.utc)
+    return agora - ultimo_progresso > SEM_PROGRESSO_MAX
+
+
+def processar_extrato_ofx_background(
+    *,
+    extrato_id: int,
+    tenant_id,
+    conta_bancaria_id: int,
+    transacoes: Sequence[TransacaoOFX],
+) -> None:
+    """Importa o extrato fora do request, gravando o progresso a cada lote."""
+    from app.db import SessionLocal
+
+    tenant_uuid = UUID(str(tenant_id))
+    db = SessionLocal()
+    try:
+        with tenant_context(tenant_uuid):
+            extrato = (
+                db.query(ExtratoBancario)
+                .filter(
+                    ExtratoBancario.id == extrato_id,
+                    ExtratoBancario.tenant_id == tenant_uuid,
+                )
+                .first()
+            )
+            if not extrato:
+                logger.warning(
+                    "[CONCILIACAO OFX] Extrato %s nao encontrado para importacao",
+                    extrato_id,
+                )
+                return
+
+            def _progresso(processadas: int) -> None:
+                extrato.movimentacoes_processadas = processadas
+                db.commit()
+
+            try:
+                importar_transacoes_ofx(
+                    db,
+                    tenant_id=tenant_uuid,
+                    extrato=extrato,
+                    conta_bancaria_id=conta_bancaria_id,
+                    transacoes=transacoes,
+                    ao_concluir_lote=_progresso,
+                )
+                extrato.status = "concluido"
+                db.commit()
+            except Exception as error:
+                db.rollback()
+                logger.exception(
+                    "[CONCILIACAO OFX] Falha ao importar extrato %s", extrato_id
+                )
+                extrato.status = "erro"
+                extrato.erro_mensagem = (
+                    f"{str(error)[:400]} (lotes gravados antes da falha: "
+                    f"{int(extrato.movimentacoes_processadas or 0)} transacoes)"
+                )
+                db.commit()
+    finally:
+        db.close()
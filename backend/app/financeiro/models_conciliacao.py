@@ -8,6 +8,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -38,7 +39,10 @@ class ExtratoBancario(BaseTenantModel):
     total_movimentacoes = Column(Integer, default=0)
     conciliadas = Column(Integer, default=0)
     pendentes = Column(Integer, default=0)
-    status = Column(String(50))  # 'processando', 'concluido', 'revisao'
+    status = Column(String(50))  # 'processando', 'concluido', 'revisao', 'erro'
+    # Progresso da importacao em background
+    movimentacoes_processadas = Column(Integer, default=0, server_default="0")
+    erro_mensagem = Column(Text, nullable=True)
 
     # Relationships
     conta_bancaria = relationship("ContaBancaria")
@@ -49,7 +53,15 @@ class MovimentacaoBancaria(BaseTenantModel):
     """Cada linha do extrato bancário - núcleo da conciliação"""
 
     __tablename__ = "movimentacoes_bancarias"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index(
+            "ix_movimentacoes_bancarias_conta_fitid",
+            "tenant_id",
+            "conta_bancaria_id",
+            "fitid",
+        ),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     extrato_id = Column(
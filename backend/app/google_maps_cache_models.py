@@ -0,0 +1,24 @@
+from sqlalchemy import JSON, Column, DateTime, Index, String, Text, UniqueConstraint
+
+from app.base_models import BaseTenantModel
+
+
+class GoogleMapsCache(BaseTenantModel):
+    """Respostas do Google Maps reaproveitadas por tenant (geocode, distância, rota)."""
+
+    __tablename__ = "google_maps_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "tipo",
+            "chave",
+            name="uq_google_maps_cache_tenant_tipo_chave",
+        ),
+        Index("ix_google_maps_cache_expira_em", "expira_em"),
+    )
+
+    tipo = Column(String(20), nullable=False)  # geocode, distancia, rota
+    chave = Column(String(64), nullable=False)  # sha256 dos endereços normalizados
+    enderecos = Column(Text, nullable=True)  # endereços normalizados (diagnóstico)
+    payload = Column(JSON, nullable=False)
+    expira_em = Column(DateTime(timezone=True), nullable=False)
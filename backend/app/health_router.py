@@ -18,6 +18,7 @@ import time
 
 from app.db import engine, get_session
 from app.services.bling_flow_monitor_service import obter_resumo_monitoramento
+from app.tenancy.rls import get_rls_sync_stats
 
 router = APIRouter(prefix="/health", tags=["Health & Monitoring"])
 logger = logging.getLogger(__name__)
@@ -326,6 +327,7 @@ async def application_metrics(db: Session = Depends(get_session)) -> Dict[str, A
                     "last_24h": sessions_24h,
                 },
                 "messages": {"total": total_messages, "last_24h": messages_24h},
+                "rls_set_config": get_rls_sync_stats(),
                 "system": {
                     "memory_percent": psutil.virtual_memory().percent,
                     "cpu_percent": psutil.cpu_percent(interval=0.1),
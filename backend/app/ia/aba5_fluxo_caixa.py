@@ -16,6 +16,8 @@ from app.ia.aba5_fluxo_caixa_parts import (
     _resolve_tenant_id,
     _saldo_realizado_atual,
     _utcnow_naive,
+    atualizar_modelo_fluxo,
+    atualizar_projecoes_tenant,
     calcular_indices_saude,
     gerar_alertas_caixa,
     obter_projecoes_proximos_dias,
@@ -37,6 +39,8 @@ __all__ = [
     "PROPHET_AVAILABLE",
     "calcular_indices_saude",
     "projetar_fluxo_15_dias",
+    "atualizar_modelo_fluxo",
+    "atualizar_projecoes_tenant",
     "obter_projecoes_proximos_dias",
     "simular_cenario",
     "gerar_alertas_caixa",
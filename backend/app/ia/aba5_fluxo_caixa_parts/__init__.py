@@ -15,6 +15,8 @@ from app.ia.aba5_fluxo_caixa_parts.projecoes import (
     _gerar_projecoes_estaticas,
     _montar_projecoes_estaticas,
     _persistir_projecoes_estaticas,
+    atualizar_modelo_fluxo,
+    atualizar_projecoes_tenant,
     obter_projecoes_proximos_dias,
     projetar_fluxo_15_dias,
 )
@@ -30,6 +32,8 @@ __all__ = [
     "PROPHET_AVAILABLE",
     "calcular_indices_saude",
     "projetar_fluxo_15_dias",
+    "atualizar_modelo_fluxo",
+    "atualizar_projecoes_tenant",
     "obter_projecoes_proximos_dias",
     "simular_cenario",
     "gerar_alertas_caixa",
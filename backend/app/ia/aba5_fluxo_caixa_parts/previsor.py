@@ -0,0 +1,275 @@
+"""Previsor leve do fluxo de caixa (Holt-Winters aditivo com sazonalidade semanal).
+
+Substitui o ajuste do Prophet no caminho da requisição. Cada série diária
+(entradas e saídas, separadas) é decomposta em nível, tendência amortecida e
+um fator por dia da semana, atualizados por suavização exponencial:
+
+    nivel_t = a (y_t - s_dia) + (1 - a) (nivel + phi tend)
+    tend_t  = b (nivel_t - nivel) + (1 - b) phi tend
+    s_dia   = g (y_t - nivel_t) + (1 - g) s_dia
+
+O ajuste testa toda a grade de ``(a, b, g)`` de uma vez: os estados são
+vetores NumPy com uma posição por combinação, e o laço corre só sobre os
+dias. Fica a combinação de menor erro quadrático um passo à frente.
+
+Os fatores sazonais ficam indexados por ``date.weekday()``, então os
+parâmetros persistidos podem ser atualizados só com os dias novos
+(``atualizar_parametros``), sem reajustar o histórico inteiro.
+"""
+
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+VERSAO_PREVISOR = "holt-winters-semanal-v1"
+PERIODO = 7
+AMORTECIMENTO = 0.9
+Z_95 = 1.96
+
+GRADE_ALPHA = (0.05, 0.1, 0.2, 0.3, 0.5)
+GRADE_BETA = (0.0, 0.02, 0.05, 0.1)
+GRADE_GAMMA = (0.05, 0.1, 0.2, 0.3, 0.5)
+
+
+@dataclass
+class ParametrosSerie:
+    """Estado ajustado de uma série diária (entradas ou saídas)."""
+
+    nivel: float
+    tendencia: float
+    sazonalidade: List[float]  # 7 fatores, índice = date.weekday()
+    alpha: float
+    beta: float
+    gamma: float
+    sigma: float
+    dias: int
+
+
+@dataclass
+class ParametrosPrevisor:
+    """Parâmetros persistidos por tenant/usuário (JSON em ``ModeloFluxoCaixa``)."""
+
+    entradas: ParametrosSerie
+    saidas: ParametrosSerie
+    ultimo_dia: date
+    versao: str = field(default=VERSAO_PREVISOR)
+
+    def para_dict(self) -> Dict:
+        return {
+            "entradas": asdict(self.entradas),
+            "saidas": asdict(self.saidas),
+            "ultimo_dia": self.ultimo_dia.isoformat(),
+            "versao": self.versao,
+        }
+
+    @classmethod
+    def de_dict(cls, dados: Dict) -> "ParametrosPrevisor":
+        return cls(
+            entradas=ParametrosSerie(**dados["entradas"]),
+            saidas=ParametrosSerie(**dados["saidas"]),
+            ultimo_dia=date.fromisoformat(dados["ultimo_dia"]),
+            versao=dados.get("versao") or VERSAO_PREVISOR,
+        )
+
+
+def series_diarias(
+    movimentos: Iterable[Tuple[date, str, float]],
+    inicio: date,
+    fim: date,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Soma ``(dia, tipo, valor)`` em duas séries diárias de ``inicio`` a ``fim``."""
+    tamanho = max((fim - inicio).days + 1, 0)
+    entradas = np.zeros(tamanho)
+    saidas = np.zeros(tamanho)
+    if not tamanho:
+        return entradas, saidas
+
+    dias, tipos, valores = [], [], []
+    for dia, tipo, valor in movimentos:
+        dias.append((dia - inicio).days)
+        tipos.append(tipo == "receita")
+        valores.append(abs(float(valor or 0.0)))
+    if not dias:
+        return entradas, saidas
+
+    indices = np.asarray(dias)
+    receita = np.asarray(tipos, dtype=bool)
+    valores_np = np.asarray(valores)
+    dentro = (indices >= 0) & (indices < tamanho)
+    np.add.at(entradas, indices[dentro & receita], valores_np[dentro & receita])
+    np.add.at(saidas, indices[dentro & ~receita], valores_np[dentro & ~receita])
+    return entradas, saidas
+
+
+def _grade() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    alpha, beta, gamma = np.meshgrid(GRADE_ALPHA, GRADE_BETA, GRADE_GAMMA)
+    return alpha.ravel(), beta.ravel(), gamma.ravel()
+
+
+def _suavizar(
+    serie: np.ndarray,
+    dias_semana: np.ndarray,
+    nivel: np.ndarray,
+    tendencia: np.ndarray,
+    sazonalidade: np.ndarray,
+    alpha: np.ndarray,
+    beta: np.ndarray,
+    gamma: np.ndarray,
+) -> np.ndarray:
+    """Roda a recursão sobre ``serie`` (estados com uma linha por combinação).
+
+    Atualiza os estados no lugar e devolve a soma dos erros quadráticos.
+    """
+    linhas = np.arange(nivel.shape[0])
+    sse = np.zeros(nivel.shape[0])
+    for valor, dia in zip(serie, dias_semana):
+        sazonal = sazonalidade[linhas, dia]
+        previsto = nivel + AMORTECIMENTO * tendencia + sazonal
+        sse += (valor - previsto) ** 2
+        novo_nivel = alpha * (valor - sazonal) + (1 - alpha) * (
+            nivel + AMORTECIMENTO * tendencia
+        )
+        tendencia[:] = (
+            beta * (novo_nivel - nivel) + (1 - beta) * AMORTECIMENTO * tendencia
+        )
+        sazonalidade[linhas, dia] = gamma * (valor - novo_nivel) + (1 - gamma) * sazonal
+        nivel[:] = novo_nivel
+    return sse
+
+
+def _ajustar_serie(serie: np.ndarray, primeiro_dia: date) -> ParametrosSerie:
+    dias_semana = (np.arange(serie.size) + primeiro_dia.weekday()) % PERIODO
+    alpha, beta, gamma = _grade()
+    combinacoes = alpha.size
+
+    # Estado inicial: média e desvio por dia da semana na primeira semana
+    semana = serie[:PERIODO]
+    media = float(semana.mean()) if semana.size else 0.0
+    sazonal_inicial = np.zeros(PERIODO)
+    sazonal_inicial[dias_semana[:PERIODO]] = semana - media
+
+    nivel = np.full(combinacoes, media)
+    tendencia = np.zeros(combinacoes)
+    sazonalidade = np.tile(sazonal_inicial, (combinacoes, 1))
+    sse = _suavizar(
+        serie, dias_semana, nivel, tendencia, sazonalidade, alpha, beta, gamma
+    )
+
+    melhor = int(np.argmin(sse))
+    return ParametrosSerie(
+        nivel=float(nivel[melhor]),
+        tendencia=float(tendencia[melhor]),
+        sazonalidade=[float(v) for v in sazonalidade[melhor]],
+        alpha=float(alpha[melhor]),
+        beta=float(beta[melhor]),
+        gamma=float(gamma[melhor]),
+        sigma=float(np.sqrt(sse[melhor] / max(serie.size, 1))),
+        dias=int(serie.size),
+    )
+
+
+def _atualizar_serie(
+    parametros: ParametrosSerie, serie: np.ndarray, primeiro_dia: date
+) -> ParametrosSerie:
+    if not serie.size:
+        return parametros
+    dias_semana = (np.arange(serie.size) + primeiro_dia.weekday()) % PERIODO
+    nivel = np.array([parametros.nivel])
+    tendencia = np.array([parametros.tendencia])
+    sazonalidade = np.array([parametros.sazonalidade], dtype=float)
+    sse = _suavizar(
+        serie,
+        dias_semana,
+        nivel,
+        tendencia,
+        sazonalidade,
+        np.array([parametros.alpha]),
+        np.array([parametros.beta]),
+        np.array([parametros.gamma]),
+    )
+    dias = parametros.dias + int(serie.size)
+    # Variância acumulada: média ponderada entre o histórico e os dias novos
+    variancia = (parametros.sigma**2 * parametros.dias + float(sse[0])) / dias
+    return ParametrosSerie(
+        nivel=float(nivel[0]),
+        tendencia=float(tendencia[0]),
+        sazonalidade=[float(v) for v in sazonalidade[0]],
+        alpha=parametros.alpha,
+        beta=parametros.beta,
+        gamma=parametros.gamma,
+        sigma=float(np.sqrt(variancia)),
+        dias=dias,
+    )
+
+
+def ajustar_parametros(
+    entradas: np.ndarray, saidas: np.ndarray, primeiro_dia: date
+) -> ParametrosPrevisor:
+    """Ajusta as duas séries diárias que começam em ``primeiro_dia``."""
+    return ParametrosPrevisor(
+        entradas=_ajustar_serie(np.asarray(entradas, dtype=float), primeiro_dia),
+        saidas=_ajustar_serie(np.asarray(saidas, dtype=float), primeiro_dia),
+        ultimo_dia=primeiro_dia + timedelta(days=len(entradas) - 1),
+    )
+
+
+def atualizar_parametros(
+    parametros: ParametrosPrevisor, entradas: np.ndarray, saidas: np.ndarray
+) -> ParametrosPrevisor:
+    """Aplica os dias seguintes a ``parametros.ultimo_dia`` sem reajustar a grade."""
+    primeiro_dia = parametros.ultimo_dia + timedelta(days=1)
+    return ParametrosPrevisor(
+        entradas=_atualizar_serie(
+            parametros.entradas, np.asarray(entradas, dtype=float), primeiro_dia
+        ),
+        saidas=_atualizar_serie(
+            parametros.saidas, np.asarray(saidas, dtype=float), primeiro_dia
+        ),
+        ultimo_dia=parametros.ultimo_dia + timedelta(days=len(entradas)),
+        versao=parametros.versao,
+    )
+
+
+def _prever_serie(
+    parametros: ParametrosSerie, passos: np.ndarray, dias_semana: np.ndarray
+) -> np.ndarray:
+    # Soma de phi^1..phi^h da tendência amortecida
+    fator = AMORTECIMENTO * (1 - AMORTECIMENTO**passos) / (1 - AMORTECIMENTO)
+    sazonal = np.asarray(parametros.sazonalidade)[dias_semana]
+    # Entrada e saída não ficam negativas; o sinal vem do tipo
+    return np.maximum(parametros.nivel + fator * parametros.tendencia + sazonal, 0.0)
+
+
+def prever(
+    parametros: ParametrosPrevisor,
+    inicio: date,
+    dias: int,
+    entradas_conhecidas: Optional[np.ndarray] = None,
+    saidas_conhecidas: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """Previsão diária de ``inicio`` em diante, somando os valores já agendados.
+
+    Devolve ``entradas``, ``saidas``, o ``liquido`` acumulado e o desvio
+    acumulado (``desvio``) para montar a faixa de 95% sobre o saldo.
+    """
+    deslocamento = (inicio - parametros.ultimo_dia).days
+    passos = np.arange(deslocamento, deslocamento + dias)
+    dias_semana = np.array(
+        [(inicio + timedelta(days=i)).weekday() for i in range(dias)], dtype=int
+    )
+    entradas = _prever_serie(parametros.entradas, passos, dias_semana)
+    saidas = _prever_serie(parametros.saidas, passos, dias_semana)
+    if entradas_conhecidas is not None:
+        entradas = entradas + entradas_conhecidas
+    if saidas_conhecidas is not None:
+        saidas = saidas + saidas_conhecidas
+
+    sigma_diario = np.hypot(parametros.entradas.sigma, parametros.saidas.sigma)
+    return {
+        "entradas": entradas,
+        "saidas": saidas,
+        "liquido_acumulado": np.cumsum(entradas - saidas),
+        "desvio": Z_95 * sigma_diario * np.sqrt(np.arange(1, dias + 1)),
+    }
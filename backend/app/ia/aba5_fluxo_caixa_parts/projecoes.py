@@ -1,27 +1,40 @@
+import importlib.util
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
 
-from sqlalchemy import and_, case, func
+import numpy as np
+from sqlalchemy import and_, func, insert, or_
 from sqlalchemy.orm import Session
 
+from app.financeiro_models import ContaPagar, ContaReceber
+from app.ia.aba5_fluxo_caixa_parts import previsor
 from app.ia.aba5_fluxo_caixa_parts.base import (
     _resolve_tenant_id,
     _saldo_realizado_atual,
     _utcnow_naive,
 )
-from app.ia.aba5_models import FluxoCaixa, ProjecaoFluxoCaixa
+from app.ia.aba5_models import FluxoCaixa, ModeloFluxoCaixa, ProjecaoFluxoCaixa
 from app.ia_config import Aba5Config
 
 logger = logging.getLogger(__name__)
 
-try:
-    from prophet import Prophet
+# Prophet ficou só no backtest offline (scripts/benchmark_fluxo_caixa_previsor.py)
+PROPHET_AVAILABLE = importlib.util.find_spec("prophet") is not None
 
-    PROPHET_AVAILABLE = True
-except ImportError:
-    PROPHET_AVAILABLE = False
-    logger.warning("⚠️ Prophet não instalado. Instale com: pip install prophet")
+HORIZONTE_DIAS = 15
+DIAS_HISTORICO = 90
+DIAS_MINIMOS_COM_MOVIMENTO = 10
+DIAS_REAJUSTE_COMPLETO = 30
+# Movimentos dessas origens entram pela agenda de contas, não pelo modelo
+ORIGENS_AGENDADAS = ("conta_receber", "conta_pagar")
+STATUS_CONTA_ABERTA = ("pendente", "vencido", "parcial")
+
+
+def _tenant_uuid(tenant_id) -> UUID:
+    # As colunas tenant_id são UUID; comparar com str só funciona no PostgreSQL
+    return tenant_id if isinstance(tenant_id, UUID) else UUID(str(tenant_id))
 
 
 def _montar_projecoes_estaticas(saldo_atual: float, hoje, dias: int = 15) -> List[Dict]:
@@ -45,33 +58,72 @@ def _montar_projecoes_estaticas(saldo_atual: float, hoje, dias: int = 15) -> Lis
     return projecoes
 
 
-def _persistir_projecoes_estaticas(
+def _persistir_projecoes(
     usuario_id: int,
     tenant_id: str,
     projecoes: List[Dict],
-    mensagem_alerta: str,
     db: Session,
+    versao_modelo: str,
+    mensagem_alerta: Optional[str] = None,
 ) -> None:
-    for projecao in projecoes:
-        registro = ProjecaoFluxoCaixa(
-            usuario_id=usuario_id,
-            tenant_id=tenant_id,
-            data_projetada=datetime.fromisoformat(projecao["data"]),
-            dias_futuros=projecao["dias_futuros"],
-            valor_entrada_estimada=projecao["entrada_estimada"],
-            valor_saida_estimada=projecao["saida_estimada"],
-            saldo_estimado=projecao["saldo_estimado"],
-            limite_inferior=projecao["limite_inferior"],
-            limite_superior=projecao["limite_superior"],
-            vai_faltar_caixa=projecao["vai_faltar_caixa"],
-            alerta_nivel=projecao["alerta_nivel"],
-            mensagem_alerta=mensagem_alerta,
-            versao_modelo="fallback-v1",
+    """Troca as projeções futuras do usuário numa única exclusão + inserção em lote."""
+    inicio_amanha = datetime.combine(
+        _utcnow_naive().date() + timedelta(days=1), datetime.min.time()
+    )
+    db.query(ProjecaoFluxoCaixa).filter(
+        ProjecaoFluxoCaixa.usuario_id == usuario_id,
+        ProjecaoFluxoCaixa.tenant_id == tenant_id,
+        ProjecaoFluxoCaixa.data_projetada >= inicio_amanha,
+    ).delete(synchronize_session=False)
+
+    if projecoes:
+        tenant_uuid = _tenant_uuid(tenant_id)
+        gerado_em = _utcnow_naive()
+        db.execute(
+            insert(ProjecaoFluxoCaixa),
+            [
+                {
+                    "usuario_id": usuario_id,
+                    "tenant_id": tenant_uuid,
+                    "data_projetada": datetime.combine(
+                        date.fromisoformat(projecao["data"][:10]),
+                        datetime.min.time(),
+                    ),
+                    "dias_futuros": projecao["dias_futuros"],
+                    "valor_entrada_estimada": projecao["entrada_estimada"],
+                    "valor_saida_estimada": projecao["saida_estimada"],
+                    "saldo_estimado": projecao["saldo_estimado"],
+                    "limite_inferior": projecao["limite_inferior"],
+                    "limite_superior": projecao["limite_superior"],
+                    "vai_faltar_caixa": projecao["vai_faltar_caixa"],
+                    "alerta_nivel": projecao["alerta_nivel"],
+                    "mensagem_alerta": mensagem_alerta,
+                    "gerado_em": gerado_em,
+                    "versao_modelo": versao_modelo,
+                }
+                for projecao in projecoes
+            ],
         )
-        db.add(registro)
     db.commit()
 
 
+def _persistir_projecoes_estaticas(
+    usuario_id: int,
+    tenant_id: str,
+    projecoes: List[Dict],
+    mensagem_alerta: str,
+    db: Session,
+) -> None:
+    _persistir_projecoes(
+        usuario_id,
+        tenant_id,
+        projecoes,
+        db,
+        versao_modelo="fallback-v1",
+        mensagem_alerta=mensagem_alerta,
+    )
+
+
 def _gerar_projecoes_estaticas(
     usuario_id: int,
     tenant_id: str,
@@ -90,13 +142,193 @@ def _gerar_projecoes_estaticas(
     return projecoes
 
 
+def _movimentos_nao_agendados(
+    usuario_id: int,
+    tenant_id_resolvido: str,
+    db: Session,
+    inicio: date,
+    fim: date,
+) -> List[Tuple[date, str, float]]:
+    """Movimentos realizados de ``inicio`` a ``fim`` (inclusive), fora das contas."""
+    linhas = (
+        db.query(FluxoCaixa.data_movimentacao, FluxoCaixa.tipo, FluxoCaixa.valor)
+        .filter(
+            and_(
+                FluxoCaixa.usuario_id == usuario_id,
+                FluxoCaixa.tenant_id == tenant_id_resolvido,
+                FluxoCaixa.status == "realizado",
+                FluxoCaixa.data_movimentacao
+                >= datetime.combine(inicio, datetime.min.time()),
+                FluxoCaixa.data_movimentacao
+                < datetime.combine(fim + timedelta(days=1), datetime.min.time()),
+                or_(
+                    FluxoCaixa.origem_tipo.is_(None),
+                    FluxoCaixa.origem_tipo.notin_(ORIGENS_AGENDADAS),
+                ),
+            )
+        )
+        .all()
+    )
+    return [
+        (linha.data_movimentacao.date(), linha.tipo, linha.valor)
+        for linha in linhas
+        if linha.data_movimentacao is not None
+    ]
+
+
+def _contas_em_aberto(
+    tenant_id_resolvido: str, db: Session, inicio: date, dias: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Saldo a receber e a pagar por dia de vencimento dentro do horizonte."""
+    fim = inicio + timedelta(days=dias - 1)
+    entradas = np.zeros(dias)
+    saidas = np.zeros(dias)
+
+    a_receber = (
+        db.query(
+            ContaReceber.data_vencimento,
+            func.sum(
+                ContaReceber.valor_final - func.coalesce(ContaReceber.valor_recebido, 0)
+            ),
+        )
+        .filter(
+            ContaReceber.tenant_id == tenant_id_resolvido,
+            ContaReceber.status.in_(STATUS_CONTA_ABERTA),
+            ContaReceber.data_vencimento >= inicio,
+            ContaReceber.data_vencimento <= fim,
+        )
+        .group_by(ContaReceber.data_vencimento)
+        .all()
+    )
+    for vencimento, valor in a_receber:
+        entradas[(vencimento - inicio).days] += (
+            max(float(valor or 0), 0.0) * Aba5Config.MARGEM_CONTAS_RECEBER
+        )
+
+    a_pagar = (
+        db.query(
+            ContaPagar.data_vencimento,
+            func.sum(ContaPagar.valor_final - func.coalesce(ContaPagar.valor_pago, 0)),
+        )
+        .filter(
+            ContaPagar.tenant_id == tenant_id_resolvido,
+            ContaPagar.status.in_(STATUS_CONTA_ABERTA),
+            ContaPagar.data_vencimento >= inicio,
+            ContaPagar.data_vencimento <= fim,
+        )
+        .group_by(ContaPagar.data_vencimento)
+        .all()
+    )
+    for vencimento, valor in a_pagar:
+        saidas[(vencimento - inicio).days] += max(float(valor or 0), 0.0)
+
+    return entradas, saidas
+
+
+def atualizar_modelo_fluxo(
+    usuario_id: int,
+    db: Session,
+    tenant_id: Optional[str] = None,
+    forcar_ajuste: bool = False,
+) -> Optional[previsor.ParametrosPrevisor]:
+    """
+    Devolve os parâmetros do previsor atualizados até ontem.
+
+    Com modelo salvo, aplica só os dias que faltam (atualização incremental);
+    reajusta a grade do zero quando não há modelo, a versão mudou ou o último
+    ajuste completo tem mais de ``DIAS_REAJUSTE_COMPLETO`` dias. Retorna None
+    com histórico insuficiente. Faz ``flush``; o commit fica com quem chama.
+    """
+    tenant_id_resolvido = _resolve_tenant_id(usuario_id, db, tenant_id)
+    if not tenant_id_resolvido:
+        return None
+    tenant_id_resolvido = _tenant_uuid(tenant_id_resolvido)
+
+    agora = _utcnow_naive()
+    ontem = agora.date() - timedelta(days=1)
+    registro = (
+        db.query(ModeloFluxoCaixa)
+        .filter(
+            ModeloFluxoCaixa.usuario_id == usuario_id,
+            ModeloFluxoCaixa.tenant_id == tenant_id_resolvido,
+        )
+        .first()
+    )
+
+    if (
+        registro is not None
+        and not forcar_ajuste
+        and registro.versao_modelo == previsor.VERSAO_PREVISOR
+        and registro.ajustado_em >= agora - timedelta(days=DIAS_REAJUSTE_COMPLETO)
+    ):
+        parametros = previsor.ParametrosPrevisor.de_dict(registro.parametros)
+        if parametros.ultimo_dia >= ontem:
+            return parametros
+        novos = _movimentos_nao_agendados(
+            usuario_id,
+            tenant_id_resolvido,
+            db,
+            parametros.ultimo_dia + timedelta(days=1),
+            ontem,
+        )
+        entradas, saidas = previsor.series_diarias(
+            novos, parametros.ultimo_dia + timedelta(days=1), ontem
+        )
+        parametros = previsor.atualizar_parametros(parametros, entradas, saidas)
+        registro.parametros = parametros.para_dict()
+        registro.ultimo_dia = parametros.ultimo_dia
+        registro.atualizado_ate = agora
+        db.flush()
+        return parametros
+
+    inicio = ontem - timedelta(days=DIAS_HISTORICO - 1)
+    movimentos = _movimentos_nao_agendados(
+        usuario_id, tenant_id_resolvido, db, inicio, ontem
+    )
+    if len({dia for dia, _, _ in movimentos}) < DIAS_MINIMOS_COM_MOVIMENTO:
+        logger.warning(f"Histórico insuficiente para o previsor (usuário {usuario_id})")
+        return None
+
+    # Começa no primeiro dia com movimento para não aprender zeros de antes
+    inicio = min(dia for dia, _, _ in movimentos)
+    entradas, saidas = previsor.series_diarias(movimentos, inicio, ontem)
+    parametros = previsor.ajustar_parametros(entradas, saidas, inicio)
+
+    if registro is None:
+        registro = ModeloFluxoCaixa(
+            usuario_id=usuario_id,
+            tenant_id=tenant_id_resolvido,
+        )
+        db.add(registro)
+    registro.parametros = parametros.para_dict()
+    registro.ultimo_dia = parametros.ultimo_dia
+    registro.versao_modelo = parametros.versao
+    registro.ajustado_em = agora
+    registro.atualizado_ate = agora
+    db.flush()
+    return parametros
+
+
+def _nivel_alerta(saldo_estimado: float, despesa_diaria: float) -> str:
+    if saldo_estimado < Aba5Config.DIAS_CAIXA_CRITICO * despesa_diaria:
+        return "critico"
+    if saldo_estimado < Aba5Config.DIAS_CAIXA_ALERTA * despesa_diaria:
+        return "alerta"
+    return "ok"
+
+
 def projetar_fluxo_15_dias(
     usuario_id: int,
     db: Session,
     tenant_id: Optional[str] = None,
 ) -> Optional[List[Dict]]:
     """
-    Projeta o fluxo de caixa para os próximos 15 dias usando Prophet.
+    Projeta o fluxo de caixa para os próximos 15 dias.
+
+    Usa os parâmetros persistidos do previsor (Holt-Winters semanal, ver
+    ``previsor.py``) e soma as contas a receber/pagar em aberto que vencem no
+    período. Não treina modelo na requisição: no máximo aplica os dias que
+    faltam desde a última atualização do job noturno.
 
     Retorna lista de dicts:
     [
@@ -114,70 +346,17 @@ def projetar_fluxo_15_dias(
     ]
     """
 
-    if not PROPHET_AVAILABLE:
-        logger.error("Prophet não está instalado!")
-        return None
-
     try:
         tenant_id_resolvido = _resolve_tenant_id(usuario_id, db, tenant_id)
         if not tenant_id_resolvido:
             logger.error(f"❌ Usuário {usuario_id} não encontrado ou sem tenant")
             return None
+        tenant_id_resolvido = _tenant_uuid(tenant_id_resolvido)
 
-        # 1. COLETAR DADOS HISTÓRICOS (últimos 90 dias)
-        data_90d_atras = _utcnow_naive() - timedelta(days=90)
-
-        movimentacoes = (
-            db.query(FluxoCaixa.data_movimentacao, FluxoCaixa.tipo, FluxoCaixa.valor)
-            .filter(
-                and_(
-                    FluxoCaixa.usuario_id == usuario_id,
-                    FluxoCaixa.tenant_id == tenant_id_resolvido,
-                    FluxoCaixa.status == "realizado",
-                    FluxoCaixa.data_movimentacao >= data_90d_atras,
-                )
-            )
-            .order_by(FluxoCaixa.data_movimentacao)
-            .all()
+        parametros = atualizar_modelo_fluxo(
+            usuario_id, db, tenant_id=tenant_id_resolvido
         )
-
-        if not movimentacoes:
-            logger.warning(f"Sem dados históricos para usuário {usuario_id}")
-            return _gerar_projecoes_estaticas(
-                usuario_id,
-                tenant_id_resolvido,
-                db,
-                "Projeção sem histórico",
-            )
-
-        # 2. AGREGAR POR DIA
-        saldo_por_dia = {}
-        saldo_acumulado = 0.0
-
-        for mov in movimentacoes:
-            data = mov.data_movimentacao.date()
-            valor = mov.valor if mov.tipo == "receita" else -mov.valor
-
-            if data not in saldo_por_dia:
-                saldo_por_dia[data] = 0
-
-            saldo_por_dia[data] += valor
-            saldo_acumulado += valor
-
-        # 3. PREPARAR DATAFRAME PARA PROPHET
-        import pandas as pd
-
-        df_dados = []
-        saldo_acumulado = 0.0
-
-        for data in sorted(saldo_por_dia.keys()):
-            saldo_acumulado += saldo_por_dia[data]
-            df_dados.append({"ds": pd.Timestamp(data), "y": saldo_acumulado})
-
-        df = pd.DataFrame(df_dados)
-
-        if len(df) < 10:
-            logger.warning(f"Dados insuficientes para Prophet ({len(df)} dias)")
+        if parametros is None:
             return _gerar_projecoes_estaticas(
                 usuario_id,
                 tenant_id_resolvido,
@@ -185,115 +364,50 @@ def projetar_fluxo_15_dias(
                 "Histórico insuficiente",
             )
 
-        # 4. TREINAR PROPHET
-        model = Prophet(
-            yearly_seasonality=False,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            interval_width=0.95,
-        )
-
-        model.fit(df)
-
-        # 5. FAZER FORECAST (15 dias)
-        future = model.make_future_dataframe(periods=15)
-        forecast = model.predict(future)
-
-        # Pegar só os próximos 15 dias
-        forecast_15d = forecast.tail(15).copy()
-
-        # 6. PROCESSAR RESULTADOS
-        projecoes = []
         hoje = _utcnow_naive().date()
-
-        # Buscar tenant_id
-        tenant_id = tenant_id_resolvido
-        if not tenant_id:
-            logger.error(f"❌ Usuário {usuario_id} não encontrado ou sem tenant")
-            return None
-
-        # Obter saldo atual
-        saldo_atual = (
-            db.query(
-                func.sum(
-                    case(
-                        (FluxoCaixa.tipo == "receita", FluxoCaixa.valor),
-                        else_=-FluxoCaixa.valor,
-                    )
-                )
-            )
-            .filter(
-                and_(
-                    FluxoCaixa.usuario_id == usuario_id,
-                    FluxoCaixa.tenant_id == tenant_id_resolvido,
-                    FluxoCaixa.status == "realizado",
-                )
-            )
-            .scalar()
-            or 0.0
+        inicio = hoje + timedelta(days=1)
+        a_receber, a_pagar = _contas_em_aberto(
+            tenant_id_resolvido, db, inicio, HORIZONTE_DIAS
         )
+        previsao = previsor.prever(
+            parametros, inicio, HORIZONTE_DIAS, a_receber, a_pagar
+        )
+        saldo_atual = _saldo_realizado_atual(usuario_id, tenant_id_resolvido, db)
+        saldos = saldo_atual + previsao["liquido_acumulado"]
+        inferiores = saldos - previsao["desvio"]
+        superiores = saldos + previsao["desvio"]
+        despesa_diaria = float(previsao["saidas"].mean())
 
-        for idx, row in forecast_15d.iterrows():
-            data_forecast = row["ds"].date()
-            dias_futuros = (data_forecast - hoje).days
-
-            # Calcular valores
-            saldo_estimado = float(row["yhat"])
-            limite_inf = float(row["yhat_lower"])
-            limite_sup = float(row["yhat_upper"])
-
-            # Assumir proporção 60% entrada, 40% saída
-            movimento_estimado = abs(saldo_estimado - saldo_atual)
-            entrada_estimada = movimento_estimado * 0.6
-            saida_estimada = movimento_estimado * 0.4
-
-            # Verificar alerta
-            vai_faltar_caixa = limite_inf < 0
-
-            if saldo_estimado < Aba5Config.DIAS_CAIXA_CRITICO * (saida_estimada / 30):
-                alerta_nivel = "critico"
-            elif saldo_estimado < Aba5Config.DIAS_CAIXA_ALERTA * (saida_estimada / 30):
-                alerta_nivel = "alerta"
-            else:
-                alerta_nivel = "ok"
-
+        projecoes = []
+        for i in range(HORIZONTE_DIAS):
+            saldo_estimado = float(saldos[i])
             projecoes.append(
                 {
-                    "data": data_forecast.isoformat(),
-                    "dias_futuros": dias_futuros,
+                    "data": (inicio + timedelta(days=i)).isoformat(),
+                    "dias_futuros": i + 1,
                     "saldo_estimado": round(saldo_estimado, 2),
-                    "entrada_estimada": round(entrada_estimada, 2),
-                    "saida_estimada": round(saida_estimada, 2),
-                    "limite_inferior": round(limite_inf, 2),
-                    "limite_superior": round(limite_sup, 2),
-                    "vai_faltar_caixa": bool(vai_faltar_caixa),
-                    "alerta_nivel": alerta_nivel,
+                    "entrada_estimada": round(float(previsao["entradas"][i]), 2),
+                    "saida_estimada": round(float(previsao["saidas"][i]), 2),
+                    "limite_inferior": round(float(inferiores[i]), 2),
+                    "limite_superior": round(float(superiores[i]), 2),
+                    "vai_faltar_caixa": bool(inferiores[i] < 0),
+                    "alerta_nivel": _nivel_alerta(saldo_estimado, despesa_diaria),
                 }
             )
 
-            # Salvar no banco
-            proj = ProjecaoFluxoCaixa(
-                usuario_id=usuario_id,
-                tenant_id=tenant_id,
-                data_projetada=datetime.combine(data_forecast, datetime.min.time()),
-                dias_futuros=dias_futuros,
-                valor_entrada_estimada=entrada_estimada,
-                valor_saida_estimada=saida_estimada,
-                saldo_estimado=saldo_estimado,
-                limite_inferior=limite_inf,
-                limite_superior=limite_sup,
-                vai_faltar_caixa=vai_faltar_caixa,
-                alerta_nivel=alerta_nivel,
-                versao_modelo="prophet_1.1.5",
-            )
-            db.add(proj)
-
-        db.commit()
+        _persistir_projecoes(
+            usuario_id,
+            tenant_id_resolvido,
+            projecoes,
+            db,
+            versao_modelo=parametros.versao,
+        )
 
         logger.info(f"✅ Projeção 15 dias feita para usuário {usuario_id}")
         return projecoes
 
     except Exception as e:
+        db.rollback()
         logger.error(f"❌ Erro ao projetar fluxo: {str(e)}")
         import traceback
 
@@ -301,6 +415,29 @@ def projetar_fluxo_15_dias(
         return None
 
 
+def atualizar_projecoes_tenant(db: Session, tenant_id) -> int:
+    """
+    Job noturno: atualiza o previsor e regrava as projeções de cada usuário
+    com movimento no tenant nos últimos ``DIAS_HISTORICO`` dias.
+    """
+    desde = _utcnow_naive() - timedelta(days=DIAS_HISTORICO)
+    usuarios = [
+        usuario_id
+        for (usuario_id,) in db.query(FluxoCaixa.usuario_id)
+        .filter(
+            FluxoCaixa.tenant_id == _tenant_uuid(tenant_id),
+            FluxoCaixa.data_movimentacao >= desde,
+        )
+        .distinct()
+        .all()
+    ]
+    atualizados = 0
+    for usuario_id in usuarios:
+        if projetar_fluxo_15_dias(usuario_id, db, tenant_id=tenant_id) is not None:
+            atualizados += 1
+    return atualizados
+
+
 def obter_projecoes_proximos_dias(
     usuario_id: int,
     dias: int = 15,
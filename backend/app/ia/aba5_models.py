@@ -5,17 +5,21 @@ Modelos de banco de dados para:
 - FluxoCaixa: Histórico de movimentações
 - IndicesSaudeCaixa: Índices calculados (cache)
 - ProjecaoFluxoCaixa: Projeções futuras
+- ModeloFluxoCaixa: Parâmetros ajustados do previsor (por tenant/usuário)
 """
 
 from sqlalchemy import (
+    JSON,
     Column,
     Integer,
     Float,
     String,
+    Date,
     DateTime,
     Boolean,
     ForeignKey,
     Index,
+    UniqueConstraint,
 )
 from datetime import datetime
 
@@ -160,6 +164,32 @@ class ProjecaoFluxoCaixa(BaseTenantModel):
         return f"<ProjecaoFluxoCaixa {self.data_projetada.date()} saldo={self.saldo_estimado:.2f}>"
 
 
+class ModeloFluxoCaixa(BaseTenantModel):
+    """
+    Parâmetros do previsor de fluxo de caixa (Holt-Winters semanal) por usuário.
+
+    Ajustado uma vez e atualizado de forma incremental pelo job noturno; a
+    projeção de 15 dias só lê estes parâmetros, sem treinar modelo na requisição.
+    """
+
+    __tablename__ = "modelo_fluxo_caixa"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "usuario_id", name="uq_modelo_fluxo_caixa_tenant_usuario"
+        ),
+    )
+
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    parametros = Column(JSON, nullable=False)  # ParametrosPrevisor.para_dict()
+    ultimo_dia = Column(Date, nullable=False)  # último dia já incorporado
+    versao_modelo = Column(String(40), nullable=False)
+    ajustado_em = Column(DateTime, nullable=False)  # último ajuste completo
+    atualizado_ate = Column(DateTime, nullable=False)  # última atualização incremental
+
+    def __repr__(self):
+        return f"<ModeloFluxoCaixa usuario={self.usuario_id} ate={self.ultimo_dia}>"
+
+
 # ============================================================================
 # Esquema SQL (para criar manualmente se necessário)
 # ============================================================================
@@ -203,7 +203,7 @@ async def get_projecoes(
     "/projetar-15-dias/{usuario_id}",
     response_model=List[ProjecaoResponse],
     summary="Gerar projeção 15 dias",
-    description="Treina Prophet e projeta fluxo de caixa para próximos 15 dias",
+    description="Projeta fluxo de caixa para os próximos 15 dias (previsor semanal + contas em aberto)",
 )
 async def post_projetar_15_dias(
     usuario_id: int,
@@ -211,7 +211,8 @@ async def post_projetar_15_dias(
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
-    Calcula projeção de 15 dias usando Prophet.
+    Calcula projeção de 15 dias com o previsor semanal (parâmetros atualizados
+    pelo job noturno) somado às contas a receber/pagar que vencem no período.
 
     ⚠️ **Requer mínimo 10 dias de dados históricos**
 
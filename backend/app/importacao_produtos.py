@@ -5,18 +5,26 @@ Permite criar/atualizar produtos em lote
 
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func
 from sqlalchemy.orm import Session as DBSession
 from io import BytesIO
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from datetime import datetime
 import logging
+import os
+import shutil
+import tempfile
+import threading
 
 from app.db import get_session
 from app.auth import get_current_user_and_tenant
-from app.produtos_models import Produto, Categoria, Marca
-from app.services.produto_service import normalizar_sku_produto
+from app.importacao_produtos_models import ImportacaoProdutos
+from app.services.produto_importacao_planilha import (
+    estimar_total_linhas,
+    extensao_aceita,
+    importacao_interrompida,
+    processar_importacao_produtos_background,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -303,330 +311,130 @@ async def baixar_template_importacao(
         raise HTTPException(status_code=500, detail=f"Erro ao gerar template: {str(e)}")
 
 
+def _resumo_importacao(importacao: ImportacaoProdutos) -> dict:
+    processadas = int(importacao.linhas_processadas or 0)
+    total = importacao.total_linhas
+    total_erros = int(importacao.total_erros or 0)
+    status = importacao.status
+    erro = importacao.erro_mensagem
+    if importacao_interrompida(importacao):
+        # A consulta so le: quem ve a importacao parada recebe "erro" com o que
+        # ja foi gravado; os blocos commitados ficam, reimportar e seguro
+        status = "erro"
+        erro = (
+            f"Importação interrompida após {processadas} linhas processadas. "
+            "Importe a planilha novamente para concluir."
+        )
+    if status == "concluido":
+        progresso = 100.0
+    elif total:
+        progresso = round(min(processadas / total, 1) * 100, 1)
+    else:
+        progresso = 0.0
+    return {
+        "importacao_id": importacao.id,
+        "status": status,
+        "arquivo": importacao.arquivo_nome,
+        "total_linhas": total,
+        "progresso": progresso,
+        "total_processado": processadas,
+        "total_sucesso": max(processadas - total_erros, 0),
+        "total_erros": total_erros,
+        "total_criados": int(importacao.criados or 0),
+        "total_atualizados": int(importacao.atualizados or 0),
+        "mensagem": (
+            f"Importação concluída: {max(processadas - total_erros, 0)} sucesso, "
+            f"{total_erros} erros"
+            if status == "concluido"
+            else None
+        ),
+        # Planilhas grandes: so as primeiras linhas com erro ficam registradas
+        "detalhes": {
+            "criados": [],
+            "atualizados": [],
+            "erros": importacao.erros or [],
+        },
+        "erro": erro,
+    }
+
+
 @router.post("/importar")
-async def importar_produtos(
+def importar_produtos(
     file: UploadFile = File(...),
     session: DBSession = Depends(get_session),
     user_and_tenant=Depends(get_current_user_and_tenant),
 ):
     """
-    Importa produtos de planilha Excel.
-    Cria novos produtos ou atualiza existentes baseado no SKU.
+    Recebe a planilha (Excel ou CSV) e importa em segundo plano.
+    Cria novos produtos ou atualiza existentes baseado no SKU; o progresso e os
+    erros por linha ficam em GET /produtos/importacoes/{importacao_id}.
     """
     current_user, tenant_id = user_and_tenant
 
-    if not file.filename.endswith((".xlsx", ".xls")):
+    if not extensao_aceita(file.filename):
         raise HTTPException(
-            status_code=400, detail="Arquivo deve ser Excel (.xlsx ou .xls)"
+            status_code=400, detail="Arquivo deve ser Excel (.xlsx ou .xls) ou CSV"
         )
 
-    try:
-        # Ler arquivo Excel
-        contents = await file.read()
-        wb = openpyxl.load_workbook(BytesIO(contents), data_only=True)
-        ws = wb.active
-
-        resultados = {
-            "sucesso": [],
-            "erros": [],
-            "atualizados": [],
-            "criados": [],
-            "total_linhas": 0,
-        }
-
-        # Cache para categorias e marcas
-        categorias_cache = {}
-        marcas_cache = {}
-
-        # Processar linhas (pular cabeçalho e instruções)
-        for row_num in range(3, ws.max_row + 1):
-            resultados["total_linhas"] += 1
-
-            try:
-                # Ler valores da linha
-                sku = ws.cell(row_num, 1).value
-                nome = ws.cell(row_num, 2).value
-                descricao = ws.cell(row_num, 3).value
-                categoria_nome = ws.cell(row_num, 4).value
-                marca_nome = ws.cell(row_num, 5).value
-                fornecedor_nome = ws.cell(row_num, 6).value
-                codigo_barras = ws.cell(row_num, 7).value
-                preco_custo = ws.cell(row_num, 8).value
-                preco_venda = ws.cell(row_num, 9).value
-                estoque_inicial = ws.cell(row_num, 10).value
-                estoque_minimo = ws.cell(row_num, 11).value
-                estoque_maximo = ws.cell(row_num, 12).value
-                unidade = ws.cell(row_num, 13).value or "UN"
-                localizacao = ws.cell(row_num, 14).value
-                status_texto = ws.cell(row_num, 15).value or "ativo"
-                situacao = (
-                    str(status_texto).lower().strip() == "ativo"
-                )  # Converter para boolean
-                ativo = situacao
-
-                # Dados fiscais/tributários
-                ncm = ws.cell(row_num, 16).value
-                cest = ws.cell(row_num, 17).value
-                cfop = ws.cell(row_num, 18).value
-                origem = ws.cell(row_num, 19).value
-                icms_aliquota = ws.cell(row_num, 20).value
-                pis_aliquota = ws.cell(row_num, 21).value
-                cofins_aliquota = ws.cell(row_num, 22).value
-                observacoes = ws.cell(row_num, 23).value
-
-                # Validar campos obrigatórios
-                if not sku or not nome or preco_venda is None:
-                    resultados["erros"].append(
-                        {
-                            "linha": row_num,
-                            "sku": sku,
-                            "erro": "Campos obrigatórios faltando (SKU, Nome ou Preço Venda)",
-                        }
-                    )
-                    continue
-
-                # Converter tipos (suporte para vírgula e ponto como separador decimal)
-                try:
-                    # Função helper para converter strings com vírgula ou ponto
-                    def converter_float(valor):
-                        if valor is None or valor == "":
-                            return 0
-                        # Se for número, retorna direto
-                        if isinstance(valor, (int, float)):
-                            return float(valor)
-                        # Se for string, substitui vírgula por ponto
-                        return float(str(valor).replace(",", "."))
-
-                    preco_custo = converter_float(preco_custo)
-                    preco_venda = converter_float(preco_venda)
-                    estoque_inicial = int(estoque_inicial) if estoque_inicial else 0
-                    estoque_minimo = int(estoque_minimo) if estoque_minimo else 0
-                    estoque_maximo = int(estoque_maximo) if estoque_maximo else 0
-
-                    # Converter alíquotas tributárias também
-                    icms_aliquota = (
-                        converter_float(icms_aliquota) if icms_aliquota else None
-                    )
-                    pis_aliquota = (
-                        converter_float(pis_aliquota) if pis_aliquota else None
-                    )
-                    cofins_aliquota = (
-                        converter_float(cofins_aliquota) if cofins_aliquota else None
-                    )
-                except ValueError as e:
-                    resultados["erros"].append(
-                        {
-                            "linha": row_num,
-                            "sku": sku,
-                            "erro": f"Erro ao converter números: {str(e)}",
-                        }
-                    )
-                    continue
-
-                # Buscar ou criar categoria
-                categoria_id = None
-                if categoria_nome:
-                    if categoria_nome in categorias_cache:
-                        categoria_id = categorias_cache[categoria_nome]
-                    else:
-                        categoria = (
-                            session.query(Categoria)
-                            .filter(
-                                Categoria.nome.ilike(categoria_nome),
-                                Categoria.tenant_id == tenant_id,
-                            )
-                            .first()
-                        )
-
-                        if not categoria:
-                            categoria = Categoria(
-                                nome=categoria_nome, tenant_id=tenant_id
-                            )
-                            session.add(categoria)
-                            session.flush()
-
-                        categoria_id = categoria.id
-                        categorias_cache[categoria_nome] = categoria_id
-
-                # Buscar ou criar marca
-                marca_id = None
-                if marca_nome:
-                    if marca_nome in marcas_cache:
-                        marca_id = marcas_cache[marca_nome]
-                    else:
-                        marca = (
-                            session.query(Marca)
-                            .filter(
-                                Marca.nome.ilike(marca_nome),
-                                Marca.tenant_id == tenant_id,
-                            )
-                            .first()
-                        )
-
-                        if not marca:
-                            marca = Marca(nome=marca_nome, tenant_id=tenant_id)
-                            session.add(marca)
-                            session.flush()
-
-                        marca_id = marca.id
-                        marcas_cache[marca_nome] = marca_id
-
-                # Buscar fornecedor (obrigatório se fornecido)
-                fornecedor_id = None
-                if fornecedor_nome:
-                    from app.models import Cliente
-
-                    fornecedor = (
-                        session.query(Cliente)
-                        .filter(
-                            Cliente.nome.ilike(fornecedor_nome),
-                            Cliente.tenant_id == tenant_id,
-                        )
-                        .first()
-                    )
-
-                    if not fornecedor:
-                        resultados["erros"].append(
-                            {
-                                "linha": row_num,
-                                "sku": sku,
-                                "erro": f'Fornecedor "{fornecedor_nome}" não encontrado no sistema',
-                            }
-                        )
-                        continue
-
-                    fornecedor_id = fornecedor.id
-
-                # Verificar se produto já existe (por SKU ou código)
-                sku_normalizado = normalizar_sku_produto(sku)
-
-                produto = (
-                    session.query(Produto)
-                    .filter(
-                        Produto.tenant_id == tenant_id,
-                        func.lower(func.trim(Produto.codigo))
-                        == sku_normalizado.lower(),
-                    )
-                    .first()
-                )
-
-                if produto:
-                    # ATUALIZAR produto existente
-                    produto.codigo = sku_normalizado
-                    produto.nome = nome
-                    produto.descricao_curta = descricao
-                    produto.categoria_id = categoria_id
-                    produto.marca_id = marca_id
-                    produto.fornecedor_id = fornecedor_id
-                    produto.codigo_barras = codigo_barras
-                    produto.preco_custo = preco_custo
-                    produto.preco_venda = preco_venda
-                    produto.estoque_minimo = estoque_minimo
-                    produto.estoque_maximo = estoque_maximo
-                    produto.unidade = unidade
-                    produto.localizacao = localizacao
-                    produto.situacao = situacao
-                    produto.ativo = ativo
-                    if not ativo:
-                        produto.anunciar_ecommerce = False
-                        produto.anunciar_app = False
-                    produto.informacoes_adicionais_nf = observacoes
-
-                    # Campos tributários
-                    if ncm:
-                        produto.ncm = str(ncm).strip()
-                    if cest:
-                        produto.cest = str(cest).strip()
-                    if cfop:
-                        produto.cfop = str(cfop).strip()
-                    if origem is not None:
-                        produto.origem = str(origem).strip()
-                    if icms_aliquota is not None:
-                        produto.aliquota_icms = icms_aliquota
-                    if pis_aliquota is not None:
-                        produto.aliquota_pis = pis_aliquota
-                    if cofins_aliquota is not None:
-                        produto.aliquota_cofins = cofins_aliquota
-
-                    resultados["atualizados"].append(
-                        {"linha": row_num, "sku": sku, "nome": nome, "id": produto.id}
-                    )
-                else:
-                    # CRIAR novo produto
-                    produto = Produto(
-                        tenant_id=tenant_id,
-                        codigo=sku_normalizado,
-                        nome=nome,
-                        descricao_curta=descricao,
-                        categoria_id=categoria_id,
-                        marca_id=marca_id,
-                        fornecedor_id=fornecedor_id,
-                        codigo_barras=codigo_barras,
-                        preco_custo=preco_custo,
-                        preco_venda=preco_venda,
-                        estoque_atual=estoque_inicial,
-                        estoque_minimo=estoque_minimo,
-                        estoque_maximo=estoque_maximo,
-                        unidade=unidade,
-                        localizacao=localizacao,
-                        situacao=situacao,
-                        ativo=ativo,
-                        anunciar_ecommerce=ativo,
-                        anunciar_app=ativo,
-                        informacoes_adicionais_nf=observacoes,
-                        # Campos tributários
-                        ncm=str(ncm).strip() if ncm else None,
-                        cest=str(cest).strip() if cest else None,
-                        cfop=str(cfop).strip() if cfop else None,
-                        origem=str(origem).strip() if origem is not None else None,
-                        aliquota_icms=icms_aliquota,
-                        aliquota_pis=pis_aliquota,
-                        aliquota_cofins=cofins_aliquota,
-                    )
-                    session.add(produto)
-
-                    resultados["criados"].append(
-                        {"linha": row_num, "sku": sku, "nome": nome}
-                    )
-
-                resultados["sucesso"].append(
-                    {"linha": row_num, "sku": sku, "nome": nome}
-                )
-
-            except Exception as e:
-                logger.error(f"Erro na linha {row_num}: {e}")
-                resultados["erros"].append(
-                    {
-                        "linha": row_num,
-                        "sku": sku if "sku" in locals() else "N/A",
-                        "erro": str(e),
-                    }
-                )
-
-        # Commit no banco
-        session.commit()
-
-        # Commit da transação
-        session.commit()
-
-        # Resumo detalhado
-        resumo = {
-            "total_processado": resultados["total_linhas"],
-            "total_sucesso": len(resultados["sucesso"]),
-            "total_erros": len(resultados["erros"]),
-            "total_criados": len(resultados["criados"]),
-            "total_atualizados": len(resultados["atualizados"]),
-            "mensagem": f"Importação concluída: {len(resultados['sucesso'])} sucesso, {len(resultados['erros'])} erros",
-            "produtos_criados": resultados["criados"],
-            "produtos_atualizados": resultados["atualizados"],
-            "produtos_com_erro": resultados["erros"],
-        }
-
-        return resumo
+    sufixo = os.path.splitext(file.filename)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=sufixo) as destino:
+        shutil.copyfileobj(file.file, destino)
+        caminho_arquivo = destino.name
 
+    try:
+        with open(caminho_arquivo, "rb") as arquivo:
+            total_linhas = estimar_total_linhas(arquivo, file.filename)
     except Exception as e:
-        session.rollback()
-        logger.error(f"Erro ao importar produtos: {e}")
+        os.unlink(caminho_arquivo)
+        logger.error(f"Erro ao ler planilha de produtos: {e}")
         raise HTTPException(
-            status_code=500, detail=f"Erro ao processar planilha: {str(e)}"
+            status_code=400, detail=f"Erro ao processar planilha: {str(e)}"
         )
+
+    importacao = ImportacaoProdutos(
+        tenant_id=tenant_id,
+        usuario_id=current_user.id,
+        arquivo_nome=file.filename[:255],
+        status="processando",
+        total_linhas=total_linhas,
+        linhas_processadas=0,
+        criados=0,
+        atualizados=0,
+        total_erros=0,
+    )
+    session.add(importacao)
+    session.commit()
+
+    threading.Thread(
+        target=processar_importacao_produtos_background,
+        kwargs={
+            "importacao_id": importacao.id,
+            "tenant_id": tenant_id,
+            "caminho_arquivo": caminho_arquivo,
+        },
+        daemon=True,
+    ).start()
+
+    return _resumo_importacao(importacao)
+
+
+@router.get("/importacoes/{importacao_id}")
+def status_importacao_produtos(
+    importacao_id: int,
+    session: DBSession = Depends(get_session),
+    user_and_tenant=Depends(get_current_user_and_tenant),
+):
+    """Progresso e erros por linha de uma importacao de produtos."""
+    current_user, tenant_id = user_and_tenant
+
+    importacao = (
+        session.query(ImportacaoProdutos)
+        .filter(
+            ImportacaoProdutos.id == importacao_id,
+            ImportacaoProdutos.tenant_id == tenant_id,
+        )
+        .first()
+    )
+    if not importacao:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return _resumo_importacao(importacao)
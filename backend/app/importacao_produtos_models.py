@@ -0,0 +1,30 @@
+"""Acompanhamento das importacoes de produtos por planilha."""
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
+
+from app.base_models import BaseTenantModel
+
+
+class ImportacaoProdutos(BaseTenantModel):
+    """Uma planilha de produtos importada em segundo plano.
+
+    O progresso e os erros por linha ficam aqui para o front consultar em
+    ``GET /produtos/importacoes/{id}``; ``erros`` guarda so as primeiras linhas
+    com problema (``total_erros`` tem a contagem completa).
+    """
+
+    __tablename__ = "importacoes_produtos"
+
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    arquivo_nome = Column(String(255), nullable=False)
+    status = Column(
+        String(20), nullable=False, default="processando"
+    )  # processando, concluido, erro
+    total_linhas = Column(Integer, nullable=True)  # estimativa para o progresso
+    linhas_processadas = Column(Integer, nullable=False, default=0)
+    criados = Column(Integer, nullable=False, default=0)
+    atualizados = Column(Integer, nullable=False, default=0)
+    total_erros = Column(Integer, nullable=False, default=0)
+    erros = Column(JSON, nullable=True)
+    erro_mensagem = Column(Text, nullable=True)
+    concluido_em = Column(DateTime, nullable=True)
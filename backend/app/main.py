@@ -6,6 +6,7 @@ FastAPI + SQLAlchemy + SQLite/PostgreSQL
 import app.database.orm_guards  # ORM Guards: forca IDs=None antes do flush
 
 import logging
+from functools import partial
 from pathlib import Path, PurePosixPath
 
 from fastapi import FastAPI
@@ -15,11 +16,11 @@ from slowapi.util import get_remote_address
 from starlette.responses import Response
 
 from app.config import SYSTEM_NAME, SYSTEM_VERSION, settings
+from app.db.async_route_guard import warn_async_routes_with_sync_session
 from app.main_basic_routes import register_basic_routes
 from app.main_http import (
     configure_middlewares,
     register_exception_handlers,
-    register_proxy_headers_middleware,
 )
 from app.main_lifecycle import on_shutdown, on_startup
 from app.utils.logger import configure_logging
@@ -40,6 +41,8 @@ import app.models_configuracao_custo_moto  # noqa: F401 - custos da moto
 import app.pendencia_estoque_models  # noqa: F401 - lista de espera
 import app.ia.aba7_extrato_models  # noqa: F401 - modelos IA/DRE
 import app.ia.aba7_models  # noqa: F401 - modelos DRE
+import app.dre_canais.models  # noqa: F401 - fatos diarios da DRE por canal
+import app.pessoa_duplicidade_models  # noqa: F401 - indice de duplicidade de pessoas
 
 # WHATSAPP + IA - NOVOS MODELOS (Sprint 2)
 import app.whatsapp.models  # noqa: F401 - modelos WhatsApp IA
@@ -78,7 +81,6 @@ app = FastAPI(
     version=SYSTEM_VERSION,
 )
 
-register_proxy_headers_middleware(app)
 configure_middlewares(app, limiter)
 register_exception_handlers(app)
 
@@ -120,6 +122,7 @@ register_routers(app)
 # ============================================================================
 
 app.on_event("startup")(on_startup)
+app.on_event("startup")(partial(warn_async_routes_with_sync_session, app))
 app.on_event("shutdown")(on_shutdown)
 
 # ============================================================================
@@ -4,6 +4,7 @@ import logging
 import os
 import threading
 import time
+from datetime import datetime, timedelta
 from tempfile import gettempdir
 from typing import Optional
 
@@ -28,6 +29,11 @@ _estoque_validade_stop_event = threading.Event()
 _estoque_validade_thread: Optional[threading.Thread] = None
 ESTOQUE_VALIDADE_INTERVALO_SEGUNDOS = 6 * 60 * 60  # 6 horas
 
+# Previsor do fluxo de caixa (ABA 5) — atualização noturna dos parâmetros
+_fluxo_caixa_previsor_stop_event = threading.Event()
+_fluxo_caixa_previsor_thread: Optional[threading.Thread] = None
+FLUXO_CAIXA_PREVISOR_HORA_PADRAO = 3  # horário local do servidor
+
 _vet_evidence_stop_event = threading.Event()
 _vet_evidence_thread: Optional[threading.Thread] = None
 _vet_regulatory_stop_event = threading.Event()
@@ -36,6 +42,12 @@ _vet_regulatory_thread: Optional[threading.Thread] = None
 _ifood_orders_stop_event = threading.Event()
 _ifood_orders_thread: Optional[threading.Thread] = None
 
+# WhatsApp — worker da fila persistente de mensagens recebidas
+_whatsapp_inbound_stop_event = threading.Event()
+_whatsapp_inbound_thread: Optional[threading.Thread] = None
+WHATSAPP_INBOUND_INTERVALO_SEGUNDOS = 1
+WHATSAPP_INBOUND_RETRY_SEGUNDOS = 30  # apos falha geral (ex.: banco fora)
+
 # SEFAZ — sincronização automática de NF-e por NSU
 _sefaz_sync_stop_event = threading.Event()
 _sefaz_sync_thread: Optional[threading.Thread] = None
@@ -144,6 +156,34 @@ def _loop_ifood_order_polling() -> None:
     logger.info("[IFOOD] Polling de pedidos finalizado.")
 
 
+def _loop_whatsapp_inbound_queue() -> None:
+    """Drena a fila de mensagens recebidas do WhatsApp num event loop proprio."""
+    import asyncio
+
+    from app.db import SessionLocal
+    from app.whatsapp.inbound_queue import InboundMessageWorker
+
+    worker = InboundMessageWorker(SessionLocal)
+    loop = asyncio.new_event_loop()
+    logger.info("[WHATSAPP] Worker da fila de entrada iniciado.")
+    try:
+        while not _whatsapp_inbound_stop_event.is_set():
+            intervalo = WHATSAPP_INBOUND_INTERVALO_SEGUNDOS
+            try:
+                stats = loop.run_until_complete(worker.run_once())
+                # Com conversas processadas no ciclo, ja tenta o proximo lote
+                if stats.get("conversations"):
+                    continue
+            except Exception:
+                logger.exception("[WHATSAPP] Falha no ciclo da fila de entrada")
+                intervalo = WHATSAPP_INBOUND_RETRY_SEGUNDOS
+            if _whatsapp_inbound_stop_event.wait(intervalo):
+                break
+    finally:
+        loop.close()
+    logger.info("[WHATSAPP] Worker da fila de entrada finalizado.")
+
+
 def _bling_recarregar_tokens_do_env():
     """Relê o access_token e refresh_token do .env e atualiza os.environ."""
     import os as _os
@@ -538,6 +578,76 @@ def _loop_estoque_validade():
     logger.info("[VALIDADE] Job de protecao de estoque finalizado (PID %s)", worker_pid)
 
 
+def _segundos_ate_proxima_execucao(
+    hora: int, agora: Optional[datetime] = None
+) -> float:
+    """Segundos até a próxima ocorrência de ``hora``:00 (hoje ou amanhã)."""
+    agora = agora or datetime.now()
+    alvo = agora.replace(hour=hora, minute=0, second=0, microsecond=0)
+    if alvo <= agora:
+        alvo += timedelta(days=1)
+    return (alvo - agora).total_seconds()
+
+
+def _run_fluxo_caixa_previsor_once() -> int:
+    """Atualiza o previsor e as projeções de 15 dias de todos os tenants ativos."""
+    from uuid import UUID
+
+    from app.db import SessionLocal
+    from app.ia.aba5_fluxo_caixa_parts.projecoes import atualizar_projecoes_tenant
+    from app.models import Tenant
+    from app.tenancy.context import clear_current_tenant, set_current_tenant
+
+    db = SessionLocal()
+    total = 0
+    try:
+        tenants = db.query(Tenant).filter(Tenant.status == "active").all()
+        for tenant in tenants:
+            try:
+                set_current_tenant(UUID(str(tenant.id)))
+                total += atualizar_projecoes_tenant(db, str(tenant.id))
+            except Exception as exc_tenant:
+                db.rollback()
+                logger.warning(
+                    "[FLUXO-PREVISOR] Erro ao processar tenant %s: %s",
+                    str(getattr(tenant, "id", ""))[:8],
+                    exc_tenant,
+                )
+            finally:
+                clear_current_tenant()
+        return total
+    finally:
+        clear_current_tenant()
+        db.close()
+
+
+def _loop_fluxo_caixa_previsor() -> None:
+    """Job noturno: atualização incremental do previsor de fluxo de caixa."""
+    try:
+        hora = int(
+            os.getenv("FLUXO_CAIXA_PREVISOR_HORA") or FLUXO_CAIXA_PREVISOR_HORA_PADRAO
+        )
+    except (TypeError, ValueError):
+        hora = FLUXO_CAIXA_PREVISOR_HORA_PADRAO
+    hora = min(max(hora, 0), 23)
+    logger.info("[FLUXO-PREVISOR] Job noturno iniciado (todo dia as %02dh).", hora)
+
+    while not _fluxo_caixa_previsor_stop_event.wait(
+        _segundos_ate_proxima_execucao(hora)
+    ):
+        try:
+            total = _run_fluxo_caixa_previsor_once()
+            logger.info(
+                "[FLUXO-PREVISOR] %s projecao(oes) de usuario atualizada(s).", total
+            )
+        except Exception:
+            logger.exception(
+                "[FLUXO-PREVISOR] Falha geral; as projecoes anteriores continuam validas."
+            )
+
+    logger.info("[FLUXO-PREVISOR] Job noturno finalizado.")
+
+
 def _vet_evidence_sync_config() -> tuple[int, int, int]:
     """Return safe startup delay, interval and import limit for evidence sync."""
 
@@ -764,6 +874,18 @@ def start_background_jobs() -> None:
                 "[JOBS] Protecao de estoque por validade desativada neste processo."
             )
 
+        if _env_bool("FLUXO_CAIXA_PREVISOR_ENABLED", True):
+            global _fluxo_caixa_previsor_thread
+            _fluxo_caixa_previsor_stop_event.clear()
+            _fluxo_caixa_previsor_thread = threading.Thread(
+                target=_loop_fluxo_caixa_previsor,
+                name="fluxo-caixa-previsor",
+                daemon=True,
+            )
+            _fluxo_caixa_previsor_thread.start()
+        else:
+            logger.info("[JOBS] Previsor noturno de fluxo de caixa desativado.")
+
         if _env_bool("VET_EVIDENCE_SYNC_ENABLED", False):
             global _vet_evidence_thread
             _vet_evidence_stop_event.clear()
@@ -806,6 +928,18 @@ def start_background_jobs() -> None:
         else:
             logger.info("[JOBS] Polling de pedidos iFood desativado neste processo.")
 
+        if _env_bool("WHATSAPP_INBOUND_QUEUE_ENABLED", True):
+            global _whatsapp_inbound_thread
+            _whatsapp_inbound_stop_event.clear()
+            _whatsapp_inbound_thread = threading.Thread(
+                target=_loop_whatsapp_inbound_queue,
+                name="whatsapp-inbound-queue",
+                daemon=True,
+            )
+            _whatsapp_inbound_thread.start()
+        else:
+            logger.info("[JOBS] Fila de entrada do WhatsApp desativada neste processo.")
+
         global _sefaz_sync_thread
         _sefaz_sync_stop_event.clear()
         _sefaz_sync_thread = threading.Thread(
@@ -862,6 +996,12 @@ def stop_background_jobs() -> None:
         _estoque_validade_thread.join(timeout=2)
     _estoque_validade_thread = None
 
+    global _fluxo_caixa_previsor_thread
+    _fluxo_caixa_previsor_stop_event.set()
+    if _fluxo_caixa_previsor_thread and _fluxo_caixa_previsor_thread.is_alive():
+        _fluxo_caixa_previsor_thread.join(timeout=2)
+    _fluxo_caixa_previsor_thread = None
+
     global _vet_evidence_thread
     _vet_evidence_stop_event.set()
     if _vet_evidence_thread and _vet_evidence_thread.is_alive():
@@ -880,4 +1020,10 @@ def stop_background_jobs() -> None:
         _ifood_orders_thread.join(timeout=2)
     _ifood_orders_thread = None
 
+    global _whatsapp_inbound_thread
+    _whatsapp_inbound_stop_event.set()
+    if _whatsapp_inbound_thread and _whatsapp_inbound_thread.is_alive():
+        _whatsapp_inbound_thread.join(timeout=2)
+    _whatsapp_inbound_thread = None
+
     _release_background_jobs_leader()
@@ -11,49 +11,25 @@ from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
 from app.config import ALLOWED_ORIGINS
-from app.middlewares.rate_limit import RateLimitMiddleware
-from app.middlewares.request_context import RequestContextMiddleware, get_request_id
-from app.middlewares.request_logging import RequestLoggingMiddleware
-from app.middlewares.security_audit import SecurityAuditMiddleware
-from app.middlewares.security_headers import SecurityHeadersMiddleware
-from app.middlewares.tenant_middleware import TenantSecurityMiddleware
+from app.middlewares.request_context import get_request_id
+from app.middlewares.request_pipeline import RequestPipelineMiddleware
 from app.security.error_sanitization import (
     internal_error_payload,
     is_strict_runtime_environment,
     sanitize_validation_errors,
 )
-from app.security.client_ip import is_trusted_proxy
-from app.tenancy.context import TenantContextMiddleware
-from app.tenancy.middleware import TenancyMiddleware
 
 logger = logging.getLogger(__name__)
 
 
-def register_proxy_headers_middleware(app: FastAPI) -> None:
-    """Register proxy header handling for HTTPS redirects behind nginx."""
-
-    @app.middleware("http")
-    async def proxy_headers_middleware(request: Request, call_next):
-        peer_ip = request.client.host if request.client else None
-        if (
-            is_trusted_proxy(peer_ip)
-            and request.headers.get("X-Forwarded-Proto") == "https"
-        ):
-            request.scope["scheme"] = "https"
-        response = await call_next(request)
-        return response
-
-
 def configure_middlewares(app: FastAPI, limiter) -> None:
-    """Register global middlewares in the established execution order."""
-    app.add_middleware(RequestContextMiddleware)
-    app.add_middleware(SecurityAuditMiddleware)
-    app.add_middleware(RequestLoggingMiddleware)
-    app.add_middleware(RateLimitMiddleware)
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(TenantContextMiddleware)
-    app.add_middleware(TenantSecurityMiddleware)
-    app.add_middleware(TenancyMiddleware)
+    """Register global middlewares in the established execution order.
+
+    Proxy headers, tenant security, rate limit, security headers, audit,
+    logging and request context run inside the single ASGI pipeline; see
+    ``app/middlewares/request_pipeline.py`` for the step order.
+    """
+    app.add_middleware(RequestPipelineMiddleware)
 
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
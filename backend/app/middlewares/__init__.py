@@ -5,8 +5,10 @@ Middlewares do Sistema Pet Shop Pro
 Este módulo contém middlewares customizados para o FastAPI:
 
 - TenantSecurityMiddleware: Validação global de tenant_id em requests autenticadas
+- RequestPipelineMiddleware: Pipeline ASGI único com todas as etapas HTTP globais
 """
 
+from .request_pipeline import RequestPipelineMiddleware
 from .tenant_middleware import TenantSecurityMiddleware
 
-__all__ = ["TenantSecurityMiddleware"]
+__all__ = ["RequestPipelineMiddleware", "TenantSecurityMiddleware"]
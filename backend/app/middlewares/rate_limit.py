@@ -12,7 +12,7 @@ CONFIGURAÇÃO:
 """
 
 import time
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request
 from fastapi.responses import JSONResponse
@@ -150,6 +150,42 @@ rate_limit_store = RateLimitStore()
 # ============================================================================
 
 
+def resolve_rate_limit(path: str) -> Optional[Tuple[int, int]]:
+    """Retorna (max_requests, window) aplicavel ao path, ou None se isento."""
+    # Excluir rotas explicitamente
+    if any(path.startswith(excluded) for excluded in EXCLUDED_ROUTES):
+        return None
+
+    # Rotas de autenticação (limite restritivo)
+    if any(path.startswith(auth_route) for auth_route in AUTH_ROUTES):
+        return RATE_LIMIT_AUTH_MAX, RATE_LIMIT_AUTH_WINDOW
+
+    # Rotas de API (limite normal)
+    if any(path.startswith(api_route) for api_route in API_ROUTES):
+        return RATE_LIMIT_API_MAX, RATE_LIMIT_API_WINDOW
+
+    # Sem rate limit para outras rotas
+    return None
+
+
+def rate_limit_exceeded_response(max_requests: int, window: int) -> JSONResponse:
+    """Resposta 429 padrao do rate limit por IP."""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "rate_limit_exceeded",
+            "message": f"Limite de {max_requests} requisições por minuto excedido. Aguarde e tente novamente.",
+            "retry_after": window,
+        },
+        headers={
+            "Retry-After": str(window),
+            "X-RateLimit-Limit": str(max_requests),
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(int(time.time()) + window),
+        },
+    )
+
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
     Middleware de rate limiting por IP com limites diferenciados.
@@ -162,54 +198,22 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     """
 
     async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-
-        # Excluir rotas explicitamente
-        if any(path.startswith(excluded) for excluded in EXCLUDED_ROUTES):
-            return await call_next(request)
-
-        # Determinar tipo de rota e limites
-        max_requests = None
-        window = None
-
-        # Rotas de autenticação (limite restritivo)
-        if any(path.startswith(auth_route) for auth_route in AUTH_ROUTES):
-            max_requests = RATE_LIMIT_AUTH_MAX
-            window = RATE_LIMIT_AUTH_WINDOW
-
-        # Rotas de API (limite normal)
-        elif any(path.startswith(api_route) for api_route in API_ROUTES):
-            max_requests = RATE_LIMIT_API_MAX
-            window = RATE_LIMIT_API_WINDOW
-
-        # Sem rate limit para outras rotas
-        if max_requests is None:
+        limit = resolve_rate_limit(request.url.path)
+        if limit is None:
             return await call_next(request)
+        max_requests, window = limit
 
         # Extrair IP do cliente
         client_ip = get_client_ip(request) or "unknown"
 
         # Verificar limite
         is_allowed, remaining = rate_limit_store.check_limit(
-            client_ip, path, max_requests, window
+            client_ip, request.url.path, max_requests, window
         )
 
         if not is_allowed:
             # Rate limit excedido - retornar 429
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "error": "rate_limit_exceeded",
-                    "message": f"Limite de {max_requests} requisições por minuto excedido. Aguarde e tente novamente.",
-                    "retry_after": window,
-                },
-                headers={
-                    "Retry-After": str(window),
-                    "X-RateLimit-Limit": str(max_requests),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(time.time()) + window),
-                },
-            )
+            return rate_limit_exceeded_response(max_requests, window)
 
         # Request permitida - processar
         response = await call_next(request)
@@ -180,27 +180,8 @@ class RequestContextMiddleware(BaseHTTPMiddleware):
         if request.scope.get("type") == "websocket":
             return await call_next(request)
 
-        # ============================================================
-        # 1️⃣ GERAR OU OBTER REQUEST_ID
-        # ============================================================
-
-        # Tentar obter request_id seguro de header (cliente pode enviar)
-        request_id = normalize_request_id(request.headers.get("X-Request-ID"))
-
-        # Propagar via contextvars
-        set_request_id(request_id)
-        set_trace_id(request_id)
-
-        # ============================================================
-        # 2️⃣ CAPTURAR METADATA DA REQUEST
-        # ============================================================
-
-        method = request.method
-        path = request.url.path
-
-        # Propagar metadata via contextvars
-        set_request_metadata(method, path)
-        set_endpoint(path)
+        # 1️⃣ + 2️⃣ REQUEST_ID E METADATA PROPAGADOS VIA CONTEXTVARS
+        request_id, method, path = begin_request_context(request)
 
         # Timestamp de início (para calcular duração)
         start_time = time.time()
@@ -215,39 +196,9 @@ class RequestContextMiddleware(BaseHTTPMiddleware):
             # Calcular duração (em milissegundos)
             duration_ms = round((time.time() - start_time) * 1000, 2)
 
-            # ============================================================
             # 4️⃣ LOGGING ESTRUTURADO (sem dados sensíveis)
-            # ============================================================
-
-            # Determinar nivel de log baseado no status e lentidao.
-            if response.status_code >= 500:
-                log_level = logging.ERROR
-            elif response.status_code >= 400:
-                log_level = logging.WARNING
-            elif duration_ms >= SLOW_REQUEST_LOG_MS:
-                log_level = logging.WARNING
-            else:
-                log_level = logging.DEBUG
-
-            # Log estruturado com contexto completo
-            logger.log(
-                log_level,
-                "Request completed",
-                extra={
-                    "request_id": request_id,
-                    "method": method,
-                    "path": path,
-                    "status_code": response.status_code,
-                    "duration_ms": duration_ms,
-                    "client_ip": request.client.host if request.client else None,
-                    "user_agent": request.headers.get("user-agent", "unknown")[
-                        :100
-                    ],  # Truncado
-                },
-            )
-
-            record_request_event(
-                request=request,
+            log_request_completed(
+                request,
                 request_id=request_id,
                 method=method,
                 path=path,
@@ -266,31 +217,13 @@ class RequestContextMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # Em caso de exceção, ainda logar com contexto
             duration_ms = round((time.time() - start_time) * 1000, 2)
-
-            strict_runtime = is_strict_runtime_environment()
-            exception_message = None if strict_runtime else str(e)[:200]
-
-            logger.error(
-                f"Request failed with exception: {type(e).__name__}",
-                extra={
-                    "request_id": request_id,
-                    "method": method,
-                    "path": path,
-                    "duration_ms": duration_ms,
-                    "exception_type": type(e).__name__,
-                    "exception_message": exception_message,
-                },
-                exc_info=not strict_runtime,
-            )
-
-            record_request_event(
-                request=request,
+            log_request_failed(
+                request,
                 request_id=request_id,
                 method=method,
                 path=path,
                 duration_ms=duration_ms,
-                exception_type=type(e).__name__,
-                exception_message=exception_message,
+                exc=e,
             )
 
             raise  # Re-raise para FastAPI lidar
@@ -300,8 +233,120 @@ class RequestContextMiddleware(BaseHTTPMiddleware):
             # 6️⃣ LIMPAR CONTEXTO APÓS REQUEST
             # ============================================================
 
-            clear_request_context()
-            clear_log_context()
+            end_request_context()
+
+
+def begin_request_context(request: Request) -> tuple[str, str, str]:
+    """
+    Gera/aceita o request_id e propaga request_id, método e path via contextvars.
+
+    Returns:
+        (request_id, method, path)
+    """
+    # Tentar obter request_id seguro de header (cliente pode enviar)
+    request_id = normalize_request_id(request.headers.get("X-Request-ID"))
+
+    # Propagar via contextvars
+    set_request_id(request_id)
+    set_trace_id(request_id)
+
+    method = request.method
+    path = request.url.path
+
+    # Propagar metadata via contextvars
+    set_request_metadata(method, path)
+    set_endpoint(path)
+    return request_id, method, path
+
+
+def end_request_context() -> None:
+    """Limpa contextvars de request e de log ao final da request."""
+    clear_request_context()
+    clear_log_context()
+
+
+def log_request_completed(
+    request: Request,
+    *,
+    request_id: str,
+    method: str,
+    path: str,
+    status_code: int,
+    duration_ms: float,
+) -> None:
+    """Log estruturado + evento de erro/lentidão de uma request concluída."""
+    # Determinar nivel de log baseado no status e lentidao.
+    if status_code >= 500:
+        log_level = logging.ERROR
+    elif status_code >= 400:
+        log_level = logging.WARNING
+    elif duration_ms >= SLOW_REQUEST_LOG_MS:
+        log_level = logging.WARNING
+    else:
+        log_level = logging.DEBUG
+
+    # Log estruturado com contexto completo
+    logger.log(
+        log_level,
+        "Request completed",
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "client_ip": request.client.host if request.client else None,
+            "user_agent": request.headers.get("user-agent", "unknown")[
+                :100
+            ],  # Truncado
+        },
+    )
+
+    record_request_event(
+        request=request,
+        request_id=request_id,
+        method=method,
+        path=path,
+        status_code=status_code,
+        duration_ms=duration_ms,
+    )
+
+
+def log_request_failed(
+    request: Request,
+    *,
+    request_id: str,
+    method: str,
+    path: str,
+    duration_ms: float,
+    exc: Exception,
+) -> None:
+    """Log estruturado + evento de erro de uma request que levantou exceção."""
+    strict_runtime = is_strict_runtime_environment()
+    exception_message = None if strict_runtime else str(exc)[:200]
+
+    logger.error(
+        f"Request failed with exception: {type(exc).__name__}",
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "duration_ms": duration_ms,
+            "exception_type": type(exc).__name__,
+            "exception_message": exception_message,
+        },
+        exc_info=(type(exc), exc, exc.__traceback__) if not strict_runtime else False,
+    )
+
+    record_request_event(
+        request=request,
+        request_id=request_id,
+        method=method,
+        path=path,
+        duration_ms=duration_ms,
+        exception_type=type(exc).__name__,
+        exception_message=exception_message,
+    )
 
 
 # ============================================================================
@@ -26,6 +26,38 @@ SLOW_REQUEST_LOG_MS = _env_int("REQUEST_LOGGING_SLOW_MS", 3000)
 QUIET_PATHS = {"/health", "/health/watchdog"}
 
 
+def log_http_request(
+    *,
+    method: str,
+    path: str,
+    status_code: int,
+    duration_ms: float,
+    request_id: str | None,
+    client_ip: str | None,
+) -> None:
+    """Loga a request no logger estruturado, silenciando health checks."""
+    if path in QUIET_PATHS and status_code < 500:
+        return
+
+    if status_code >= 500:
+        log_method = logger.error
+    elif status_code >= 400 or duration_ms >= SLOW_REQUEST_LOG_MS:
+        log_method = logger.warning
+    else:
+        log_method = logger.debug
+
+    log_method(
+        event="http_request",
+        message=f"{method} {path}",
+        method=method,
+        path=path,
+        status_code=status_code,
+        duration_ms=duration_ms,
+        request_id=request_id,
+        client_ip=client_ip,
+    )
+
+
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware para logging estruturado de requests HTTP"""
 
@@ -39,28 +71,12 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         # Calcular tempo de resposta (em ms)
         duration_ms = round((time.time() - start_time) * 1000, 2)
 
-        path = request.url.path
-        status_code = response.status_code
-        request_id = get_request_id() or response.headers.get("X-Request-ID")
-
-        if path in QUIET_PATHS and status_code < 500:
-            return response
-
-        if status_code >= 500:
-            log_method = logger.error
-        elif status_code >= 400 or duration_ms >= SLOW_REQUEST_LOG_MS:
-            log_method = logger.warning
-        else:
-            log_method = logger.debug
-
-        log_method(
-            event="http_request",
-            message=f"{request.method} {path}",
+        log_http_request(
             method=request.method,
-            path=path,
-            status_code=status_code,
+            path=request.url.path,
+            status_code=response.status_code,
             duration_ms=duration_ms,
-            request_id=request_id,
+            request_id=get_request_id() or response.headers.get("X-Request-ID"),
             client_ip=request.client.host if request.client else None,
         )
 
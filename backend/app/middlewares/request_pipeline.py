@@ -0,0 +1,204 @@
+"""
+Pipeline HTTP ASGI
+==================
+
+Substitui a pilha de oito ``BaseHTTPMiddleware`` (cada uma criava uma task e
+um memory stream por request) por um unico middleware ASGI puro que executa
+as mesmas etapas, na mesma ordem efetiva da pilha antiga (externa -> interna):
+
+1. TenancyMiddleware         - limpa o tenant ao final da request
+2. TenantSecurityMiddleware  - bloqueia JWT sem tenant_id (401)
+3. TenantContextMiddleware   - limpa o tenant no inicio da request
+4. SecurityHeadersMiddleware - headers de seguranca (setdefault)
+5. RateLimitMiddleware       - 429 por IP + headers X-RateLimit-*
+6. RequestLoggingMiddleware  - log estruturado ``http_request``
+7. SecurityAuditMiddleware   - deteccao/log de padroes de ataque
+8. RequestContextMiddleware  - request_id, contextvars e X-Request-ID
+
+O tratamento de ``X-Forwarded-Proto`` vindo de proxy confiavel (antes um
+``@app.middleware("http")``) tambem roda aqui.
+
+O bearer token e decodificado uma unica vez; os claims ficam em
+``scope["state"]`` para as dependencies (``app/security/request_claims.py``).
+"""
+
+from __future__ import annotations
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.rate_limit import (
+    rate_limit_exceeded_response,
+    rate_limit_store,
+    resolve_rate_limit,
+)
+from app.middlewares.request_context import (
+    begin_request_context,
+    end_request_context,
+    log_request_completed,
+    log_request_failed,
+)
+from app.middlewares.request_logging import log_http_request
+from app.middlewares.security_audit import audit_request_security
+from app.middlewares.security_headers import apply_security_headers
+from app.middlewares.tenant_middleware import (
+    _extract_bearer_token,
+    log_unexpected_tenant_error,
+    tenant_token_rejection,
+)
+from app.security.client_ip import get_client_ip, is_trusted_proxy
+from app.security.jwt_compat import JWTError
+from app.security.request_claims import decode_access_claims, store_request_claims
+from app.tenancy.context import clear_current_tenant
+
+
+def _apply_forwarded_proto(scope: Scope) -> None:
+    client = scope.get("client")
+    peer_ip = client[0] if client else None
+    if not is_trusted_proxy(peer_ip):
+        return
+    for name, value in scope.get("headers") or ():
+        if name == b"x-forwarded-proto":
+            if value == b"https":
+                scope["scheme"] = "https"
+            return
+
+
+def _decode_bearer_claims(scope: Scope, request: Request) -> dict | None:
+    token = _extract_bearer_token(request)
+    if not token:
+        return None
+    try:
+        claims = decode_access_claims(token)
+    except JWTError:
+        # Token invalido segue para as dependencies devolverem o erro oficial.
+        claims = None
+    store_request_claims(scope, token, claims)
+    return claims
+
+
+class RequestPipelineMiddleware:
+    """Middleware ASGI unico com as etapas HTTP globais da aplicacao."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._tenant_security(scope, receive, send)
+        finally:
+            # Garantir limpeza do contexto ao final do request
+            clear_current_tenant()
+
+    async def _tenant_security(self, scope: Scope, receive: Receive, send: Send):
+        _apply_forwarded_proto(scope)
+        request = Request(scope, receive)
+        path = request.url.path
+
+        claims = _decode_bearer_claims(scope, request)
+        rejection = tenant_token_rejection(path, claims)
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+
+        try:
+            clear_current_tenant()
+            await self._rate_limited(scope, receive, send, request, path)
+        except Exception as exc:
+            log_unexpected_tenant_error(exc, path)
+            raise
+
+    async def _rate_limited(
+        self, scope: Scope, receive: Receive, send: Send, request: Request, path: str
+    ) -> None:
+        scheme = scope.get("scheme", "http")
+
+        async def send_with_security_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                apply_security_headers(MutableHeaders(scope=message), scheme)
+            await send(message)
+
+        rate_headers = None
+        limit = resolve_rate_limit(path)
+        if limit is not None:
+            max_requests, window = limit
+            is_allowed, remaining = rate_limit_store.check_limit(
+                get_client_ip(request) or "unknown", path, max_requests, window
+            )
+            if not is_allowed:
+                response = rate_limit_exceeded_response(max_requests, window)
+                await response(scope, receive, send_with_security_headers)
+                return
+            rate_headers = (str(max_requests), str(remaining))
+
+        audit_request_security(request)
+        await self._observed(
+            scope, receive, send_with_security_headers, request, rate_headers
+        )
+
+    async def _observed(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        request: Request,
+        rate_headers: tuple[str, str] | None,
+    ) -> None:
+        request_id, method, path = begin_request_context(request)
+        start_time = time.time()
+        status_code: int | None = None
+        duration_ms = 0.0
+
+        async def send_observed(message: Message) -> None:
+            nonlocal status_code, duration_ms
+            if message["type"] == "http.response.start":
+                # Mesmo ponto de medicao do call_next: headers prontos.
+                duration_ms = round((time.time() - start_time) * 1000, 2)
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                if rate_headers is not None:
+                    headers["X-RateLimit-Limit"] = rate_headers[0]
+                    headers["X-RateLimit-Remaining"] = rate_headers[1]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        except Exception as exc:
+            log_request_failed(
+                request,
+                request_id=request_id,
+                method=method,
+                path=path,
+                duration_ms=round((time.time() - start_time) * 1000, 2),
+                exc=exc,
+            )
+            raise
+        else:
+            if status_code is None:
+                return
+            log_request_completed(
+                request,
+                request_id=request_id,
+                method=method,
+                path=path,
+                status_code=status_code,
+                duration_ms=duration_ms,
+            )
+            log_http_request(
+                method=method,
+                path=path,
+                status_code=status_code,
+                duration_ms=duration_ms,
+                request_id=request_id,
+                client_ip=request.client.host if request.client else None,
+            )
+        finally:
+            end_request_context()
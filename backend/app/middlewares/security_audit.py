@@ -164,6 +164,80 @@ class AttackDetector:
 # ============================================================================
 
 
+def audit_request_security(request: Request) -> None:
+    """Escaneia query params e path da request e loga ataques detectados."""
+    # Extrair dados da requisição
+    path = request.url.path
+    query_params = dict(request.query_params)
+    client_ip = request.client.host if request.client else "unknown"
+
+    # Escanear query parameters
+    attacks_found = []
+    for param_name, param_value in query_params.items():
+        if param_value:
+            # URL decode para detectar payloads encoded
+            decoded_value = unquote(str(param_value))
+
+            # Detectar ataques
+            attacks = AttackDetector.scan(decoded_value)
+
+            if attacks:
+                attacks_found.extend(
+                    [
+                        {
+                            "type": attack_type,
+                            "pattern": pattern,
+                            "param": param_name,
+                            "value": decoded_value[:100],  # Limitar tamanho do log
+                        }
+                        for attack_type, pattern in attacks
+                    ]
+                )
+
+    # Escanear path parameters (ex: /user/../../etc/passwd)
+    decoded_path = unquote(path)
+    path_attacks = AttackDetector.scan(decoded_path)
+    if path_attacks:
+        attacks_found.extend(
+            [
+                {
+                    "type": attack_type,
+                    "pattern": pattern,
+                    "param": "path",
+                    "value": decoded_path[:100],
+                }
+                for attack_type, pattern in path_attacks
+            ]
+        )
+
+    # Logar ataques detectados
+    if attacks_found:
+        logger.warning(
+            f"🚨 SECURITY ALERT: {len(attacks_found)} attack(s) detected",
+            extra={
+                "security_event": True,
+                "client_ip": client_ip,
+                "path": path,
+                "method": request.method,
+                "attacks": attacks_found,
+                "user_agent": request.headers.get("user-agent", ""),
+            },
+        )
+
+        # Log estruturado para SIEM
+        from app.utils.logger import logger as structured_logger
+
+        structured_logger.warning(
+            event="security_attack_detected",
+            message=f"Detected {len(attacks_found)} potential attack(s)",
+            client_ip=client_ip,
+            path=path,
+            method=request.method,
+            attacks=attacks_found,
+            user_agent=request.headers.get("user-agent", ""),
+        )
+
+
 class SecurityAuditMiddleware(BaseHTTPMiddleware):
     """
     Middleware que detecta e loga tentativas de ataque.
@@ -175,76 +249,7 @@ class SecurityAuditMiddleware(BaseHTTPMiddleware):
     """
 
     async def dispatch(self, request: Request, call_next):
-        # Extrair dados da requisição
-        path = request.url.path
-        query_params = dict(request.query_params)
-        client_ip = request.client.host if request.client else "unknown"
-
-        # Escanear query parameters
-        attacks_found = []
-        for param_name, param_value in query_params.items():
-            if param_value:
-                # URL decode para detectar payloads encoded
-                decoded_value = unquote(str(param_value))
-
-                # Detectar ataques
-                attacks = AttackDetector.scan(decoded_value)
-
-                if attacks:
-                    attacks_found.extend(
-                        [
-                            {
-                                "type": attack_type,
-                                "pattern": pattern,
-                                "param": param_name,
-                                "value": decoded_value[:100],  # Limitar tamanho do log
-                            }
-                            for attack_type, pattern in attacks
-                        ]
-                    )
-
-        # Escanear path parameters (ex: /user/../../etc/passwd)
-        decoded_path = unquote(path)
-        path_attacks = AttackDetector.scan(decoded_path)
-        if path_attacks:
-            attacks_found.extend(
-                [
-                    {
-                        "type": attack_type,
-                        "pattern": pattern,
-                        "param": "path",
-                        "value": decoded_path[:100],
-                    }
-                    for attack_type, pattern in path_attacks
-                ]
-            )
-
-        # Logar ataques detectados
-        if attacks_found:
-            logger.warning(
-                f"🚨 SECURITY ALERT: {len(attacks_found)} attack(s) detected",
-                extra={
-                    "security_event": True,
-                    "client_ip": client_ip,
-                    "path": path,
-                    "method": request.method,
-                    "attacks": attacks_found,
-                    "user_agent": request.headers.get("user-agent", ""),
-                },
-            )
-
-            # Log estruturado para SIEM
-            from app.utils.logger import logger as structured_logger
-
-            structured_logger.warning(
-                event="security_attack_detected",
-                message=f"Detected {len(attacks_found)} potential attack(s)",
-                client_ip=client_ip,
-                path=path,
-                method=request.method,
-                attacks=attacks_found,
-                user_agent=request.headers.get("user-agent", ""),
-            )
+        audit_request_security(request)
 
         # Continuar processamento (Pydantic vai rejeitar se inválido)
         response = await call_next(request)
@@ -1,10 +1,38 @@
 """HTTP security headers for browser-facing routes."""
 
+from starlette.datastructures import MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 from fastapi import Request
 
 
+SECURITY_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "0"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    (
+        "Permissions-Policy",
+        "camera=(), microphone=(), geolocation=(self), payment=(self)",
+    ),
+    (
+        "Content-Security-Policy",
+        "base-uri 'self'; object-src 'none'; frame-ancestors 'none'; "
+        "form-action 'self'; upgrade-insecure-requests",
+    ),
+)
+HSTS_HEADER = ("Strict-Transport-Security", "max-age=31536000; includeSubDomains")
+
+
+def apply_security_headers(headers: MutableHeaders, scheme: str) -> None:
+    """Add default security headers without overriding route-specific values."""
+    for name, value in SECURITY_HEADERS:
+        headers.setdefault(name, value)
+
+    if scheme == "https":
+        headers.setdefault(*HSTS_HEADER)
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         try:
@@ -14,25 +42,6 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 return Response(status_code=204)
             raise
 
-        response.headers.setdefault("X-Content-Type-Options", "nosniff")
-        response.headers.setdefault("X-Frame-Options", "DENY")
-        response.headers.setdefault("X-XSS-Protection", "0")
-        response.headers.setdefault(
-            "Referrer-Policy", "strict-origin-when-cross-origin"
-        )
-        response.headers.setdefault(
-            "Permissions-Policy",
-            "camera=(), microphone=(), geolocation=(self), payment=(self)",
-        )
-        response.headers.setdefault(
-            "Content-Security-Policy",
-            "base-uri 'self'; object-src 'none'; frame-ancestors 'none'; "
-            "form-action 'self'; upgrade-insecure-requests",
-        )
-
-        if request.url.scheme == "https":
-            response.headers.setdefault(
-                "Strict-Transport-Security", "max-age=31536000; includeSubDomains"
-            )
+        apply_security_headers(response.headers, request.url.scheme)
 
         return response
@@ -65,6 +65,56 @@ def _extract_bearer_token(request: Request) -> str | None:
     return token.strip()
 
 
+def tenant_token_rejection(path: str, payload: dict | None) -> JSONResponse | None:
+    """
+    Valida os claims de um bearer token para o path da request.
+
+    Retorna a resposta 401 quando o token valido nao traz tenant_id, ou None
+    quando a request pode seguir. Token invalido (payload None) segue para as
+    dependencies devolverem o erro oficial.
+    """
+    if payload is None or _is_tenant_exempt_path(path):
+        return None
+
+    # O administrador global nao pertence a um tenant. Ele so pode
+    # atravessar esta camada nas rotas exclusivas do CorePet Ops;
+    # as dependencies dessas rotas ainda validam sessao, tipo e JTI.
+    if _is_platform_admin_request(path, payload):
+        return None
+
+    tenant_id = payload.get("tenant_id")
+    try:
+        if not tenant_id:
+            raise ValueError("tenant_id ausente")
+        UUID(str(tenant_id))
+    except (TypeError, ValueError):
+        logger.warning(
+            "[TenantSecurityMiddleware] Bloqueando JWT sem tenant_id valido em %s",
+            path,
+        )
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={
+                "detail": "Tenant nao selecionado. Use /auth/select-tenant.",
+            },
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return None
+
+
+def log_unexpected_tenant_error(exc: Exception, path: str) -> None:
+    logger.error(
+        "[TenantSecurityMiddleware] Erro inesperado: type=%s path=%s",
+        type(exc).__name__,
+        path,
+        exc_info=(
+            (type(exc), exc, exc.__traceback__)
+            if not is_strict_runtime_environment()
+            else False
+        ),
+    )
+
+
 class TenantSecurityMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         try:
@@ -76,47 +126,17 @@ class TenantSecurityMiddleware(BaseHTTPMiddleware):
                     # Token invalido continua para as dependencies devolverem o erro oficial.
                     return await call_next(request)
 
-                # O administrador global nao pertence a um tenant. Ele so pode
-                # atravessar esta camada nas rotas exclusivas do CorePet Ops;
-                # as dependencies dessas rotas ainda validam sessao, tipo e JTI.
-                if _is_platform_admin_request(request.url.path, payload):
-                    return await call_next(request)
-
-                tenant_id = payload.get("tenant_id")
-                try:
-                    if not tenant_id:
-                        raise ValueError("tenant_id ausente")
-                    UUID(str(tenant_id))
-                except (TypeError, ValueError):
-                    logger.warning(
-                        "[TenantSecurityMiddleware] Bloqueando JWT sem tenant_id valido em %s",
-                        request.url.path,
-                    )
-                    return JSONResponse(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        content={
-                            "detail": "Tenant nao selecionado. Use /auth/select-tenant.",
-                        },
-                        headers={"WWW-Authenticate": "Bearer"},
-                    )
+                rejection = tenant_token_rejection(request.url.path, payload)
+                if rejection is not None:
+                    return rejection
 
             return await call_next(request)
 
         except RuntimeError as e:
             if str(e) == "No response returned." and await request.is_disconnected():
                 return Response(status_code=status.HTTP_204_NO_CONTENT)
-            logger.error(
-                "[TenantSecurityMiddleware] Erro inesperado: type=%s path=%s",
-                type(e).__name__,
-                request.url.path,
-                exc_info=not is_strict_runtime_environment(),
-            )
+            log_unexpected_tenant_error(e, request.url.path)
             raise
         except Exception as e:
-            logger.error(
-                "[TenantSecurityMiddleware] Erro inesperado: type=%s path=%s",
-                type(e).__name__,
-                request.url.path,
-                exc_info=not is_strict_runtime_environment(),
-            )
+            log_unexpected_tenant_error(e, request.url.path)
             raise
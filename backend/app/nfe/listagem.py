@@ -57,10 +57,10 @@ from app.nfe.listagem_cache import (
     _NFE_LIST_CACHE_SECONDS,
     _cache_key_detalhe_nfe,
     _cache_key_listar_nfes,
-    _nfe_detail_cache,
-    _nfe_list_cache,
     _obter_detalhe_nfe_cache,
+    _obter_listagem_nfes_cache,
     _salvar_detalhe_nfe_cache,
+    _salvar_listagem_nfes_cache,
 )
 from app.nfe.listagem_detalhes import (
     _buscar_venda_por_nfe_bling_id,
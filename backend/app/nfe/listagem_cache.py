@@ -1,5 +1,7 @@
 from copy import deepcopy
-from time import monotonic
+from time import time
+
+from app.cache.cache_manager import cache
 
 
 _NFE_LIST_CACHE_SECONDS = 45
@@ -8,10 +10,11 @@ _NFE_LIST_CACHE_SECONDS = 45
 _NFE_DETAIL_CACHE_SECONDS = 600
 
 
-_nfe_list_cache: dict[tuple[str, str, str, str], dict] = {}
+# Namespaces no cache compartilhado (app.cache.cache_manager)
+_NFE_LIST_NAMESPACE = "nfe_listagem"
 
 
-_nfe_detail_cache: dict[tuple[str, str, str], dict] = {}
+_NFE_DETAIL_NAMESPACE = "nfe_detalhe"
 
 
 def _cache_key_listar_nfes(
@@ -35,21 +38,56 @@ def _cache_key_detalhe_nfe(
     )
 
 
-def _obter_detalhe_nfe_cache(tenant_id, nfe_id: int, modelo: int | None = None):
-    cache_key = _cache_key_detalhe_nfe(tenant_id, nfe_id, modelo)
-    cache_atual = _nfe_detail_cache.get(cache_key)
+def _obter_listagem_nfes_cache(
+    tenant_id, data_inicial: str | None, data_final: str | None, situacao: str | None
+) -> tuple[dict, int] | None:
+    """Payload da listagem em cache e sua idade em segundos."""
+    cache_atual = cache.get(
+        _NFE_LIST_NAMESPACE,
+        _cache_key_listar_nfes(tenant_id, data_inicial, data_final, situacao),
+        tenant_id=tenant_id,
+    )
     if not cache_atual:
         return None
-    if (monotonic() - cache_atual.get("ts_monotonic", 0)) > _NFE_DETAIL_CACHE_SECONDS:
-        _nfe_detail_cache.pop(cache_key, None)
-        return None
-    return deepcopy(cache_atual.get("payload"))
+    idade = int(max(time() - cache_atual.get("ts", 0), 0))
+    return deepcopy(cache_atual.get("payload", {})), idade
+
+
+def _salvar_listagem_nfes_cache(
+    tenant_id,
+    data_inicial: str | None,
+    data_final: str | None,
+    situacao: str | None,
+    payload: dict,
+) -> None:
+    # A listagem traz as vendas locais: venda finalizada/cancelada invalida
+    cache.set(
+        _NFE_LIST_NAMESPACE,
+        _cache_key_listar_nfes(tenant_id, data_inicial, data_final, situacao),
+        {"ts": time(), "payload": deepcopy(payload)},
+        ttl=_NFE_LIST_CACHE_SECONDS,
+        tags=("nfe", "vendas"),
+        tenant_id=tenant_id,
+    )
+
+
+def _obter_detalhe_nfe_cache(tenant_id, nfe_id: int, modelo: int | None = None):
+    payload = cache.get(
+        _NFE_DETAIL_NAMESPACE,
+        _cache_key_detalhe_nfe(tenant_id, nfe_id, modelo),
+        tenant_id=tenant_id,
+    )
+    return deepcopy(payload) if payload else None
 
 
 def _salvar_detalhe_nfe_cache(
     tenant_id, nfe_id: int, modelo: int | None, payload: dict
 ) -> None:
-    _nfe_detail_cache[_cache_key_detalhe_nfe(tenant_id, nfe_id, modelo)] = {
-        "ts_monotonic": monotonic(),
-        "payload": deepcopy(payload),
-    }
+    cache.set(
+        _NFE_DETAIL_NAMESPACE,
+        _cache_key_detalhe_nfe(tenant_id, nfe_id, modelo),
+        deepcopy(payload),
+        ttl=_NFE_DETAIL_CACHE_SECONDS,
+        tags=("nfe", f"nfe:{nfe_id}"),
+        tenant_id=tenant_id,
+    )
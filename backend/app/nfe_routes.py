@@ -2,9 +2,6 @@
 Rotas para gerenciamento de Notas Fiscais Eletrônicas
 """
 
-from copy import deepcopy
-from time import monotonic
-
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional
@@ -75,7 +72,6 @@ from app.nfe.listagem import (
     _inferir_canal_por_numero as _inferir_canal_por_numero,
     _label_codigo as _label_codigo,
     _list as _list,
-    _nfe_list_cache as _nfe_list_cache,
     _normalizar_detalhe_nota_bling as _normalizar_detalhe_nota_bling,
     _normalizar_item_nota as _normalizar_item_nota,
     _normalizar_nota_bling as _normalizar_nota_bling,
@@ -86,11 +82,13 @@ from app.nfe.listagem import (
     _nota_autorizada_bling as _nota_autorizada_bling,
     _nota_cancelada_bling as _nota_cancelada_bling,
     _obter_detalhe_nfe_cache as _obter_detalhe_nfe_cache,
+    _obter_listagem_nfes_cache as _obter_listagem_nfes_cache,
     _parse_data_referencia as _parse_data_referencia,
     _planejar_sincronizacao_bling_nfes as _planejar_sincronizacao_bling_nfes,
     _primeiro_preenchido as _primeiro_preenchido,
     _resumo_pedido_integrado as _resumo_pedido_integrado,
     _salvar_detalhe_nfe_cache as _salvar_detalhe_nfe_cache,
+    _salvar_listagem_nfes_cache as _salvar_listagem_nfes_cache,
     _separar_data_hora as _separar_data_hora,
     _sincronizar_cache_nfes_com_bling as _sincronizar_cache_nfes_com_bling,
     _sincronizar_fontes_locais_nfe_em_cache as _sincronizar_fontes_locais_nfe_em_cache,
@@ -337,21 +335,15 @@ async def listar_nfes(
     current_user, tenant_id = user_and_tenant
     bling_remoto_permitido = tenant_pode_usar_bling_global(tenant_id)
     fontes_permitidas = None if bling_remoto_permitido else FONTES_NFE_LOCAIS
-    cache_key = _cache_key_listar_nfes(tenant_id, data_inicial, data_final, situacao)
-    cache_atual = _nfe_list_cache.get(cache_key)
-    agora_cache = monotonic()
-
-    if (
-        not force_refresh
-        and cache_atual
-        and (agora_cache - cache_atual.get("ts_monotonic", 0))
-        <= _NFE_LIST_CACHE_SECONDS
-    ):
-        payload_cache = deepcopy(cache_atual.get("payload", {}))
+    cache_atual = (
+        None
+        if force_refresh
+        else _obter_listagem_nfes_cache(tenant_id, data_inicial, data_final, situacao)
+    )
+    if cache_atual:
+        payload_cache, idade_cache = cache_atual
         payload_cache["cache_utilizado"] = True
-        payload_cache["cache_idade_segundos"] = int(
-            max(agora_cache - cache_atual.get("ts_monotonic", 0), 0)
-        )
+        payload_cache["cache_idade_segundos"] = idade_cache
         return payload_cache
 
     estado_cache = obter_estado_cache_notas(
@@ -449,10 +441,7 @@ async def listar_nfes(
             },
         },
     }
-    _nfe_list_cache[cache_key] = {
-        "ts_monotonic": monotonic(),
-        "payload": deepcopy(payload),
-    }
+    _salvar_listagem_nfes_cache(tenant_id, data_inicial, data_final, situacao, payload)
     return payload
 
 
@@ -343,8 +343,14 @@ def validar_extrato(extrato: ExtratoOFX) -> Dict[str, any]:
         resultado["avisos"].append("Número da conta não identificado")
 
     # Verifica duplicatas de FITID
-    fitids = [t.fitid for t in extrato.transacoes if t.fitid]
-    duplicatas = set([f for f in fitids if fitids.count(f) > 1])
+    vistos = set()
+    duplicatas = set()
+    for t in extrato.transacoes:
+        if not t.fitid:
+            continue
+        if t.fitid in vistos:
+            duplicatas.add(t.fitid)
+        vistos.add(t.fitid)
     if duplicatas:
         resultado["avisos"].append(f"FITIDs duplicados: {len(duplicatas)}")
 
@@ -7,12 +7,13 @@ Versão: 1.0.0 (2026-02-14)
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 
-from .db import get_session
+from .db import get_async_session
 from .auth.dependencies import get_current_user_and_tenant
 from .produtos_models import Produto, Marca, Categoria
 from .vendas_models import VendaItem, Venda
@@ -99,7 +100,7 @@ async def verificar_alergia_produto(
     produto_id: int,
     cliente_id: int = Query(..., description="ID do cliente para verificar pets"),
     user_and_tenant=Depends(get_current_user_and_tenant),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """
     Verifica se produto contém alergenos para pets do cliente
@@ -110,7 +111,17 @@ async def verificar_alergia_produto(
 
     Uso no PDV: Chamar ao escanear produto no carrinho
     """
+    return await db.run_sync(
+        _verificar_alergia_produto, produto_id, cliente_id, user_and_tenant
+    )
+
 
+def _verificar_alergia_produto(
+    db: Session,
+    produto_id: int,
+    cliente_id: int,
+    user_and_tenant,
+):
     current_user, tenant_id = _validar_tenant_e_obter_usuario(user_and_tenant)
 
     # Buscar produto
@@ -206,7 +217,7 @@ async def obter_produtos_similares(
     produto_id: int,
     limite: int = Query(5, ge=1, le=20, description="Limite de sugestões"),
     user_and_tenant=Depends(get_current_user_and_tenant),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """
     Retorna produtos similares ao produto base
@@ -223,7 +234,17 @@ async def obter_produtos_similares(
     - Sugerir upgrade/downgrade de linha
     - Comparar preços
     """
+    return await db.run_sync(
+        _obter_produtos_similares, produto_id, limite, user_and_tenant
+    )
+
 
+def _obter_produtos_similares(
+    db: Session,
+    produto_id: int,
+    limite: int,
+    user_and_tenant,
+):
     current_user, tenant_id = _validar_tenant_e_obter_usuario(user_and_tenant)
 
     # Buscar produto base
@@ -342,7 +363,7 @@ async def obter_cross_sell(
     ),
     limite_por_produto: int = Query(3, ge=1, le=10),
     user_and_tenant=Depends(get_current_user_and_tenant),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """
     Sugestões de cross-sell baseadas em produtos do carrinho
@@ -355,7 +376,17 @@ async def obter_cross_sell(
 
     Uso no PDV: Mostrar sugestões ao adicionar item no carrinho
     """
+    return await db.run_sync(
+        _obter_cross_sell, produtos_carrinho, limite_por_produto, user_and_tenant
+    )
+
 
+def _obter_cross_sell(
+    db: Session,
+    produtos_carrinho: List[int],
+    limite_por_produto: int,
+    user_and_tenant,
+):
     current_user, tenant_id = _validar_tenant_e_obter_usuario(user_and_tenant)
 
     from datetime import datetime, timedelta
@@ -463,7 +494,7 @@ async def obter_produtos_complementares(
     produto_id: int,
     limite: int = Query(5, ge=1, le=10),
     user_and_tenant=Depends(get_current_user_and_tenant),
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """
     Retorna produtos complementares à ração (não baseado em vendas)
@@ -474,7 +505,17 @@ async def obter_produtos_complementares(
 
     Futuro: Personalizar com preferências do cliente
     """
+    return await db.run_sync(
+        _obter_produtos_complementares, produto_id, limite, user_and_tenant
+    )
 
+
+def _obter_produtos_complementares(
+    db: Session,
+    produto_id: int,
+    limite: int,
+    user_and_tenant,
+):
     current_user, tenant_id = _validar_tenant_e_obter_usuario(user_and_tenant)
 
     # Buscar produto base
@@ -0,0 +1,61 @@
+"""Indice de bloqueio da deteccao de pessoas duplicadas."""
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+from app.base_models import BaseTenantModel
+
+
+class PessoaChaveDuplicidade(BaseTenantModel):
+    """Chave normalizada de uma pessoa ativa (nome, documento, contato, fonetica).
+
+    Pessoas que compartilham ``(tipo, valor)`` no tenant sao candidatas a
+    duplicidade. Mantida pelo listener de ``app.services.pessoa_duplicate_index``.
+    """
+
+    __tablename__ = "pessoa_chaves_duplicidade"
+    __table_args__ = (
+        UniqueConstraint(
+            "cliente_id",
+            "tipo",
+            "valor",
+            name="uq_pessoa_chaves_duplicidade_cliente_tipo_valor",
+        ),
+        Index(
+            "ix_pessoa_chaves_duplicidade_tenant_tipo_valor",
+            "tenant_id",
+            "tipo",
+            "valor",
+        ),
+    )
+
+    cliente_id = Column(
+        Integer,
+        ForeignKey("clientes.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    tipo = Column(String(20), nullable=False)  # nome, cpf, cnpj, crmv, email, ...
+    valor = Column(String(255), nullable=False)
+
+
+class PessoaIndiceDuplicidade(BaseTenantModel):
+    """Marca de que o indice de chaves do tenant foi reconstruido por inteiro.
+
+    Sem ela o indice pode estar parcial (so as pessoas gravadas depois da
+    migracao passaram pelo listener) e as varreduras aguardam a reconstrucao.
+    """
+
+    __tablename__ = "pessoa_indices_duplicidade"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", name="uq_pessoa_indices_duplicidade_tenant"),
+    )
+
+    reconstruido_em = Column(DateTime(timezone=True), nullable=False)
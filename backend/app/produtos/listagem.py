@@ -13,6 +13,7 @@ from app.partner_utils import is_partner_owned
 from app.produtos_models import Produto, ProdutoFornecedor
 from app.produtos.search import (
     _build_produto_search_order_clause,
+    _produto_codigo_exato_condition,
     _produto_search_conditions,
     _produto_search_conditions_fast,
 )
@@ -65,15 +66,27 @@ def _montar_query_produtos_vendaveis(
         Produto.tipo_produto.in_(["SIMPLES", "VARIACAO", "KIT"]),
     )
 
-    if termo_busca:
-        search_conditions = (
-            _produto_search_conditions
-            if contar_total
-            else _produto_search_conditions_fast
-        )
-        for palavra in _palavras_busca_produto(termo_busca):
-            query = query.filter(search_conditions(palavra))
+    return _aplicar_busca_produtos(
+        query, termo_busca=termo_busca, busca_completa=contar_total
+    )
+
+
+def _aplicar_busca_produtos(
+    query: Any,
+    *,
+    termo_busca: Optional[str],
+    busca_completa: bool,
+) -> Any:
+    if not termo_busca:
+        return query
 
+    search_conditions = (
+        _produto_search_conditions
+        if busca_completa
+        else _produto_search_conditions_fast
+    )
+    for palavra in _palavras_busca_produto(termo_busca):
+        query = query.filter(search_conditions(palavra))
     return query
 
 
@@ -112,16 +125,9 @@ def _montar_query_listagem_produtos(
         else:
             query = query.filter(Produto.ativo.is_(False))
 
-    if termo_busca:
-        search_conditions = (
-            _produto_search_conditions
-            if busca_completa
-            else _produto_search_conditions_fast
-        )
-        for palavra in _palavras_busca_produto(termo_busca):
-            query = query.filter(search_conditions(palavra))
-
-    return query
+    return _aplicar_busca_produtos(
+        query, termo_busca=termo_busca, busca_completa=busca_completa
+    )
 
 
 def _load_options_listagem_produtos(
@@ -171,6 +177,32 @@ def _buscar_pagina_produtos_listagem(
     return [produto for produto in produtos if produto is not None], total, load_options
 
 
+def _buscar_produtos_por_codigo_barras(
+    query: Any,
+    codigo: str,
+    *,
+    limit: int,
+    incluir_imagens: bool = False,
+) -> list[Produto]:
+    """Atalho do PDV para codigo bipado: uma consulta por igualdade nos indices.
+
+    Roda antes da busca ILIKE/ordenacao por relevancia; lista vazia indica que o
+    chamador deve seguir para a busca completa.
+    """
+    load_options = _load_options_listagem_produtos(
+        incluir_imagens=incluir_imagens,
+        incluir_lotes=False,
+    )
+    produtos = (
+        query.filter(_produto_codigo_exato_condition(codigo))
+        .options(*load_options)
+        .order_by(Produto.nome.asc(), Produto.id.asc())
+        .limit(limit)
+        .all()
+    )
+    return [produto for produto in produtos if produto is not None]
+
+
 def _mapa_total_variacoes_por_pai(
     db: Session, produtos: list[Produto]
 ) -> dict[int, int]:
@@ -11,9 +11,11 @@ from app.db import get_session
 from app.partner_utils import get_all_accessible_tenant_ids
 from app.produtos.core import _normalizar_filtro_ativo_produtos
 from app.produtos.listagem import (
+    _aplicar_busca_produtos,
     _aplicar_filtro_fornecedor_produto,
     _aplicar_filtros_basicos_produtos,
     _buscar_pagina_produtos_listagem,
+    _buscar_produtos_por_codigo_barras,
     _enriquecer_produto_listagem,
     _expandir_produtos_listagem,
     _mapa_reservas_ativas_multitenant,
@@ -24,6 +26,7 @@ from app.produtos.listagem import (
     _resolver_fornecedor_ids_filtro_produto,
 )
 from app.produtos.schemas import ProdutosPaginadosResponse
+from app.produtos.search import _termo_codigo_barras
 from app.produtos.validade import _mapa_validade_proxima_produtos
 from app.produtos.validators import _validar_tenant_e_obter_usuario
 from app.security.permissions_decorator import require_permission
@@ -64,11 +67,12 @@ def listar_produtos_vendaveis(
     )
     termo_busca = (busca or "").strip()
 
-    # QUERY BASE - Produtos vendáveis (incluindo KIT)
+    # QUERY BASE - Produtos vendáveis (incluindo KIT); a busca textual entra
+    # depois do atalho de código de barras.
     query = _montar_query_produtos_vendaveis(
         db,
         tenant_id=tenant_id,
-        termo_busca=termo_busca,
+        termo_busca=None,
         contar_total=contar_total,
     )
 
@@ -96,15 +100,31 @@ def listar_produtos_vendaveis(
         filtro_por_grupo=filtro_fornecedor_por_grupo,
     )
 
-    produtos, total, _load_options = _buscar_pagina_produtos_listagem(
-        query,
-        termo_busca=termo_busca,
-        offset=offset,
-        page_size=page_size,
-        incluir_imagens=incluir_imagens,
-        incluir_lotes=False,
-        contar_total=contar_total,
-    )
+    # Código bipado no PDV: igualdade nos índices de código antes da busca fuzzy.
+    produtos = []
+    codigo_barras = _termo_codigo_barras(termo_busca) if offset == 0 else None
+    if codigo_barras:
+        produtos = _buscar_produtos_por_codigo_barras(
+            query,
+            codigo_barras,
+            limit=page_size,
+            incluir_imagens=incluir_imagens,
+        )
+        total = len(produtos)
+
+    if not produtos:
+        query = _aplicar_busca_produtos(
+            query, termo_busca=termo_busca, busca_completa=contar_total
+        )
+        produtos, total, _load_options = _buscar_pagina_produtos_listagem(
+            query,
+            termo_busca=termo_busca,
+            offset=offset,
+            page_size=page_size,
+            incluir_imagens=incluir_imagens,
+            incluir_lotes=False,
+            contar_total=contar_total,
+        )
 
     # Ordenação inteligente: prioriza match exato no código
 
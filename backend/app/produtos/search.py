@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 
-from sqlalchemy import case, func, or_
+from sqlalchemy import Text, and_, case, func, literal_column, or_
 
 from app.produtos_models import Categoria, Departamento, Marca, Produto
 
@@ -36,6 +36,16 @@ PRODUTO_EAN_SEARCH_COLUMNS = [
     ]
     if column is not None
 ]
+# Codigos so com digitos, colunas geradas pelo PostgreSQL (migration
+# zwu20261017a1) e indexadas com trigram: " <codigo> <codigo_barras> <gtin_ean>
+# <gtin_ean_tributario>" e os EANs alternativos. Ficam fora do modelo para que
+# nenhum INSERT/UPDATE do ORM tente grava-las.
+PRODUTO_CODIGOS_DIGITOS = literal_column("produtos.codigos_digitos", Text)
+PRODUTO_EANS_ALTERNATIVOS_DIGITOS = literal_column(
+    "produtos.codigos_alternativos_digitos", Text
+)
+# EAN-8, UPC-A (12), EAN-13 e DUN-14.
+CODIGO_BARRAS_TAMANHOS = frozenset({8, 12, 13, 14})
 
 
 def _build_produto_search_order_clause(termo_busca: Optional[str]):
@@ -69,10 +79,7 @@ def _build_produto_search_order_clause(termo_busca: Optional[str]):
         and _should_use_digit_fallback(termo)
     ):
         order_cases.append(
-            (
-                _digits_expr(PRODUTO_EAN_ALTERNATIVO_COLUMN).ilike(f"%{digitos}%"),
-                prioridade,
-            )
+            (PRODUTO_EANS_ALTERNATIVOS_DIGITOS.like(f"%{digitos}%"), prioridade)
         )
         prioridade += 1
 
@@ -117,8 +124,40 @@ def _should_use_digit_fallback(value: Optional[str]) -> bool:
     return bool(termo) and not any(ch.isalpha() for ch in termo)
 
 
-def _digits_expr(column):
-    return func.regexp_replace(func.coalesce(column, ""), "[^0-9]", "", "g")
+def _termo_codigo_barras(termo_busca: Optional[str]) -> Optional[str]:
+    """Retorna o termo quando ele tem cara de codigo bipado (so digitos, tamanho EAN)."""
+    termo = (termo_busca or "").strip()
+    if termo.isdigit() and len(termo) in CODIGO_BARRAS_TAMANHOS:
+        return termo
+    return None
+
+
+def _produto_codigo_exato_condition(codigo: str):
+    """Igualdade nos codigos indexados, para o atalho de leitura de codigo de barras.
+
+    Cada comparacao casa com um indice por tenant (``ux_produtos_tenant_codigo_lower``,
+    ``ix_produtos_tenant_codigo_barras`` e ``ix_produtos_tenant_gtin_*``). Os EANs
+    alternativos (lista JSON em texto) ficam de fora: um ``LIKE`` ali obrigaria a
+    varrer a tabela e eles continuam cobertos pela busca completa.
+
+    O indice do SKU e parcial (``WHERE codigo IS NOT NULL AND btrim(codigo) <> ''``)
+    e o planner so o usa se a consulta repetir o predicado: a igualdade em
+    ``lower(btrim(codigo))`` sozinha nao prova ``btrim(codigo) <> ''``. O ``''``
+    vai literal para a prova nao depender de parametro.
+    """
+    codigo_sku = Produto.codigo
+    return or_(
+        and_(
+            codigo_sku.isnot(None),
+            func.trim(codigo_sku) != literal_column("''"),
+            func.lower(func.trim(codigo_sku)) == codigo.lower(),
+        ),
+        *[
+            column == codigo
+            for column in PRODUTO_CODIGO_EXATO_COLUMNS
+            if column is not Produto.codigo
+        ],
+    )
 
 
 def _unaccent_text(column):
@@ -153,22 +192,21 @@ def _produto_search_conditions(palavra: str):
         digitos_pattern = f"%{digitos}%"
         conditions.extend(
             [
-                _digits_expr(Produto.codigo).ilike(digitos_pattern),
-                *[
-                    _digits_expr(column).ilike(digitos_pattern)
-                    for column in PRODUTO_EAN_SEARCH_COLUMNS
-                ],
+                PRODUTO_CODIGOS_DIGITOS.like(digitos_pattern),
+                PRODUTO_EANS_ALTERNATIVOS_DIGITOS.like(digitos_pattern),
             ]
         )
 
-        if PRODUTO_SKU_COLUMN is not None:
-            conditions.append(_digits_expr(PRODUTO_SKU_COLUMN).ilike(digitos_pattern))
-
     return or_(*conditions)
 
 
 def _produto_search_conditions_fast(palavra: str):
-    """Busca leve para PDV/autocomplete, sem unaccent nem joins por tecla."""
+    """Busca leve para PDV/autocomplete, sem unaccent nem joins por tecla.
+
+    Cada ramo do ``OR`` casa com um indice trigram da migration
+    zwu20261017a1 (nome, codigo, codigo de barras, GTINs, EANs alternativos e
+    as colunas de digitos); um ramo sem indice faria o planner varrer a tabela.
+    """
     termo = (palavra or "").strip()
     if not termo:
         return True
@@ -196,34 +234,13 @@ def _produto_search_conditions_fast(palavra: str):
 
     digitos = _only_digits(termo)
     if len(digitos) >= 4 and _should_use_digit_fallback(termo):
-        digits_prefix = f"{digitos}%"
-        digits_contains = f"%{digitos}%"
+        # Prefixo de qualquer codigo principal (cada um vem depois de um espaco)
+        # e trecho dos EANs alternativos, nas colunas geradas e indexadas.
         conditions.extend(
             [
-                Produto.codigo == termo,
-                *[
-                    column == termo
-                    for column in PRODUTO_EAN_SEARCH_COLUMNS
-                    if column is not PRODUTO_EAN_ALTERNATIVO_COLUMN
-                ],
-                _digits_expr(Produto.codigo).like(digits_prefix),
-                *[
-                    _digits_expr(column).like(digits_prefix)
-                    for column in PRODUTO_EAN_SEARCH_COLUMNS
-                    if column is not PRODUTO_EAN_ALTERNATIVO_COLUMN
-                ],
+                PRODUTO_CODIGOS_DIGITOS.like(f"% {digitos}%"),
+                PRODUTO_EANS_ALTERNATIVOS_DIGITOS.like(f"%{digitos}%"),
             ]
         )
-        if PRODUTO_EAN_ALTERNATIVO_COLUMN is not None:
-            conditions.append(
-                _digits_expr(PRODUTO_EAN_ALTERNATIVO_COLUMN).like(digits_contains)
-            )
-        if PRODUTO_SKU_COLUMN is not None:
-            conditions.extend(
-                [
-                    PRODUTO_SKU_COLUMN == termo,
-                    _digits_expr(PRODUTO_SKU_COLUMN).like(digits_prefix),
-                ]
-            )
 
     return or_(*conditions)
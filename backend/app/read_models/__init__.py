@@ -33,6 +33,7 @@ Read Models disponíveis:
    - produtos_comprados_juntos(): Market basket analysis
    - produtos_que_aparecem_juntos(): Pares frequentes
    - analise_cesta_venda(): Sugestões para uma venda específica
+   - sugestoes_para_cesta(): Sugestões para uma cesta em montagem (PDV)
 
 4. ClientesRecorrentesReadModel
    - clientes_recorrentes(): Clientes com múltiplas compras
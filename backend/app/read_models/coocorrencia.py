@@ -0,0 +1,374 @@
+"""
+Matriz de Co-ocorrência de Produtos
+===================================
+
+Estrutura incremental que alimenta o ProdutosCompradosJuntosReadModel.
+
+Em vez de varrer todos os ProdutoVendidoEvent a cada consulta, cada evento
+publicado atualiza uma matriz esparsa por tenant:
+
+    vizinhos[produto_a][produto_b] -> contagem, soma de valor, última vez,
+                                      score com decaimento, buckets diários
+
+Características:
+- Atualização O(itens da venda) por ProdutoVendidoEvent (handler do dispatcher)
+- Consulta O(vizinhos do produto) com heap de top-k
+- Decaimento exponencial por dia (meia-vida MEIA_VIDA_DIAS) via "forward
+  decay": o peso de um dia é 2^((dia - referência) / meia-vida), então o
+  ranking não precisa ser recalculado com o passar do tempo
+- Buckets diários (JANELA_DIAS) atendem o filtro `dias` das consultas
+- Vizinhos por produto limitados a MAX_VIZINHOS_POR_PRODUTO (remove o de
+  menor score), o que mantém consulta e memória limitadas
+
+Assim como os demais read models, NÃO persiste dados: a matriz é
+reconstruída a partir do histórico em memória do EventDispatcher.
+"""
+
+import heapq
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.events import EventDispatcher, ProdutoVendidoEvent
+
+logger = logging.getLogger(__name__)
+
+MEIA_VIDA_DIAS = 30
+JANELA_DIAS = 365
+MAX_VIZINHOS_POR_PRODUTO = 200
+MAX_CESTAS_RECENTES = 2048
+
+# Expoente máximo do peso antes de rebasear a referência (evita overflow)
+_MAX_EXPOENTE = 512
+
+
+class _Celula:
+    """Acumulador de um produto (ou de um par de produtos)."""
+
+    __slots__ = ("contagem", "soma_valor", "score", "ultima_vez", "buckets")
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma_valor = 0.0
+        self.score = 0.0
+        self.ultima_vez: Optional[datetime] = None
+        self.buckets: Dict[int, List[float]] = {}
+
+    def registrar(self, dia: int, valor: float, peso: float, quando: datetime):
+        self.contagem += 1
+        self.soma_valor += valor
+        self.score += peso
+        if self.ultima_vez is None or quando > self.ultima_vez:
+            self.ultima_vez = quando
+
+        bucket = self.buckets.get(dia)
+        if bucket is None:
+            limite = dia - JANELA_DIAS
+            for antigo in [d for d in self.buckets if d < limite]:
+                del self.buckets[antigo]
+            self.buckets[dia] = [1, valor]
+        else:
+            bucket[0] += 1
+            bucket[1] += valor
+
+    def na_janela(self, dia_inicio: Optional[int]) -> Tuple[int, float]:
+        """Retorna (contagem, soma_valor) a partir de dia_inicio (None = tudo)."""
+        if dia_inicio is None:
+            return self.contagem, self.soma_valor
+        contagem = 0
+        soma = 0.0
+        for dia, (qtd, valor) in self.buckets.items():
+            if dia >= dia_inicio:
+                contagem += qtd
+                soma += valor
+        return int(contagem), soma
+
+
+class _MatrizTenant:
+    """Matriz esparsa de um tenant."""
+
+    __slots__ = ("vizinhos", "produtos", "nomes", "cestas")
+
+    def __init__(self):
+        self.vizinhos: Dict[int, Dict[int, _Celula]] = {}
+        self.produtos: Dict[int, _Celula] = {}
+        self.nomes: Dict[int, Tuple[str, str]] = {}
+        self.cestas: "OrderedDict[int, Dict[int, ProdutoVendidoEvent]]" = OrderedDict()
+
+
+class MatrizCoocorrencia:
+    """
+    Matriz de co-ocorrência incremental (thread-safe).
+
+    Uso:
+    ```python
+    matriz = obter_matriz_coocorrencia()
+    matriz.vizinhos(user_id=1, produto_id=123, limit=5)
+    ```
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._tenants: Dict[int, _MatrizTenant] = {}
+        self._referencia: Optional[int] = None
+
+    # --------------------------------------------------------------
+    # Atualização
+    # --------------------------------------------------------------
+
+    def registrar_evento(self, evento: ProdutoVendidoEvent) -> None:
+        """
+        Handler de ProdutoVendidoEvent.
+
+        Cruza o produto com os itens já vistos na mesma venda. Eventos
+        repetidos (mesma venda e produto) são ignorados, o que torna o
+        handler seguro para replay das cestas recentes.
+        """
+        with self._lock:
+            tenant = self._tenants.setdefault(evento.user_id, _MatrizTenant())
+            cesta = tenant.cestas.get(evento.venda_id)
+            if cesta is None:
+                cesta = tenant.cestas[evento.venda_id] = {}
+                if len(tenant.cestas) > MAX_CESTAS_RECENTES:
+                    tenant.cestas.popitem(last=False)
+            elif evento.produto_id in cesta:
+                return
+
+            quando = evento.timestamp
+            dia = quando.date().toordinal()
+            peso = self._peso(dia)
+            produto_id = evento.produto_id
+            valor = float(evento.preco_total or 0)
+
+            tenant.nomes.setdefault(
+                produto_id, (evento.produto_nome, evento.tipo_produto)
+            )
+            tenant.produtos.setdefault(produto_id, _Celula()).registrar(
+                dia, valor, peso, quando
+            )
+            for outro_id, outro in cesta.items():
+                valor_outro = float(outro.preco_total or 0)
+                self._registrar_par(
+                    tenant, produto_id, outro_id, valor_outro, dia, peso, quando
+                )
+                self._registrar_par(
+                    tenant, outro_id, produto_id, valor, dia, peso, quando
+                )
+            cesta[produto_id] = evento
+
+    def reconstruir(self, eventos: Iterable) -> int:
+        """Recalcula a matriz a partir de um histórico de eventos."""
+        with self._lock:
+            self._tenants = {}
+            self._referencia = None
+        total = 0
+        for evento in eventos:
+            if isinstance(evento, ProdutoVendidoEvent):
+                self.registrar_evento(evento)
+                total += 1
+        return total
+
+    def _peso(self, dia: int) -> float:
+        if self._referencia is None:
+            self._referencia = dia
+        expoente = (dia - self._referencia) / MEIA_VIDA_DIAS
+        if expoente > _MAX_EXPOENTE:
+            self._rebasear(dia)
+            expoente = 0.0
+        return 2.0**expoente
+
+    def _rebasear(self, dia: int) -> None:
+        fator = 2.0 ** (-(dia - self._referencia) / MEIA_VIDA_DIAS)
+        for tenant in self._tenants.values():
+            for celula in tenant.produtos.values():
+                celula.score *= fator
+            for vizinhos in tenant.vizinhos.values():
+                for celula in vizinhos.values():
+                    celula.score *= fator
+        self._referencia = dia
+
+    @staticmethod
+    def _registrar_par(tenant, origem, destino, valor, dia, peso, quando):
+        vizinhos = tenant.vizinhos.setdefault(origem, {})
+        celula = vizinhos.get(destino)
+        if celula is None:
+            if len(vizinhos) >= MAX_VIZINHOS_POR_PRODUTO:
+                menor = min(vizinhos, key=lambda pid: vizinhos[pid].score)
+                del vizinhos[menor]
+            celula = vizinhos[destino] = _Celula()
+        celula.registrar(dia, valor, peso, quando)
+
+    # --------------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------------
+
+    def vizinhos(
+        self,
+        produto_id: int,
+        limit: int = 10,
+        user_id: Optional[int] = None,
+        dias: Optional[int] = None,
+        min_ocorrencias: int = 1,
+    ) -> List[Dict]:
+        """
+        Top-k produtos comprados junto com `produto_id`.
+
+        Sem `dias`, ordena pelo score com decaimento (recência pesa mais);
+        com `dias`, ordena pela frequência dentro da janela (granularidade
+        diária).
+        """
+        dia_inicio = self._dia_inicio(dias)
+        with self._lock:
+            agregados: Dict[int, List] = {}
+            total_vendas = 0
+            for tenant in self._tenants_consulta(user_id):
+                base = tenant.produtos.get(produto_id)
+                if base is None:
+                    continue
+                total_vendas += base.na_janela(dia_inicio)[0]
+                for outro_id, celula in tenant.vizinhos.get(produto_id, {}).items():
+                    contagem, soma = celula.na_janela(dia_inicio)
+                    if contagem == 0:
+                        continue
+                    dados = agregados.get(outro_id)
+                    if dados is None:
+                        nome, tipo = tenant.nomes.get(outro_id, ("", ""))
+                        agregados[outro_id] = [
+                            contagem,
+                            soma,
+                            celula.score,
+                            nome,
+                            tipo,
+                            celula.ultima_vez,
+                        ]
+                    else:
+                        dados[0] += contagem
+                        dados[1] += soma
+                        dados[2] += celula.score
+                        dados[5] = max(dados[5], celula.ultima_vez)
+
+            if not total_vendas:
+                return []
+
+            candidatos = (
+                (outro_id, dados)
+                for outro_id, dados in agregados.items()
+                if dados[0] >= min_ocorrencias
+            )
+            if dia_inicio is None:
+                chave = lambda item: (item[1][2], item[1][0])  # noqa: E731
+            else:
+                chave = lambda item: (item[1][0], item[1][2])  # noqa: E731
+            top = heapq.nlargest(limit, candidatos, key=chave)
+
+        return [
+            {
+                "produto_id": outro_id,
+                "produto_nome": nome,
+                "tipo_produto": tipo,
+                "frequencia": contagem,
+                "confianca": round(contagem / total_vendas * 100, 2),
+                "valor_medio_combinado": round(soma / contagem, 2),
+                "total_vendas_produto_original": total_vendas,
+                "ultima_vez": ultima_vez.isoformat(),
+            }
+            for outro_id, (contagem, soma, _score, nome, tipo, ultima_vez) in top
+        ]
+
+    def pares(
+        self,
+        limit: int = 10,
+        user_id: Optional[int] = None,
+        dias: Optional[int] = None,
+        min_ocorrencias: int = 1,
+    ) -> List[Dict]:
+        """Top-k pares (produto1_id < produto2_id) por frequência."""
+        dia_inicio = self._dia_inicio(dias)
+        with self._lock:
+            contagens: Dict[Tuple[int, int], int] = {}
+            nomes: Dict[int, str] = {}
+            for tenant in self._tenants_consulta(user_id):
+                for origem, vizinhos in tenant.vizinhos.items():
+                    for destino, celula in vizinhos.items():
+                        if origem >= destino:
+                            continue
+                        contagem = celula.na_janela(dia_inicio)[0]
+                        if contagem:
+                            par = (origem, destino)
+                            contagens[par] = contagens.get(par, 0) + contagem
+                            for pid in par:
+                                if pid in tenant.nomes:
+                                    nomes.setdefault(pid, tenant.nomes[pid][0])
+
+        top = heapq.nlargest(
+            limit,
+            (item for item in contagens.items() if item[1] >= min_ocorrencias),
+            key=lambda item: item[1],
+        )
+        return [
+            {
+                "produto1_id": prod1_id,
+                "produto1_nome": nomes.get(prod1_id, f"Produto {prod1_id}"),
+                "produto2_id": prod2_id,
+                "produto2_nome": nomes.get(prod2_id, f"Produto {prod2_id}"),
+                "frequencia": frequencia,
+            }
+            for (prod1_id, prod2_id), frequencia in top
+        ]
+
+    def cesta(
+        self, venda_id: int, user_id: Optional[int] = None
+    ) -> Optional[List[ProdutoVendidoEvent]]:
+        """Itens de uma venda recente (None se a venda já saiu do buffer)."""
+        with self._lock:
+            for tenant in self._tenants_consulta(user_id):
+                cesta = tenant.cestas.get(venda_id)
+                if cesta is not None:
+                    return list(cesta.values())
+        return None
+
+    def _tenants_consulta(self, user_id: Optional[int]) -> List[_MatrizTenant]:
+        if user_id is None:
+            return list(self._tenants.values())
+        tenant = self._tenants.get(user_id)
+        return [tenant] if tenant is not None else []
+
+    @staticmethod
+    def _dia_inicio(dias: Optional[int]) -> Optional[int]:
+        if dias is None:
+            return None
+        return (datetime.now() - timedelta(days=dias)).date().toordinal()
+
+
+# ============================================================
+# INSTÂNCIA GLOBAL
+# ============================================================
+
+_matriz: Optional[MatrizCoocorrencia] = None
+_matriz_lock = Lock()
+
+
+def obter_matriz_coocorrencia() -> MatrizCoocorrencia:
+    """
+    Retorna a matriz global, registrando-a no EventDispatcher na primeira
+    chamada (reconstrói a partir do histórico em memória).
+    """
+    global _matriz
+    if _matriz is not None:
+        return _matriz
+    with _matriz_lock:
+        if _matriz is None:
+            dispatcher = EventDispatcher()
+            matriz = MatrizCoocorrencia()
+            dispatcher.subscribe(ProdutoVendidoEvent, matriz.registrar_evento)
+            # Eventos publicados entre o subscribe e o replay são deduplicados
+            # pela cesta da venda.
+            total = 0
+            for evento in dispatcher.get_events_by_type(ProdutoVendidoEvent):
+                matriz.registrar_evento(evento)
+                total += 1
+            logger.info(f"🧺 Matriz de co-ocorrência inicializada ({total} eventos)")
+            _matriz = matriz
+    return _matriz
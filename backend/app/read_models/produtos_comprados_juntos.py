@@ -15,21 +15,20 @@ Eventos consumidos:
 - VendaRealizadaEvent
 - ProdutoVendidoEvent
 
-Algoritmo:
-1. Identifica todas as vendas que contêm um produto específico
-2. Lista todos os outros produtos vendidos nessas vendas
-3. Conta frequência de co-ocorrência
-4. Ordena por frequência
+Algoritmo (ver coocorrencia.py):
+1. Cada ProdutoVendidoEvent é cruzado com os itens já vistos na mesma venda
+2. A matriz esparsa produto x produto acumula contagem, valor, última vez
+   e score com decaimento temporal
+3. Consultas leem apenas os vizinhos do produto e extraem o top-k
 
 NÃO persiste dados - trabalha apenas com eventos em memória.
 """
 
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+from typing import Dict, List, Optional
 
 from app.events import ProdutoVendidoEvent
 from .base_read_model import BaseReadModel
+from .coocorrencia import MatrizCoocorrencia, obter_matriz_coocorrencia
 
 
 class ProdutosCompradosJuntosReadModel(BaseReadModel):
@@ -39,6 +38,9 @@ class ProdutosCompradosJuntosReadModel(BaseReadModel):
     Identifica padrões de compra e produtos que costumam
     ser vendidos em conjunto.
 
+    As consultas leem a MatrizCoocorrencia, atualizada a cada
+    ProdutoVendidoEvent publicado (não varrem o histórico de eventos).
+
     Uso:
     ```python
     read_model = ProdutosCompradosJuntosReadModel()
@@ -46,6 +48,10 @@ class ProdutosCompradosJuntosReadModel(BaseReadModel):
     ```
     """
 
+    def __init__(self, matriz: Optional[MatrizCoocorrencia] = None):
+        super().__init__()
+        self.matriz = matriz or obter_matriz_coocorrencia()
+
     def produtos_comprados_juntos(
         self,
         produto_id: int,
@@ -57,6 +63,9 @@ class ProdutosCompradosJuntosReadModel(BaseReadModel):
         """
         Retorna produtos frequentemente comprados junto com um produto específico.
 
+        Sem `dias`, a ordem usa a frequência com decaimento temporal (vendas
+        recentes pesam mais); com `dias`, a frequência dentro da janela.
+
         Args:
             produto_id: ID do produto de referência
             limit: Quantidade de sugestões a retornar
@@ -72,98 +81,16 @@ class ProdutosCompradosJuntosReadModel(BaseReadModel):
             - frequencia: Quantas vezes apareceu junto
             - confianca: % de vendas do produto original que incluem este
             - valor_medio_combinado: Valor médio quando vendidos juntos
+            - ultima_vez: Última venda em que apareceram juntos
         """
-        # Obter eventos de produtos vendidos
-        eventos_produtos = self.get_eventos_por_usuario(
-            user_id=user_id, event_type=ProdutoVendidoEvent
+        return self.matriz.vizinhos(
+            produto_id=produto_id,
+            limit=limit,
+            user_id=user_id,
+            dias=dias,
+            min_ocorrencias=min_ocorrencias,
         )
 
-        # Filtrar por período
-        if dias is not None:
-            data_limite = datetime.now() - timedelta(days=dias)
-            eventos_produtos = [
-                e for e in eventos_produtos if e.timestamp >= data_limite
-            ]
-
-        # Identificar vendas que contêm o produto de referência
-        vendas_com_produto = set()
-        for evento in eventos_produtos:
-            if evento.produto_id == produto_id:
-                vendas_com_produto.add(evento.venda_id)
-
-        if not vendas_com_produto:
-            return []
-
-        # Contar co-ocorrências de outros produtos nessas vendas
-        co_ocorrencias = defaultdict(
-            lambda: {
-                "produto_id": 0,
-                "produto_nome": "",
-                "tipo_produto": "",
-                "frequencia": 0,
-                "vendas_ids": set(),
-                "valores_combinados": [],
-            }
-        )
-
-        for evento in eventos_produtos:
-            # Pular o próprio produto de referência
-            if evento.produto_id == produto_id:
-                continue
-
-            # Verificar se está em uma venda com o produto de referência
-            if evento.venda_id in vendas_com_produto:
-                dados = co_ocorrencias[evento.produto_id]
-
-                # Primeira vez
-                if dados["produto_id"] == 0:
-                    dados["produto_id"] = evento.produto_id
-                    dados["produto_nome"] = evento.produto_nome
-                    dados["tipo_produto"] = evento.tipo_produto
-
-                # Contar vendas únicas
-                if evento.venda_id not in dados["vendas_ids"]:
-                    dados["vendas_ids"].add(evento.venda_id)
-                    dados["frequencia"] += 1
-
-                # Coletar valores para média
-                dados["valores_combinados"].append(evento.preco_total)
-
-        # Preparar resultado
-        resultado = []
-        total_vendas_produto = len(vendas_com_produto)
-
-        for produto_id_sugestao, dados in co_ocorrencias.items():
-            frequencia = dados["frequencia"]
-
-            # Filtrar por mínimo de ocorrências
-            if frequencia < min_ocorrencias:
-                continue
-
-            # Calcular confiança (% de vendas do produto original que incluem este)
-            confianca = (frequencia / total_vendas_produto) * 100
-
-            # Valor médio combinado
-            valores = dados["valores_combinados"]
-            valor_medio = sum(valores) / len(valores) if valores else 0.0
-
-            resultado.append(
-                {
-                    "produto_id": dados["produto_id"],
-                    "produto_nome": dados["produto_nome"],
-                    "tipo_produto": dados["tipo_produto"],
-                    "frequencia": frequencia,
-                    "confianca": round(confianca, 2),
-                    "valor_medio_combinado": round(valor_medio, 2),
-                    "total_vendas_produto_original": total_vendas_produto,
-                }
-            )
-
-        # Ordenar por frequência (ou confiança)
-        resultado.sort(key=lambda x: x["frequencia"], reverse=True)
-
-        return resultado[:limit]
-
     def produtos_que_aparecem_juntos(
         self,
         limit: int = 10,
@@ -185,72 +112,61 @@ class ProdutosCompradosJuntosReadModel(BaseReadModel):
         Returns:
             Lista de pares de produtos com frequência
         """
-        # Obter eventos de produtos
-        eventos_produtos = self.get_eventos_por_usuario(
-            user_id=user_id, event_type=ProdutoVendidoEvent
+        return self.matriz.pares(
+            limit=limit, user_id=user_id, dias=dias, min_ocorrencias=min_ocorrencias
         )
 
-        # Filtrar por período
-        if dias is not None:
-            data_limite = datetime.now() - timedelta(days=dias)
-            eventos_produtos = [
-                e for e in eventos_produtos if e.timestamp >= data_limite
-            ]
+    def sugestoes_para_cesta(
+        self,
+        produtos_ids: List[int],
+        user_id: Optional[int] = None,
+        limit: int = 10,
+    ) -> List[Dict]:
+        """
+        Sugere complementos para uma cesta em montagem (ex: itens bipados no PDV).
 
-        # Agrupar produtos por venda
-        vendas_produtos = defaultdict(list)
-        produtos_info = {}  # Cache de info dos produtos
-
-        for evento in eventos_produtos:
-            vendas_produtos[evento.venda_id].append(evento.produto_id)
-
-            # Guardar info do produto
-            if evento.produto_id not in produtos_info:
-                produtos_info[evento.produto_id] = {
-                    "nome": evento.produto_nome,
-                    "tipo": evento.tipo_produto,
-                }
-
-        # Contar pares de produtos
-        pares = defaultdict(int)
-
-        for venda_id, produtos_ids in vendas_produtos.items():
-            # Apenas vendas com 2+ produtos
-            if len(produtos_ids) < 2:
-                continue
-
-            # Gerar todos os pares únicos
-            produtos_unicos = set(produtos_ids)
-            for i, prod1 in enumerate(sorted(produtos_unicos)):
-                for prod2 in sorted(list(produtos_unicos)[i + 1 :]):
-                    # Ordenar para evitar duplicatas (A,B) vs (B,A)
-                    par = tuple(sorted([prod1, prod2]))
-                    pares[par] += 1
-
-        # Preparar resultado
-        resultado = []
-        for (prod1_id, prod2_id), frequencia in pares.items():
-            if frequencia < min_ocorrencias:
-                continue
-
-            resultado.append(
-                {
-                    "produto1_id": prod1_id,
-                    "produto1_nome": produtos_info.get(prod1_id, {}).get(
-                        "nome", f"Produto {prod1_id}"
-                    ),
-                    "produto2_id": prod2_id,
-                    "produto2_nome": produtos_info.get(prod2_id, {}).get(
-                        "nome", f"Produto {prod2_id}"
-                    ),
-                    "frequencia": frequencia,
-                }
-            )
+        Args:
+            produtos_ids: Produtos já na cesta
+            user_id: Filtrar por tenant
+            limit: Quantidade de sugestões
 
-        # Ordenar por frequência
-        resultado.sort(key=lambda x: x["frequencia"], reverse=True)
+        Returns:
+            Lista de dicts com produto_id, produto_nome, score e frequencia
+        """
+        na_cesta = set(produtos_ids)
+        consolidadas: Dict[int, Dict] = {}
 
-        return resultado[:limit]
+        for produto_id in na_cesta:
+            sugestoes_produto = self.produtos_comprados_juntos(
+                produto_id=produto_id,
+                limit=5 + len(na_cesta),
+                user_id=user_id,
+                min_ocorrencias=1,
+            )
+            # Filtrar produtos que já estão na cesta
+            sugestoes_filtradas = [
+                s for s in sugestoes_produto if s["produto_id"] not in na_cesta
+            ][:5]
+
+            for sugestao in sugestoes_filtradas:
+                dados = consolidadas.setdefault(
+                    sugestao["produto_id"],
+                    {
+                        "produto_id": sugestao["produto_id"],
+                        "produto_nome": sugestao["produto_nome"],
+                        "score": 0.0,
+                        "frequencia": 0,
+                    },
+                )
+                dados["score"] += sugestao["confianca"]
+                dados["frequencia"] += sugestao["frequencia"]
+
+        sugestoes_finais = sorted(
+            consolidadas.values(), key=lambda x: x["score"], reverse=True
+        )[:limit]
+        for sugestao in sugestoes_finais:
+            sugestao["score"] = round(sugestao["score"], 2)
+        return sugestoes_finais
 
     def analise_cesta_venda(self, venda_id: int, user_id: Optional[int] = None) -> Dict:
         """
@@ -263,86 +179,34 @@ class ProdutosCompradosJuntosReadModel(BaseReadModel):
         Returns:
             Dict com produtos da venda e sugestões de cross-sell
         """
-        # Obter eventos da venda
-        eventos_venda = self.get_eventos_por_venda(venda_id)
-
-        # Filtrar apenas produtos (não kits por enquanto)
-        from app.events import ProdutoVendidoEvent
-
-        produtos_venda = [
-            e for e in eventos_venda if isinstance(e, ProdutoVendidoEvent)
-        ]
+        # Cestas recentes ficam na matriz; as demais vêm do histórico
+        produtos_venda = self.matriz.cesta(venda_id, user_id=user_id)
+        if produtos_venda is None:
+            produtos_venda = [
+                e
+                for e in self.get_eventos_por_venda(venda_id)
+                if isinstance(e, ProdutoVendidoEvent)
+            ]
 
         if not produtos_venda:
             return {"venda_id": venda_id, "produtos": [], "sugestoes": []}
 
-        # Listar produtos da venda
-        produtos_na_venda = []
-        produtos_ids = set()
-
-        for evento in produtos_venda:
-            produtos_ids.add(evento.produto_id)
-            produtos_na_venda.append(
-                {
-                    "produto_id": evento.produto_id,
-                    "produto_nome": evento.produto_nome,
-                    "quantidade": evento.quantidade,
-                    "preco_total": evento.preco_total,
-                }
-            )
-
-        # Coletar sugestões para cada produto
-        todas_sugestoes = []
-        for produto_id in produtos_ids:
-            sugestoes_produto = self.produtos_comprados_juntos(
-                produto_id=produto_id, limit=5, user_id=user_id, min_ocorrencias=1
-            )
-
-            # Filtrar produtos que já estão na venda
-            sugestoes_filtradas = [
-                s for s in sugestoes_produto if s["produto_id"] not in produtos_ids
-            ]
-
-            todas_sugestoes.extend(sugestoes_filtradas)
-
-        # Consolidar sugestões (remover duplicatas, somar scores)
-        sugestoes_consolidadas = defaultdict(
-            lambda: {
-                "produto_id": 0,
-                "produto_nome": "",
-                "score_total": 0,
-                "frequencia_total": 0,
+        produtos_na_venda = [
+            {
+                "produto_id": evento.produto_id,
+                "produto_nome": evento.produto_nome,
+                "quantidade": evento.quantidade,
+                "preco_total": evento.preco_total,
             }
-        )
-
-        for sugestao in todas_sugestoes:
-            produto_id = sugestao["produto_id"]
-            dados = sugestoes_consolidadas[produto_id]
-
-            if dados["produto_id"] == 0:
-                dados["produto_id"] = produto_id
-                dados["produto_nome"] = sugestao["produto_nome"]
-
-            dados["score_total"] += sugestao["confianca"]
-            dados["frequencia_total"] += sugestao["frequencia"]
-
-        # Preparar lista final de sugestões
-        sugestoes_finais = []
-        for dados in sugestoes_consolidadas.values():
-            sugestoes_finais.append(
-                {
-                    "produto_id": dados["produto_id"],
-                    "produto_nome": dados["produto_nome"],
-                    "score": round(dados["score_total"], 2),
-                    "frequencia": dados["frequencia_total"],
-                }
-            )
-
-        # Ordenar por score
-        sugestoes_finais.sort(key=lambda x: x["score"], reverse=True)
+            for evento in produtos_venda
+        ]
 
         return {
             "venda_id": venda_id,
             "produtos": produtos_na_venda,
-            "sugestoes": sugestoes_finais[:10],
+            "sugestoes": self.sugestoes_para_cesta(
+                [evento.produto_id for evento in produtos_venda],
+                user_id=user_id,
+                limit=10,
+            ),
         }
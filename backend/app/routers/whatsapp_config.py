@@ -11,6 +11,7 @@ import logging
 
 from app.db import get_session as get_db
 from app.auth.dependencies import get_current_user_and_tenant
+from app.cache.cache_manager import cache
 from app.whatsapp.models import TenantWhatsAppConfig
 from app.whatsapp.schemas import (
     TenantWhatsAppConfigBase,
@@ -94,6 +95,7 @@ def create_whatsapp_config(
 
     db.add(config)
     db.commit()
+    cache.invalidate_tags("whatsapp_config", tenant_id=tenant_id)
     db.refresh(config)
 
     logger.info(f"✅ Config WhatsApp criada: tenant={tenant_id}")
@@ -131,6 +133,7 @@ def update_whatsapp_config(
         setattr(config, field, value)
 
     db.commit()
+    cache.invalidate_tags("whatsapp_config", tenant_id=tenant_id)
     db.refresh(config)
 
     logger.info(f"✅ Config WhatsApp atualizada: tenant={tenant_id}")
@@ -161,6 +164,7 @@ def delete_whatsapp_config(
 
     db.delete(config)
     db.commit()
+    cache.invalidate_tags("whatsapp_config", tenant_id=tenant_id)
 
     logger.info(f"🗑️ Config WhatsApp deletada: tenant={tenant_id}")
 
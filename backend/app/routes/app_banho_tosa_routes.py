@@ -8,6 +8,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session, joinedload
 
+from app.banho_tosa_agenda_indice import IndiceIntervalos
+from app.banho_tosa_agenda_slots import dia_funciona
 from app.banho_tosa_models import (
     BanhoTosaAgendamento,
     BanhoTosaAtendimento,
@@ -119,10 +121,20 @@ def obter_calendario_banho_tosa(
         .all()
     )
 
+    ocupacao = IndiceIntervalos(
+        (
+            item.data_hora_inicio,
+            item.data_hora_fim_prevista
+            or (item.data_hora_inicio + timedelta(minutes=60)),
+        )
+        for item in agendamentos
+        if item.data_hora_inicio
+    )
+
     calendario = []
     for offset in range(dias):
         dia = inicio + timedelta(days=offset)
-        if not _dia_funciona(config, dia):
+        if not dia_funciona(config, dia):
             calendario.append({"data": dia.isoformat(), "funciona": False, "slots": []})
             continue
         slots = []
@@ -130,11 +142,7 @@ def obter_calendario_banho_tosa(
         fim_dia = datetime.combine(dia, _parse_hora(config.horario_fim) or time(18, 0))
         while cursor + timedelta(minutes=duracao_minutos) <= fim_dia:
             slot_fim = cursor + timedelta(minutes=duracao_minutos)
-            ocupados = sum(
-                1
-                for item in agendamentos
-                if _intervalos_sobrepoem(cursor, slot_fim, item)
-            )
+            ocupados = ocupacao.sobrepostos(cursor, slot_fim)
             vagas = max(capacidade_total - ocupados, 0)
             slots.append(
                 {
@@ -258,48 +266,6 @@ def _parse_hora(valor: Optional[str]) -> Optional[time]:
         return None
 
 
-def _dia_funciona(config, dia: date) -> bool:
-    dias = getattr(config, "dias_funcionamento", None) or []
-    if not dias:
-        return True
-    nomes = {
-        0: {"segunda", "seg"},
-        1: {"terca", "terça", "ter"},
-        2: {"quarta", "qua"},
-        3: {"quinta", "qui"},
-        4: {"sexta", "sex"},
-        5: {"sabado", "sábado", "sab"},
-        6: {"domingo", "dom"},
-    }
-    configurados = {str(item).strip().lower() for item in dias}
-    return bool(nomes.get(dia.weekday(), set()) & configurados)
-
-
-def _intervalos_sobrepoem(
-    inicio: datetime, fim: datetime, agendamento: BanhoTosaAgendamento
-) -> bool:
-    ag_inicio = agendamento.data_hora_inicio
-    if not ag_inicio:
-        return False
-    ag_fim = agendamento.data_hora_fim_prevista or (ag_inicio + timedelta(minutes=60))
-    ag_inicio = _datetime_compativel(ag_inicio, inicio)
-    ag_fim = _datetime_compativel(ag_fim, inicio)
-    return bool(ag_inicio and ag_inicio < fim and ag_fim > inicio)
-
-
-def _datetime_compativel(valor: datetime, referencia: datetime) -> datetime:
-    """Evita erro ao comparar datas timezone-aware do banco com slots locais do calendario."""
-    valor_tem_tz = valor.tzinfo is not None and valor.utcoffset() is not None
-    referencia_tem_tz = (
-        referencia.tzinfo is not None and referencia.utcoffset() is not None
-    )
-    if valor_tem_tz == referencia_tem_tz:
-        return valor
-    if referencia_tem_tz:
-        return valor.replace(tzinfo=referencia.tzinfo)
-    return valor.replace(tzinfo=None)
-
-
 def _listar_atendimentos_visiveis(db: Session, tenant_id, cliente_id: int):
     corte = datetime.now() - timedelta(days=45)
     return (
@@ -6,12 +6,11 @@ from typing import Any
 
 from sqlalchemy import text
 
+from app.tenancy.rls import sync_rls_tenant
+
 
 def _set_tenant_context(db, tenant_id: str) -> None:
-    db.execute(
-        text("SELECT set_config('app.tenant_id', :tenant_id, true)"),
-        {"tenant_id": tenant_id},
-    )
+    sync_rls_tenant(db, tenant_id)
 
 
 def _resolve_tenant_context(db, target_email: str) -> dict[str, Any]:
@@ -5,10 +5,16 @@ from typing import Optional
 
 from app.tenancy.context import get_current_tenant
 from app.auth.permission_dependencies import expand_permissions
+from app.auth.principal_cache import principal_cache
 from app.models import UserTenant, RolePermission, Permission, User
 
 
 def get_user_permissions(db: Session, user_id: int, tenant_id: UUID) -> set[str]:
+    cached = principal_cache.get_permissions(user_id, tenant_id)
+    if cached is not None:
+        return set(cached)
+
+    generation = principal_cache.generation
     perms = (
         db.query(Permission.code)
         .join(RolePermission, RolePermission.permission_id == Permission.id)
@@ -21,7 +27,9 @@ def get_user_permissions(db: Session, user_id: int, tenant_id: UUID) -> set[str]
         )
         .all()
     )
-    return set(expand_permissions([p[0] for p in perms]))
+    expanded = set(expand_permissions([p[0] for p in perms]))
+    principal_cache.store_permissions(user_id, tenant_id, expanded, generation)
+    return expanded
 
 
 def check_permission(
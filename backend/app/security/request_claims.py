@@ -0,0 +1,51 @@
+"""
+Claims JWT decodificados uma unica vez por request.
+
+O pipeline HTTP (``app/middlewares/request_pipeline.py``) decodifica o bearer
+token ao receber a request e guarda o resultado em ``scope["state"]``. As
+dependencies de autenticacao reaproveitam esses claims quando o token
+recebido e exatamente o mesmo, evitando decodificar o JWT duas ou tres vezes.
+"""
+
+from __future__ import annotations
+
+from typing import Any, MutableMapping, Optional
+
+from starlette.requests import Request
+
+from app.auth.core import ALGORITHM
+from app.config import JWT_SECRET_KEY
+from app.security.jwt_compat import JWTError, jwt
+
+REQUEST_CLAIMS_STATE_KEY = "jwt_claims"
+
+
+def decode_access_claims(token: str) -> dict[str, Any]:
+    """Decodifica e valida assinatura/expiracao do JWT da aplicacao."""
+    return jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def store_request_claims(
+    scope: MutableMapping[str, Any], token: str, claims: Optional[dict]
+) -> None:
+    """Guarda os claims (ou None para token invalido) no state da request."""
+    state = scope.setdefault("state", {})
+    state[REQUEST_CLAIMS_STATE_KEY] = (token, claims)
+
+
+def get_request_claims(request: Optional[Request], token: str) -> dict[str, Any]:
+    """
+    Retorna os claims do token, reaproveitando o decode feito pelo pipeline.
+
+    Raises:
+        JWTError: token invalido (mesmo contrato de ``jwt.decode``).
+    """
+    cached = None
+    if request is not None:
+        cached = request.scope.get("state", {}).get(REQUEST_CLAIMS_STATE_KEY)
+    if cached is not None and cached[0] == token:
+        claims = cached[1]
+        if claims is None:
+            raise JWTError("Token invalido")
+        return claims
+    return decode_access_claims(token)
@@ -6,17 +6,21 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.services.base_catalog_import_core import (
+    BaseCatalogImportError,
     BaseCatalogImportResult,
     PRODUCT_OPERATIONAL_NULL_FIELDS,
     PRODUCT_OPERATIONAL_ZERO_FIELDS,
     _existing_id_by_name,
     _get_mapping,
+    _get_mappings,
     _insert_and_lookup,
     _record_mapping,
+    _record_new_mappings,
     _select_rows,
     _table_exists,
     sync_rls_tenant,
 )
+from app.services.produto_upsert_lote import chave_codigo, mesclar_produtos
 
 
 def _copy_departments(
@@ -486,6 +490,9 @@ def _sanitize_product_values(
     option_maps: dict[str, dict[int, int]],
 ) -> dict[str, Any]:
     values = dict(row)
+    # Colunas geradas pelo PostgreSQL (digitos dos codigos) nao aceitam valor
+    for generated in ("codigos_digitos", "codigos_alternativos_digitos"):
+        values.pop(generated, None)
     values["tenant_id"] = target_tenant_id
     values["user_id"] = user_id
     values["categoria_id"] = (
@@ -549,6 +556,28 @@ def _find_existing_product_id(
     ).scalar()
 
 
+def _existing_product_ids(db: Session, *, tenant_id: str) -> dict[str, int]:
+    """SKUs ja cadastrados no tenant, numa consulta (``chave_codigo`` -> id)."""
+    sync_rls_tenant(db, tenant_id)
+    rows = db.execute(
+        text(
+            """
+            SELECT id, codigo FROM produtos
+            WHERE CAST(tenant_id AS TEXT)=:tenant_id
+              AND codigo IS NOT NULL
+            ORDER BY id
+            """
+        ),
+        {"tenant_id": tenant_id},
+    ).all()
+    existing: dict[str, int] = {}
+    for product_id, codigo in rows:
+        key = chave_codigo(codigo)
+        if key:
+            existing.setdefault(key, int(product_id))
+    return existing
+
+
 def _create_product(
     db: Session,
     *,
@@ -583,6 +612,60 @@ def _create_product(
     )
 
 
+def _create_products_in_bulk(
+    db: Session,
+    *,
+    rows: list[dict[str, Any]],
+    target_tenant_id: str,
+    user_id: int,
+    result: BaseCatalogImportResult,
+    mapping: dict[int, int],
+    new_mappings: dict[int, int],
+    department_map: dict[int, int],
+    category_map: dict[int, int],
+    brand_map: dict[int, int],
+    option_maps: dict[str, dict[int, int]],
+) -> None:
+    """Cria os produtos novos em blocos (COPY + ON CONFLICT no PostgreSQL).
+
+    Os mapeamentos vao para ``new_mappings``; quem chama grava todos de uma vez.
+    """
+    if not rows:
+        return
+    created = mesclar_produtos(
+        db,
+        tenant_id=target_tenant_id,
+        registros=[
+            _sanitize_product_values(
+                row,
+                target_tenant_id=target_tenant_id,
+                user_id=user_id,
+                department_map=department_map,
+                category_map=category_map,
+                brand_map=brand_map,
+                option_maps=option_maps,
+            )
+            for row in rows
+        ],
+    )
+    seen: set[str] = set()
+    for row in rows:
+        source_id = int(row["id"])
+        key = chave_codigo(row["codigo"])
+        target_id = created.ids.get(key)
+        if not target_id:
+            raise BaseCatalogImportError(
+                "Nao foi possivel localizar registro criado em produtos."
+            )
+        mapping[source_id] = new_mappings[source_id] = int(target_id)
+        if key in seen:
+            # SKU repetido no tenant fonte: o segundo reaproveita o primeiro
+            result.bump("skipped", "produtos")
+            continue
+        seen.add(key)
+        result.bump("created", "produtos")
+
+
 def _link_product_hierarchy(
     db: Session,
     *,
@@ -638,68 +721,63 @@ def _copy_products(
     option_maps: dict[str, dict[int, int]],
 ) -> tuple[dict[int, int], dict[int, dict[str, Any]]]:
     mapping: dict[int, int] = {}
+    new_mappings: dict[int, int] = {}
+    pending_rows: list[dict[str, Any]] = []
     source_rows = _select_rows(db, "produtos", source_tenant_id)
     source_by_id = {int(row["id"]): row for row in source_rows}
+    # Leituras em lote: uma consulta para os mapeamentos e outra para os SKUs
+    mapped_ids = _get_mappings(
+        db,
+        tenant_id=target_tenant_id,
+        bundle_code=result.bundle_code,
+        bundle_version=result.bundle_version,
+        item_type="produto",
+        target_table="produtos",
+    )
+    existing_ids = _existing_product_ids(db, tenant_id=target_tenant_id)
     for row in source_rows:
         source_id = int(row["id"])
-        mapped_id = _get_mapping(
-            db,
-            tenant_id=target_tenant_id,
-            bundle_code=result.bundle_code,
-            bundle_version=result.bundle_version,
-            item_type="produto",
-            source_id=source_id,
-            target_table="produtos",
-        )
+        mapped_id = mapped_ids.get(source_id)
         if mapped_id:
             mapping[source_id] = int(mapped_id)
             result.bump("skipped", "produtos")
             continue
-        existing_id = _find_existing_product_id(
-            db, tenant_id=target_tenant_id, codigo=row["codigo"]
-        )
+        existing_id = existing_ids.get(chave_codigo(row["codigo"]))
         if existing_id:
-            _record_or_skip_mapped_item(
-                db,
-                mapping=mapping,
-                source_id=source_id,
-                target_id=int(existing_id),
-                tenant_id=target_tenant_id,
-                user_id=user_id,
-                result=result,
-                item_type="produto",
-                target_table="produtos",
-                result_key="produtos",
-            )
+            mapping[source_id] = existing_id
+            if not result.dry_run:
+                new_mappings[source_id] = existing_id
+            result.bump("skipped", "produtos")
             continue
         if result.dry_run:
             result.bump("would_create", "produtos")
             continue
-        created_id = _create_product(
+        pending_rows.append(row)
+
+    if not result.dry_run:
+        _create_products_in_bulk(
             db,
-            row=row,
+            rows=pending_rows,
             target_tenant_id=target_tenant_id,
             user_id=user_id,
+            result=result,
+            mapping=mapping,
+            new_mappings=new_mappings,
             department_map=department_map,
             category_map=category_map,
             brand_map=brand_map,
             option_maps=option_maps,
         )
-        mapping[source_id] = created_id
-        _record_mapping(
+        _record_new_mappings(
             db,
             tenant_id=target_tenant_id,
             user_id=user_id,
             bundle_code=result.bundle_code,
             bundle_version=result.bundle_version,
             item_type="produto",
-            source_id=source_id,
             target_table="produtos",
-            target_id=created_id,
+            targets=new_mappings,
         )
-        result.bump("created", "produtos")
-
-    if not result.dry_run:
         _link_product_hierarchy(
             db,
             source_products=source_by_id,
@@ -196,6 +196,49 @@ def _get_mapping(
     ).scalar()
 
 
+def _get_mappings(
+    db: Session,
+    *,
+    tenant_id: str,
+    bundle_code: str,
+    bundle_version: str,
+    item_type: str,
+    target_table: str,
+) -> dict[int, int]:
+    """Todos os mapeamentos ativos do tipo, numa consulta (source_id -> target_id)."""
+    if not _table_exists(db, "tenant_template_item_installs"):
+        return {}
+    sync_rls_tenant(db, tenant_id)
+    rows = db.execute(
+        text(
+            """
+            SELECT template_code, target_id
+            FROM tenant_template_item_installs
+            WHERE CAST(tenant_id AS TEXT) = :tenant_id
+              AND bundle_code = :bundle_code
+              AND bundle_version = :bundle_version
+              AND item_type = :item_type
+              AND target_table = :target_table
+              AND status = 'active'
+            """
+        ),
+        {
+            "tenant_id": tenant_id,
+            "bundle_code": bundle_code,
+            "bundle_version": bundle_version,
+            "item_type": item_type,
+            "target_table": target_table,
+        },
+    ).all()
+    prefix = f"{item_type}:"
+    mappings: dict[int, int] = {}
+    for template_code, target_id in rows:
+        source = str(template_code or "")[len(prefix) :]
+        if str(template_code or "").startswith(prefix) and source.isdigit():
+            mappings.setdefault(int(source), int(target_id))
+    return mappings
+
+
 def _record_mapping(
     db: Session,
     *,
@@ -249,6 +292,51 @@ def _record_mapping(
     )
 
 
+def _record_new_mappings(
+    db: Session,
+    *,
+    tenant_id: str,
+    user_id: int,
+    bundle_code: str,
+    bundle_version: str,
+    item_type: str,
+    target_table: str,
+    targets: dict[int, int],
+) -> None:
+    """Grava de uma vez mapeamentos ja conferidos como ausentes (via ``_get_mappings``)."""
+    if not targets or not _table_exists(db, "tenant_template_item_installs"):
+        return
+    now = _now()
+    sync_rls_tenant(db, tenant_id)
+    db.execute(
+        text(
+            """
+            INSERT INTO tenant_template_item_installs (
+                tenant_id, bundle_code, bundle_version, item_type, template_code,
+                target_table, target_id, status, created_by_user_id, created_at, updated_at
+            ) VALUES (
+                :tenant_id, :bundle_code, :bundle_version, :item_type, :template_code,
+                :target_table, :target_id, 'active', :user_id, :now, :now
+            )
+            """
+        ),
+        [
+            {
+                "tenant_id": tenant_id,
+                "bundle_code": bundle_code,
+                "bundle_version": bundle_version,
+                "item_type": item_type,
+                "template_code": _template_code(item_type, source_id),
+                "target_table": target_table,
+                "target_id": int(target_id),
+                "user_id": int(user_id),
+                "now": now,
+            }
+            for source_id, target_id in targets.items()
+        ],
+    )
+
+
 def _record_install(db: Session, user_id: int, result: BaseCatalogImportResult) -> None:
     if result.dry_run or not _table_exists(db, "tenant_template_installs"):
         return
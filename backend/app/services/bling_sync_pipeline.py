@@ -0,0 +1,259 @@
+"""Processamento em lote da fila de estoque Bling: coalescencia e pipeline."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import threading
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import Tenant
+from app.produtos_models import ProdutoBlingSyncQueue
+from app.tenancy.context import tenant_context
+
+from .bling_sync_queue import _STATUS_ABERTOS
+from .bling_sync_shared import (
+    BLING_STOCK_SYNC_IN_FLIGHT,
+    _erro_autenticacao_bling,
+    _erro_rate_limit_bling,
+    utc_now,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BlingSyncPipelineMixin:
+    """Ciclo da fila: um envio por produto e varias chamadas em voo."""
+
+    @classmethod
+    def _coalescer_fila(
+        cls, db: Session, tenant_id: UUID, filas: list[ProdutoBlingSyncQueue]
+    ) -> tuple[list[ProdutoBlingSyncQueue], int]:
+        """
+        Deixa um item por produto: o saldo enfileirado mais recente vence.
+
+        Itens abertos repetidos do mesmo produto (reenfileirados enquanto outro
+        envio estava em andamento) viram "coalescido" sem chamada ao Bling.
+        """
+        produto_ids = {fila.produto_id for fila in filas}
+        if not produto_ids:
+            return filas, 0
+
+        abertos = (
+            db.query(ProdutoBlingSyncQueue)
+            .filter(
+                ProdutoBlingSyncQueue.tenant_id == tenant_id,
+                ProdutoBlingSyncQueue.produto_id.in_(produto_ids),
+                ProdutoBlingSyncQueue.status.in_(_STATUS_ABERTOS),
+            )
+            .all()
+        )
+        por_produto: Dict[int, list[ProdutoBlingSyncQueue]] = {}
+        for fila in abertos:
+            por_produto.setdefault(fila.produto_id, []).append(fila)
+
+        now = utc_now()
+        coalescidos = 0
+        vencedores: Dict[int, ProdutoBlingSyncQueue] = {}
+        for produto_id, itens in por_produto.items():
+            itens.sort(
+                key=lambda item: (item.updated_at or item.created_at or now, item.id)
+            )
+            vencedor = itens[-1]
+            for item in itens[:-1]:
+                vencedor.forcar_sync = bool(vencedor.forcar_sync or item.forcar_sync)
+                item.status = "coalescido"
+                item.processado_em = now
+                item.proxima_tentativa_em = None
+                item.ultimo_erro = f"Substituido pelo item #{vencedor.id} da fila"
+                coalescidos += 1
+            vencedor.proxima_tentativa_em = min(
+                vencedor.proxima_tentativa_em or now, now
+            )
+            vencedores[produto_id] = vencedor
+
+        selecionados: list[ProdutoBlingSyncQueue] = []
+        vistos: set[int] = set()
+        for fila in filas:
+            if fila.produto_id in vistos or fila.produto_id not in vencedores:
+                continue
+            vistos.add(fila.produto_id)
+            selecionados.append(vencedores[fila.produto_id])
+        if coalescidos:
+            db.flush()
+        return selecionados, coalescidos
+
+    @classmethod
+    def _enviar_lote(
+        cls,
+        db: Session,
+        filas: list[ProdutoBlingSyncQueue],
+        in_flight: int,
+    ) -> tuple[list[Dict[str, Any]], int]:
+        """
+        Envia os itens com ate `in_flight` chamadas simultaneas ao Bling.
+
+        So as chamadas HTTP rodam nas threads; leitura e gravacao da fila
+        ficam nesta sessao. Um 429 ou erro de autenticacao interrompe o lote e
+        os itens ainda nao enviados voltam para a fila sem gastar tentativa.
+        """
+        resultados: list[Dict[str, Any]] = []
+        envios = []
+        for fila in filas:
+            sync, resultado = cls._iniciar_envio(db, fila)
+            if resultado is not None:
+                resultados.append(resultado)
+            else:
+                envios.append(
+                    (
+                        fila,
+                        sync,
+                        sync.bling_produto_id,
+                        float(fila.estoque_novo),
+                        cls._observacao_envio(fila),
+                    )
+                )
+        if not envios:
+            return resultados, 0
+
+        interromper = threading.Event()
+        nao_enviado = object()
+
+        def _enviar(bling_produto_id, estoque_novo, observacao):
+            if interromper.is_set():
+                return nao_enviado
+            try:
+                cls._enviar_estoque_bling(bling_produto_id, estoque_novo, observacao)
+            except Exception as error:
+                if _erro_rate_limit_bling(error) or _erro_autenticacao_bling(error):
+                    interromper.set()
+                return error
+            return None
+
+        enviados = 0
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(in_flight, len(envios))),
+            thread_name_prefix="bling-estoque",
+        ) as pool:
+            futuros = {pool.submit(_enviar, *envio[2:]): envio[:2] for envio in envios}
+            for futuro in as_completed(futuros):
+                fila, sync = futuros[futuro]
+                erro = futuro.result()
+                if erro is nao_enviado:
+                    cls._devolver_sem_envio(fila, sync)
+                    continue
+                enviados += 1
+                resultados.append(cls._concluir_envio(db, fila, sync, erro))
+        return resultados, enviados
+
+    @classmethod
+    def process_pending_queue(
+        cls, limit: int = 20, in_flight: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Processa os itens vencidos da fila, por tenant.
+
+        Itens repetidos do mesmo produto sao coalescidos no saldo mais recente
+        e os envios seguem em pipeline (`in_flight` chamadas simultaneas).
+        """
+        db = SessionLocal()
+        now = utc_now()
+        in_flight = max(1, int(in_flight or BLING_STOCK_SYNC_IN_FLIGHT))
+        try:
+            processados = 0
+            coalescidos = 0
+            enviados = 0
+            sucessos = 0
+            erros = 0
+            rate_limited = False
+            cooldown_seconds = 0.0
+            auth_invalid = False
+            auth_detail = None
+
+            tenant_rows = (
+                db.query(Tenant.id)
+                .filter(Tenant.status == "active")
+                .order_by(Tenant.created_at.asc())
+                .all()
+            )
+
+            for (tenant_id_raw,) in tenant_rows:
+                if processados >= limit:
+                    break
+
+                try:
+                    tenant_uuid = UUID(str(tenant_id_raw))
+                except (TypeError, ValueError):
+                    logger.warning(
+                        "[BLING SYNC] Ignorando tenant_id invalido na fila: %s",
+                        tenant_id_raw,
+                    )
+                    continue
+
+                with tenant_context(tenant_uuid):
+                    restante = max(0, limit - processados)
+                    filas = (
+                        db.query(ProdutoBlingSyncQueue)
+                        .filter(
+                            ProdutoBlingSyncQueue.tenant_id == tenant_uuid,
+                            ProdutoBlingSyncQueue.status.in_(["pendente", "erro"]),
+                            ProdutoBlingSyncQueue.proxima_tentativa_em.isnot(None),
+                            ProdutoBlingSyncQueue.proxima_tentativa_em <= now,
+                        )
+                        .order_by(
+                            ProdutoBlingSyncQueue.forcar_sync.desc(),
+                            ProdutoBlingSyncQueue.proxima_tentativa_em.asc(),
+                            ProdutoBlingSyncQueue.updated_at.asc(),
+                        )
+                        .limit(restante)
+                        .all()
+                    )
+
+                    filas, coalescidos_tenant = cls._coalescer_fila(
+                        db, tenant_uuid, filas
+                    )
+                    coalescidos += coalescidos_tenant
+                    resultados, enviados_tenant = cls._enviar_lote(db, filas, in_flight)
+                    enviados += enviados_tenant
+
+                    for result in resultados:
+                        processados += 1
+                        if result.get("ok"):
+                            sucessos += 1
+                            continue
+                        erros += 1
+                        if result.get("rate_limited"):
+                            rate_limited = True
+                            cooldown_seconds = max(
+                                cooldown_seconds,
+                                float(result.get("cooldown_seconds") or 0.0),
+                            )
+                        if result.get("auth_invalid"):
+                            auth_invalid = True
+                            auth_detail = result.get("detail")
+
+                if rate_limited or auth_invalid:
+                    break
+
+            db.commit()
+            return {
+                "processados": processados,
+                "sucessos": sucessos,
+                "erros": erros,
+                "rate_limited": rate_limited,
+                "cooldown_seconds": cooldown_seconds,
+                "auth_invalid": auth_invalid,
+                "detail": auth_detail,
+                "coalescidos": coalescidos,
+                "enviados": enviados,
+            }
+        except Exception:
+            db.rollback()
+            logger.exception("[BLING SYNC] Erro ao processar fila pendente")
+            return {"processados": 0, "sucessos": 0, "erros": 1}
+        finally:
+            db.close()
@@ -6,15 +6,13 @@ from datetime import datetime, timedelta
 import logging
 import time
 from typing import Any, Dict, Optional
-from uuid import UUID
 
 from sqlalchemy.orm import Session, aliased
 
 from app.bling_integration import BlingAPI
+from app.bling_integration_parts.http_client import bling_http_metrics_snapshot
 from app.db import SessionLocal
-from app.models import Tenant
 from app.produtos_models import Produto, ProdutoBlingSync, ProdutoBlingSyncQueue
-from app.tenancy.context import tenant_context
 from app.utils.tenant_safe_sql import execute_tenant_safe_one
 
 from .bling_sync_shared import (
@@ -36,6 +34,9 @@ from .bling_sync_shared import (
 
 logger = logging.getLogger(__name__)
 
+# Estados da fila que ainda aceitam o saldo mais recente do produto
+_STATUS_ABERTOS = ("pendente", "erro")
+
 
 class BlingSyncQueueMixin:
     """Operacoes de fila, retry e protecao contra rate limit."""
@@ -68,6 +69,7 @@ class BlingSyncQueueMixin:
                 else None
             ),
             "next_allowed_in_seconds": next_allowed_remaining,
+            "http": bling_http_metrics_snapshot(),
         }
 
     @classmethod
@@ -173,7 +175,9 @@ class BlingSyncQueueMixin:
             db.query(ProdutoBlingSyncQueue)
             .filter(
                 ProdutoBlingSyncQueue.produto_id == produto_id,
-                ProdutoBlingSyncQueue.status.in_(["pendente", "processando", "erro"]),
+                # Item "processando" ja esta em envio com o saldo anterior: o
+                # novo saldo vai para outro item em vez de se perder no sucesso
+                ProdutoBlingSyncQueue.status.in_(_STATUS_ABERTOS),
             )
             .order_by(ProdutoBlingSyncQueue.updated_at.desc())
             .first()
@@ -376,9 +380,10 @@ class BlingSyncQueueMixin:
         }
 
     @classmethod
-    def process_queue_item(
+    def _iniciar_envio(
         cls, db: Session, fila: ProdutoBlingSyncQueue
-    ) -> Dict[str, Any]:
+    ) -> tuple[Optional[ProdutoBlingSync], Optional[Dict[str, Any]]]:
+        """Marca o item como em envio; devolve o resultado final se nao houver envio."""
         sync = (
             db.query(ProdutoBlingSync)
             .filter(ProdutoBlingSync.id == fila.sync_id)
@@ -390,7 +395,7 @@ class BlingSyncQueueMixin:
             fila.status = "falha_final"
             fila.ultimo_erro = "Produto sem vínculo ativo com o Bling"
             fila.processado_em = utc_now()
-            return {
+            return None, {
                 "ok": False,
                 "queue_id": fila.id,
                 "produto_id": fila.produto_id,
@@ -405,24 +410,68 @@ class BlingSyncQueueMixin:
         sync.ultima_tentativa_sync = now
         sync.tentativas_sync = fila.tentativas
         db.flush()
+        return sync, None
+
+    @staticmethod
+    def _enviar_estoque_bling(
+        bling_produto_id: str, estoque_novo: float, observacao: str
+    ) -> None:
+        _reservar_janela_envio_bling()
+        BlingAPI().atualizar_estoque_produto(
+            produto_id=bling_produto_id,
+            estoque_novo=estoque_novo,
+            observacao=observacao,
+        )
+
+    @staticmethod
+    def _observacao_envio(fila: ProdutoBlingSyncQueue) -> str:
+        return f"Sync {fila.origem or 'manual'} - {fila.motivo or 'CorePet'}"
+
+    @classmethod
+    def _concluir_envio(
+        cls,
+        db: Session,
+        fila: ProdutoBlingSyncQueue,
+        sync: ProdutoBlingSync,
+        error: Optional[Exception],
+    ) -> Dict[str, Any]:
+        if error is None:
+            return cls._mark_success(db, fila, sync)
+        if _erro_rate_limit_bling(error):
+            cooldown_seconds = _registrar_cooldown_rate_limit(error)
+            fila.tentativas = max(int(fila.tentativas or 0) - 1, 0)
+            sync.tentativas_sync = fila.tentativas
+            return cls._mark_rate_limited(db, fila, sync, error, cooldown_seconds)
+        if _erro_autenticacao_bling(error):
+            return cls._mark_auth_invalid(db, fila, sync, error)
+        return cls._mark_error(db, fila, sync, error)
+
+    @classmethod
+    def _devolver_sem_envio(
+        cls, fila: ProdutoBlingSyncQueue, sync: ProdutoBlingSync
+    ) -> None:
+        """Item reservado que nao chegou a ser enviado volta como estava."""
+        fila.status = "pendente"
+        fila.tentativas = max(int(fila.tentativas or 0) - 1, 0)
+        sync.tentativas_sync = fila.tentativas
+
+    @classmethod
+    def process_queue_item(
+        cls, db: Session, fila: ProdutoBlingSyncQueue
+    ) -> Dict[str, Any]:
+        sync, resultado = cls._iniciar_envio(db, fila)
+        if resultado is not None:
+            return resultado
 
         try:
-            _reservar_janela_envio_bling()
-            BlingAPI().atualizar_estoque_produto(
-                produto_id=sync.bling_produto_id,
-                estoque_novo=float(fila.estoque_novo),
-                observacao=f"Sync {fila.origem or 'manual'} - {fila.motivo or 'CorePet'}",
+            cls._enviar_estoque_bling(
+                sync.bling_produto_id,
+                float(fila.estoque_novo),
+                cls._observacao_envio(fila),
             )
-            return cls._mark_success(db, fila, sync)
         except Exception as error:
-            if _erro_rate_limit_bling(error):
-                cooldown_seconds = _registrar_cooldown_rate_limit(error)
-                fila.tentativas = max(int(fila.tentativas or 0) - 1, 0)
-                sync.tentativas_sync = fila.tentativas
-                return cls._mark_rate_limited(db, fila, sync, error, cooldown_seconds)
-            if _erro_autenticacao_bling(error):
-                return cls._mark_auth_invalid(db, fila, sync, error)
-            return cls._mark_error(db, fila, sync, error)
+            return cls._concluir_envio(db, fila, sync, error)
+        return cls._concluir_envio(db, fila, sync, None)
 
     @classmethod
     def process_queue_item_by_id(cls, db: Session, queue_id: int) -> Dict[str, Any]:
@@ -544,93 +593,3 @@ class BlingSyncQueueMixin:
             return {"ok": False, "detail": str(error)}
         finally:
             db.close()
-
-    @classmethod
-    def process_pending_queue(cls, limit: int = 20) -> Dict[str, Any]:
-        db = SessionLocal()
-        now = utc_now()
-        try:
-            processados = 0
-            sucessos = 0
-            erros = 0
-            rate_limited = False
-            cooldown_seconds = 0.0
-            auth_invalid = False
-            auth_detail = None
-
-            tenant_rows = (
-                db.query(Tenant.id)
-                .filter(Tenant.status == "active")
-                .order_by(Tenant.created_at.asc())
-                .all()
-            )
-
-            for (tenant_id_raw,) in tenant_rows:
-                if processados >= limit:
-                    break
-
-                try:
-                    tenant_uuid = UUID(str(tenant_id_raw))
-                except (TypeError, ValueError):
-                    logger.warning(
-                        "[BLING SYNC] Ignorando tenant_id invalido na fila: %s",
-                        tenant_id_raw,
-                    )
-                    continue
-
-                with tenant_context(tenant_uuid):
-                    restante = max(0, limit - processados)
-                    filas = (
-                        db.query(ProdutoBlingSyncQueue)
-                        .filter(
-                            ProdutoBlingSyncQueue.tenant_id == tenant_uuid,
-                            ProdutoBlingSyncQueue.status.in_(["pendente", "erro"]),
-                            ProdutoBlingSyncQueue.proxima_tentativa_em.isnot(None),
-                            ProdutoBlingSyncQueue.proxima_tentativa_em <= now,
-                        )
-                        .order_by(
-                            ProdutoBlingSyncQueue.forcar_sync.desc(),
-                            ProdutoBlingSyncQueue.proxima_tentativa_em.asc(),
-                            ProdutoBlingSyncQueue.updated_at.asc(),
-                        )
-                        .limit(restante)
-                        .all()
-                    )
-
-                    for fila in filas:
-                        result = cls.process_queue_item(db, fila)
-                        processados += 1
-                        if result.get("ok"):
-                            sucessos += 1
-                        else:
-                            erros += 1
-                            if result.get("rate_limited"):
-                                rate_limited = True
-                                cooldown_seconds = float(
-                                    result.get("cooldown_seconds") or 0.0
-                                )
-                                break
-                            if result.get("auth_invalid"):
-                                auth_invalid = True
-                                auth_detail = result.get("detail")
-                                break
-
-                if rate_limited or auth_invalid:
-                    break
-
-            db.commit()
-            return {
-                "processados": processados,
-                "sucessos": sucessos,
-                "erros": erros,
-                "rate_limited": rate_limited,
-                "cooldown_seconds": cooldown_seconds,
-                "auth_invalid": auth_invalid,
-                "detail": auth_detail,
-            }
-        except Exception:
-            db.rollback()
-            logger.exception("[BLING SYNC] Erro ao processar fila pendente")
-            return {"processados": 0, "sucessos": 0, "erros": 1}
-        finally:
-            db.close()
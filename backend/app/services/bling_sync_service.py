@@ -10,6 +10,7 @@ from app.db import SessionLocal
 from app.utils.tenant_safe_sql import execute_tenant_safe_all, execute_tenant_safe_one
 
 from .bling_sync_auto_link import BlingSyncAutoLinkMixin
+from .bling_sync_pipeline import BlingSyncPipelineMixin
 from .bling_sync_queue import BlingSyncQueueMixin
 from .bling_sync_reprocess import BlingSyncReprocessMixin
 from .bling_sync_reconciliation import BlingSyncReconciliationMixin
@@ -47,6 +48,7 @@ from .bling_sync_shared import (
 
 class BlingSyncService(
     BlingSyncQueueMixin,
+    BlingSyncPipelineMixin,
     BlingSyncReprocessMixin,
     BlingSyncReconciliationMixin,
     BlingSyncAutoLinkMixin,
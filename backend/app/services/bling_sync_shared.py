@@ -15,7 +15,8 @@ from typing import Any, Dict, Optional
 from sqlalchemy import desc, func
 from sqlalchemy.orm import Session
 
-from app.bling_integration import BlingAPI
+from app.bling_integration import BlingAPI, _load_bling_runtime_config
+from app.bling_integration_parts.http_client import penalizar_rate_limit_bling
 from app.bling_sync.product_matching import _item_bling_tem_sku_estrito
 from app.produtos_models import ProdutoBlingSyncQueue
 from app.tenancy.context import get_current_tenant
@@ -32,6 +33,9 @@ DIVERGENCIA_MINIMA = 0.01
 BLING_STOCK_MIN_INTERVAL_SECONDS = float(
     os.getenv("BLING_STOCK_MIN_INTERVAL_SECONDS", "0.45")
 )
+# Envios de estoque simultaneos por ciclo da fila (o ritmo continua limitado
+# pela janela compartilhada e pelo token bucket do cliente HTTP)
+BLING_STOCK_SYNC_IN_FLIGHT = int(os.getenv("BLING_STOCK_SYNC_IN_FLIGHT", "3"))
 BLING_RATE_LIMIT_COOLDOWN_SECONDS = float(
     os.getenv("BLING_RATE_LIMIT_COOLDOWN_SECONDS", "4")
 )
@@ -313,6 +317,10 @@ def _registrar_cooldown_rate_limit(valor: Any) -> float:
             now + cooldown,
         )
         shared.save()
+    # Mesmo cooldown no token bucket do cliente HTTP (todas as chamadas da conta)
+    penalizar_rate_limit_bling(
+        cooldown, account=_load_bling_runtime_config().get("client_id")
+    )
     return cooldown
 
 
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 from typing import Any
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from app.audit_log import log_action
+from app.audit_log import _resolver_tenant_id, log_action
 from app.middlewares.request_context import get_request_id
+from app.models import AuditLog
 from app.utils.logger import logger as structured_logger
 
 
@@ -273,3 +276,59 @@ def log_business_event(
     except Exception:
         pass
     return audit_row
+
+
+def log_business_events_bulk(
+    *,
+    db: Session,
+    tenant_id: Any,
+    user_id: int | None,
+    event: str,
+    entity_type: str,
+    entries: list[dict[str, Any]],
+) -> int:
+    """
+    Versao em lote de ``log_business_event`` para um mesmo evento: grava as
+    linhas de audit_logs com um unico executemany, sem flush por linha.
+    Cada entry traz ``entity_id``, ``metadata`` e ``details``. Nao commita.
+    """
+    tenant_id_resolvido = _resolver_tenant_id(tenant_id)
+    if tenant_id_resolvido is None or not entries:
+        return 0
+
+    action = _audit_action(event)
+    request_id = get_request_id()
+    now = datetime.now(timezone.utc)
+    occurred_at = now.isoformat().replace("+00:00", "Z")
+    rows = [
+        {
+            "tenant_id": tenant_id_resolvido,
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entry.get("entity_id"),
+            "old_value": None,
+            "new_value": json.dumps(
+                {
+                    "event": event,
+                    "request_id": request_id,
+                    "occurred_at": occurred_at,
+                    "metadata": _redact(entry.get("metadata") or {}),
+                }
+            ),
+            "details": entry.get("details") or event,
+            "timestamp": now,
+        }
+        for entry in entries
+    ]
+    db.execute(insert(AuditLog), rows)
+    structured_logger.info(
+        "business_event_bulk",
+        "Business audit events recorded",
+        business_event=event,
+        request_id=request_id,
+        tenant_id=_to_serializable_id(tenant_id),
+        entity_type=entity_type,
+        count=len(rows),
+    )
+    return len(rows)
@@ -0,0 +1,169 @@
+"""
+Cache persistente do Google Maps por tenant.
+
+Os mesmos endereços de clientes e a origem da loja são consultados o tempo
+todo (cotação de frete, criação de rota, ETA). As respostas ficam em
+``google_maps_cache`` com chave = sha256 dos endereços normalizados (saída de
+``limpar_endereco_para_maps`` em minúsculas e sem espaços repetidos):
+
+- ``geocode``: latitude/longitude de um endereço;
+- ``distancia``: elemento da Distance Matrix de um par origem → destino;
+- ``rota``: trechos e ordem de paradas retornados pela Directions API.
+
+Cada tipo tem TTL próprio (``GOOGLE_MAPS_CACHE_*_DIAS``); entradas vencidas são
+ignoradas na leitura e apagadas periodicamente na escrita. Sem tenant no
+contexto, ou se o banco falhar, o cache é ignorado e a chamada segue para o
+provedor normalmente.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from app.db import SessionLocal
+from app.google_maps_cache_models import GoogleMapsCache
+from app.tenancy.context import get_current_tenant
+
+logger = logging.getLogger(__name__)
+
+TIPO_GEOCODE = "geocode"
+TIPO_DISTANCIA = "distancia"
+TIPO_ROTA = "rota"
+
+TTL_POR_TIPO = {
+    TIPO_GEOCODE: timedelta(
+        days=int(os.getenv("GOOGLE_MAPS_CACHE_GEOCODE_DIAS", "90"))
+    ),
+    TIPO_DISTANCIA: timedelta(
+        days=int(os.getenv("GOOGLE_MAPS_CACHE_DISTANCIA_DIAS", "30"))
+    ),
+    TIPO_ROTA: timedelta(days=int(os.getenv("GOOGLE_MAPS_CACHE_ROTA_DIAS", "7"))),
+}
+INTERVALO_LIMPEZA = timedelta(hours=1)
+LOTE_CHAVES = 1000
+
+_SEPARADOR_CHAVE = "\x1f"
+
+
+def normalizar_endereco_cache(endereco_maps: str) -> str:
+    """Forma canônica de um endereço já limpo por ``limpar_endereco_para_maps``."""
+    return re.sub(r"\s+", " ", str(endereco_maps or "")).strip().casefold()
+
+
+def chave_cache(*enderecos_maps: str) -> str:
+    texto = _SEPARADOR_CHAVE.join(
+        normalizar_endereco_cache(endereco) for endereco in enderecos_maps
+    )
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class CacheGoogleMaps:
+    """Leitura e gravação em lote de ``google_maps_cache`` do tenant atual."""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._ultima_limpeza: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def _sessao(self):
+        return (self._session_factory or SessionLocal)()
+
+    def buscar(self, tipo: str, chaves: Iterable[str]) -> Dict[str, Any]:
+        """Payloads válidos (não vencidos) das chaves pedidas."""
+        tenant_id = get_current_tenant()
+        chaves = sorted(set(chaves))
+        if tenant_id is None or not chaves:
+            return {}
+
+        db = self._sessao()
+        try:
+            agora = _agora()
+            encontrados: Dict[str, Any] = {}
+            # Matrizes de roteirização pedem milhares de pares de uma vez
+            for inicio in range(0, len(chaves), LOTE_CHAVES):
+                linhas = db.query(
+                    GoogleMapsCache.chave, GoogleMapsCache.payload
+                ).filter(
+                    GoogleMapsCache.tenant_id == tenant_id,
+                    GoogleMapsCache.tipo == tipo,
+                    GoogleMapsCache.chave.in_(chaves[inicio : inicio + LOTE_CHAVES]),
+                    GoogleMapsCache.expira_em > agora,
+                )
+                encontrados.update({chave: payload for chave, payload in linhas})
+            return encontrados
+        except Exception as error:
+            logger.warning("[GOOGLE MAPS CACHE] Leitura ignorada: %s", error)
+            return {}
+        finally:
+            db.close()
+
+    def gravar(self, tipo: str, itens: Dict[str, tuple]) -> None:
+        """Grava ``{chave: (enderecos, payload)}`` substituindo entradas antigas."""
+        tenant_id = get_current_tenant()
+        if tenant_id is None or not itens:
+            return
+
+        agora = _agora()
+        expira_em = agora + TTL_POR_TIPO[tipo]
+        db = self._sessao()
+        try:
+            tabela = GoogleMapsCache.__table__
+            chaves = list(itens)
+            for inicio in range(0, len(chaves), LOTE_CHAVES):
+                db.execute(
+                    delete(tabela).where(
+                        tabela.c.tenant_id == tenant_id,
+                        tabela.c.tipo == tipo,
+                        tabela.c.chave.in_(chaves[inicio : inicio + LOTE_CHAVES]),
+                    )
+                )
+            db.add_all(
+                GoogleMapsCache(
+                    tenant_id=tenant_id,
+                    tipo=tipo,
+                    chave=chave,
+                    enderecos=enderecos,
+                    payload=payload,
+                    expira_em=expira_em,
+                )
+                for chave, (enderecos, payload) in itens.items()
+            )
+            self._limpar_vencidos(db, agora)
+            db.commit()
+        except IntegrityError:
+            # Outro worker gravou a mesma chave ao mesmo tempo: a dele vale
+            db.rollback()
+        except Exception as error:
+            db.rollback()
+            logger.warning("[GOOGLE MAPS CACHE] Gravação ignorada: %s", error)
+        finally:
+            db.close()
+
+    def _limpar_vencidos(self, db, agora: datetime) -> None:
+        with self._lock:
+            if (
+                self._ultima_limpeza is not None
+                and agora - self._ultima_limpeza < INTERVALO_LIMPEZA
+            ):
+                return
+            self._ultima_limpeza = agora
+        tabela = GoogleMapsCache.__table__
+        db.execute(delete(tabela).where(tabela.c.expira_em <= agora))
+
+
+def descricao_enderecos(enderecos_maps: Sequence[str]) -> str:
+    return " | ".join(normalizar_endereco_cache(e) for e in enderecos_maps)[:1000]
+
+
+cache_google_maps = CacheGoogleMaps()
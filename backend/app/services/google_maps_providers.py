@@ -0,0 +1,225 @@
+"""
+Provedores de mapas usados por ``google_maps_service``.
+
+- ``ProvedorGoogleMaps``: chamadas HTTP à Distance Matrix, Geocoding e
+  Directions (mesmas mensagens de erro de antes).
+- ``ProvedorMapsLocal``: provedor offline e determinístico (coordenadas fixas
+  ou derivadas do endereço, distância em linha reta × fator de ruas). Serve para
+  testes e para desenvolver sem chave da API: ``MAPS_PROVIDER=local``.
+"""
+
+import hashlib
+import os
+from collections import Counter
+from math import asin, cos, radians, sin, sqrt
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from app.config import GOOGLE_MAPS_API_KEY
+
+GOOGLE_DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+GOOGLE_DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+GOOGLE_GEOCODING_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Limites da Distance Matrix por requisição
+MATRIZ_MAX_ORIGENS = 25
+MATRIZ_MAX_DESTINOS = 25
+MATRIZ_MAX_ELEMENTOS = 100
+
+
+def _blocos(itens: Sequence[str], tamanho: int):
+    for inicio in range(0, len(itens), tamanho):
+        yield inicio, itens[inicio : inicio + tamanho]
+
+
+class ProvedorGoogleMaps:
+    nome = "google"
+
+    @staticmethod
+    def _chave_api() -> str:
+        if not GOOGLE_MAPS_API_KEY:
+            raise Exception("GOOGLE_MAPS_API_KEY não configurada")
+        return GOOGLE_MAPS_API_KEY
+
+    @staticmethod
+    def _get(url: str, params: Dict[str, Any], timeout: int, api: str) -> Dict:
+        try:
+            response = requests.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            raise Exception(f"Erro ao chamar {api}: {str(e)}")
+
+    def matriz_distancias(
+        self, origens: Sequence[str], destinos: Sequence[str]
+    ) -> List[List[Dict[str, Any]]]:
+        """Elementos ``[origem][destino]``; uma requisição se couber nos limites."""
+        chave = self._chave_api()
+        tamanho_destinos = min(MATRIZ_MAX_DESTINOS, len(destinos)) or 1
+        tamanho_origens = max(
+            1, min(MATRIZ_MAX_ORIGENS, MATRIZ_MAX_ELEMENTOS // tamanho_destinos)
+        )
+        matriz: List[List[Dict[str, Any]]] = [[{}] * len(destinos) for _ in origens]
+
+        for inicio_o, bloco_origens in _blocos(origens, tamanho_origens):
+            for inicio_d, bloco_destinos in _blocos(destinos, tamanho_destinos):
+                data = self._get(
+                    GOOGLE_DISTANCE_MATRIX_URL,
+                    {
+                        "origins": "|".join(bloco_origens),
+                        "destinations": "|".join(bloco_destinos),
+                        "key": chave,
+                        "units": "metric",
+                    },
+                    10,
+                    "Google Maps API",
+                )
+                if data.get("status") != "OK":
+                    error_message = data.get("error_message", "Erro desconhecido")
+                    raise Exception(
+                        f"Erro Google Maps: {data.get('status')} - {error_message}"
+                    )
+                for i, row in enumerate(data["rows"]):
+                    for j, element in enumerate(row["elements"]):
+                        matriz[inicio_o + i][inicio_d + j] = element
+        return matriz
+
+    def geocode(self, endereco: str) -> Dict[str, float]:
+        data = self._get(
+            GOOGLE_GEOCODING_URL,
+            {"address": endereco, "key": self._chave_api()},
+            10,
+            "Google Geocoding API",
+        )
+        if data.get("status") != "OK":
+            error_message = data.get("error_message", "Erro desconhecido")
+            raise Exception(f"Erro Geocoding: {data.get('status')} - {error_message}")
+        return data["results"][0]["geometry"]["location"]
+
+    def rota(self, origem: str, destino: str, paradas: Sequence[str]) -> Dict[str, Any]:
+        """Rota da Directions API com ``optimize:true`` nas paradas."""
+        params = {
+            "origin": origem,
+            "destination": destino,
+            "key": self._chave_api(),
+            "units": "metric",
+        }
+        if paradas:
+            # optimize:true pede ao Google para otimizar a ordem das paradas
+            params["waypoints"] = "optimize:true|" + "|".join(paradas)
+
+        data = self._get(GOOGLE_DIRECTIONS_URL, params, 15, "Google Directions API")
+        if data.get("status") != "OK":
+            error_message = data.get("error_message", "Erro desconhecido")
+            raise Exception(f"Erro Directions: {data.get('status')} - {error_message}")
+        return data["routes"][0]
+
+
+class ProvedorMapsLocal:
+    """Provedor offline: nenhuma chamada de rede, resultados reproduzíveis."""
+
+    nome = "local"
+    # Centro aproximado de São Paulo; endereços desconhecidos caem a até ~11 km
+    ORIGEM_PADRAO = (-23.5505, -46.6333)
+    FATOR_RUAS = 1.3
+    VELOCIDADE_KMH = 30.0
+
+    def __init__(self, coordenadas: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.coordenadas = {
+            self._normalizar(endereco): coordenada
+            for endereco, coordenada in (coordenadas or {}).items()
+        }
+        self.chamadas: Counter = Counter()
+
+    @staticmethod
+    def _normalizar(endereco: str) -> str:
+        return " ".join(str(endereco or "").split()).casefold()
+
+    def _coordenada(self, endereco: str) -> Tuple[float, float]:
+        normalizado = self._normalizar(endereco)
+        if normalizado in self.coordenadas:
+            return self.coordenadas[normalizado]
+        digest = hashlib.sha256(normalizado.encode("utf-8")).digest()
+        desvio_lat = (int.from_bytes(digest[:4], "big") / 0xFFFFFFFF - 0.5) * 0.2
+        desvio_lng = (int.from_bytes(digest[4:8], "big") / 0xFFFFFFFF - 0.5) * 0.2
+        return (
+            round(self.ORIGEM_PADRAO[0] + desvio_lat, 7),
+            round(self.ORIGEM_PADRAO[1] + desvio_lng, 7),
+        )
+
+    @staticmethod
+    def _linha_reta_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+        d_lat = radians(b[0] - a[0])
+        d_lng = radians(b[1] - a[1])
+        h = (
+            sin(d_lat / 2) ** 2
+            + cos(radians(a[0])) * cos(radians(b[0])) * sin(d_lng / 2) ** 2
+        )
+        return 2 * 6371.0 * asin(sqrt(h))
+
+    def _trecho(self, origem: str, destino: str) -> Dict[str, Any]:
+        km = (
+            self._linha_reta_km(self._coordenada(origem), self._coordenada(destino))
+            * self.FATOR_RUAS
+        )
+        segundos = int(round(km / self.VELOCIDADE_KMH * 3600))
+        return {
+            "status": "OK",
+            "distance": {"value": int(round(km * 1000)), "text": f"{km:.1f} km"},
+            "duration": {
+                "value": segundos,
+                "text": f"{max(1, round(segundos / 60))} mins",
+            },
+        }
+
+    def matriz_distancias(
+        self, origens: Sequence[str], destinos: Sequence[str]
+    ) -> List[List[Dict[str, Any]]]:
+        self.chamadas["matriz_distancias"] += 1
+        return [[self._trecho(o, d) for d in destinos] for o in origens]
+
+    def geocode(self, endereco: str) -> Dict[str, float]:
+        self.chamadas["geocode"] += 1
+        lat, lng = self._coordenada(endereco)
+        return {"lat": lat, "lng": lng}
+
+    def rota(self, origem: str, destino: str, paradas: Sequence[str]) -> Dict[str, Any]:
+        self.chamadas["rota"] += 1
+        pontos = [origem, *paradas, destino]
+        legs = []
+        for inicio, fim in zip(pontos, pontos[1:]):
+            trecho = self._trecho(inicio, fim)
+            legs.append(
+                {
+                    "start_address": inicio,
+                    "end_address": fim,
+                    "distance": trecho["distance"],
+                    "duration": trecho["duration"],
+                }
+            )
+        return {"legs": legs, "waypoint_order": list(range(len(paradas)))}
+
+
+_provedor_configurado = None
+
+
+def definir_provedor_maps(provedor) -> None:
+    """Troca o provedor (``None`` volta ao padrão de ``MAPS_PROVIDER``)."""
+    global _provedor_configurado
+    _provedor_configurado = provedor
+
+
+def obter_provedor_maps():
+    if _provedor_configurado is not None:
+        return _provedor_configurado
+    if os.getenv("MAPS_PROVIDER", "google").strip().lower() == "local":
+        return ProvedorMapsLocal()
+    return ProvedorGoogleMaps()
+
+
+def provedor_maps_configurado() -> bool:
+    """Há a quem consultar: provedor definido, ``MAPS_PROVIDER=local`` ou chave."""
+    return not isinstance(obter_provedor_maps(), ProvedorGoogleMaps) or bool(
+        GOOGLE_MAPS_API_KEY
+    )
@@ -1,19 +1,29 @@
 """
 Google Maps Service - Etapa 9.2
 Serviços para integração com Google Maps API (Distance Matrix, Directions, Geocoding)
+
+Geocodes, distâncias e rotas passam pelo cache persistente por tenant
+(``google_maps_cache``); a chamada externa fica no provedor configurado
+(``google_maps_providers``).
 """
 
 import re
-import requests
 from decimal import Decimal
 from typing import Dict, Any, List, Tuple
-from app.config import GOOGLE_MAPS_API_KEY
-
-
-# URLs da API
-GOOGLE_DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
-GOOGLE_DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
-GOOGLE_GEOCODING_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+from app.services.google_maps_cache import (
+    TIPO_DISTANCIA,
+    TIPO_GEOCODE,
+    TIPO_ROTA,
+    cache_google_maps,
+    chave_cache,
+    descricao_enderecos,
+)
+from app.services.google_maps_providers import (  # noqa: F401 (URLs reexportadas)
+    GOOGLE_DIRECTIONS_URL,
+    GOOGLE_DISTANCE_MATRIX_URL,
+    GOOGLE_GEOCODING_URL,
+    obter_provedor_maps,
+)
 
 _COMPLEMENTO_LABELS = (
     r"complemento|compl\.?|apto|apartamento|ap\.?|bloco|torre|sala|fundos|casa|"
@@ -69,6 +79,69 @@ def limpar_endereco_para_maps(endereco: str) -> str:
     return ", ".join(partes_limpas)
 
 
+def _endereco_maps(endereco: str) -> str:
+    return limpar_endereco_para_maps(endereco) or endereco
+
+
+def calcular_matriz_distancias(
+    origens: List[str], destinos: List[str]
+) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Distância/duração de todos os pares origem × destino, com cache por tenant
+
+    Pares já em cache não vão para a API; os demais são resolvidos em uma
+    única chamada da Distance Matrix com a matriz completa das origens e
+    destinos pendentes (dividida só se passar dos limites da API).
+
+    Returns:
+        Dict ``(origem, destino) -> elemento`` no formato da Distance Matrix
+        (``status``, ``distance``, ``duration``), com as chaves originais.
+    """
+    origens_maps = {origem: _endereco_maps(origem) for origem in origens}
+    destinos_maps = {destino: _endereco_maps(destino) for destino in destinos}
+    chaves = {
+        (origem, destino): chave_cache(origens_maps[origem], destinos_maps[destino])
+        for origem in origens_maps
+        for destino in destinos_maps
+    }
+
+    em_cache = cache_google_maps.buscar(TIPO_DISTANCIA, chaves.values())
+    pendentes = [par for par, chave in chaves.items() if chave not in em_cache]
+    if pendentes:
+        origens_pendentes = list(
+            dict.fromkeys(origens_maps[origem] for origem, _ in pendentes)
+        )
+        destinos_pendentes = list(
+            dict.fromkeys(destinos_maps[destino] for _, destino in pendentes)
+        )
+        matriz = obter_provedor_maps().matriz_distancias(
+            origens_pendentes, destinos_pendentes
+        )
+        novos = {}
+        for i, origem_maps in enumerate(origens_pendentes):
+            for j, destino_maps in enumerate(destinos_pendentes):
+                elemento = matriz[i][j]
+                chave = chave_cache(origem_maps, destino_maps)
+                em_cache[chave] = elemento
+                # Só rotas válidas vão para o cache; erros são tentados de novo
+                if elemento.get("status") == "OK":
+                    novos[chave] = (
+                        descricao_enderecos([origem_maps, destino_maps]),
+                        elemento,
+                    )
+        cache_google_maps.gravar(TIPO_DISTANCIA, novos)
+
+    return {par: em_cache[chave] for par, chave in chaves.items()}
+
+
+def _elemento_distancia(origem: str, destino: str) -> Dict[str, Any]:
+    element = calcular_matriz_distancias([origem], [destino])[(origem, destino)]
+
+    if element.get("status") != "OK":
+        raise Exception(f"Rota inválida: {element.get('status')}")
+    return element
+
+
 def calcular_distancia_km(origem: str, destino: str) -> Decimal:
     """
     Calcula distância em KM entre origem e destino usando Google Distance Matrix API
@@ -91,33 +164,7 @@ def calcular_distancia_km(origem: str, destino: str) -> Decimal:
         >>> logger.info(f"{distancia} km")
         2.41 km
     """
-    if not GOOGLE_MAPS_API_KEY:
-        raise Exception("GOOGLE_MAPS_API_KEY não configurada")
-
-    params = {
-        "origins": limpar_endereco_para_maps(origem) or origem,
-        "destinations": limpar_endereco_para_maps(destino) or destino,
-        "key": GOOGLE_MAPS_API_KEY,
-        "units": "metric",
-    }
-
-    try:
-        response = requests.get(GOOGLE_DISTANCE_MATRIX_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        raise Exception(f"Erro ao chamar Google Maps API: {str(e)}")
-
-    # Validar resposta
-    if data.get("status") != "OK":
-        error_message = data.get("error_message", "Erro desconhecido")
-        raise Exception(f"Erro Google Maps: {data.get('status')} - {error_message}")
-
-    # Validar elemento
-    element = data["rows"][0]["elements"][0]
-
-    if element.get("status") != "OK":
-        raise Exception(f"Rota inválida: {element.get('status')}")
+    element = _elemento_distancia(origem, destino)
 
     # Extrair distância em metros e converter para KM
     distancia_m = element["distance"]["value"]
@@ -145,31 +192,7 @@ def calcular_distancia_com_duracao(origem: str, destino: str) -> Dict[str, Any]:
         >>> resultado = calcular_distancia_com_duracao(origem, destino)
         >>> logger.info(f"{resultado['distancia_km']} km em {resultado['duracao_minutos']} minutos")
     """
-    if not GOOGLE_MAPS_API_KEY:
-        raise Exception("GOOGLE_MAPS_API_KEY não configurada")
-
-    params = {
-        "origins": limpar_endereco_para_maps(origem) or origem,
-        "destinations": limpar_endereco_para_maps(destino) or destino,
-        "key": GOOGLE_MAPS_API_KEY,
-        "units": "metric",
-    }
-
-    try:
-        response = requests.get(GOOGLE_DISTANCE_MATRIX_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        raise Exception(f"Erro ao chamar Google Maps API: {str(e)}")
-
-    if data.get("status") != "OK":
-        error_message = data.get("error_message", "Erro desconhecido")
-        raise Exception(f"Erro Google Maps: {data.get('status')} - {error_message}")
-
-    element = data["rows"][0]["elements"][0]
-
-    if element.get("status") != "OK":
-        raise Exception(f"Rota inválida: {element.get('status')}")
+    element = _elemento_distancia(origem, destino)
 
     # Extrair dados
     distancia_m = element["distance"]["value"]
@@ -226,31 +249,53 @@ def geocode_endereco(endereco: str) -> Tuple[Decimal, Decimal]:
         >>> logger.info(f"Lat: {lat}, Lng: {lng}")
         Lat: -23.5614117, Lng: -46.6558999
     """
-    if not GOOGLE_MAPS_API_KEY:
-        raise Exception("GOOGLE_MAPS_API_KEY não configurada")
+    endereco_maps = _endereco_maps(endereco)
+    chave = chave_cache(endereco_maps)
+
+    location = cache_google_maps.buscar(TIPO_GEOCODE, [chave]).get(chave)
+    if location is None:
+        location = obter_provedor_maps().geocode(endereco_maps)
+        cache_google_maps.gravar(
+            TIPO_GEOCODE,
+            {chave: (descricao_enderecos([endereco_maps]), dict(location))},
+        )
 
-    params = {
-        "address": limpar_endereco_para_maps(endereco) or endereco,
-        "key": GOOGLE_MAPS_API_KEY,
-    }
+    latitude = Decimal(str(location["lat"]))
+    longitude = Decimal(str(location["lng"]))
 
-    try:
-        response = requests.get(GOOGLE_GEOCODING_URL, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        raise Exception(f"Erro ao chamar Google Geocoding API: {str(e)}")
+    return (latitude, longitude)
 
-    if data.get("status") != "OK":
-        error_message = data.get("error_message", "Erro desconhecido")
-        raise Exception(f"Erro Geocoding: {data.get('status')} - {error_message}")
 
-    location = data["results"][0]["geometry"]["location"]
+def geocodificar_enderecos(enderecos: List[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Coordenadas de vários endereços com uma única leitura do cache
 
-    latitude = Decimal(str(location["lat"]))
-    longitude = Decimal(str(location["lng"]))
+    Só os endereços fora do cache vão para o provedor (um geocode cada); os
+    novos resultados são gravados juntos no fim.
 
-    return (latitude, longitude)
+    Returns:
+        Dict ``endereco -> (latitude, longitude)`` com as chaves originais.
+    """
+    enderecos_maps = {endereco: _endereco_maps(endereco) for endereco in enderecos}
+    chaves = {
+        endereco: chave_cache(endereco_maps)
+        for endereco, endereco_maps in enderecos_maps.items()
+    }
+    em_cache = cache_google_maps.buscar(TIPO_GEOCODE, chaves.values())
+
+    novos = {}
+    for endereco, chave in chaves.items():
+        if chave in em_cache:
+            continue
+        location = dict(obter_provedor_maps().geocode(enderecos_maps[endereco]))
+        em_cache[chave] = location
+        novos[chave] = (descricao_enderecos([enderecos_maps[endereco]]), location)
+    cache_google_maps.gravar(TIPO_GEOCODE, novos)
+
+    return {
+        endereco: (float(em_cache[chave]["lat"]), float(em_cache[chave]["lng"]))
+        for endereco, chave in chaves.items()
+    }
 
 
 def calcular_rota_multiplos_pontos(
@@ -279,38 +324,33 @@ def calcular_rota_multiplos_pontos(
         ... )
         >>> logger.info(f"Total: {resultado['distancia_total_km']} km")
     """
-    if not GOOGLE_MAPS_API_KEY:
-        raise Exception("GOOGLE_MAPS_API_KEY não configurada")
-
-    origem_maps = limpar_endereco_para_maps(origem) or origem
-    destino_maps = limpar_endereco_para_maps(destino) or destino
-    paradas_maps = [limpar_endereco_para_maps(parada) or parada for parada in paradas]
-
-    params = {
-        "origin": origem_maps,
-        "destination": destino_maps,
-        "key": GOOGLE_MAPS_API_KEY,
-        "units": "metric",
-    }
-
-    # Adicionar paradas (waypoints)
-    if paradas_maps:
-        # optimize:true pede ao Google para otimizar a ordem das paradas
-        waypoints_str = "optimize:true|" + "|".join(paradas_maps)
-        params["waypoints"] = waypoints_str
-
-    try:
-        response = requests.get(GOOGLE_DIRECTIONS_URL, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        raise Exception(f"Erro ao chamar Google Directions API: {str(e)}")
-
-    if data.get("status") != "OK":
-        error_message = data.get("error_message", "Erro desconhecido")
-        raise Exception(f"Erro Directions: {data.get('status')} - {error_message}")
-
-    route = data["routes"][0]
+    origem_maps = _endereco_maps(origem)
+    destino_maps = _endereco_maps(destino)
+    paradas_maps = [_endereco_maps(parada) for parada in paradas]
+
+    enderecos = [origem_maps, destino_maps, *paradas_maps]
+    chave = chave_cache(*enderecos)
+    route = cache_google_maps.buscar(TIPO_ROTA, [chave]).get(chave)
+    if route is None:
+        route = obter_provedor_maps().rota(origem_maps, destino_maps, paradas_maps)
+        route = {
+            "legs": [
+                {
+                    campo: leg[campo]
+                    for campo in (
+                        "start_address",
+                        "end_address",
+                        "distance",
+                        "duration",
+                    )
+                }
+                for leg in route["legs"]
+            ],
+            "waypoint_order": route.get("waypoint_order", []),
+        }
+        cache_google_maps.gravar(
+            TIPO_ROTA, {chave: (descricao_enderecos(enderecos), route)}
+        )
 
     # Calcular totais
     distancia_total_m = sum(leg["distance"]["value"] for leg in route["legs"])
@@ -346,17 +386,21 @@ def calcular_rota_multiplos_pontos(
 
 
 def calcular_rota_otimizada(
-    origem: str, destinos: List[str]
+    origem: str, destinos: List[str], retorna_origem: bool = False
 ) -> Tuple[List[int], List[Dict[str, Any]]]:
     """
-    ETAPA 9.3 - Calcula a melhor ordem de entregas usando Google Directions API
+    ETAPA 9.3 - Calcula a melhor ordem de entregas
 
-    Usa optimize:true para que o Google retorne a sequência otimizada que
-    minimiza distância/tempo total.
+    A ordem sai do roteirizador local (``roteirizacao_local``): matriz de
+    distâncias do cache por tenant, com os pares ainda não consultados numa
+    chamada da Distance Matrix (linha reta só sem chave ou com a API fora),
+    vizinho mais próximo + 2-opt/or-opt. Nenhuma chamada à Directions API é
+    feita.
 
     Args:
         origem: Endereço de partida (loja)
         destinos: Lista de endereços de entrega (N entregas)
+        retorna_origem: Se True, a volta até a loja entra no custo da rota
 
     Returns:
         Tupla com:
@@ -364,7 +408,7 @@ def calcular_rota_otimizada(
             - legs (List[Dict]): Detalhes de cada trecho com distância e duração
 
     Raises:
-        Exception: Se houver erro na API ou rota inválida
+        Exception: Se a lista estiver vazia ou o geocode falhar
 
     Exemplo:
         >>> origem = "Rua da Loja, 100"
@@ -378,57 +422,16 @@ def calcular_rota_otimizada(
         >>> logger.info(f"1ª parada: Cliente {ordem[0] + 1}")  # Ex: Cliente B
 
     Detalhes dos legs:
-        Cada item contém:
+        Cada item (um por parada, na ordem de ``ordem``) contém:
         - distance.value: distância em metros
         - distance.text: distância formatada
         - duration.value: duração em segundos
         - duration.text: duração formatada
+        - estimado: True se o trecho é linha reta (não medido no mapa)
     """
-    if not GOOGLE_MAPS_API_KEY:
-        raise Exception("GOOGLE_MAPS_API_KEY não configurada")
-
     if not destinos:
         raise Exception("Lista de destinos está vazia")
 
-    origem_maps = limpar_endereco_para_maps(origem) or origem
-    destinos_maps = [
-        limpar_endereco_para_maps(destino) or destino for destino in destinos
-    ]
-
-    if not destinos_maps:
-        raise Exception("Lista de destinos esta vazia apos limpeza dos enderecos")
-
-    # Montar waypoints com optimize:true
-    waypoints = "|".join(destinos_maps)
-
-    params = {
-        "origin": origem_maps,
-        "destination": destinos_maps[-1],  # Ultimo destino (sera reordenado)
-        "waypoints": f"optimize:true|{waypoints}",
-        "key": GOOGLE_MAPS_API_KEY,
-        "units": "metric",
-    }
-
-    try:
-        response = requests.get(GOOGLE_DIRECTIONS_URL, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as e:
-        raise Exception(f"Erro ao chamar Google Directions API: {str(e)}")
-
-    # Validar resposta
-    if data.get("status") != "OK":
-        error_message = data.get("error_message", "Erro desconhecido")
-        raise Exception(
-            f"Erro Google Directions: {data.get('status')} - {error_message}"
-        )
-
-    route = data["routes"][0]
-
-    # Extrair ordem otimizada
-    ordem = route.get("waypoint_order", [])
-
-    # Extrair legs (trechos da rota)
-    legs = route["legs"]
+    from app.services.roteirizacao_local import otimizar_rota_unica
 
-    return ordem, legs
+    return otimizar_rota_unica(origem, destinos, retorna_origem=retorna_origem)
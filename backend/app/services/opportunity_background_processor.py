@@ -17,11 +17,11 @@ Estrutura preparada para:
 - Cache por sessão de venda
 """
 
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional
 from uuid import UUID
 from datetime import datetime
-import threading
-import time
+
+from app.cache.cache_manager import cache
 
 
 class OpportunityBackgroundProcessor:
@@ -298,27 +298,26 @@ class OpportunityBackgroundProcessor:
 
 class OpportunityCacheManager:
     """
-    Gerenciador de cache em memória para oportunidades preparadas.
+    Cache de oportunidades preparadas, sobre o cache compartilhado.
 
     Estrutura:
-    - Cache: Dict[(tenant_id, session_id), (oportunidades, timestamp)]
-    - TTL: 5 minutos
-    - Thread-safe com Lock
-    - Auto-cleanup periódico
+    - Namespace "pdv_oportunidades" no tenant, chave = session_id
+    - TTL: 5 minutos (expiracao e limite de memoria ficam com o cache LRU)
+    - Tag "pdv_sessao:<session_id>": venda finalizada/cancelada invalida
     """
 
     TTL_SECONDS = 300  # 5 minutos
+    NAMESPACE = "pdv_oportunidades"
 
-    def __init__(self):
-        self._cache: Dict[Tuple[UUID, str], Tuple[List[Dict[str, Any]], float]] = {}
-        self._lock = threading.Lock()
-        self._start_cleanup_thread()
+    @staticmethod
+    def tag_sessao(session_id: str) -> str:
+        return f"pdv_sessao:{session_id}"
 
     def set_opportunities(
         self, tenant_id: UUID, session_id: str, opportunities: List[Dict[str, Any]]
     ) -> None:
         """
-        Salva oportunidades no cache com timestamp.
+        Salva oportunidades no cache.
 
         Args:
             tenant_id: ID do tenant
@@ -326,10 +325,14 @@ class OpportunityCacheManager:
             opportunities: Lista de oportunidades preparadas
         """
         try:
-            with self._lock:
-                key = (tenant_id, session_id)
-                timestamp = time.time()
-                self._cache[key] = (opportunities, timestamp)
+            cache.set(
+                self.NAMESPACE,
+                session_id,
+                opportunities,
+                ttl=self.TTL_SECONDS,
+                tags=(self.tag_sessao(session_id),),
+                tenant_id=tenant_id,
+            )
         except Exception:
             pass  # Fail-safe: erro no cache não afeta sistema
 
@@ -347,19 +350,7 @@ class OpportunityCacheManager:
             Lista de oportunidades ou None se expirado/não encontrado
         """
         try:
-            with self._lock:
-                key = (tenant_id, session_id)
-                if key not in self._cache:
-                    return None
-
-                opportunities, timestamp = self._cache[key]
-
-                # Verificar se expirou
-                if time.time() - timestamp > self.TTL_SECONDS:
-                    del self._cache[key]  # Remover se expirado
-                    return None
-
-                return opportunities
+            return cache.get(self.NAMESPACE, session_id, tenant_id=tenant_id)
         except Exception:
             return None  # Fail-safe
 
@@ -372,43 +363,10 @@ class OpportunityCacheManager:
             session_id: ID da sessão
         """
         try:
-            with self._lock:
-                key = (tenant_id, session_id)
-                if key in self._cache:
-                    del self._cache[key]
+            cache.delete(self.NAMESPACE, session_id, tenant_id=tenant_id)
         except Exception:
             pass  # Fail-safe
 
-    def _cleanup_expired(self) -> None:
-        """
-        Remove entradas expiradas do cache (limpeza periódica).
-        """
-        try:
-            with self._lock:
-                now = time.time()
-                expired_keys = [
-                    key
-                    for key, (_, timestamp) in self._cache.items()
-                    if now - timestamp > self.TTL_SECONDS
-                ]
-                for key in expired_keys:
-                    del self._cache[key]
-        except Exception:
-            pass  # Fail-safe
-
-    def _start_cleanup_thread(self) -> None:
-        """
-        Inicia thread de limpeza automática (roda a cada 60 segundos).
-        """
-
-        def cleanup_loop():
-            while True:
-                time.sleep(60)  # Limpar a cada 1 minuto
-                self._cleanup_expired()
-
-        thread = threading.Thread(target=cleanup_loop, daemon=True)
-        thread.start()
-
 
 # ============================================================================
 # SINGLETON MANAGER - Gerencia instâncias por sessão (compartilhado no backend)
@@ -0,0 +1,252 @@
+"""
+Indice de bloqueio de pessoas duplicadas
+========================================
+
+Mantem ``pessoa_chaves_duplicidade`` em dia com ``clientes``: listener
+``after_flush`` da Session que, na mesma transacao da escrita, regrava as
+chaves (nome normalizado, CPF/CNPJ/CRMV validos, e-mail, telefones e chave
+fonetica) das pessoas inseridas, alteradas ou excluidas. As varreduras de
+``app.services.pessoa_duplicate_service`` leem so os grupos com mais de uma
+pessoa em vez de carregar o cadastro inteiro do tenant.
+
+O indice so e considerado completo depois que a reconstrucao do tenant grava
+a linha de ``pessoa_indices_duplicidade``; antes disso as chaves gravadas pelo
+listener cobrem apenas parte do cadastro. A primeira varredura sem essa marca
+dispara a reconstrucao em segundo plano
+(``garantir_chaves_duplicidade_pessoas``) e a API responde que o indice esta
+sendo montado.
+
+Registrado em ``app.db`` (carregado por API, workers e scripts); os modelos
+sao importados sob demanda para nao criar ciclo com ``app.db``.
+
+Escritas fora do ORM (SQL cru, bulk update, importacoes) nao passam por aqui;
+nesses casos use ``scripts/reconstruir_chaves_duplicidade_pessoas.py``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import weakref
+from datetime import datetime, timezone
+from typing import Any, Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, event, exists, insert, inspect, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.tenancy.context import tenant_context
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_CHAVE = ("nome", "ativo", "cpf", "cnpj", "crmv", "email", "telefone", "celular")
+LOTE_RECONSTRUCAO = 2000
+TABELA_CHAVES = "pessoa_chaves_duplicidade"
+
+_tabela_por_engine: "weakref.WeakKeyDictionary[Any, bool]" = weakref.WeakKeyDictionary()
+_em_reconstrucao: set = set()
+_em_reconstrucao_lock = threading.Lock()
+
+
+def indice_disponivel(bind) -> bool:
+    """Indica se a tabela de chaves existe (verificado uma vez por engine)."""
+    engine = getattr(bind, "engine", bind)
+    disponivel = _tabela_por_engine.get(engine)
+    if disponivel is None:
+        try:
+            disponivel = inspect(bind).has_table(TABELA_CHAVES)
+        except SQLAlchemyError:
+            return False
+        _tabela_por_engine[engine] = disponivel
+    return disponivel
+
+
+def _tenant_uuid(tenant_id: Any) -> UUID:
+    return tenant_id if isinstance(tenant_id, UUID) else UUID(str(tenant_id))
+
+
+def _gravar_chaves(connection, pessoas: Iterable[tuple[Any, int, Any]]) -> int:
+    """Regrava as chaves de ``(tenant_id, cliente_id, pessoa)``; pessoa None so apaga."""
+    from app.pessoa_duplicidade_models import PessoaChaveDuplicidade
+    from app.services.pessoa_duplicate_service import chaves_duplicidade_pessoa
+
+    pessoas = list(pessoas)
+    if not pessoas:
+        return 0
+    chaves = PessoaChaveDuplicidade.__table__
+    connection.execute(
+        delete(chaves).where(
+            chaves.c.cliente_id.in_(
+                sorted({cliente_id for _, cliente_id, _ in pessoas})
+            )
+        )
+    )
+    linhas = [
+        {
+            "tenant_id": _tenant_uuid(tenant_id),
+            "cliente_id": cliente_id,
+            "tipo": tipo,
+            "valor": valor,
+        }
+        for tenant_id, cliente_id, pessoa in pessoas
+        if pessoa is not None and tenant_id is not None
+        for tipo, valor in sorted(chaves_duplicidade_pessoa(pessoa))
+    ]
+    if linhas:
+        connection.execute(insert(chaves), linhas)
+    return len(linhas)
+
+
+def _mudou_chave(pessoa: Any) -> bool:
+    estado = inspect(pessoa)
+    return any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_CHAVE)
+
+
+def _atualizar_chaves_after_flush(session: Session, _flush_context) -> None:
+    from app.models import Cliente
+
+    pessoas = []
+    for colecao, operacao in (
+        (session.new, "novo"),
+        (session.dirty, "alterado"),
+        (session.deleted, "excluido"),
+    ):
+        for obj in colecao:
+            if not isinstance(obj, Cliente) or obj.id is None:
+                continue
+            if operacao == "excluido":
+                pessoas.append((obj.tenant_id, int(obj.id), None))
+            elif operacao == "novo" or _mudou_chave(obj):
+                pessoas.append((obj.tenant_id, int(obj.id), obj))
+    if not pessoas:
+        return
+
+    connection = session.connection()
+    if not indice_disponivel(connection):
+        return
+    _gravar_chaves(connection, pessoas)
+
+
+def _marcar_reconstruido(connection, tenant_uuid: UUID) -> None:
+    from app.pessoa_duplicidade_models import PessoaIndiceDuplicidade
+
+    marcas = PessoaIndiceDuplicidade.__table__
+    agora = datetime.now(timezone.utc)
+    atualizadas = connection.execute(
+        update(marcas)
+        .where(marcas.c.tenant_id == tenant_uuid)
+        .values(reconstruido_em=agora, updated_at=agora)
+    ).rowcount
+    if not atualizadas:
+        connection.execute(
+            insert(marcas).values(tenant_id=tenant_uuid, reconstruido_em=agora)
+        )
+
+
+def reconstruir_chaves_duplicidade_pessoas(db: Session, tenant_id: Any) -> int:
+    """Recalcula todas as chaves do tenant em lotes e marca o indice completo.
+
+    Retorna quantas chaves gravou. A marca vai na mesma transacao das chaves.
+    """
+    from app.models import Cliente
+    from app.pessoa_duplicidade_models import PessoaChaveDuplicidade
+
+    connection = db.connection()
+    chaves = PessoaChaveDuplicidade.__table__
+    clientes = Cliente.__table__
+    tenant_uuid = _tenant_uuid(tenant_id)
+    connection.execute(delete(chaves).where(chaves.c.tenant_id == tenant_uuid))
+
+    colunas = [clientes.c.id, *(clientes.c[campo] for campo in CAMPOS_CHAVE)]
+    ultimo_id = 0
+    total = 0
+    while True:
+        lote = connection.execute(
+            select(*colunas)
+            .where(
+                clientes.c.tenant_id == tenant_uuid,
+                clientes.c.id > ultimo_id,
+                clientes.c.ativo.is_not(False),
+            )
+            .order_by(clientes.c.id)
+            .limit(LOTE_RECONSTRUCAO)
+        ).all()
+        if not lote:
+            break
+        ultimo_id = int(lote[-1].id)
+        total += _gravar_chaves(
+            connection, ((tenant_uuid, int(linha.id), linha) for linha in lote)
+        )
+    _marcar_reconstruido(connection, tenant_uuid)
+    return total
+
+
+def indice_completo(db: Session, tenant_id: Any) -> bool:
+    """Indica se o indice do tenant ja foi reconstruido por inteiro."""
+    from app.pessoa_duplicidade_models import PessoaIndiceDuplicidade
+
+    marcas = PessoaIndiceDuplicidade.__table__
+    return bool(
+        db.execute(
+            select(exists().where(marcas.c.tenant_id == _tenant_uuid(tenant_id)))
+        ).scalar()
+    )
+
+
+def garantir_chaves_duplicidade_pessoas(db: Session, tenant_id: Any) -> bool:
+    """Indica se o indice do tenant esta completo.
+
+    Se nao estiver, agenda a reconstrucao em segundo plano e retorna False: a
+    varredura nao roda sobre um indice parcial nem reconstroi dentro do request.
+    """
+    if indice_completo(db, tenant_id):
+        return True
+    _agendar_reconstrucao(tenant_id)
+    return False
+
+
+def _agendar_reconstrucao(tenant_id: Any) -> None:
+    chave = str(tenant_id)
+    with _em_reconstrucao_lock:
+        if chave in _em_reconstrucao:
+            return
+        _em_reconstrucao.add(chave)
+    threading.Thread(
+        target=reconstruir_chaves_background,
+        kwargs={"tenant_id": tenant_id},
+        daemon=True,
+    ).start()
+
+
+def reconstruir_chaves_background(*, tenant_id: Any) -> None:
+    """Reconstroi o indice do tenant fora do request, em sessao propria."""
+    from app.db import SessionLocal
+
+    tenant_uuid = _tenant_uuid(tenant_id)
+    db = SessionLocal()
+    try:
+        with tenant_context(tenant_uuid):
+            reconstruir_chaves_duplicidade_pessoas(db, tenant_uuid)
+            db.commit()
+    except Exception:
+        # Ex.: outro processo marcou o tenant ao mesmo tempo; a proxima
+        # varredura agenda de novo se a marca nao existir
+        db.rollback()
+        logger.warning(
+            "[PESSOAS] Falha ao reconstruir chaves de duplicidade do tenant %s",
+            tenant_id,
+            exc_info=True,
+        )
+    finally:
+        db.close()
+        with _em_reconstrucao_lock:
+            _em_reconstrucao.discard(str(tenant_id))
+
+
+def register_pessoa_duplicidade_listeners() -> None:
+    if not event.contains(Session, "after_flush", _atualizar_chaves_after_flush):
+        event.listen(Session, "after_flush", _atualizar_chaves_after_flush)
+
+
+register_pessoa_duplicidade_listeners()
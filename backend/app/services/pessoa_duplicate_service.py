@@ -7,10 +7,11 @@ import logging
 import re
 import unicodedata
 
-from sqlalchemy import func
+from sqlalchemy import and_, distinct, func, or_, select, tuple_
 from sqlalchemy.orm import Session
 
 from app.models import Cliente
+from app.pessoa_duplicidade_models import PessoaChaveDuplicidade
 from app.services.pessoa_merge_service import executar_fusao_pessoas
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,30 @@ logger = logging.getLogger(__name__)
 
 CAMPOS_IDENTIDADE_FORTE = ("cpf", "cnpj", "crmv", "email", "telefone", "celular")
 CAMPOS_IDENTIDADE_AUTOMATICA = ("cpf", "cnpj", "crmv")
+# Tipos de chave do indice de bloqueio (pessoa_chaves_duplicidade). Grupos de
+# nome e de documento valido geram pares; a chave fonetica so gera sugestao
+# quando o par tambem compartilha telefone ou e-mail.
+TIPOS_CHAVE_NOME = ("nome",)
+TIPOS_CHAVE_IDENTIDADE = CAMPOS_IDENTIDADE_AUTOMATICA
+TIPO_CHAVE_FONETICA = "fonetica"
+MIN_DIGITOS_TELEFONE_CHAVE = 8
+_PARTICULAS_NOME = {"d", "da", "das", "de", "di", "do", "dos", "e"}
+_REGRAS_FONETICAS = (
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"lh"), "l"),
+    (re.compile(r"nh"), "ni"),
+    (re.compile(r"ch|sh"), "x"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"gu(?=[ei])"), "g"),
+    (re.compile(r"sc(?=[ei])|c(?=[ei])|z|ss"), "s"),
+    (re.compile(r"qu|q|c|k"), "k"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"n$"), "m"),
+    (re.compile(r"(.)\1+"), r"\1"),
+)
 CAMPOS_COMPLETUDE = (
     "codigo",
     "tipo_pessoa",
@@ -76,6 +101,19 @@ def _normalizar_valor_identidade(campo: str, valor: Any) -> str:
     return texto.casefold()
 
 
+def chave_fonetica_nome(nome: Any) -> str:
+    """Chave fonetica simplificada (pt-BR) para nomes parecidos: Luiz/Luis, Thaís/Tais."""
+    partes = []
+    for token in normalizar_nome_pessoa(nome).split():
+        if token in _PARTICULAS_NOME or token.isdigit():
+            continue
+        for padrao, troca in _REGRAS_FONETICAS:
+            token = padrao.sub(troca, token)
+        if token:
+            partes.append(token)
+    return " ".join(partes)
+
+
 def _documento_repetido(valor: str) -> bool:
     return bool(valor) and len(set(valor)) == 1
 
@@ -175,6 +213,96 @@ def _telefones_normalizados(pessoa: Any) -> set[str]:
     }
 
 
+def chaves_duplicidade_pessoa(pessoa: Any) -> set[tuple[str, str]]:
+    """Chaves de bloqueio ``(tipo, valor)`` de uma pessoa.
+
+    Mesmo recorte das varreduras: so pessoas ativas e com nome. Documentos so
+    entram quando validos, como em ``_grupos_por_identidade_forte``.
+    """
+    if getattr(pessoa, "ativo", None) is False:
+        return set()
+    nome = normalizar_nome_pessoa(getattr(pessoa, "nome", None))
+    if not nome:
+        return set()
+
+    chaves = {("nome", nome[:255])}
+    fonetica = chave_fonetica_nome(getattr(pessoa, "nome", None))
+    if fonetica:
+        chaves.add((TIPO_CHAVE_FONETICA, fonetica[:255]))
+    for campo in TIPOS_CHAVE_IDENTIDADE:
+        valor = _normalizar_valor_identidade(campo, getattr(pessoa, campo, None))
+        if _identidade_automatica_valida(campo, valor):
+            chaves.add((campo, valor))
+    email = _normalizar_valor_identidade("email", getattr(pessoa, "email", None))
+    if "@" in email:
+        chaves.add(("email", email[:255]))
+    for telefone in _telefones_normalizados(pessoa):
+        if len(telefone) >= MIN_DIGITOS_TELEFONE_CHAVE:
+            chaves.add(("telefone", telefone))
+    return chaves
+
+
+def _grupos_duplicidade(tenant_id: Any, tipos: Iterable[str]):
+    """Consulta dos grupos ``(tipo, valor)`` dos ``tipos`` com mais de uma pessoa.
+
+    Grupos foneticos so contam quando reunem nomes normalizados diferentes; os
+    de mesmo nome ja saem do grupo ``nome``.
+    """
+    chaves = PessoaChaveDuplicidade.__table__
+    tipos = tuple(tipos)
+    consulta = (
+        select(chaves.c.tipo, chaves.c.valor)
+        .where(chaves.c.tenant_id == tenant_id, chaves.c.tipo.in_(tipos))
+        .group_by(chaves.c.tipo, chaves.c.valor)
+    )
+    if TIPO_CHAVE_FONETICA not in tipos:
+        return consulta.having(func.count() > 1)
+    nomes = chaves.alias("nomes")
+    return consulta.select_from(
+        chaves.outerjoin(
+            nomes,
+            and_(
+                nomes.c.cliente_id == chaves.c.cliente_id,
+                nomes.c.tipo == TIPOS_CHAVE_NOME[0],
+            ),
+        )
+    ).having(
+        func.count() > 1,
+        or_(
+            chaves.c.tipo != TIPO_CHAVE_FONETICA,
+            func.count(distinct(nomes.c.valor)) > 1,
+        ),
+    )
+
+
+def ids_candidatos_duplicidade(tenant_id: Any, tipos: Iterable[str]):
+    """Subconsulta com os ids de pessoas que dividem alguma chave dos ``tipos``."""
+    chaves = PessoaChaveDuplicidade.__table__
+    grupos = _grupos_duplicidade(tenant_id, tipos).subquery()
+    return (
+        select(chaves.c.cliente_id)
+        .join(
+            grupos,
+            and_(chaves.c.tipo == grupos.c.tipo, chaves.c.valor == grupos.c.valor),
+        )
+        .where(chaves.c.tenant_id == tenant_id)
+        .distinct()
+    )
+
+
+def _pessoas_candidatas(db: Session, tenant_id: Any, tipos: Iterable[str]):
+    """Carrega so as pessoas ativas que caem em algum grupo de bloqueio."""
+    return (
+        db.query(Cliente)
+        .filter(Cliente.tenant_id == tenant_id)
+        .filter(Cliente.ativo.is_not(False))
+        .filter(func.length(func.trim(func.coalesce(Cliente.nome, ""))) > 0)
+        .filter(Cliente.id.in_(ids_candidatos_duplicidade(tenant_id, tipos)))
+        .order_by(Cliente.nome.asc(), Cliente.id.asc())
+        .all()
+    )
+
+
 def _mesma_data_nascimento(pessoa_a: Any, pessoa_b: Any) -> bool:
     data_a = getattr(pessoa_a, "data_nascimento", None)
     data_b = getattr(pessoa_b, "data_nascimento", None)
@@ -419,18 +547,66 @@ def _grupos_por_identidade_forte(
     return {chave: grupo for chave, grupo in grupos.items() if len(grupo) > 1}
 
 
-def _pares_candidatos(pessoas: list[Cliente]) -> list[tuple[Cliente, Cliente]]:
-    pares: dict[tuple[int, int], tuple[Cliente, Cliente]] = {}
-    grupos = list(_grupos_por_nome_normalizado(pessoas).values())
-    grupos.extend(_grupos_por_identidade_forte(pessoas).values())
-    for grupo in grupos:
-        principal = escolher_pessoa_principal(grupo)
-        for pessoa in grupo:
-            if int(pessoa.id) == int(principal.id):
+def _pares_do_grupo(grupo: list[Cliente]) -> list[tuple[Cliente, Cliente]]:
+    principal = escolher_pessoa_principal(grupo)
+    return [
+        (principal, pessoa) for pessoa in grupo if int(pessoa.id) != int(principal.id)
+    ]
+
+
+def _pares_semelhantes(grupo: list[Cliente]) -> list[tuple[Cliente, Cliente]]:
+    """Nomes foneticamente iguais (grafia diferente) com telefone ou e-mail em comum."""
+    pares = []
+    for indice, pessoa_a in enumerate(grupo):
+        for pessoa_b in grupo[indice + 1 :]:
+            if normalizar_nome_pessoa(pessoa_a.nome) == normalizar_nome_pessoa(
+                pessoa_b.nome
+            ):
+                continue
+            email_a = _normalizar_valor_identidade("email", pessoa_a.email)
+            contato_comum = bool(
+                _telefones_normalizados(pessoa_a) & _telefones_normalizados(pessoa_b)
+            ) or (
+                bool(email_a)
+                and email_a == _normalizar_valor_identidade("email", pessoa_b.email)
+            )
+            if not contato_comum:
                 continue
-            chave = tuple(sorted((int(principal.id), int(pessoa.id))))
-            pares[chave] = (principal, pessoa)
-    return list(pares.values())
+            principal = escolher_pessoa_principal((pessoa_a, pessoa_b))
+            duplicado = pessoa_b if principal is pessoa_a else pessoa_a
+            pares.append((principal, duplicado))
+    return pares
+
+
+def _pessoas_dos_grupos(
+    db: Session, tenant_id: Any, grupos: list[tuple[str, str]]
+) -> dict[tuple[str, str], list[Cliente]]:
+    """Pessoas ativas de cada grupo da pagina, por nome e id."""
+    if not grupos:
+        return {}
+    chaves = PessoaChaveDuplicidade.__table__
+    membros = db.execute(
+        select(chaves.c.tipo, chaves.c.valor, chaves.c.cliente_id).where(
+            chaves.c.tenant_id == tenant_id,
+            tuple_(chaves.c.tipo, chaves.c.valor).in_(grupos),
+        )
+    ).all()
+    pessoas = {
+        int(pessoa.id): pessoa
+        for pessoa in db.query(Cliente)
+        .filter(Cliente.tenant_id == tenant_id)
+        .filter(Cliente.ativo.is_not(False))
+        .filter(func.length(func.trim(func.coalesce(Cliente.nome, ""))) > 0)
+        .filter(Cliente.id.in_(sorted({int(m.cliente_id) for m in membros})))
+        .order_by(Cliente.nome.asc(), Cliente.id.asc())
+    }
+    ordem = {pessoa_id: posicao for posicao, pessoa_id in enumerate(pessoas)}
+    por_grupo: dict[tuple[str, str], list[Cliente]] = {}
+    for membro in sorted(membros, key=lambda m: ordem.get(int(m.cliente_id), -1)):
+        pessoa = pessoas.get(int(membro.cliente_id))
+        if pessoa is not None:
+            por_grupo.setdefault((membro.tipo, membro.valor), []).append(pessoa)
+    return por_grupo
 
 
 def _paginar_sugestoes(itens: list[Any], *, skip: int, limit: int) -> list[Any]:
@@ -445,41 +621,81 @@ def listar_sugestoes_duplicidade_pessoas(
     tenant_id: Any,
     skip: int = 0,
     limit: int = 50,
+    incluir_semelhantes: bool = False,
 ) -> dict[str, Any]:
-    pessoas = (
-        db.query(Cliente)
-        .filter(Cliente.tenant_id == tenant_id)
-        .filter(Cliente.ativo.is_not(False))
-        .filter(func.length(func.trim(func.coalesce(Cliente.nome, ""))) > 0)
-        .order_by(Cliente.nome.asc(), Cliente.id.asc())
-        .all()
-    )
+    """Lista pares a revisar, paginando no banco os grupos do indice de bloqueio.
+
+    ``skip``/``limit`` contam grupos ``(tipo, valor)`` com mais de uma pessoa,
+    em ordem de tipo e valor; so os pares dos grupos da pagina sao carregados e
+    classificados. ``total`` e o numero exato de grupos e ``total_automaticas``
+    o de grupos com documento valido em comum (candidatos a fusao automatica,
+    antes da checagem de conflitos). Um par que divide mais de uma chave pode
+    reaparecer em outra pagina com o outro grupo.
+
+    ``incluir_semelhantes`` acrescenta nomes foneticamente iguais que dividem
+    telefone ou e-mail (sempre como sugestao manual).
+    """
+    tipos = TIPOS_CHAVE_NOME + TIPOS_CHAVE_IDENTIDADE
+    if incluir_semelhantes:
+        tipos += (TIPO_CHAVE_FONETICA,)
+    inicio = max(int(skip or 0), 0)
+    grupos = _grupos_duplicidade(tenant_id, tipos)
+    pagina = [
+        (linha.tipo, linha.valor)
+        for linha in db.execute(
+            grupos.order_by(PessoaChaveDuplicidade.__table__.c.tipo)
+            .order_by(PessoaChaveDuplicidade.__table__.c.valor)
+            .offset(inicio)
+            .limit(max(int(limit or 0), 0))
+        )
+    ]
+    total = db.execute(select(func.count()).select_from(grupos.subquery())).scalar()
+    total_automaticas = db.execute(
+        select(func.count()).select_from(
+            _grupos_duplicidade(tenant_id, TIPOS_CHAVE_IDENTIDADE).subquery()
+        )
+    ).scalar()
 
+    pessoas_por_grupo = _pessoas_dos_grupos(db, tenant_id, pagina)
     sugestoes = []
     automaticas = []
-    for principal, duplicado in _pares_candidatos(pessoas):
-        decisao = avaliar_par_duplicidade_pessoas(principal, duplicado)
-        item = {
-            "chave_nome": decisao.chave_nome,
-            "principal": _resumo_sugestao(principal),
-            "duplicado": _resumo_sugestao(duplicado),
-            "motivos": decisao.motivos_bloqueio,
-            "sinais": decisao.sinais_confirmacao,
-        }
-        if decisao.pode_fundir_automaticamente:
-            automaticas.append(item)
-        else:
-            sugestoes.append(item)
-
-    inicio = max(int(skip or 0), 0)
+    ja_incluidos: set[tuple[int, int]] = set()
+    for tipo, valor in pagina:
+        grupo = pessoas_por_grupo.get((tipo, valor), [])
+        if len(grupo) < 2:
+            continue
+        pares = (
+            _pares_semelhantes(grupo)
+            if tipo == TIPO_CHAVE_FONETICA
+            else _pares_do_grupo(grupo)
+        )
+        for principal, duplicado in pares:
+            chave_par = tuple(sorted((int(principal.id), int(duplicado.id))))
+            if chave_par in ja_incluidos:
+                continue
+            ja_incluidos.add(chave_par)
+            decisao = avaliar_par_duplicidade_pessoas(principal, duplicado)
+            item = {
+                "chave_nome": decisao.chave_nome,
+                "chave_grupo": f"{tipo}:{valor}",
+                "principal": _resumo_sugestao(principal),
+                "duplicado": _resumo_sugestao(duplicado),
+                "motivos": decisao.motivos_bloqueio,
+                "sinais": decisao.sinais_confirmacao,
+            }
+            if decisao.pode_fundir_automaticamente:
+                automaticas.append(item)
+            else:
+                sugestoes.append(item)
 
     return {
-        "sugestoes": _paginar_sugestoes(sugestoes, skip=inicio, limit=limit),
-        "total": len(sugestoes),
-        "automaticas": _paginar_sugestoes(automaticas, skip=inicio, limit=limit),
-        "total_automaticas": len(automaticas),
+        "sugestoes": sugestoes,
+        "total": int(total or 0),
+        "automaticas": automaticas,
+        "total_automaticas": int(total_automaticas or 0),
         "skip": inicio,
         "limit": limit,
+        "indexando": False,
     }
 
 
@@ -494,14 +710,7 @@ def executar_fusoes_assistidas_pessoas_por_nome(
 ) -> dict[str, Any]:
     """Simula ou executa fusoes por nome, mantendo conflitos objetivos bloqueados."""
 
-    pessoas = (
-        db.query(Cliente)
-        .filter(Cliente.tenant_id == tenant_id)
-        .filter(Cliente.ativo.is_not(False))
-        .filter(func.length(func.trim(func.coalesce(Cliente.nome, ""))) > 0)
-        .order_by(Cliente.nome.asc(), Cliente.id.asc())
-        .all()
-    )
+    pessoas = _pessoas_candidatas(db, tenant_id, TIPOS_CHAVE_NOME)
     grupos = _grupos_por_nome_normalizado(pessoas)
     elegiveis: list[dict[str, Any]] = []
     bloqueadas: list[dict[str, Any]] = []
@@ -603,15 +812,7 @@ def executar_fusoes_automaticas_pessoas_duplicadas(
     limit: int = 25,
     nome: str | None = None,
 ) -> dict[str, Any]:
-    query = (
-        db.query(Cliente)
-        .filter(Cliente.tenant_id == tenant_id)
-        .filter(Cliente.ativo.is_not(False))
-        .filter(func.length(func.trim(func.coalesce(Cliente.nome, ""))) > 0)
-        .order_by(Cliente.nome.asc(), Cliente.id.asc())
-    )
-
-    pessoas = query.all()
+    pessoas = _pessoas_candidatas(db, tenant_id, TIPOS_CHAVE_IDENTIDADE)
     grupos = _grupos_por_identidade_forte(pessoas)
     if nome:
         chave_nome_filtro = normalizar_nome_pessoa(nome)
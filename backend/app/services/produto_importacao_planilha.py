@@ -0,0 +1,589 @@
+"""
+Importacao de produtos por planilha (Excel ou CSV)
+==================================================
+
+A planilha e lida em fluxo (openpyxl ``read_only`` ou ``csv``), sem carregar o
+arquivo inteiro, e processada em blocos de ``TAMANHO_LOTE`` linhas:
+
+1. validacao colunar com pandas (obrigatorios, numeros com virgula ou ponto);
+2. categorias, marcas e fornecedores resolvidos por nome com uma consulta por
+   bloco (categorias e marcas novas sao criadas, como antes);
+3. gravacao com ``mesclar_produtos`` (``COPY`` + ``ON CONFLICT`` no PostgreSQL).
+
+``processar_importacao_produtos_background`` roda fora do request e grava o
+progresso e os erros por linha em ``ImportacaoProdutos`` a cada bloco. Cada
+bloco e commitado: se a importacao falhar ou o processo morrer no meio, os
+blocos anteriores continuam gravados (``linhas_processadas`` diz ate onde foi)
+e reimportar a mesma planilha e seguro, pois a gravacao e um upsert pelo SKU.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+from uuid import UUID
+
+import openpyxl
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.importacao_produtos_models import ImportacaoProdutos
+from app.models import Cliente
+from app.produtos_models import Categoria, Marca
+from app.services.produto_upsert_lote import (
+    MODO_SE_INFORMADO,
+    MODO_SO_DESLIGAR,
+    MODO_SUBSTITUIR,
+    chave_codigo,
+    mesclar_produtos,
+    valores_padrao_produto,
+)
+from app.tenancy.context import tenant_context
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 2000
+MAX_ERROS_REGISTRADOS = 500
+EXTENSOES_ACEITAS = (".xlsx", ".xls", ".csv")
+LINHA_INICIAL_EXCEL = 3  # cabecalho + instrucoes do template
+LINHA_INICIAL_CSV = 2  # so cabecalho
+# Sem progresso gravado por esse tempo, a thread morreu (restart, deploy, OOM)
+SEM_PROGRESSO_MAX = timedelta(minutes=15)
+
+CAMPOS_PLANILHA = (
+    "sku",
+    "nome",
+    "descricao",
+    "categoria",
+    "marca",
+    "fornecedor",
+    "codigo_barras",
+    "preco_custo",
+    "preco_venda",
+    "estoque_inicial",
+    "estoque_minimo",
+    "estoque_maximo",
+    "unidade",
+    "localizacao",
+    "status",
+    "ncm",
+    "cest",
+    "cfop",
+    "origem",
+    "aliquota_icms",
+    "aliquota_pis",
+    "aliquota_cofins",
+    "observacoes",
+)
+CAMPOS_TEXTO = (
+    "sku",
+    "nome",
+    "descricao",
+    "categoria",
+    "marca",
+    "fornecedor",
+    "codigo_barras",
+    "unidade",
+    "localizacao",
+    "status",
+    "ncm",
+    "cest",
+    "cfop",
+    "origem",
+    "observacoes",
+)
+CAMPOS_NUMERICOS = (
+    "preco_custo",
+    "preco_venda",
+    "estoque_inicial",
+    "estoque_minimo",
+    "estoque_maximo",
+    "aliquota_icms",
+    "aliquota_pis",
+    "aliquota_cofins",
+)
+CAMPOS_ESTOQUE = ("estoque_inicial", "estoque_minimo", "estoque_maximo")
+
+# Produto existente: como cada coluna e atualizada pela planilha
+ATUALIZACAO_PRODUTO = {
+    "nome": MODO_SUBSTITUIR,
+    "descricao_curta": MODO_SUBSTITUIR,
+    "categoria_id": MODO_SUBSTITUIR,
+    "marca_id": MODO_SUBSTITUIR,
+    "fornecedor_id": MODO_SUBSTITUIR,
+    "codigo_barras": MODO_SUBSTITUIR,
+    "preco_custo": MODO_SUBSTITUIR,
+    "preco_venda": MODO_SUBSTITUIR,
+    "estoque_minimo": MODO_SUBSTITUIR,
+    "estoque_maximo": MODO_SUBSTITUIR,
+    "unidade": MODO_SUBSTITUIR,
+    "localizacao": MODO_SUBSTITUIR,
+    "situacao": MODO_SUBSTITUIR,
+    "ativo": MODO_SUBSTITUIR,
+    "informacoes_adicionais_nf": MODO_SUBSTITUIR,
+    "anunciar_ecommerce": MODO_SO_DESLIGAR,
+    "anunciar_app": MODO_SO_DESLIGAR,
+    "ncm": MODO_SE_INFORMADO,
+    "cest": MODO_SE_INFORMADO,
+    "cfop": MODO_SE_INFORMADO,
+    "origem": MODO_SE_INFORMADO,
+    "aliquota_icms": MODO_SE_INFORMADO,
+    "aliquota_pis": MODO_SE_INFORMADO,
+    "aliquota_cofins": MODO_SE_INFORMADO,
+}
+
+
+def extensao_aceita(nome_arquivo: str) -> bool:
+    return str(nome_arquivo or "").lower().endswith(EXTENSOES_ACEITAS)
+
+
+def _linha_vazia(valores: Iterable[Any]) -> bool:
+    return all(valor is None or str(valor).strip() == "" for valor in valores)
+
+
+def _abrir_csv(arquivo: BinaryIO):
+    texto = io.TextIOWrapper(
+        arquivo, encoding="utf-8-sig", errors="replace", newline=""
+    )
+    amostra = texto.read(4096)
+    texto.seek(0)
+    delimitador = ";" if amostra.count(";") > amostra.count(",") else ","
+    return texto, csv.reader(texto, delimiter=delimitador)
+
+
+def ler_linhas_planilha(
+    arquivo: BinaryIO, nome_arquivo: str
+) -> Iterator[tuple[int, tuple]]:
+    """Linhas de dados ``(numero_da_linha, valores)`` lidas em fluxo."""
+    if nome_arquivo.lower().endswith(".csv"):
+        texto, leitor = _abrir_csv(arquivo)
+        try:
+            next(leitor, None)
+            for numero, valores in enumerate(leitor, LINHA_INICIAL_CSV):
+                if not _linha_vazia(valores):
+                    yield numero, tuple(valores)
+        finally:
+            texto.detach()
+        return
+
+    planilha = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(
+            min_row=LINHA_INICIAL_EXCEL, values_only=True
+        )
+        for numero, valores in enumerate(linhas, LINHA_INICIAL_EXCEL):
+            if not _linha_vazia(valores):
+                yield numero, tuple(valores)
+    finally:
+        planilha.close()
+
+
+def estimar_total_linhas(arquivo: BinaryIO, nome_arquivo: str) -> Optional[int]:
+    """Total aproximado de linhas de dados, so para o percentual de progresso."""
+    if nome_arquivo.lower().endswith(".csv"):
+        total = sum(1 for _ in arquivo)
+        arquivo.seek(0)
+        return max(total - (LINHA_INICIAL_CSV - 1), 0)
+    planilha = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        maximo = planilha.active.max_row
+    finally:
+        planilha.close()
+        arquivo.seek(0)
+    return None if maximo is None else max(maximo - (LINHA_INICIAL_EXCEL - 1), 0)
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+    def converter(valor: Any) -> Optional[str]:
+        if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+            return None
+        if isinstance(valor, float) and valor.is_integer():
+            valor = int(valor)  # NCM/EAN digitados como numero no Excel
+        texto = str(valor).strip()
+        return texto or None
+
+    # Lista explicita: ``map`` infere float/NaN numa coluna toda vazia
+    return pd.Series([converter(v) for v in serie], index=serie.index, dtype=object)
+
+
+def _numero(serie: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Converte aceitando virgula ou ponto; devolve (valores, mascara invalida)."""
+    bruto = serie.astype("string").str.strip().str.replace(",", ".", regex=False)
+    informado = bruto.notna() & (bruto != "")
+    valores = pd.to_numeric(bruto.where(informado), errors="coerce")
+    return valores, informado & valores.isna()
+
+
+def validar_lote(linhas: list[tuple[int, tuple]]) -> tuple[pd.DataFrame, list[dict]]:
+    """Valida um bloco de linhas de uma vez; devolve as validas e os erros."""
+    largura = len(CAMPOS_PLANILHA)
+    quadro = pd.DataFrame(
+        [
+            tuple(valores[:largura]) + (None,) * (largura - len(valores))
+            for _, valores in linhas
+        ],
+        columns=list(CAMPOS_PLANILHA),
+        dtype=object,
+    )
+    quadro["linha"] = [numero for numero, _ in linhas]
+    for campo in CAMPOS_TEXTO:
+        quadro[campo] = _texto(quadro[campo])
+
+    invalidos = {}
+    for campo in CAMPOS_NUMERICOS:
+        quadro[campo], invalidos[campo] = _numero(quadro[campo])
+
+    faltando = (
+        quadro["sku"].isna() | quadro["nome"].isna() | quadro["preco_venda"].isna()
+    )
+    faltando &= ~invalidos["preco_venda"]
+    numero_invalido = pd.Series(False, index=quadro.index)
+    for mascara in invalidos.values():
+        numero_invalido |= mascara
+
+    erros = [
+        {
+            "linha": int(linha.linha),
+            "sku": linha.sku,
+            "erro": "Campos obrigatórios faltando (SKU, Nome ou Preço Venda)",
+        }
+        for linha in quadro[faltando].itertuples()
+    ]
+    problemas = numero_invalido & ~faltando
+    for indice in quadro.index[problemas]:
+        campos = [c for c in CAMPOS_NUMERICOS if invalidos[c].iat[indice]]
+        erros.append(
+            {
+                "linha": int(quadro.at[indice, "linha"]),
+                "sku": quadro.at[indice, "sku"],
+                "erro": f"Erro ao converter números: {', '.join(campos)}",
+            }
+        )
+
+    validos = quadro[~(faltando | numero_invalido)].copy()
+    validos["preco_custo"] = validos["preco_custo"].fillna(0.0)
+    for campo in CAMPOS_ESTOQUE:
+        validos[campo] = validos[campo].fillna(0).astype(int)
+    validos["codigo"] = validos["sku"].str.upper()
+    validos["unidade"] = validos["unidade"].fillna("UN")
+    validos["ativo"] = validos["status"].fillna("ativo").str.lower().eq("ativo")
+    return validos, erros
+
+
+def _ids_por_nome(
+    db: Session,
+    modelo,
+    tenant_id: UUID,
+    nomes: Iterable[str],
+    cache: dict[str, int],
+    *,
+    criar_com_usuario: Optional[int] = None,
+) -> dict[str, int]:
+    """Resolve nomes (sem diferenciar maiusculas) em ids, com cache entre blocos."""
+    pendentes = {nome.lower(): nome for nome in nomes if nome.lower() not in cache}
+    if pendentes:
+        encontrados = db.execute(
+            select(modelo.id, func.lower(modelo.nome))
+            .where(
+                modelo.tenant_id == tenant_id,
+                func.lower(modelo.nome).in_(list(pendentes)),
+            )
+            .order_by(modelo.id)
+        ).all()
+        for registro_id, nome in encontrados:
+            cache.setdefault(nome, int(registro_id))
+        if criar_com_usuario is not None:
+            novos = [
+                modelo(nome=nome, tenant_id=tenant_id, user_id=criar_com_usuario)
+                for chave, nome in pendentes.items()
+                if chave not in cache
+            ]
+            if novos:
+                db.add_all(novos)
+                db.flush()
+                for novo in novos:
+                    cache[novo.nome.lower()] = int(novo.id)
+    return cache
+
+
+def _enfileirar_custos_bling(db: Session, alteracoes: list[tuple[int, float]]) -> None:
+    """A gravacao em lote nao passa pelo evento de custo do ORM: avisa aqui.
+
+    Cada produto vai num savepoint: uma falha desfaz so o proprio enfileiramento,
+    sem abortar a transacao do bloco (no PostgreSQL, um erro sem savepoint
+    invalidaria todos os comandos seguintes ate o rollback).
+    """
+    if not alteracoes:
+        return
+    from app.services.bling_cost_sync_service import BlingCostSyncService
+
+    for produto_id, custo in alteracoes:
+        try:
+            with db.begin_nested():
+                BlingCostSyncService.queue_product_cost_sync(
+                    db,
+                    produto_id=produto_id,
+                    custo_novo=custo,
+                    motivo="alteracao_preco_custo",
+                    origem="importacao_planilha",
+                )
+        except Exception:
+            logger.exception(
+                "[IMPORTACAO PRODUTOS] Nao foi possivel enfileirar custo; produto_id=%s",
+                produto_id,
+            )
+
+
+def _registros_produto(
+    validos: pd.DataFrame,
+    *,
+    user_id: int,
+    categorias: dict[str, int],
+    marcas: dict[str, int],
+    fornecedores: dict[str, int],
+) -> list[dict[str, Any]]:
+    padroes = valores_padrao_produto()
+    registros = []
+    for linha in validos.itertuples(index=False):
+        ativo = bool(linha.ativo)
+        registros.append(
+            {
+                **padroes,
+                "user_id": user_id,
+                "codigo": linha.codigo,
+                "nome": linha.nome,
+                "descricao_curta": linha.descricao,
+                "categoria_id": categorias.get((linha.categoria or "").lower()),
+                "marca_id": marcas.get((linha.marca or "").lower()),
+                "fornecedor_id": fornecedores.get((linha.fornecedor or "").lower()),
+                "codigo_barras": linha.codigo_barras,
+                "preco_custo": float(linha.preco_custo),
+                "preco_venda": float(linha.preco_venda),
+                "estoque_atual": int(linha.estoque_inicial),
+                "estoque_minimo": int(linha.estoque_minimo),
+                "estoque_maximo": int(linha.estoque_maximo),
+                "unidade": linha.unidade,
+                "localizacao": linha.localizacao,
+                "situacao": ativo,
+                "ativo": ativo,
+                "anunciar_ecommerce": ativo,
+                "anunciar_app": ativo,
+                "informacoes_adicionais_nf": linha.observacoes,
+                "ncm": linha.ncm,
+                "cest": linha.cest,
+                "cfop": linha.cfop,
+                "origem": linha.origem,
+                "aliquota_icms": _opcional(linha.aliquota_icms),
+                "aliquota_pis": _opcional(linha.aliquota_pis),
+                "aliquota_cofins": _opcional(linha.aliquota_cofins),
+            }
+        )
+    return registros
+
+
+def _opcional(valor: Any) -> Optional[float]:
+    return None if pd.isna(valor) else float(valor)
+
+
+def importar_lote_produtos(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    user_id: int,
+    linhas: list[tuple[int, tuple]],
+    caches: dict[str, dict[str, int]],
+) -> dict[str, Any]:
+    """Valida e grava um bloco; devolve contagens e erros do bloco."""
+    validos, erros = validar_lote(linhas)
+
+    fornecedores_planilha = set(validos["fornecedor"].dropna())
+    fornecedores = _ids_por_nome(
+        db, Cliente, tenant_id, fornecedores_planilha, caches["fornecedores"]
+    )
+    sem_fornecedor = validos["fornecedor"].notna() & ~validos[
+        "fornecedor"
+    ].str.lower().isin(list(fornecedores))
+    for linha in validos[sem_fornecedor].itertuples():
+        erros.append(
+            {
+                "linha": int(linha.linha),
+                "sku": linha.sku,
+                "erro": f'Fornecedor "{linha.fornecedor}" não encontrado no sistema',
+            }
+        )
+    validos = validos[~sem_fornecedor]
+
+    categorias = _ids_por_nome(
+        db,
+        Categoria,
+        tenant_id,
+        set(validos["categoria"].dropna()),
+        caches["categorias"],
+        criar_com_usuario=user_id,
+    )
+    marcas = _ids_por_nome(
+        db,
+        Marca,
+        tenant_id,
+        set(validos["marca"].dropna()),
+        caches["marcas"],
+        criar_com_usuario=user_id,
+    )
+    registros = _registros_produto(
+        validos,
+        user_id=user_id,
+        categorias=categorias,
+        marcas=marcas,
+        fornecedores=fornecedores,
+    )
+    resultado = mesclar_produtos(
+        db, tenant_id=tenant_id, registros=registros, atualizar=ATUALIZACAO_PRODUTO
+    )
+
+    custos = {chave_codigo(r["codigo"]): r["preco_custo"] for r in registros}
+    _enfileirar_custos_bling(
+        db,
+        [
+            (resultado.ids[chave], custos[chave])
+            for chave in resultado.atualizados
+            if resultado.custos_anteriores.get(chave) != custos[chave]
+        ],
+    )
+    erros.sort(key=lambda erro: erro["linha"])
+    return {
+        "linhas": len(linhas),
+        "sucesso": len(registros),
+        "criados": len(resultado.criados),
+        "atualizados": len(resultado.atualizados),
+        "erros": erros,
+    }
+
+
+def importar_planilha_produtos(
+    db: Session,
+    *,
+    tenant_id: UUID,
+    user_id: int,
+    linhas: Iterable[tuple[int, tuple]],
+    ao_concluir_lote: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> dict[str, Any]:
+    """Importa as linhas em blocos; ``ao_concluir_lote`` recebe o resumo parcial."""
+    resumo = {
+        "total_processado": 0,
+        "total_sucesso": 0,
+        "total_criados": 0,
+        "total_atualizados": 0,
+        "total_erros": 0,
+        "erros": [],
+    }
+    caches: dict[str, dict[str, int]] = {
+        "categorias": {},
+        "marcas": {},
+        "fornecedores": {},
+    }
+    iterador = iter(linhas)
+    while True:
+        bloco = list(islice(iterador, TAMANHO_LOTE))
+        if not bloco:
+            break
+        parcial = importar_lote_produtos(
+            db, tenant_id=tenant_id, user_id=user_id, linhas=bloco, caches=caches
+        )
+        resumo["total_processado"] += parcial["linhas"]
+        resumo["total_sucesso"] += parcial["sucesso"]
+        resumo["total_criados"] += parcial["criados"]
+        resumo["total_atualizados"] += parcial["atualizados"]
+        resumo["total_erros"] += len(parcial["erros"])
+        espaco = MAX_ERROS_REGISTRADOS - len(resumo["erros"])
+        resumo["erros"].extend(parcial["erros"][: max(espaco, 0)])
+        if ao_concluir_lote is not None:
+            ao_concluir_lote(resumo)
+    return resumo
+
+
+def importacao_interrompida(
+    importacao: ImportacaoProdutos, agora: Optional[datetime] = None
+) -> bool:
+    """``processando`` sem progresso ha mais de ``SEM_PROGRESSO_MAX``.
+
+    ``updated_at`` anda a cada bloco commitado, entao funciona como heartbeat
+    da thread; a thread e daemon e nao sobrevive a um restart do worker.
+    """
+    if importacao.status != "processando" or importacao.updated_at is None:
+        return False
+    ultimo_progresso = importacao.updated_at
+    if ultimo_progresso.tzinfo is None:
+        ultimo_progresso = ultimo_progresso.replace(tzinfo=timezone.utc)
+    agora = agora or datetime.now(timezone.utc)
+    return agora - ultimo_progresso > SEM_PROGRESSO_MAX
+
+
+def processar_importacao_produtos_background(
+    *,
+    importacao_id: int,
+    tenant_id,
+    caminho_arquivo: str,
+) -> None:
+    """Importa a planilha fora do request, gravando o progresso a cada bloco."""
+    from app.db import SessionLocal
+
+    tenant_uuid = UUID(str(tenant_id))
+    db = SessionLocal()
+    try:
+        with tenant_context(tenant_uuid):
+            importacao = (
+                db.query(ImportacaoProdutos)
+                .filter(
+                    ImportacaoProdutos.id == importacao_id,
+                    ImportacaoProdutos.tenant_id == tenant_uuid,
+                )
+                .first()
+            )
+            if not importacao:
+                logger.warning(
+                    "[IMPORTACAO PRODUTOS] Importacao %s nao encontrada", importacao_id
+                )
+                return
+
+            def _progresso(resumo: dict[str, Any]) -> None:
+                importacao.linhas_processadas = resumo["total_processado"]
+                importacao.criados = resumo["total_criados"]
+                importacao.atualizados = resumo["total_atualizados"]
+                importacao.total_erros = resumo["total_erros"]
+                importacao.erros = list(resumo["erros"])
+                db.commit()
+
+            try:
+                with open(caminho_arquivo, "rb") as arquivo:
+                    importar_planilha_produtos(
+                        db,
+                        tenant_id=tenant_uuid,
+                        user_id=importacao.usuario_id,
+                        linhas=ler_linhas_planilha(arquivo, importacao.arquivo_nome),
+                        ao_concluir_lote=_progresso,
+                    )
+                importacao.status = "concluido"
+                importacao.concluido_em = datetime.utcnow()
+                db.commit()
+            except Exception as error:
+                db.rollback()
+                logger.exception(
+                    "[IMPORTACAO PRODUTOS] Falha ao importar planilha %s",
+                    importacao_id,
+                )
+                importacao.status = "erro"
+                importacao.erro_mensagem = str(error)[:500]
+                importacao.concluido_em = datetime.utcnow()
+                db.commit()
+    finally:
+        db.close()
+        try:
+            os.unlink(caminho_arquivo)
+        except OSError:
+            pass
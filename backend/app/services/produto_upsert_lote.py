@@ -0,0 +1,340 @@
+"""
+Gravacao de produtos em lote (planilha de produtos e catalogo base)
+===================================================================
+
+Gravar produto a produto pelo ORM custava duas ou tres consultas por linha; um
+catalogo de fornecedor com 30 mil linhas estourava o tempo da requisicao. Aqui
+cada bloco de ate ``LOTE_GRAVACAO`` produtos vira:
+
+- uma consulta com os produtos que ja existem (id e custo anterior), casando o
+  SKU por ``lower(trim(codigo))`` como o cadastro faz;
+- no PostgreSQL, um ``COPY`` para uma tabela temporaria seguido de um unico
+  ``INSERT ... SELECT ... ON CONFLICT (tenant_id, lower(btrim(codigo)))``,
+  apoiado no indice parcial ``ux_produtos_tenant_codigo_lower``;
+- nos demais bancos (SQLite dos testes), ``INSERT``/``UPDATE`` com executemany.
+
+A gravacao em lote nao passa pelos eventos do ORM (usa a conexao da Session,
+com filtro de tenant explicito): quem chama decide o que fazer com
+``ResultadoMescla.custos_anteriores`` (ex.: fila de custo do Bling).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from io import StringIO
+from typing import Any, Iterable, Mapping, Sequence
+from uuid import UUID
+
+from sqlalchemy import (
+    String,
+    and_,
+    bindparam,
+    cast,
+    column,
+    func,
+    insert,
+    inspect,
+    literal_column,
+    null,
+    select,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.produtos_models import Produto
+from app.tenancy.rls import sync_rls_tenant
+
+LOTE_GRAVACAO = 2000
+TABELA_TEMPORARIA = "tmp_produtos_lote"
+
+# Como cada coluna de ``atualizar`` trata um produto que ja existe
+MODO_SUBSTITUIR = "substituir"  # grava o valor da linha
+MODO_SE_INFORMADO = "se_informado"  # so grava se a linha trouxe valor
+MODO_SO_DESLIGAR = "so_desligar"  # flag: verdadeiro so se ja era e a linha tambem
+
+
+@dataclass
+class ResultadoMescla:
+    """Produtos gravados, por chave de SKU (``chave_codigo``)."""
+
+    ids: dict[str, int] = field(default_factory=dict)
+    criados: list[str] = field(default_factory=list)
+    atualizados: list[str] = field(default_factory=list)
+    custos_anteriores: dict[str, Any] = field(default_factory=dict)
+
+
+def chave_codigo(codigo: Any) -> str:
+    return str(codigo or "").strip().lower()
+
+
+def valores_padrao_produto() -> dict[str, Any]:
+    """Defaults escalares do modelo ``Produto`` (o ORM os aplicaria no insert)."""
+    return {
+        coluna.name: coluna.default.arg
+        for coluna in Produto.__table__.columns
+        if coluna.default is not None
+        and coluna.default.is_scalar
+        and coluna.name != "id"
+    }
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _tabela(db: Session, nomes: Iterable[str], tenant_id: Any):
+    """Recorte de ``produtos`` com as colunas pedidas que existem no banco.
+
+    Os valores seguem como vieram (linhas do catalogo base trazem datas em
+    texto no SQLite). Tenant ``UUID`` usa o tipo do modelo; tenant em texto
+    segue a convencao do catalogo base (``CAST(tenant_id AS TEXT)``).
+    """
+    no_banco = {c["name"] for c in inspect(db.connection()).get_columns("produtos")}
+    tipo_tenant = (
+        Produto.__table__.c.tenant_id.type if isinstance(tenant_id, UUID) else String()
+    )
+    return table(
+        "produtos",
+        *(
+            column(nome, tipo_tenant if nome == "tenant_id" else None)
+            for nome in sorted(set(nomes) & no_banco)
+        ),
+    )
+
+
+def _filtro_tenant(tabela, tenant_id: Any):
+    if isinstance(tenant_id, UUID):
+        return tabela.c.tenant_id == tenant_id
+    return cast(tabela.c.tenant_id, String) == str(tenant_id)
+
+
+def _valor_banco(valor: Any) -> Any:
+    return (
+        json.dumps(valor, ensure_ascii=False, sort_keys=True)
+        if isinstance(valor, (dict, list))
+        else valor
+    )
+
+
+def _existentes(conexao, tabela, tenant_id: Any, chaves: Sequence[str]) -> dict:
+    """Produto mais antigo de cada chave: ``(id, codigo, preco_custo)``."""
+    custo = tabela.c.preco_custo if "preco_custo" in tabela.c else null()
+    linhas = conexao.execute(
+        select(tabela.c.id, tabela.c.codigo, custo)
+        .where(
+            _filtro_tenant(tabela, tenant_id),
+            func.lower(func.trim(tabela.c.codigo)).in_(list(chaves)),
+        )
+        .order_by(tabela.c.id)
+    ).all()
+    existentes: dict[str, tuple[int, str, Any]] = {}
+    for produto_id, codigo, preco_custo in linhas:
+        existentes.setdefault(
+            chave_codigo(codigo), (int(produto_id), codigo, preco_custo)
+        )
+    return existentes
+
+
+def _expressao_atualizacao(modo: str, atual, novo):
+    if modo == MODO_SE_INFORMADO:
+        return func.coalesce(novo, atual)
+    if modo == MODO_SO_DESLIGAR:
+        return and_(atual, novo)
+    return novo
+
+
+def _valor_copy(valor: Any) -> str:
+    """Campo CSV do COPY: vazio sem aspas e NULL, o resto sempre entre aspas."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        texto = "true" if valor else "false"
+    elif isinstance(valor, (datetime, date)):
+        texto = valor.isoformat()
+    elif isinstance(valor, (dict, list)):
+        texto = json.dumps(valor, ensure_ascii=False, sort_keys=True)
+    else:
+        texto = str(valor)
+    return '"' + texto.replace('"', '""') + '"'
+
+
+def comando_mescla_postgres(
+    tabela, colunas: Sequence[str], atualizar: Mapping[str, str] | None
+):
+    """``INSERT ... SELECT`` da tabela temporaria com ``ON CONFLICT`` pelo SKU."""
+    temporaria = table(TABELA_TEMPORARIA, *(column(nome) for nome in colunas))
+    comando = pg_insert(tabela).from_select(
+        list(colunas), select(*(temporaria.c[nome] for nome in colunas))
+    )
+    # Mesma expressao e mesmo predicado do indice parcial
+    # ux_produtos_tenant_codigo_lower; sem eles o PostgreSQL nao infere o alvo
+    codigo = tabela.c.codigo
+    alvo = {
+        "index_elements": [tabela.c.tenant_id, func.lower(func.trim(codigo))],
+        "index_where": codigo.isnot(None) & (func.trim(codigo) != literal_column("''")),
+    }
+    if not atualizar:
+        return comando.on_conflict_do_nothing(**alvo)
+    valores = {
+        nome: _expressao_atualizacao(modo, tabela.c[nome], comando.excluded[nome])
+        for nome, modo in atualizar.items()
+        if nome in tabela.c
+    }
+    if "updated_at" in tabela.c:
+        valores["updated_at"] = func.now()
+    return comando.on_conflict_do_update(set_=valores, **alvo)
+
+
+def _gravar_postgres(
+    conexao,
+    tabela,
+    colunas: Sequence[str],
+    linhas: Sequence[dict[str, Any]],
+    atualizar: Mapping[str, str] | None,
+) -> None:
+    if not linhas:
+        return
+    nomes = ", ".join(colunas)
+    conexao.execute(text(f"DROP TABLE IF EXISTS pg_temp.{TABELA_TEMPORARIA}"))
+    conexao.execute(
+        text(
+            f"CREATE TEMP TABLE {TABELA_TEMPORARIA} ON COMMIT DROP AS "
+            f"SELECT {nomes} FROM produtos WITH NO DATA"
+        )
+    )
+    buffer = StringIO()
+    for linha in linhas:
+        buffer.write(",".join(_valor_copy(linha.get(nome)) for nome in colunas))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = conexao.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {TABELA_TEMPORARIA} ({nomes}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+    conexao.execute(comando_mescla_postgres(tabela, colunas, atualizar))
+
+
+def _gravar_generico(
+    conexao,
+    tabela,
+    colunas: Sequence[str],
+    novas: Sequence[dict[str, Any]],
+    existentes: Sequence[tuple[int, dict[str, Any]]],
+    atualizar: Mapping[str, str] | None,
+) -> None:
+    if novas:
+        conexao.execute(
+            insert(tabela),
+            [
+                {nome: _valor_banco(linha.get(nome)) for nome in colunas}
+                for linha in novas
+            ],
+        )
+    campos = [nome for nome in (atualizar or {}) if nome in colunas]
+    if not existentes or not campos:
+        return
+    valores = {
+        nome: _expressao_atualizacao(
+            atualizar[nome], tabela.c[nome], bindparam(f"novo_{nome}")
+        )
+        for nome in campos
+    }
+    if "updated_at" in tabela.c:
+        valores["updated_at"] = func.now()
+    conexao.execute(
+        update(tabela).where(tabela.c.id == bindparam("b_id")).values(valores),
+        [
+            {
+                "b_id": produto_id,
+                **{f"novo_{nome}": _valor_banco(linha.get(nome)) for nome in campos},
+            }
+            for produto_id, linha in existentes
+        ],
+    )
+
+
+def mesclar_produtos(
+    db: Session,
+    *,
+    tenant_id: Any,
+    registros: Sequence[dict[str, Any]],
+    atualizar: Mapping[str, str] | None = None,
+) -> ResultadoMescla:
+    """Cria os produtos novos e atualiza os existentes (pelo SKU), em blocos.
+
+    ``registros`` trazem colunas de ``produtos`` (``codigo`` obrigatorio); SKU
+    repetido vale a ultima ocorrencia. Sem ``atualizar`` os existentes ficam
+    como estao; com ele, cada coluna listada e gravada conforme o modo
+    (``MODO_SUBSTITUIR``, ``MODO_SE_INFORMADO``, ``MODO_SO_DESLIGAR``). As
+    demais colunas so valem para produtos novos. Nao faz commit.
+    """
+    resultado = ResultadoMescla()
+    por_chave = {chave_codigo(r["codigo"]): r for r in registros if r.get("codigo")}
+    if not por_chave:
+        return resultado
+
+    agora = _agora()
+    nomes = {"id", "codigo", "tenant_id", "preco_custo", "created_at", "updated_at"}
+    for registro in por_chave.values():
+        nomes.update(registro)
+    tabela = _tabela(db, nomes, tenant_id)
+    colunas = [nome for nome in tabela.c.keys() if nome != "id"]
+    postgres = db.get_bind().dialect.name == "postgresql"
+    sync_rls_tenant(db, tenant_id)
+    conexao = db.connection()
+
+    chaves = list(por_chave)
+    for inicio in range(0, len(chaves), LOTE_GRAVACAO):
+        bloco = chaves[inicio : inicio + LOTE_GRAVACAO]
+        existentes = _existentes(conexao, tabela, tenant_id, bloco)
+        linhas = {}
+        for chave in bloco:
+            linha = dict(por_chave[chave])
+            linha["tenant_id"] = tenant_id
+            linha.setdefault("created_at", agora)
+            linha.setdefault("updated_at", agora)
+            linhas[chave] = linha
+
+        novas = [chave for chave in bloco if chave not in existentes]
+        if postgres:
+            if atualizar:
+                # O conflito casa com o SKU ja gravado, mesmo com outra grafia
+                for chave, (_id, codigo, _custo) in existentes.items():
+                    linhas[chave]["codigo"] = codigo
+            enviadas = bloco if atualizar else novas
+            _gravar_postgres(
+                conexao,
+                tabela,
+                colunas,
+                [linhas[chave] for chave in enviadas],
+                atualizar,
+            )
+        else:
+            _gravar_generico(
+                conexao,
+                tabela,
+                colunas,
+                [linhas[chave] for chave in novas],
+                [(existentes[chave][0], linhas[chave]) for chave in existentes],
+                atualizar,
+            )
+
+        criados = _existentes(conexao, tabela, tenant_id, novas) if novas else {}
+        for chave, (produto_id, _codigo, _custo) in criados.items():
+            resultado.ids[chave] = produto_id
+            resultado.criados.append(chave)
+        for chave, (produto_id, _codigo, custo) in existentes.items():
+            resultado.ids[chave] = produto_id
+            resultado.custos_anteriores[chave] = custo
+            if atualizar:
+                resultado.atualizados.append(chave)
+    return resultado
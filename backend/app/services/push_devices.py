@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
+from sqlalchemy import or_
+
 from app.models import Cliente, User, UserPushDevice
 
 logger = logging.getLogger(__name__)
@@ -177,3 +179,80 @@ def mark_push_target_result(
     device.last_error_at = now
     if "DeviceNotRegistered" in device.last_error:
         device.enabled = False
+
+
+def customers_with_push_targets(db, *, tenant_id, clientes) -> set[int]:
+    """
+    Versao em lote de ``load_customer_push_targets`` para campanhas:
+    retorna os ids de clientes com ao menos um destino de push (dispositivo
+    habilitado ou token legado), com tres consultas para o lote inteiro.
+    """
+    clientes = [cliente for cliente in clientes if getattr(cliente, "id", None)]
+    if not clientes:
+        return set()
+
+    emails = {
+        _clean_token(getattr(cliente, "email", None)).lower() for cliente in clientes
+    }
+    emails.discard("")
+    auth_ids = {
+        cliente.auth_user_id
+        for cliente in clientes
+        if getattr(cliente, "auth_user_id", None)
+    }
+
+    users = []
+    try:
+        filtros = []
+        if emails:
+            filtros.append(User.email.in_(emails))
+        if auth_ids:
+            filtros.append(User.id.in_(auth_ids))
+        if filtros:
+            users = (
+                db.query(User).filter(User.tenant_id == tenant_id, or_(*filtros)).all()
+            )
+    except Exception as exc:
+        logger.warning("[PushDevices] Falha ao consultar usuarios do push: %s", exc)
+
+    users_by_email = {}
+    users_by_id = {}
+    for user in users:
+        users_by_id[user.id] = user
+        email = _clean_token(getattr(user, "email", None)).lower()
+        if email:
+            users_by_email.setdefault(email, user)
+
+    users_with_devices: set[int] = set()
+    if users_by_id:
+        try:
+            rows = (
+                db.query(UserPushDevice.user_id, UserPushDevice.expo_push_token)
+                .filter(
+                    UserPushDevice.user_id.in_(users_by_id),
+                    UserPushDevice.tenant_id == tenant_id,
+                    UserPushDevice.enabled.is_(True),
+                )
+                .all()
+            )
+        except Exception as exc:
+            logger.warning(
+                "[PushDevices] Falha ao consultar dispositivos push: %s", exc
+            )
+            rows = []
+        users_with_devices = {user_id for user_id, token in rows if _clean_token(token)}
+
+    def _has_target(user) -> bool:
+        return user is not None and (
+            user.id in users_with_devices
+            or bool(_clean_token(getattr(user, "push_token", None)))
+        )
+
+    customer_ids = set()
+    for cliente in clientes:
+        email = _clean_token(getattr(cliente, "email", None)).lower()
+        if _has_target(users_by_email.get(email)) or _has_target(
+            users_by_id.get(getattr(cliente, "auth_user_id", None))
+        ):
+            customer_ids.add(cliente.id)
+    return customer_ids
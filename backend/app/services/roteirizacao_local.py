@@ -0,0 +1,654 @@
+"""
+Roteirização local de entregas (sem Directions API)
+
+Planeja a ordem das paradas de um ou vários entregadores dentro do processo:
+
+1. Matriz de distâncias/durações entre a loja (nó 0) e as paradas (nós 1..N),
+   lida do cache da Distance Matrix do tenant. Pares nunca consultados usam
+   linha reta × fator de ruas sobre as coordenadas geocodificadas e ficam
+   marcados como estimados (``MatrizRoteirizacao.pares_estimados``). Fora do
+   request, os vizinhos mais próximos de cada nó são medidos no provedor
+   (até ``ELEMENTOS_AQUECIMENTO_MAX`` elementos) e entram no cache para os
+   próximos planejamentos.
+2. Solução inicial por vizinho mais próximo em paralelo: a cada passo o
+   entregador que chega mais cedo a alguma parada viável a recebe; as que
+   sobrarem (janela já perdida pelo guloso) entram por inserção mais barata.
+3. Melhoria local com prazo (``tempo_limite_ms``): 2-opt e or-opt (blocos de
+   1 a 3 paradas) dentro de cada rota e realocação de paradas entre rotas sem
+   aumentar a rota mais longa do par.
+
+Restrições: capacidade por entregador (soma das demandas), janela de horário
+por parada e jornada máxima por entregador; tempos em segundos contados da
+saída da loja. Paradas que não cabem em nenhuma rota voltam em
+``nao_atendidas``.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from math import asin, cos, radians, sin, sqrt
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.services.google_maps_cache import (
+    TIPO_DISTANCIA,
+    cache_google_maps,
+    chave_cache,
+    normalizar_endereco_cache,
+)
+from app.services.google_maps_providers import (
+    ProvedorMapsLocal,
+    provedor_maps_configurado,
+)
+from app.services.google_maps_service import (
+    calcular_matriz_distancias,
+    geocodificar_enderecos,
+    limpar_endereco_para_maps,
+)
+from app.tenancy.context import get_current_tenant, tenant_context
+
+logger = logging.getLogger(__name__)
+
+TEMPO_LIMITE_PADRAO_MS = 150
+_EPSILON = 1e-6
+
+# Aquecimento do cache: por nó, os vizinhos mais próximos em linha reta (as
+# arestas que uma boa rota usa), com teto de elementos cobrados por plano
+VIZINHOS_AQUECIMENTO = 5
+ELEMENTOS_AQUECIMENTO_MAX = 1000
+
+_em_aquecimento: Set[Tuple[str, str, str]] = set()
+_em_aquecimento_lock = threading.Lock()
+
+
+@dataclass
+class ParadaRoteirizacao:
+    """Parada a visitar; janela e atendimento em segundos desde a saída."""
+
+    demanda: int = 1
+    janela_inicio_s: Optional[float] = None
+    janela_fim_s: Optional[float] = None
+    tempo_servico_s: float = 0.0
+
+
+@dataclass
+class EntregadorRoteirizacao:
+    chave: Any = None
+    capacidade: Optional[int] = None
+    jornada_s: Optional[float] = None
+
+
+@dataclass
+class RotaRoteirizada:
+    entregador: EntregadorRoteirizacao
+    paradas: List[int]  # índices da lista de paradas, na ordem de visita
+    chegadas_s: List[float]  # início do atendimento em cada parada
+    distancia_m: float
+    duracao_s: float
+
+
+@dataclass
+class PlanoRoteirizacao:
+    rotas: List[RotaRoteirizada]
+    nao_atendidas: List[int] = field(default_factory=list)
+    custo_inicial_s: float = 0.0  # vizinho mais próximo, antes da melhoria
+    custo_final_s: float = 0.0
+
+
+@dataclass
+class MatrizRoteirizacao:
+    """Distâncias (m) e durações (s) ``[de][para]``; nó 0 é a origem."""
+
+    distancias_m: List[List[float]]
+    duracoes_s: List[List[float]]
+    pares_em_cache: int = 0
+    # Pares ``(de, para)`` em linha reta × fator de ruas, não medidos no mapa
+    pares_estimados: Set[Tuple[int, int]] = field(default_factory=set)
+
+    def __len__(self) -> int:
+        return len(self.distancias_m)
+
+    @property
+    def pares_linha_reta(self) -> int:
+        return len(self.pares_estimados)
+
+    def estimado(self, de: int, para: int) -> bool:
+        return (de, para) in self.pares_estimados
+
+
+def _linha_reta_km(
+    coordenadas: Sequence[Tuple[float, float]],
+) -> List[List[float]]:
+    pontos = [(radians(lat), radians(lng)) for lat, lng in coordenadas]
+    cossenos = [cos(lat) for lat, _ in pontos]
+    matriz = []
+    for i, (lat_a, lng_a) in enumerate(pontos):
+        linha = []
+        for j, (lat_b, lng_b) in enumerate(pontos):
+            h = (
+                sin((lat_b - lat_a) / 2) ** 2
+                + cossenos[i] * cossenos[j] * sin((lng_b - lng_a) / 2) ** 2
+            )
+            linha.append(2 * 6371.0 * asin(sqrt(min(1.0, h))))
+        matriz.append(linha)
+    return matriz
+
+
+def matriz_por_coordenadas(
+    coordenadas: Sequence[Tuple[float, float]],
+) -> MatrizRoteirizacao:
+    """Matriz estimada (linha reta × fator de ruas, velocidade média urbana)."""
+    fator = ProvedorMapsLocal.FATOR_RUAS
+    segundos_por_km = 3600 / ProvedorMapsLocal.VELOCIDADE_KMH
+    km = _linha_reta_km(coordenadas)
+    distancias = [[d * fator * 1000 for d in linha] for linha in km]
+    duracoes = [[d * fator * segundos_por_km for d in linha] for linha in km]
+    n = len(coordenadas)
+    estimados = {(i, j) for i in range(n) for j in range(n) if i != j}
+    return MatrizRoteirizacao(distancias, duracoes, pares_estimados=estimados)
+
+
+def matriz_por_enderecos(origem: str, enderecos: Sequence[str]) -> MatrizRoteirizacao:
+    """
+    Matriz da origem + endereços: cache e, para o que faltar, linha reta
+
+    Nenhuma chamada da Distance Matrix acontece aqui: os pares fora do cache
+    são estimados e os mais úteis vão para ``_agendar_aquecimento``.
+    """
+    pontos = [origem, *enderecos]
+    normalizados = [
+        normalizar_endereco_cache(limpar_endereco_para_maps(p) or p) for p in pontos
+    ]
+    n = len(pontos)
+    chaves: Dict[Tuple[int, int], str] = {}
+    for i in range(n):
+        for j in range(n):
+            if normalizados[i] != normalizados[j]:
+                chaves[(i, j)] = chave_cache(normalizados[i], normalizados[j])
+
+    em_cache = cache_google_maps.buscar(TIPO_DISTANCIA, chaves.values())
+    distancias = [[0.0] * n for _ in range(n)]
+    duracoes = [[0.0] * n for _ in range(n)]
+    faltantes = []
+    for (i, j), chave in chaves.items():
+        elemento = em_cache.get(chave)
+        if elemento and elemento.get("status") == "OK":
+            distancias[i][j] = float(elemento["distance"]["value"])
+            duracoes[i][j] = float(elemento["duration"]["value"])
+        else:
+            faltantes.append((i, j))
+
+    if faltantes:
+        nos = sorted({no for par in faltantes for no in par})
+        coordenadas = geocodificar_enderecos([pontos[no] for no in nos])
+        estimada = matriz_por_coordenadas([coordenadas[pontos[no]] for no in nos])
+        posicao = {no: k for k, no in enumerate(nos)}
+        for i, j in faltantes:
+            distancias[i][j] = estimada.distancias_m[posicao[i]][posicao[j]]
+            duracoes[i][j] = estimada.duracoes_s[posicao[i]][posicao[j]]
+
+        tenant_id = get_current_tenant()
+        if tenant_id is not None and provedor_maps_configurado():
+            grupos = _pares_para_aquecer(pontos, faltantes, distancias)
+            if grupos:
+                _agendar_aquecimento(tenant_id, grupos)
+
+    return MatrizRoteirizacao(
+        distancias,
+        duracoes,
+        pares_em_cache=len(chaves) - len(faltantes),
+        pares_estimados=set(faltantes),
+    )
+
+
+def _pares_para_aquecer(
+    pontos: Sequence[str],
+    faltantes: Sequence[Tuple[int, int]],
+    distancias: List[List[float]],
+) -> Dict[str, List[str]]:
+    """``origem -> destinos`` a medir: vizinhos mais próximos, dentro do teto."""
+    por_origem: Dict[int, List[int]] = {}
+    for i, j in faltantes:
+        por_origem.setdefault(i, []).append(j)
+    grupos: Dict[str, List[str]] = {}
+    restantes = ELEMENTOS_AQUECIMENTO_MAX
+    for i in sorted(por_origem):
+        destinos = sorted(por_origem[i], key=lambda j: distancias[i][j])
+        # A loja pode ir a qualquer parada; das paradas, a volta à loja conta
+        escolhidos = destinos if i == 0 else destinos[:VIZINHOS_AQUECIMENTO]
+        if i != 0 and 0 in destinos and 0 not in escolhidos:
+            escolhidos.append(0)
+        escolhidos = escolhidos[:restantes]
+        if escolhidos:
+            grupos[pontos[i]] = list(
+                dict.fromkeys(pontos[j] for j in escolhidos if pontos[j] != pontos[i])
+            )
+            restantes -= len(escolhidos)
+        if restantes <= 0:
+            break
+    return {origem: destinos for origem, destinos in grupos.items() if destinos}
+
+
+def _agendar_aquecimento(tenant_id, grupos: Dict[str, List[str]]) -> None:
+    chaves = {
+        (str(tenant_id), origem, destino)
+        for origem, destinos in grupos.items()
+        for destino in destinos
+    }
+    with _em_aquecimento_lock:
+        novas = chaves - _em_aquecimento
+        _em_aquecimento.update(novas)
+    if not novas:
+        return
+    pendentes: Dict[str, List[str]] = {}
+    for _tenant, origem, destino in sorted(novas):
+        pendentes.setdefault(origem, []).append(destino)
+    threading.Thread(
+        target=aquecer_cache_distancias,
+        kwargs={"tenant_id": tenant_id, "grupos": pendentes},
+        daemon=True,
+    ).start()
+
+
+def aquecer_cache_distancias(*, tenant_id, grupos: Dict[str, List[str]]) -> None:
+    """Mede no provedor, fora do request, os pares estimados; o cache guarda."""
+    try:
+        with tenant_context(tenant_id):
+            for origem, destinos in grupos.items():
+                # Uma linha por chamada: só os elementos pedidos são cobrados
+                calcular_matriz_distancias([origem], destinos)
+    except Exception:
+        logger.warning(
+            "[ROTEIRIZACAO] Falha ao medir distâncias do tenant %s; "
+            "seguem em linha reta",
+            tenant_id,
+            exc_info=True,
+        )
+    finally:
+        with _em_aquecimento_lock:
+            _em_aquecimento.difference_update(
+                (str(tenant_id), origem, destino)
+                for origem, destinos in grupos.items()
+                for destino in destinos
+            )
+
+
+class _Roteirizador:
+    def __init__(
+        self,
+        matriz: MatrizRoteirizacao,
+        paradas: Sequence[ParadaRoteirizacao],
+        entregadores: Sequence[EntregadorRoteirizacao],
+        retorna_origem: bool,
+    ):
+        self.duracoes = matriz.duracoes_s
+        if retorna_origem:
+            self.custo = self.duracoes
+        else:
+            # Rota aberta: a volta à loja não custa nada
+            self.custo = [list(linha) for linha in self.duracoes]
+            for linha in self.custo:
+                linha[0] = 0.0
+        self.retorna_origem = retorna_origem
+        self.demanda = [0, *(p.demanda for p in paradas)]
+        self.inicio = [None, *(p.janela_inicio_s for p in paradas)]
+        self.fim = [None, *(p.janela_fim_s for p in paradas)]
+        self.servico = [0.0, *(p.tempo_servico_s for p in paradas)]
+        self.capacidade = [
+            float("inf") if e.capacidade is None else e.capacidade for e in entregadores
+        ]
+        self.jornada = [e.jornada_s for e in entregadores]
+        self.com_tempo = any(v is not None for v in self.inicio + self.fim) or any(
+            j is not None for j in self.jornada
+        )
+
+    def simular(self, rota: List[int], veiculo: int):
+        """``(chegadas, fim)`` da rota, ou None se violar janela ou jornada."""
+        duracoes = self.duracoes
+        t = 0.0
+        anterior = 0
+        chegadas = []
+        for no in rota:
+            t += duracoes[anterior][no]
+            inicio = self.inicio[no]
+            if inicio is not None and t < inicio:
+                t = inicio
+            fim = self.fim[no]
+            if fim is not None and t > fim:
+                return None
+            chegadas.append(t)
+            t += self.servico[no]
+            anterior = no
+        if self.retorna_origem:
+            t += duracoes[anterior][0]
+        jornada = self.jornada[veiculo]
+        if jornada is not None and t > jornada:
+            return None
+        return chegadas, t
+
+    def viavel(self, rota: List[int], veiculo: int) -> bool:
+        return not self.com_tempo or self.simular(rota, veiculo) is not None
+
+    def custo_rota(self, rota: List[int]) -> float:
+        custo = self.custo
+        total = 0.0
+        anterior = 0
+        for no in rota:
+            total += custo[anterior][no]
+            anterior = no
+        return total + custo[anterior][0]
+
+    def construir(self) -> Tuple[List[List[int]], List[int]]:
+        duracoes = self.duracoes
+        quantidade = len(self.capacidade)
+        rotas: List[List[int]] = [[] for _ in range(quantidade)]
+        tempo = [0.0] * quantidade
+        carga = [0] * quantidade
+        ultimo = [0] * quantidade
+        pendentes = set(range(1, len(self.demanda)))
+
+        while pendentes:
+            melhor = None
+            for v in range(quantidade):
+                linha = duracoes[ultimo[v]]
+                livre = self.capacidade[v] - carga[v]
+                jornada = self.jornada[v]
+                for no in pendentes:
+                    if self.demanda[no] > livre:
+                        continue
+                    t = tempo[v] + linha[no]
+                    inicio = self.inicio[no]
+                    if inicio is not None and t < inicio:
+                        t = inicio
+                    fim = self.fim[no]
+                    if fim is not None and t > fim:
+                        continue
+                    if jornada is not None:
+                        volta = duracoes[no][0] if self.retorna_origem else 0.0
+                        if t + self.servico[no] + volta > jornada:
+                            continue
+                    if melhor is None or t < melhor[0]:
+                        melhor = (t, v, no)
+            if melhor is None:
+                break
+            t, v, no = melhor
+            rotas[v].append(no)
+            tempo[v] = t + self.servico[no]
+            carga[v] += self.demanda[no]
+            ultimo[v] = no
+            pendentes.discard(no)
+
+        return rotas, sorted(pendentes)
+
+    def inserir_pendentes(self, rotas: List[List[int]], pendentes: List[int]):
+        """Inserção mais barata viável das paradas que o vizinho mais próximo deixou."""
+        custo = self.custo
+        cargas = [sum(self.demanda[no] for no in rota) for rota in rotas]
+        restantes = []
+        for no in pendentes:
+            melhor = None
+            for veiculo, rota in enumerate(rotas):
+                if cargas[veiculo] + self.demanda[no] > self.capacidade[veiculo]:
+                    continue
+                ext = [0, *rota, 0]
+                for p in range(len(ext) - 1):
+                    x = ext[p]
+                    y = ext[p + 1]
+                    acrescimo = custo[x][no] + custo[no][y] - custo[x][y]
+                    if melhor is not None and acrescimo >= melhor[0]:
+                        continue
+                    if self.viavel(rota[:p] + [no] + rota[p:], veiculo):
+                        melhor = (acrescimo, veiculo, p)
+            if melhor is None:
+                restantes.append(no)
+                continue
+            _, veiculo, p = melhor
+            rotas[veiculo].insert(p, no)
+            cargas[veiculo] += self.demanda[no]
+        return restantes
+
+    def dois_opt(self, rota: List[int], veiculo: int, prazo: float) -> bool:
+        """Inverte trechos enquanto reduzir o custo (delta O(1) por prefixos)."""
+        custo = self.custo
+        ext = [0, *rota, 0]
+        melhorou = False
+
+        def prefixos(ext):
+            ida = [0.0]
+            volta = [0.0]
+            for u in range(len(ext) - 1):
+                ida.append(ida[-1] + custo[ext[u]][ext[u + 1]])
+                volta.append(volta[-1] + custo[ext[u + 1]][ext[u]])
+            return ida, volta
+
+        ida, volta = prefixos(ext)
+        m = len(ext)
+        i = 1
+        while i < m - 2:
+            if time.perf_counter() > prazo:
+                break
+            linha_a = custo[ext[i - 1]]
+            linha_i = custo[ext[i]]
+            atual_a = linha_a[ext[i]]
+            ida_i = ida[i]
+            volta_i = volta[i]
+            aplicado = False
+            for j in range(i + 1, m - 1):
+                no_j = ext[j]
+                seguinte = ext[j + 1]
+                delta = (
+                    linha_a[no_j]
+                    + (volta[j] - volta_i)
+                    + linha_i[seguinte]
+                    - atual_a
+                    - (ida[j] - ida_i)
+                    - custo[no_j][seguinte]
+                )
+                if delta < -_EPSILON:
+                    novo = ext[:i] + ext[j : i - 1 : -1] + ext[j + 1 :]
+                    if self.com_tempo and not self.viavel(novo[1:-1], veiculo):
+                        continue
+                    ext = novo
+                    ida, volta = prefixos(ext)
+                    melhorou = aplicado = True
+                    break
+            if not aplicado:
+                i += 1
+
+        rota[:] = ext[1:-1]
+        return melhorou
+
+    def or_opt(self, rota: List[int], veiculo: int, prazo: float) -> bool:
+        """Move blocos de 1 a 3 paradas consecutivas para a melhor posição."""
+        custo = self.custo
+        melhorou = False
+        for tamanho in (1, 2, 3):
+            i = 0
+            while i + tamanho <= len(rota):
+                if time.perf_counter() > prazo:
+                    return melhorou
+                bloco = rota[i : i + tamanho]
+                primeiro = bloco[0]
+                ultimo = bloco[-1]
+                antes = rota[i - 1] if i else 0
+                depois = rota[i + tamanho] if i + tamanho < len(rota) else 0
+                ganho = (
+                    custo[antes][primeiro]
+                    + custo[ultimo][depois]
+                    - custo[antes][depois]
+                )
+                resto = rota[:i] + rota[i + tamanho :]
+                ext = [0, *resto, 0]
+                aplicado = False
+                for p in range(len(ext) - 1):
+                    if p == i:
+                        continue
+                    x = ext[p]
+                    y = ext[p + 1]
+                    delta = custo[x][primeiro] + custo[ultimo][y] - custo[x][y] - ganho
+                    if delta < -_EPSILON:
+                        novo = resto[:p] + bloco + resto[p:]
+                        if self.com_tempo and not self.viavel(novo, veiculo):
+                            continue
+                        rota[:] = novo
+                        melhorou = aplicado = True
+                        break
+                if not aplicado:
+                    i += 1
+        return melhorou
+
+    def realocar(self, rotas: List[List[int]], prazo: float) -> bool:
+        """Passa paradas para outra rota se o total cair e a maior do par não crescer."""
+        custo = self.custo
+        custos = [self.custo_rota(rota) for rota in rotas]
+        cargas = [sum(self.demanda[no] for no in rota) for rota in rotas]
+        melhorou = False
+
+        for origem, rota_a in enumerate(rotas):
+            i = 0
+            while i < len(rota_a):
+                if time.perf_counter() > prazo:
+                    return melhorou
+                no = rota_a[i]
+                antes = rota_a[i - 1] if i else 0
+                depois = rota_a[i + 1] if i + 1 < len(rota_a) else 0
+                ganho = custo[antes][no] + custo[no][depois] - custo[antes][depois]
+                movido = False
+                for destino, rota_b in enumerate(rotas):
+                    if (
+                        destino == origem
+                        or cargas[destino] + self.demanda[no] > self.capacidade[destino]
+                    ):
+                        continue
+                    limite = max(custos[origem], custos[destino]) + _EPSILON
+                    ext = [0, *rota_b, 0]
+                    for p in range(len(ext) - 1):
+                        x = ext[p]
+                        y = ext[p + 1]
+                        acrescimo = custo[x][no] + custo[no][y] - custo[x][y]
+                        if (
+                            acrescimo - ganho >= -_EPSILON
+                            or custos[destino] + acrescimo > limite
+                        ):
+                            continue
+                        novo_b = rota_b[:p] + [no] + rota_b[p:]
+                        novo_a = rota_a[:i] + rota_a[i + 1 :]
+                        if self.com_tempo and not (
+                            self.viavel(novo_b, destino) and self.viavel(novo_a, origem)
+                        ):
+                            continue
+                        rota_a[:] = novo_a
+                        rota_b[:] = novo_b
+                        custos[origem] -= ganho
+                        custos[destino] += acrescimo
+                        cargas[origem] -= self.demanda[no]
+                        cargas[destino] += self.demanda[no]
+                        melhorou = movido = True
+                        break
+                    if movido:
+                        break
+                if not movido:
+                    i += 1
+        return melhorou
+
+    def melhorar(self, rotas: List[List[int]], prazo: float) -> None:
+        while time.perf_counter() < prazo:
+            melhorou = False
+            for veiculo, rota in enumerate(rotas):
+                melhorou |= self.dois_opt(rota, veiculo, prazo)
+                melhorou |= self.or_opt(rota, veiculo, prazo)
+            if len(rotas) > 1:
+                melhorou |= self.realocar(rotas, prazo)
+            if not melhorou:
+                break
+
+
+def planejar_rotas(
+    matriz: MatrizRoteirizacao,
+    paradas: Sequence[ParadaRoteirizacao],
+    entregadores: Sequence[EntregadorRoteirizacao],
+    retorna_origem: bool = True,
+    tempo_limite_ms: Optional[float] = TEMPO_LIMITE_PADRAO_MS,
+    melhorar: bool = True,
+) -> PlanoRoteirizacao:
+    """
+    Distribui e ordena as paradas entre os entregadores
+
+    O custo minimizado é a soma dos tempos de deslocamento (sem a volta à loja
+    quando ``retorna_origem`` é False). A melhoria para ao convergir ou ao
+    esgotar ``tempo_limite_ms`` (None = sem prazo).
+    """
+    if not entregadores:
+        raise ValueError("Informe ao menos um entregador")
+    if len(matriz) != len(paradas) + 1:
+        raise ValueError("A matriz deve ter a origem e uma linha por parada")
+
+    inicio = time.perf_counter()
+    prazo = float("inf") if tempo_limite_ms is None else inicio + tempo_limite_ms / 1000
+    roteirizador = _Roteirizador(matriz, paradas, entregadores, retorna_origem)
+    rotas, nao_atendidas = roteirizador.construir()
+    nao_atendidas = roteirizador.inserir_pendentes(rotas, nao_atendidas)
+    custo_inicial = sum(roteirizador.custo_rota(rota) for rota in rotas)
+    if melhorar:
+        roteirizador.melhorar(rotas, prazo)
+
+    resultado = []
+    for veiculo, rota in enumerate(rotas):
+        chegadas, fim = roteirizador.simular(rota, veiculo)
+        caminho = [0, *rota, 0] if roteirizador.retorna_origem else [0, *rota]
+        distancia = sum(matriz.distancias_m[a][b] for a, b in zip(caminho, caminho[1:]))
+        resultado.append(
+            RotaRoteirizada(
+                entregador=entregadores[veiculo],
+                paradas=[no - 1 for no in rota],
+                chegadas_s=chegadas,
+                distancia_m=distancia,
+                duracao_s=fim,
+            )
+        )
+
+    return PlanoRoteirizacao(
+        rotas=resultado,
+        nao_atendidas=[no - 1 for no in nao_atendidas],
+        custo_inicial_s=custo_inicial,
+        custo_final_s=sum(roteirizador.custo_rota(rota) for rota in rotas),
+    )
+
+
+def _trecho(
+    matriz: MatrizRoteirizacao, pontos: Sequence[str], de: int, para: int
+) -> Dict[str, Any]:
+    metros = int(round(matriz.distancias_m[de][para]))
+    segundos = int(round(matriz.duracoes_s[de][para]))
+    return {
+        "start_address": pontos[de],
+        "end_address": pontos[para],
+        "distance": {"value": metros, "text": f"{metros / 1000:.1f} km"},
+        "duration": {"value": segundos, "text": f"{max(1, round(segundos / 60))} mins"},
+        "estimado": matriz.estimado(de, para),
+    }
+
+
+def otimizar_rota_unica(
+    origem: str, destinos: List[str], retorna_origem: bool = False
+) -> Tuple[List[int], List[Dict[str, Any]]]:
+    """
+    ``(ordem, legs)`` no formato que a Directions API devolvia
+
+    Cada leg traz ``estimado=True`` quando o trecho é linha reta, não medido.
+    """
+    matriz = matriz_por_enderecos(origem, destinos)
+    plano = planejar_rotas(
+        matriz,
+        [ParadaRoteirizacao() for _ in destinos],
+        [EntregadorRoteirizacao()],
+        retorna_origem=retorna_origem,
+    )
+    ordem = plano.rotas[0].paradas
+    pontos = [origem, *destinos]
+    legs = []
+    anterior = 0
+    for indice in ordem:
+        legs.append(_trecho(matriz, pontos, anterior, indice + 1))
+        anterior = indice + 1
+    return ordem, legs
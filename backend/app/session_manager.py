@@ -86,13 +86,20 @@ def validate_session(db: DBSession, token_jti: str) -> bool:
     concorrentes do frontend cria contencao de lock no Postgres e pode
     derrubar endpoints autenticados por timeout.
     """
+    return get_valid_session(db, token_jti) is not None
+
+
+def get_valid_session(db: DBSession, token_jti: str) -> Optional[UserSession]:
+    """
+    Retorna a sessão ativa do JTI, ou None se inexistente/revogada/expirada.
+    """
     session = get_session_by_jti(db, token_jti)
 
     if not session:
-        return False
+        return None
 
     if session.revoked:
-        return False
+        return None
 
     now = datetime.now(timezone.utc)
     expires_at = session.expires_at
@@ -102,9 +109,9 @@ def validate_session(db: DBSession, token_jti: str) -> bool:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
 
     if expires_at <= now:
-        return False
+        return None
 
-    return True
+    return session
 
 
 def revoke_session(
@@ -46,7 +46,8 @@ TENANT_WHITELIST_TABLES = {
     # UPDATE SKIP LOCKED) fora de request, sem tenant no contexto. A engine seta o tenant
     # por evento ao processar (engine.py). Alinhado com INTENTIONALLY_GLOBAL_TENANT_TABLES.
     "campaign_event_queue",  # fila de eventos: worker.process_batch claim cross-tenant
-    "notification_queue",  # fila de notificações: notification_sender claim cross-tenant
+    "notification_queue",  # fila de notificações: sender/dispatcher claim cross-tenant
+    "whatsapp_inbound_queue",  # fila de entrada do WhatsApp: worker claim cross-tenant
     # Indice minimo de capacidade publica: token aleatorio -> tenant/rota.
     "rotas_entrega_rastreio_tokens",
     # Bootstrap da integração: a solicitação ainda não pertence a um tenant antes
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import weakref
+from dataclasses import dataclass
 from typing import Any
 from uuid import UUID
 
@@ -16,6 +18,21 @@ RLS_AUTH_USER_SETTING = "app.auth_user_id"
 RLS_AUTH_EMAIL_SETTING = "app.auth_email"
 _SET_CONFIG_SQL = text("SELECT set_config(:setting_name, :setting_value, true)")
 _UNSET = object()
+_APPLIED_SETTINGS_INFO_KEY = "rls_applied_settings"
+
+
+@dataclass
+class RlsSyncStats:
+    applied: int = 0
+    skipped: int = 0
+
+
+rls_sync_stats = RlsSyncStats()
+
+
+def get_rls_sync_stats() -> dict[str, int]:
+    """Contadores de set_config emitidos e evitados (valor ja aplicado)."""
+    return {"applied": rls_sync_stats.applied, "skipped": rls_sync_stats.skipped}
 
 
 def _dialect_name(db: ORMSession) -> str:
@@ -38,23 +55,66 @@ def _set_transaction_setting(
     if _dialect_name(db) != "postgresql":
         return False
 
-    db.connection().execute(
+    connection = db.connection()
+    applied = _applied_settings(connection)
+    if applied is not None and applied.get(setting_name) == setting_value:
+        rls_sync_stats.skipped += 1
+        return True
+
+    connection.execute(
         _SET_CONFIG_SQL,
         {
             "setting_name": setting_name,
             "setting_value": setting_value,
         },
     )
+    rls_sync_stats.applied += 1
+    if applied is not None:
+        applied[setting_name] = setting_value
     return True
 
 
+def _current_transaction(connection):
+    get_nested = getattr(connection, "get_nested_transaction", None)
+    get_root = getattr(connection, "get_transaction", None)
+    if get_nested is None or get_root is None:
+        return None
+    return get_nested() or get_root()
+
+
+def _applied_settings(connection) -> dict[str, str] | None:
+    """
+    Settings ja aplicados na transacao (ou savepoint) corrente da conexao.
+
+    O valor fica em ``connection.info`` (por conexao DBAPI) amarrado a um
+    weakref da transacao mais interna. Nova transacao, novo savepoint ou
+    retorno ao nivel externo descartam o registro, entao o set_config volta a
+    ser emitido: o rollback de um savepoint desfaz um set_config local, e o
+    commit/rollback da transacao desfaz todos.
+    """
+    info = getattr(connection, "info", None)
+    transaction = _current_transaction(connection)
+    if info is None or transaction is None:
+        return None
+
+    entry = info.get(_APPLIED_SETTINGS_INFO_KEY)
+    if entry is not None and entry[0]() is transaction:
+        return entry[1]
+
+    settings: dict[str, str] = {}
+    info[_APPLIED_SETTINGS_INFO_KEY] = (weakref.ref(transaction), settings)
+    return settings
+
+
 def sync_rls_tenant(db: ORMSession, tenant_id: Any = _UNSET) -> bool:
     """
     Sync the Python tenant context into PostgreSQL transaction-local settings.
 
     RLS policies can read this with ``current_setting('app.tenant_id', true)``.
     The setting is transaction-local (third set_config argument = true), so it
-    does not leak through pooled connections after commit/rollback.
+    does not leak through pooled connections after commit/rollback. The
+    round-trip is skipped when the same value was already applied in the
+    current transaction of the connection (see ``get_rls_sync_stats``).
     """
     return _set_transaction_setting(
         db, RLS_TENANT_SETTING, _resolve_tenant_value(tenant_id)
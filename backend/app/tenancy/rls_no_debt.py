@@ -17,6 +17,7 @@ INTENTIONALLY_GLOBAL_NO_RLS_TABLES = frozenset(
         "ops_error_events",
         "rotas_entrega_rastreio_tokens",
         "user_sessions",
+        "whatsapp_inbound_queue",
     }
 )
 
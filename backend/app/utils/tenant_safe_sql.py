@@ -15,6 +15,7 @@ from sqlalchemy import text
 from sqlalchemy.engine import Result
 from sqlalchemy.orm import Session
 
+from app.db.sql_audit_context import tenant_safe_execution
 from app.tenancy.context import get_current_tenant_id
 from app.tenancy.rls import sync_rls_tenant
 
@@ -305,12 +306,13 @@ def execute_tenant_safe(
         )
 
     try:
-        sync_rls_tenant(db, resolved_tenant_id)
-        statement = text(sql_text)
-        bindparams = _sql_bindparams(sql)
-        if bindparams:
-            statement = statement.bindparams(*bindparams)
-        return db.execute(statement, safe_params)
+        with tenant_safe_execution():
+            sync_rls_tenant(db, resolved_tenant_id)
+            statement = text(sql_text)
+            bindparams = _sql_bindparams(sql)
+            if bindparams:
+                statement = statement.bindparams(*bindparams)
+            return db.execute(statement, safe_params)
     except Exception as exc:
         raise TenantSafeSQLError(
             "Erro ao executar SQL tenant-safe. "
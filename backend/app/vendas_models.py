@@ -502,6 +502,10 @@ class VendaPagamento(BaseTenantModel):
     """Formas de pagamento da venda"""
 
     __tablename__ = "venda_pagamentos"
+    __table_args__ = (
+        # Amarração da Aba 3: NSUs do dia resolvidos em uma consulta
+        Index("ix_venda_pagamentos_tenant_nsu", "tenant_id", "nsu_cartao"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     venda_id = Column(
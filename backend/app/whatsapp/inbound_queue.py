@@ -0,0 +1,374 @@
+"""
+WhatsApp Inbound Queue — fila persistente das mensagens recebidas
+==================================================================
+
+O webhook apenas grava as mensagens em `whatsapp_inbound_queue` (idempotente
+por tenant + whatsapp_msg_id) e responde 200; nada se perde num restart.
+
+O worker (`InboundMessageWorker.run_once`, chamado em loop pelo job de
+background) processa a fila por conversa (tenant, telefone):
+
+  - Serialização: uma conversa com mensagem em `processing`, ou com mensagem
+    `failed` ainda esperando o backoff, não é reservada; cada reserva leva
+    TODAS as mensagens pendentes da conversa e as processa em ordem de envio
+    (uma mensagem nova nunca passa na frente de uma que falhou).
+  - Agrupamento: mensagens seguidas do mesmo cliente com intervalo de até
+    `MERGE_WINDOW` viram um único turno do MessageProcessor. A conversa só é
+    reservada depois de `DEBOUNCE` sem mensagem nova, para a rajada chegar
+    inteira.
+  - Concorrência: até `max_concurrent` conversas em paralelo no total e até
+    `max_per_tenant` por tenant (uma campanha com muitas respostas de um
+    tenant não esgota as chamadas de LLM dos demais).
+  - Falha: a reserva volta como `failed` com backoff exponencial; depois de
+    `max_attempts` vira `dead`. Reservas `processing` mais antigas que
+    `PROCESSING_TIMEOUT` (processo morto) voltam a ser elegíveis.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from uuid import UUID
+
+from sqlalchemy import and_, exists, func, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+
+from app.whatsapp.models import WhatsAppInboundMessage
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_PROCESSED = "processed"
+STATUS_FAILED = "failed"
+STATUS_DEAD = "dead"
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+MAX_CONCURRENT = _env_int("WHATSAPP_INBOUND_MAX_CONCURRENT", 8)
+MAX_PER_TENANT = _env_int("WHATSAPP_INBOUND_MAX_PER_TENANT", 2)
+CLAIM_LIMIT = _env_int("WHATSAPP_INBOUND_CLAIM_LIMIT", 32)
+MAX_ATTEMPTS = _env_int("WHATSAPP_INBOUND_MAX_ATTEMPTS", 5)
+MERGE_WINDOW = timedelta(seconds=_env_int("WHATSAPP_INBOUND_MERGE_SECONDS", 8))
+DEBOUNCE = timedelta(seconds=_env_int("WHATSAPP_INBOUND_DEBOUNCE_SECONDS", 2))
+PROCESSING_TIMEOUT = timedelta(
+    seconds=_env_int("WHATSAPP_INBOUND_PROCESSING_TIMEOUT_SECONDS", 10 * 60)
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    """SQLite devolve datetimes sem tzinfo; a fila grava sempre em UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _backoff_seconds(attempts: int) -> int:
+    return min(15 * 60, 30 * (2 ** max(0, attempts - 1)))
+
+
+def _fallback_msg_id(tenant_id, message: dict) -> str:
+    raw = "|".join(
+        str(part)
+        for part in (
+            tenant_id,
+            message.get("phone"),
+            message.get("received_at"),
+            message.get("conteudo"),
+        )
+    )
+    return "sha256:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def enqueue_inbound_messages(
+    db: Session, *, tenant_id, messages: list[dict[str, Any]]
+) -> int:
+    """
+    Grava as mensagens recebidas na fila e commita.
+
+    Cada item: {"phone", "whatsapp_msg_id", "conteudo", "received_at"}.
+    Reentregas do mesmo whatsapp_msg_id no tenant são ignoradas
+    (ON CONFLICT DO NOTHING). Retorna quantas linhas novas entraram.
+    """
+    if not messages:
+        return 0
+
+    tenant_uuid = UUID(str(tenant_id))
+    now = _utcnow()
+    rows = [
+        {
+            "tenant_id": tenant_uuid,
+            "phone": message["phone"],
+            "whatsapp_msg_id": message.get("whatsapp_msg_id")
+            or _fallback_msg_id(tenant_uuid, message),
+            "conteudo": message["conteudo"],
+            "received_at": message.get("received_at") or now,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "max_attempts": MAX_ATTEMPTS,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for message in messages
+    ]
+
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    result = db.execute(
+        insert(WhatsAppInboundMessage)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["tenant_id", "whatsapp_msg_id"])
+    )
+    db.commit()
+    inserted = max(int(result.rowcount or 0), 0)
+    if inserted < len(rows):
+        logger.info(
+            "[WA INBOUND] %s mensagem(ns) reentregue(s) ignorada(s)",
+            len(rows) - inserted,
+        )
+    return inserted
+
+
+@dataclass
+class _Conversation:
+    tenant_id: UUID
+    phone: str
+    messages: list[WhatsAppInboundMessage] = field(default_factory=list)
+
+
+def _merge_runs(
+    messages: list[WhatsAppInboundMessage], window: timedelta
+) -> list[list[WhatsAppInboundMessage]]:
+    """Agrupa mensagens consecutivas com intervalo de até `window`."""
+    runs: list[list[WhatsAppInboundMessage]] = []
+    for message in messages:
+        if (
+            runs
+            and _aware(message.received_at) - _aware(runs[-1][-1].received_at) <= window
+        ):
+            runs[-1].append(message)
+        else:
+            runs.append([message])
+    return runs
+
+
+class InboundMessageWorker:
+    """Pool de processamento da fila de entrada, serializado por conversa."""
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        *,
+        max_concurrent: int = MAX_CONCURRENT,
+        max_per_tenant: int = MAX_PER_TENANT,
+        claim_limit: int = CLAIM_LIMIT,
+        merge_window: timedelta = MERGE_WINDOW,
+        debounce: timedelta = DEBOUNCE,
+        turn_handler: Callable[..., Any] | None = None,
+    ):
+        """
+        `turn_handler(tenant_id, phone, messages, db)` processa um turno
+        (default: webhook.process_incoming_turn).
+        """
+        self.db_factory = db_factory
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_tenant = max(1, max_per_tenant)
+        self.claim_limit = max(1, claim_limit)
+        self.merge_window = merge_window
+        self.debounce = debounce
+        self.turn_handler = turn_handler
+
+    async def run_once(self) -> dict[str, int]:
+        """Reserva um lote de conversas e processa com concorrência limitada."""
+        db = self.db_factory()
+        try:
+            conversations = self._claim(db)
+        finally:
+            db.close()
+
+        stats = {"conversations": len(conversations), "turns": 0, "failed": 0}
+        if not conversations:
+            return stats
+
+        overall = asyncio.Semaphore(self.max_concurrent)
+        per_tenant: dict[UUID, asyncio.Semaphore] = {}
+
+        async def _run(conversation: _Conversation) -> None:
+            tenant_gate = per_tenant.setdefault(
+                conversation.tenant_id, asyncio.Semaphore(self.max_per_tenant)
+            )
+            async with tenant_gate, overall:
+                turns, failed = await self._process_conversation(conversation)
+            stats["turns"] += turns
+            stats["failed"] += failed
+
+        await asyncio.gather(*(_run(conversation) for conversation in conversations))
+        logger.info("[WA INBOUND] %s", stats)
+        return stats
+
+    # ------------------------------------------------------------------
+    # Reserva
+    # ------------------------------------------------------------------
+
+    def _claim(self, db: Session) -> list[_Conversation]:
+        db.expire_on_commit = False
+        now = _utcnow()
+        stale_after = now - PROCESSING_TIMEOUT
+        queue = WhatsAppInboundMessage
+        busy = aliased(WhatsAppInboundMessage)
+        waiting = aliased(WhatsAppInboundMessage)
+
+        ready = and_(
+            or_(
+                queue.status.in_([STATUS_PENDING, STATUS_FAILED]),
+                and_(
+                    queue.status == STATUS_PROCESSING,
+                    queue.started_at < stale_after,
+                ),
+            ),
+            queue.next_attempt_at <= now,
+            queue.attempts < queue.max_attempts,
+        )
+        # Conversa com reserva ativa fica de fora: garante a ordem por telefone
+        in_flight = exists().where(
+            busy.tenant_id == queue.tenant_id,
+            busy.phone == queue.phone,
+            busy.status == STATUS_PROCESSING,
+            busy.started_at >= stale_after,
+        )
+        # Mensagem anterior ainda no backoff: as novas esperam por ela
+        backing_off = exists().where(
+            waiting.tenant_id == queue.tenant_id,
+            waiting.phone == queue.phone,
+            waiting.status.in_([STATUS_PENDING, STATUS_FAILED]),
+            waiting.next_attempt_at > now,
+            waiting.attempts < waiting.max_attempts,
+        )
+        candidates = (
+            db.query(queue.tenant_id, queue.phone)
+            .filter(ready, ~in_flight, ~backing_off)
+            .group_by(queue.tenant_id, queue.phone)
+            .having(func.max(queue.created_at) <= now - self.debounce)
+            .order_by(func.min(queue.received_at))
+            .limit(self.claim_limit)
+            .all()
+        )
+        if not candidates:
+            return []
+
+        conversations: list[_Conversation] = []
+        for tenant_id, phone in candidates:
+            rows = (
+                db.query(queue)
+                .filter(queue.tenant_id == tenant_id, queue.phone == phone, ready)
+                .order_by(queue.received_at.asc(), queue.id.asc())
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not rows:
+                continue
+            for row in rows:
+                row.status = STATUS_PROCESSING
+                row.started_at = now
+                row.attempts = int(row.attempts or 0) + 1
+                row.last_error = None
+            conversations.append(
+                _Conversation(tenant_id=tenant_id, phone=phone, messages=rows)
+            )
+
+        db.commit()
+        # As linhas seguem para as tasks desanexadas da sessão da reserva
+        db.expunge_all()
+        return conversations
+
+    # ------------------------------------------------------------------
+    # Processamento
+    # ------------------------------------------------------------------
+
+    async def _process_conversation(
+        self, conversation: _Conversation
+    ) -> tuple[int, int]:
+        handler = self.turn_handler
+        if handler is None:
+            from app.whatsapp.webhook import process_incoming_turn
+
+            handler = process_incoming_turn
+
+        turns = 0
+        runs = _merge_runs(conversation.messages, self.merge_window)
+        db = self.db_factory()
+        try:
+            for index, run in enumerate(runs):
+                try:
+                    await handler(
+                        tenant_id=conversation.tenant_id,
+                        phone=conversation.phone,
+                        messages=[(row.whatsapp_msg_id, row.conteudo) for row in run],
+                        db=db,
+                    )
+                except Exception as exc:
+                    logger.error(
+                        "[WA INBOUND] Falha no turno tenant=%s phone=%s: %s",
+                        conversation.tenant_id,
+                        conversation.phone,
+                        exc,
+                    )
+                    db.rollback()
+                    # O turno e os seguintes voltam para a fila, na mesma ordem
+                    pending = [row for later in runs[index:] for row in later]
+                    self._mark_failed(db, pending, exc)
+                    return turns, 1
+                self._mark_processed(db, run)
+                turns += 1
+        finally:
+            db.close()
+        return turns, 0
+
+    def _mark_processed(self, db: Session, rows: list[WhatsAppInboundMessage]) -> None:
+        db.execute(
+            update(WhatsAppInboundMessage)
+            .where(WhatsAppInboundMessage.id.in_([row.id for row in rows]))
+            .values(status=STATUS_PROCESSED, processed_at=_utcnow(), last_error=None)
+        )
+        db.commit()
+
+    def _mark_failed(
+        self, db: Session, rows: list[WhatsAppInboundMessage], exc: Exception
+    ) -> None:
+        now = _utcnow()
+        error = f"{type(exc).__name__}: {str(exc)[:900]}"
+        db.execute(
+            update(WhatsAppInboundMessage),
+            [
+                {
+                    "id": row.id,
+                    "status": (
+                        STATUS_DEAD
+                        if int(row.attempts or 0) >= int(row.max_attempts or 1)
+                        else STATUS_FAILED
+                    ),
+                    "next_attempt_at": now
+                    + timedelta(seconds=_backoff_seconds(int(row.attempts or 0))),
+                    "last_error": error,
+                }
+                for row in rows
+            ],
+        )
+        db.commit()
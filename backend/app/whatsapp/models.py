@@ -6,6 +6,7 @@ Models para integração WhatsApp + IA:
 - WhatsAppSession: Sessões de conversa
 - WhatsAppMessage: Histórico de mensagens
 - WhatsAppMetric: Métricas de uso
+- WhatsAppInboundMessage: Fila persistente de mensagens recebidas
 """
 
 from sqlalchemy import (
@@ -17,10 +18,13 @@ from sqlalchemy import (
     Integer,
     Float,
     ForeignKey,
+    Index,
     Time,
+    UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from datetime import datetime
 import uuid
 
@@ -180,3 +184,48 @@ class WhatsAppMetric(TenantScoped, Base):
 
     def __repr__(self):
         return f"<WhatsAppMetric(tenant_id={self.tenant_id}, type={self.metric_type}, value={self.value})>"
+
+
+class WhatsAppInboundMessage(Base):
+    """
+    Fila persistente de mensagens recebidas pelo webhook.
+
+    O webhook só grava aqui (idempotente por tenant + whatsapp_msg_id) e
+    responde; o worker (app.whatsapp.inbound_queue) faz o claim cross-tenant
+    fora da request, por isso a tabela não usa TenantScoped.
+    status: pending → processing → processed | failed | dead
+    """
+
+    __tablename__ = "whatsapp_inbound_queue"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "whatsapp_msg_id", name="uq_whatsapp_inbound_tenant_msg"
+        ),
+        Index("ix_whatsapp_inbound_status_next", "status", "next_attempt_at"),
+        Index("ix_whatsapp_inbound_conversation", "tenant_id", "phone", "status"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    phone = Column(String(40), nullable=False)
+    whatsapp_msg_id = Column(String(255), nullable=False)
+    conteudo = Column(Text, nullable=False)
+    received_at = Column(DateTime(timezone=True), nullable=False)
+
+    status = Column(String(24), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    next_attempt_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<WhatsAppInboundMessage(id={self.id}, phone={self.phone}, status={self.status})>"
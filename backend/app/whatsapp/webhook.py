@@ -2,22 +2,24 @@
 WhatsApp Webhook Receiver (360dialog)
 
 Recebe mensagens do 360dialog via webhook.
-Valida assinatura, identifica tenant, enfileira processamento.
+Valida assinatura, identifica tenant e grava as mensagens na fila persistente
+(whatsapp_inbound_queue); o worker de app.whatsapp.inbound_queue processa.
 
 Endpoints:
 - POST /webhook/whatsapp/{tenant_id} - Recebe mensagens
 - GET /webhook/whatsapp/{tenant_id} - Validação inicial (Meta)
 """
 
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks, Depends, Query
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from sqlalchemy.orm import Session
 import hashlib
 import hmac
 import logging
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, Sequence, Tuple
+from datetime import datetime, timezone
 
 from app.db import get_session as get_db
+from app.whatsapp.inbound_queue import enqueue_inbound_messages
 from app.whatsapp.models import TenantWhatsAppConfig, WhatsAppSession, WhatsAppMessage
 from app.whatsapp.tenant_context import whatsapp_tenant_context
 from app.models import Cliente
@@ -104,7 +106,6 @@ async def webhook_verification(
 async def receive_webhook(
     tenant_id: str,
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """
@@ -113,9 +114,8 @@ async def receive_webhook(
     Fluxo:
     1. Valida assinatura (segurança)
     2. Parseia payload
-    3. Identifica cliente
-    4. Enfileira processamento em background
-    5. Retorna 200 OK imediatamente
+    3. Grava as mensagens na fila persistente (idempotente por whatsapp_msg_id)
+    4. Retorna 200 OK imediatamente
     """
     # 1. Buscar config do tenant
     with whatsapp_tenant_context(tenant_id):
@@ -153,7 +153,6 @@ async def receive_webhook(
         processed_count = await process_webhook_payload(
             tenant_id=tenant_id,
             payload=payload,
-            background_tasks=background_tasks,
             db=db,
         )
 
@@ -176,11 +175,13 @@ async def receive_webhook(
 async def process_webhook_payload(
     tenant_id: str,
     payload: Dict[str, Any],
-    background_tasks: BackgroundTasks,
     db: Session,
 ) -> int:
     """
-    Processa payload do 360dialog.
+    Extrai as mensagens de texto do payload do 360dialog e grava na fila.
+
+    Retorna quantas mensagens válidas vieram no payload (reentregas do mesmo
+    whatsapp_msg_id são ignoradas pela fila).
 
     Estrutura 360dialog:
     {
@@ -206,7 +207,7 @@ async def process_webhook_payload(
         }]
     }
     """
-    processed = 0
+    inbound = []
 
     # Iterar entries
     for entry in payload.get("entry", []):
@@ -233,23 +234,23 @@ async def process_webhook_payload(
                         logger.warning("Mensagem sem phone ou conteúdo")
                         continue
 
-                    # Enfileirar processamento
-                    background_tasks.add_task(
-                        process_incoming_message,
-                        tenant_id=tenant_id,
-                        phone=phone,
-                        message_content=text_content,
-                        whatsapp_msg_id=whatsapp_msg_id,
-                        db=db,
+                    inbound.append(
+                        {
+                            "phone": normalize_phone(phone),
+                            "whatsapp_msg_id": whatsapp_msg_id,
+                            "conteudo": text_content,
+                            "received_at": _message_timestamp(msg),
+                        }
                     )
 
-                    processed += 1
-
                 except Exception as e:
                     logger.error(f"Erro ao processar mensagem individual: {e}")
                     continue
 
-    return processed
+    if inbound:
+        enqueue_inbound_messages(db, tenant_id=tenant_id, messages=inbound)
+
+    return len(inbound)
 
 
 # ============================================================================
@@ -261,17 +262,46 @@ async def process_incoming_message(
     tenant_id: str, phone: str, message_content: str, whatsapp_msg_id: str, db: Session
 ):
     """
-    Processa mensagem individual (roda em background).
+    Processa uma mensagem individual (um turno com uma só mensagem).
+
+    Sem fila para tentar de novo: erro do processor não bloqueia o chamador.
+    """
+    return await process_incoming_turn(
+        tenant_id=tenant_id,
+        phone=phone,
+        messages=[(whatsapp_msg_id, message_content)],
+        db=db,
+        raise_processor_errors=False,
+    )
+
+
+async def process_incoming_turn(
+    tenant_id: str,
+    phone: str,
+    messages: Sequence[Tuple[str, str]],
+    db: Session,
+    raise_processor_errors: bool = True,
+):
+    """
+    Processa um turno da conversa: uma ou mais mensagens seguidas do cliente.
 
     Fluxo:
     1. Normalizar telefone
     2. Buscar/criar sessão
-    3. Salvar mensagem recebida
-    4. [PRÓXIMO SPRINT] Processar com IA
-    5. [PRÓXIMO SPRINT] Enviar resposta
+    3. Salvar cada mensagem recebida (as já salvas por uma tentativa
+       anterior, mesmo whatsapp_message_id, são puladas)
+    4. Processar com IA uma única vez, com o texto das mensagens unido
+
+    Erro do MessageProcessor sobe para a fila de entrada, que tenta o turno de
+    novo com backoff; antes disso as mensagens salvas neste turno são apagadas,
+    para a nova tentativa salvá-las e processá-las de novo em vez de pulá-las.
+    Com ``raise_processor_errors=False`` o erro só é registrado e as mensagens
+    ficam salvas.
     """
     try:
-        logger.info(f"📨 Processando mensagem: tenant={tenant_id}, phone={phone}")
+        logger.info(
+            f"📨 Processando {len(messages)} mensagem(ns): tenant={tenant_id}, phone={phone}"
+        )
 
         # 1. Normalizar telefone (remover caracteres especiais)
         phone_normalized = normalize_phone(phone)
@@ -281,25 +311,50 @@ async def process_incoming_message(
             db=db, tenant_id=tenant_id, phone=phone_normalized
         )
 
-        # 3. Salvar mensagem recebida
-        message = WhatsAppMessage(
-            session_id=session.id,
-            tenant_id=tenant_id,
-            tipo="recebida",
-            conteudo=message_content,
-            whatsapp_message_id=whatsapp_msg_id,
-            created_at=datetime.utcnow(),
-        )
+        # 3. Salvar mensagens recebidas
+        with whatsapp_tenant_context(tenant_id):
+            wamids = [wamid for wamid, _content in messages if wamid]
+            already_saved = set()
+            if wamids:
+                already_saved = {
+                    row[0]
+                    for row in db.query(WhatsAppMessage.whatsapp_message_id).filter(
+                        WhatsAppMessage.tenant_id == tenant_id,
+                        WhatsAppMessage.whatsapp_message_id.in_(wamids),
+                    )
+                }
 
-        db.add(message)
+            message = None
+            new_contents = []
+            saved = []
+            for whatsapp_msg_id, message_content in messages:
+                if whatsapp_msg_id and whatsapp_msg_id in already_saved:
+                    continue
+                message = WhatsAppMessage(
+                    session_id=session.id,
+                    tenant_id=tenant_id,
+                    tipo="recebida",
+                    conteudo=message_content,
+                    whatsapp_message_id=whatsapp_msg_id,
+                    created_at=datetime.utcnow(),
+                )
+                db.add(message)
+                new_contents.append(message_content)
+                saved.append(message)
 
-        # Atualizar sessão
-        session.message_count += 1
-        session.last_message_at = datetime.utcnow()
+            if message is None:
+                logger.info("Mensagens já registradas; turno ignorado")
+                return None
 
-        db.commit()
+            # Atualizar sessão
+            session.message_count = (session.message_count or 0) + len(new_contents)
+            session.last_message_at = datetime.utcnow()
 
-        logger.info(f"✅ Mensagem salva: session={session.id}")
+            db.commit()
+            session_id, message_id = session.id, message.id
+            saved_ids = [saved_message.id for saved_message in saved]
+
+        logger.info(f"✅ Mensagem salva: session={session_id}")
 
         # 4. Processar com IA
         try:
@@ -308,16 +363,22 @@ async def process_incoming_message(
             with whatsapp_tenant_context(tenant_id):
                 processor = MessageProcessor(db=db, tenant_id=tenant_id)
                 result = await processor.process_message(
-                    session_id=session.id,
-                    message_id=message.id,
-                    message_content=message_content,
+                    session_id=session_id,
+                    message_id=message_id,
+                    message_content="\n".join(new_contents),
                 )
 
             logger.info(f"✅ Processamento concluído: {result.get('action')}")
+            return result
 
         except Exception as proc_error:
-            logger.error(f"Erro no processor (não-bloqueante): {proc_error}")
-            # Não falha se processor der erro
+            if not raise_processor_errors:
+                logger.error(f"Erro no processor (não-bloqueante): {proc_error}")
+                return None
+            logger.error(f"Erro no processor: {proc_error}")
+            db.rollback()
+            _discard_turn_messages(db, tenant_id, session_id, saved_ids)
+            raise
 
     except Exception as e:
         logger.error(f"❌ Erro ao processar mensagem: {e}")
@@ -330,6 +391,33 @@ async def process_incoming_message(
 # ============================================================================
 
 
+def _discard_turn_messages(
+    db: Session, tenant_id: str, session_id: str, message_ids: Sequence[str]
+) -> None:
+    """Desfaz o registro de um turno que o processor não concluiu."""
+    with whatsapp_tenant_context(tenant_id):
+        removed = (
+            db.query(WhatsAppMessage)
+            .filter(
+                WhatsAppMessage.tenant_id == tenant_id,
+                WhatsAppMessage.id.in_(message_ids),
+            )
+            .delete(synchronize_session=False)
+        )
+        session = db.query(WhatsAppSession).get(session_id)
+        if session is not None:
+            session.message_count = max((session.message_count or 0) - removed, 0)
+        db.commit()
+
+
+def _message_timestamp(msg: Dict[str, Any]) -> datetime:
+    """Horário de envio informado pelo WhatsApp (epoch em segundos)."""
+    try:
+        return datetime.fromtimestamp(int(msg.get("timestamp")), tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError):
+        return datetime.now(timezone.utc)
+
+
 def normalize_phone(phone: str) -> str:
     """
     Normaliza identificador de telefone/chat do WhatsApp.
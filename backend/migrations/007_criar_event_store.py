@@ -28,7 +28,7 @@ def upgrade(db_path: str = "petshop.db"):
     Cria tabela domain_events com campos necessários para event sourcing.
 
     CARACTERÍSTICAS:
-    - AUTOINCREMENT garante sequence_number monotônico
+    - Contador domain_event_sequences garante sequence_number monotônico
     - Índices para queries de replay eficientes
     - Imutabilidade (apenas INSERT, nunca UPDATE/DELETE)
     """
@@ -95,9 +95,22 @@ def upgrade(db_path: str = "petshop.db"):
             """)
             logger.info(f"✅ Índice {index_name} criado")
 
-        # 3. Criar sequence para sequence_number (SQLite usa AUTOINCREMENT)
-        # Nota: Em SQLite, AUTOINCREMENT garante monotonia mesmo com DELETEs
-        # Em PostgreSQL, usaríamos uma SEQUENCE separada
+        # 3. Contador do sequence_number (EventStore._alocar_sequencia)
+        # Uma linha travada por append/append_batch: sem MAX() por evento e
+        # sem gaps em rollback (uma SEQUENCE deixaria buracos).
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS domain_event_sequences (
+                name VARCHAR(50) PRIMARY KEY NOT NULL,
+                last_value BIGINT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO domain_event_sequences (name, last_value)
+            SELECT 'domain_events', COALESCE(MAX(sequence_number), 0)
+            FROM domain_events WHERE true
+            ON CONFLICT (name) DO NOTHING
+        """)
+        logger.info("✅ Contador domain_event_sequences criado")
 
         conn.commit()
         logger.info("✅ Migration Event Store Enhanced concluída com sucesso!")
@@ -130,6 +143,7 @@ def downgrade(db_path: str = "petshop.db"):
     try:
         logger.warning("⚠️  DOWNGRADE: Removendo tabela domain_events")
 
+        cursor.execute("DROP TABLE IF EXISTS domain_event_sequences")
         cursor.execute("DROP TABLE IF EXISTS domain_events")
 
         conn.commit()
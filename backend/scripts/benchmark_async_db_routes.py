@@ -0,0 +1,174 @@
+"""Teste de carga: rota async def com sessao sincrona x sessao assincrona.
+
+Uso:
+    python scripts/benchmark_async_db_routes.py --concurrency 8 --rounds 5
+
+Dispara consultas lentas (estilo dashboard) em paralelo enquanto uma sonda
+faz requests rapidas (``/ping``) a cada 10ms e mede a latencia delas. Com a sessao sincrona dentro de um
+``async def`` cada consulta trava o event loop e as demais requests esperam;
+com ``get_async_session`` + ``run_sync`` o loop segue atendendo.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.async_core import AsyncSessionLocal
+
+PROBE_INTERVAL = 0.01
+
+# Consulta CPU-bound no SQLite, simulando um agregado pesado de dashboard.
+SLOW_SQL = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+    "SELECT count(*) FROM c"
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Latencia de requests concorrentes com sessao sincrona x async."
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=300_000,
+        help="Tamanho da CTE recursiva (duracao da consulta lenta).",
+    )
+    return parser.parse_args()
+
+
+def build_apps(database_path: str, rows: int) -> dict[str, FastAPI]:
+    sync_engine = create_engine(
+        f"sqlite:///{database_path}", connect_args={"check_same_thread": False}
+    )
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    SyncSessionLocal = sessionmaker(bind=sync_engine)
+
+    def get_sync_db():
+        db = SyncSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal(bind=async_engine) as db:
+            yield db
+
+    def _consulta_lenta(db: Session) -> int:
+        return db.execute(SLOW_SQL, {"n": rows}).scalar()
+
+    antes = FastAPI()
+
+    @antes.get("/dashboard")
+    async def dashboard_sync(db: Session = Depends(get_sync_db)):
+        return {"total": _consulta_lenta(db)}
+
+    depois = FastAPI()
+
+    @depois.get("/dashboard")
+    async def dashboard_async(db: AsyncSession = Depends(get_async_db)):
+        return {"total": await db.run_sync(_consulta_lenta)}
+
+    for app in (antes, depois):
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+    return {"antes (async def + Session)": antes, "depois (AsyncSession)": depois}
+
+
+async def _timed(client: httpx.AsyncClient, path: str, samples: list[float]) -> None:
+    started = time.perf_counter()
+    response = await client.get(path)
+    samples.append((time.perf_counter() - started) * 1000)
+    response.raise_for_status()
+
+
+async def _probe(
+    client: httpx.AsyncClient, stop: asyncio.Event, samples: list[float]
+) -> None:
+    """Pinga a cada PROBE_INTERVAL; mede a partir do horario agendado.
+
+    Medir a partir do horario agendado (e nao de quando a task conseguiu
+    rodar) expoe o tempo em que o event loop ficou travado.
+    """
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        response = await client.get("/ping")
+        samples.append((time.perf_counter() - scheduled) * 1000)
+        response.raise_for_status()
+        scheduled += PROBE_INTERVAL
+
+
+async def _run(app: FastAPI, concurrency: int, rounds: int) -> dict[str, float]:
+    transport = httpx.ASGITransport(app=app)
+    dashboard: list[float] = []
+    ping: list[float] = []
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, stop, ping))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(
+                *[_timed(client, "/dashboard", dashboard) for _ in range(concurrency)]
+            )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    ping_sorted = sorted(ping)
+    return {
+        "ping_p50": statistics.median(ping),
+        "ping_p99": ping_sorted[min(len(ping) - 1, int(len(ping) * 0.99))],
+        "dashboard_p50": statistics.median(dashboard),
+        "dashboard_rps": len(dashboard) / elapsed,
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        apps = build_apps(os.path.join(tmp, "bench.db"), args.rows)
+        print(
+            f"{'cenario':<30}{'ping p50':>10}{'ping p99':>10}"
+            f"{'dash p50':>10}{'dash/s':>8}  (ms)"
+        )
+        for name, app in apps.items():
+            result = asyncio.run(_run(app, args.concurrency, args.rounds))
+            print(
+                f"{name:<30}{result['ping_p50']:>10.1f}{result['ping_p99']:>10.1f}"
+                f"{result['dashboard_p50']:>10.1f}{result['dashboard_rps']:>8.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+"""Benchmark da sugestao de horarios da agenda de Banho & Tosa.
+
+Uso:
+    python scripts/benchmark_banho_tosa_agenda_slots.py
+    python scripts/benchmark_banho_tosa_agenda_slots.py --recursos 30 --agendamentos 400 --dias 14
+
+Monta em memoria ``--recursos`` recursos e ``--agendamentos`` agendamentos por
+dia (metade com timezone, como vem do banco) e compara, com os mesmos slots:
+
+- antes: para cada slot e recurso, varredura de todos os agendamentos do dia
+  normalizando as datas a cada comparacao;
+- depois: ``IndiceAgenda`` montado uma vez + duas buscas binarias por slot e
+  recurso (``_avaliar_recursos_no_slot``).
+
+Mede o dia unico (``sugerir_slots_agenda``) e a busca de varios dias, que no
+caminho antigo repetia a varredura dia a dia.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.banho_tosa_agenda_indice import IndiceAgenda
+from app.banho_tosa_agenda_slots import _avaliar_recursos_no_slot, _horarios_do_dia
+from app.banho_tosa_datetime import normalizar_data_operacional
+
+CONFIG = SimpleNamespace(
+    horario_inicio="08:00", horario_fim="18:00", intervalo_slot_minutos=15
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sugestao de slots da agenda.")
+    parser.add_argument("--recursos", type=int, default=30)
+    parser.add_argument("--agendamentos", type=int, default=400)
+    parser.add_argument("--dias", type=int, default=14)
+    parser.add_argument("--duracao", type=int, default=60)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    return parser.parse_args()
+
+
+def _dados(recursos: int, agendamentos: int, dias: int):
+    sorteio = random.Random(42)
+    lista_recursos = [
+        SimpleNamespace(
+            id=i + 1,
+            nome=f"Recurso {i + 1:02d}",
+            tipo=sorteio.choice(["banheira", "mesa_tosa", "secador", "box"]),
+            capacidade_simultanea=sorteio.choice([1, 1, 2, 4]),
+        )
+        for i in range(recursos)
+    ]
+    inicio = date(2026, 5, 4)
+    lista_agendamentos = []
+    for offset in range(dias):
+        dia = datetime.combine(inicio + timedelta(days=offset), datetime.min.time())
+        for _ in range(agendamentos):
+            ag_inicio = dia + timedelta(hours=8, minutes=15 * sorteio.randint(0, 36))
+            ag_fim = ag_inicio + timedelta(minutes=sorteio.choice([30, 60, 90, 120]))
+            if sorteio.random() < 0.5:
+                ag_inicio = ag_inicio.replace(tzinfo=timezone.utc)
+                ag_fim = ag_fim.replace(tzinfo=timezone.utc)
+            lista_agendamentos.append(
+                SimpleNamespace(
+                    recurso_id=sorteio.randint(1, recursos),
+                    data_hora_inicio=ag_inicio,
+                    data_hora_fim_prevista=ag_fim,
+                )
+            )
+    return inicio, lista_recursos, lista_agendamentos
+
+
+def _antes(recursos, agendamentos, dias_busca, duracao):
+    por_dia = {}
+    for agendamento in agendamentos:
+        dia = normalizar_data_operacional(agendamento.data_hora_inicio).date()
+        por_dia.setdefault(dia, []).append(agendamento)
+
+    total = 0
+    for dia in dias_busca:
+        do_dia = por_dia.get(dia, [])
+        for inicio, fim in _horarios_do_dia(CONFIG, dia, duracao):
+            for recurso in recursos:
+                ocupacao = 0
+                for agendamento in do_dia:
+                    if agendamento.recurso_id != recurso.id:
+                        continue
+                    ag_inicio = normalizar_data_operacional(
+                        agendamento.data_hora_inicio
+                    )
+                    ag_fim = (
+                        normalizar_data_operacional(agendamento.data_hora_fim_prevista)
+                        or ag_inicio
+                    )
+                    if ag_inicio < fim and ag_fim > inicio:
+                        ocupacao += 1
+                if ocupacao < max(int(recurso.capacidade_simultanea or 1), 1):
+                    total += 1
+    return total
+
+
+def _depois(recursos, agendamentos, dias_busca, duracao):
+    indice = IndiceAgenda(agendamentos)
+    total = 0
+    for dia in dias_busca:
+        for inicio, fim in _horarios_do_dia(CONFIG, dia, duracao):
+            total += len(_avaliar_recursos_no_slot(recursos, indice, inicio, fim))
+    return total
+
+
+def main() -> int:
+    args = parse_args()
+    inicio, recursos, agendamentos = _dados(args.recursos, args.agendamentos, args.dias)
+    cenarios = [
+        ("1 dia", [inicio]),
+        (f"{args.dias} dias", [inicio + timedelta(days=d) for d in range(args.dias)]),
+    ]
+    print(
+        f"{args.recursos} recursos x {args.agendamentos} agendamentos/dia, "
+        f"slots de {CONFIG.intervalo_slot_minutos} min, duracao {args.duracao} min"
+    )
+    print(f"{'cenario':<24}{'melhor (ms)':>12}{'slots livres':>14}")
+    for label, dias_busca in cenarios:
+        # Como a consulta ao banco: so os agendamentos do periodo buscado
+        do_periodo = [
+            item
+            for item in agendamentos
+            if normalizar_data_operacional(item.data_hora_inicio).date() in dias_busca
+        ]
+        for nome, funcao in (("antes", _antes), ("depois", _depois)):
+            tempos = []
+            for _ in range(args.repeticoes):
+                comeco = time.perf_counter()
+                livres = funcao(recursos, do_periodo, dias_busca, args.duracao)
+                tempos.append((time.perf_counter() - comeco) * 1000)
+            elapsed = min(tempos)
+            print(f"{f'{nome} {label}':<24}{elapsed:>12.1f}{livres:>14}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
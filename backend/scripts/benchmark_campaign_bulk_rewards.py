@@ -0,0 +1,198 @@
+"""Benchmark da campanha de inatividade: recompensa por cliente x em lote.
+
+Uso:
+    python scripts/benchmark_campaign_bulk_rewards.py --clientes 5000 20000
+
+Para cada tamanho, popula um tenant em SQLite com ``--clientes`` clientes
+inativos (ultima compra ha 90 dias, todos com e-mail) e mede:
+
+- antes: ``InactivityHandler._reward_customer`` por cliente (consulta de
+  idempotencia, cupom com flush e auditoria, execution e notificacoes);
+- depois: ``InactivityHandler.run`` (anti-join, cupons/executions/fila com
+  INSERT multi-linha e auditoria em lote).
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import BigInteger, create_engine, event, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+import app.caixa_models  # noqa: F401  (FKs de vendas)
+import app.models  # noqa: F401  (registra todos os mapeamentos)
+import app.produtos_models  # noqa: F401  (FKs de venda_itens)
+import app.whatsapp.security  # noqa: F401  (data_privacy_consents)
+from app.campaigns.handlers.inactivity import InactivityHandler
+from app.campaigns.models import CampaignTypeEnum
+from app.db import Base
+from app.models import Cliente, User
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+from app.vendas_models import Venda
+
+PARAMS = {"inactivity_days": 30, "coupon_type": "percent", "coupon_value": 10}
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(_type, _compiler, **_kw):
+    return "CHAR(36)"
+
+
+@compiles(BigInteger, "sqlite")
+def _compile_biginteger_for_sqlite(_type, _compiler, **_kw):
+    return "INTEGER"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Inatividade: recompensa por cliente x em lote."
+    )
+    parser.add_argument("--clientes", type=int, nargs="+", default=[5_000, 20_000])
+    return parser.parse_args()
+
+
+def build_engine(database_path: str):
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def seed(engine, tenant_id, clientes: int) -> None:
+    quando = datetime.now() - timedelta(days=90)
+    with Session(engine) as db:
+        loja = User(
+            email="loja@example.com",
+            nome="Loja",
+            tenant_id=tenant_id,
+            is_active=True,
+            hashed_password="hash",
+        )
+        db.add(loja)
+        db.commit()
+        loja_id = loja.id
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Cliente.__table__),
+            [
+                {
+                    "id": numero,
+                    "tenant_id": tenant_id,
+                    "user_id": loja_id,
+                    "nome": f"Cliente {numero}",
+                    "email": f"cliente{numero}@example.com",
+                    "ativo": True,
+                }
+                for numero in range(1, clientes + 1)
+            ],
+        )
+        conn.execute(
+            insert(Venda.__table__),
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "user_id": loja_id,
+                    "vendedor_id": loja_id,
+                    "cliente_id": numero,
+                    "numero_venda": str(numero),
+                    "subtotal": Decimal("50"),
+                    "total": Decimal("50"),
+                    "status": "finalizada",
+                    "data_venda": quando,
+                    "data_finalizacao": quando,
+                }
+                for numero in range(1, clientes + 1)
+            ],
+        )
+
+
+def _por_cliente(db, campaign, evento) -> None:
+    """Caminho antigo: uma recompensa completa por cliente."""
+    iso_year, iso_week, _ = date.today().isocalendar()
+    handler = InactivityHandler()
+    for cliente in db.query(Cliente.id, Cliente.nome, Cliente.email):
+        handler._reward_customer(
+            db=db,
+            campaign=campaign,
+            customer_id=cliente.id,
+            customer_name=cliente.nome,
+            customer_email=cliente.email,
+            reference_period=f"{iso_year}-W{iso_week:02d}",
+            params=PARAMS,
+            source_event_id=evento.id,
+            inactivity_days=PARAMS["inactivity_days"],
+        )
+
+
+def _em_lote(db, campaign, evento) -> None:
+    InactivityHandler().run(db=db, campaign=campaign, event=evento)
+
+
+def _medir(clientes: int, executar) -> tuple[float, int]:
+    tenant_id = uuid4()
+    set_current_tenant(tenant_id)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(os.path.join(tmp, "bench.db"))
+            seed(engine, tenant_id, clientes)
+            campaign = SimpleNamespace(
+                id=1,
+                tenant_id=tenant_id,
+                name="Volte sempre",
+                campaign_type=CampaignTypeEnum.inactivity,
+                params=PARAMS,
+            )
+            evento = SimpleNamespace(id=None, event_type="weekly_inactivity_check")
+            statements = []
+            event_listener = lambda *_args, **_kw: statements.append(1)  # noqa: E731
+            with Session(engine) as db:
+                event.listen(engine, "before_cursor_execute", event_listener)
+                started = time.perf_counter()
+                executar(db, campaign, evento)
+                db.commit()
+                elapsed = time.perf_counter() - started
+            engine.dispose()
+    finally:
+        clear_current_tenant()
+    return elapsed, len(statements)
+
+
+def main() -> int:
+    args = parse_args()
+    print(f"{'cenario':<32}{'tempo (s)':>10}{'statements':>12}")
+    for clientes in args.clientes:
+        for label, executar in (
+            ("antes (por cliente)", _por_cliente),
+            ("depois (em lote)", _em_lote),
+        ):
+            elapsed, statements = _medir(clientes, executar)
+            print(f"{f'{label} {clientes}':<32}{elapsed:>10.2f}{statements:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
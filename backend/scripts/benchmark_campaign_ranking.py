@@ -0,0 +1,298 @@
+"""Benchmark do recalculo mensal de ranking: por cliente x em lote.
+
+Uso:
+    python scripts/benchmark_campaign_ranking.py --clientes 10000 50000
+
+Para cada tamanho, popula um tenant em SQLite com ``--clientes`` clientes
+(3 vendas no mes anterior cada, ~1/3 com historico do mes retrasado) e mede:
+
+- antes: uma consulta de nivel anterior + um INSERT ON CONFLICT por cliente
+  e push/e-mail enfileirados um a um;
+- depois: ``RankingHandler.run`` (nivel anterior em uma consulta, INSERT
+  multi-linha em blocos e notificacoes em lote).
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import BigInteger, create_engine, event, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+import app.caixa_models  # noqa: F401  (FKs de vendas)
+import app.models  # noqa: F401  (registra todos os mapeamentos)
+import app.produtos_models  # noqa: F401  (FKs de venda_itens)
+import app.whatsapp.security  # noqa: F401  (data_privacy_consents)
+from app.campaigns.app_push import enqueue_campaign_push
+from app.campaigns.handlers.ranking import _RANK_ORDER, RankingHandler
+from app.campaigns.models import CampaignTypeEnum, CustomerRankHistory, RankLevelEnum
+from app.campaigns.notification_service import enqueue_email
+from app.db import Base
+from app.models import Cliente, User
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+from app.vendas_models import Venda
+
+# 3 compras no mes: ~90% sobem para silver/gold
+PARAMS = {
+    "silver_min_purchases": 3,
+    "silver_min_months": 1,
+    "gold_min_purchases": 3,
+    "gold_min_months": 1,
+}
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(_type, _compiler, **_kw):
+    return "CHAR(36)"
+
+
+@compiles(BigInteger, "sqlite")
+def _compile_biginteger_for_sqlite(_type, _compiler, **_kw):
+    return "INTEGER"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Ranking mensal: por cliente x em lote."
+    )
+    parser.add_argument("--clientes", type=int, nargs="+", default=[10_000, 50_000])
+    return parser.parse_args()
+
+
+def build_engine(database_path: str):
+    engine = create_engine(f"sqlite:///{database_path}")
+
+    @event.listens_for(engine, "connect")
+    def _date_trunc(dbapi_connection, _record):
+        dbapi_connection.create_function(
+            "date_trunc", 2, lambda _unit, value: value[:7] if value else None
+        )
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def _periodos():
+    now = datetime.now(timezone.utc)
+    inicio_mes = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    mes_passado = inicio_mes - timedelta(days=1)
+    retrasado = mes_passado.replace(day=1) - timedelta(days=1)
+    return mes_passado.replace(tzinfo=None), retrasado.strftime("%Y-%m")
+
+
+def seed(engine, tenant_id, clientes: int) -> None:
+    quando, periodo_anterior = _periodos()
+    with Session(engine) as db:
+        loja = User(
+            email="loja@example.com",
+            nome="Loja",
+            tenant_id=tenant_id,
+            is_active=True,
+            hashed_password="hash",
+        )
+        db.add(loja)
+        db.commit()
+        loja_id = loja.id
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Cliente.__table__),
+            [
+                {
+                    "id": numero,
+                    "tenant_id": tenant_id,
+                    "user_id": loja_id,
+                    "nome": f"Cliente {numero}",
+                    "email": f"cliente{numero}@example.com",
+                    "ativo": True,
+                }
+                for numero in range(1, clientes + 1)
+            ],
+        )
+        vendas = [
+            {
+                "tenant_id": tenant_id,
+                "user_id": loja_id,
+                "vendedor_id": loja_id,
+                "cliente_id": numero,
+                "numero_venda": f"{numero}-{compra}",
+                "subtotal": Decimal(40 * (numero % 30 + 1)),
+                "total": Decimal(40 * (numero % 30 + 1)),
+                "status": "finalizada",
+                "data_venda": quando,
+                "data_finalizacao": quando,
+            }
+            for numero in range(1, clientes + 1)
+            for compra in range(3)
+        ]
+        for start in range(0, len(vendas), 10_000):
+            conn.execute(insert(Venda.__table__), vendas[start : start + 10_000])
+        conn.execute(
+            insert(CustomerRankHistory.__table__),
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "customer_id": numero,
+                    "period": periodo_anterior,
+                    "rank_level": RankLevelEnum.silver,
+                }
+                for numero in range(1, clientes + 1, 3)
+            ],
+        )
+
+
+class _RankingPorCliente(RankingHandler):
+    """Caminho antigo: consulta + INSERT + notificacoes por cliente."""
+
+    def run(self, db, campaign, event):
+        from sqlalchemy import distinct, func
+
+        now = datetime.now(timezone.utc)
+        first_day = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        period = (first_day - timedelta(days=1)).strftime("%Y-%m")
+        agg = (
+            db.query(
+                Venda.cliente_id,
+                func.sum(Venda.total).label("total_spent"),
+                func.count(Venda.id).label("total_purchases"),
+                func.count(
+                    distinct(func.date_trunc("month", Venda.data_finalizacao))
+                ).label("active_months"),
+            )
+            .join(User, User.id == Venda.user_id)
+            .filter(
+                User.tenant_id == campaign.tenant_id,
+                Venda.status == "finalizada",
+                Venda.cliente_id.isnot(None),
+                Venda.data_finalizacao >= first_day - timedelta(days=365),
+                Venda.data_finalizacao < first_day,
+            )
+            .group_by(Venda.cliente_id)
+            .all()
+        )
+        for row in agg:
+            total_spent = Decimal(str(row.total_spent or 0))
+            new_rank = self._calculate_rank(
+                params=campaign.params,
+                total_spent=total_spent,
+                total_purchases=row.total_purchases,
+                active_months=row.active_months,
+            )
+            prev_row = (
+                db.query(CustomerRankHistory)
+                .filter(
+                    CustomerRankHistory.tenant_id == campaign.tenant_id,
+                    CustomerRankHistory.customer_id == row.cliente_id,
+                    CustomerRankHistory.period < period,
+                )
+                .order_by(CustomerRankHistory.period.desc())
+                .first()
+            )
+            prev_rank = prev_row.rank_level if prev_row else RankLevelEnum.bronze
+            db.execute(
+                sqlite_insert(CustomerRankHistory)
+                .values(
+                    tenant_id=campaign.tenant_id,
+                    customer_id=row.cliente_id,
+                    period=period,
+                    rank_level=new_rank,
+                    total_spent=total_spent,
+                    total_purchases=row.total_purchases,
+                    active_months=row.active_months,
+                )
+                .on_conflict_do_nothing()
+            )
+            if _RANK_ORDER.index(new_rank) > _RANK_ORDER.index(prev_rank):
+                cliente = db.query(Cliente).filter(Cliente.id == row.cliente_id).first()
+                key = f"rank_upgrade:{campaign.id}:{row.cliente_id}:{period}"
+                enqueue_campaign_push(
+                    db,
+                    tenant_id=campaign.tenant_id,
+                    customer_id=row.cliente_id,
+                    title="Voce subiu de nivel",
+                    body=f"Ola, {cliente.nome}!",
+                    idempotency_key=f"{key}:push",
+                    kind="ranking_upgrade",
+                    campaign=campaign,
+                )
+                enqueue_email(
+                    db,
+                    tenant_id=campaign.tenant_id,
+                    customer_id=row.cliente_id,
+                    subject="Upgrade",
+                    body=f"Ola, {cliente.nome}!",
+                    email_address=cliente.email,
+                    idempotency_key=f"{key}:email",
+                )
+        return {"evaluated": len(agg)}
+
+
+def _medir(clientes: int, handler: RankingHandler) -> tuple[float, int]:
+    tenant_id = uuid4()
+    set_current_tenant(tenant_id)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(os.path.join(tmp, "bench.db"))
+            seed(engine, tenant_id, clientes)
+            campaign = SimpleNamespace(
+                id=1,
+                tenant_id=tenant_id,
+                name="Ranking",
+                campaign_type=CampaignTypeEnum.ranking_monthly,
+                params=PARAMS,
+            )
+            evento = SimpleNamespace(event_type="monthly_ranking_recalc")
+            statements = []
+            event_listener = lambda *_args, **_kw: statements.append(1)  # noqa: E731
+            with Session(engine) as db:
+                event.listen(engine, "before_cursor_execute", event_listener)
+                started = time.perf_counter()
+                handler.run(db=db, campaign=campaign, event=evento)
+                db.commit()
+                elapsed = time.perf_counter() - started
+            engine.dispose()
+    finally:
+        clear_current_tenant()
+    return elapsed, len(statements)
+
+
+def main() -> int:
+    args = parse_args()
+    print(f"{'cenario':<32}{'tempo (s)':>10}{'statements':>12}")
+    for clientes in args.clientes:
+        for label, handler in (
+            ("antes (por cliente)", _RankingPorCliente()),
+            ("depois (em lote)", RankingHandler()),
+        ):
+            elapsed, statements = _medir(clientes, handler)
+            print(f"{f'{label} {clientes}':<32}{elapsed:>10.2f}{statements:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
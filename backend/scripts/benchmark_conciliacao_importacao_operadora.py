@@ -0,0 +1,226 @@
+"""Benchmark da importacao do arquivo da operadora: por linha x em lote.
+
+Uso:
+    python scripts/benchmark_conciliacao_importacao_operadora.py --linhas 5000 10000
+    python scripts/benchmark_conciliacao_importacao_operadora.py --linhas 50000 --somente-lote
+
+Para cada tamanho, popula um tenant em SQLite com ``--linhas`` contas a
+receber (NSU unico, adquirente Stone) e processa um arquivo com o mesmo
+numero de linhas (metade dos NSUs existe no sistema, metade e orfa):
+
+- antes: ``validar_duplicata_nsu`` + busca da ContaReceber por linha e
+  atualizacao objeto a objeto pelo ORM;
+- depois: ``LoteOperadora`` + uma consulta de NSUs existentes, uma de contas
+  e ``aplicar_confirmacoes_operadora`` (UPDATE em lote).
+
+As duas etapas rodam para todas as linhas nos dois cenarios, para medir o
+custo de consulta e gravacao independentemente do resultado da validacao.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import BigInteger, create_engine, event, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+import app.caixa_models  # noqa: F401  (FKs de vendas)
+import app.models  # noqa: F401  (registra todos os mapeamentos)
+import app.produtos_compras_models  # noqa: F401  (FKs de contas_pagar)
+import app.produtos_models  # noqa: F401  (FKs de venda_itens)
+import app.vendas_models  # noqa: F401  (FKs de contas_receber)
+from app.conciliacao_helpers import validar_duplicata_nsu
+from app.conciliacao_importacao_lote import (
+    LoteOperadora,
+    aplicar_confirmacoes_operadora,
+    buscar_contas_por_nsu,
+    buscar_nsus_existentes,
+    montar_confirmacao_operadora,
+)
+from app.db import Base
+from app.financeiro_models import ContaReceber
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+
+ADQUIRENTE = "Stone"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(_type, _compiler, **_kw):
+    return "CHAR(36)"
+
+
+@compiles(BigInteger, "sqlite")
+def _compile_biginteger_for_sqlite(_type, _compiler, **_kw):
+    return "INTEGER"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Importacao do arquivo da operadora: por linha x em lote."
+    )
+    parser.add_argument("--linhas", type=int, nargs="+", default=[50_000])
+    parser.add_argument(
+        "--somente-lote",
+        action="store_true",
+        help="Mede so o caminho em lote (o por linha leva dezenas de minutos em 50k)",
+    )
+    return parser.parse_args()
+
+
+def build_engine(database_path: str):
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def seed(engine, tenant_id, linhas: int) -> list[dict]:
+    emissao = date(2026, 3, 1)
+    with engine.begin() as conn:
+        contas = [
+            {
+                "tenant_id": tenant_id,
+                "user_id": 1,
+                "descricao": f"Venda cartao {numero}",
+                "dre_subcategoria_id": 1,
+                "canal": "loja_fisica",
+                "valor_original": Decimal("100.00"),
+                "valor_final": Decimal("100.00"),
+                "data_emissao": emissao,
+                "data_vencimento": emissao + timedelta(days=30),
+                "nsu": f"NSU{numero:08d}",
+                "adquirente": ADQUIRENTE,
+                "taxa_mdr_estimada": Decimal("2.50"),
+                "valor_liquido_estimado": Decimal("97.50"),
+                "status_conciliacao": "nao_conciliado",
+            }
+            for numero in range(linhas)
+        ]
+        for inicio in range(0, len(contas), 10_000):
+            conn.execute(
+                insert(ContaReceber.__table__), contas[inicio : inicio + 10_000]
+            )
+
+    # Metade do arquivo casa com contas existentes, metade e orfa
+    return [
+        {
+            "nsu": f"NSU{numero * 2:08d}",
+            "data_pagamento": emissao + timedelta(days=30 + numero % 5),
+            "valor_liquido": Decimal("97.20"),
+            "taxa_mdr": Decimal("2.80"),
+        }
+        for numero in range(linhas)
+    ]
+
+
+def _por_linha(db: Session, tenant_id, linhas: list[dict]) -> int:
+    confirmadas = 0
+    for linha in linhas:
+        nsu = linha["nsu"]
+        validar_duplicata_nsu(db, nsu, ADQUIRENTE, tenant_id)
+        conta = (
+            db.query(ContaReceber)
+            .filter(
+                ContaReceber.tenant_id == tenant_id,
+                ContaReceber.nsu == nsu,
+                ContaReceber.adquirente == ADQUIRENTE,
+            )
+            .first()
+        )
+        if not conta:
+            continue
+        conta.taxa_mdr_real = linha["taxa_mdr"]
+        conta.taxa_antecipacao_real = linha.get("taxa_antecipacao", Decimal("0.00"))
+        conta.valor_liquido_real = linha["valor_liquido"]
+        conta.data_vencimento_real = linha["data_pagamento"]
+        if conta.taxa_mdr_estimada:
+            conta.diferenca_taxa = conta.taxa_mdr_real - conta.taxa_mdr_estimada
+        if conta.valor_liquido_estimado:
+            conta.diferenca_valor = (
+                conta.valor_liquido_real - conta.valor_liquido_estimado
+            )
+        conta.status_conciliacao = "confirmada_operadora"
+        confirmadas += 1
+    db.flush()
+    return confirmadas
+
+
+def _em_lote(db: Session, tenant_id, linhas: list[dict]) -> int:
+    lote = LoteOperadora.de_linhas(linhas)
+    buscar_nsus_existentes(db, lote.nsus, ADQUIRENTE, tenant_id)
+    contas = buscar_contas_por_nsu(db, lote.nsus, ADQUIRENTE, tenant_id)
+    confirmacoes = [
+        montar_confirmacao_operadora(
+            contas[nsu],
+            taxa_mdr=lote.taxas_mdr[posicao],
+            taxa_antecipacao=lote.taxas_antecipacao[posicao],
+            valor_liquido=lote.valores_liquidos[posicao],
+            data_pagamento=lote.datas_pagamento[posicao],
+        )
+        for posicao, nsu in enumerate(lote.nsus)
+        if nsu in contas
+    ]
+    return aplicar_confirmacoes_operadora(db, tenant_id, confirmacoes)
+
+
+def _medir(linhas: int, processar) -> tuple[float, int, int]:
+    tenant_id = uuid4()
+    set_current_tenant(tenant_id)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(os.path.join(tmp, "bench.db"))
+            arquivo = seed(engine, tenant_id, linhas)
+            statements = []
+            event_listener = lambda *_args, **_kw: statements.append(1)  # noqa: E731
+            with Session(engine) as db:
+                event.listen(engine, "before_cursor_execute", event_listener)
+                started = time.perf_counter()
+                confirmadas = processar(db, tenant_id, arquivo)
+                db.commit()
+                elapsed = time.perf_counter() - started
+            engine.dispose()
+    finally:
+        clear_current_tenant()
+    return elapsed, len(statements), confirmadas
+
+
+def main() -> int:
+    args = parse_args()
+    print(f"{'cenario':<32}{'tempo (s)':>10}{'statements':>12}{'confirmadas':>13}")
+    for linhas in args.linhas:
+        cenarios = [("antes (por linha)", _por_linha), ("depois (em lote)", _em_lote)]
+        if args.somente_lote:
+            cenarios = cenarios[1:]
+        for label, processar in cenarios:
+            elapsed, statements, confirmadas = _medir(linhas, processar)
+            print(
+                f"{f'{label} {linhas}':<32}{elapsed:>10.2f}"
+                f"{statements:>12}{confirmadas:>13}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,170 @@
+"""Benchmark da DRE anual por canal: calculo ao vivo x fatos diarios.
+
+Uso:
+    python scripts/benchmark_dre_canais_fatos.py --vendas-por-dia 40 --leituras 5
+
+Popula um ano de vendas (com fotografia de rentabilidade pronta) em SQLite e
+mede a DRE de janeiro ate o dia corrente:
+
+- ao vivo: carrega e soma todas as vendas do ano a cada request;
+- primeira leitura: materializa os dias encerrados;
+- leituras seguintes: soma os fatos e calcula so o dia corrente.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+import app.caixa_models  # noqa: F401  (FKs de vendas)
+import app.models  # noqa: F401  (registra todos os mapeamentos)
+from app.db import Base
+from app.dre_canais import fatos
+from app.dre_canais.agregacao import (
+    _aplicar_estimativas_cmv,
+    _calcular_vendas_por_canal,
+)
+from app.services.venda_rentabilidade_snapshot_service import SNAPSHOT_VERSION
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+from app.vendas_models import Venda
+
+CANAIS = ("loja_fisica", "ecommerce", "mercado_livre", "app")
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(_type, _compiler, **_kw):
+    return "CHAR(36)"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="DRE anual por canal: ao vivo x fatos diarios."
+    )
+    parser.add_argument("--vendas-por-dia", type=int, default=40)
+    parser.add_argument("--leituras", type=int, default=5)
+    return parser.parse_args()
+
+
+def build_engine(database_path: str):
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def seed(engine, tenant_id, inicio: datetime, dias: int, por_dia: int) -> int:
+    rng = random.Random(42)
+    rows = []
+    for offset in range(dias):
+        dia = inicio + timedelta(days=offset)
+        for numero in range(por_dia):
+            valor = round(rng.uniform(20, 400), 2)
+            rows.append(
+                {
+                    "tenant_id": tenant_id,
+                    "user_id": 1,
+                    "vendedor_id": 1,
+                    "numero_venda": f"{offset:03d}-{numero:04d}",
+                    "subtotal": valor,
+                    "total": valor,
+                    "status": "finalizada",
+                    "canal": CANAIS[numero % len(CANAIS)],
+                    "data_venda": dia + timedelta(minutes=10 * numero),
+                    "rentabilidade_snapshot": {
+                        "snapshot_version": SNAPSHOT_VERSION,
+                        "venda_bruta": valor,
+                        "custo_produtos": round(valor * 0.55, 2),
+                        "imposto": round(valor * 0.06, 2),
+                        "taxa_cartao": round(valor * 0.03, 2),
+                        "itens": [],
+                    },
+                }
+            )
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 5_000):
+            conn.execute(insert(Venda.__table__), rows[start : start + 5_000])
+    return len(rows)
+
+
+def _ao_vivo(db: Session, tenant_id, inicio, fim):
+    dados, bases, pendencias = _calcular_vendas_por_canal(db, tenant_id, inicio, fim)
+    _aplicar_estimativas_cmv(dados, bases, pendencias)
+    return dados
+
+
+def _medir(engine, func, leituras: int) -> list[float]:
+    samples = []
+    for _ in range(leituras):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            func(db)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    args = parse_args()
+    tenant_id = uuid4()
+    agora = datetime.now().replace(microsecond=0)
+    inicio = datetime(agora.year, 1, 1)
+    fim = datetime.combine(agora.date() + timedelta(days=1), datetime.min.time())
+    set_current_tenant(tenant_id)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(os.path.join(tmp, "bench.db"))
+            total = seed(
+                engine, tenant_id, inicio, (fim - inicio).days, args.vendas_por_dia
+            )
+            print(f"{total} vendas de {inicio.date()} a {agora.date()}")
+            print(f"{'cenario':<28}{'p50 (ms)':>10}{'max (ms)':>10}")
+
+            def _fatos(db):
+                return fatos.obter_vendas_por_canal_fatos(db, tenant_id, inicio, fim)
+
+            for label, func, leituras in (
+                (
+                    "ao vivo",
+                    lambda db: _ao_vivo(db, tenant_id, inicio, fim),
+                    args.leituras,
+                ),
+                ("fatos (materializando)", _fatos, 1),
+                ("fatos (leituras seguintes)", _fatos, args.leituras),
+            ):
+                samples = _medir(engine, func, leituras)
+                print(
+                    f"{label:<28}{statistics.median(samples):>10.1f}"
+                    f"{max(samples):>10.1f}"
+                )
+            engine.dispose()
+    finally:
+        clear_current_tenant()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+"""Benchmark do EventStore: MAX()+1 por evento x contador + INSERT multi-linha.
+
+Uso:
+    python scripts/benchmark_event_store_append.py --existentes 200000 --lotes 200
+
+Popula ``domain_events`` com ``--existentes`` eventos em SQLite e grava
+``--lotes`` lotes de ``--eventos-por-lote`` eventos (tamanho tipico de uma
+finalizacao de venda) em transacoes separadas:
+
+- antes: ``SELECT COALESCE(MAX(sequence_number), 0) + 1`` + INSERT por evento;
+- depois: ``EventStore.append_batch`` (um UPDATE no contador + um INSERT).
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.domain.events.base import DomainEvent
+from app.domain.events.event_store import EVENT_COLUMNS, EventStore
+
+DDL = """
+    CREATE TABLE domain_events (
+        id TEXT PRIMARY KEY NOT NULL,
+        sequence_number INTEGER NOT NULL UNIQUE,
+        event_type TEXT NOT NULL,
+        aggregate_id TEXT NOT NULL,
+        aggregate_type TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        correlation_id TEXT,
+        causation_id TEXT,
+        payload TEXT NOT NULL,
+        metadata TEXT,
+        created_at TEXT NOT NULL
+    )
+"""
+
+
+@dataclass(frozen=True, kw_only=True)
+class VendaFinalizadaBench(DomainEvent):
+    venda_id: int
+    total: float
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Append no EventStore: MAX()+1 x contador."
+    )
+    parser.add_argument("--existentes", type=int, default=200_000)
+    parser.add_argument("--lotes", type=int, default=200)
+    parser.add_argument("--eventos-por-lote", type=int, default=5)
+    return parser.parse_args()
+
+
+def build_engine(database_path: str, existentes: int):
+    engine = create_engine(f"sqlite:///{database_path}")
+    rows = [
+        {
+            "id": f"legado-{numero}",
+            "sequence_number": numero,
+            "event_type": "VendaFinalizada",
+            "aggregate_id": str(numero),
+            "aggregate_type": "venda",
+            "user_id": 1,
+            "correlation_id": None,
+            "causation_id": None,
+            "payload": "{}",
+            "metadata": None,
+            "created_at": "2026-01-01T00:00:00",
+        }
+        for numero in range(1, existentes + 1)
+    ]
+    insert_sql = text(
+        f"INSERT INTO domain_events ({', '.join(EVENT_COLUMNS)}) "
+        f"VALUES ({', '.join(':' + column for column in EVENT_COLUMNS)})"
+    )
+    with engine.begin() as conn:
+        conn.execute(text(DDL))
+        conn.execute(insert_sql, rows)
+    return engine
+
+
+def _append_max(db: Session, events, user_id: int, aggregate_type: str) -> None:
+    """Caminho antigo: MAX()+1 e um INSERT por evento."""
+    for event in events:
+        next_sequence = db.execute(
+            text("SELECT COALESCE(MAX(sequence_number), 0) + 1 FROM domain_events")
+        ).fetchone()[0]
+        db.execute(
+            text(
+                f"INSERT INTO domain_events ({', '.join(EVENT_COLUMNS)}) "
+                f"VALUES ({', '.join(':' + column for column in EVENT_COLUMNS)})"
+            ),
+            {
+                "id": event.event_id,
+                "sequence_number": next_sequence,
+                "event_type": event.event_type,
+                "aggregate_id": event.event_id,
+                "aggregate_type": aggregate_type,
+                "user_id": user_id,
+                "correlation_id": event.correlation_id,
+                "causation_id": event.causation_id,
+                "payload": json.dumps(event.to_dict(), default=str),
+                "metadata": None,
+                "created_at": event.timestamp.isoformat(),
+            },
+        )
+
+
+def _append_batch(db: Session, events, user_id: int, aggregate_type: str) -> None:
+    EventStore(db).append_batch(events, user_id=user_id, aggregate_type=aggregate_type)
+
+
+def _measure(engine, func, lotes: int, por_lote: int) -> list[float]:
+    samples = []
+    for lote in range(lotes):
+        events = [
+            VendaFinalizadaBench(venda_id=lote, total=float(numero))
+            for numero in range(por_lote)
+        ]
+        with Session(engine) as db:
+            started = time.perf_counter()
+            func(db, events, 1, "venda")
+            db.commit()
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    args = parse_args()
+    print(
+        f"{args.existentes} eventos existentes, {args.lotes} lotes de "
+        f"{args.eventos_por_lote}"
+    )
+    print(f"{'cenario':<28}{'p50 (ms)':>10}{'p99 (ms)':>10}{'lotes/s':>10}")
+    for label, func in (
+        ("antes (MAX()+1)", _append_max),
+        ("depois (append_batch)", _append_batch),
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(os.path.join(tmp, "bench.db"), args.existentes)
+            samples = _measure(engine, func, args.lotes, args.eventos_por_lote)
+            engine.dispose()
+        ordered = sorted(samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(
+            f"{label:<28}{statistics.median(samples):>10.2f}{p99:>10.2f}"
+            f"{len(samples) / (sum(samples) / 1000):>10.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+"""Backtest do previsor de fluxo de caixa (ABA 5): precisao e latencia.
+
+Uso:
+    python scripts/benchmark_fluxo_caixa_previsor.py
+    python scripts/benchmark_fluxo_caixa_previsor.py --historico 90 --cortes 8
+    python scripts/benchmark_fluxo_caixa_previsor.py --sem-prophet
+
+Gera series diarias sinteticas de entradas/saidas (semente fixa) com
+sazonalidade semanal, tendencia leve, ruido e picos esporadicos. Para cada
+serie, faz ``--cortes`` backtests com origem deslizante: treina com
+``--historico`` dias e projeta o saldo dos 15 dias seguintes.
+
+- antes: Prophet ajustado sobre o saldo acumulado a cada projecao (como o
+  ``projetar_fluxo_15_dias`` fazia na requisicao). So roda se o pacote
+  ``prophet`` estiver instalado; continua sendo a referencia offline.
+- depois: ``previsor.ajustar_parametros`` (grade vetorizada) e, no caminho da
+  requisicao, so ``atualizar_parametros`` com o dia novo + ``prever``.
+
+Mostra o erro medio absoluto do saldo (R$), a cobertura da faixa de 95% e a
+mediana do tempo de cada etapa.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.ia.aba5_fluxo_caixa_parts import previsor
+
+HORIZONTE = 15
+INICIO = date(2026, 1, 5)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backtest do previsor de caixa.")
+    parser.add_argument("--series", type=int, default=5)
+    parser.add_argument("--historico", type=int, default=90)
+    parser.add_argument("--cortes", type=int, default=6)
+    parser.add_argument("--sem-prophet", action="store_true")
+    return parser.parse_args()
+
+
+def _serie(semente: int, dias: int):
+    sorteio = np.random.default_rng(semente)
+    dias_semana = (np.arange(dias) + INICIO.weekday()) % 7
+    perfil = sorteio.uniform(0.5, 1.6, 7)
+    base = sorteio.uniform(800, 3000)
+    tendencia = 1 + np.arange(dias) * sorteio.uniform(-0.001, 0.003)
+    entradas = base * perfil[dias_semana] * tendencia
+    entradas *= sorteio.lognormal(0, 0.15, dias)
+    saidas = np.full(dias, base * 0.8) * sorteio.lognormal(0, 0.2, dias)
+    picos = sorteio.random(dias) < 0.04
+    saidas[picos] += base * sorteio.uniform(2, 5, picos.sum())
+    return entradas, saidas
+
+
+def _depois(entradas, saidas, corte, historico, tempos):
+    inicio_treino = INICIO + timedelta(days=corte - historico)
+    fatia = slice(corte - historico, corte - 1)
+
+    comeco = time.perf_counter()
+    parametros = previsor.ajustar_parametros(
+        entradas[fatia], saidas[fatia], inicio_treino
+    )
+    tempos["ajuste completo"].append((time.perf_counter() - comeco) * 1000)
+
+    # Requisicao: so o ultimo dia entra de forma incremental + previsao
+    comeco = time.perf_counter()
+    parametros = previsor.atualizar_parametros(
+        parametros, entradas[corte - 1 : corte], saidas[corte - 1 : corte]
+    )
+    resultado = previsor.prever(parametros, INICIO + timedelta(days=corte), HORIZONTE)
+    tempos["requisicao"].append((time.perf_counter() - comeco) * 1000)
+
+    saldo_atual = float(np.sum(entradas[:corte] - saidas[:corte]))
+    saldo = saldo_atual + resultado["liquido_acumulado"]
+    return saldo, saldo - resultado["desvio"], saldo + resultado["desvio"]
+
+
+def _antes(entradas, saidas, corte, historico, tempos):
+    import pandas as pd
+    from prophet import Prophet
+
+    saldo_anterior = float(
+        np.sum(entradas[: corte - historico] - saidas[: corte - historico])
+    )
+    acumulado = saldo_anterior + np.cumsum(
+        entradas[corte - historico : corte] - saidas[corte - historico : corte]
+    )
+    datas = pd.date_range(INICIO + timedelta(days=corte - historico), periods=historico)
+
+    comeco = time.perf_counter()
+    modelo = Prophet(
+        yearly_seasonality=False,
+        weekly_seasonality=True,
+        daily_seasonality=False,
+        interval_width=0.95,
+    )
+    modelo.fit(pd.DataFrame({"ds": datas, "y": acumulado}))
+    previsao = modelo.predict(modelo.make_future_dataframe(periods=HORIZONTE)).tail(
+        HORIZONTE
+    )
+    tempos["requisicao"].append((time.perf_counter() - comeco) * 1000)
+    return (
+        previsao["yhat"].to_numpy(),
+        previsao["yhat_lower"].to_numpy(),
+        previsao["yhat_upper"].to_numpy(),
+    )
+
+
+def main() -> int:
+    args = parse_args()
+    metodos = [("depois (NumPy)", _depois)]
+    if not args.sem_prophet:
+        try:
+            import prophet  # noqa: F401
+
+            logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+            logging.getLogger("prophet").setLevel(logging.WARNING)
+            metodos.insert(0, ("antes (Prophet)", _antes))
+        except ImportError:
+            print("prophet nao instalado: comparando so o previsor NumPy")
+
+    dias = args.historico + args.cortes * 7 + HORIZONTE
+    series = [_serie(semente, dias) for semente in range(args.series)]
+    cortes = [args.historico + 7 * i for i in range(args.cortes)]
+
+    print(
+        f"{args.series} series x {args.cortes} cortes, historico {args.historico} "
+        f"dias, horizonte {HORIZONTE} dias"
+    )
+    print(
+        f"{'metodo':<18}{'MAE saldo':>12}{'cobertura 95%':>15}"
+        f"{'requisicao ms':>15}{'ajuste ms':>11}"
+    )
+    for nome, funcao in metodos:
+        erros = []
+        dentro = []
+        tempos = {"requisicao": [], "ajuste completo": []}
+        for entradas, saidas in series:
+            for corte in cortes:
+                saldo, inferior, superior = funcao(
+                    entradas, saidas, corte, args.historico, tempos
+                )
+                real = float(np.sum(entradas[:corte] - saidas[:corte])) + np.cumsum(
+                    entradas[corte : corte + HORIZONTE]
+                    - saidas[corte : corte + HORIZONTE]
+                )
+                erros.append(np.abs(saldo - real).mean())
+                dentro.append(((real >= inferior) & (real <= superior)).mean())
+        ajuste = (
+            f"{statistics.median(tempos['ajuste completo']):>11.1f}"
+            if tempos["ajuste completo"]
+            else f"{'-':>11}"
+        )
+        print(
+            f"{nome:<18}{statistics.mean(erros):>12.0f}"
+            f"{statistics.mean(dentro):>15.0%}"
+            f"{statistics.median(tempos['requisicao']):>15.2f}{ajuste}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""Compara a pilha antiga de BaseHTTPMiddleware com o pipeline ASGI unico.
+
+Uso:
+    python scripts/benchmark_middleware_pipeline.py --requests 3000
+
+Mede latencia p50/p99 e requests por segundo de uma rota autenticada
+(``/vendas/``) atravessando apenas os middlewares globais.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx
+from fastapi import FastAPI
+
+from app.auth.core import ALGORITHM
+from app.config import JWT_SECRET_KEY
+from app.middlewares.rate_limit import RateLimitMiddleware, rate_limit_store
+from app.middlewares.request_context import RequestContextMiddleware
+from app.middlewares.request_logging import RequestLoggingMiddleware
+from app.middlewares.request_pipeline import RequestPipelineMiddleware
+from app.middlewares.security_audit import SecurityAuditMiddleware
+from app.middlewares.security_headers import SecurityHeadersMiddleware
+from app.middlewares.tenant_middleware import TenantSecurityMiddleware
+from app.security.jwt_compat import jwt
+from app.tenancy.context import TenantContextMiddleware
+from app.tenancy.middleware import TenancyMiddleware
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark dos middlewares HTTP globais (pilha antiga x pipeline)."
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=2000,
+        help="Quantidade de requests medidas por cenario.",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=200,
+        help="Requests de aquecimento descartadas antes da medicao.",
+    )
+    return parser.parse_args()
+
+
+def _route(app: FastAPI) -> FastAPI:
+    @app.get("/vendas/")
+    async def vendas():
+        return {"status": "ok"}
+
+    return app
+
+
+def build_legacy_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+    app.add_middleware(SecurityAuditMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(TenantContextMiddleware)
+    app.add_middleware(TenantSecurityMiddleware)
+    app.add_middleware(TenancyMiddleware)
+    return _route(app)
+
+
+def build_pipeline_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+    return _route(app)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run(app: FastAPI, total: int, warmup: int, token: str) -> dict:
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="https://testserver"
+    ) as client:
+        for _ in range(warmup):
+            rate_limit_store.clear()
+            await client.get("/vendas/", headers=headers)
+
+        samples: list[float] = []
+        started = time.perf_counter()
+        for _ in range(total):
+            # O benchmark mede o custo dos middlewares, nao o bloqueio 429.
+            rate_limit_store.clear()
+            t0 = time.perf_counter()
+            response = await client.get("/vendas/", headers=headers)
+            samples.append((time.perf_counter() - t0) * 1000)
+            response.raise_for_status()
+        elapsed = time.perf_counter() - started
+
+    return {
+        "p50_ms": statistics.median(samples),
+        "p99_ms": _percentile(samples, 99),
+        "rps": total / elapsed if elapsed else 0.0,
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    # Os logs por request sao parte do custo, mas nao devem poluir a saida.
+    logging.disable(logging.CRITICAL)
+    token = jwt.encode(
+        {"sub": "1", "tenant_id": str(uuid4()), "jti": str(uuid4())},
+        JWT_SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+    results = {
+        "legado (8 BaseHTTPMiddleware)": asyncio.run(
+            _run(build_legacy_app(), args.requests, args.warmup, token)
+        ),
+        "pipeline ASGI": asyncio.run(
+            _run(build_pipeline_app(), args.requests, args.warmup, token)
+        ),
+    }
+
+    print(f"{'cenario':<32}{'p50 (ms)':>10}{'p99 (ms)':>10}{'req/s':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<32}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+            f"{result['rps']:>10.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
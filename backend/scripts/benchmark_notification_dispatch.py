@@ -0,0 +1,212 @@
+"""Benchmark do despacho da fila de notificacoes: sequencial x concorrente.
+
+Uso:
+    python scripts/benchmark_notification_dispatch.py --emails 200 --pushes 400
+
+Popula ``notification_queue`` em SQLite e simula a latencia dos provedores
+(``--handshake-ms`` por conexao SMTP, ``--smtp-ms`` por e-mail e
+``--push-ms`` por requisicao a Expo). Mede:
+
+- antes: ``NotificationSender.process_batch`` (uma conexao SMTP e uma
+  requisicao HTTP por notificacao, em serie, com o lote travado);
+- depois: ``NotificationDispatcher.dispatch`` (reserva curta, pool de
+  workers com conexao SMTP reaproveitada e pushes agrupados por requisicao).
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import BigInteger, create_engine, insert
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+import app.caixa_models  # noqa: F401  (FKs de vendas)
+import app.models  # noqa: F401  (registra todos os mapeamentos)
+import app.produtos_models  # noqa: F401  (FKs de venda_itens)
+import app.vendas_models  # noqa: F401  (FKs de movimentacoes_caixa)
+from app.campaigns import notification_sender
+from app.campaigns.models import (
+    NotificationChannelEnum,
+    NotificationQueue,
+    NotificationStatusEnum,
+)
+from app.campaigns.notification_dispatcher import NotificationDispatcher
+from app.campaigns.notification_sender import NotificationSender
+from app.db import Base
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(_type, _compiler, **_kw):
+    return "CHAR(36)"
+
+
+@compiles(BigInteger, "sqlite")
+def _compile_biginteger_for_sqlite(_type, _compiler, **_kw):
+    return "INTEGER"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Fila de notificacoes: sequencial x concorrente."
+    )
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--pushes", type=int, default=400)
+    parser.add_argument("--handshake-ms", type=float, default=150.0)
+    parser.add_argument("--smtp-ms", type=float, default=20.0)
+    parser.add_argument("--push-ms", type=float, default=80.0)
+    parser.add_argument("--workers", type=int, default=8)
+    return parser.parse_args()
+
+
+class _SlowSmtp:
+    """SMTP em memoria com latencia de handshake e de envio."""
+
+    def __init__(self, handshake_s: float, send_s: float):
+        time.sleep(handshake_s)
+        self.send_s = send_s
+
+    def sendmail(self, *_args) -> None:
+        time.sleep(self.send_s)
+
+    def quit(self) -> None:
+        pass
+
+    close = quit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.quit()
+
+
+class _SlowHttp:
+    """requests.Session falso: uma latencia fixa por requisicao."""
+
+    def __init__(self, request_s: float):
+        self.request_s = request_s
+
+    def post(self, _url, json, **_kw):
+        time.sleep(self.request_s)
+        count = len(json) if isinstance(json, list) else 1
+        tickets = [{"status": "ok", "id": f"t-{n}"} for n in range(count)]
+        body = {"data": tickets if isinstance(json, list) else tickets[0]}
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: body)
+
+    def close(self) -> None:
+        pass
+
+
+def seed(engine, emails: int, pushes: int) -> None:
+    tenant_id = uuid4()
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "idempotency_key": f"inactivity:{n}:email",
+            "customer_id": n,
+            "channel": NotificationChannelEnum.email,
+            "subject": "Sentimos sua falta",
+            "body": "Temos um cupom para voce.",
+            "email_address": f"cliente{n}@example.com",
+            "push_token": None,
+            "status": NotificationStatusEnum.pending,
+        }
+        for n in range(emails)
+    ] + [
+        {
+            "tenant_id": tenant_id,
+            "idempotency_key": f"bday:{n}:push",
+            "customer_id": 10_000_000 + n,
+            "channel": NotificationChannelEnum.push,
+            "subject": "Feliz aniversario",
+            "body": "Seu cupom chegou.",
+            "email_address": None,
+            "push_token": f"ExponentPushToken[{n}]",
+            "status": NotificationStatusEnum.pending,
+        }
+        for n in range(pushes)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(NotificationQueue.__table__), rows)
+
+
+def _medir(args, executar) -> tuple[float, dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        seed(engine, args.emails, args.pushes)
+        session_factory = sessionmaker(bind=engine)
+        started = time.perf_counter()
+        stats = executar(session_factory, args.emails + args.pushes)
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+    return elapsed, stats
+
+
+def main() -> int:
+    args = parse_args()
+    handshake_s = args.handshake_ms / 1000
+    smtp_s = args.smtp_ms / 1000
+    push_s = args.push_ms / 1000
+
+    # Provedores simulados nos pontos de rede do sender
+    notification_sender._smtp_config_ok = lambda: True
+    notification_sender._open_smtp_connection = lambda: _SlowSmtp(handshake_s, smtp_s)
+    notification_sender.requests.post = _SlowHttp(push_s).post
+
+    def _sequencial(session_factory, total):
+        return NotificationSender(session_factory).process_batch(batch_size=total)
+
+    def _concorrente(session_factory, total):
+        dispatcher = NotificationDispatcher(
+            session_factory,
+            max_workers=args.workers,
+            smtp_factory=lambda: _SlowSmtp(handshake_s, smtp_s),
+            http_factory=lambda: _SlowHttp(push_s),
+        )
+        return dispatcher.dispatch(batch_size=total)
+
+    print(
+        f"{args.emails} e-mails, {args.pushes} pushes "
+        f"(handshake {args.handshake_ms:.0f} ms, smtp {args.smtp_ms:.0f} ms, "
+        f"push {args.push_ms:.0f} ms/requisicao)"
+    )
+    print(f"{'cenario':<28}{'tempo (s)':>10}{'enviadas':>10}{'msg/s':>10}")
+    for label, executar in (
+        ("antes (sequencial)", _sequencial),
+        (f"depois ({args.workers} workers)", _concorrente),
+    ):
+        elapsed, stats = _medir(args, executar)
+        print(
+            f"{label:<28}{elapsed:>10.2f}{stats['sent']:>10}"
+            f"{stats['sent'] / elapsed:>10.1f}"
+        )
+        for channel, metrics in stats.get("channels", {}).items():
+            print(f"  {channel:<26}{metrics['seconds']:>10.2f}{metrics['sent']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+"""Benchmark da busca de produtos do PDV por codigo de barras.
+
+Uso:
+    python scripts/benchmark_produto_search.py --skus 50000 --lookups 200
+
+Popula um tenant com ``--skus`` produtos em SQLite (com os indices de codigo
+equivalentes aos da migration zwu20261017a1) e compara, para EANs bipados:
+
+- busca fuzzy atual (ILIKE + colunas de digitos + ordenacao por relevancia);
+- atalho de codigo de barras (igualdade nos codigos indexados).
+
+Os indices trigram sao exclusivos do PostgreSQL; em SQLite a busca fuzzy
+varre a tabela, como acontece em producao sem eles.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401  (registra todos os mapeamentos)
+from app.produtos.listagem import (
+    _aplicar_busca_produtos,
+    _buscar_pagina_produtos_listagem,
+    _buscar_produtos_por_codigo_barras,
+    _montar_query_produtos_vendaveis,
+)
+from app.produtos.search import _termo_codigo_barras
+from app.db import Base
+from app.produtos_models import Categoria, Marca, Produto
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+
+# ux_produtos_tenant_codigo_lower ja vem do __table_args__ do modelo.
+SQLITE_INDEXES = (
+    "CREATE INDEX ix_produtos_tenant_codigo_barras "
+    "ON produtos (tenant_id, codigo_barras)",
+    "CREATE INDEX ix_produtos_tenant_gtin_ean ON produtos (tenant_id, gtin_ean)",
+    "CREATE INDEX ix_produtos_tenant_gtin_ean_tributario "
+    "ON produtos (tenant_id, gtin_ean_tributario)",
+    # Colunas de digitos da migration (STORED no PostgreSQL; o SQLite so aceita
+    # VIRTUAL em ALTER TABLE).
+    "ALTER TABLE produtos ADD COLUMN codigos_digitos TEXT GENERATED ALWAYS AS ("
+    "' ' || regexp_replace(coalesce(codigo, ''), '[^0-9]', '', 'g') "
+    "|| ' ' || regexp_replace(coalesce(codigo_barras, ''), '[^0-9]', '', 'g') "
+    "|| ' ' || regexp_replace(coalesce(gtin_ean, ''), '[^0-9]', '', 'g') "
+    "|| ' ' || regexp_replace(coalesce(gtin_ean_tributario, ''), '[^0-9]', '', 'g')"
+    ") VIRTUAL",
+    "ALTER TABLE produtos ADD COLUMN codigos_alternativos_digitos TEXT "
+    "GENERATED ALWAYS AS ("
+    "regexp_replace(coalesce(codigos_barras_alternativos, ''), '[^0-9]', '', 'g')"
+    ") VIRTUAL",
+)
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_for_sqlite(_type, _compiler, **_kw):
+    return "CHAR(36)"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Busca fuzzy x atalho de codigo de barras no PDV."
+    )
+    parser.add_argument("--skus", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    return parser.parse_args()
+
+
+def _regexp_replace(value, pattern, replacement, _flags=None):
+    return re.sub(pattern, replacement, value or "")
+
+
+def build_engine(database_path: str):
+    engine = create_engine(f"sqlite:///{database_path}")
+
+    @event.listens_for(engine, "connect")
+    def _register_functions(dbapi_connection, _record):
+        # Funcao do PostgreSQL usada pelas colunas de digitos.
+        dbapi_connection.create_function(
+            "regexp_replace", 4, _regexp_replace, deterministic=True
+        )
+
+    # joinedload de categoria/marca faz parte da consulta medida.
+    Base.metadata.create_all(
+        engine, tables=[Categoria.__table__, Marca.__table__, Produto.__table__]
+    )
+    with engine.begin() as conn:
+        for ddl in SQLITE_INDEXES:
+            conn.execute(text(ddl))
+    return engine
+
+
+def _ean13(numero: int) -> str:
+    base = f"789{numero:09d}"
+    soma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(base))
+    return base + str((10 - soma % 10) % 10)
+
+
+def seed(engine, tenant_id, skus: int) -> list[str]:
+    eans = [_ean13(numero) for numero in range(1, skus + 1)]
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "codigo": f"SKU-{numero:06d}",
+            "nome": f"Racao Premium Sabor {numero % 97} {numero}kg",
+            "tipo_produto": "SIMPLES",
+            "ativo": True,
+            "is_parent": False,
+            "is_sellable": True,
+            "user_id": 1,
+            "codigo_barras": ean if numero % 3 == 0 else None,
+            "gtin_ean": ean if numero % 3 == 1 else None,
+            "gtin_ean_tributario": ean if numero % 3 == 2 else None,
+        }
+        for numero, ean in enumerate(eans, start=1)
+    ]
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 5_000):
+            conn.execute(insert(Produto.__table__), rows[start : start + 5_000])
+        conn.execute(text("ANALYZE"))
+    return eans
+
+
+def _busca_fuzzy(db: Session, tenant_id, termo: str, page_size: int):
+    query = _montar_query_produtos_vendaveis(
+        db, tenant_id=tenant_id, termo_busca=None, contar_total=False
+    )
+    query = _aplicar_busca_produtos(query, termo_busca=termo, busca_completa=False)
+    produtos, _total, _options = _buscar_pagina_produtos_listagem(
+        query,
+        termo_busca=termo,
+        offset=0,
+        page_size=page_size,
+        incluir_imagens=False,
+        incluir_lotes=False,
+        contar_total=False,
+    )
+    return produtos
+
+
+def _busca_atalho(db: Session, tenant_id, termo: str, page_size: int):
+    query = _montar_query_produtos_vendaveis(
+        db, tenant_id=tenant_id, termo_busca=None, contar_total=False
+    )
+    return _buscar_produtos_por_codigo_barras(
+        query, _termo_codigo_barras(termo), limit=page_size
+    )
+
+
+def _measure(engine, func, tenant_id, termos, page_size) -> list[float]:
+    samples = []
+    with Session(engine) as db:
+        for termo in termos:
+            started = time.perf_counter()
+            produtos = func(db, tenant_id, termo, page_size)
+            samples.append((time.perf_counter() - started) * 1000)
+            if not produtos:
+                raise RuntimeError(f"EAN {termo} nao encontrado")
+            db.expunge_all()
+    return samples
+
+
+def main() -> int:
+    args = parse_args()
+    tenant_id = uuid4()
+    set_current_tenant(tenant_id)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_engine(os.path.join(tmp, "bench.db"))
+            eans = seed(engine, tenant_id, args.skus)
+            termos = random.Random(42).sample(eans, min(args.lookups, len(eans)))
+
+            print(f"{args.skus} SKUs, {len(termos)} EANs bipados")
+            print(f"{'cenario':<28}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+            for label, func in (
+                ("busca fuzzy", _busca_fuzzy),
+                ("atalho codigo de barras", _busca_atalho),
+            ):
+                samples = sorted(
+                    _measure(engine, func, tenant_id, termos, args.page_size)
+                )
+                p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+                print(f"{label:<28}{statistics.median(samples):>10.2f}{p99:>10.2f}")
+            engine.dispose()
+    finally:
+        clear_current_tenant()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""Benchmark de "comprados juntos": varredura de eventos x matriz de co-ocorrencia.
+
+Uso:
+    python scripts/benchmark_produtos_comprados_juntos.py --vendas 50000 --consultas 200
+
+Gera ``--vendas`` vendas sinteticas (2 a 6 itens, catalogo com cauda longa)
+e mede a consulta de sugestoes para um produto:
+
+- antes: varre todos os ProdutoVendidoEvent e conta pares por venda;
+- depois: ``MatrizCoocorrencia.vizinhos`` (top-k dos vizinhos do produto).
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.events import ProdutoVendidoEvent
+from app.read_models.coocorrencia import MatrizCoocorrencia
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Comprados juntos: varredura de eventos x matriz."
+    )
+    parser.add_argument("--vendas", type=int, default=50_000)
+    parser.add_argument("--produtos", type=int, default=3_000)
+    parser.add_argument("--consultas", type=int, default=200)
+    return parser.parse_args()
+
+
+def gerar_eventos(vendas: int, produtos: int) -> list[ProdutoVendidoEvent]:
+    rng = random.Random(42)
+    inicio = datetime.now() - timedelta(days=365)
+    eventos = []
+    for venda_id in range(1, vendas + 1):
+        quando = inicio + timedelta(minutes=venda_id * 10)
+        itens = {
+            int(rng.paretovariate(1.2)) % produtos for _ in range(rng.randint(2, 6))
+        }
+        for produto_id in itens:
+            preco = round(rng.uniform(5, 200), 2)
+            eventos.append(
+                ProdutoVendidoEvent(
+                    user_id=1,
+                    timestamp=quando,
+                    venda_id=venda_id,
+                    produto_id=produto_id,
+                    produto_nome=f"Produto {produto_id}",
+                    tipo_produto="SIMPLES",
+                    quantidade=1.0,
+                    preco_unitario=preco,
+                    preco_total=preco,
+                    estoque_anterior=10.0,
+                    estoque_novo=9.0,
+                )
+            )
+    return eventos
+
+
+def _varredura(eventos, produto_id: int, limit: int = 5):
+    """Caminho antigo: duas passadas sobre todos os eventos."""
+    eventos = [e for e in eventos if e.user_id == 1]
+    vendas_com_produto = {e.venda_id for e in eventos if e.produto_id == produto_id}
+    contagem = defaultdict(set)
+    for evento in eventos:
+        if evento.produto_id != produto_id and evento.venda_id in vendas_com_produto:
+            contagem[evento.produto_id].add(evento.venda_id)
+    ordenado = sorted(contagem.items(), key=lambda item: len(item[1]), reverse=True)
+    return ordenado[:limit]
+
+
+def _medir(func, produtos_consulta) -> list[float]:
+    samples = []
+    for produto_id in produtos_consulta:
+        started = time.perf_counter()
+        func(produto_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    args = parse_args()
+    eventos = gerar_eventos(args.vendas, args.produtos)
+
+    matriz = MatrizCoocorrencia()
+    started = time.perf_counter()
+    matriz.reconstruir(eventos)
+    carga_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"{args.vendas} vendas, {len(eventos)} eventos "
+        f"(carga da matriz: {carga_ms:.0f} ms, "
+        f"{carga_ms * 1000 / len(eventos):.1f} us/evento)"
+    )
+
+    rng = random.Random(7)
+    produtos_consulta = [
+        int(rng.paretovariate(1.2)) % args.produtos for _ in range(args.consultas)
+    ]
+    print(f"{'cenario':<28}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for label, func in (
+        ("antes (varredura)", lambda pid: _varredura(eventos, pid)),
+        (
+            "depois (matriz)",
+            lambda pid: matriz.vizinhos(pid, limit=5, user_id=1),
+        ),
+    ):
+        amostras = _medir(func, produtos_consulta)
+        ordenado = sorted(amostras)
+        p99 = ordenado[min(len(ordenado) - 1, int(len(ordenado) * 0.99))]
+        print(f"{label:<28}{statistics.median(amostras):>10.2f}{p99:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
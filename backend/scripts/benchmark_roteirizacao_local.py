@@ -0,0 +1,183 @@
+"""Benchmark do roteirizador local de entregas.
+
+Uso:
+    python scripts/benchmark_roteirizacao_local.py --paradas 50 100 200
+    python scripts/benchmark_roteirizacao_local.py --paradas 100 --repeticoes 20
+
+Para cada tamanho, sorteia paradas num raio de ~11 km da loja (semente fixa)
+e replaneja a matriz estimada (linha reta x fator de ruas) nos cenarios:
+
+- 1 entregador, rota aberta (substitui a chamada da Directions API com
+  ``optimize:true``, limitada a 25 paradas);
+- 3 entregadores com capacidade;
+- 3 entregadores com capacidade, janelas de horario e jornada de 4 h.
+
+Mostra a mediana do tempo de planejamento e o custo (minutos de deslocamento)
+so com o vizinho mais proximo x depois do 2-opt/or-opt/realocacao.
+
+Com ``--latencia-ms`` mede tambem o caminho frio de ponta a ponta: enderecos
+sem cache, provedor local com essa latencia por chamada, matriz + plano. Mostra
+as chamadas feitas no request e o que o aquecimento mede depois, fora dele.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services import roteirizacao_local
+from app.services.google_maps_providers import ProvedorMapsLocal, definir_provedor_maps
+from app.services.roteirizacao_local import (
+    EntregadorRoteirizacao,
+    ParadaRoteirizacao,
+    matriz_por_coordenadas,
+    matriz_por_enderecos,
+    planejar_rotas,
+)
+
+LOJA = (-23.5505, -46.6333)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Roteirizador local de entregas.")
+    parser.add_argument("--paradas", type=int, nargs="+", default=[100])
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--latencia-ms", type=float, default=None)
+    return parser.parse_args()
+
+
+class _ProvedorComLatencia(ProvedorMapsLocal):
+    def __init__(self, latencia_s: float):
+        super().__init__()
+        self.latencia_s = latencia_s
+
+    def geocode(self, endereco):
+        time.sleep(self.latencia_s)
+        return super().geocode(endereco)
+
+    def matriz_distancias(self, origens, destinos):
+        time.sleep(self.latencia_s)
+        return super().matriz_distancias(origens, destinos)
+
+
+def _coordenadas(quantidade: int, semente: int):
+    sorteio = random.Random(semente)
+    return [LOJA] + [
+        (LOJA[0] + sorteio.uniform(-0.1, 0.1), LOJA[1] + sorteio.uniform(-0.1, 0.1))
+        for _ in range(quantidade)
+    ]
+
+
+def _cenarios(quantidade: int):
+    sorteio = random.Random(quantidade)
+    simples = [ParadaRoteirizacao(tempo_servico_s=120) for _ in range(quantidade)]
+    com_janela = []
+    for _ in range(quantidade):
+        inicio = sorteio.choice([0, 3600, 7200])
+        com_janela.append(
+            ParadaRoteirizacao(
+                janela_inicio_s=inicio,
+                janela_fim_s=inicio + 2 * 3600,
+                tempo_servico_s=120,
+            )
+        )
+    capacidade = quantidade // 3 + 5
+    tres = [EntregadorRoteirizacao(chave=i, capacidade=capacidade) for i in range(3)]
+    tres_jornada = [
+        EntregadorRoteirizacao(chave=i, capacidade=capacidade, jornada_s=4 * 3600)
+        for i in range(3)
+    ]
+    return [
+        ("1 entregador, rota aberta", simples, [EntregadorRoteirizacao()], False),
+        ("3 entregadores, capacidade", simples, tres, True),
+        ("3 entregadores, janelas", com_janela, tres_jornada, True),
+    ]
+
+
+def _medir(matriz, paradas, entregadores, retorna_origem, repeticoes):
+    tempos = []
+    plano = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        plano = planejar_rotas(matriz, paradas, entregadores, retorna_origem)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), plano
+
+
+def main() -> int:
+    args = parse_args()
+    print(
+        f"{'cenario':<36}{'matriz ms':>10}{'plano ms':>10}"
+        f"{'NN min':>9}{'final min':>11}{'ganho':>8}{'sobras':>8}"
+    )
+    for quantidade in args.paradas:
+        inicio = time.perf_counter()
+        matriz = matriz_por_coordenadas(_coordenadas(quantidade, semente=42))
+        matriz_ms = (time.perf_counter() - inicio) * 1000
+        for label, paradas, entregadores, retorna in _cenarios(quantidade):
+            plano_ms, plano = _medir(
+                matriz, paradas, entregadores, retorna, args.repeticoes
+            )
+            ganho = 1 - plano.custo_final_s / plano.custo_inicial_s
+            print(
+                f"{f'{label} ({quantidade})':<36}{matriz_ms:>10.1f}{plano_ms:>10.1f}"
+                f"{plano.custo_inicial_s / 60:>9.0f}{plano.custo_final_s / 60:>11.0f}"
+                f"{ganho:>8.1%}{len(plano.nao_atendidas):>8}"
+            )
+    if args.latencia_ms is not None:
+        _caminho_frio(args.paradas, args.latencia_ms)
+    return 0
+
+
+def _caminho_frio(tamanhos, latencia_ms: float) -> None:
+    print(
+        f"\n{'caminho frio':<36}{'total ms':>10}{'geocode':>9}{'matriz':>8}"
+        f"{'aquec. elem':>13}{'aquec. cham':>13}"
+    )
+    for quantidade in tamanhos:
+        provedor = _ProvedorComLatencia(latencia_ms / 1000)
+        definir_provedor_maps(provedor)
+        enderecos = [
+            f"Rua Benchmark {i}, {i}, Sao Paulo, SP" for i in range(quantidade)
+        ]
+        try:
+            inicio = time.perf_counter()
+            matriz = matriz_por_enderecos("Rua da Loja, 1, Sao Paulo, SP", enderecos)
+            planejar_rotas(
+                matriz,
+                [ParadaRoteirizacao() for _ in enderecos],
+                [EntregadorRoteirizacao()],
+                retorna_origem=False,
+            )
+            total_ms = (time.perf_counter() - inicio) * 1000
+        finally:
+            definir_provedor_maps(None)
+        # Sem tenant nao ha cache nem thread; o aquecimento e so calculado
+        grupos = roteirizacao_local._pares_para_aquecer(
+            ["Rua da Loja, 1, Sao Paulo, SP", *enderecos],
+            sorted(matriz.pares_estimados),
+            matriz.distancias_m,
+        )
+        print(
+            f"{f'1 entregador ({quantidade})':<36}{total_ms:>10.0f}"
+            f"{provedor.chamadas['geocode']:>9}"
+            f"{provedor.chamadas['matriz_distancias']:>8}"
+            f"{sum(len(d) for d in grupos.values()):>13}{len(grupos):>13}"
+        )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""Microbenchmark do hook de auditoria de RAW SQL (custo por statement).
+
+Uso:
+    python scripts/benchmark_sql_audit.py --iterations 20000
+
+Compara o caminho antigo (traceback.format_stack + extract_stack + nova
+classificacao a cada statement) com o hook atual (flag de contexto do helper
+tenant-safe, sys._getframe e classificacao cacheada por statement).
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import logging
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.db import sql_audit
+from app.db.sql_audit_classifier import (
+    classify_raw_sql_risk,
+    is_raw_sql_text,
+    should_audit_statement,
+)
+from app.db.sql_audit_context import tenant_safe_execution
+
+
+STATEMENT = """
+    SELECT COALESCE(SUM(v.total), 0) AS receita, COUNT(*) AS vendas
+    FROM vendas v
+    JOIN clientes c ON c.id = v.cliente_id
+    WHERE {tenant_filter} AND v.data_venda >= :inicio
+"""
+TENANT_SAFE_INDICATORS = (
+    "tenant_safe_sql.py",
+    "execute_tenant_safe",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Mede o overhead por statement do hook de auditoria SQL."
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=20000,
+        help="Statements auditados por cenario.",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=40,
+        help="Profundidade de stack simulada (request FastAPI + service).",
+    )
+    return parser.parse_args()
+
+
+def _legacy_audit(statement: str) -> None:
+    """Reproduz o custo do hook antigo ate a decisao de auditar."""
+    if not should_audit_statement(statement):
+        return
+    if not is_raw_sql_text(statement):
+        return
+    stack_trace = "".join(traceback.format_stack())
+    if any(indicator in stack_trace for indicator in TENANT_SAFE_INDICATORS):
+        return
+    traceback.extract_stack()
+    classify_raw_sql_risk(statement, "{tenant_filter}" in statement)
+
+
+def _current_audit(statement: str) -> None:
+    sql_audit.audit_raw_sql(None, None, statement, {}, None, False)
+
+
+def _at_depth(depth: int, func, *args):
+    if depth <= 0:
+        return func(*args)
+    return _at_depth(depth - 1, func, *args)
+
+
+def execute_tenant_safe(func):
+    """Frame com o mesmo nome do helper, para que o caminho antigo o reconheca."""
+    with tenant_safe_execution():
+        return func()
+
+
+def _measure(func, iterations: int, depth: int, tenant_safe: bool) -> float:
+    def _loop():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func(STATEMENT)
+        return time.perf_counter() - started
+
+    if tenant_safe:
+        elapsed = _at_depth(depth, execute_tenant_safe, _loop)
+    else:
+        elapsed = _at_depth(depth, _loop)
+    return elapsed / iterations * 1_000_000
+
+
+def main() -> int:
+    args = parse_args()
+    # Os warnings de RAW SQL fazem parte do hook, mas nao do custo medido aqui.
+    logging.disable(logging.CRITICAL)
+    sql_audit.SQL_AUDIT_ENFORCE = False
+
+    print(f"{'cenario':<40}{'antigo (us)':>14}{'atual (us)':>14}")
+    for label, tenant_safe in (
+        ("via helper tenant-safe", True),
+        ("fora do helper (auditado)", False),
+    ):
+        legacy = _measure(_legacy_audit, args.iterations, args.depth, tenant_safe)
+        current = _measure(_current_audit, args.iterations, args.depth, tenant_safe)
+        print(f"{label:<40}{legacy:>14.2f}{current:>14.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""Lista rotas async def que usam a sessao SQLAlchemy sincrona.
+
+Uso (CI):
+    python scripts/check_async_sync_session_routes.py --max-routes 221
+
+Falha quando a quantidade passa do limite informado: rotas novas devem usar
+``get_async_session`` (ou ``def`` sincrono) em vez de bloquear o event loop.
+"""
+
+from __future__ import annotations
+
+# ruff: noqa: E402
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.db.async_route_guard import find_async_routes_with_sync_session
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Lista rotas async def que recebem a sessao sincrona."
+    )
+    parser.add_argument(
+        "--max-routes",
+        type=int,
+        default=None,
+        help="Falha (exit 1) se houver mais rotas que este limite.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    from app.main import app
+
+    routes = find_async_routes_with_sync_session(app)
+    for route in routes:
+        print(route)
+    print(f"\n{len(routes)} rotas async def usando a sessao sincrona.")
+
+    if args.max_routes is not None and len(routes) > args.max_routes:
+        print(
+            f"ERRO: limite de {args.max_routes} rotas excedido. "
+            "Use get_async_session ou declare o handler com def."
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import date, timedelta
+from uuid import UUID
+
+from sqlalchemy import distinct, select
+
+from app.db import SessionLocal
+from app.dre_canais.fatos import recalcular_fatos_dre_canais
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+from app.utils.timezone import now_brasilia
+from app.vendas_models import Venda
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Recalcula os fatos diarios da DRE por canal "
+            "(dre_canal_fatos_diarios) a partir das vendas. Use apos importacoes "
+            "ou correcoes feitas fora do ORM."
+        )
+    )
+    parser.add_argument(
+        "--tenant-id",
+        dest="tenant_id",
+        default=None,
+        help="UUID do tenant. Se omitido, processa todos os tenants com vendas.",
+    )
+    parser.add_argument(
+        "--inicio",
+        type=date.fromisoformat,
+        required=True,
+        help="Primeiro dia (AAAA-MM-DD).",
+    )
+    parser.add_argument(
+        "--fim",
+        type=date.fromisoformat,
+        default=None,
+        help="Ultimo dia (AAAA-MM-DD). Padrao: ontem; o dia corrente nunca e gravado.",
+    )
+    return parser.parse_args()
+
+
+def _tenants(db, tenant_id: UUID | None) -> list[UUID]:
+    if tenant_id is not None:
+        return [tenant_id]
+    rows = db.connection().execute(select(distinct(Venda.__table__.c.tenant_id)))
+    return [row[0] for row in rows if row[0] is not None]
+
+
+def main() -> int:
+    args = parse_args()
+    tenant_id = UUID(args.tenant_id) if args.tenant_id else None
+    ontem = now_brasilia().date() - timedelta(days=1)
+    fim = min(args.fim or ontem, ontem)
+    dias = [
+        args.inicio + timedelta(days=offset)
+        for offset in range((fim - args.inicio).days + 1)
+    ]
+
+    db = SessionLocal()
+    resultado = {}
+    try:
+        for tenant in _tenants(db, tenant_id):
+            set_current_tenant(tenant)
+            recalcular_fatos_dre_canais(db, tenant, dias)
+            db.commit()
+            resultado[str(tenant)] = len(dias)
+
+        payload = {
+            "inicio": args.inicio.isoformat(),
+            "fim": fim.isoformat(),
+            "dias_recalculados_por_tenant": resultado,
+        }
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        clear_current_tenant()
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import json
+from uuid import UUID
+
+from sqlalchemy import distinct, select
+
+from app.db import SessionLocal
+from app.models import Cliente
+from app.services.pessoa_duplicate_index import reconstruir_chaves_duplicidade_pessoas
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Reconstroi o indice de chaves de duplicidade de pessoas "
+            "(pessoa_chaves_duplicidade) a partir de clientes e marca o tenant "
+            "como indexado (pessoa_indices_duplicidade). Use apos a "
+            "migracao ou apos importacoes/correcoes feitas fora do ORM."
+        )
+    )
+    parser.add_argument(
+        "--tenant-id",
+        dest="tenant_id",
+        default=None,
+        help="UUID do tenant. Se omitido, processa todos os tenants com pessoas.",
+    )
+    return parser.parse_args()
+
+
+def _tenants(db, tenant_id: UUID | None) -> list[UUID]:
+    if tenant_id is not None:
+        return [tenant_id]
+    rows = db.connection().execute(select(distinct(Cliente.__table__.c.tenant_id)))
+    return [row[0] for row in rows if row[0] is not None]
+
+
+def main() -> int:
+    args = parse_args()
+    tenant_id = UUID(args.tenant_id) if args.tenant_id else None
+
+    db = SessionLocal()
+    resultado = {}
+    try:
+        for tenant in _tenants(db, tenant_id):
+            set_current_tenant(tenant)
+            resultado[str(tenant)] = reconstruir_chaves_duplicidade_pessoas(db, tenant)
+            db.commit()
+
+        payload = {"chaves_gravadas_por_tenant": resultado}
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        clear_current_tenant()
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -9,7 +9,7 @@ import sys
 import os
 
 import pytest
-from sqlalchemy import create_engine, text
+from sqlalchemy import BigInteger, create_engine, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PostgreSQLUUID
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
@@ -44,6 +44,12 @@ def _compile_jsonb_for_sqlite(_type, _compiler, **_kw):
     return "JSON"
 
 
+@compiles(BigInteger, "sqlite")
+def _compile_biginteger_for_sqlite(_type, _compiler, **_kw):
+    """BIGINT primary keys only autoincrement in SQLite as INTEGER (rowid)."""
+    return "INTEGER"
+
+
 # Re-export legacy factory fixtures without replacing the canonical db_session.
 from tests.conftest_infra import (  # noqa: E402
     auth_headers as _auth_headers,
@@ -110,6 +116,18 @@ def clear_rate_limit_store():
     rate_limit_store.clear()
 
 
+@pytest.fixture(autouse=True)
+def error_event_log_em_tmp(tmp_path, monkeypatch):
+    """Eventos de erro das requisicoes de teste nao vao para backend/logs/."""
+    from app.services import error_event_reporter
+
+    monkeypatch.setattr(
+        error_event_reporter,
+        "ERROR_EVENT_LOG_PATH",
+        str(tmp_path / "logs" / "error_events.jsonl"),
+    )
+
+
 @pytest.fixture
 def dummy_fixture():
     """Dummy fixture to ensure conftest is loaded."""
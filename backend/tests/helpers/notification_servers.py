@@ -0,0 +1,162 @@
+"""
+Servidores locais falsos de SMTP e Expo Push para testes de envio.
+
+Exemplo de uso:
+    with FakeSmtpServer(reject={"bloqueado@example.com"}) as smtp:
+        conn = smtplib.SMTP(smtp.host, smtp.port)
+        ...
+    assert len(smtp.messages) == 1
+
+    with FakeExpoPushServer(invalid_tokens={"ExponentPushToken[x]"}) as expo:
+        requests.post(expo.url, json=[...])
+    assert expo.requests == [[...]]
+"""
+
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ThreadedTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """SMTP mínimo: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP e QUIT (sem TLS)."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        fake = self.server.fake
+        with fake.lock:
+            fake.connections += 1
+        self._reply("220 fake-smtp ESMTP")
+
+        sender, recipients = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 fake-smtp")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(" <>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address in fake.reject:
+                    self._reply("550 Mailbox unavailable")
+                else:
+                    recipients.append(address)
+                    self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line)
+                with fake.lock:
+                    fake.messages.append(
+                        {
+                            "from": sender,
+                            "to": list(recipients),
+                            "data": b"".join(lines).decode(errors="replace"),
+                        }
+                    )
+                self._reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class FakeSmtpServer:
+    """Servidor SMTP local em thread; guarda mensagens e conta conexões."""
+
+    def __init__(self, reject: set[str] | None = None):
+        self.reject = set(reject or ())
+        self.messages: list[dict] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._server = _ThreadedTCPServer(("127.0.0.1", 0), _SmtpHandler)
+        self._server.fake = self
+        self.host, self.port = self._server.server_address
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _ExpoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        fake = self.server.fake
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null")
+        messages = body if isinstance(body, list) else [body]
+
+        tickets = []
+        with fake.lock:
+            fake.requests.append(body)
+            for message in messages:
+                if message.get("to") in fake.invalid_tokens:
+                    tickets.append(
+                        {
+                            "status": "error",
+                            "message": "not a registered push token",
+                            "details": {"error": "DeviceNotRegistered"},
+                        }
+                    )
+                else:
+                    fake.tickets += 1
+                    tickets.append({"status": "ok", "id": f"ticket-{fake.tickets}"})
+
+        payload = json.dumps(
+            {"data": tickets if isinstance(body, list) else tickets[0]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeExpoPushServer:
+    """Expo Push API local: responde um ticket por mensagem (lista ou objeto)."""
+
+    def __init__(self, invalid_tokens: set[str] | None = None):
+        self.invalid_tokens = set(invalid_tokens or ())
+        self.requests: list = []
+        self.tickets = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _ExpoHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        host, port = self._server.server_address
+        self.url = f"http://{host}:{port}/--/api/v2/push/send"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_exc):
+        self._server.shutdown()
+        self._server.server_close()
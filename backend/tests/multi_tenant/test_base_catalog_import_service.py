@@ -914,6 +914,58 @@ def test_import_is_idempotent_and_preserves_target_edits(catalog_session):
     assert count(catalog_session, "produtos", TARGET_TENANT) == 1
 
 
+def test_import_reads_product_mappings_and_skus_in_bulk(catalog_session, monkeypatch):
+    _seed_basic_catalog(catalog_session)
+    _insert_source_product(catalog_session, product_id=102, codigo="LOJA-01")
+    _insert_source_product(
+        catalog_session,
+        product_id=500,
+        codigo=" loja-01",
+        nome="Ja cadastrado",
+        tenant_id=TARGET_TENANT,
+    )
+    catalog_session.commit()
+
+    get_mapping = base_catalog_import_core._get_mapping
+
+    def no_product_lookup(db, **kwargs):
+        assert kwargs["item_type"] != "produto"
+        return get_mapping(db, **kwargs)
+
+    for module in (base_catalog_import_core, base_catalog_import_catalog):
+        monkeypatch.setattr(module, "_get_mapping", no_product_lookup)
+    monkeypatch.setattr(
+        base_catalog_import_catalog,
+        "_find_existing_product_id",
+        lambda *args, **kwargs: pytest.fail("consulta de SKU por produto"),
+    )
+
+    for _ in range(2):
+        result = import_base_catalog(
+            db=catalog_session,
+            source_tenant_id=SOURCE_TENANT,
+            target_tenant_id=TARGET_TENANT,
+            user_id=10,
+            dry_run=False,
+            image_copier=fake_image_copier,
+        )
+        catalog_session.commit()
+
+    assert result["skipped"]["produtos"] == 2
+    assert count(catalog_session, "produtos", TARGET_TENANT) == 2
+    mappings = dict(
+        catalog_session.execute(
+            text(
+                "SELECT template_code, target_id FROM tenant_template_item_installs "
+                "WHERE tenant_id = :tenant AND item_type = 'produto'"
+            ),
+            {"tenant": TARGET_TENANT},
+        ).all()
+    )
+    assert mappings["produto:102"] == 500
+    assert len(mappings) == 2
+
+
 def test_import_rejects_same_source_and_target(catalog_session):
     with pytest.raises(BaseCatalogImportError, match="fonte e destino"):
         import_base_catalog(
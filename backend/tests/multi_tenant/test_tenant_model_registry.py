@@ -84,6 +84,10 @@ INTENTIONALLY_GLOBAL_TENANT_TABLES = frozenset(
         # Espelhado em TENANT_WHITELIST_TABLES (app/tenancy/filters.py).
         "campaign_event_queue",
         "notification_queue",
+        # Fila de entrada do WhatsApp: o webhook público grava e o worker
+        # (app.whatsapp.inbound_queue) faz claim cross-tenant fora de request; o
+        # processamento de cada conversa roda em whatsapp_tenant_context.
+        "whatsapp_inbound_queue",
         # Resolve token publico antes de entrar nas tabelas protegidas por RLS.
         "rotas_entrega_rastreio_tokens",
         # Bootstrap público da integração: request não tem tenant antes do aceite;
@@ -545,6 +545,70 @@ def test_count_events(mock_db_session):
     print(f"✅ Contagem: Total={total}, Tenant1={tenant1}, Tenant2={tenant2}")
 
 
+# ============================================================================
+# TESTES DE ALOCAÇÃO DE SEQUÊNCIA
+# ============================================================================
+
+
+def test_append_batch_aloca_sequencia_contigua_em_um_insert(mock_db_session):
+    """
+    Testa que append_batch reserva a faixa inteira de uma vez e grava
+    todos os eventos com um único INSERT, sem MAX() por evento.
+    """
+    store = EventStore(mock_db_session)
+    store.append(
+        VendaCriadaTeste(venda_id="v0", total=10.0, user_id=1),
+        user_id=1,
+        aggregate_type="venda",
+    )
+
+    statements = []
+    execute_original = mock_db_session.execute
+
+    def execute_registrando(query, params=None):
+        statements.append(str(query))
+        return execute_original(query, params)
+
+    mock_db_session.execute = execute_registrando
+
+    persisted = store.append_batch(
+        [
+            VendaCriadaTeste(venda_id=f"v{i}", total=100.0, user_id=1)
+            for i in range(1, 6)
+        ],
+        user_id=1,
+        aggregate_type="venda",
+    )
+
+    assert [event.sequence_number for event in persisted] == [2, 3, 4, 5, 6]
+    assert sum("INSERT INTO domain_events" in sql for sql in statements) == 1
+    assert not any("MAX(sequence_number)" in sql for sql in statements)
+    assert store.validate_sequence_integrity()["valid"] is True
+
+
+def test_contador_continua_a_partir_dos_eventos_existentes(test_db, mock_db_session):
+    """
+    Testa que o contador é semeado com o MAX() de um store já populado.
+    """
+    test_db.execute(
+        """
+        INSERT INTO domain_events (
+            id, sequence_number, event_type, aggregate_id, aggregate_type,
+            user_id, payload, created_at
+        ) VALUES ('legado', 41, 'VendaCriada', 'v', 'venda', 1, '{}', '2026-01-01')
+        """
+    )
+    store = EventStore(mock_db_session)
+
+    persisted = store.append(
+        VendaCriadaTeste(venda_id="v42", total=100.0, user_id=1),
+        user_id=1,
+        aggregate_type="venda",
+    )
+
+    assert persisted.sequence_number == 42
+
+
 # ============================================================================
 # RUNNER
 # ============================================================================
@@ -0,0 +1,127 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from app.financeiro_models import ContaPagar
+from app.ia.aba5_fluxo_caixa_parts import previsor, projecoes
+from app.ia.aba5_models import FluxoCaixa, ModeloFluxoCaixa, ProjecaoFluxoCaixa
+from app.tenancy.context import tenant_context
+
+# Segunda-feira; vendas fortes no sábado, despesa fixa todo dia
+PRIMEIRO_DIA = date(2026, 6, 1)
+VENDAS_POR_DIA_SEMANA = np.array([800.0, 900.0, 950.0, 1000.0, 1400.0, 2500.0, 300.0])
+
+
+def _series(dias: int, ruido: float = 0.0, semente: int = 3):
+    sorteio = np.random.default_rng(semente)
+    dias_semana = (np.arange(dias) + PRIMEIRO_DIA.weekday()) % 7
+    entradas = VENDAS_POR_DIA_SEMANA[dias_semana] + sorteio.normal(0, ruido, dias)
+    saidas = np.full(dias, 700.0) + sorteio.normal(0, ruido, dias)
+    return np.maximum(entradas, 0), np.maximum(saidas, 0)
+
+
+def test_previsor_aprende_sazonalidade_semanal():
+    entradas, saidas = _series(84, ruido=60.0)
+    parametros = previsor.ajustar_parametros(entradas, saidas, PRIMEIRO_DIA)
+
+    inicio = parametros.ultimo_dia + timedelta(days=1)
+    previsao = previsor.prever(parametros, inicio, 14)
+    esperado = VENDAS_POR_DIA_SEMANA[
+        [(inicio + timedelta(days=i)).weekday() for i in range(14)]
+    ]
+
+    assert np.abs(previsao["entradas"] - esperado).mean() < 150
+    assert np.abs(previsao["saidas"] - 700.0).mean() < 60
+    assert previsao["desvio"][-1] > previsao["desvio"][0] > 0
+    # Dias agendados somam por cima do previsto
+    conhecidas = np.zeros(14)
+    conhecidas[2] = 5000.0
+    com_conta = previsor.prever(parametros, inicio, 14, saidas_conhecidas=conhecidas)
+    assert com_conta["saidas"][2] - previsao["saidas"][2] == 5000.0
+
+
+def test_atualizacao_incremental_igual_em_lote_e_em_partes():
+    entradas, saidas = _series(70, ruido=40.0)
+    parametros = previsor.ajustar_parametros(entradas[:56], saidas[:56], PRIMEIRO_DIA)
+
+    de_uma_vez = previsor.atualizar_parametros(parametros, entradas[56:], saidas[56:])
+    meio = previsor.atualizar_parametros(parametros, entradas[56:63], saidas[56:63])
+    em_partes = previsor.atualizar_parametros(meio, entradas[63:], saidas[63:])
+
+    assert de_uma_vez.ultimo_dia == PRIMEIRO_DIA + timedelta(days=69)
+    for serie in ("entradas", "saidas"):
+        lote, partes = getattr(de_uma_vez, serie), getattr(em_partes, serie)
+        assert partes.nivel == pytest.approx(lote.nivel)
+        assert partes.sazonalidade == pytest.approx(lote.sazonalidade)
+        assert partes.sigma == pytest.approx(lote.sigma)
+        assert partes.dias == lote.dias == 70
+    restaurado = previsor.ParametrosPrevisor.de_dict(de_uma_vez.para_dict())
+    assert restaurado == de_uma_vez
+
+
+def test_projecao_persiste_modelo_e_troca_projecoes_em_lote(db_session, monkeypatch):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    hoje = date(2026, 9, 1)
+    monkeypatch.setattr(
+        projecoes,
+        "_utcnow_naive",
+        lambda: datetime.combine(hoje, datetime.min.time()) + timedelta(hours=10),
+    )
+
+    with tenant_context(tenant_id):
+        entradas, saidas = _series(42)
+        inicio = hoje - timedelta(days=42)
+        for i in range(42):
+            dia = datetime.combine(inicio + timedelta(days=i), datetime.min.time())
+            for tipo, valor in (("receita", entradas[i]), ("despesa", saidas[i])):
+                db_session.add(
+                    FluxoCaixa(
+                        tenant_id=tenant_id,
+                        usuario_id=1,
+                        tipo=tipo,
+                        categoria="Teste",
+                        valor=float(valor),
+                        data_movimentacao=dia + timedelta(hours=12),
+                        status="realizado",
+                        origem_tipo="venda" if tipo == "receita" else None,
+                    )
+                )
+        db_session.add(
+            ContaPagar(
+                tenant_id=tenant_id,
+                user_id=1,
+                descricao="Aluguel",
+                valor_original=Decimal("4000.00"),
+                valor_pago=Decimal("1000.00"),
+                valor_final=Decimal("4000.00"),
+                data_emissao=hoje,
+                data_vencimento=hoje + timedelta(days=3),
+                status="parcial",
+            )
+        )
+        db_session.commit()
+
+        primeira = projecoes.projetar_fluxo_15_dias(
+            1, db_session, tenant_id=str(tenant_id)
+        )
+        segunda = projecoes.projetar_fluxo_15_dias(
+            1, db_session, tenant_id=str(tenant_id)
+        )
+
+        modelo = db_session.query(ModeloFluxoCaixa).one()
+        total_projecoes = db_session.query(ProjecaoFluxoCaixa).count()
+
+    assert modelo.ultimo_dia == hoje - timedelta(days=1)
+    assert modelo.versao_modelo == previsor.VERSAO_PREVISOR
+    assert total_projecoes == 15
+    assert primeira == segunda
+    assert [p["dias_futuros"] for p in primeira] == list(range(1, 16))
+    assert primeira[0]["data"] == (hoje + timedelta(days=1)).isoformat()
+    # Saída do dia 3 = despesa diária (~700) + saldo em aberto do aluguel
+    assert 3600 < primeira[2]["saida_estimada"] < 3800
+    assert primeira[2]["saldo_estimado"] < primeira[1]["saldo_estimado"]
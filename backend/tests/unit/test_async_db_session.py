@@ -0,0 +1,114 @@
+import asyncio
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import get_session
+from app.db.async_core import (
+    AsyncSessionLocal,
+    get_async_session,
+    to_async_database_url,
+)
+from app.db.async_route_guard import find_async_routes_with_sync_session
+from app.tenancy.context import (
+    clear_current_tenant,
+    get_current_tenant,
+    set_current_tenant,
+)
+
+# Rotas async def que ainda recebem a sessao sincrona. So pode diminuir.
+ASYNC_SYNC_SESSION_ROUTES_LIMIT = 221
+
+
+def test_url_assincrona_troca_driver_e_sslmode():
+    assert (
+        to_async_database_url("postgresql://u:p@db:5432/pet?sslmode=require")
+        == "postgresql+asyncpg://u:p@db:5432/pet?ssl=require"
+    )
+    assert (
+        to_async_database_url("postgresql+psycopg2://u:p@db/pet")
+        == "postgresql+asyncpg://u:p@db/pet"
+    )
+    assert (
+        to_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    )
+
+
+def test_guard_lista_apenas_rotas_async_com_sessao_sincrona():
+    router = APIRouter(prefix="/interno")
+
+    @router.get("/bloqueia")
+    async def bloqueia(db=Depends(get_session)):
+        return {}
+
+    @router.get("/threadpool")
+    def threadpool(db=Depends(get_session)):
+        return {}
+
+    @router.get("/assincrona")
+    async def assincrona(db=Depends(get_async_session)):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+
+    routes = find_async_routes_with_sync_session(app)
+
+    assert [(route.path, route.methods) for route in routes] == [
+        ("/api/interno/bloqueia", ("GET",))
+    ]
+
+
+def test_rotas_quentes_de_dashboard_e_pdv_usam_sessao_assincrona():
+    from app.dashboard_routes import router as dashboard_router
+    from app.pdv_racoes_routes import router as pdv_racoes_router
+
+    app = FastAPI()
+    app.include_router(dashboard_router)
+    app.include_router(pdv_racoes_router)
+
+    flagged = {route.endpoint for route in find_async_routes_with_sync_session(app)}
+
+    for endpoint in (
+        "app.dashboard_routes:obter_resumo_dashboard",
+        "app.dashboard_routes:obter_metricas_gerencial",
+        "app.dashboard_routes:obter_top_produtos",
+        "app.pdv_racoes_routes:verificar_alergia_produto",
+        "app.pdv_racoes_routes:obter_cross_sell",
+    ):
+        assert endpoint not in flagged
+
+
+def test_run_sync_preserva_contexto_de_tenant():
+    tenant_id = uuid4()
+
+    async def _executar():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        try:
+            async with AsyncSessionLocal(bind=engine) as db:
+
+                def _consulta(sync_db):
+                    valor = sync_db.execute(text("SELECT 1")).scalar()
+                    return valor, get_current_tenant()
+
+                return await db.run_sync(_consulta)
+        finally:
+            await engine.dispose()
+
+    set_current_tenant(tenant_id)
+    try:
+        assert asyncio.run(_executar()) == (1, tenant_id)
+    finally:
+        clear_current_tenant()
+
+
+def test_rotas_async_com_sessao_sincrona_nao_aumentam():
+    from app.main import app
+
+    routes = find_async_routes_with_sync_session(app)
+
+    assert len(routes) <= ASYNC_SYNC_SESSION_ROUTES_LIMIT, "\n".join(
+        str(route) for route in routes
+    )
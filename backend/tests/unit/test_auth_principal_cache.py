@@ -0,0 +1,245 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.core import create_access_token, get_current_user
+from app.auth.dependencies import get_current_user_and_tenant
+from app.auth.principal_cache import PrincipalCache, principal_cache
+from app.models import (
+    Permission,
+    Role,
+    RolePermission,
+    Tenant,
+    User,
+    UserSession,
+    UserTenant,
+)
+from app.security.permissions_service import get_user_permissions
+from app.tenancy.context import clear_current_tenant, set_current_tenant
+
+
+TENANT_ID = UUID("dddddddd-dddd-dddd-dddd-dddddddddddd")
+AUTH_TABLES = ("users", "user_sessions", "user_tenants", "tenants", "permissions")
+
+
+@pytest.fixture()
+def auth_db():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    for model in (
+        Tenant,
+        User,
+        UserSession,
+        Permission,
+        Role,
+        UserTenant,
+        RolePermission,
+    ):
+        model.__table__.create(engine, checkfirst=True)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    principal_cache.clear()
+    try:
+        yield session, statements
+    finally:
+        session.close()
+        principal_cache.clear()
+        clear_current_tenant()
+
+
+def _seed(db):
+    set_current_tenant(TENANT_ID)
+    tenant = Tenant(id=str(TENANT_ID), name="Loja PDV", status="active", plan="basico")
+    user = User(
+        email="pdv@example.com",
+        nome="Caixa",
+        tenant_id=TENANT_ID,
+        is_active=True,
+        hashed_password="hash",
+    )
+    role = Role(name="Caixa", tenant_id=TENANT_ID)
+    permission = Permission(code="vendas.criar")
+    db.add_all([tenant, user, role, permission])
+    db.flush()
+    db.add(
+        UserTenant(
+            user_id=user.id, role_id=role.id, tenant_id=TENANT_ID, is_active=True
+        )
+    )
+    db.add(
+        RolePermission(
+            role_id=role.id, permission_id=permission.id, tenant_id=TENANT_ID
+        )
+    )
+    jti = str(uuid4())
+    db.add(
+        UserSession(
+            user_id=user.id,
+            tenant_id=TENANT_ID,
+            token_jti=jti,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+        )
+    )
+    db.commit()
+    clear_current_tenant()
+    token = create_access_token(
+        data={"sub": str(user.id), "tenant_id": str(TENANT_ID)}, jti=jti
+    )
+    return user, role, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def _resolve(db, credentials):
+    user = get_current_user(credentials=credentials, session=db)
+    user, tenant_id = asyncio.run(
+        _resolve_tenant_and_permissions(db, credentials, user)
+    )
+    return user, tenant_id
+
+
+async def _resolve_tenant_and_permissions(db, credentials, user):
+    user, tenant_id = await get_current_user_and_tenant(
+        credentials=credentials, user=user, db=db
+    )
+    get_user_permissions(db, user.id, tenant_id)
+    return user, tenant_id
+
+
+def _auth_selects(statements):
+    return [
+        s
+        for s in statements
+        if s.lstrip().upper().startswith("SELECT")
+        and any(table in s for table in AUTH_TABLES)
+    ]
+
+
+def test_segunda_request_do_mesmo_jti_nao_consulta_tabelas_de_auth(auth_db):
+    db, statements = auth_db
+    user, _role, credentials = _seed(db)
+
+    _resolve(db, credentials)
+    assert len(_auth_selects(statements)) >= 4
+
+    statements.clear()
+    cached_user, tenant_id = _resolve(db, credentials)
+
+    assert _auth_selects(statements) == []
+    assert cached_user.id == user.id
+    assert cached_user.email == "pdv@example.com"
+    assert tenant_id == TENANT_ID
+
+
+def test_logout_invalida_principal_em_cache(auth_db):
+    db, _statements = auth_db
+    _user, _role, credentials = _seed(db)
+    _resolve(db, credentials)
+
+    user_session = db.query(UserSession).one()
+    user_session.revoked = True
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        _resolve(db, credentials)
+    assert exc_info.value.status_code == 401
+
+
+def test_desativar_vinculo_invalida_principal_em_cache(auth_db):
+    db, _statements = auth_db
+    _user, _role, credentials = _seed(db)
+    _resolve(db, credentials)
+
+    set_current_tenant(TENANT_ID)
+    vinculo = db.query(UserTenant).one()
+    vinculo.is_active = False
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        _resolve(db, credentials)
+    assert exc_info.value.status_code == 403
+
+
+def test_suspender_tenant_invalida_principal_em_cache(auth_db):
+    db, _statements = auth_db
+    _user, _role, credentials = _seed(db)
+    _resolve(db, credentials)
+
+    tenant = db.query(Tenant).one()
+    tenant.status = "suspended"
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        _resolve(db, credentials)
+    assert exc_info.value.status_code == 403
+
+
+def test_troca_de_permissoes_do_role_recarrega_permissoes(auth_db):
+    db, _statements = auth_db
+    _user, role, credentials = _seed(db)
+    user, tenant_id = _resolve(db, credentials)
+
+    set_current_tenant(TENANT_ID)
+    nova = Permission(code="produtos.editar")
+    db.add(nova)
+    db.flush()
+    db.add(RolePermission(role_id=role.id, permission_id=nova.id, tenant_id=TENANT_ID))
+    db.commit()
+
+    async def _permissions():
+        user_again, tenant = await get_current_user_and_tenant(
+            credentials=credentials,
+            user=get_current_user(credentials=credentials, session=db),
+            db=db,
+        )
+        return get_user_permissions(db, user_again.id, tenant)
+
+    assert "produtos.editar" in asyncio.run(_permissions())
+
+
+def test_cache_respeita_ttl_e_descarta_escrita_com_geracao_antiga():
+    cache = PrincipalCache(ttl_seconds=0.05)
+    user = User(id=7, email="x@example.com", is_active=True)
+    user_session = UserSession(
+        user_id=7,
+        token_jti="jti-a",
+        expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+    )
+
+    stale_generation = cache.generation
+    cache.invalidate_user(99)
+    cache.store_session("jti-a", user, user_session, stale_generation)
+    assert cache.get("jti-a") is None
+
+    cache.store_session("jti-a", user, user_session, cache.generation)
+    assert cache.get("jti-a").user_id == 7
+
+    time.sleep(0.06)
+    assert cache.get("jti-a") is None
+
+
+def test_cache_desligado_com_ttl_zero():
+    cache = PrincipalCache(ttl_seconds=0)
+    user = User(id=7, email="x@example.com", is_active=True)
+    user_session = UserSession(
+        user_id=7,
+        token_jti="jti-b",
+        expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+    )
+
+    cache.store_session("jti-b", user, user_session, cache.generation)
+
+    assert cache.get("jti-b") is None
+    assert len(cache) == 0
@@ -0,0 +1,107 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import app.banho_tosa_agenda_slots as agenda_slots
+from app.banho_tosa_agenda_indice import IndiceIntervalos
+
+
+def _sobrepostos_linear(intervalos, inicio, fim):
+    return sum(
+        1
+        for ag_inicio, ag_fim in intervalos
+        if ag_inicio < fim and (ag_fim or ag_inicio) > inicio
+    )
+
+
+def test_indice_conta_sobreposicao_igual_a_varredura_linear():
+    sorteio = random.Random(7)
+    base = datetime(2026, 4, 27, 8, 0)
+    intervalos = []
+    for _ in range(300):
+        inicio = base + timedelta(minutes=5 * sorteio.randint(0, 120))
+        fim = inicio + timedelta(minutes=sorteio.choice([0, 15, 30, 60, 90]))
+        intervalos.append((inicio, sorteio.choice([fim, None])))
+    # fim antes do inicio tambem precisa bater com a regra antiga
+    intervalos.append((base + timedelta(hours=3), base + timedelta(hours=2)))
+
+    indice = IndiceIntervalos(intervalos)
+    for minutos in range(0, 600, 10):
+        inicio = base + timedelta(minutes=minutos)
+        for duracao in (30, 60, 120):
+            fim = inicio + timedelta(minutes=duracao)
+            assert indice.sobrepostos(inicio, fim) == _sobrepostos_linear(
+                intervalos, inicio, fim
+            )
+
+
+def test_indice_normaliza_timezone_e_calcula_pico():
+    indice = IndiceIntervalos(
+        [
+            (
+                datetime(2026, 4, 26, 9, 0, tzinfo=timezone.utc),
+                datetime(2026, 4, 26, 10, 0),
+            ),
+            (datetime(2026, 4, 26, 9, 30), datetime(2026, 4, 26, 11, 0)),
+            (datetime(2026, 4, 26, 10, 0), datetime(2026, 4, 26, 10, 30)),
+        ]
+    )
+
+    assert (
+        indice.sobrepostos(datetime(2026, 4, 26, 10, 0), datetime(2026, 4, 26, 10, 15))
+        == 2
+    )
+    assert indice.pico_simultaneo() == 2
+
+
+def test_busca_em_varios_dias_pula_dia_fechado_e_recurso_lotado(monkeypatch):
+    config = SimpleNamespace(
+        horario_inicio="08:00",
+        horario_fim="10:00",
+        intervalo_slot_minutos=60,
+        dias_funcionamento=["segunda", "terca"],
+    )
+    recursos = [
+        SimpleNamespace(
+            id=1, nome="Banheira 1", tipo="banheira", capacidade_simultanea=1
+        ),
+        SimpleNamespace(id=2, nome="Box", tipo="box", capacidade_simultanea=2),
+    ]
+    domingo = date(2026, 4, 26)
+    segunda = domingo + timedelta(days=1)
+    agendamentos = [
+        SimpleNamespace(
+            recurso_id=1,
+            data_hora_inicio=datetime.combine(segunda, datetime.min.time())
+            + timedelta(hours=8),
+            data_hora_fim_prevista=None,
+        ),
+        SimpleNamespace(
+            recurso_id=1,
+            data_hora_inicio=datetime(2026, 4, 27, 8, 0, tzinfo=timezone.utc),
+            data_hora_fim_prevista=datetime(2026, 4, 27, 9, 0, tzinfo=timezone.utc),
+        ),
+    ]
+    periodos = []
+
+    def fake_agendamentos(db, tenant_id, data_inicio, data_fim):
+        periodos.append((data_inicio, data_fim))
+        return agendamentos
+
+    monkeypatch.setattr(agenda_slots, "obter_ou_criar_configuracao", lambda *_: config)
+    monkeypatch.setattr(agenda_slots, "_listar_recursos", lambda *_: recursos)
+    monkeypatch.setattr(agenda_slots, "_listar_agendamentos_periodo", fake_agendamentos)
+
+    sugestoes = agenda_slots.sugerir_slots_periodo(
+        None, "tenant", data_inicio=domingo, dias=3, duracao_minutos=60, limit=3
+    )
+
+    assert periodos == [(domingo, domingo + timedelta(days=2))]
+    assert [
+        (item["horario_inicio"], item["recurso_id"], item["ocupacao_no_slot"])
+        for item in sugestoes
+    ] == [
+        (datetime(2026, 4, 27, 8, 0), 2, 0),
+        (datetime(2026, 4, 27, 9, 0), 1, 0),
+        (datetime(2026, 4, 27, 9, 0), 2, 0),
+    ]
@@ -0,0 +1,56 @@
+import pytest
+
+from app.bling_integration_parts import http_client
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 1_000.0
+        self.dormiu = []
+
+    def time(self):
+        return self.agora
+
+    def monotonic(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        self.dormiu.append(segundos)
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch, tmp_path):
+    relogio = _Relogio()
+    monkeypatch.setattr(
+        http_client, "BLING_HTTP_BUCKETS_FILE", tmp_path / "bling_buckets.json"
+    )
+    monkeypatch.setattr(http_client, "BLING_RATE_PER_SECOND", 2.0)
+    monkeypatch.setattr(http_client, "BLING_RATE_BURST", 2.0)
+    monkeypatch.setattr(http_client, "time", relogio)
+    return relogio
+
+
+def test_token_bucket_libera_rajada_e_depois_respeita_a_taxa(relogio):
+    assert http_client.adquirir_token_bling("conta-a") == 0
+    assert http_client.adquirir_token_bling("conta-a") == 0
+    assert relogio.dormiu == []
+
+    espera = http_client.adquirir_token_bling("conta-a")
+
+    assert espera == pytest.approx(0.5)
+    # Outra conta Bling tem balde proprio
+    assert http_client.adquirir_token_bling("conta-b") == 0
+
+
+def test_rate_limit_abre_cooldown_e_reduz_a_taxa(relogio):
+    http_client.penalizar_rate_limit_bling(3, "conta-a")
+
+    espera = http_client.adquirir_token_bling("conta-a")
+
+    # 3s de cooldown + 1 token na taxa reduzida (~1/s)
+    assert espera == pytest.approx(4.0, abs=0.2)
+    with http_client._BucketFile() as shared:
+        bucket = shared.state[http_client._bucket_key("conta-a")]
+    assert bucket["rate"] < 2.0
+    assert http_client.bling_http_metrics_snapshot()["rate_limited"] >= 1
@@ -23,6 +23,14 @@ class _FakeResponse:
         return self._payload
 
 
+@pytest.fixture(autouse=True)
+def _isolar_token_bucket(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "app.bling_integration_parts.http_client.BLING_HTTP_BUCKETS_FILE",
+        tmp_path / "bling_buckets.json",
+    )
+
+
 def _make_api():
     api = BlingAPI.__new__(BlingAPI)
     api.base_url = "https://api.bling.com.br/Api/v3"
@@ -146,7 +154,10 @@ def test_request_renova_token_e_repete_quando_bling_retorna_invalid_token(monkey
         api.access_token = "token-novo"
         return True
 
-    monkeypatch.setattr("requests.get", fake_get)
+    monkeypatch.setattr(
+        "app.bling_integration_parts.core._sessao_http_bling",
+        lambda: SimpleNamespace(get=fake_get),
+    )
     monkeypatch.setattr(api, "_renovar_token_automatico", fake_renovar)
 
     resposta = api._request("GET", "/nfe", data={"dataInicial": "2026-03-30"})
@@ -182,7 +193,10 @@ def test_request_reaproveita_token_renovado_por_outro_processo(monkeypatch):
             return True
         return False
 
-    monkeypatch.setattr("requests.get", fake_get)
+    monkeypatch.setattr(
+        "app.bling_integration_parts.core._sessao_http_bling",
+        lambda: SimpleNamespace(get=fake_get),
+    )
     monkeypatch.setattr(api, "_recarregar_tokens_compartilhados", fake_recarregar)
     monkeypatch.setattr(
         api, "_renovar_token_automatico", lambda: renovacoes.append(True)
@@ -208,7 +222,10 @@ def test_request_nao_renova_para_erro_diferente_de_invalid_token(monkeypatch):
             },
         )
 
-    monkeypatch.setattr("requests.get", fake_get)
+    monkeypatch.setattr(
+        "app.bling_integration_parts.core._sessao_http_bling",
+        lambda: SimpleNamespace(get=fake_get),
+    )
     monkeypatch.setattr(
         api, "_renovar_token_automatico", lambda: renovacoes.append(True)
     )
@@ -247,7 +264,10 @@ def test_baixar_danfe_usa_timeout(monkeypatch):
         chamadas.append({"url": url, "headers": headers, "timeout": timeout})
         return FakeResponse()
 
-    monkeypatch.setattr("requests.get", fake_get)
+    monkeypatch.setattr(
+        "app.bling_integration_parts.notas._sessao_http_bling",
+        lambda: SimpleNamespace(get=fake_get),
+    )
 
     assert api.baixar_danfe(123) == b"%PDF"
     assert chamadas == [
@@ -0,0 +1,179 @@
+import threading
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+import app.services.bling_sync_pipeline as bling_sync_pipeline
+import app.services.bling_sync_queue as bling_sync_queue
+from app.models import Tenant
+from app.produtos_models import Produto, ProdutoBlingSync, ProdutoBlingSyncQueue
+from app.services.bling_sync_service import BlingSyncService
+from app.services.bling_sync_shared import utc_now
+from app.tenancy.context import tenant_context
+
+
+class _SessaoDoTeste:
+    """Reaproveita a sessao do teste no lugar do SessionLocal do servico."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def tenant_bling(db_session, monkeypatch):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    db_session.query(Tenant).update({Tenant.status: "inactive"})
+    tenant_id = uuid4()
+    db_session.add(
+        Tenant(
+            id=str(tenant_id),
+            name="Loja Sync",
+            name_normalized="loja sync",
+            status="active",
+            plan="basico",
+        )
+    )
+    db_session.flush()
+    monkeypatch.setattr(
+        bling_sync_pipeline, "SessionLocal", lambda: _SessaoDoTeste(db_session)
+    )
+    return tenant_id
+
+
+def _produto_vinculado(db_session, tenant_id, bling_produto_id):
+    produto = Produto(
+        tenant_id=tenant_id,
+        user_id=1,
+        codigo=f"SKU-{bling_produto_id}",
+        nome=f"Produto {bling_produto_id}",
+        estoque_atual=10,
+    )
+    db_session.add(produto)
+    db_session.flush()
+    sync = ProdutoBlingSync(
+        tenant_id=tenant_id,
+        produto_id=produto.id,
+        bling_produto_id=bling_produto_id,
+        sincronizar=True,
+    )
+    db_session.add(sync)
+    db_session.flush()
+    return sync
+
+
+def _item(db_session, tenant_id, sync, estoque, updated_at):
+    fila = ProdutoBlingSyncQueue(
+        tenant_id=tenant_id,
+        produto_id=sync.produto_id,
+        sync_id=sync.id,
+        estoque_novo=estoque,
+        status="pendente",
+        tentativas=0,
+        proxima_tentativa_em=updated_at,
+        updated_at=updated_at,
+    )
+    db_session.add(fila)
+    db_session.flush()
+    return fila
+
+
+def test_fila_coalesce_produto_repetido_e_envia_em_pipeline(
+    db_session, tenant_bling, monkeypatch
+):
+    base = utc_now() - timedelta(minutes=5)
+    with tenant_context(tenant_bling):
+        sync_a = _produto_vinculado(db_session, tenant_bling, "9101")
+        antigo = _item(db_session, tenant_bling, sync_a, 7, base)
+        recente = _item(
+            db_session, tenant_bling, sync_a, 4, base + timedelta(seconds=30)
+        )
+        for bling_id, estoque in (("9102", 2), ("9103", 3), ("9104", 4)):
+            sync = _produto_vinculado(db_session, tenant_bling, bling_id)
+            _item(db_session, tenant_bling, sync, estoque, base)
+
+    enviados = {}
+    simultaneos = {"atual": 0, "pico": 0}
+    lock = threading.Lock()
+
+    def fake_envio(bling_produto_id, estoque_novo, observacao):
+        with lock:
+            simultaneos["atual"] += 1
+            simultaneos["pico"] = max(simultaneos["pico"], simultaneos["atual"])
+        time.sleep(0.05)
+        with lock:
+            simultaneos["atual"] -= 1
+            enviados[bling_produto_id] = estoque_novo
+
+    monkeypatch.setattr(
+        BlingSyncService, "_enviar_estoque_bling", staticmethod(fake_envio)
+    )
+
+    resultado = BlingSyncService.process_pending_queue(limit=10, in_flight=2)
+
+    assert resultado["coalescidos"] == 1
+    assert resultado["enviados"] == 4
+    assert resultado["sucessos"] == 4
+    assert enviados == {"9101": 4.0, "9102": 2.0, "9103": 3.0, "9104": 4.0}
+    assert simultaneos["pico"] == 2
+    with tenant_context(tenant_bling):
+        db_session.refresh(antigo)
+        db_session.refresh(recente)
+        assert antigo.status == "coalescido"
+        assert recente.status == "sucesso"
+
+
+def test_rate_limit_interrompe_lote_e_devolve_itens_nao_enviados(
+    db_session, tenant_bling, monkeypatch
+):
+    base = utc_now() - timedelta(minutes=5)
+    with tenant_context(tenant_bling):
+        itens = []
+        for bling_id in ("9201", "9202", "9203"):
+            sync = _produto_vinculado(db_session, tenant_bling, bling_id)
+            itens.append(_item(db_session, tenant_bling, sync, 1, base))
+
+    def fake_envio(bling_produto_id, estoque_novo, observacao):
+        raise RuntimeError("429 Too Many Requests")
+
+    monkeypatch.setattr(
+        BlingSyncService, "_enviar_estoque_bling", staticmethod(fake_envio)
+    )
+    monkeypatch.setattr(
+        bling_sync_queue, "_registrar_cooldown_rate_limit", lambda error: 4.0
+    )
+
+    resultado = BlingSyncService.process_pending_queue(limit=10, in_flight=1)
+
+    assert resultado["rate_limited"] is True
+    assert resultado["enviados"] == 1
+    with tenant_context(tenant_bling):
+        for fila in itens:
+            db_session.refresh(fila)
+        assert [fila.status for fila in itens] == ["pendente"] * 3
+        assert [fila.tentativas for fila in itens] == [0, 0, 0]
+        assert itens[0].proxima_tentativa_em > utc_now()
+
+
+def test_novo_saldo_nao_sobrescreve_item_em_envio(db_session, tenant_bling):
+    with tenant_context(tenant_bling):
+        sync = _produto_vinculado(db_session, tenant_bling, "9301")
+        em_envio = _item(db_session, tenant_bling, sync, 8, utc_now())
+        em_envio.status = "processando"
+        db_session.flush()
+
+        resultado = BlingSyncService.queue_product_sync(
+            db_session, produto_id=sync.produto_id, estoque_novo=5, motivo="venda"
+        )
+
+        assert resultado["queue_id"] != em_envio.id
+        assert em_envio.estoque_novo == 8
+        assert em_envio.status == "processando"
@@ -49,6 +49,7 @@ def test_bling_sync_service_refactor_mantem_arquivos_focados():
         "app/services/bling_sync_service.py": 100,
         "app/services/bling_sync_shared.py": 520,
         "app/services/bling_sync_queue.py": 650,
+        "app/services/bling_sync_pipeline.py": 300,
         "app/services/bling_sync_reprocess.py": 250,
         "app/services/bling_sync_reconciliation.py": 300,
         "app/services/bling_sync_auto_link.py": 220,
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.cache.cache_manager import _AUSENTE, CacheManager, InMemoryCache
+from app.domain.events.handlers import CacheEventHandler
+from app.tenancy.context import tenant_context
+
+
+class _L2EmMemoria(InMemoryCache):
+    """Faz o papel do Redis: outro processo enxerga o que foi gravado aqui."""
+
+
+def test_lru_despeja_a_chave_menos_usada_e_respeita_ttl():
+    l1 = InMemoryCache(max_entries=2)
+    l1.set("a", 1, ttl=60)
+    l1.set("b", 2, ttl=60)
+    assert l1.get("a") == 1  # "a" passa a ser a mais recente
+    l1.set("c", 3, ttl=60)
+
+    assert l1.get("b") is _AUSENTE
+    assert l1.get("a") == 1
+    assert l1.stats()["evictions"] == 1
+
+    l1.set("d", 4, ttl=0)
+    assert l1.get("d") is _AUSENTE
+
+
+def test_chaves_e_tags_sao_isoladas_por_tenant():
+    cache = CacheManager(redis_url="")
+    tenant_a, tenant_b = uuid4(), uuid4()
+    cache.set("ranking", "top", [1], tags=("vendas",), tenant_id=tenant_a)
+    cache.set("ranking", "top", [2], tags=("vendas",), tenant_id=tenant_b)
+
+    with tenant_context(tenant_a):
+        assert cache.get("ranking", "top") == [1]
+        assert cache.invalidate_tags("vendas") == 1
+
+    assert cache.get("ranking", "top", tenant_id=tenant_a) is None
+    assert cache.get("ranking", "top", tenant_id=tenant_b) == [2]
+
+    # Sem tenant no contexto, a tag cai em todos os tenants
+    assert cache.invalidate_tags("vendas") == 1
+    assert cache.get("ranking", "top", tenant_id=tenant_b) is None
+
+
+def test_single_flight_calcula_uma_vez_para_chamadas_concorrentes():
+    cache = CacheManager(redis_url="")
+    chamadas = []
+
+    def carregar():
+        chamadas.append(1)
+        time.sleep(0.1)
+        return {"total": 10}
+
+    resultados = []
+    threads = [
+        threading.Thread(
+            target=lambda: resultados.append(
+                cache.get_or_set("nfe_listagem", "k", carregar, tenant_id="t1")
+            )
+        )
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert resultados == [{"total": 10}] * 6
+    stats = cache.get_stats()["namespaces"]["nfe_listagem"]
+    assert stats["sets"] == 1
+    assert stats["singleflight_waits"] == 5
+
+
+def test_decorator_async_ignora_self_e_usa_tags_da_chamada():
+    cache = CacheManager(redis_url="")
+    chamadas = []
+
+    class Builder:
+        @cache.cached(
+            ttl=60,
+            key_prefix="cliente_info",
+            tags=lambda tenant_id, cliente_id: (f"cliente:{cliente_id}",),
+        )
+        async def info(self, tenant_id, cliente_id):
+            chamadas.append(cliente_id)
+            await asyncio.sleep(0.01)
+            return {"id": cliente_id}
+
+    async def cenario():
+        primeira = await asyncio.gather(*(Builder().info("t1", 7) for _ in range(4)))
+        await Builder().info("t1", 7)
+        cache.invalidate_tags("cliente:7", tenant_id="t1")
+        await Builder().info("t1", 7)
+        return primeira
+
+    assert asyncio.run(cenario()) == [{"id": 7}] * 4
+    assert chamadas == [7, 7]
+
+
+def test_leitura_do_l2_preenche_o_l1_de_outro_processo():
+    worker_a = CacheManager(redis_url="")
+    worker_b = CacheManager(redis_url="")
+    worker_a.l2 = worker_b.l2 = _L2EmMemoria()
+    worker_b.l1_ttl_max = 30
+
+    worker_a.set("produtos", "p1", {"nome": "Racao"}, tags=("produtos",), tenant_id="t")
+    assert worker_b.get("produtos", "p1", tenant_id="t") == {"nome": "Racao"}
+    assert worker_b.get("produtos", "p1", tenant_id="t") == {"nome": "Racao"}
+
+    stats = worker_b.get_stats()
+    assert (stats["hits_l2"], stats["hits_l1"]) == (1, 1)
+
+    # A invalidacao no worker A limpa o L2 compartilhado
+    worker_a.invalidate_tags("produtos", tenant_id="t")
+    worker_b.l1.clear()
+    assert worker_b.get("produtos", "p1", tenant_id="t") is None
+
+
+def test_evento_de_venda_invalida_tags_do_tenant(monkeypatch):
+    cache = CacheManager(redis_url="")
+    monkeypatch.setattr("app.cache.cache_manager.cache", cache)
+    tenant_id = uuid4()
+    cache.set(
+        "pdv_oportunidades",
+        "venda_5",
+        [1],
+        tags=("pdv_sessao:venda_5",),
+        tenant_id=tenant_id,
+    )
+    cache.set("cliente_info", "c9", {"id": 9}, tags=("cliente:9",), tenant_id=tenant_id)
+    cache.set(
+        "tenant_config",
+        "cfg",
+        {"tom": "x"},
+        tags=("whatsapp_config",),
+        tenant_id=tenant_id,
+    )
+
+    with tenant_context(tenant_id):
+        CacheEventHandler.on_venda_finalizada(SimpleNamespace(venda_id=5, cliente_id=9))
+
+    assert cache.get("pdv_oportunidades", "venda_5", tenant_id=tenant_id) is None
+    assert cache.get("cliente_info", "c9", tenant_id=tenant_id) is None
+    assert cache.get("tenant_config", "cfg", tenant_id=tenant_id) == {"tom": "x"}
@@ -0,0 +1,247 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.campaigns.handlers.birthday import BirthdayHandler
+from app.campaigns.handlers.inactivity import InactivityHandler
+from app.campaigns.models import (
+    CampaignExecution,
+    CampaignTypeEnum,
+    Coupon,
+    NotificationChannelEnum,
+    NotificationQueue,
+)
+from app.db import Base
+from app.models import AuditLog, Cliente, Pet, User
+from app.tenancy.context import set_current_tenant
+from app.vendas_models import Venda
+from app.whatsapp.security import DataPrivacyConsent
+
+
+@pytest.fixture
+def tenant_id(db_session):
+    Base.metadata.create_all(
+        db_session.connection(),
+        tables=[
+            Coupon.__table__,
+            CampaignExecution.__table__,
+            NotificationQueue.__table__,
+            DataPrivacyConsent.__table__,
+        ],
+    )
+    tenant = uuid4()
+    set_current_tenant(tenant)
+    return tenant
+
+
+@pytest.fixture
+def loja(db_session, tenant_id):
+    user = User(
+        email=f"loja-{uuid4().hex[:6]}@example.com",
+        nome="Loja",
+        tenant_id=tenant_id,
+        is_active=True,
+        hashed_password="hash",
+    )
+    db_session.add(user)
+    db_session.flush()
+    return user
+
+
+def _cliente(db_session, tenant_id, loja, nome, email=None, nascimento=None):
+    cliente = Cliente(
+        tenant_id=tenant_id,
+        user_id=loja.id,
+        nome=nome,
+        email=email,
+        data_nascimento=nascimento,
+    )
+    db_session.add(cliente)
+    db_session.flush()
+    return cliente
+
+
+def _campaign(tenant_id, campaign_type, params, campaign_id=11):
+    return SimpleNamespace(
+        id=campaign_id,
+        tenant_id=tenant_id,
+        name="Campanha",
+        campaign_type=campaign_type,
+        params=params,
+    )
+
+
+def _count(db_session, model, tenant_id):
+    return db_session.query(model).filter(model.tenant_id == tenant_id).count()
+
+
+def test_inatividade_em_lote_pula_quem_ja_recebeu_na_semana(
+    db_session, tenant_id, loja
+):
+    antiga = datetime.now() - timedelta(days=90)
+    clientes = [
+        _cliente(db_session, tenant_id, loja, f"Cliente {n}", email=f"c{n}@x.com")
+        for n in range(4)
+    ]
+    for cliente in clientes:
+        db_session.add(
+            Venda(
+                tenant_id=tenant_id,
+                user_id=loja.id,
+                vendedor_id=loja.id,
+                cliente_id=cliente.id,
+                numero_venda=f"V-{uuid4().hex[:8]}",
+                subtotal=Decimal("50"),
+                total=Decimal("50"),
+                status="finalizada",
+                data_venda=antiga,
+                data_finalizacao=antiga,
+            )
+        )
+    iso_year, iso_week, _ = date.today().isocalendar()
+    db_session.add(
+        CampaignExecution(
+            tenant_id=tenant_id,
+            campaign_id=11,
+            customer_id=clientes[0].id,
+            reference_period=f"{iso_year}-W{iso_week:02d}",
+            reward_type="coupon:percent",
+        )
+    )
+    db_session.flush()
+
+    campaign = _campaign(
+        tenant_id,
+        CampaignTypeEnum.inactivity,
+        {"inactivity_days": 30, "coupon_type": "percent", "coupon_value": 15},
+    )
+    event = SimpleNamespace(id=None, event_type="weekly_inactivity_check")
+
+    resultado = InactivityHandler().run(db=db_session, campaign=campaign, event=event)
+    db_session.flush()
+
+    assert resultado == {"evaluated": 4, "rewarded": 3, "errors": 0}
+    coupons = db_session.query(Coupon).filter(Coupon.tenant_id == tenant_id).all()
+    assert sorted(c.customer_id for c in coupons) == [c.id for c in clientes[1:]]
+    assert all(c.code.startswith("VOLTA-") for c in coupons)
+    assert len({c.code for c in coupons}) == 3
+    assert coupons[0].meta["inactivity_days"] == 30
+
+    executions = {
+        row.customer_id: row
+        for row in db_session.query(CampaignExecution).filter(
+            CampaignExecution.tenant_id == tenant_id
+        )
+    }
+    por_cliente = {c.customer_id: c for c in coupons}
+    for cliente in clientes[1:]:
+        meta = executions[cliente.id].reward_meta
+        assert meta == {
+            "coupon_id": por_cliente[cliente.id].id,
+            "coupon_code": por_cliente[cliente.id].code,
+        }
+
+    emails = (
+        db_session.query(NotificationQueue)
+        .filter(
+            NotificationQueue.tenant_id == tenant_id,
+            NotificationQueue.channel == NotificationChannelEnum.email,
+        )
+        .all()
+    )
+    assert len(emails) == 3
+    assert (
+        db_session.query(AuditLog)
+        .filter(
+            AuditLog.tenant_id == tenant_id,
+            AuditLog.entity_type == "campaign_coupons",
+        )
+        .count()
+        == 3
+    )
+
+    # Reexecucao na mesma semana nao recompensa de novo
+    resultado = InactivityHandler().run(db=db_session, campaign=campaign, event=event)
+    assert resultado == {"evaluated": 4, "rewarded": 0, "errors": 0}
+    assert _count(db_session, Coupon, tenant_id) == 3
+
+
+def test_aniversario_de_pet_em_lote_notifica_dono_e_respeita_opt_out(
+    db_session, tenant_id, loja
+):
+    hoje = date.today()
+    nascimento = datetime(2019, hoje.month, hoje.day)
+    ana = _cliente(db_session, tenant_id, loja, "Ana", email="ana@example.com")
+    bia = _cliente(db_session, tenant_id, loja, "Bia", email="bia@example.com")
+    pets = []
+    for nome, dono in (("Rex", ana), ("Mel", ana), ("Tom", bia)):
+        pet = Pet(
+            tenant_id=tenant_id,
+            user_id=loja.id,
+            cliente_id=dono.id,
+            codigo=f"PET-{uuid4().hex[:6]}",
+            nome=nome,
+            especie="cao",
+            data_nascimento=nascimento,
+            ativo=True,
+        )
+        db_session.add(pet)
+        pets.append(pet)
+    db_session.add(
+        DataPrivacyConsent(
+            tenant_id=tenant_id,
+            subject_type="customer",
+            subject_id=str(bia.id),
+            consent_type="marketing_email",
+            consent_given=False,
+            consent_text="Nao quero e-mails",
+        )
+    )
+    db_session.flush()
+
+    campaign = _campaign(
+        tenant_id,
+        CampaignTypeEnum.birthday_pet,
+        {
+            "coupon_type": "fixed",
+            "coupon_value": 20,
+            "notification_message": "Parabens {nome_pet}! {desconto} com {code}",
+        },
+    )
+    event = SimpleNamespace(id=None, event_type="daily_birthday_check")
+
+    resultado = BirthdayHandler().run(db=db_session, campaign=campaign, event=event)
+    db_session.flush()
+
+    assert resultado == {"evaluated": 3, "rewarded": 3, "errors": 0}
+    periodos = {
+        row.customer_id: row.reference_period
+        for row in db_session.query(CampaignExecution).filter(
+            CampaignExecution.tenant_id == tenant_id
+        )
+    }
+    assert periodos == {pet.id: f"{hoje.isoformat()}-p{pet.id}" for pet in pets}
+
+    coupons = db_session.query(Coupon).filter(Coupon.tenant_id == tenant_id).all()
+    assert sorted(c.customer_id for c in coupons) == sorted([ana.id, ana.id, bia.id])
+    assert all(c.code.startswith("PETANIV-") for c in coupons)
+
+    emails = (
+        db_session.query(NotificationQueue)
+        .filter(
+            NotificationQueue.tenant_id == tenant_id,
+            NotificationQueue.channel == NotificationChannelEnum.email,
+        )
+        .all()
+    )
+    assert sorted(e.customer_id for e in emails) == [ana.id, ana.id]
+    assert {e.body.split("!")[0] for e in emails} == {"Parabens Rex", "Parabens Mel"}
+    assert all("R$ 20,00" in e.body for e in emails)
+
+    # Reexecucao no mesmo dia: anti-join por pet nao recompensa de novo
+    resultado = BirthdayHandler().run(db=db_session, campaign=campaign, event=event)
+    assert resultado == {"evaluated": 3, "rewarded": 0, "errors": 0}
+    assert _count(db_session, Coupon, tenant_id) == 3
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.campaigns.handlers.ranking import RankingHandler
+from app.campaigns.models import (
+    CampaignTypeEnum,
+    CustomerRankHistory,
+    NotificationChannelEnum,
+    NotificationQueue,
+    RankLevelEnum,
+)
+from app.db import Base
+from app.models import Cliente, User, UserPushDevice
+from app.tenancy.context import set_current_tenant
+from app.vendas_models import Venda
+from app.whatsapp.security import DataPrivacyConsent
+
+PARAMS = {
+    "silver_min_spent": 100,
+    "silver_min_purchases": 2,
+    "silver_min_months": 1,
+    "gold_min_spent": 500,
+    "gold_min_purchases": 3,
+    "gold_min_months": 1,
+}
+
+
+@pytest.fixture
+def tenant_id(db_session):
+    Base.metadata.create_all(
+        db_session.connection(),
+        tables=[
+            CustomerRankHistory.__table__,
+            NotificationQueue.__table__,
+            DataPrivacyConsent.__table__,
+        ],
+    )
+    # date_trunc("month", ...) e exclusivo do PostgreSQL
+    db_session.connection().connection.driver_connection.create_function(
+        "date_trunc", 2, lambda _unit, value: value[:7] if value else None
+    )
+    tenant = uuid4()
+    set_current_tenant(tenant)
+    return tenant
+
+
+def _periodos():
+    now = datetime.now(timezone.utc)
+    inicio_mes = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    mes_passado = inicio_mes - timedelta(days=1)
+    anterior = (mes_passado.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+    return mes_passado.replace(tzinfo=None), mes_passado.strftime("%Y-%m"), anterior
+
+
+def _cliente(db_session, tenant_id, user, nome, email=None, auth_user_id=None):
+    cliente = Cliente(
+        tenant_id=tenant_id,
+        user_id=user.id,
+        nome=nome,
+        email=email,
+        auth_user_id=auth_user_id,
+    )
+    db_session.add(cliente)
+    db_session.flush()
+    return cliente
+
+
+def _vendas(db_session, tenant_id, user, cliente, valores, quando):
+    for valor in valores:
+        db_session.add(
+            Venda(
+                tenant_id=tenant_id,
+                user_id=user.id,
+                vendedor_id=user.id,
+                cliente_id=cliente.id,
+                numero_venda=f"V-{uuid4().hex[:8]}",
+                subtotal=Decimal(valor),
+                total=Decimal(valor),
+                status="finalizada",
+                data_venda=quando,
+                data_finalizacao=quando,
+            )
+        )
+    db_session.flush()
+
+
+def test_ranking_em_lote_grava_historico_e_notifica_so_upgrades(db_session, tenant_id):
+    quando, periodo, periodo_anterior = _periodos()
+    loja = User(
+        email=f"loja-{uuid4().hex[:6]}@example.com",
+        nome="Loja",
+        tenant_id=tenant_id,
+        is_active=True,
+        hashed_password="hash",
+    )
+    app_user = User(
+        email="ana@example.com",
+        nome="Ana",
+        tenant_id=tenant_id,
+        is_active=True,
+        hashed_password="hash",
+    )
+    db_session.add_all([loja, app_user])
+    db_session.flush()
+    db_session.add(
+        UserPushDevice(
+            tenant_id=tenant_id,
+            user_id=app_user.id,
+            expo_push_token="ExponentPushToken[ana]",
+            enabled=True,
+        )
+    )
+
+    ana = _cliente(db_session, tenant_id, loja, "Ana", email="ana@example.com")
+    bia = _cliente(db_session, tenant_id, loja, "Bia", email="bia@example.com")
+    caio = _cliente(db_session, tenant_id, loja, "Caio")
+    _vendas(db_session, tenant_id, loja, ana, ["200", "200", "200"], quando)
+    _vendas(db_session, tenant_id, loja, bia, ["60", "60"], quando)
+    _vendas(db_session, tenant_id, loja, caio, ["80", "80"], quando)
+
+    # Caio ja era silver: nao e upgrade. Bia fez opt-out de e-mail.
+    db_session.add(
+        CustomerRankHistory(
+            tenant_id=tenant_id,
+            customer_id=caio.id,
+            period=periodo_anterior,
+            rank_level=RankLevelEnum.silver,
+        )
+    )
+    db_session.add(
+        DataPrivacyConsent(
+            tenant_id=tenant_id,
+            subject_type="customer",
+            subject_id=str(bia.id),
+            consent_type="marketing_email",
+            consent_given=False,
+            consent_text="Nao quero e-mails",
+        )
+    )
+    db_session.flush()
+
+    campaign = SimpleNamespace(
+        id=7,
+        tenant_id=tenant_id,
+        name="Ranking",
+        campaign_type=CampaignTypeEnum.ranking_monthly,
+        params=PARAMS,
+    )
+    event = SimpleNamespace(event_type="monthly_ranking_recalc")
+
+    resultado = RankingHandler().run(db=db_session, campaign=campaign, event=event)
+    db_session.flush()
+
+    assert resultado == {"evaluated": 3, "rewarded": 2, "errors": 0}
+    historico = {
+        row.customer_id: row.rank_level
+        for row in db_session.query(CustomerRankHistory).filter(
+            CustomerRankHistory.tenant_id == tenant_id,
+            CustomerRankHistory.period == periodo,
+        )
+    }
+    assert historico == {
+        ana.id: RankLevelEnum.gold,
+        bia.id: RankLevelEnum.silver,
+        caio.id: RankLevelEnum.silver,
+    }
+
+    notificacoes = {
+        (row.customer_id, row.channel): row
+        for row in db_session.query(NotificationQueue).filter(
+            NotificationQueue.tenant_id == tenant_id
+        )
+    }
+    assert set(notificacoes) == {
+        (ana.id, NotificationChannelEnum.push),
+        (ana.id, NotificationChannelEnum.email),
+    }
+    push = notificacoes[(ana.id, NotificationChannelEnum.push)]
+    assert push.kind == "ranking_upgrade"
+    assert push.payload["rank"] == "gold"
+    assert push.payload["previous_rank"] == "bronze"
+
+    # Reexecucao e idempotente
+    RankingHandler().run(db=db_session, campaign=campaign, event=event)
+    db_session.flush()
+    assert (
+        db_session.query(NotificationQueue)
+        .filter(NotificationQueue.tenant_id == tenant_id)
+        .count()
+        == 2
+    )
+    assert (
+        db_session.query(CustomerRankHistory)
+        .filter(CustomerRankHistory.tenant_id == tenant_id)
+        .count()
+        == 4
+    )
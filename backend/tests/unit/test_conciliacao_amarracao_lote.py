@@ -0,0 +1,160 @@
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.conciliacao_amarracao_lote import (
+    aplicar_baixas_contas_receber,
+    carregar_parcelas_abertas,
+    planejar_amarracao,
+    resolver_vendas_por_nsu,
+)
+from app.financeiro_models import ContaReceber
+from app.tenancy.context import tenant_context
+from app.vendas_models import Venda, VendaPagamento
+
+DIA = date(2026, 5, 4)
+
+
+def _recebimento(id, nsu, tipo="parcela_individual", parcela=1, valor="50.00"):
+    return SimpleNamespace(
+        id=id,
+        nsu=nsu,
+        tipo_recebimento=tipo,
+        parcela_numero=parcela,
+        valor=Decimal(valor),
+        data_recebimento=DIA,
+    )
+
+
+def _parcela(id, venda_id, numero, valor="50.00"):
+    return SimpleNamespace(
+        id=id, venda_id=venda_id, numero_parcela=numero, valor_original=Decimal(valor)
+    )
+
+
+def test_plano_reserva_parcelas_e_mantem_formato_dos_orfaos():
+    recebimentos = [
+        _recebimento(1, "A", parcela=2),
+        _recebimento(2, "A", tipo="antecipacao"),
+        _recebimento(3, "B"),
+        _recebimento(4, "C"),
+    ]
+    plano = planejar_amarracao(
+        recebimentos,
+        {"A": 10, "B": None},
+        {10: [_parcela(100, 10, 1), _parcela(101, 10, 2), _parcela(102, 10, 3)]},
+    )
+
+    assert [(rec.id, venda_id) for rec, venda_id in plano.amarrados] == [
+        (1, 10),
+        (2, 10),
+    ]
+    assert [(b["id"], b["tipo_recebimento"]) for b in plano.baixas] == [
+        (101, "parcela_individual"),
+        (100, "antecipacao"),
+        (102, "antecipacao"),
+    ]
+    assert plano.valor_total_liquidado == Decimal("150.00")
+    assert plano.orfaos == [
+        {"nsu": "B", "valor": 50.0, "data": "2026-05-04"},
+        {
+            "nsu": "C",
+            "valor": 50.0,
+            "data": "2026-05-04",
+            "motivo": "sem_venda_pagamento",
+        },
+    ]
+
+
+def _venda(tenant_id, numero, conciliada):
+    return Venda(
+        tenant_id=tenant_id,
+        user_id=1,
+        vendedor_id=1,
+        numero_venda=numero,
+        subtotal=Decimal("100.00"),
+        total=Decimal("100.00"),
+        conciliado_vendas=conciliada,
+    )
+
+
+def _conta(tenant_id, venda_id, numero_parcela):
+    return ContaReceber(
+        tenant_id=tenant_id,
+        user_id=1,
+        descricao=f"Parcela {numero_parcela}",
+        dre_subcategoria_id=1,
+        canal="loja_fisica",
+        valor_original=Decimal("50.00"),
+        valor_final=Decimal("50.00"),
+        data_emissao=DIA,
+        data_vencimento=DIA,
+        venda_id=venda_id,
+        numero_parcela=numero_parcela,
+        status="pendente",
+    )
+
+
+def test_vendas_por_nsu_e_baixas_em_lote_sao_idempotentes(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    outro_tenant = uuid4()
+    with tenant_context(tenant_id):
+        conferida = _venda(tenant_id, "VEN-1", True)
+        pendente = _venda(tenant_id, "VEN-2", False)
+        db_session.add_all([conferida, pendente])
+        db_session.flush()
+        for venda, nsu in ((conferida, "N1"), (pendente, "N2")):
+            db_session.add(
+                VendaPagamento(
+                    tenant_id=tenant_id,
+                    venda_id=venda.id,
+                    forma_pagamento="cartao_credito",
+                    valor=Decimal("100.00"),
+                    nsu_cartao=nsu,
+                )
+            )
+        primeira = _conta(tenant_id, conferida.id, 1)
+        segunda = _conta(tenant_id, conferida.id, 2)
+        db_session.add_all([primeira, segunda])
+        db_session.flush()
+
+    with tenant_context(outro_tenant):
+        db_session.add(
+            VendaPagamento(
+                tenant_id=outro_tenant,
+                venda_id=conferida.id,
+                forma_pagamento="cartao_credito",
+                valor=Decimal("1.00"),
+                nsu_cartao="N3",
+            )
+        )
+        db_session.flush()
+
+    with tenant_context(tenant_id):
+        vendas = resolver_vendas_por_nsu(db_session, tenant_id, ["N1", "N2", "N3"])
+        assert vendas == {"N1": conferida.id, "N2": None}
+
+        parcelas = carregar_parcelas_abertas(db_session, tenant_id, [conferida.id])
+        assert [p.id for p in parcelas[conferida.id]] == [primeira.id, segunda.id]
+
+        plano = planejar_amarracao(
+            [_recebimento(77, "N1", tipo="antecipacao")], vendas, parcelas
+        )
+        assert (
+            aplicar_baixas_contas_receber(db_session, tenant_id, DIA, plano.baixas) == 2
+        )
+        assert (
+            aplicar_baixas_contas_receber(db_session, tenant_id, DIA, plano.baixas) == 0
+        )
+
+        db_session.expire_all()
+        for conta in (primeira, segunda):
+            assert conta.status == "recebido"
+            assert conta.data_recebimento == DIA
+            assert conta.tipo_recebimento == "antecipacao"
+            assert conta.conciliacao_recebimento_id == 77
+        assert carregar_parcelas_abertas(db_session, tenant_id, [conferida.id]) == {}
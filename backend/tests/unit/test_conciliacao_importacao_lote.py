@@ -0,0 +1,146 @@
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.conciliacao_importacao_lote import (
+    LoteOperadora,
+    aplicar_confirmacoes_operadora,
+    buscar_contas_por_nsu,
+    buscar_nsus_existentes,
+    montar_confirmacao_operadora,
+)
+from app.financeiro_models import ContaReceber
+from app.tenancy.context import tenant_context
+
+
+def _conta(tenant_id, nsu, adquirente="Stone", **extras):
+    return ContaReceber(
+        tenant_id=tenant_id,
+        user_id=1,
+        descricao=f"Venda {nsu}",
+        dre_subcategoria_id=1,
+        canal="loja_fisica",
+        valor_original=Decimal("100.00"),
+        valor_final=Decimal("100.00"),
+        data_emissao=date(2026, 3, 1),
+        data_vencimento=date(2026, 3, 31),
+        nsu=nsu,
+        adquirente=adquirente,
+        **extras,
+    )
+
+
+def test_lote_resolve_nsus_e_grava_confirmacoes_em_conjunto(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    with tenant_context(tenant_id):
+        estimada = _conta(
+            tenant_id,
+            "N1",
+            taxa_mdr_estimada=Decimal("2.50"),
+            valor_liquido_estimado=Decimal("97.50"),
+        )
+        sem_estimativa = _conta(tenant_id, "N2")
+        outra_adquirente = _conta(tenant_id, "N3", adquirente="Cielo")
+        db_session.add_all([estimada, sem_estimativa, outra_adquirente])
+        db_session.flush()
+
+        lote = LoteOperadora.de_linhas(
+            [
+                {
+                    "nsu": "N1",
+                    "taxa_mdr": Decimal("2.80"),
+                    "valor_liquido": Decimal("97.20"),
+                    "data_pagamento": date(2026, 4, 1),
+                },
+                {
+                    "nsu": "N2",
+                    "taxa_mdr": Decimal("3.00"),
+                    "valor_liquido": Decimal("50.00"),
+                    "data_pagamento": date(2026, 4, 2),
+                },
+                {
+                    "nsu": "N3",
+                    "taxa_mdr": Decimal("1.00"),
+                    "valor_liquido": Decimal("10.00"),
+                    "data_pagamento": date(2026, 4, 3),
+                },
+                {
+                    "nsu": None,
+                    "taxa_mdr": Decimal("1.00"),
+                    "valor_liquido": Decimal("10.00"),
+                    "data_pagamento": date(2026, 4, 3),
+                },
+            ]
+        )
+
+        assert len(lote) == 4
+        assert lote.taxas_antecipacao == [Decimal("0.00")] * 4
+        assert buscar_nsus_existentes(db_session, lote.nsus, "Stone", tenant_id) == {
+            "N1",
+            "N2",
+        }
+
+        contas = buscar_contas_por_nsu(db_session, lote.nsus, "Stone", tenant_id)
+        assert sorted(contas) == ["N1", "N2"]
+
+        confirmacoes = [
+            montar_confirmacao_operadora(
+                contas[lote.nsus[posicao]],
+                taxa_mdr=lote.taxas_mdr[posicao],
+                taxa_antecipacao=lote.taxas_antecipacao[posicao],
+                valor_liquido=lote.valores_liquidos[posicao],
+                data_pagamento=lote.datas_pagamento[posicao],
+            )
+            for posicao in (0, 1)
+        ]
+        assert aplicar_confirmacoes_operadora(db_session, tenant_id, confirmacoes) == 2
+
+        db_session.expire_all()
+        assert estimada.status_conciliacao == "confirmada_operadora"
+        assert estimada.taxa_mdr_real == Decimal("2.80")
+        assert estimada.diferenca_taxa == Decimal("0.30")
+        assert estimada.diferenca_valor == Decimal("-0.30")
+        assert estimada.data_vencimento_real == date(2026, 4, 1)
+        assert sem_estimativa.status_conciliacao == "confirmada_operadora"
+        assert sem_estimativa.diferenca_taxa is None
+        assert outra_adquirente.status_conciliacao != "confirmada_operadora"
+
+
+def test_postgres_grava_lote_com_update_from_values():
+    executados = []
+
+    class _Resultado:
+        rowcount = 2
+
+    db = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+        execute=lambda stmt: executados.append(stmt) or _Resultado(),
+    )
+    conta = SimpleNamespace(
+        id=7,
+        taxa_mdr_estimada=None,
+        valor_liquido_estimado=None,
+        diferenca_taxa=None,
+        diferenca_valor=None,
+    )
+    confirmacao = montar_confirmacao_operadora(
+        conta,
+        taxa_mdr=Decimal("2.00"),
+        taxa_antecipacao=Decimal("0.00"),
+        valor_liquido=Decimal("98.00"),
+        data_pagamento=date(2026, 4, 1),
+    )
+
+    assert aplicar_confirmacoes_operadora(db, uuid4(), [confirmacao, confirmacao]) == 2
+
+    assert len(executados) == 1
+    sql = str(executados[0].compile(dialect=postgresql.dialect()))
+    assert "UPDATE contas_receber SET status_conciliacao" in sql
+    assert "FROM (VALUES" in sql
+    assert "AS dados (id, taxa_mdr_real" in sql
+    assert "CAST(dados.diferenca_taxa AS NUMERIC(5, 2))" in sql
@@ -0,0 +1,187 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.financeiro.conciliacao_ofx_importacao import (
+    MatcherRegrasConciliacao,
+    importar_transacoes_ofx,
+)
+from app.financeiro.models_conciliacao import (
+    ExtratoBancario,
+    MovimentacaoBancaria,
+    RegraConciliacao,
+)
+from app.parsers.ofx_parser import ExtratoOFX, TransacaoOFX, validar_extrato
+from app.tenancy.context import tenant_context
+
+
+def _regra(id, padrao=None, confianca=0, valor_min=None, valor_max=None):
+    return SimpleNamespace(
+        id=id,
+        padrao_memo=padrao,
+        confianca=confianca,
+        valor_min=valor_min,
+        valor_max=valor_max,
+    )
+
+
+def _transacao(fitid, memo, valor):
+    transacao = TransacaoOFX()
+    transacao.fitid = fitid
+    transacao.memo = memo
+    transacao.valor = Decimal(str(valor))
+    transacao.tipo = "DEBIT" if valor < 0 else "CREDIT"
+    transacao.data_movimento = datetime(2026, 3, 10)
+    return transacao
+
+
+def test_matcher_mantem_prioridade_das_regras():
+    regras = [
+        _regra(1, "%PETZ%", confianca=60),
+        _regra(2, confianca=100, valor_min=100, valor_max=200),
+        _regra(3, "%petz%", confianca=60),
+        _regra(4, "%ENERGIA%", confianca=90),
+    ]
+    matcher = MatcherRegrasConciliacao(regras)
+
+    # Faixa de valor pesa 70%: 100 * 0.7 > 60; empate fica com a primeira regra
+    assert matcher.melhor_regra("PAG PETZ LTDA", -150) == (regras[1], 70.0)
+    assert matcher.melhor_regra("PAG PETZ LTDA", -50) == (regras[0], 60)
+    assert matcher.melhor_regra("CONTA ENERGIA", 10) == (regras[3], 90)
+    assert matcher.melhor_regra("TARIFA", 500) == (None, 0)
+    assert matcher.melhor_regra(None, 120)[0] is regras[1]
+
+
+def test_matcher_com_flag_inline_ou_backreference_testa_cada_padrao():
+    # "(?i)" no meio da expressao combinada e erro; "\1" mudaria de grupo
+    regras = [
+        _regra(1, "(?i)pix recebido%", confianca=70),
+        _regra(2, "(ted)-\\1", confianca=80),
+        _regra(3, "%TARIFA%", confianca=50),
+    ]
+    matcher = MatcherRegrasConciliacao(regras)
+
+    assert matcher.melhor_regra("PIX RECEBIDO JOAO", 10) == (regras[0], 70)
+    assert matcher.melhor_regra("TED-TED 123", 10) == (regras[1], 80)
+    assert matcher.melhor_regra("TED-DOC 123", 10) == (None, 0)
+    assert matcher.melhor_regra("TARIFA PACOTE", 10) == (regras[2], 50)
+
+
+def test_importacao_em_lote_ignora_fitids_existentes_e_aplica_regras(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    with tenant_context(tenant_id):
+        regra = RegraConciliacao(
+            tenant_id=tenant_id,
+            padrao_memo="%PETZ%",
+            confianca=90,
+            vezes_aplicada=9,
+            vezes_confirmada=9,
+            ativo=True,
+        )
+        extrato = ExtratoBancario(
+            tenant_id=tenant_id,
+            conta_bancaria_id=7,
+            total_movimentacoes=4,
+            pendentes=4,
+            conciliadas=0,
+            status="processando",
+        )
+        db_session.add_all([regra, extrato])
+        db_session.flush()
+        db_session.add(
+            MovimentacaoBancaria(
+                tenant_id=tenant_id,
+                conta_bancaria_id=7,
+                fitid="F1",
+                valor=10,
+            )
+        )
+        db_session.flush()
+
+        progresso = []
+        criadas = importar_transacoes_ofx(
+            db_session,
+            tenant_id=tenant_id,
+            extrato=extrato,
+            conta_bancaria_id=7,
+            transacoes=[
+                _transacao("F1", "JA IMPORTADA", -10),
+                _transacao("F2", "COMPRA PETZ", -80),
+                _transacao("F2", "COMPRA PETZ", -80),
+                _transacao("F3", "TARIFA", -5),
+            ],
+            lote=1,
+            ao_concluir_lote=progresso.append,
+        )
+
+        assert criadas == 2
+        assert progresso == [2, 4]
+        novas = {
+            mov.fitid: mov
+            for mov in db_session.query(MovimentacaoBancaria).filter(
+                MovimentacaoBancaria.extrato_id == extrato.id
+            )
+        }
+        assert sorted(novas) == ["F2", "F3"]
+        assert novas["F2"].status_conciliacao == "conciliado"
+        assert novas["F2"].regra_aplicada_id == regra.id
+        assert novas["F3"].status_conciliacao == "pendente"
+        assert extrato.conciliadas == 1
+        assert regra.vezes_aplicada == 10
+
+
+def test_validar_extrato_conta_fitids_duplicados():
+    extrato = ExtratoOFX()
+    extrato.conta_numero = "123"
+    extrato.transacoes = [
+        _transacao("A", "x", 1),
+        _transacao("B", "y", 2),
+        _transacao("A", "x", 1),
+        _transacao("A", "x", 1),
+    ]
+
+    resultado = validar_extrato(extrato)
+
+    assert resultado["valido"] is True
+    assert "FITIDs duplicados: 1" in resultado["avisos"]
+
+
+def test_status_de_extrato_parado_vira_erro_sem_gravar():
+    from datetime import timedelta, timezone
+
+    from app.conciliacao_bancaria_routes import status_extrato
+    from app.financeiro.conciliacao_ofx_importacao import (
+        SEM_PROGRESSO_MAX,
+        extrato_interrompido,
+    )
+
+    agora = datetime.now(timezone.utc)
+    extrato = ExtratoBancario(
+        id=3,
+        status="processando",
+        total_movimentacoes=2000,
+        movimentacoes_processadas=1000,
+        updated_at=agora - timedelta(minutes=1),
+    )
+    assert not extrato_interrompido(extrato, agora)
+
+    extrato.updated_at = (agora - SEM_PROGRESSO_MAX * 2).replace(tzinfo=None)
+    assert extrato_interrompido(extrato, agora)
+
+    class _Consulta:
+        def filter(self, *_args):
+            return self
+
+        def first(self):
+            return extrato
+
+    db = SimpleNamespace(query=lambda _modelo: _Consulta())
+    resposta = status_extrato(3, db=db, user_and_tenant=(None, uuid4()))
+
+    assert resposta["status"] == "erro"
+    assert "1000 de 2000" in resposta["erro"]
+    assert extrato.status == "processando"
@@ -31,6 +31,9 @@ class _FakeSession:
     def query(self, *args, **kwargs):
         return next(self._queries)
 
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
 
 @pytest.mark.asyncio
 async def test_resumo_dashboard_normaliza_decimais_antes_dos_calculos():
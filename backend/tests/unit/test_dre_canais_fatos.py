@@ -0,0 +1,236 @@
+import weakref
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.db import Base
+from app.dre_canais import fatos, invalidacao
+from app.dre_canais.agregacao import (
+    _aplicar_estimativas_cmv,
+    _calcular_vendas_por_canal,
+    obter_vendas_por_canal,
+)
+from app.dre_canais.models import DRECanalDiaCalculado, DRECanalFatoDiario
+from app.services.venda_rentabilidade_snapshot_service import SNAPSHOT_VERSION
+from app.tenancy.context import set_current_tenant
+from app.vendas_models import Venda
+
+AGORA = datetime(2026, 6, 20, 15, 0, 0)
+
+
+@pytest.fixture
+def tenant_id(db_session, monkeypatch):
+    Base.metadata.create_all(
+        db_session.connection(),
+        tables=[DRECanalFatoDiario.__table__, DRECanalDiaCalculado.__table__],
+    )
+    monkeypatch.setattr(invalidacao, "_tabelas_por_engine", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(fatos, "now_brasilia", lambda: AGORA)
+    monkeypatch.setattr(invalidacao, "now_brasilia", lambda: AGORA)
+    # A gravacao roda em thread com sessao propria; aqui, na sessao do teste
+    monkeypatch.setattr(
+        fatos,
+        "_agendar_materializacao",
+        lambda tenant, dias: fatos.recalcular_fatos_dre_canais(
+            db_session, tenant, dias, fatos.reservar_dias(db_session, tenant, dias)
+        ),
+    )
+    tenant = uuid4()
+    set_current_tenant(tenant)
+    return tenant
+
+
+def _criar_venda(db_session, tenant_id, quando, valor, canal="loja_fisica"):
+    venda = Venda(
+        tenant_id=tenant_id,
+        user_id=1,
+        vendedor_id=1,
+        numero_venda=f"V-{uuid4().hex[:8]}",
+        subtotal=Decimal(valor),
+        total=Decimal(valor),
+        status="finalizada",
+        data_venda=quando,
+        canal=canal,
+        rentabilidade_snapshot={
+            "snapshot_version": SNAPSHOT_VERSION,
+            "venda_bruta": float(valor),
+            "custo_produtos": float(valor) * 0.6,
+            "taxa_cartao": 1.5,
+            "itens": [],
+        },
+    )
+    db_session.add(venda)
+    db_session.flush()
+    return venda
+
+
+def _ao_vivo(db_session, tenant_id):
+    dados, bases, pendencias = _calcular_vendas_por_canal(
+        db_session, tenant_id, datetime(2026, 6, 1), datetime(2026, 7, 1)
+    )
+    _aplicar_estimativas_cmv(dados, bases, pendencias)
+    return dados
+
+
+def _dias_calculados(db_session, tenant_id):
+    return {
+        row.data: row.volatil
+        for row in db_session.query(DRECanalDiaCalculado).filter(
+            DRECanalDiaCalculado.tenant_id == tenant_id
+        )
+    }
+
+
+def _resumo(dados):
+    return {
+        canal: (valores["receita_produtos"], valores["cmv"], valores["taxas_cartao"])
+        for canal, valores in dados.items()
+    }
+
+
+def test_fatos_diarios_batem_com_calculo_ao_vivo_e_dia_corrente_fica_ao_vivo(
+    db_session, tenant_id
+):
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 11, 18), "50", "ecommerce")
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 20, 8), "30")
+
+    dados = obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    assert _resumo(dados) == _resumo(_ao_vivo(db_session, tenant_id))
+    assert dados["loja_fisica"]["receita_produtos"] == Decimal("130.0")
+    calculados = _dias_calculados(db_session, tenant_id)
+    assert sorted(calculados) == [date(2026, 6, dia) for dia in range(1, 20)]
+    assert not any(calculados.values())
+
+
+def test_leitura_nao_grava_na_sessao_do_request(db_session, tenant_id, monkeypatch):
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    agendados = []
+    monkeypatch.setattr(
+        fatos, "_agendar_materializacao", lambda tenant, dias: agendados.append(dias)
+    )
+
+    def _commit_proibido():
+        raise AssertionError("commit na leitura da DRE")
+
+    monkeypatch.setattr(db_session, "commit", _commit_proibido)
+    dados = obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    assert dados["loja_fisica"]["receita_produtos"] == Decimal("100.0")
+    assert agendados == [[date(2026, 6, dia) for dia in range(1, 20)]]
+    assert _dias_calculados(db_session, tenant_id) == {}
+
+
+def test_segunda_leitura_nao_recalcula_dias_encerrados(
+    db_session, tenant_id, monkeypatch
+):
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    primeira = obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    def _nao_deve_recalcular(*_args, **_kwargs):
+        raise AssertionError("dia encerrado recalculado")
+
+    monkeypatch.setattr(fatos, "_calcular_bloco", _nao_deve_recalcular)
+    segunda = obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    assert _resumo(segunda) == _resumo(primeira)
+
+
+def test_cancelar_venda_de_dia_encerrado_invalida_so_aquele_dia(db_session, tenant_id):
+    venda = _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 11, 9), "40")
+    obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    venda.status = "cancelada"
+    db_session.flush()
+
+    assert date(2026, 6, 10) not in _dias_calculados(db_session, tenant_id)
+    assert date(2026, 6, 11) in _dias_calculados(db_session, tenant_id)
+    dados = obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+    assert dados["loja_fisica"]["receita_produtos"] == Decimal("40.0")
+
+
+def test_mudar_data_da_venda_invalida_dia_antigo_e_novo(db_session, tenant_id):
+    venda = _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    venda.data_venda = datetime(2026, 6, 12, 9)
+    db_session.flush()
+
+    calculados = _dias_calculados(db_session, tenant_id)
+    assert date(2026, 6, 10) not in calculados
+    assert date(2026, 6, 12) not in calculados
+    assert date(2026, 6, 11) in calculados
+
+
+def test_mudanca_de_cadastro_invalida_apenas_dias_volateis(db_session, tenant_id):
+    from app.financeiro_models import FormaPagamento
+
+    _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+    db_session.query(DRECanalDiaCalculado).filter(
+        DRECanalDiaCalculado.data == date(2026, 6, 10)
+    ).update({"volatil": True})
+
+    db_session.add(
+        FormaPagamento(tenant_id=tenant_id, user_id=1, nome="Pix", tipo="pix")
+    )
+    db_session.flush()
+
+    calculados = _dias_calculados(db_session, tenant_id)
+    assert date(2026, 6, 10) not in calculados
+    assert len(calculados) == 18
+
+
+def test_dia_invalidado_durante_o_calculo_fica_sem_marca(
+    db_session, tenant_id, monkeypatch
+):
+    venda = _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    dias = [date(2026, 6, 10), date(2026, 6, 11)]
+    reservas = fatos.reservar_dias(db_session, tenant_id, dias)
+    # Reservado, ainda sem calculo: a leitura nao usa a marca
+    assert fatos._dias_calculados(db_session, tenant_id, dias[0], dias[-1]) == set()
+
+    calcular_bloco = fatos._calcular_bloco
+
+    def _venda_cancelada_durante_a_leitura(db, tenant, bloco):
+        calculados = calcular_bloco(db, tenant, bloco)
+        venda.status = "cancelada"
+        db_session.flush()
+        return calculados
+
+    monkeypatch.setattr(fatos, "_calcular_bloco", _venda_cancelada_durante_a_leitura)
+    fatos.recalcular_fatos_dre_canais(db_session, tenant_id, dias, reservas)
+
+    assert _dias_calculados(db_session, tenant_id) == {date(2026, 6, 11): False}
+
+
+def test_escrita_que_commita_depois_da_reserva_a_apaga(db_session, tenant_id):
+    venda = _criar_venda(db_session, tenant_id, datetime(2026, 6, 10, 9), "100")
+    obter_vendas_por_canal(db_session, 6, 2026, tenant_id)
+
+    # Flush da escrita antes da reserva; commit so depois dela
+    venda.status = "cancelada"
+    db_session.flush()
+    fatos.reservar_dias(db_session, tenant_id, [date(2026, 6, 10)])
+    assert date(2026, 6, 10) in _dias_calculados(db_session, tenant_id)
+    db_session.commit()
+
+    assert date(2026, 6, 10) not in _dias_calculados(db_session, tenant_id)
+    assert date(2026, 6, 11) in _dias_calculados(db_session, tenant_id)
+
+
+def test_invalidacao_registrada_por_app_db():
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    import app.db  # noqa: F401
+
+    assert event.contains(
+        Session, "after_flush", invalidacao._invalidar_fatos_after_flush
+    )
+    assert event.contains(Session, "after_commit", invalidacao._reinvalidar_apos_commit)
+    assert event.contains(Venda.data_venda, "set", invalidacao._data_venda_alterada)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+import app.services.google_maps_cache as google_maps_cache
+import app.services.google_maps_providers as google_maps_providers
+from app.services.google_maps_cache import cache_google_maps
+from app.services.google_maps_providers import (
+    ProvedorGoogleMaps,
+    ProvedorMapsLocal,
+    definir_provedor_maps,
+)
+from app.services.google_maps_service import (
+    calcular_distancia_km,
+    calcular_matriz_distancias,
+    geocode_endereco,
+)
+from app.tenancy.context import tenant_context
+
+LOJA = "Rua da Loja, 100, Centro, Sao Paulo, SP"
+CLIENTE_A = "Rua A, numero 10, Apto 3, Sao Paulo, SP"
+CLIENTE_B = "Rua B, 20, Sao Paulo, SP"
+
+
+class _SessaoDoTeste:
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def provedor_local(db_session, monkeypatch):
+    provedor = ProvedorMapsLocal(
+        {
+            "Rua da Loja, 100, Centro, Sao Paulo, SP": (-23.5505, -46.6333),
+            "Rua B, 20, Sao Paulo, SP": (-23.5505, -46.5333),
+        }
+    )
+    definir_provedor_maps(provedor)
+    monkeypatch.setattr(
+        cache_google_maps, "_session_factory", lambda: _SessaoDoTeste(db_session)
+    )
+    yield provedor
+    definir_provedor_maps(None)
+
+
+def test_matriz_consulta_provedor_so_para_pares_fora_do_cache(provedor_local):
+    with tenant_context(uuid4()):
+        primeira = calcular_matriz_distancias([LOJA], [CLIENTE_A, CLIENTE_B])
+        assert provedor_local.chamadas["matriz_distancias"] == 1
+
+        # Mesmo endereço escrito de outro jeito cai na mesma chave normalizada
+        repetida = calcular_matriz_distancias(
+            ["rua da loja,  100 - centro - Sao Paulo/SP"], ["Rua A, 10, Sao Paulo, SP"]
+        )
+        assert provedor_local.chamadas["matriz_distancias"] == 1
+        assert list(repetida.values()) == [primeira[(LOJA, CLIENTE_A)]]
+
+        calcular_matriz_distancias([LOJA, CLIENTE_B], [CLIENTE_A, CLIENTE_B])
+        assert provedor_local.chamadas["matriz_distancias"] == 2
+
+        # Linha reta de ~10,2 km x fator de ruas 1,3
+        assert calcular_distancia_km(LOJA, CLIENTE_B) == pytest.approx(13.25, abs=0.01)
+        assert provedor_local.chamadas["matriz_distancias"] == 2
+
+
+def test_geocode_respeita_ttl_e_isolamento_por_tenant(provedor_local, monkeypatch):
+    with tenant_context(uuid4()):
+        assert geocode_endereco(LOJA) == geocode_endereco(LOJA)
+        assert provedor_local.chamadas["geocode"] == 1
+
+        agora = google_maps_cache._agora()
+        monkeypatch.setattr(
+            google_maps_cache, "_agora", lambda: agora + timedelta(days=91)
+        )
+        geocode_endereco(LOJA)
+        assert provedor_local.chamadas["geocode"] == 2
+
+    with tenant_context(uuid4()):
+        geocode_endereco(LOJA)
+        assert provedor_local.chamadas["geocode"] == 3
+
+
+def test_provedor_google_divide_matriz_nos_limites_da_api(monkeypatch):
+    chamadas = []
+
+    def fake_get(url, params, timeout):
+        origens = params["origins"].split("|")
+        destinos = params["destinations"].split("|")
+        chamadas.append((len(origens), len(destinos)))
+        data = {
+            "status": "OK",
+            "rows": [
+                {"elements": [{"status": "OK", "par": f"{o}>{d}"} for d in destinos]}
+                for o in origens
+            ],
+        }
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: data)
+
+    monkeypatch.setattr(google_maps_providers, "GOOGLE_MAPS_API_KEY", "teste")
+    monkeypatch.setattr(google_maps_providers.requests, "get", fake_get)
+
+    origens = [f"O{i}" for i in range(5)]
+    destinos = [f"D{j}" for j in range(30)]
+    matriz = ProvedorGoogleMaps().matriz_distancias(origens, destinos)
+
+    assert chamadas == [(4, 25), (4, 5), (1, 25), (1, 5)]
+    assert matriz[4][29]["par"] == "O4>D29"
+    assert all(len(linha) == 30 for linha in matriz)
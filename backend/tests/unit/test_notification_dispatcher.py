@@ -0,0 +1,204 @@
+import smtplib
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.campaigns.models import (
+    NotificationChannelEnum,
+    NotificationQueue,
+    NotificationStatusEnum,
+)
+from app.campaigns.notification_dispatcher import NotificationDispatcher
+from app.db import Base
+from app.models import AppNotification, Cliente, User, UserPushDevice
+from app.tenancy.context import set_current_tenant
+from tests.helpers.notification_servers import FakeExpoPushServer, FakeSmtpServer
+
+
+@pytest.fixture
+def tenant_id(db_session, monkeypatch):
+    Base.metadata.create_all(
+        db_session.connection(), tables=[NotificationQueue.__table__]
+    )
+    monkeypatch.setattr("app.ia_config.SMTP_EMAIL", "loja@example.com")
+    tenant = uuid4()
+    set_current_tenant(tenant)
+    return tenant
+
+
+def _app_customer(db_session, tenant_id, loja, nome, tokens):
+    user = User(
+        email=f"{nome.lower()}-{uuid4().hex[:6]}@example.com",
+        nome=nome,
+        tenant_id=tenant_id,
+        is_active=True,
+        hashed_password="hash",
+    )
+    db_session.add(user)
+    db_session.flush()
+    for token in tokens:
+        db_session.add(
+            UserPushDevice(
+                tenant_id=tenant_id,
+                user_id=user.id,
+                expo_push_token=token,
+                enabled=True,
+            )
+        )
+    cliente = Cliente(
+        tenant_id=tenant_id, user_id=loja.id, nome=nome, auth_user_id=user.id
+    )
+    db_session.add(cliente)
+    db_session.flush()
+    return cliente
+
+
+def _queue(db_session, tenant_id, key, channel, customer_id=1, **fields):
+    notif = NotificationQueue(
+        tenant_id=tenant_id,
+        idempotency_key=key,
+        customer_id=customer_id,
+        channel=channel,
+        subject="Oi",
+        body=f"Mensagem {key}",
+        **fields,
+    )
+    db_session.add(notif)
+    db_session.flush()
+    return notif
+
+
+def test_dispatcher_reserva_envia_em_paralelo_e_grava_resultado_em_lote(
+    db_session, tenant_id
+):
+    loja = User(
+        email=f"loja-{uuid4().hex[:6]}@example.com",
+        nome="Loja",
+        tenant_id=tenant_id,
+        is_active=True,
+        hashed_password="hash",
+    )
+    db_session.add(loja)
+    db_session.flush()
+    ana = _app_customer(
+        db_session,
+        tenant_id,
+        loja,
+        "Ana",
+        ["ExponentPushToken[ana-1]", "ExponentPushToken[ana-velho]"],
+    )
+    bia = _app_customer(db_session, tenant_id, loja, "Bia", ["ExponentPushToken[bia]"])
+
+    emails = [
+        _queue(
+            db_session,
+            tenant_id,
+            f"inactivity:{n}:email",
+            NotificationChannelEnum.email,
+            email_address=f"cliente{n}@example.com",
+        )
+        for n in range(5)
+    ]
+    recusado = _queue(
+        db_session,
+        tenant_id,
+        "inactivity:recusado:email",
+        NotificationChannelEnum.email,
+        email_address="bloqueado@example.com",
+    )
+    push_ana = _queue(
+        db_session,
+        tenant_id,
+        "bday:1:ana:push",
+        NotificationChannelEnum.push,
+        customer_id=ana.id,
+        source="campaign",
+        kind="birthday_customer",
+    )
+    push_bia = _queue(
+        db_session,
+        tenant_id,
+        "bday:1:bia:push",
+        NotificationChannelEnum.push,
+        customer_id=bia.id,
+    )
+    # Reserva abandonada ha 1h volta para a fila; reserva recente nao
+    abandonada = _queue(
+        db_session,
+        tenant_id,
+        "inactivity:abandonada:email",
+        NotificationChannelEnum.email,
+        email_address="abandonada@example.com",
+        status=NotificationStatusEnum.sending,
+        claimed_at=datetime.now(timezone.utc) - timedelta(hours=1),
+    )
+    em_andamento = _queue(
+        db_session,
+        tenant_id,
+        "inactivity:em-andamento:email",
+        NotificationChannelEnum.email,
+        email_address="andamento@example.com",
+        status=NotificationStatusEnum.sending,
+        claimed_at=datetime.now(timezone.utc),
+    )
+
+    with (
+        FakeSmtpServer(reject={"bloqueado@example.com"}) as smtp,
+        FakeExpoPushServer(invalid_tokens={"ExponentPushToken[ana-velho]"}) as expo,
+    ):
+        dispatcher = NotificationDispatcher(
+            lambda: db_session,
+            max_workers=2,
+            smtp_factory=lambda: smtplib.SMTP(smtp.host, smtp.port, timeout=5),
+            push_url=expo.url,
+        )
+        stats = dispatcher.dispatch()
+
+    assert stats["processed"] == 9
+    assert stats["sent"] == 8
+    assert stats["failed"] == 1
+    assert stats["channels"]["email"]["sent"] == 6
+    assert stats["channels"]["email"]["failed"] == 1
+    assert stats["channels"]["push"]["sent"] == 2
+    assert stats["channels"]["push"]["failed"] == 1
+
+    # Um worker = uma conexao SMTP reaproveitada (o recusado nao derruba a conexao)
+    assert smtp.connections == 2
+    assert sorted(m["to"][0] for m in smtp.messages) == sorted(
+        [e.email_address for e in emails] + ["abandonada@example.com"]
+    )
+    # Os tres destinos de push vao numa unica requisicao
+    assert len(expo.requests) == 1
+    assert sorted(m["to"] for m in expo.requests[0]) == [
+        "ExponentPushToken[ana-1]",
+        "ExponentPushToken[ana-velho]",
+        "ExponentPushToken[bia]",
+    ]
+
+    db_session.expire_all()
+    status = {
+        row.idempotency_key: (row.status, row.retry_count, row.claimed_at)
+        for row in db_session.query(NotificationQueue).filter(
+            NotificationQueue.tenant_id == tenant_id
+        )
+    }
+    for notif in emails + [push_ana, push_bia, abandonada]:
+        assert status[notif.idempotency_key] == (NotificationStatusEnum.sent, 0, None)
+    assert status[recusado.idempotency_key] == (NotificationStatusEnum.pending, 1, None)
+    assert status[em_andamento.idempotency_key][0] == NotificationStatusEnum.sending
+
+    dispositivos = {
+        d.expo_push_token: d
+        for d in db_session.query(UserPushDevice).filter(
+            UserPushDevice.tenant_id == tenant_id
+        )
+    }
+    assert dispositivos["ExponentPushToken[ana-velho]"].enabled is False
+    assert dispositivos["ExponentPushToken[ana-1]"].last_ticket_id.startswith("ticket-")
+    app_notification = (
+        db_session.query(AppNotification)
+        .filter(AppNotification.idempotency_key == push_ana.idempotency_key)
+        .one()
+    )
+    assert app_notification.delivered_at is not None
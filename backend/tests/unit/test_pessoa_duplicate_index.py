@@ -0,0 +1,161 @@
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.models import Cliente
+from app.pessoa_duplicidade_models import (
+    PessoaChaveDuplicidade,
+    PessoaIndiceDuplicidade,
+)
+from app.services import pessoa_duplicate_index
+from app.services.pessoa_duplicate_service import (
+    chave_fonetica_nome,
+    listar_sugestoes_duplicidade_pessoas,
+)
+from app.tenancy.context import tenant_context
+
+
+def _cliente(db_session, tenant_id, nome, **kwargs):
+    cliente = Cliente(tenant_id=tenant_id, user_id=1, nome=nome, **kwargs)
+    db_session.add(cliente)
+    db_session.flush()
+    return cliente
+
+
+def _chaves(db_session, cliente_id):
+    return {
+        (chave.tipo, chave.valor)
+        for chave in db_session.query(PessoaChaveDuplicidade).filter(
+            PessoaChaveDuplicidade.cliente_id == cliente_id
+        )
+    }
+
+
+def test_chave_fonetica_aproxima_grafias_comuns():
+    assert chave_fonetica_nome("Thaís de Souza") == chave_fonetica_nome("Tais Sousa")
+    assert chave_fonetica_nome("Guilherme Ximenes") == chave_fonetica_nome(
+        "Guilerme Chimenes"
+    )
+    assert chave_fonetica_nome("Rafaela Lima") != chave_fonetica_nome("Rafael Lima")
+
+
+def test_listener_mantem_chaves_ao_inserir_alterar_e_inativar(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+
+    with tenant_context(tenant_id):
+        cliente = _cliente(
+            db_session,
+            tenant_id,
+            "Maria Silva",
+            email="Maria@Email.com",
+            celular="(11) 98888-7777",
+        )
+        chaves = _chaves(db_session, cliente.id)
+        assert ("nome", "maria silva") in chaves
+        assert ("email", "maria@email.com") in chaves
+        assert ("telefone", "11988887777") in chaves
+
+        cliente.email = "nova@email.com"
+        db_session.flush()
+        chaves = _chaves(db_session, cliente.id)
+        assert ("email", "nova@email.com") in chaves
+        assert ("email", "maria@email.com") not in chaves
+
+        cliente.ativo = False
+        db_session.flush()
+        assert _chaves(db_session, cliente.id) == set()
+
+
+def test_listagem_le_candidatos_do_indice_reconstruido(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+
+    with tenant_context(tenant_id):
+        _cliente(db_session, tenant_id, "Joao Pereira", celular="11977776666")
+        _cliente(db_session, tenant_id, "João  Pereira", celular="11955554444")
+        _cliente(db_session, tenant_id, "Thais Souza", celular="11933332222")
+        _cliente(db_session, tenant_id, "Tais Sousa", telefone="(11) 93333-2222")
+        _cliente(db_session, tenant_id, "Carlos Alberto", celular="11911110000")
+        db_session.commit()
+
+        padrao = listar_sugestoes_duplicidade_pessoas(db_session, tenant_id=tenant_id)
+        com_semelhantes = listar_sugestoes_duplicidade_pessoas(
+            db_session, tenant_id=tenant_id, incluir_semelhantes=True
+        )
+
+        db_session.query(PessoaChaveDuplicidade).delete()
+        pessoa_duplicate_index.reconstruir_chaves_duplicidade_pessoas(
+            db_session, tenant_id
+        )
+        reconstruido = listar_sugestoes_duplicidade_pessoas(
+            db_session, tenant_id=tenant_id
+        )
+
+    # Grupos: nome "joao pereira" e, com semelhantes, a fonetica de Thais/Tais
+    # (a fonetica dos dois Joao repete o grupo de nome e nao conta)
+    assert padrao["total"] == 1
+    assert len(padrao["sugestoes"]) == 1
+    assert com_semelhantes["total"] == 2
+    assert len(com_semelhantes["sugestoes"]) == 2
+    assert reconstruido == padrao
+
+
+def test_indice_parcial_agenda_reconstrucao_em_segundo_plano(db_session, monkeypatch):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    agendados = []
+    monkeypatch.setattr(
+        pessoa_duplicate_index, "_agendar_reconstrucao", agendados.append
+    )
+
+    with tenant_context(tenant_id):
+        # Chaves gravadas pelo listener nao tornam o indice completo
+        _cliente(db_session, tenant_id, "Ana Lima", celular="11944443333")
+        db_session.commit()
+        assert db_session.query(PessoaChaveDuplicidade).count() > 0
+
+        assert not pessoa_duplicate_index.garantir_chaves_duplicidade_pessoas(
+            db_session, tenant_id
+        )
+        assert agendados == [tenant_id]
+
+        pessoa_duplicate_index.reconstruir_chaves_duplicidade_pessoas(
+            db_session, tenant_id
+        )
+        db_session.commit()
+        assert pessoa_duplicate_index.garantir_chaves_duplicidade_pessoas(
+            db_session, tenant_id
+        )
+        pessoa_duplicate_index.reconstruir_chaves_duplicidade_pessoas(
+            db_session, tenant_id
+        )
+        assert db_session.query(PessoaIndiceDuplicidade).count() == 1
+
+    assert agendados == [tenant_id]
+
+
+def test_listagem_pagina_grupos_no_banco(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+
+    with tenant_context(tenant_id):
+        for nome in ("Bruna Reis", "Caio Prado", "Davi Rocha"):
+            _cliente(db_session, tenant_id, nome, celular="11900000001")
+            _cliente(db_session, tenant_id, nome, celular="11900000002")
+        _cliente(db_session, tenant_id, "Unico Nome")
+        db_session.commit()
+
+        primeira = listar_sugestoes_duplicidade_pessoas(
+            db_session, tenant_id=tenant_id, skip=0, limit=2
+        )
+        segunda = listar_sugestoes_duplicidade_pessoas(
+            db_session, tenant_id=tenant_id, skip=2, limit=2
+        )
+
+    assert primeira["total"] == segunda["total"] == 3
+    assert [item["chave_grupo"] for item in primeira["sugestoes"]] == [
+        "nome:bruna reis",
+        "nome:caio prado",
+    ]
+    assert [item["chave_grupo"] for item in segunda["sugestoes"]] == ["nome:davi rocha"]
@@ -0,0 +1,304 @@
+import io
+from uuid import uuid4
+
+import openpyxl
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models import Cliente
+from app.produtos_models import Produto
+from app.services.produto_importacao_planilha import (
+    ATUALIZACAO_PRODUTO,
+    importar_planilha_produtos,
+    ler_linhas_planilha,
+    validar_lote,
+)
+from app.services.produto_upsert_lote import (
+    MODO_SUBSTITUIR,
+    _tabela,
+    comando_mescla_postgres,
+)
+from app.tenancy.context import tenant_context
+
+
+def _linha(sku, nome, preco_venda, **extras):
+    valores = {
+        "sku": sku,
+        "nome": nome,
+        "preco_venda": preco_venda,
+        **extras,
+    }
+    ordem = (
+        "sku",
+        "nome",
+        "descricao",
+        "categoria",
+        "marca",
+        "fornecedor",
+        "codigo_barras",
+        "preco_custo",
+        "preco_venda",
+        "estoque_inicial",
+        "estoque_minimo",
+        "estoque_maximo",
+        "unidade",
+        "localizacao",
+        "status",
+        "ncm",
+    )
+    return tuple(valores.get(campo) for campo in ordem)
+
+
+def test_leitura_em_fluxo_de_csv_e_excel_ignora_linhas_vazias():
+    csv_bytes = (
+        "SKU;Nome;Descricao\nRA-1;Racao 1kg;\n;;\nRA-2;Racao 2kg;Premium\n"
+    ).encode("utf-8-sig")
+    linhas = list(ler_linhas_planilha(io.BytesIO(csv_bytes), "catalogo.csv"))
+    assert linhas == [
+        (2, ("RA-1", "Racao 1kg", "")),
+        (4, ("RA-2", "Racao 2kg", "Premium")),
+    ]
+
+    planilha = openpyxl.Workbook()
+    aba = planilha.active
+    aba.append(["SKU", "Nome"])
+    aba.append(["instrucoes", "instrucoes"])
+    aba.append(["BR-1", "Brinquedo"])
+    aba.append([None, None])
+    aba.append(["BR-2", "Bola"])
+    arquivo = io.BytesIO()
+    planilha.save(arquivo)
+    arquivo.seek(0)
+
+    linhas = list(ler_linhas_planilha(arquivo, "catalogo.xlsx"))
+    assert [(numero, valores[0]) for numero, valores in linhas] == [
+        (3, "BR-1"),
+        (5, "BR-2"),
+    ]
+
+
+def test_validacao_do_bloco_aponta_obrigatorios_e_numeros_invalidos():
+    validos, erros = validar_lote(
+        [
+            (3, _linha("ok-1", "Racao", "10,50", preco_custo="7.25", ncm=23091000.0)),
+            (4, _linha(None, "Sem SKU", "5")),
+            (5, _linha("x-1", "Preco ruim", "abc")),
+            (6, _linha("x-2", "Custo ruim", "5", preco_custo="R$ 1")),
+        ]
+    )
+
+    assert validos["codigo"].tolist() == ["OK-1"]
+    valido = validos.iloc[0]
+    assert valido["preco_venda"] == 10.5
+    assert valido["preco_custo"] == 7.25
+    assert valido["ncm"] == "23091000"
+    assert valido["unidade"] == "UN"
+    assert bool(valido["ativo"]) is True
+    assert [
+        (erro["linha"], erro["erro"])
+        for erro in sorted(erros, key=lambda e: e["linha"])
+    ] == [
+        (4, "Campos obrigatórios faltando (SKU, Nome ou Preço Venda)"),
+        (5, "Erro ao converter números: preco_venda"),
+        (6, "Erro ao converter números: preco_custo"),
+    ]
+
+
+def test_importacao_cria_e_depois_atualiza_pelo_sku(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    with tenant_context(tenant_id):
+        resumo = importar_planilha_produtos(
+            db_session,
+            tenant_id=tenant_id,
+            user_id=1,
+            linhas=[
+                (
+                    3,
+                    _linha(
+                        "ra-1",
+                        "Racao",
+                        "10",
+                        preco_custo="6",
+                        estoque_inicial="4",
+                        ncm="23091000",
+                        status="Ativo",
+                    ),
+                ),
+                (
+                    4,
+                    _linha(
+                        "ra-2", "Petisco", "5", categoria="Petiscos", marca="Marca A"
+                    ),
+                ),
+                (5, _linha("ra-3", "Areia", "8", fornecedor="Inexistente")),
+            ],
+        )
+        assert resumo["total_criados"] == 2
+        assert resumo["total_atualizados"] == 0
+        assert resumo["total_erros"] == 1
+        assert (
+            resumo["erros"][0]["erro"]
+            == 'Fornecedor "Inexistente" não encontrado no sistema'
+        )
+
+        resumo = importar_planilha_produtos(
+            db_session,
+            tenant_id=tenant_id,
+            user_id=1,
+            linhas=[
+                (
+                    3,
+                    _linha(
+                        "RA-1",
+                        "Racao Premium",
+                        "12",
+                        preco_custo="7",
+                        estoque_inicial="99",
+                        status="Inativo",
+                    ),
+                ),
+            ],
+        )
+        assert resumo["total_criados"] == 0
+        assert resumo["total_atualizados"] == 1
+
+        db_session.expire_all()
+        produtos = {
+            produto.codigo: produto
+            for produto in db_session.query(Produto).filter(
+                Produto.tenant_id == tenant_id
+            )
+        }
+
+    assert set(produtos) == {"RA-1", "RA-2"}
+    racao = produtos["RA-1"]
+    assert racao.nome == "Racao Premium"
+    assert float(racao.preco_venda) == 12
+    assert float(racao.estoque_atual) == 4  # estoque so vale na criacao
+    assert racao.ncm == "23091000"  # fiscal vazio na planilha nao apaga
+    assert racao.ativo is False
+    assert racao.anunciar_ecommerce is False
+    assert racao.user_id == 1
+    assert produtos["RA-2"].categoria_id is not None
+    assert produtos["RA-2"].marca_id is not None
+
+
+def test_importacao_resolve_fornecedor_existente(db_session):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    with tenant_context(tenant_id):
+        fornecedor = Cliente(
+            tenant_id=tenant_id,
+            user_id=1,
+            nome="Distribuidora Pet",
+            tipo_cadastro="fornecedor",
+        )
+        db_session.add(fornecedor)
+        db_session.flush()
+
+        resumo = importar_planilha_produtos(
+            db_session,
+            tenant_id=tenant_id,
+            user_id=1,
+            linhas=[(3, _linha("ar-1", "Areia", "8", fornecedor="distribuidora pet"))],
+        )
+        produto = db_session.query(Produto).filter(Produto.codigo == "AR-1").one()
+
+    assert resumo["total_erros"] == 0
+    assert produto.fornecedor_id == fornecedor.id
+
+
+def test_mescla_postgres_usa_conflito_pelo_indice_de_sku(db_session):
+    colunas = ["tenant_id", "codigo", "nome", "ncm", "anunciar_app", "updated_at"]
+    tabela = _tabela(db_session, colunas, uuid4())
+    comando = comando_mescla_postgres(tabela, colunas, ATUALIZACAO_PRODUTO)
+    sql = str(comando.compile(dialect=postgresql.dialect()))
+
+    assert "FROM tmp_produtos_lote" in sql
+    assert (
+        "ON CONFLICT (tenant_id, lower(trim(codigo))) "
+        "WHERE codigo IS NOT NULL AND trim(codigo) != '' DO UPDATE"
+    ) in sql
+    assert "coalesce(excluded.ncm, produtos.ncm)" in sql
+    assert "produtos.anunciar_app AND excluded.anunciar_app" in sql
+
+
+def test_alvo_do_conflito_e_identico_ao_indice_parcial_de_sku(db_session):
+    indice = next(
+        indice
+        for indice in Produto.__table__.indexes
+        if indice.name == "ux_produtos_tenant_codigo_lower"
+    )
+    ddl = str(CreateIndex(indice).compile(dialect=postgresql.dialect()))
+    # "(tenant_id, lower(trim(codigo))) WHERE ..." do CREATE UNIQUE INDEX
+    expressao_e_predicado = ddl.split(" ON produtos ", 1)[1].strip()
+
+    colunas = ["tenant_id", "codigo", "nome"]
+    tabela = _tabela(db_session, colunas, uuid4())
+    for atualizar in (None, {"nome": MODO_SUBSTITUIR}):
+        sql = str(
+            comando_mescla_postgres(tabela, colunas, atualizar).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+        assert f"ON CONFLICT {expressao_e_predicado} DO" in sql
+
+
+def test_falha_ao_enfileirar_custo_fica_no_savepoint_do_produto(
+    db_session, monkeypatch
+):
+    from app.services.bling_cost_sync_service import BlingCostSyncService
+    from app.services.produto_importacao_planilha import _enfileirar_custos_bling
+
+    chamadas = []
+
+    def enfileirar(db, *, produto_id, **_kwargs):
+        chamadas.append((produto_id, db.in_nested_transaction()))
+        if produto_id == 1:
+            raise RuntimeError("falha no enfileiramento")
+        return {"ok": True}
+
+    monkeypatch.setattr(
+        BlingCostSyncService, "queue_product_cost_sync", staticmethod(enfileirar)
+    )
+
+    _enfileirar_custos_bling(db_session, [(1, 10.0), (2, 20.0)])
+
+    assert chamadas == [(1, True), (2, True)]
+    assert db_session.in_transaction()
+    assert not db_session.in_nested_transaction()
+
+
+def test_importacao_sem_progresso_aparece_como_erro():
+    from datetime import datetime, timedelta, timezone
+
+    from app.importacao_produtos import _resumo_importacao
+    from app.importacao_produtos_models import ImportacaoProdutos
+    from app.services.produto_importacao_planilha import (
+        SEM_PROGRESSO_MAX,
+        importacao_interrompida,
+    )
+
+    agora = datetime.now(timezone.utc)
+    importacao = ImportacaoProdutos(
+        id=7,
+        arquivo_nome="catalogo.xlsx",
+        status="processando",
+        total_linhas=10000,
+        linhas_processadas=4000,
+        total_erros=0,
+        updated_at=agora - timedelta(minutes=1),
+    )
+    assert not importacao_interrompida(importacao, agora)
+    assert _resumo_importacao(importacao)["status"] == "processando"
+
+    # Sem fuso (SQLite) conta como UTC
+    importacao.updated_at = (agora - SEM_PROGRESSO_MAX * 2).replace(tzinfo=None)
+    assert importacao_interrompida(importacao, agora)
+    resumo = _resumo_importacao(importacao)
+    assert resumo["status"] == "erro"
+    assert "4000 linhas" in resumo["erro"]
+    assert resumo["total_processado"] == 4000
+    assert importacao.status == "processando"  # a consulta nao grava
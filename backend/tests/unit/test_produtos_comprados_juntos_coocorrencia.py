@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from app.events import ProdutoVendidoEvent
+from app.read_models.coocorrencia import MatrizCoocorrencia
+from app.read_models.produtos_comprados_juntos import ProdutosCompradosJuntosReadModel
+
+
+def _evento(venda_id, produto_id, preco=10.0, user_id=1, quando=None):
+    return ProdutoVendidoEvent(
+        user_id=user_id,
+        timestamp=quando or datetime.now(),
+        venda_id=venda_id,
+        produto_id=produto_id,
+        produto_nome=f"Produto {produto_id}",
+        tipo_produto="SIMPLES",
+        quantidade=1.0,
+        preco_unitario=preco,
+        preco_total=preco,
+        estoque_anterior=10.0,
+        estoque_novo=9.0,
+    )
+
+
+def _read_model(eventos):
+    matriz = MatrizCoocorrencia()
+    for evento in eventos:
+        matriz.registrar_evento(evento)
+    return ProdutosCompradosJuntosReadModel(matriz=matriz)
+
+
+def test_produtos_comprados_juntos_conta_vendas_confianca_e_valor_medio():
+    read_model = _read_model(
+        [
+            _evento(1, 100),
+            _evento(1, 200, preco=20.0),
+            _evento(2, 100),
+            _evento(2, 200, preco=30.0),
+            _evento(2, 300),
+            _evento(3, 100),
+            # Evento repetido da mesma venda nao conta duas vezes
+            _evento(3, 100),
+            _evento(4, 200, user_id=2),
+            _evento(4, 100, user_id=2),
+        ]
+    )
+
+    sugestoes = read_model.produtos_comprados_juntos(
+        produto_id=100, user_id=1, min_ocorrencias=1
+    )
+
+    assert [s["produto_id"] for s in sugestoes] == [200, 300]
+    assert sugestoes[0]["frequencia"] == 2
+    assert sugestoes[0]["confianca"] == 66.67
+    assert sugestoes[0]["valor_medio_combinado"] == 25.0
+    assert sugestoes[0]["total_vendas_produto_original"] == 3
+    assert read_model.produtos_comprados_juntos(produto_id=100, user_id=1) == [
+        sugestoes[0]
+    ]
+
+
+def test_decaimento_prioriza_recentes_e_janela_filtra_por_dias():
+    antigo = datetime.now() - timedelta(days=200)
+    eventos = []
+    for venda_id in range(1, 4):
+        eventos += [
+            _evento(venda_id, 1, quando=antigo),
+            _evento(venda_id, 2, quando=antigo),
+        ]
+    for venda_id in range(10, 12):
+        eventos += [_evento(venda_id, 1), _evento(venda_id, 3)]
+    read_model = _read_model(eventos)
+
+    decaido = read_model.produtos_comprados_juntos(produto_id=1, user_id=1)
+    assert [s["produto_id"] for s in decaido] == [3, 2]
+
+    recentes = read_model.produtos_comprados_juntos(produto_id=1, user_id=1, dias=30)
+    assert [(s["produto_id"], s["frequencia"]) for s in recentes] == [(3, 2)]
+    assert recentes[0]["confianca"] == 100.0
+
+
+def test_pares_e_analise_cesta_venda_usam_a_matriz():
+    read_model = _read_model(
+        [
+            _evento(1, 1),
+            _evento(1, 2),
+            _evento(2, 1),
+            _evento(2, 2),
+            _evento(2, 3),
+            _evento(3, 1),
+        ]
+    )
+
+    pares = read_model.produtos_que_aparecem_juntos(user_id=1, min_ocorrencias=1)
+    assert [(p["produto1_id"], p["produto2_id"], p["frequencia"]) for p in pares][
+        0
+    ] == (1, 2, 2)
+
+    analise = read_model.analise_cesta_venda(venda_id=3, user_id=1)
+    assert [p["produto_id"] for p in analise["produtos"]] == [1]
+    assert [s["produto_id"] for s in analise["sugestoes"]] == [2, 3]
+    assert analise["sugestoes"][0]["score"] == 66.67
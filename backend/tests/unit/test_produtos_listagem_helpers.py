@@ -94,6 +94,7 @@ class _FakePageQuery:
         self.rows = rows
         self.total = total
         self.count_calls = 0
+        self.filters = []
         self.options_args = []
         self.order_by_args = []
         self.offset_arg = None
@@ -103,6 +104,10 @@ class _FakePageQuery:
         self.count_calls += 1
         return self.total
 
+    def filter(self, *expressions):
+        self.filters.append(expressions)
+        return self
+
     def options(self, *options):
         self.options_args.extend(options)
         return self
@@ -619,3 +624,41 @@ def test_load_options_listagem_produtos_preserva_quantidade_ao_alternar_flags():
     )
 
     assert len(sem_imagens_com_lotes) == 4
+
+
+def test_buscar_produtos_por_codigo_barras_faz_uma_consulta_sem_contagem():
+    produto = SimpleNamespace(id=12)
+    query = _FakePageQuery([produto, None], total=99)
+
+    produtos = produtos_listagem._buscar_produtos_por_codigo_barras(
+        query,
+        "7898242030076",
+        limit=20,
+    )
+
+    assert produtos == [produto]
+    assert query.count_calls == 0
+    assert len(query.filters) == 1
+    assert "7898242030076" in str(
+        query.filters[0][0].compile(compile_kwargs={"literal_binds": True})
+    )
+    assert query.limit_arg == 20
+    assert query.offset_arg is None
+
+
+def test_aplicar_busca_produtos_filtra_cada_palavra():
+    query = _FakeProdutoQuery()
+
+    resultado = produtos_listagem._aplicar_busca_produtos(
+        query, termo_busca="racao  gato", busca_completa=False
+    )
+
+    assert resultado is query
+    assert len(query.filters) == 2
+    assert (
+        produtos_listagem._aplicar_busca_produtos(
+            query, termo_busca="", busca_completa=True
+        )
+        is query
+    )
+    assert len(query.filters) == 2
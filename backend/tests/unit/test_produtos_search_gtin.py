@@ -1,7 +1,9 @@
 from app.produtos.search import (
     _build_produto_search_order_clause,
+    _produto_codigo_exato_condition,
     _produto_search_conditions,
     _produto_search_conditions_fast,
+    _termo_codigo_barras,
 )
 
 
@@ -33,3 +35,56 @@ def test_busca_rapida_encontra_palavra_interna_do_sku_com_espacos():
 
     assert primeira_condicao.left.name == "codigo"
     assert primeira_condicao.right.value == "%TESTE%"
+
+
+def test_atalho_de_codigo_de_barras_reconhece_apenas_eans_bipados():
+    assert _termo_codigo_barras(" 7898242030076 ") == "7898242030076"
+    assert _termo_codigo_barras("78912345") == "78912345"
+    assert _termo_codigo_barras("17898242030073") == "17898242030073"
+    assert _termo_codigo_barras("0186361") is None
+    assert _termo_codigo_barras("789824203007A") is None
+    assert _termo_codigo_barras("7898 242030076") is None
+    assert _termo_codigo_barras(None) is None
+
+
+def test_atalho_de_codigo_de_barras_usa_igualdade_nos_codigos_indexados():
+    expressao = str(_produto_codigo_exato_condition("7898242030076"))
+
+    assert "lower(trim(produtos.codigo))" in expressao
+    assert "produtos.codigo_barras =" in expressao
+    assert "produtos.gtin_ean =" in expressao
+    assert "produtos.gtin_ean_tributario =" in expressao
+    assert "LIKE" not in expressao.upper()
+
+
+def test_atalho_repete_o_predicado_do_indice_parcial_do_sku():
+    from sqlalchemy.dialects import postgresql
+
+    sql = str(
+        _produto_codigo_exato_condition("Ra-1").compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+    # WHERE do ux_produtos_tenant_codigo_lower (trim vira btrim no PostgreSQL)
+    assert (
+        "produtos.codigo IS NOT NULL AND trim(produtos.codigo) != '' "
+        "AND lower(trim(produtos.codigo)) = 'ra-1'"
+    ) in sql
+
+
+def test_busca_rapida_por_digitos_usa_colunas_geradas_sem_regexp_por_linha():
+    from sqlalchemy.dialects import postgresql
+
+    sql = str(
+        _produto_search_conditions_fast("7891-234").compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    ).replace("%%", "%")
+
+    assert "regexp_replace" not in sql
+    assert "produtos.codigos_digitos LIKE '% 7891234%'" in sql
+    assert "produtos.codigos_alternativos_digitos LIKE '%7891234%'" in sql
+    # Igualdades redundantes com os ILIKE saem do OR
+    assert "produtos.codigo_barras = " not in sql
+    assert "produtos.gtin_ean ILIKE '7891-234%'" in sql
@@ -0,0 +1,118 @@
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ["DEBUG"] = "false"
+
+from app.auth.core import ALGORITHM
+from app.config import JWT_SECRET_KEY
+from app.middlewares.rate_limit import RATE_LIMIT_AUTH_MAX, rate_limit_store
+from app.middlewares.request_pipeline import RequestPipelineMiddleware
+from app.security import request_claims
+from app.security.jwt_compat import JWTError, jwt
+from app.tenancy.context import get_current_tenant, set_current_tenant
+
+
+def _token(payload: dict) -> str:
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=ALGORITHM)
+
+
+@pytest.fixture()
+def client():
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+
+    @app.get("/vendas/")
+    def vendas(request: Request):
+        token = request.headers["authorization"].split(" ", 1)[1]
+        return {"claims": request_claims.get_request_claims(request, token)}
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.post("/auth/login")
+    def login():
+        return {"ok": True}
+
+    @app.get("/tenant")
+    async def tenant():
+        set_current_tenant(uuid4())
+        return {"ok": True}
+
+    rate_limit_store.clear()
+    try:
+        yield TestClient(app, base_url="https://testserver")
+    finally:
+        rate_limit_store.clear()
+
+
+def test_pipeline_adiciona_request_id_e_headers_de_seguranca(client):
+    response = client.get("/health", headers={"X-Request-ID": "req-123"})
+
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == "req-123"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["strict-transport-security"].startswith("max-age=")
+
+
+def test_pipeline_bloqueia_jwt_sem_tenant(client):
+    response = client.get(
+        "/vendas/", headers={"Authorization": f"Bearer {_token({'sub': '1'})}"}
+    )
+
+    assert response.status_code == 401
+    assert response.json()["detail"].startswith("Tenant nao selecionado")
+
+
+def test_pipeline_decodifica_token_uma_vez_e_reaproveita_claims(client, monkeypatch):
+    token = _token({"sub": "1", "tenant_id": str(uuid4()), "jti": "abc"})
+    calls = []
+    original = request_claims.decode_access_claims
+
+    def _counting_decode(value):
+        calls.append(value)
+        return original(value)
+
+    monkeypatch.setattr(
+        "app.middlewares.request_pipeline.decode_access_claims", _counting_decode
+    )
+    monkeypatch.setattr(request_claims, "decode_access_claims", _counting_decode)
+
+    response = client.get("/vendas/", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json()["claims"]["jti"] == "abc"
+    assert calls == [token]
+    assert "x-ratelimit-remaining" in response.headers
+
+
+def test_claims_em_cache_preservam_erro_de_token_invalido():
+    class _Request:
+        scope = {"state": {request_claims.REQUEST_CLAIMS_STATE_KEY: ("ruim", None)}}
+
+    with pytest.raises(JWTError):
+        request_claims.get_request_claims(_Request(), "ruim")
+
+
+def test_pipeline_rate_limit_responde_429_com_headers_de_seguranca(client):
+    for _ in range(RATE_LIMIT_AUTH_MAX):
+        assert client.post("/auth/login").status_code == 200
+
+    response = client.post("/auth/login")
+
+    assert response.status_code == 429
+    assert response.headers["x-ratelimit-remaining"] == "0"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "x-request-id" not in response.headers
+
+
+def test_pipeline_limpa_tenant_ao_final_da_request(client):
+    response = client.get("/tenant")
+
+    assert response.status_code == 200
+    assert get_current_tenant() is None
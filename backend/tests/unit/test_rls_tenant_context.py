@@ -169,3 +169,78 @@ def test_rls_before_flush_hook_syncs_current_tenant(monkeypatch):
     rls._sync_rls_before_flush(fake_session, flush_context=object(), instances=None)
 
     assert calls == [(fake_session, TENANT_ID)]
+
+
+class FakeTransaction:
+    pass
+
+
+class TransactionalFakeConnection(FakeConnection):
+    def __init__(self):
+        super().__init__()
+        self.info = {}
+        self.transaction = FakeTransaction()
+        self.nested = None
+
+    def get_transaction(self):
+        return self.transaction
+
+    def get_nested_transaction(self):
+        return self.nested
+
+
+def _transactional_session():
+    session = FakeSession("postgresql")
+    session.connection_obj = TransactionalFakeConnection()
+    return session
+
+
+def test_rls_sync_skips_set_config_already_applied_in_transaction():
+    from app.tenancy.rls import get_rls_sync_stats, sync_rls_tenant
+
+    session = _transactional_session()
+    before = get_rls_sync_stats()
+
+    for _ in range(20):
+        assert sync_rls_tenant(session, TENANT_ID) is True
+
+    after = get_rls_sync_stats()
+    assert len(session.connection_obj.calls) == 1
+    assert after["applied"] - before["applied"] == 1
+    assert after["skipped"] - before["skipped"] == 19
+
+
+def test_rls_sync_reapplies_when_tenant_or_transaction_changes():
+    from app.tenancy.rls import sync_rls_tenant
+
+    session = _transactional_session()
+    connection = session.connection_obj
+    other_tenant = UUID("22222222-2222-2222-2222-222222222222")
+
+    sync_rls_tenant(session, TENANT_ID)
+    sync_rls_tenant(session, other_tenant)
+    sync_rls_tenant(session, other_tenant)
+    connection.transaction = FakeTransaction()  # commit + nova transacao
+    sync_rls_tenant(session, other_tenant)
+
+    assert [params["setting_value"] for _sql, params in connection.calls] == [
+        str(TENANT_ID),
+        str(other_tenant),
+        str(other_tenant),
+    ]
+
+
+def test_rls_sync_reapplies_inside_and_after_savepoint():
+    from app.tenancy.rls import sync_rls_tenant
+
+    session = _transactional_session()
+    connection = session.connection_obj
+
+    sync_rls_tenant(session, TENANT_ID)
+    connection.nested = FakeTransaction()
+    sync_rls_tenant(session, TENANT_ID)
+    sync_rls_tenant(session, TENANT_ID)
+    connection.nested = None  # ROLLBACK TO SAVEPOINT
+    sync_rls_tenant(session, TENANT_ID)
+
+    assert len(connection.calls) == 3
@@ -0,0 +1,112 @@
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.api.endpoints.rotas_entrega_otimizacao_routes import (
+    DistribuirEntregadoresRequest,
+    distribuir_vendas_entre_entregadores,
+)
+from app.models import Cliente, ConfiguracaoEntrega, User
+from app.services import roteirizacao_local
+from app.tenancy.context import tenant_context
+from app.vendas_models import Venda
+
+LOJA = (-23.55, -46.63)
+
+
+def _venda(tenant_id, user, numero, km, status_entrega, entregador_id=None):
+    return Venda(
+        tenant_id=tenant_id,
+        user_id=user.id,
+        vendedor_id=user.id,
+        numero_venda=numero,
+        subtotal=Decimal("50"),
+        total=Decimal("50"),
+        status="finalizada",
+        tem_entrega=True,
+        endereco_entrega=f"Rua {numero}, {km}",
+        status_entrega=status_entrega,
+        entregador_id=entregador_id,
+        ordem_entrega_otimizada=9 if entregador_id else None,
+    )
+
+
+def test_distribuicao_ignora_despachadas_e_limpa_nao_atendidas(db_session, monkeypatch):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    with tenant_context(tenant_id):
+        user = User(
+            email=f"loja-{uuid4().hex[:6]}@example.com",
+            nome="Loja",
+            tenant_id=tenant_id,
+            is_active=True,
+            hashed_password="hash",
+        )
+        db_session.add(user)
+        db_session.flush()
+        entregador = Cliente(
+            tenant_id=tenant_id,
+            user_id=user.id,
+            nome="Entregador",
+            is_entregador=True,
+            entregador_ativo=True,
+        )
+        db_session.add_all(
+            [
+                entregador,
+                ConfiguracaoEntrega(
+                    tenant_id=tenant_id,
+                    user_id=user.id,
+                    logradouro="Rua da Loja",
+                    numero="100",
+                ),
+            ]
+        )
+        db_session.flush()
+        vendas = [
+            _venda(tenant_id, user, "V-1", 1, "pendente"),
+            _venda(tenant_id, user, "V-2", 2, None, entregador_id=entregador.id),
+            _venda(tenant_id, user, "V-3", 3, "em_rota", entregador_id=entregador.id),
+        ]
+        db_session.add_all(vendas)
+        db_session.flush()
+
+        monkeypatch.setattr(
+            roteirizacao_local,
+            "matriz_por_enderecos",
+            lambda origem, enderecos: roteirizacao_local.matriz_por_coordenadas(
+                [
+                    LOJA,
+                    *(
+                        (LOJA[0], LOJA[1] + int(e.rsplit(",", 1)[1]) * 0.0098)
+                        for e in enderecos
+                    ),
+                ]
+            ),
+        )
+        resposta = distribuir_vendas_entre_entregadores(
+            DistribuirEntregadoresRequest(
+                venda_ids=[v.id for v in vendas],
+                entregador_ids=[entregador.id],
+                capacidade_por_entregador=1,
+            ),
+            db=db_session,
+            user_and_tenant=(user, tenant_id),
+        )
+
+        assert resposta["total_otimizado"] == 1
+        assert resposta["entregadores"][0]["ordem"] == ["V-1"]
+        assert resposta["nao_atendidas"] == ["V-2"]
+        assert (vendas[0].entregador_id, vendas[0].ordem_entrega_otimizada) == (
+            entregador.id,
+            1,
+        )
+        # Sem vaga: perde o entregador/ordem da distribuicao anterior
+        assert (vendas[1].entregador_id, vendas[1].ordem_entrega_otimizada) == (
+            None,
+            None,
+        )
+        # Ja despachada: fora da distribuicao
+        assert vendas[2].entregador_id == entregador.id
+        assert vendas[2].ordem_entrega_otimizada == 9
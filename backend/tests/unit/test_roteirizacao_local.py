@@ -0,0 +1,221 @@
+from uuid import uuid4
+
+import pytest
+
+from app.services.google_maps_cache import cache_google_maps
+from app.services.google_maps_providers import ProvedorMapsLocal, definir_provedor_maps
+from app.services.google_maps_service import (
+    calcular_matriz_distancias,
+    calcular_rota_otimizada,
+)
+from app.services import roteirizacao_local
+from app.services.roteirizacao_local import (
+    EntregadorRoteirizacao,
+    ParadaRoteirizacao,
+    matriz_por_coordenadas,
+    matriz_por_enderecos,
+    planejar_rotas,
+)
+from app.tenancy.context import tenant_context
+
+LOJA = (-23.55, -46.63)
+
+
+def _leste(km: float):
+    # ~0,0098 grau de longitude por km nessa latitude
+    return (LOJA[0], LOJA[1] + km * 0.0098)
+
+
+@pytest.fixture(autouse=True)
+def aquecimentos(monkeypatch):
+    """Aquecimento do cache sem thread: o teste roda quando quiser."""
+    agendados = []
+    monkeypatch.setattr(
+        roteirizacao_local,
+        "_agendar_aquecimento",
+        lambda tenant, grupos: agendados.append((tenant, grupos)),
+    )
+    return agendados
+
+
+class _SessaoDoTeste:
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def close(self):
+        pass
+
+
+def test_rota_unica_desfaz_zigue_zague_com_2opt():
+    distancias_km = [5, 1, 4, 2, 3]
+    matriz = matriz_por_coordenadas([LOJA, *(_leste(km) for km in distancias_km)])
+
+    plano = planejar_rotas(
+        matriz,
+        [ParadaRoteirizacao() for _ in distancias_km],
+        [EntregadorRoteirizacao()],
+        retorna_origem=False,
+    )
+
+    assert plano.rotas[0].paradas == [1, 3, 4, 2, 0]
+    assert plano.custo_final_s <= plano.custo_inicial_s
+    assert plano.rotas[0].distancia_m == pytest.approx(5 * 1300, rel=0.01)
+
+
+def test_varios_entregadores_respeitam_capacidade_e_regiao():
+    oeste = [(LOJA[0], LOJA[1] - km * 0.0098) for km in (2, 3, 4)]
+    leste = [_leste(km) for km in (2, 3, 4)]
+    matriz = matriz_por_coordenadas([LOJA, *oeste, *leste])
+
+    plano = planejar_rotas(
+        matriz,
+        [ParadaRoteirizacao() for _ in range(6)],
+        [
+            EntregadorRoteirizacao(chave="ana", capacidade=3),
+            EntregadorRoteirizacao(chave="bia", capacidade=3),
+        ],
+    )
+
+    regioes = sorted(sorted(rota.paradas) for rota in plano.rotas)
+    assert regioes == [[0, 1, 2], [3, 4, 5]]
+    assert plano.nao_atendidas == []
+
+    sem_vaga = planejar_rotas(
+        matriz,
+        [ParadaRoteirizacao() for _ in range(6)],
+        [EntregadorRoteirizacao(capacidade=2), EntregadorRoteirizacao(capacidade=2)],
+    )
+    assert len(sem_vaga.nao_atendidas) == 2
+    assert all(len(rota.paradas) <= 2 for rota in sem_vaga.rotas)
+
+
+def test_janela_de_horario_e_jornada():
+    oeste = (LOJA[0], LOJA[1] - 5 * 0.0098)
+    matriz = matriz_por_coordenadas([LOJA, _leste(1), _leste(2), oeste])
+    paradas = [
+        ParadaRoteirizacao(),
+        ParadaRoteirizacao(),
+        # 6,5 km a 30 km/h = 780 s: só dá para chegar se for a primeira
+        ParadaRoteirizacao(janela_fim_s=900, tempo_servico_s=120),
+    ]
+
+    plano = planejar_rotas(matriz, paradas, [EntregadorRoteirizacao()])
+    rota = plano.rotas[0]
+    assert plano.nao_atendidas == []
+    assert rota.paradas[0] == 2 and sorted(rota.paradas) == [0, 1, 2]
+    assert rota.chegadas_s[0] <= 900
+
+    curta = planejar_rotas(
+        matriz,
+        [ParadaRoteirizacao() for _ in range(3)],
+        [EntregadorRoteirizacao(jornada_s=700)],
+    )
+    assert curta.nao_atendidas == [2]
+    assert curta.rotas[0].duracao_s <= 700
+
+
+def test_rota_otimizada_usa_cache_de_distancias_sem_directions(db_session, monkeypatch):
+    loja = "Rua da Loja, 100, Sao Paulo, SP"
+    clientes = [f"Rua Cliente {i}, {i}0, Sao Paulo, SP" for i in range(1, 5)]
+    provedor = ProvedorMapsLocal()
+    definir_provedor_maps(provedor)
+    monkeypatch.setattr(
+        cache_google_maps, "_session_factory", lambda: _SessaoDoTeste(db_session)
+    )
+    try:
+        with tenant_context(uuid4()):
+            pontos = [loja, *clientes]
+            calcular_matriz_distancias(pontos, pontos)
+            assert matriz_por_enderecos(loja, clientes).pares_linha_reta == 0
+
+            ordem, legs = calcular_rota_otimizada(loja, clientes)
+    finally:
+        definir_provedor_maps(None)
+
+    assert sorted(ordem) == [0, 1, 2, 3]
+    assert len(legs) == 4
+    assert legs[0]["end_address"] == clientes[ordem[0]]
+    assert all(leg["distance"]["value"] > 0 for leg in legs)
+    assert provedor.chamadas["rota"] == 0
+    assert provedor.chamadas["geocode"] == 0
+    assert provedor.chamadas["matriz_distancias"] == 1
+
+
+class _ProvedorSemMatriz(ProvedorMapsLocal):
+    def matriz_distancias(self, origens, destinos):
+        self.chamadas["matriz_distancias"] += 1
+        raise Exception("Erro ao chamar Distance Matrix API: timeout")
+
+
+def test_pares_fora_do_cache_ficam_em_linha_reta_e_aquecem_fora_do_request(
+    db_session, monkeypatch, aquecimentos
+):
+    loja = "Rua da Loja, 100, Sao Paulo, SP"
+    clientes = [f"Rua Cliente {i}, {i}0, Sao Paulo, SP" for i in range(1, 9)]
+    provedor = ProvedorMapsLocal()
+    definir_provedor_maps(provedor)
+    monkeypatch.setattr(
+        cache_google_maps, "_session_factory", lambda: _SessaoDoTeste(db_session)
+    )
+    tenant_id = uuid4()
+    try:
+        with tenant_context(tenant_id):
+            matriz = matriz_por_enderecos(loja, clientes)
+            assert provedor.chamadas["matriz_distancias"] == 0
+            assert matriz.pares_linha_reta == 72
+
+            # A thread de aquecimento, aqui na sessão do teste
+            [(tenant, grupos)] = aquecimentos
+            roteirizacao_local.aquecer_cache_distancias(tenant_id=tenant, grupos=grupos)
+            aquecida = matriz_por_enderecos(loja, clientes)
+    finally:
+        definir_provedor_maps(None)
+
+    assert tenant == tenant_id
+    # Loja -> todas as paradas; parada -> 5 vizinhos mais próximos + loja
+    assert sorted(grupos[loja]) == sorted(clientes)
+    assert all(loja in grupos[c] and len(grupos[c]) in (5, 6) for c in clientes)
+    medidos = sum(len(destinos) for destinos in grupos.values())
+    assert provedor.chamadas["matriz_distancias"] == 9
+    assert aquecida.pares_em_cache == medidos
+    assert aquecida.pares_linha_reta == 72 - medidos
+
+
+def test_aquecimento_respeita_o_teto_de_elementos(monkeypatch):
+    monkeypatch.setattr(roteirizacao_local, "ELEMENTOS_AQUECIMENTO_MAX", 10)
+    pontos = ["loja", *(f"c{i}" for i in range(1, 7))]
+    faltantes = [(i, j) for i in range(7) for j in range(7) if i != j]
+    distancias = [[abs(i - j) for j in range(7)] for i in range(7)]
+
+    grupos = roteirizacao_local._pares_para_aquecer(pontos, faltantes, distancias)
+
+    assert grupos == {"loja": ["c1", "c2", "c3", "c4", "c5", "c6"]} | {
+        "c1": ["loja", "c2", "c3", "c4"]
+    }
+
+
+def test_sem_distance_matrix_a_linha_reta_fica_marcada_como_estimada(
+    db_session, monkeypatch
+):
+    loja = "Rua da Loja, 100, Sao Paulo, SP"
+    clientes = [f"Rua Cliente {i}, {i}0, Sao Paulo, SP" for i in range(1, 4)]
+    provedor = _ProvedorSemMatriz()
+    definir_provedor_maps(provedor)
+    monkeypatch.setattr(
+        cache_google_maps, "_session_factory", lambda: _SessaoDoTeste(db_session)
+    )
+    try:
+        with tenant_context(uuid4()):
+            matriz = matriz_por_enderecos(loja, clientes)
+            ordem, legs = calcular_rota_otimizada(loja, clientes)
+    finally:
+        definir_provedor_maps(None)
+
+    assert matriz.pares_linha_reta == 12
+    assert matriz.estimado(0, 1) and not matriz.estimado(1, 1)
+    assert sorted(ordem) == [0, 1, 2]
+    assert all(leg["estimado"] for leg in legs)
+    assert provedor.chamadas["geocode"] == 4
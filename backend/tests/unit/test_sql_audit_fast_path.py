@@ -0,0 +1,59 @@
+import pytest
+
+from app.db import sql_audit
+from app.db.sql_audit_context import is_tenant_safe_execution, tenant_safe_execution
+
+
+RAW_SQL = "SELECT COALESCE(SUM(valor), 0) FROM lancamentos_fast_path WHERE id = :id"
+
+
+@pytest.fixture(autouse=True)
+def _clean_audit(monkeypatch):
+    monkeypatch.setattr(sql_audit, "SQL_AUDIT_ENFORCE", False)
+    sql_audit.reset_audit_stats()
+    yield
+    sql_audit.reset_audit_stats()
+
+
+def _audit(statement: str = RAW_SQL) -> None:
+    sql_audit.audit_raw_sql(None, None, statement, {"id": 1}, None, False)
+
+
+def test_helper_tenant_safe_e_detectado_pela_flag_de_contexto():
+    assert is_tenant_safe_execution() is False
+
+    with tenant_safe_execution():
+        assert is_tenant_safe_execution() is True
+        _audit()
+
+    assert is_tenant_safe_execution() is False
+    assert sql_audit.get_audit_stats()["total"] == 0
+
+
+def test_origem_aponta_para_o_codigo_chamador():
+    _audit()
+
+    stats = sql_audit.SQL_AUDIT_STATS
+    assert stats["total"] == 1
+    assert stats["by_file"] == {"test_sql_audit_fast_path.py": 1}
+    assert sql_audit._get_call_origin()[1] == (
+        "test_origem_aponta_para_o_codigo_chamador"
+    )
+
+
+def test_classificacao_e_cacheada_por_statement(monkeypatch):
+    calls = []
+    original = sql_audit.classify_raw_sql_risk
+
+    def _counting(statement, has_tenant_filter=False):
+        calls.append(statement)
+        return original(statement, has_tenant_filter)
+
+    monkeypatch.setattr(sql_audit, "classify_raw_sql_risk", _counting)
+
+    for _ in range(5):
+        _audit()
+    _audit("SELECT 1 AS ok")
+
+    assert calls == [RAW_SQL]
+    assert sql_audit.SQL_AUDIT_STATS["total"] == 5
@@ -0,0 +1,301 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app.db import Base
+from app.tenancy.context import tenant_context
+from app.whatsapp.inbound_queue import (
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_PROCESSED,
+    STATUS_PROCESSING,
+    InboundMessageWorker,
+    enqueue_inbound_messages,
+)
+from app.whatsapp import models_handoff as _whatsapp_handoff_models  # noqa: F401
+from app.whatsapp.models import WhatsAppInboundMessage, WhatsAppMessage
+from app.whatsapp.webhook import process_webhook_payload
+
+
+@pytest.fixture
+def queue_table(db_session):
+    Base.metadata.create_all(
+        db_session.connection(), tables=[WhatsAppInboundMessage.__table__]
+    )
+
+
+def _payload(*messages):
+    return {
+        "entry": [
+            {
+                "changes": [
+                    {
+                        "value": {
+                            "messages": [
+                                {
+                                    "from": phone,
+                                    "id": wamid,
+                                    "timestamp": str(timestamp),
+                                    "type": "text",
+                                    "text": {"body": body},
+                                }
+                                for phone, wamid, timestamp, body in messages
+                            ]
+                        }
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def _enqueue(db_session, tenant_id, phone, wamid, body, received_at):
+    enqueue_inbound_messages(
+        db_session,
+        tenant_id=tenant_id,
+        messages=[
+            {
+                "phone": phone,
+                "whatsapp_msg_id": wamid,
+                "conteudo": body,
+                "received_at": received_at,
+            }
+        ],
+    )
+
+
+def _rows(db_session, tenant_id):
+    db_session.expire_all()
+    return {
+        row.whatsapp_msg_id: row
+        for row in db_session.query(WhatsAppInboundMessage).filter(
+            WhatsAppInboundMessage.tenant_id == tenant_id
+        )
+    }
+
+
+def test_webhook_grava_na_fila_e_ignora_reentrega(db_session, queue_table):
+    tenant_id = uuid4()
+    payload = _payload(
+        ("55 (11) 99999-0001", "wamid.1", 1_760_000_000, "Oi"),
+        ("5511999990001", "wamid.2", 1_760_000_003, "tem ração?"),
+    )
+
+    assert (
+        asyncio.run(process_webhook_payload(str(tenant_id), payload, db_session)) == 2
+    )
+    # Reentrega do provedor com o mesmo id não duplica
+    assert (
+        asyncio.run(process_webhook_payload(str(tenant_id), payload, db_session)) == 2
+    )
+
+    rows = _rows(db_session, tenant_id)
+    assert sorted(rows) == ["wamid.1", "wamid.2"]
+    assert {row.phone for row in rows.values()} == {"5511999990001"}
+    assert {row.status for row in rows.values()} == {STATUS_PENDING}
+
+
+def test_worker_serializa_por_conversa_limita_tenant_e_agrupa_rajadas(
+    db_session, queue_table
+):
+    tenant_a, tenant_b = uuid4(), uuid4()
+    base = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    # Rajada (0s, 3s) vira um turno; a mensagem 60s depois é outro turno
+    _enqueue(db_session, tenant_a, "5511000000001", "a1-1", "Oi", base)
+    _enqueue(
+        db_session,
+        tenant_a,
+        "5511000000001",
+        "a1-2",
+        "quero ração",
+        base + timedelta(seconds=3),
+    )
+    _enqueue(
+        db_session,
+        tenant_a,
+        "5511000000001",
+        "a1-3",
+        "obrigado",
+        base + timedelta(seconds=60),
+    )
+    _enqueue(db_session, tenant_a, "5511000000002", "a2-1", "Bom dia", base)
+    _enqueue(db_session, tenant_a, "5511000000003", "a3-1", "Olá", base)
+    _enqueue(db_session, tenant_b, "5521000000001", "b1-1", "Oi", base)
+    # Conversa com reserva recente em andamento não é reservada de novo
+    _enqueue(db_session, tenant_b, "5521000000002", "b2-1", "primeira", base)
+    _enqueue(db_session, tenant_b, "5521000000002", "b2-2", "segunda", base)
+    em_andamento = _rows(db_session, tenant_b)["b2-1"]
+    em_andamento.status = STATUS_PROCESSING
+    em_andamento.started_at = datetime.now(timezone.utc)
+    db_session.commit()
+
+    turns = []
+    active = {}
+    peak = {}
+
+    async def _handler(tenant_id, phone, messages, db):
+        active[tenant_id] = active.get(tenant_id, 0) + 1
+        peak[tenant_id] = max(peak.get(tenant_id, 0), active[tenant_id])
+        await asyncio.sleep(0.01)
+        turns.append((tenant_id, phone, [content for _wamid, content in messages]))
+        active[tenant_id] -= 1
+        if phone == "5521000000001":
+            raise RuntimeError("LLM indisponível")
+
+    worker = InboundMessageWorker(
+        lambda: db_session,
+        max_concurrent=4,
+        max_per_tenant=1,
+        debounce=timedelta(0),
+        turn_handler=_handler,
+    )
+    stats = asyncio.run(worker.run_once())
+
+    assert stats == {"conversations": 4, "turns": 4, "failed": 1}
+    assert peak[tenant_a] == 1
+    conversa_a1 = [t[2] for t in turns if t[1] == "5511000000001"]
+    assert conversa_a1 == [["Oi", "quero ração"], ["obrigado"]]
+    assert not any(t[1] == "5521000000002" for t in turns)
+
+    rows_a = _rows(db_session, tenant_a)
+    assert {row.status for row in rows_a.values()} == {STATUS_PROCESSED}
+    rows_b = _rows(db_session, tenant_b)
+    assert rows_b["b1-1"].status == STATUS_FAILED
+    assert rows_b["b1-1"].attempts == 1
+    assert "LLM indisponível" in rows_b["b1-1"].last_error
+    assert rows_b["b2-2"].status == STATUS_PENDING
+
+
+def test_turno_padrao_salva_mensagens_e_chama_processor_uma_vez(
+    db_session, queue_table, monkeypatch
+):
+    # Outro teste pode deixar foreign_keys ligado na conexão compartilhada; no
+    # SQLite tenants.id (String) não casa com o UUID gravado nas tabelas do WhatsApp
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    chamadas = []
+
+    class _FakeProcessor:
+        def __init__(self, db, tenant_id):
+            self.tenant_id = tenant_id
+
+        async def process_message(self, session_id, message_id, message_content):
+            chamadas.append(message_content)
+            return {"action": "responded"}
+
+    monkeypatch.setattr("app.whatsapp.processor.MessageProcessor", _FakeProcessor)
+    base = datetime.now(timezone.utc) - timedelta(minutes=1)
+    _enqueue(db_session, tenant_id, "5511000000009", "wamid.x1", "Oi", base)
+    _enqueue(
+        db_session,
+        tenant_id,
+        "5511000000009",
+        "wamid.x2",
+        "tem banho hoje?",
+        base + timedelta(seconds=2),
+    )
+
+    worker = InboundMessageWorker(lambda: db_session, debounce=timedelta(0))
+    assert asyncio.run(worker.run_once())["turns"] == 1
+
+    assert chamadas == ["Oi\ntem banho hoje?"]
+    with tenant_context(tenant_id):
+        salvas = (
+            db_session.query(WhatsAppMessage)
+            .filter(WhatsAppMessage.tenant_id == tenant_id)
+            .order_by(WhatsAppMessage.conteudo)
+            .all()
+        )
+        assert [m.whatsapp_message_id for m in salvas] == ["wamid.x1", "wamid.x2"]
+        assert salvas[0].session.message_count == 2
+
+
+def test_mensagem_nova_espera_o_backoff_da_anterior_que_falhou(db_session, queue_table):
+    tenant_id = uuid4()
+    base = datetime.now(timezone.utc) - timedelta(minutes=5)
+    _enqueue(db_session, tenant_id, "5511000000007", "w-1", "primeira", base)
+    falhou = _rows(db_session, tenant_id)["w-1"]
+    falhou.status = STATUS_FAILED
+    falhou.attempts = 1
+    falhou.next_attempt_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+    db_session.commit()
+    _enqueue(
+        db_session,
+        tenant_id,
+        "5511000000007",
+        "w-2",
+        "segunda",
+        base + timedelta(minutes=1),
+    )
+
+    turns = []
+
+    async def _handler(tenant_id, phone, messages, db):
+        turns.append([content for _wamid, content in messages])
+
+    worker = InboundMessageWorker(
+        lambda: db_session, debounce=timedelta(0), turn_handler=_handler
+    )
+    assert asyncio.run(worker.run_once())["conversations"] == 0
+    assert _rows(db_session, tenant_id)["w-2"].status == STATUS_PENDING
+
+    _rows(db_session, tenant_id)["w-1"].next_attempt_at = datetime.now(
+        timezone.utc
+    ) - timedelta(seconds=1)
+    db_session.commit()
+    asyncio.run(worker.run_once())
+
+    assert turns == [["primeira"], ["segunda"]]
+
+
+def test_erro_do_processor_volta_para_a_fila_e_a_nova_tentativa_processa(
+    db_session, queue_table, monkeypatch
+):
+    db_session.execute(text("PRAGMA foreign_keys = OFF"))
+    tenant_id = uuid4()
+    chamadas = []
+
+    class _ProcessorInstavel:
+        def __init__(self, db, tenant_id):
+            pass
+
+        async def process_message(self, session_id, message_id, message_content):
+            chamadas.append(message_content)
+            if len(chamadas) == 1:
+                raise RuntimeError("LLM indisponível")
+            return {"action": "responded"}
+
+    monkeypatch.setattr("app.whatsapp.processor.MessageProcessor", _ProcessorInstavel)
+    base = datetime.now(timezone.utc) - timedelta(minutes=1)
+    _enqueue(db_session, tenant_id, "5511000000008", "wamid.r1", "Oi", base)
+
+    worker = InboundMessageWorker(lambda: db_session, debounce=timedelta(0))
+    assert asyncio.run(worker.run_once())["failed"] == 1
+    fila = _rows(db_session, tenant_id)["wamid.r1"]
+    assert fila.status == STATUS_FAILED
+    assert "LLM indisponível" in fila.last_error
+    with tenant_context(tenant_id):
+        assert (
+            db_session.query(WhatsAppMessage)
+            .filter(WhatsAppMessage.tenant_id == tenant_id)
+            .count()
+            == 0
+        )
+
+    fila.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    assert asyncio.run(worker.run_once())["turns"] == 1
+
+    assert chamadas == ["Oi", "Oi"]
+    assert _rows(db_session, tenant_id)["wamid.r1"].status == STATUS_PROCESSED
+    with tenant_context(tenant_id):
+        salva = (
+            db_session.query(WhatsAppMessage)
+            .filter(WhatsAppMessage.tenant_id == tenant_id)
+            .one()
+        )
+        assert salva.session.message_count == 1
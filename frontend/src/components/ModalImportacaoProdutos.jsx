@@ -6,20 +6,25 @@ import api from "../api";
 import { getAccessToken } from "../auth/tokenStorage";
 import toast from "react-hot-toast";
 
+// Planilhas grandes levam alguns minutos; acima disso o modal para de consultar
+const ESPERA_MAXIMA_IMPORTACAO_MS = 30 * 60 * 1000;
+
 export default function ModalImportacaoProdutos({ isOpen, onClose, onSuccess }) {
   const [arquivo, setArquivo] = useState(null);
   const [importando, setImportando] = useState(false);
   const [resultado, setResultado] = useState(null);
   const [etapa, setEtapa] = useState("upload"); // 'upload', 'processando', 'resultado'
+  const [progresso, setProgresso] = useState(null);
 
   const handleFileChange = (e) => {
     const file = e.target.files[0];
     if (file) {
-      if (file.name.endsWith(".xlsx") || file.name.endsWith(".xls")) {
+      const nome = file.name.toLowerCase();
+      if (nome.endsWith(".xlsx") || nome.endsWith(".xls") || nome.endsWith(".csv")) {
         setArquivo(file);
         setResultado(null);
       } else {
-        toast.error("Arquivo deve ser Excel (.xlsx ou .xls)");
+        toast.error("Arquivo deve ser Excel (.xlsx ou .xls) ou CSV");
         e.target.value = "";
       }
     }
@@ -53,6 +58,29 @@ export default function ModalImportacaoProdutos({ isOpen, onClose, onSuccess })
     }
   };
 
+  // A importação roda em segundo plano no servidor; consulta até terminar.
+  // O servidor devolve "erro" se a importação parar de avançar; o limite aqui
+  // só evita consultar para sempre se nem isso chegar.
+  const aguardarImportacao = async (importacao) => {
+    let atual = importacao;
+    const limite = Date.now() + ESPERA_MAXIMA_IMPORTACAO_MS;
+    while (atual.status === "processando") {
+      if (Date.now() > limite) {
+        throw new Error(
+          "A importação ainda não terminou. Ela continua no servidor; confira os produtos em alguns minutos.",
+        );
+      }
+      setProgresso(atual);
+      await new Promise((resolve) => setTimeout(resolve, 1500));
+      const response = await api.get(`/produtos/importacoes/${atual.importacao_id}`);
+      atual = response.data;
+    }
+    if (atual.status === "erro") {
+      throw new Error(atual.erro || "Erro ao importar produtos");
+    }
+    return atual;
+  };
+
   const handleImportar = async () => {
     if (!arquivo) {
       toast.error("Selecione um arquivo para importar");
@@ -67,26 +95,28 @@ export default function ModalImportacaoProdutos({ isOpen, onClose, onSuccess })
       formData.append("file", arquivo);
 
       const response = await api.post("/produtos/importar", formData);
+      const final = await aguardarImportacao(response.data);
 
-      setResultado(response.data);
+      setResultado(final);
       setEtapa("resultado");
 
-      if (response.data.total_sucesso > 0) {
-        toast.success(`${response.data.total_sucesso} produtos processados com sucesso!`);
+      if (final.total_sucesso > 0) {
+        toast.success(`${final.total_sucesso} produtos processados com sucesso!`);
         if (onSuccess) {
           onSuccess();
         }
       }
 
-      if (response.data.total_erros > 0) {
-        toast.error(`${response.data.total_erros} produtos com erro`);
+      if (final.total_erros > 0) {
+        toast.error(`${final.total_erros} produtos com erro`);
       }
     } catch (error) {
       console.error("Erro ao importar:", error);
-      toast.error(error.response?.data?.detail || "Erro ao importar produtos");
+      toast.error(error.response?.data?.detail || error.message || "Erro ao importar produtos");
       setEtapa("upload");
     } finally {
       setImportando(false);
+      setProgresso(null);
     }
   };
 
@@ -206,7 +236,7 @@ export default function ModalImportacaoProdutos({ isOpen, onClose, onSuccess })
                         <span className="font-semibold">Clique para selecionar</span> ou arraste o
                         arquivo
                       </p>
-                      <p className="text-xs text-gray-500">Apenas arquivos Excel (.xlsx, .xls)</p>
+                      <p className="text-xs text-gray-500">Arquivos Excel (.xlsx, .xls) ou CSV</p>
 
                       {arquivo && (
                         <div className="mt-4 flex items-center gap-2 text-blue-600">
@@ -230,7 +260,7 @@ export default function ModalImportacaoProdutos({ isOpen, onClose, onSuccess })
                     <input
                       type="file"
                       className="hidden"
-                      accept=".xlsx,.xls"
+                      accept=".xlsx,.xls,.csv"
                       onChange={handleFileChange}
                     />
                   </label>
@@ -243,7 +273,13 @@ export default function ModalImportacaoProdutos({ isOpen, onClose, onSuccess })
             <div className="flex flex-col items-center justify-center py-12">
               <div className="animate-spin rounded-full h-16 w-16 border-b-2 border-blue-600 mb-4"></div>
               <p className="text-lg text-gray-700">Processando planilha...</p>
-              <p className="text-sm text-gray-500 mt-2">Isso pode levar alguns segundos</p>
+              {progresso?.total_linhas ? (
+                <p className="text-sm text-gray-500 mt-2">
+                  {progresso.total_processado} de {progresso.total_linhas} linhas ({progresso.progresso}%)
+                </p>
+              ) : (
+                <p className="text-sm text-gray-500 mt-2">Isso pode levar alguns segundos</p>
+              )}
             </div>
           )}
 
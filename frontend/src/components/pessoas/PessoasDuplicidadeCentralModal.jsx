@@ -64,7 +64,8 @@ export default function PessoasDuplicidadeCentralModal({
   const paginaTodaSelecionada =
     sugestoes.length > 0 && sugestoes.every((item) => selecionadas.has(chaveSugestao(item)));
   const inicio = totalSugestoes > 0 ? skip + 1 : 0;
-  const fim = Math.min(skip + sugestoes.length, totalSugestoes);
+  // skip/limit/total contam grupos de chave (nome, documento), nao pares
+  const fim = Math.min(skip + limit, totalSugestoes);
   const temPaginaAnterior = skip > 0;
   const temProximaPagina = skip + limit < totalSugestoes;
 
@@ -227,6 +227,9 @@ const Pessoas = () => {
         skip: Number(data?.skip ?? proximoSkip),
         limit: Number(data?.limit || LIMITE_DUPLICIDADES_POR_PAGINA),
       }));
+      if (data?.indexando) {
+        toast("Preparando a verificação de duplicidades. Atualize em alguns instantes.");
+      }
     } catch (err) {
       console.error("Erro ao carregar central de duplicidades:", err);
       toast.error(err?.response?.data?.detail || "Não foi possível carregar as duplicidades.");
@@ -16,6 +16,9 @@ import { api } from "../services/api";
 import FornecedorIdentity from "../components/ui/FornecedorIdentity";
 import { ModalClassificacao, ModalRegras } from "./conciliacaoBancaria/ConciliacaoBancariaModals";
 
+// Extratos de um ano levam poucos minutos; acima disso a tela para de consultar
+const ESPERA_MAXIMA_OFX_MS = 20 * 60 * 1000;
+
 export default function ConciliacaoBancaria() {
   const [movimentacoes, setMovimentacoes] = useState([]);
   const [estatisticas, setEstatisticas] = useState(null);
@@ -135,6 +138,44 @@ export default function ConciliacaoBancaria() {
       );
 
       console.log("✅ Upload concluído:", res.data);
+
+      // Extrato grande: a importação segue em background no servidor. O
+      // servidor devolve "erro" se ela parar de avançar; o limite aqui só evita
+      // consultar para sempre se nem isso chegar.
+      if (res.data.status === "processando") {
+        let status = res.data;
+        const limite = Date.now() + ESPERA_MAXIMA_OFX_MS;
+        while (status.status === "processando") {
+          if (Date.now() > limite) {
+            carregarMovimentacoes();
+            throw new Error(
+              "A importação ainda não terminou. Ela continua no servidor; atualize a página em alguns minutos.",
+            );
+          }
+          await new Promise((resolve) => setTimeout(resolve, 2000));
+          const progresso = await api.get(
+            `/api/conciliacao/extratos/${res.data.extrato_id}/status`,
+          );
+          status = progresso.data;
+          console.log(`⏳ Importando OFX: ${status.progresso}%`);
+        }
+        if (status.status === "erro") {
+          // Lotes gravados antes da falha já aparecem na lista
+          carregarMovimentacoes();
+          carregarEstatisticas();
+          throw new Error(status.erro || "Falha na importação do OFX");
+        }
+        alert(
+          `✅ OFX importado com sucesso!\n\n` +
+            `📊 Total de transações: ${status.total_transacoes}\n` +
+            `⏳ Pendentes: ${status.pendentes}\n` +
+            `📅 Período: ${res.data.periodo_inicio || "N/A"} a ${res.data.periodo_fim || "N/A"}`,
+        );
+        carregarMovimentacoes();
+        carregarEstatisticas();
+        return;
+      }
+
       alert(
         `✅ OFX importado com sucesso!\n\n` +
           `📊 Total de transações: ${res.data.total_transacoes}\n` +